@@ -0,0 +1,11296 @@
+/* File: _siestamodule.c
+ * This file is auto-generated with f2py (version:2.4.6).
+ * f2py is a Fortran to Python Interface Generator (FPIG), Second Edition,
+ * written by Pearu Peterson <pearu@cens.ioc.ee>.
+ * Generation date: Sat Oct 17 04:30:55 2026
+ * Do not edit this file directly unless you know what you are doing!!!
+ */
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+#ifndef PY_SSIZE_T_CLEAN
+#define PY_SSIZE_T_CLEAN
+#endif /* PY_SSIZE_T_CLEAN */
+
+/* Unconditionally included */
+#include <Python.h>
+#include <numpy/npy_os.h>
+
+/*********************** See f2py2e/cfuncs.py: includes ***********************/
+#include "numpy/npy_math.h"
+#include "fortranobject.h"
+#include <string.h>
+#include <math.h>
+
+/**************** See f2py2e/rules.py: mod_rules['modulebody'] ****************/
+static PyObject *_siesta_error;
+static PyObject *_siesta_module;
+
+/*********************** See f2py2e/cfuncs.py: typedefs ***********************/
+typedef signed char signed_char;
+typedef char * string;
+typedef struct {double r,i;} complex_double;
+typedef char character;
+typedef struct {float r,i;} complex_float;
+
+/****************** See f2py2e/cfuncs.py: typedefs_generated ******************/
+/*need_typedefs_generated*/
+
+/********************** See f2py2e/cfuncs.py: cppmacros **********************/
+
+#define PRINTPYOBJERR(obj)\
+    fprintf(stderr,"_siesta.error is related to ");\
+    PyObject_Print((PyObject *)obj,stderr,Py_PRINT_RAW);\
+    fprintf(stderr,"\n");
+
+
+#define pyobj_from_int1(v) (PyLong_FromLong(v))
+
+#define FAILNULL(p) do {                                            \
+    if ((p) == NULL) {                                              \
+        PyErr_SetString(PyExc_MemoryError, "NULL pointer found");   \
+        goto capi_fail;                                             \
+    }                                                               \
+} while (0)
+
+
+#define STRINGMALLOC(str,len)\
+    if ((str = (string)malloc(len+1)) == NULL) {\
+        PyErr_SetString(PyExc_MemoryError, "out of memory");\
+        goto capi_fail;\
+    } else {\
+        (str)[len] = '\0';\
+    }
+
+
+#if defined(PREPEND_FORTRAN)
+#if defined(NO_APPEND_FORTRAN)
+#if defined(UPPERCASE_FORTRAN)
+#define F_FUNC(f,F) _##F
+#else
+#define F_FUNC(f,F) _##f
+#endif
+#else
+#if defined(UPPERCASE_FORTRAN)
+#define F_FUNC(f,F) _##F##_
+#else
+#define F_FUNC(f,F) _##f##_
+#endif
+#endif
+#else
+#if defined(NO_APPEND_FORTRAN)
+#if defined(UPPERCASE_FORTRAN)
+#define F_FUNC(f,F) F
+#else
+#define F_FUNC(f,F) f
+#endif
+#else
+#if defined(UPPERCASE_FORTRAN)
+#define F_FUNC(f,F) F##_
+#else
+#define F_FUNC(f,F) f##_
+#endif
+#endif
+#endif
+#if defined(UNDERSCORE_G77)
+#define F_FUNC_US(f,F) F_FUNC(f##_,F##_)
+#else
+#define F_FUNC_US(f,F) F_FUNC(f,F)
+#endif
+
+
+/* See fortranobject.h for definitions. The macros here are provided for BC. */
+#define rank f2py_rank
+#define shape f2py_shape
+#define fshape f2py_shape
+#define len f2py_len
+#define flen f2py_flen
+#define slen f2py_slen
+#define size f2py_size
+
+
+#ifdef DEBUGCFUNCS
+#define CFUNCSMESS(mess) fprintf(stderr,"debug-capi:"mess);
+#define CFUNCSMESSPY(mess,obj) CFUNCSMESS(mess) \
+    PyObject_Print((PyObject *)obj,stderr,Py_PRINT_RAW);\
+    fprintf(stderr,"\n");
+#else
+#define CFUNCSMESS(mess)
+#define CFUNCSMESSPY(mess,obj)
+#endif
+
+
+#ifndef max
+#define max(a,b) ((a > b) ? (a) : (b))
+#endif
+#ifndef min
+#define min(a,b) ((a < b) ? (a) : (b))
+#endif
+#ifndef MAX
+#define MAX(a,b) ((a > b) ? (a) : (b))
+#endif
+#ifndef MIN
+#define MIN(a,b) ((a < b) ? (a) : (b))
+#endif
+
+
+#define STRINGFREE(str) do {if (!(str == NULL)) free(str);} while (0)
+
+
+/*
+STRINGPADN replaces null values with padding values from the right.
+
+`to` must have size of at least N bytes.
+
+If the `to[N-1]` has null value, then replace it and all the
+preceding, nulls with the given padding.
+
+STRINGPADN(to, N, PADDING, NULLVALUE) is an inverse operation.
+*/
+#define STRINGPADN(to, N, NULLVALUE, PADDING)                   \
+    do {                                                        \
+        int _m = (N);                                           \
+        char *_to = (to);                                       \
+        for (_m -= 1; _m >= 0 && _to[_m] == NULLVALUE; _m--) {  \
+             _to[_m] = PADDING;                                 \
+        }                                                       \
+    } while (0)
+
+
+#define CHECKSCALAR(check,tcheck,name,show,var)\
+    if (!(check)) {\
+        char errstring[256];\
+        sprintf(errstring, "%s: "show, "("tcheck") failed for "name, var);\
+        PyErr_SetString(_siesta_error,errstring);\
+        /*goto capi_fail;*/\
+    } else 
+
+#define CHECKARRAY(check,tcheck,name) \
+    if (!(check)) {\
+        PyErr_SetString(_siesta_error,"("tcheck") failed for "name);\
+        /*goto capi_fail;*/\
+    } else 
+
+#define pyobj_from_complex_double1(v) (PyComplex_FromDoubles(v.r,v.i))
+
+/* New SciPy */
+#define TRYPYARRAYTEMPLATECHAR case NPY_STRING: *(char *)(PyArray_DATA(arr))=*v; break;
+#define TRYPYARRAYTEMPLATELONG case NPY_LONG: *(long *)(PyArray_DATA(arr))=*v; break;
+#define TRYPYARRAYTEMPLATEOBJECT case NPY_OBJECT: PyArray_SETITEM(arr,PyArray_DATA(arr),pyobj_from_ ## ctype ## 1(*v)); break;
+
+#define TRYPYARRAYTEMPLATE(ctype,typecode) \
+        PyArrayObject *arr = NULL;\
+        if (!obj) return -2;\
+        if (!PyArray_Check(obj)) return -1;\
+        if (!(arr=(PyArrayObject *)obj)) {fprintf(stderr,"TRYPYARRAYTEMPLATE:");PRINTPYOBJERR(obj);return 0;}\
+        if (PyArray_DESCR(arr)->type==typecode)  {*(ctype *)(PyArray_DATA(arr))=*v; return 1;}\
+        switch (PyArray_TYPE(arr)) {\
+                case NPY_DOUBLE: *(npy_double *)(PyArray_DATA(arr))=*v; break;\
+                case NPY_INT: *(npy_int *)(PyArray_DATA(arr))=*v; break;\
+                case NPY_LONG: *(npy_long *)(PyArray_DATA(arr))=*v; break;\
+                case NPY_FLOAT: *(npy_float *)(PyArray_DATA(arr))=*v; break;\
+                case NPY_CDOUBLE: *(npy_double *)(PyArray_DATA(arr))=*v; break;\
+                case NPY_CFLOAT: *(npy_float *)(PyArray_DATA(arr))=*v; break;\
+                case NPY_BOOL: *(npy_bool *)(PyArray_DATA(arr))=(*v!=0); break;\
+                case NPY_UBYTE: *(npy_ubyte *)(PyArray_DATA(arr))=*v; break;\
+                case NPY_BYTE: *(npy_byte *)(PyArray_DATA(arr))=*v; break;\
+                case NPY_SHORT: *(npy_short *)(PyArray_DATA(arr))=*v; break;\
+                case NPY_USHORT: *(npy_ushort *)(PyArray_DATA(arr))=*v; break;\
+                case NPY_UINT: *(npy_uint *)(PyArray_DATA(arr))=*v; break;\
+                case NPY_ULONG: *(npy_ulong *)(PyArray_DATA(arr))=*v; break;\
+                case NPY_LONGLONG: *(npy_longlong *)(PyArray_DATA(arr))=*v; break;\
+                case NPY_ULONGLONG: *(npy_ulonglong *)(PyArray_DATA(arr))=*v; break;\
+                case NPY_LONGDOUBLE: *(npy_longdouble *)(PyArray_DATA(arr))=*v; break;\
+                case NPY_CLONGDOUBLE: *(npy_longdouble *)(PyArray_DATA(arr))=*v; break;\
+                case NPY_OBJECT: PyArray_SETITEM(arr, PyArray_DATA(arr), pyobj_from_ ## ctype ## 1(*v)); break;\
+        default: return -2;\
+        };\
+        return 1
+
+
+/*
+STRINGCOPYN copies N bytes.
+
+`to` and `from` buffers must have sizes of at least N bytes.
+*/
+#define STRINGCOPYN(to,from,N)                                  \
+    do {                                                        \
+        int _m = (N);                                           \
+        char *_to = (to);                                       \
+        char *_from = (from);                                   \
+        FAILNULL(_to); FAILNULL(_from);                         \
+        (void)strncpy(_to, _from, _m);             \
+    } while (0)
+
+
+/************************ See f2py2e/cfuncs.py: cfuncs ************************/
+
+static int
+int_from_pyobj(int* v, PyObject *obj, const char *errmess)
+{
+    PyObject* tmp = NULL;
+
+    if (PyLong_Check(obj)) {
+        *v = Npy__PyLong_AsInt(obj);
+        return !(*v == -1 && PyErr_Occurred());
+    }
+
+    tmp = PyNumber_Long(obj);
+    if (tmp) {
+        *v = Npy__PyLong_AsInt(tmp);
+        Py_DECREF(tmp);
+        return !(*v == -1 && PyErr_Occurred());
+    }
+
+    if (PyComplex_Check(obj)) {
+        PyErr_Clear();
+        tmp = PyObject_GetAttrString(obj,"real");
+    }
+    else if (PyBytes_Check(obj) || PyUnicode_Check(obj)) {
+        /*pass*/;
+    }
+    else if (PySequence_Check(obj)) {
+        PyErr_Clear();
+        tmp = PySequence_GetItem(obj, 0);
+    }
+
+    if (tmp) {
+        if (int_from_pyobj(v, tmp, errmess)) {
+            Py_DECREF(tmp);
+            return 1;
+        }
+        Py_DECREF(tmp);
+    }
+
+    {
+        PyObject* err = PyErr_Occurred();
+        if (err == NULL) {
+            err = _siesta_error;
+        }
+        PyErr_SetString(err, errmess);
+    }
+    return 0;
+}
+
+
+/*
+  Create a new string buffer `str` of at most length `len` from a
+  Python string-like object `obj`.
+
+  The string buffer has given size (len) or the size of inistr when len==-1.
+
+  The string buffer is padded with blanks: in Fortran, trailing blanks
+  are insignificant contrary to C nulls.
+ */
+static int
+string_from_pyobj(string *str, int *len, const string inistr, PyObject *obj,
+                  const char *errmess)
+{
+    PyObject *tmp = NULL;
+    string buf = NULL;
+    npy_intp n = -1;
+#ifdef DEBUGCFUNCS
+fprintf(stderr,"string_from_pyobj(str='%s',len=%d,inistr='%s',obj=%p)\n",
+               (char*)str, *len, (char *)inistr, obj);
+#endif
+    if (obj == Py_None) {
+        n = strlen(inistr);
+        buf = inistr;
+    }
+    else if (PyArray_Check(obj)) {
+        PyArrayObject *arr = (PyArrayObject *)obj;
+        if (!ISCONTIGUOUS(arr)) {
+            PyErr_SetString(PyExc_ValueError,
+                            "array object is non-contiguous.");
+            goto capi_fail;
+        }
+        n = PyArray_NBYTES(arr);
+        buf = PyArray_DATA(arr);
+        n = strnlen(buf, n);
+    }
+    else {
+        if (PyBytes_Check(obj)) {
+            tmp = obj;
+            Py_INCREF(tmp);
+        }
+        else if (PyUnicode_Check(obj)) {
+            tmp = PyUnicode_AsASCIIString(obj);
+        }
+        else {
+            PyObject *tmp2;
+            tmp2 = PyObject_Str(obj);
+            if (tmp2) {
+                tmp = PyUnicode_AsASCIIString(tmp2);
+                Py_DECREF(tmp2);
+            }
+            else {
+                tmp = NULL;
+            }
+        }
+        if (tmp == NULL) goto capi_fail;
+        n = PyBytes_GET_SIZE(tmp);
+        buf = PyBytes_AS_STRING(tmp);
+    }
+    if (*len == -1) {
+        /* TODO: change the type of `len` so that we can remove this */
+        if (n > NPY_MAX_INT) {
+            PyErr_SetString(PyExc_OverflowError,
+                            "object too large for a 32-bit int");
+            goto capi_fail;
+        }
+        *len = n;
+    }
+    else if (*len < n) {
+        /* discard the last (len-n) bytes of input buf */
+        n = *len;
+    }
+    if (n < 0 || *len < 0 || buf == NULL) {
+        goto capi_fail;
+    }
+    STRINGMALLOC(*str, *len);  // *str is allocated with size (*len + 1)
+    if (n < *len) {
+        /*
+          Pad fixed-width string with nulls. The caller will replace
+          nulls with blanks when the corresponding argument is not
+          intent(c).
+        */
+        memset(*str + n, '\0', *len - n);
+    }
+    STRINGCOPYN(*str, buf, n);
+    Py_XDECREF(tmp);
+    return 1;
+capi_fail:
+    Py_XDECREF(tmp);
+    {
+        PyObject* err = PyErr_Occurred();
+        if (err == NULL) {
+            err = _siesta_error;
+        }
+        PyErr_SetString(err, errmess);
+    }
+    return 0;
+}
+
+
+static int
+double_from_pyobj(double* v, PyObject *obj, const char *errmess)
+{
+    PyObject* tmp = NULL;
+    if (PyFloat_Check(obj)) {
+        *v = PyFloat_AsDouble(obj);
+        return !(*v == -1.0 && PyErr_Occurred());
+    }
+
+    tmp = PyNumber_Float(obj);
+    if (tmp) {
+        *v = PyFloat_AsDouble(tmp);
+        Py_DECREF(tmp);
+        return !(*v == -1.0 && PyErr_Occurred());
+    }
+
+    if (PyComplex_Check(obj)) {
+        PyErr_Clear();
+        tmp = PyObject_GetAttrString(obj,"real");
+    }
+    else if (PyBytes_Check(obj) || PyUnicode_Check(obj)) {
+        /*pass*/;
+    }
+    else if (PySequence_Check(obj)) {
+        PyErr_Clear();
+        tmp = PySequence_GetItem(obj, 0);
+    }
+
+    if (tmp) {
+        if (double_from_pyobj(v,tmp,errmess)) {Py_DECREF(tmp); return 1;}
+        Py_DECREF(tmp);
+    }
+    {
+        PyObject* err = PyErr_Occurred();
+        if (err==NULL) err = _siesta_error;
+        PyErr_SetString(err,errmess);
+    }
+    return 0;
+}
+
+
+static int
+complex_double_from_pyobj(complex_double* v, PyObject *obj, const char *errmess) {
+    Py_complex c;
+    if (PyComplex_Check(obj)) {
+        c = PyComplex_AsCComplex(obj);
+        (*v).r = c.real;
+        (*v).i = c.imag;
+        return 1;
+    }
+    if (PyArray_IsScalar(obj, ComplexFloating)) {
+        if (PyArray_IsScalar(obj, CFloat)) {
+            npy_cfloat new;
+            PyArray_ScalarAsCtype(obj, &new);
+            (*v).r = (double)npy_crealf(new);
+            (*v).i = (double)npy_cimagf(new);
+        }
+        else if (PyArray_IsScalar(obj, CLongDouble)) {
+            npy_clongdouble new;
+            PyArray_ScalarAsCtype(obj, &new);
+            (*v).r = (double)npy_creall(new);
+            (*v).i = (double)npy_cimagl(new);
+        }
+        else { /* if (PyArray_IsScalar(obj, CDouble)) */
+            PyArray_ScalarAsCtype(obj, v);
+        }
+        return 1;
+    }
+    if (PyArray_CheckScalar(obj)) { /* 0-dim array or still array scalar */
+        PyArrayObject *arr;
+        if (PyArray_Check(obj)) {
+            arr = (PyArrayObject *)PyArray_Cast((PyArrayObject *)obj, NPY_CDOUBLE);
+        }
+        else {
+            arr = (PyArrayObject *)PyArray_FromScalar(obj, PyArray_DescrFromType(NPY_CDOUBLE));
+        }
+        if (arr == NULL) {
+            return 0;
+        }
+        (*v).r = npy_creal(*(((npy_cdouble *)PyArray_DATA(arr))));
+        (*v).i = npy_cimag(*(((npy_cdouble *)PyArray_DATA(arr))));
+        Py_DECREF(arr);
+        return 1;
+    }
+    /* Python does not provide PyNumber_Complex function :-( */
+    (*v).i = 0.0;
+    if (PyFloat_Check(obj)) {
+        (*v).r = PyFloat_AsDouble(obj);
+        return !((*v).r == -1.0 && PyErr_Occurred());
+    }
+    if (PyLong_Check(obj)) {
+        (*v).r = PyLong_AsDouble(obj);
+        return !((*v).r == -1.0 && PyErr_Occurred());
+    }
+    if (PySequence_Check(obj) && !(PyBytes_Check(obj) || PyUnicode_Check(obj))) {
+        PyObject *tmp = PySequence_GetItem(obj,0);
+        if (tmp) {
+            if (complex_double_from_pyobj(v,tmp,errmess)) {
+                Py_DECREF(tmp);
+                return 1;
+            }
+            Py_DECREF(tmp);
+        }
+    }
+    {
+        PyObject* err = PyErr_Occurred();
+        if (err==NULL)
+            err = PyExc_TypeError;
+        PyErr_SetString(err,errmess);
+    }
+    return 0;
+}
+
+static int try_pyarr_from_int(PyObject* obj,int* v) {
+    TRYPYARRAYTEMPLATE(int,'i');
+}
+
+
+/********************* See f2py2e/cfuncs.py: userincludes *********************/
+/*need_userincludes*/
+
+/********************* See f2py2e/capi_rules.py: usercode *********************/
+
+
+/* See f2py2e/rules.py */
+extern void F_FUNC_US(siesta_sc_off,SIESTA_SC_OFF)(int*,int*,int*,int*);
+extern void F_FUNC_US(read_hsx_version,READ_HSX_VERSION)(string,int*,size_t);
+extern void F_FUNC_US(read_hsx_sizes,READ_HSX_SIZES)(string,int*,int*,int*,int*,int*,size_t);
+extern void F_FUNC_US(read_hsx_sizes0,READ_HSX_SIZES0)(string,int*,int*,int*,int*,int*,size_t);
+extern void F_FUNC_US(read_hsx_sizes1,READ_HSX_SIZES1)(string,int*,int*,int*,int*,int*,size_t);
+extern void F_FUNC_US(read_hsx_ef,READ_HSX_EF)(string,double*,size_t);
+extern void F_FUNC_US(read_hsx_ef0,READ_HSX_EF0)(string,double*,size_t);
+extern void F_FUNC_US(read_hsx_ef1,READ_HSX_EF1)(string,double*,size_t);
+extern void F_FUNC_US(internal_read_hsx_skip_specie1,INTERNAL_READ_HSX_SKIP_SPECIE1)(int*,int*);
+extern void F_FUNC_US(read_hsx_hsx0,READ_HSX_HSX0)(string,int*,int*,int*,int*,int*,int*,float*,float*,float*,size_t);
+extern void F_FUNC_US(read_hsx_hsx1,READ_HSX_HSX1)(string,int*,int*,int*,int*,int*,int*,double*,double*,int*,size_t);
+extern void F_FUNC_US(read_hsx_sx0,READ_HSX_SX0)(string,int*,int*,int*,int*,int*,int*,float*,float*,size_t);
+extern void F_FUNC_US(read_hsx_sx1,READ_HSX_SX1)(string,int*,int*,int*,int*,int*,int*,double*,int*,size_t);
+extern void F_FUNC_US(read_hsx_geom1,READ_HSX_GEOM1)(string,int*,double*,int*,double*,int*,size_t);
+extern void F_FUNC_US(read_hsx_specie_sizes,READ_HSX_SPECIE_SIZES)(string,int*,int*,int*,size_t);
+extern void F_FUNC_US(read_hsx_specie_sizes0,READ_HSX_SPECIE_SIZES0)(string,int*,int*,int*,size_t);
+extern void F_FUNC_US(read_hsx_specie_sizes1,READ_HSX_SPECIE_SIZES1)(string,int*,int*,int*,size_t);
+extern void F_FUNC_US(read_hsx_species,READ_HSX_SPECIES)(string,int*,int*,int*,string*,double*,int*,int*,size_t,size_t);
+extern void F_FUNC_US(read_hsx_species0,READ_HSX_SPECIES0)(string,int*,int*,int*,string*,double*,int*,int*,size_t,size_t);
+extern void F_FUNC_US(read_hsx_species1,READ_HSX_SPECIES1)(string,int*,int*,int*,string*,double*,int*,int*,size_t,size_t);
+extern void F_FUNC_US(read_hsx_specie,READ_HSX_SPECIE)(string,int*,int*,int*,int*,int*,size_t);
+extern void F_FUNC_US(read_hsx_specie0,READ_HSX_SPECIE0)(string,int*,int*,int*,int*,int*,size_t);
+extern void F_FUNC_US(read_hsx_specie1,READ_HSX_SPECIE1)(string,int*,int*,int*,int*,int*,size_t);
+extern void F_FUNC_US(write_hsx0,WRITE_HSX0)(string,int*,int*,int*,int*,int*,int*,int*,int*,double*,double*,double*,double*,double*,size_t);
+extern void F_FUNC_US(read_dm_sizes,READ_DM_SIZES)(string,int*,int*,int*,int*,size_t);
+extern void F_FUNC_US(read_dm,READ_DM)(string,int*,int*,int*,int*,int*,int*,double*,size_t);
+extern void F_FUNC_US(write_dm,WRITE_DM)(string,int*,int*,int*,int*,int*,int*,double*,size_t);
+extern void F_FUNC_US(read_tshs_version,READ_TSHS_VERSION)(string,int*,size_t);
+extern void F_FUNC_US(read_tshs_sizes,READ_TSHS_SIZES)(string,int*,int*,int*,int*,int*,size_t);
+extern void F_FUNC_US(read_tshs_ef,READ_TSHS_EF)(string,double*,size_t);
+extern void F_FUNC_US(read_tshs_cell,READ_TSHS_CELL)(string,int*,int*,double*,int*,size_t);
+extern void F_FUNC_US(read_tshs_geom,READ_TSHS_GEOM)(string,int*,double*,int*,size_t);
+extern void F_FUNC_US(read_tshs_hs,READ_TSHS_HS)(string,int*,int*,int*,int*,int*,double*,double*,size_t);
+extern void F_FUNC_US(read_tshs_s,READ_TSHS_S)(string,int*,int*,int*,int*,double*,size_t);
+extern void F_FUNC_US(write_tshs_hs,WRITE_TSHS_HS)(string,int*,int*,int*,int*,int*,int*,int*,double*,double*,int*,int*,int*,double*,double*,int*,size_t);
+extern void F_FUNC_US(read_grid_sizes,READ_GRID_SIZES)(string,int*,int*,size_t);
+extern void F_FUNC_US(read_grid_cell,READ_GRID_CELL)(string,double*,size_t);
+extern void F_FUNC_US(read_grid,READ_GRID)(string,int*,int*,int*,int*,float*,size_t);
+extern void F_FUNC_US(write_grid,WRITE_GRID)(string,int*,int*,int*,int*,double*,float*,size_t);
+extern void F_FUNC_US(read_gf_sizes,READ_GF_SIZES)(int*,int*,int*,int*,int*);
+extern void F_FUNC_US(read_gf_header,READ_GF_HEADER)(int*,int*,double*,int*,complex_double*);
+extern void F_FUNC_US(read_gf_find,READ_GF_FIND)(int*,int*,int*,int*,int*,int*,int*,int*,int*,int*,int*,int*,int*);
+extern void F_FUNC_US(read_gf_hs,READ_GF_HS)(int*,int*,complex_double*,complex_double*);
+extern void F_FUNC_US(read_gf_se,READ_GF_SE)(int*,int*,int*,complex_double*);
+extern void F_FUNC_US(write_gf_header,WRITE_GF_HEADER)(int*,int*,double*,int*,int*,int*,int*,double*,int*,int*,int*,double*,int*,double*,double*,int*,complex_double*);
+extern void F_FUNC_US(write_gf_hs,WRITE_GF_HS)(int*,int*,complex_double*,int*,complex_double*,complex_double*);
+extern void F_FUNC_US(write_gf_se,WRITE_GF_SE)(int*,int*,int*,complex_double*,int*,complex_double*);
+extern void F_FUNC_US(read_tsde_sizes,READ_TSDE_SIZES)(string,int*,int*,int*,int*,size_t);
+extern void F_FUNC_US(read_tsde_dm,READ_TSDE_DM)(string,int*,int*,int*,int*,int*,int*,double*,size_t);
+extern void F_FUNC_US(read_tsde_ef,READ_TSDE_EF)(string,double*,size_t);
+extern void F_FUNC_US(read_tsde_edm,READ_TSDE_EDM)(string,int*,int*,int*,int*,int*,int*,double*,size_t);
+extern void F_FUNC_US(write_tsde_dm_edm,WRITE_TSDE_DM_EDM)(string,int*,int*,int*,int*,int*,int*,double*,double*,double*,size_t);
+extern void F_FUNC_US(read_hs_header,READ_HS_HEADER)(string,int*,int*,int*,int*,int*,size_t);
+extern void F_FUNC_US(read_hs,READ_HS)(string,int*,int*,int*,int*,int*,int*,int*,double*,double*,double*,size_t);
+extern void F_FUNC_US(read_wfsx_next_sizes,READ_WFSX_NEXT_SIZES)(int*,int*,int*,int*,int*,int*);
+extern void F_FUNC_US(read_wfsx_sizes,READ_WFSX_SIZES)(string,int*,int*,int*,int*,size_t);
+extern void F_FUNC_US(read_wfsx_next_basis,READ_WFSX_NEXT_BASIS)(int*,int*,int*,character*,int*,int*,character*);
+extern void F_FUNC_US(read_wfsx_next_info,READ_WFSX_NEXT_INFO)(int*,int*,int*,double*,double*,int*);
+extern void F_FUNC_US(read_wfsx_index_info,READ_WFSX_INDEX_INFO)(string,int*,int*,double*,double*,int*,size_t);
+extern void F_FUNC_US(read_wfsx_next_index_check,READ_WFSX_NEXT_INDEX_CHECK)(int*,int*,int*,int*,int*);
+extern void F_FUNC_US(skip_wfsx_next_eigenstate,SKIP_WFSX_NEXT_EIGENSTATE)(int*);
+extern void F_FUNC_US(skip_wfsx_next_vals,SKIP_WFSX_NEXT_VALS)(int*,int*);
+extern void F_FUNC_US(skip_wfsx_index,SKIP_WFSX_INDEX)(int*,int*,int*);
+extern void F_FUNC_US(read_wfsx_next_1,READ_WFSX_NEXT_1)(int*,int*,int*,int*,double*,float*);
+extern void F_FUNC_US(read_wfsx_next_2,READ_WFSX_NEXT_2)(int*,int*,int*,int*,double*,complex_float*);
+extern void F_FUNC_US(read_wfsx_next_4,READ_WFSX_NEXT_4)(int*,int*,int*,int*,double*,complex_float*);
+extern void F_FUNC_US(read_wfsx_index_1,READ_WFSX_INDEX_1)(string,int*,int*,int*,int*,int*,double*,float*,size_t);
+extern void F_FUNC_US(read_wfsx_index_2,READ_WFSX_INDEX_2)(string,int*,int*,int*,int*,int*,double*,complex_float*,size_t);
+extern void F_FUNC_US(read_wfsx_index_4,READ_WFSX_INDEX_4)(string,int*,int*,int*,int*,int*,double*,complex_float*,size_t);
+extern void F_FUNC_US(read_wfsx_next_all_info,READ_WFSX_NEXT_ALL_INFO)(int*,int*,int*,double*,double*,int*);
+/*eof externroutines*/
+
+/******************** See f2py2e/capi_rules.py: usercode1 ********************/
+
+
+/******************* See f2py2e/cb_rules.py: buildcallback *******************/
+/*need_callbacks*/
+
+/*********************** See f2py2e/rules.py: buildapi ***********************/
+
+/******************************* siesta_sc_off *******************************/
+static char doc_f2py_rout__siesta_siesta_sc_off[] = "\
+isc = siesta_sc_off(nsa,nsb,nsc)\n\nWrapper for ``siesta_sc_off``.\
+\n\nParameters\n----------\n"
+"nsa : input int\n"
+"nsb : input int\n"
+"nsc : input int\n"
+"\nReturns\n-------\n"
+"isc : rank-2 array('i') with bounds (3,nsa * nsb * nsc)";
+/* extern void F_FUNC_US(siesta_sc_off,SIESTA_SC_OFF)(int*,int*,int*,int*); */
+static PyObject *f2py_rout__siesta_siesta_sc_off(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(int*,int*,int*,int*)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    int nsa = 0;
+    PyObject *nsa_capi = Py_None;
+    int nsb = 0;
+    PyObject *nsb_capi = Py_None;
+    int nsc = 0;
+    PyObject *nsc_capi = Py_None;
+    int *isc = NULL;
+    npy_intp isc_Dims[2] = {-1, -1};
+    const int isc_Rank = 2;
+    PyArrayObject *capi_isc_as_array = NULL;
+    int capi_isc_intent = 0;
+    static char *capi_kwlist[] = {"nsa","nsb","nsc",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOO|:_siesta.siesta_sc_off",\
+        capi_kwlist,&nsa_capi,&nsb_capi,&nsc_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable nsa */
+        f2py_success = int_from_pyobj(&nsa,nsa_capi,"_siesta.siesta_sc_off() 1st argument (nsa) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable nsb */
+        f2py_success = int_from_pyobj(&nsb,nsb_capi,"_siesta.siesta_sc_off() 2nd argument (nsb) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable nsc */
+        f2py_success = int_from_pyobj(&nsc,nsc_capi,"_siesta.siesta_sc_off() 3rd argument (nsc) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable isc */
+    isc_Dims[0]=3,isc_Dims[1]=nsa * nsb * nsc;
+    capi_isc_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.siesta_sc_off: failed to create array from the hidden `isc`";
+    capi_isc_as_array = ndarray_from_pyobj(  NPY_INT,1,isc_Dims,isc_Rank,  capi_isc_intent,Py_None,capi_errmess);
+    if (capi_isc_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        isc = (int *)(PyArray_DATA(capi_isc_as_array));
+
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(&nsa,&nsb,&nsc,isc);
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("N",capi_isc_as_array);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    }  /* if (capi_isc_as_array == NULL) ... else of isc */
+    /* End of cleaning variable isc */
+    } /*if (f2py_success) of nsc*/
+    /* End of cleaning variable nsc */
+    } /*if (f2py_success) of nsb*/
+    /* End of cleaning variable nsb */
+    } /*if (f2py_success) of nsa*/
+    /* End of cleaning variable nsa */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/**************************** end of siesta_sc_off ****************************/
+
+/****************************** read_hsx_version ******************************/
+static char doc_f2py_rout__siesta_read_hsx_version[] = "\
+version = read_hsx_version(fname)\n\nWrapper for ``read_hsx_version``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"\nReturns\n-------\n"
+"version : int";
+/* extern void F_FUNC_US(read_hsx_version,READ_HSX_VERSION)(string,int*,size_t); */
+static PyObject *f2py_rout__siesta_read_hsx_version(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int version = 0;
+    static char *capi_kwlist[] = {"fname",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "O|:_siesta.read_hsx_version",\
+        capi_kwlist,&fname_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_hsx_version to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable version */
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&version,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("i",version);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    /* End of cleaning variable version */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/************************** end of read_hsx_version **************************/
+
+/******************************* read_hsx_sizes *******************************/
+static char doc_f2py_rout__siesta_read_hsx_sizes[] = "\
+nspin,na_u,no_u,no_s,maxnh = read_hsx_sizes(fname)\n\nWrapper for ``read_hsx_sizes``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"\nReturns\n-------\n"
+"nspin : int\n"
+"na_u : int\n"
+"no_u : int\n"
+"no_s : int\n"
+"maxnh : int";
+/* extern void F_FUNC_US(read_hsx_sizes,READ_HSX_SIZES)(string,int*,int*,int*,int*,int*,size_t); */
+static PyObject *f2py_rout__siesta_read_hsx_sizes(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,int*,int*,int*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int nspin = 0;
+    int na_u = 0;
+    int no_u = 0;
+    int no_s = 0;
+    int maxnh = 0;
+    static char *capi_kwlist[] = {"fname",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "O|:_siesta.read_hsx_sizes",\
+        capi_kwlist,&fname_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_hsx_sizes to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable nspin */
+    /* Processing variable na_u */
+    /* Processing variable no_u */
+    /* Processing variable no_s */
+    /* Processing variable maxnh */
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&nspin,&na_u,&no_u,&no_s,&maxnh,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("iiiii",nspin,na_u,no_u,no_s,maxnh);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    /* End of cleaning variable maxnh */
+    /* End of cleaning variable no_s */
+    /* End of cleaning variable no_u */
+    /* End of cleaning variable na_u */
+    /* End of cleaning variable nspin */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/*************************** end of read_hsx_sizes ***************************/
+
+/****************************** read_hsx_sizes0 ******************************/
+static char doc_f2py_rout__siesta_read_hsx_sizes0[] = "\
+nspin,na_u,no_u,no_s,maxnh = read_hsx_sizes0(fname)\n\nWrapper for ``read_hsx_sizes0``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"\nReturns\n-------\n"
+"nspin : int\n"
+"na_u : int\n"
+"no_u : int\n"
+"no_s : int\n"
+"maxnh : int";
+/* extern void F_FUNC_US(read_hsx_sizes0,READ_HSX_SIZES0)(string,int*,int*,int*,int*,int*,size_t); */
+static PyObject *f2py_rout__siesta_read_hsx_sizes0(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,int*,int*,int*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int nspin = 0;
+    int na_u = 0;
+    int no_u = 0;
+    int no_s = 0;
+    int maxnh = 0;
+    static char *capi_kwlist[] = {"fname",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "O|:_siesta.read_hsx_sizes0",\
+        capi_kwlist,&fname_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_hsx_sizes0 to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable nspin */
+    /* Processing variable na_u */
+    /* Processing variable no_u */
+    /* Processing variable no_s */
+    /* Processing variable maxnh */
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&nspin,&na_u,&no_u,&no_s,&maxnh,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("iiiii",nspin,na_u,no_u,no_s,maxnh);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    /* End of cleaning variable maxnh */
+    /* End of cleaning variable no_s */
+    /* End of cleaning variable no_u */
+    /* End of cleaning variable na_u */
+    /* End of cleaning variable nspin */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/*************************** end of read_hsx_sizes0 ***************************/
+
+/****************************** read_hsx_sizes1 ******************************/
+static char doc_f2py_rout__siesta_read_hsx_sizes1[] = "\
+nspin,na_u,no_u,no_s,maxnh = read_hsx_sizes1(fname)\n\nWrapper for ``read_hsx_sizes1``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"\nReturns\n-------\n"
+"nspin : int\n"
+"na_u : int\n"
+"no_u : int\n"
+"no_s : int\n"
+"maxnh : int";
+/* extern void F_FUNC_US(read_hsx_sizes1,READ_HSX_SIZES1)(string,int*,int*,int*,int*,int*,size_t); */
+static PyObject *f2py_rout__siesta_read_hsx_sizes1(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,int*,int*,int*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int nspin = 0;
+    int na_u = 0;
+    int no_u = 0;
+    int no_s = 0;
+    int maxnh = 0;
+    static char *capi_kwlist[] = {"fname",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "O|:_siesta.read_hsx_sizes1",\
+        capi_kwlist,&fname_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_hsx_sizes1 to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable nspin */
+    /* Processing variable na_u */
+    /* Processing variable no_u */
+    /* Processing variable no_s */
+    /* Processing variable maxnh */
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&nspin,&na_u,&no_u,&no_s,&maxnh,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("iiiii",nspin,na_u,no_u,no_s,maxnh);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    /* End of cleaning variable maxnh */
+    /* End of cleaning variable no_s */
+    /* End of cleaning variable no_u */
+    /* End of cleaning variable na_u */
+    /* End of cleaning variable nspin */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/*************************** end of read_hsx_sizes1 ***************************/
+
+/******************************** read_hsx_ef ********************************/
+static char doc_f2py_rout__siesta_read_hsx_ef[] = "\
+ef = read_hsx_ef(fname)\n\nWrapper for ``read_hsx_ef``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"\nReturns\n-------\n"
+"ef : float";
+/* extern void F_FUNC_US(read_hsx_ef,READ_HSX_EF)(string,double*,size_t); */
+static PyObject *f2py_rout__siesta_read_hsx_ef(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,double*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    double ef = 0;
+    static char *capi_kwlist[] = {"fname",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "O|:_siesta.read_hsx_ef",\
+        capi_kwlist,&fname_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_hsx_ef to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable ef */
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&ef,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("d",ef);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    /* End of cleaning variable ef */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/***************************** end of read_hsx_ef *****************************/
+
+/******************************** read_hsx_ef0 ********************************/
+static char doc_f2py_rout__siesta_read_hsx_ef0[] = "\
+ef = read_hsx_ef0(fname)\n\nWrapper for ``read_hsx_ef0``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"\nReturns\n-------\n"
+"ef : float";
+/* extern void F_FUNC_US(read_hsx_ef0,READ_HSX_EF0)(string,double*,size_t); */
+static PyObject *f2py_rout__siesta_read_hsx_ef0(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,double*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    double ef = 0;
+    static char *capi_kwlist[] = {"fname",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "O|:_siesta.read_hsx_ef0",\
+        capi_kwlist,&fname_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_hsx_ef0 to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable ef */
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&ef,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("d",ef);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    /* End of cleaning variable ef */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/**************************** end of read_hsx_ef0 ****************************/
+
+/******************************** read_hsx_ef1 ********************************/
+static char doc_f2py_rout__siesta_read_hsx_ef1[] = "\
+ef = read_hsx_ef1(fname)\n\nWrapper for ``read_hsx_ef1``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"\nReturns\n-------\n"
+"ef : float";
+/* extern void F_FUNC_US(read_hsx_ef1,READ_HSX_EF1)(string,double*,size_t); */
+static PyObject *f2py_rout__siesta_read_hsx_ef1(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,double*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    double ef = 0;
+    static char *capi_kwlist[] = {"fname",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "O|:_siesta.read_hsx_ef1",\
+        capi_kwlist,&fname_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_hsx_ef1 to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable ef */
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&ef,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("d",ef);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    /* End of cleaning variable ef */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/**************************** end of read_hsx_ef1 ****************************/
+
+/*********************** internal_read_hsx_skip_specie1 ***********************/
+static char doc_f2py_rout__siesta_internal_read_hsx_skip_specie1[] = "\
+internal_read_hsx_skip_specie1(iu,nspecies)\n\nWrapper for ``internal_read_hsx_skip_specie1``.\
+\n\nParameters\n----------\n"
+"iu : input int\n"
+"nspecies : input int";
+/* extern void F_FUNC_US(internal_read_hsx_skip_specie1,INTERNAL_READ_HSX_SKIP_SPECIE1)(int*,int*); */
+static PyObject *f2py_rout__siesta_internal_read_hsx_skip_specie1(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(int*,int*)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    int iu = 0;
+    PyObject *iu_capi = Py_None;
+    int nspecies = 0;
+    PyObject *nspecies_capi = Py_None;
+    static char *capi_kwlist[] = {"iu","nspecies",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OO|:_siesta.internal_read_hsx_skip_specie1",\
+        capi_kwlist,&iu_capi,&nspecies_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable iu */
+        f2py_success = int_from_pyobj(&iu,iu_capi,"_siesta.internal_read_hsx_skip_specie1() 1st argument (iu) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable nspecies */
+        f2py_success = int_from_pyobj(&nspecies,nspecies_capi,"_siesta.internal_read_hsx_skip_specie1() 2nd argument (nspecies) can't be converted to int");
+    if (f2py_success) {
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(&iu,&nspecies);
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("");
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    } /*if (f2py_success) of nspecies*/
+    /* End of cleaning variable nspecies */
+    } /*if (f2py_success) of iu*/
+    /* End of cleaning variable iu */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/******************* end of internal_read_hsx_skip_specie1 *******************/
+
+/******************************* read_hsx_hsx0 *******************************/
+static char doc_f2py_rout__siesta_read_hsx_hsx0[] = "\
+numh,listh,h,s,xij = read_hsx_hsx0(fname,nspin,no_u,no_s,maxnh)\n\nWrapper for ``read_hsx_hsx0``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"nspin : input int\n"
+"no_u : input int\n"
+"no_s : input int\n"
+"maxnh : input int\n"
+"\nReturns\n-------\n"
+"numh : rank-1 array('i') with bounds (no_u)\n"
+"listh : rank-1 array('i') with bounds (maxnh)\n"
+"h : rank-2 array('f') with bounds (maxnh,nspin)\n"
+"s : rank-1 array('f') with bounds (maxnh)\n"
+"xij : rank-2 array('f') with bounds (3,maxnh)";
+/* extern void F_FUNC_US(read_hsx_hsx0,READ_HSX_HSX0)(string,int*,int*,int*,int*,int*,int*,float*,float*,float*,size_t); */
+static PyObject *f2py_rout__siesta_read_hsx_hsx0(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,int*,int*,int*,int*,float*,float*,float*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int nspin = 0;
+    PyObject *nspin_capi = Py_None;
+    int no_u = 0;
+    PyObject *no_u_capi = Py_None;
+    int no_s = 0;
+    PyObject *no_s_capi = Py_None;
+    int maxnh = 0;
+    PyObject *maxnh_capi = Py_None;
+    int *numh = NULL;
+    npy_intp numh_Dims[1] = {-1};
+    const int numh_Rank = 1;
+    PyArrayObject *capi_numh_as_array = NULL;
+    int capi_numh_intent = 0;
+    int *listh = NULL;
+    npy_intp listh_Dims[1] = {-1};
+    const int listh_Rank = 1;
+    PyArrayObject *capi_listh_as_array = NULL;
+    int capi_listh_intent = 0;
+    float *h = NULL;
+    npy_intp h_Dims[2] = {-1, -1};
+    const int h_Rank = 2;
+    PyArrayObject *capi_h_as_array = NULL;
+    int capi_h_intent = 0;
+    float *s = NULL;
+    npy_intp s_Dims[1] = {-1};
+    const int s_Rank = 1;
+    PyArrayObject *capi_s_as_array = NULL;
+    int capi_s_intent = 0;
+    float *xij = NULL;
+    npy_intp xij_Dims[2] = {-1, -1};
+    const int xij_Rank = 2;
+    PyArrayObject *capi_xij_as_array = NULL;
+    int capi_xij_intent = 0;
+    static char *capi_kwlist[] = {"fname","nspin","no_u","no_s","maxnh",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOOOO|:_siesta.read_hsx_hsx0",\
+        capi_kwlist,&fname_capi,&nspin_capi,&no_u_capi,&no_s_capi,&maxnh_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_hsx_hsx0 to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable nspin */
+        f2py_success = int_from_pyobj(&nspin,nspin_capi,"_siesta.read_hsx_hsx0() 2nd argument (nspin) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable no_u */
+        f2py_success = int_from_pyobj(&no_u,no_u_capi,"_siesta.read_hsx_hsx0() 3rd argument (no_u) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable no_s */
+        f2py_success = int_from_pyobj(&no_s,no_s_capi,"_siesta.read_hsx_hsx0() 4th argument (no_s) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable maxnh */
+        f2py_success = int_from_pyobj(&maxnh,maxnh_capi,"_siesta.read_hsx_hsx0() 5th argument (maxnh) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable numh */
+    numh_Dims[0]=no_u;
+    capi_numh_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_hsx0: failed to create array from the hidden `numh`";
+    capi_numh_as_array = ndarray_from_pyobj(  NPY_INT,1,numh_Dims,numh_Rank,  capi_numh_intent,Py_None,capi_errmess);
+    if (capi_numh_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        numh = (int *)(PyArray_DATA(capi_numh_as_array));
+
+    /* Processing variable listh */
+    listh_Dims[0]=maxnh;
+    capi_listh_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_hsx0: failed to create array from the hidden `listh`";
+    capi_listh_as_array = ndarray_from_pyobj(  NPY_INT,1,listh_Dims,listh_Rank,  capi_listh_intent,Py_None,capi_errmess);
+    if (capi_listh_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        listh = (int *)(PyArray_DATA(capi_listh_as_array));
+
+    /* Processing variable h */
+    h_Dims[0]=maxnh,h_Dims[1]=nspin;
+    capi_h_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_hsx0: failed to create array from the hidden `h`";
+    capi_h_as_array = ndarray_from_pyobj(  NPY_FLOAT,1,h_Dims,h_Rank,  capi_h_intent,Py_None,capi_errmess);
+    if (capi_h_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        h = (float *)(PyArray_DATA(capi_h_as_array));
+
+    /* Processing variable s */
+    s_Dims[0]=maxnh;
+    capi_s_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_hsx0: failed to create array from the hidden `s`";
+    capi_s_as_array = ndarray_from_pyobj(  NPY_FLOAT,1,s_Dims,s_Rank,  capi_s_intent,Py_None,capi_errmess);
+    if (capi_s_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        s = (float *)(PyArray_DATA(capi_s_as_array));
+
+    /* Processing variable xij */
+    xij_Dims[0]=3,xij_Dims[1]=maxnh;
+    capi_xij_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_hsx0: failed to create array from the hidden `xij`";
+    capi_xij_as_array = ndarray_from_pyobj(  NPY_FLOAT,1,xij_Dims,xij_Rank,  capi_xij_intent,Py_None,capi_errmess);
+    if (capi_xij_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        xij = (float *)(PyArray_DATA(capi_xij_as_array));
+
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&nspin,&no_u,&no_s,&maxnh,numh,listh,h,s,xij,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("NNNNN",capi_numh_as_array,capi_listh_as_array,capi_h_as_array,capi_s_as_array,capi_xij_as_array);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    }  /* if (capi_xij_as_array == NULL) ... else of xij */
+    /* End of cleaning variable xij */
+    }  /* if (capi_s_as_array == NULL) ... else of s */
+    /* End of cleaning variable s */
+    }  /* if (capi_h_as_array == NULL) ... else of h */
+    /* End of cleaning variable h */
+    }  /* if (capi_listh_as_array == NULL) ... else of listh */
+    /* End of cleaning variable listh */
+    }  /* if (capi_numh_as_array == NULL) ... else of numh */
+    /* End of cleaning variable numh */
+    } /*if (f2py_success) of maxnh*/
+    /* End of cleaning variable maxnh */
+    } /*if (f2py_success) of no_s*/
+    /* End of cleaning variable no_s */
+    } /*if (f2py_success) of no_u*/
+    /* End of cleaning variable no_u */
+    } /*if (f2py_success) of nspin*/
+    /* End of cleaning variable nspin */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/**************************** end of read_hsx_hsx0 ****************************/
+
+/******************************* read_hsx_hsx1 *******************************/
+static char doc_f2py_rout__siesta_read_hsx_hsx1[] = "\
+numh,listh,h,s,isc = read_hsx_hsx1(fname,nspin,no_u,no_s,maxnh)\n\nWrapper for ``read_hsx_hsx1``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"nspin : input int\n"
+"no_u : input int\n"
+"no_s : input int\n"
+"maxnh : input int\n"
+"\nReturns\n-------\n"
+"numh : rank-1 array('i') with bounds (no_u)\n"
+"listh : rank-1 array('i') with bounds (maxnh)\n"
+"h : rank-2 array('d') with bounds (maxnh,nspin)\n"
+"s : rank-1 array('d') with bounds (maxnh)\n"
+"isc : rank-2 array('i') with bounds (3,no_s / no_u)";
+/* extern void F_FUNC_US(read_hsx_hsx1,READ_HSX_HSX1)(string,int*,int*,int*,int*,int*,int*,double*,double*,int*,size_t); */
+static PyObject *f2py_rout__siesta_read_hsx_hsx1(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,int*,int*,int*,int*,double*,double*,int*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int nspin = 0;
+    PyObject *nspin_capi = Py_None;
+    int no_u = 0;
+    PyObject *no_u_capi = Py_None;
+    int no_s = 0;
+    PyObject *no_s_capi = Py_None;
+    int maxnh = 0;
+    PyObject *maxnh_capi = Py_None;
+    int *numh = NULL;
+    npy_intp numh_Dims[1] = {-1};
+    const int numh_Rank = 1;
+    PyArrayObject *capi_numh_as_array = NULL;
+    int capi_numh_intent = 0;
+    int *listh = NULL;
+    npy_intp listh_Dims[1] = {-1};
+    const int listh_Rank = 1;
+    PyArrayObject *capi_listh_as_array = NULL;
+    int capi_listh_intent = 0;
+    double *h = NULL;
+    npy_intp h_Dims[2] = {-1, -1};
+    const int h_Rank = 2;
+    PyArrayObject *capi_h_as_array = NULL;
+    int capi_h_intent = 0;
+    double *s = NULL;
+    npy_intp s_Dims[1] = {-1};
+    const int s_Rank = 1;
+    PyArrayObject *capi_s_as_array = NULL;
+    int capi_s_intent = 0;
+    int *isc = NULL;
+    npy_intp isc_Dims[2] = {-1, -1};
+    const int isc_Rank = 2;
+    PyArrayObject *capi_isc_as_array = NULL;
+    int capi_isc_intent = 0;
+    static char *capi_kwlist[] = {"fname","nspin","no_u","no_s","maxnh",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOOOO|:_siesta.read_hsx_hsx1",\
+        capi_kwlist,&fname_capi,&nspin_capi,&no_u_capi,&no_s_capi,&maxnh_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_hsx_hsx1 to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable nspin */
+        f2py_success = int_from_pyobj(&nspin,nspin_capi,"_siesta.read_hsx_hsx1() 2nd argument (nspin) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable no_u */
+        f2py_success = int_from_pyobj(&no_u,no_u_capi,"_siesta.read_hsx_hsx1() 3rd argument (no_u) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable no_s */
+        f2py_success = int_from_pyobj(&no_s,no_s_capi,"_siesta.read_hsx_hsx1() 4th argument (no_s) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable maxnh */
+        f2py_success = int_from_pyobj(&maxnh,maxnh_capi,"_siesta.read_hsx_hsx1() 5th argument (maxnh) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable numh */
+    numh_Dims[0]=no_u;
+    capi_numh_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_hsx1: failed to create array from the hidden `numh`";
+    capi_numh_as_array = ndarray_from_pyobj(  NPY_INT,1,numh_Dims,numh_Rank,  capi_numh_intent,Py_None,capi_errmess);
+    if (capi_numh_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        numh = (int *)(PyArray_DATA(capi_numh_as_array));
+
+    /* Processing variable listh */
+    listh_Dims[0]=maxnh;
+    capi_listh_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_hsx1: failed to create array from the hidden `listh`";
+    capi_listh_as_array = ndarray_from_pyobj(  NPY_INT,1,listh_Dims,listh_Rank,  capi_listh_intent,Py_None,capi_errmess);
+    if (capi_listh_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        listh = (int *)(PyArray_DATA(capi_listh_as_array));
+
+    /* Processing variable h */
+    h_Dims[0]=maxnh,h_Dims[1]=nspin;
+    capi_h_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_hsx1: failed to create array from the hidden `h`";
+    capi_h_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,h_Dims,h_Rank,  capi_h_intent,Py_None,capi_errmess);
+    if (capi_h_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        h = (double *)(PyArray_DATA(capi_h_as_array));
+
+    /* Processing variable s */
+    s_Dims[0]=maxnh;
+    capi_s_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_hsx1: failed to create array from the hidden `s`";
+    capi_s_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,s_Dims,s_Rank,  capi_s_intent,Py_None,capi_errmess);
+    if (capi_s_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        s = (double *)(PyArray_DATA(capi_s_as_array));
+
+    /* Processing variable isc */
+    isc_Dims[0]=3,isc_Dims[1]=no_s / no_u;
+    capi_isc_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_hsx1: failed to create array from the hidden `isc`";
+    capi_isc_as_array = ndarray_from_pyobj(  NPY_INT,1,isc_Dims,isc_Rank,  capi_isc_intent,Py_None,capi_errmess);
+    if (capi_isc_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        isc = (int *)(PyArray_DATA(capi_isc_as_array));
+
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&nspin,&no_u,&no_s,&maxnh,numh,listh,h,s,isc,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("NNNNN",capi_numh_as_array,capi_listh_as_array,capi_h_as_array,capi_s_as_array,capi_isc_as_array);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    }  /* if (capi_isc_as_array == NULL) ... else of isc */
+    /* End of cleaning variable isc */
+    }  /* if (capi_s_as_array == NULL) ... else of s */
+    /* End of cleaning variable s */
+    }  /* if (capi_h_as_array == NULL) ... else of h */
+    /* End of cleaning variable h */
+    }  /* if (capi_listh_as_array == NULL) ... else of listh */
+    /* End of cleaning variable listh */
+    }  /* if (capi_numh_as_array == NULL) ... else of numh */
+    /* End of cleaning variable numh */
+    } /*if (f2py_success) of maxnh*/
+    /* End of cleaning variable maxnh */
+    } /*if (f2py_success) of no_s*/
+    /* End of cleaning variable no_s */
+    } /*if (f2py_success) of no_u*/
+    /* End of cleaning variable no_u */
+    } /*if (f2py_success) of nspin*/
+    /* End of cleaning variable nspin */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/**************************** end of read_hsx_hsx1 ****************************/
+
+/******************************** read_hsx_sx0 ********************************/
+static char doc_f2py_rout__siesta_read_hsx_sx0[] = "\
+numh,listh,s,xij = read_hsx_sx0(fname,nspin,no_u,no_s,maxnh)\n\nWrapper for ``read_hsx_sx0``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"nspin : input int\n"
+"no_u : input int\n"
+"no_s : input int\n"
+"maxnh : input int\n"
+"\nReturns\n-------\n"
+"numh : rank-1 array('i') with bounds (no_u)\n"
+"listh : rank-1 array('i') with bounds (maxnh)\n"
+"s : rank-1 array('f') with bounds (maxnh)\n"
+"xij : rank-2 array('f') with bounds (3,maxnh)";
+/* extern void F_FUNC_US(read_hsx_sx0,READ_HSX_SX0)(string,int*,int*,int*,int*,int*,int*,float*,float*,size_t); */
+static PyObject *f2py_rout__siesta_read_hsx_sx0(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,int*,int*,int*,int*,float*,float*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int nspin = 0;
+    PyObject *nspin_capi = Py_None;
+    int no_u = 0;
+    PyObject *no_u_capi = Py_None;
+    int no_s = 0;
+    PyObject *no_s_capi = Py_None;
+    int maxnh = 0;
+    PyObject *maxnh_capi = Py_None;
+    int *numh = NULL;
+    npy_intp numh_Dims[1] = {-1};
+    const int numh_Rank = 1;
+    PyArrayObject *capi_numh_as_array = NULL;
+    int capi_numh_intent = 0;
+    int *listh = NULL;
+    npy_intp listh_Dims[1] = {-1};
+    const int listh_Rank = 1;
+    PyArrayObject *capi_listh_as_array = NULL;
+    int capi_listh_intent = 0;
+    float *s = NULL;
+    npy_intp s_Dims[1] = {-1};
+    const int s_Rank = 1;
+    PyArrayObject *capi_s_as_array = NULL;
+    int capi_s_intent = 0;
+    float *xij = NULL;
+    npy_intp xij_Dims[2] = {-1, -1};
+    const int xij_Rank = 2;
+    PyArrayObject *capi_xij_as_array = NULL;
+    int capi_xij_intent = 0;
+    static char *capi_kwlist[] = {"fname","nspin","no_u","no_s","maxnh",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOOOO|:_siesta.read_hsx_sx0",\
+        capi_kwlist,&fname_capi,&nspin_capi,&no_u_capi,&no_s_capi,&maxnh_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_hsx_sx0 to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable nspin */
+        f2py_success = int_from_pyobj(&nspin,nspin_capi,"_siesta.read_hsx_sx0() 2nd argument (nspin) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable no_u */
+        f2py_success = int_from_pyobj(&no_u,no_u_capi,"_siesta.read_hsx_sx0() 3rd argument (no_u) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable no_s */
+        f2py_success = int_from_pyobj(&no_s,no_s_capi,"_siesta.read_hsx_sx0() 4th argument (no_s) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable maxnh */
+        f2py_success = int_from_pyobj(&maxnh,maxnh_capi,"_siesta.read_hsx_sx0() 5th argument (maxnh) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable numh */
+    numh_Dims[0]=no_u;
+    capi_numh_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_sx0: failed to create array from the hidden `numh`";
+    capi_numh_as_array = ndarray_from_pyobj(  NPY_INT,1,numh_Dims,numh_Rank,  capi_numh_intent,Py_None,capi_errmess);
+    if (capi_numh_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        numh = (int *)(PyArray_DATA(capi_numh_as_array));
+
+    /* Processing variable listh */
+    listh_Dims[0]=maxnh;
+    capi_listh_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_sx0: failed to create array from the hidden `listh`";
+    capi_listh_as_array = ndarray_from_pyobj(  NPY_INT,1,listh_Dims,listh_Rank,  capi_listh_intent,Py_None,capi_errmess);
+    if (capi_listh_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        listh = (int *)(PyArray_DATA(capi_listh_as_array));
+
+    /* Processing variable s */
+    s_Dims[0]=maxnh;
+    capi_s_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_sx0: failed to create array from the hidden `s`";
+    capi_s_as_array = ndarray_from_pyobj(  NPY_FLOAT,1,s_Dims,s_Rank,  capi_s_intent,Py_None,capi_errmess);
+    if (capi_s_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        s = (float *)(PyArray_DATA(capi_s_as_array));
+
+    /* Processing variable xij */
+    xij_Dims[0]=3,xij_Dims[1]=maxnh;
+    capi_xij_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_sx0: failed to create array from the hidden `xij`";
+    capi_xij_as_array = ndarray_from_pyobj(  NPY_FLOAT,1,xij_Dims,xij_Rank,  capi_xij_intent,Py_None,capi_errmess);
+    if (capi_xij_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        xij = (float *)(PyArray_DATA(capi_xij_as_array));
+
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&nspin,&no_u,&no_s,&maxnh,numh,listh,s,xij,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("NNNN",capi_numh_as_array,capi_listh_as_array,capi_s_as_array,capi_xij_as_array);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    }  /* if (capi_xij_as_array == NULL) ... else of xij */
+    /* End of cleaning variable xij */
+    }  /* if (capi_s_as_array == NULL) ... else of s */
+    /* End of cleaning variable s */
+    }  /* if (capi_listh_as_array == NULL) ... else of listh */
+    /* End of cleaning variable listh */
+    }  /* if (capi_numh_as_array == NULL) ... else of numh */
+    /* End of cleaning variable numh */
+    } /*if (f2py_success) of maxnh*/
+    /* End of cleaning variable maxnh */
+    } /*if (f2py_success) of no_s*/
+    /* End of cleaning variable no_s */
+    } /*if (f2py_success) of no_u*/
+    /* End of cleaning variable no_u */
+    } /*if (f2py_success) of nspin*/
+    /* End of cleaning variable nspin */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/**************************** end of read_hsx_sx0 ****************************/
+
+/******************************** read_hsx_sx1 ********************************/
+static char doc_f2py_rout__siesta_read_hsx_sx1[] = "\
+numh,listh,s,isc = read_hsx_sx1(fname,nspin,no_u,no_s,maxnh)\n\nWrapper for ``read_hsx_sx1``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"nspin : input int\n"
+"no_u : input int\n"
+"no_s : input int\n"
+"maxnh : input int\n"
+"\nReturns\n-------\n"
+"numh : rank-1 array('i') with bounds (no_u)\n"
+"listh : rank-1 array('i') with bounds (maxnh)\n"
+"s : rank-1 array('d') with bounds (maxnh)\n"
+"isc : rank-2 array('i') with bounds (3,no_s / no_u)";
+/* extern void F_FUNC_US(read_hsx_sx1,READ_HSX_SX1)(string,int*,int*,int*,int*,int*,int*,double*,int*,size_t); */
+static PyObject *f2py_rout__siesta_read_hsx_sx1(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,int*,int*,int*,int*,double*,int*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int nspin = 0;
+    PyObject *nspin_capi = Py_None;
+    int no_u = 0;
+    PyObject *no_u_capi = Py_None;
+    int no_s = 0;
+    PyObject *no_s_capi = Py_None;
+    int maxnh = 0;
+    PyObject *maxnh_capi = Py_None;
+    int *numh = NULL;
+    npy_intp numh_Dims[1] = {-1};
+    const int numh_Rank = 1;
+    PyArrayObject *capi_numh_as_array = NULL;
+    int capi_numh_intent = 0;
+    int *listh = NULL;
+    npy_intp listh_Dims[1] = {-1};
+    const int listh_Rank = 1;
+    PyArrayObject *capi_listh_as_array = NULL;
+    int capi_listh_intent = 0;
+    double *s = NULL;
+    npy_intp s_Dims[1] = {-1};
+    const int s_Rank = 1;
+    PyArrayObject *capi_s_as_array = NULL;
+    int capi_s_intent = 0;
+    int *isc = NULL;
+    npy_intp isc_Dims[2] = {-1, -1};
+    const int isc_Rank = 2;
+    PyArrayObject *capi_isc_as_array = NULL;
+    int capi_isc_intent = 0;
+    static char *capi_kwlist[] = {"fname","nspin","no_u","no_s","maxnh",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOOOO|:_siesta.read_hsx_sx1",\
+        capi_kwlist,&fname_capi,&nspin_capi,&no_u_capi,&no_s_capi,&maxnh_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_hsx_sx1 to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable nspin */
+        f2py_success = int_from_pyobj(&nspin,nspin_capi,"_siesta.read_hsx_sx1() 2nd argument (nspin) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable no_u */
+        f2py_success = int_from_pyobj(&no_u,no_u_capi,"_siesta.read_hsx_sx1() 3rd argument (no_u) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable no_s */
+        f2py_success = int_from_pyobj(&no_s,no_s_capi,"_siesta.read_hsx_sx1() 4th argument (no_s) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable maxnh */
+        f2py_success = int_from_pyobj(&maxnh,maxnh_capi,"_siesta.read_hsx_sx1() 5th argument (maxnh) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable numh */
+    numh_Dims[0]=no_u;
+    capi_numh_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_sx1: failed to create array from the hidden `numh`";
+    capi_numh_as_array = ndarray_from_pyobj(  NPY_INT,1,numh_Dims,numh_Rank,  capi_numh_intent,Py_None,capi_errmess);
+    if (capi_numh_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        numh = (int *)(PyArray_DATA(capi_numh_as_array));
+
+    /* Processing variable listh */
+    listh_Dims[0]=maxnh;
+    capi_listh_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_sx1: failed to create array from the hidden `listh`";
+    capi_listh_as_array = ndarray_from_pyobj(  NPY_INT,1,listh_Dims,listh_Rank,  capi_listh_intent,Py_None,capi_errmess);
+    if (capi_listh_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        listh = (int *)(PyArray_DATA(capi_listh_as_array));
+
+    /* Processing variable s */
+    s_Dims[0]=maxnh;
+    capi_s_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_sx1: failed to create array from the hidden `s`";
+    capi_s_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,s_Dims,s_Rank,  capi_s_intent,Py_None,capi_errmess);
+    if (capi_s_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        s = (double *)(PyArray_DATA(capi_s_as_array));
+
+    /* Processing variable isc */
+    isc_Dims[0]=3,isc_Dims[1]=no_s / no_u;
+    capi_isc_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_sx1: failed to create array from the hidden `isc`";
+    capi_isc_as_array = ndarray_from_pyobj(  NPY_INT,1,isc_Dims,isc_Rank,  capi_isc_intent,Py_None,capi_errmess);
+    if (capi_isc_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        isc = (int *)(PyArray_DATA(capi_isc_as_array));
+
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&nspin,&no_u,&no_s,&maxnh,numh,listh,s,isc,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("NNNN",capi_numh_as_array,capi_listh_as_array,capi_s_as_array,capi_isc_as_array);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    }  /* if (capi_isc_as_array == NULL) ... else of isc */
+    /* End of cleaning variable isc */
+    }  /* if (capi_s_as_array == NULL) ... else of s */
+    /* End of cleaning variable s */
+    }  /* if (capi_listh_as_array == NULL) ... else of listh */
+    /* End of cleaning variable listh */
+    }  /* if (capi_numh_as_array == NULL) ... else of numh */
+    /* End of cleaning variable numh */
+    } /*if (f2py_success) of maxnh*/
+    /* End of cleaning variable maxnh */
+    } /*if (f2py_success) of no_s*/
+    /* End of cleaning variable no_s */
+    } /*if (f2py_success) of no_u*/
+    /* End of cleaning variable no_u */
+    } /*if (f2py_success) of nspin*/
+    /* End of cleaning variable nspin */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/**************************** end of read_hsx_sx1 ****************************/
+
+/******************************* read_hsx_geom1 *******************************/
+static char doc_f2py_rout__siesta_read_hsx_geom1[] = "\
+cell,nsc,xa,lasto = read_hsx_geom1(fname,na_u)\n\nWrapper for ``read_hsx_geom1``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"na_u : input int\n"
+"\nReturns\n-------\n"
+"cell : rank-2 array('d') with bounds (3,3)\n"
+"nsc : rank-1 array('i') with bounds (3)\n"
+"xa : rank-2 array('d') with bounds (3,na_u)\n"
+"lasto : rank-1 array('i') with bounds (na_u)";
+/* extern void F_FUNC_US(read_hsx_geom1,READ_HSX_GEOM1)(string,int*,double*,int*,double*,int*,size_t); */
+static PyObject *f2py_rout__siesta_read_hsx_geom1(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,double*,int*,double*,int*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int na_u = 0;
+    PyObject *na_u_capi = Py_None;
+    double *cell = NULL;
+    npy_intp cell_Dims[2] = {-1, -1};
+    const int cell_Rank = 2;
+    PyArrayObject *capi_cell_as_array = NULL;
+    int capi_cell_intent = 0;
+    int *nsc = NULL;
+    npy_intp nsc_Dims[1] = {-1};
+    const int nsc_Rank = 1;
+    PyArrayObject *capi_nsc_as_array = NULL;
+    int capi_nsc_intent = 0;
+    double *xa = NULL;
+    npy_intp xa_Dims[2] = {-1, -1};
+    const int xa_Rank = 2;
+    PyArrayObject *capi_xa_as_array = NULL;
+    int capi_xa_intent = 0;
+    int *lasto = NULL;
+    npy_intp lasto_Dims[1] = {-1};
+    const int lasto_Rank = 1;
+    PyArrayObject *capi_lasto_as_array = NULL;
+    int capi_lasto_intent = 0;
+    static char *capi_kwlist[] = {"fname","na_u",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OO|:_siesta.read_hsx_geom1",\
+        capi_kwlist,&fname_capi,&na_u_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_hsx_geom1 to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable na_u */
+        f2py_success = int_from_pyobj(&na_u,na_u_capi,"_siesta.read_hsx_geom1() 2nd argument (na_u) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable cell */
+    cell_Dims[0]=3,cell_Dims[1]=3;
+    capi_cell_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_geom1: failed to create array from the hidden `cell`";
+    capi_cell_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,cell_Dims,cell_Rank,  capi_cell_intent,Py_None,capi_errmess);
+    if (capi_cell_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        cell = (double *)(PyArray_DATA(capi_cell_as_array));
+
+    /* Processing variable nsc */
+    nsc_Dims[0]=3;
+    capi_nsc_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_geom1: failed to create array from the hidden `nsc`";
+    capi_nsc_as_array = ndarray_from_pyobj(  NPY_INT,1,nsc_Dims,nsc_Rank,  capi_nsc_intent,Py_None,capi_errmess);
+    if (capi_nsc_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        nsc = (int *)(PyArray_DATA(capi_nsc_as_array));
+
+    /* Processing variable xa */
+    xa_Dims[0]=3,xa_Dims[1]=na_u;
+    capi_xa_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_geom1: failed to create array from the hidden `xa`";
+    capi_xa_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,xa_Dims,xa_Rank,  capi_xa_intent,Py_None,capi_errmess);
+    if (capi_xa_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        xa = (double *)(PyArray_DATA(capi_xa_as_array));
+
+    /* Processing variable lasto */
+    lasto_Dims[0]=na_u;
+    capi_lasto_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_geom1: failed to create array from the hidden `lasto`";
+    capi_lasto_as_array = ndarray_from_pyobj(  NPY_INT,1,lasto_Dims,lasto_Rank,  capi_lasto_intent,Py_None,capi_errmess);
+    if (capi_lasto_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        lasto = (int *)(PyArray_DATA(capi_lasto_as_array));
+
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&na_u,cell,nsc,xa,lasto,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("NNNN",capi_cell_as_array,capi_nsc_as_array,capi_xa_as_array,capi_lasto_as_array);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    }  /* if (capi_lasto_as_array == NULL) ... else of lasto */
+    /* End of cleaning variable lasto */
+    }  /* if (capi_xa_as_array == NULL) ... else of xa */
+    /* End of cleaning variable xa */
+    }  /* if (capi_nsc_as_array == NULL) ... else of nsc */
+    /* End of cleaning variable nsc */
+    }  /* if (capi_cell_as_array == NULL) ... else of cell */
+    /* End of cleaning variable cell */
+    } /*if (f2py_success) of na_u*/
+    /* End of cleaning variable na_u */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/*************************** end of read_hsx_geom1 ***************************/
+
+/*************************** read_hsx_specie_sizes ***************************/
+static char doc_f2py_rout__siesta_read_hsx_specie_sizes[] = "\
+no_u,na_u,nspecies = read_hsx_specie_sizes(fname)\n\nWrapper for ``read_hsx_specie_sizes``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"\nReturns\n-------\n"
+"no_u : int\n"
+"na_u : int\n"
+"nspecies : int";
+/* extern void F_FUNC_US(read_hsx_specie_sizes,READ_HSX_SPECIE_SIZES)(string,int*,int*,int*,size_t); */
+static PyObject *f2py_rout__siesta_read_hsx_specie_sizes(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,int*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int no_u = 0;
+    int na_u = 0;
+    int nspecies = 0;
+    static char *capi_kwlist[] = {"fname",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "O|:_siesta.read_hsx_specie_sizes",\
+        capi_kwlist,&fname_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_hsx_specie_sizes to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable no_u */
+    /* Processing variable na_u */
+    /* Processing variable nspecies */
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&no_u,&na_u,&nspecies,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("iii",no_u,na_u,nspecies);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    /* End of cleaning variable nspecies */
+    /* End of cleaning variable na_u */
+    /* End of cleaning variable no_u */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/************************ end of read_hsx_specie_sizes ************************/
+
+/*************************** read_hsx_specie_sizes0 ***************************/
+static char doc_f2py_rout__siesta_read_hsx_specie_sizes0[] = "\
+no_u,na_u,nspecies = read_hsx_specie_sizes0(fname)\n\nWrapper for ``read_hsx_specie_sizes0``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"\nReturns\n-------\n"
+"no_u : int\n"
+"na_u : int\n"
+"nspecies : int";
+/* extern void F_FUNC_US(read_hsx_specie_sizes0,READ_HSX_SPECIE_SIZES0)(string,int*,int*,int*,size_t); */
+static PyObject *f2py_rout__siesta_read_hsx_specie_sizes0(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,int*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int no_u = 0;
+    int na_u = 0;
+    int nspecies = 0;
+    static char *capi_kwlist[] = {"fname",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "O|:_siesta.read_hsx_specie_sizes0",\
+        capi_kwlist,&fname_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_hsx_specie_sizes0 to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable no_u */
+    /* Processing variable na_u */
+    /* Processing variable nspecies */
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&no_u,&na_u,&nspecies,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("iii",no_u,na_u,nspecies);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    /* End of cleaning variable nspecies */
+    /* End of cleaning variable na_u */
+    /* End of cleaning variable no_u */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/*********************** end of read_hsx_specie_sizes0 ***********************/
+
+/*************************** read_hsx_specie_sizes1 ***************************/
+static char doc_f2py_rout__siesta_read_hsx_specie_sizes1[] = "\
+no_u,na_u,nspecies = read_hsx_specie_sizes1(fname)\n\nWrapper for ``read_hsx_specie_sizes1``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"\nReturns\n-------\n"
+"no_u : int\n"
+"na_u : int\n"
+"nspecies : int";
+/* extern void F_FUNC_US(read_hsx_specie_sizes1,READ_HSX_SPECIE_SIZES1)(string,int*,int*,int*,size_t); */
+static PyObject *f2py_rout__siesta_read_hsx_specie_sizes1(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,int*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int no_u = 0;
+    int na_u = 0;
+    int nspecies = 0;
+    static char *capi_kwlist[] = {"fname",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "O|:_siesta.read_hsx_specie_sizes1",\
+        capi_kwlist,&fname_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_hsx_specie_sizes1 to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable no_u */
+    /* Processing variable na_u */
+    /* Processing variable nspecies */
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&no_u,&na_u,&nspecies,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("iii",no_u,na_u,nspecies);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    /* End of cleaning variable nspecies */
+    /* End of cleaning variable na_u */
+    /* End of cleaning variable no_u */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/*********************** end of read_hsx_specie_sizes1 ***********************/
+
+/****************************** read_hsx_species ******************************/
+static char doc_f2py_rout__siesta_read_hsx_species[] = "\
+label,zval,no,isa = read_hsx_species(fname,nspecies,no_u,na_u)\n\nWrapper for ``read_hsx_species``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"nspecies : input int\n"
+"no_u : input int\n"
+"na_u : input int\n"
+"\nReturns\n-------\n"
+"label : rank-2 array('S') with bounds (20,nspecies)\n"
+"zval : rank-1 array('d') with bounds (nspecies)\n"
+"no : rank-1 array('i') with bounds (nspecies)\n"
+"isa : rank-1 array('i') with bounds (na_u)";
+/* extern void F_FUNC_US(read_hsx_species,READ_HSX_SPECIES)(string,int*,int*,int*,string*,double*,int*,int*,size_t,size_t); */
+static PyObject *f2py_rout__siesta_read_hsx_species(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,int*,string*,double*,int*,int*,size_t,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int nspecies = 0;
+    PyObject *nspecies_capi = Py_None;
+    int no_u = 0;
+    PyObject *no_u_capi = Py_None;
+    int na_u = 0;
+    PyObject *na_u_capi = Py_None;
+    string *label = NULL;
+    npy_intp label_Dims[2] = {-1, -1};
+    const int label_Rank = 2;
+    PyArrayObject *capi_label_as_array = NULL;
+    int capi_label_intent = 0;
+    int slen(label) = 0;
+    double *zval = NULL;
+    npy_intp zval_Dims[1] = {-1};
+    const int zval_Rank = 1;
+    PyArrayObject *capi_zval_as_array = NULL;
+    int capi_zval_intent = 0;
+    int *no = NULL;
+    npy_intp no_Dims[1] = {-1};
+    const int no_Rank = 1;
+    PyArrayObject *capi_no_as_array = NULL;
+    int capi_no_intent = 0;
+    int *isa = NULL;
+    npy_intp isa_Dims[1] = {-1};
+    const int isa_Rank = 1;
+    PyArrayObject *capi_isa_as_array = NULL;
+    int capi_isa_intent = 0;
+    static char *capi_kwlist[] = {"fname","nspecies","no_u","na_u",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOOO|:_siesta.read_hsx_species",\
+        capi_kwlist,&fname_capi,&nspecies_capi,&no_u_capi,&na_u_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_hsx_species to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable nspecies */
+        f2py_success = int_from_pyobj(&nspecies,nspecies_capi,"_siesta.read_hsx_species() 2nd argument (nspecies) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable no_u */
+        f2py_success = int_from_pyobj(&no_u,no_u_capi,"_siesta.read_hsx_species() 3rd argument (no_u) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable na_u */
+        f2py_success = int_from_pyobj(&na_u,na_u_capi,"_siesta.read_hsx_species() 4th argument (na_u) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable label */
+    label_Dims[0]=20,label_Dims[1]=nspecies;
+    capi_label_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_species: failed to create array from the hidden `label`";
+    capi_label_as_array = ndarray_from_pyobj(  NPY_STRING,1,label_Dims,label_Rank,  capi_label_intent,Py_None,capi_errmess);
+    if (capi_label_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        label = (string *)(PyArray_DATA(capi_label_as_array));
+
+    slen(label) = f2py_itemsize(label);
+    /* Processing variable zval */
+    zval_Dims[0]=nspecies;
+    capi_zval_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_species: failed to create array from the hidden `zval`";
+    capi_zval_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,zval_Dims,zval_Rank,  capi_zval_intent,Py_None,capi_errmess);
+    if (capi_zval_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        zval = (double *)(PyArray_DATA(capi_zval_as_array));
+
+    /* Processing variable no */
+    no_Dims[0]=nspecies;
+    capi_no_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_species: failed to create array from the hidden `no`";
+    capi_no_as_array = ndarray_from_pyobj(  NPY_INT,1,no_Dims,no_Rank,  capi_no_intent,Py_None,capi_errmess);
+    if (capi_no_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        no = (int *)(PyArray_DATA(capi_no_as_array));
+
+    /* Processing variable isa */
+    isa_Dims[0]=na_u;
+    capi_isa_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_species: failed to create array from the hidden `isa`";
+    capi_isa_as_array = ndarray_from_pyobj(  NPY_INT,1,isa_Dims,isa_Rank,  capi_isa_intent,Py_None,capi_errmess);
+    if (capi_isa_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        isa = (int *)(PyArray_DATA(capi_isa_as_array));
+
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&nspecies,&no_u,&na_u,label,zval,no,isa,slen(fname),slen(label));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("NNNN",capi_label_as_array,capi_zval_as_array,capi_no_as_array,capi_isa_as_array);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    }  /* if (capi_isa_as_array == NULL) ... else of isa */
+    /* End of cleaning variable isa */
+    }  /* if (capi_no_as_array == NULL) ... else of no */
+    /* End of cleaning variable no */
+    }  /* if (capi_zval_as_array == NULL) ... else of zval */
+    /* End of cleaning variable zval */
+    }  /* if (capi_label_as_array == NULL) ... else of label */
+    /* End of cleaning variable label */
+    } /*if (f2py_success) of na_u*/
+    /* End of cleaning variable na_u */
+    } /*if (f2py_success) of no_u*/
+    /* End of cleaning variable no_u */
+    } /*if (f2py_success) of nspecies*/
+    /* End of cleaning variable nspecies */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/************************** end of read_hsx_species **************************/
+
+/***************************** read_hsx_species0 *****************************/
+static char doc_f2py_rout__siesta_read_hsx_species0[] = "\
+label,zval,no,isa = read_hsx_species0(fname,nspecies,no_u,na_u)\n\nWrapper for ``read_hsx_species0``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"nspecies : input int\n"
+"no_u : input int\n"
+"na_u : input int\n"
+"\nReturns\n-------\n"
+"label : rank-2 array('S') with bounds (20,nspecies)\n"
+"zval : rank-1 array('d') with bounds (nspecies)\n"
+"no : rank-1 array('i') with bounds (nspecies)\n"
+"isa : rank-1 array('i') with bounds (na_u)";
+/* extern void F_FUNC_US(read_hsx_species0,READ_HSX_SPECIES0)(string,int*,int*,int*,string*,double*,int*,int*,size_t,size_t); */
+static PyObject *f2py_rout__siesta_read_hsx_species0(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,int*,string*,double*,int*,int*,size_t,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int nspecies = 0;
+    PyObject *nspecies_capi = Py_None;
+    int no_u = 0;
+    PyObject *no_u_capi = Py_None;
+    int na_u = 0;
+    PyObject *na_u_capi = Py_None;
+    string *label = NULL;
+    npy_intp label_Dims[2] = {-1, -1};
+    const int label_Rank = 2;
+    PyArrayObject *capi_label_as_array = NULL;
+    int capi_label_intent = 0;
+    int slen(label) = 0;
+    double *zval = NULL;
+    npy_intp zval_Dims[1] = {-1};
+    const int zval_Rank = 1;
+    PyArrayObject *capi_zval_as_array = NULL;
+    int capi_zval_intent = 0;
+    int *no = NULL;
+    npy_intp no_Dims[1] = {-1};
+    const int no_Rank = 1;
+    PyArrayObject *capi_no_as_array = NULL;
+    int capi_no_intent = 0;
+    int *isa = NULL;
+    npy_intp isa_Dims[1] = {-1};
+    const int isa_Rank = 1;
+    PyArrayObject *capi_isa_as_array = NULL;
+    int capi_isa_intent = 0;
+    static char *capi_kwlist[] = {"fname","nspecies","no_u","na_u",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOOO|:_siesta.read_hsx_species0",\
+        capi_kwlist,&fname_capi,&nspecies_capi,&no_u_capi,&na_u_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_hsx_species0 to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable nspecies */
+        f2py_success = int_from_pyobj(&nspecies,nspecies_capi,"_siesta.read_hsx_species0() 2nd argument (nspecies) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable no_u */
+        f2py_success = int_from_pyobj(&no_u,no_u_capi,"_siesta.read_hsx_species0() 3rd argument (no_u) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable na_u */
+        f2py_success = int_from_pyobj(&na_u,na_u_capi,"_siesta.read_hsx_species0() 4th argument (na_u) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable label */
+    label_Dims[0]=20,label_Dims[1]=nspecies;
+    capi_label_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_species0: failed to create array from the hidden `label`";
+    capi_label_as_array = ndarray_from_pyobj(  NPY_STRING,1,label_Dims,label_Rank,  capi_label_intent,Py_None,capi_errmess);
+    if (capi_label_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        label = (string *)(PyArray_DATA(capi_label_as_array));
+
+    slen(label) = f2py_itemsize(label);
+    /* Processing variable zval */
+    zval_Dims[0]=nspecies;
+    capi_zval_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_species0: failed to create array from the hidden `zval`";
+    capi_zval_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,zval_Dims,zval_Rank,  capi_zval_intent,Py_None,capi_errmess);
+    if (capi_zval_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        zval = (double *)(PyArray_DATA(capi_zval_as_array));
+
+    /* Processing variable no */
+    no_Dims[0]=nspecies;
+    capi_no_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_species0: failed to create array from the hidden `no`";
+    capi_no_as_array = ndarray_from_pyobj(  NPY_INT,1,no_Dims,no_Rank,  capi_no_intent,Py_None,capi_errmess);
+    if (capi_no_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        no = (int *)(PyArray_DATA(capi_no_as_array));
+
+    /* Processing variable isa */
+    isa_Dims[0]=na_u;
+    capi_isa_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_species0: failed to create array from the hidden `isa`";
+    capi_isa_as_array = ndarray_from_pyobj(  NPY_INT,1,isa_Dims,isa_Rank,  capi_isa_intent,Py_None,capi_errmess);
+    if (capi_isa_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        isa = (int *)(PyArray_DATA(capi_isa_as_array));
+
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&nspecies,&no_u,&na_u,label,zval,no,isa,slen(fname),slen(label));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("NNNN",capi_label_as_array,capi_zval_as_array,capi_no_as_array,capi_isa_as_array);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    }  /* if (capi_isa_as_array == NULL) ... else of isa */
+    /* End of cleaning variable isa */
+    }  /* if (capi_no_as_array == NULL) ... else of no */
+    /* End of cleaning variable no */
+    }  /* if (capi_zval_as_array == NULL) ... else of zval */
+    /* End of cleaning variable zval */
+    }  /* if (capi_label_as_array == NULL) ... else of label */
+    /* End of cleaning variable label */
+    } /*if (f2py_success) of na_u*/
+    /* End of cleaning variable na_u */
+    } /*if (f2py_success) of no_u*/
+    /* End of cleaning variable no_u */
+    } /*if (f2py_success) of nspecies*/
+    /* End of cleaning variable nspecies */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/************************** end of read_hsx_species0 **************************/
+
+/***************************** read_hsx_species1 *****************************/
+static char doc_f2py_rout__siesta_read_hsx_species1[] = "\
+label,zval,no,isa = read_hsx_species1(fname,nspecies,no_u,na_u)\n\nWrapper for ``read_hsx_species1``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"nspecies : input int\n"
+"no_u : input int\n"
+"na_u : input int\n"
+"\nReturns\n-------\n"
+"label : rank-2 array('S') with bounds (20,nspecies)\n"
+"zval : rank-1 array('d') with bounds (nspecies)\n"
+"no : rank-1 array('i') with bounds (nspecies)\n"
+"isa : rank-1 array('i') with bounds (na_u)";
+/* extern void F_FUNC_US(read_hsx_species1,READ_HSX_SPECIES1)(string,int*,int*,int*,string*,double*,int*,int*,size_t,size_t); */
+static PyObject *f2py_rout__siesta_read_hsx_species1(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,int*,string*,double*,int*,int*,size_t,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int nspecies = 0;
+    PyObject *nspecies_capi = Py_None;
+    int no_u = 0;
+    PyObject *no_u_capi = Py_None;
+    int na_u = 0;
+    PyObject *na_u_capi = Py_None;
+    string *label = NULL;
+    npy_intp label_Dims[2] = {-1, -1};
+    const int label_Rank = 2;
+    PyArrayObject *capi_label_as_array = NULL;
+    int capi_label_intent = 0;
+    int slen(label) = 0;
+    double *zval = NULL;
+    npy_intp zval_Dims[1] = {-1};
+    const int zval_Rank = 1;
+    PyArrayObject *capi_zval_as_array = NULL;
+    int capi_zval_intent = 0;
+    int *no = NULL;
+    npy_intp no_Dims[1] = {-1};
+    const int no_Rank = 1;
+    PyArrayObject *capi_no_as_array = NULL;
+    int capi_no_intent = 0;
+    int *isa = NULL;
+    npy_intp isa_Dims[1] = {-1};
+    const int isa_Rank = 1;
+    PyArrayObject *capi_isa_as_array = NULL;
+    int capi_isa_intent = 0;
+    static char *capi_kwlist[] = {"fname","nspecies","no_u","na_u",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOOO|:_siesta.read_hsx_species1",\
+        capi_kwlist,&fname_capi,&nspecies_capi,&no_u_capi,&na_u_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_hsx_species1 to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable nspecies */
+        f2py_success = int_from_pyobj(&nspecies,nspecies_capi,"_siesta.read_hsx_species1() 2nd argument (nspecies) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable no_u */
+        f2py_success = int_from_pyobj(&no_u,no_u_capi,"_siesta.read_hsx_species1() 3rd argument (no_u) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable na_u */
+        f2py_success = int_from_pyobj(&na_u,na_u_capi,"_siesta.read_hsx_species1() 4th argument (na_u) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable label */
+    label_Dims[0]=20,label_Dims[1]=nspecies;
+    capi_label_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_species1: failed to create array from the hidden `label`";
+    capi_label_as_array = ndarray_from_pyobj(  NPY_STRING,1,label_Dims,label_Rank,  capi_label_intent,Py_None,capi_errmess);
+    if (capi_label_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        label = (string *)(PyArray_DATA(capi_label_as_array));
+
+    slen(label) = f2py_itemsize(label);
+    /* Processing variable zval */
+    zval_Dims[0]=nspecies;
+    capi_zval_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_species1: failed to create array from the hidden `zval`";
+    capi_zval_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,zval_Dims,zval_Rank,  capi_zval_intent,Py_None,capi_errmess);
+    if (capi_zval_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        zval = (double *)(PyArray_DATA(capi_zval_as_array));
+
+    /* Processing variable no */
+    no_Dims[0]=nspecies;
+    capi_no_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_species1: failed to create array from the hidden `no`";
+    capi_no_as_array = ndarray_from_pyobj(  NPY_INT,1,no_Dims,no_Rank,  capi_no_intent,Py_None,capi_errmess);
+    if (capi_no_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        no = (int *)(PyArray_DATA(capi_no_as_array));
+
+    /* Processing variable isa */
+    isa_Dims[0]=na_u;
+    capi_isa_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_species1: failed to create array from the hidden `isa`";
+    capi_isa_as_array = ndarray_from_pyobj(  NPY_INT,1,isa_Dims,isa_Rank,  capi_isa_intent,Py_None,capi_errmess);
+    if (capi_isa_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        isa = (int *)(PyArray_DATA(capi_isa_as_array));
+
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&nspecies,&no_u,&na_u,label,zval,no,isa,slen(fname),slen(label));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("NNNN",capi_label_as_array,capi_zval_as_array,capi_no_as_array,capi_isa_as_array);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    }  /* if (capi_isa_as_array == NULL) ... else of isa */
+    /* End of cleaning variable isa */
+    }  /* if (capi_no_as_array == NULL) ... else of no */
+    /* End of cleaning variable no */
+    }  /* if (capi_zval_as_array == NULL) ... else of zval */
+    /* End of cleaning variable zval */
+    }  /* if (capi_label_as_array == NULL) ... else of label */
+    /* End of cleaning variable label */
+    } /*if (f2py_success) of na_u*/
+    /* End of cleaning variable na_u */
+    } /*if (f2py_success) of no_u*/
+    /* End of cleaning variable no_u */
+    } /*if (f2py_success) of nspecies*/
+    /* End of cleaning variable nspecies */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/************************** end of read_hsx_species1 **************************/
+
+/****************************** read_hsx_specie ******************************/
+static char doc_f2py_rout__siesta_read_hsx_specie[] = "\
+n_specie,l_specie,zeta_specie = read_hsx_specie(fname,ispecie,no_specie)\n\nWrapper for ``read_hsx_specie``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"ispecie : input int\n"
+"no_specie : input int\n"
+"\nReturns\n-------\n"
+"n_specie : rank-1 array('i') with bounds (no_specie)\n"
+"l_specie : rank-1 array('i') with bounds (no_specie)\n"
+"zeta_specie : rank-1 array('i') with bounds (no_specie)";
+/* extern void F_FUNC_US(read_hsx_specie,READ_HSX_SPECIE)(string,int*,int*,int*,int*,int*,size_t); */
+static PyObject *f2py_rout__siesta_read_hsx_specie(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,int*,int*,int*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int ispecie = 0;
+    PyObject *ispecie_capi = Py_None;
+    int no_specie = 0;
+    PyObject *no_specie_capi = Py_None;
+    int *n_specie = NULL;
+    npy_intp n_specie_Dims[1] = {-1};
+    const int n_specie_Rank = 1;
+    PyArrayObject *capi_n_specie_as_array = NULL;
+    int capi_n_specie_intent = 0;
+    int *l_specie = NULL;
+    npy_intp l_specie_Dims[1] = {-1};
+    const int l_specie_Rank = 1;
+    PyArrayObject *capi_l_specie_as_array = NULL;
+    int capi_l_specie_intent = 0;
+    int *zeta_specie = NULL;
+    npy_intp zeta_specie_Dims[1] = {-1};
+    const int zeta_specie_Rank = 1;
+    PyArrayObject *capi_zeta_specie_as_array = NULL;
+    int capi_zeta_specie_intent = 0;
+    static char *capi_kwlist[] = {"fname","ispecie","no_specie",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOO|:_siesta.read_hsx_specie",\
+        capi_kwlist,&fname_capi,&ispecie_capi,&no_specie_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_hsx_specie to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable ispecie */
+        f2py_success = int_from_pyobj(&ispecie,ispecie_capi,"_siesta.read_hsx_specie() 2nd argument (ispecie) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable no_specie */
+        f2py_success = int_from_pyobj(&no_specie,no_specie_capi,"_siesta.read_hsx_specie() 3rd argument (no_specie) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable n_specie */
+    n_specie_Dims[0]=no_specie;
+    capi_n_specie_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_specie: failed to create array from the hidden `n_specie`";
+    capi_n_specie_as_array = ndarray_from_pyobj(  NPY_INT,1,n_specie_Dims,n_specie_Rank,  capi_n_specie_intent,Py_None,capi_errmess);
+    if (capi_n_specie_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        n_specie = (int *)(PyArray_DATA(capi_n_specie_as_array));
+
+    /* Processing variable l_specie */
+    l_specie_Dims[0]=no_specie;
+    capi_l_specie_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_specie: failed to create array from the hidden `l_specie`";
+    capi_l_specie_as_array = ndarray_from_pyobj(  NPY_INT,1,l_specie_Dims,l_specie_Rank,  capi_l_specie_intent,Py_None,capi_errmess);
+    if (capi_l_specie_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        l_specie = (int *)(PyArray_DATA(capi_l_specie_as_array));
+
+    /* Processing variable zeta_specie */
+    zeta_specie_Dims[0]=no_specie;
+    capi_zeta_specie_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_specie: failed to create array from the hidden `zeta_specie`";
+    capi_zeta_specie_as_array = ndarray_from_pyobj(  NPY_INT,1,zeta_specie_Dims,zeta_specie_Rank,  capi_zeta_specie_intent,Py_None,capi_errmess);
+    if (capi_zeta_specie_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        zeta_specie = (int *)(PyArray_DATA(capi_zeta_specie_as_array));
+
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&ispecie,&no_specie,n_specie,l_specie,zeta_specie,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("NNN",capi_n_specie_as_array,capi_l_specie_as_array,capi_zeta_specie_as_array);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    }  /* if (capi_zeta_specie_as_array == NULL) ... else of zeta_specie */
+    /* End of cleaning variable zeta_specie */
+    }  /* if (capi_l_specie_as_array == NULL) ... else of l_specie */
+    /* End of cleaning variable l_specie */
+    }  /* if (capi_n_specie_as_array == NULL) ... else of n_specie */
+    /* End of cleaning variable n_specie */
+    } /*if (f2py_success) of no_specie*/
+    /* End of cleaning variable no_specie */
+    } /*if (f2py_success) of ispecie*/
+    /* End of cleaning variable ispecie */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/*************************** end of read_hsx_specie ***************************/
+
+/****************************** read_hsx_specie0 ******************************/
+static char doc_f2py_rout__siesta_read_hsx_specie0[] = "\
+n_specie,l_specie,zeta_specie = read_hsx_specie0(fname,ispecie,no_specie)\n\nWrapper for ``read_hsx_specie0``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"ispecie : input int\n"
+"no_specie : input int\n"
+"\nReturns\n-------\n"
+"n_specie : rank-1 array('i') with bounds (no_specie)\n"
+"l_specie : rank-1 array('i') with bounds (no_specie)\n"
+"zeta_specie : rank-1 array('i') with bounds (no_specie)";
+/* extern void F_FUNC_US(read_hsx_specie0,READ_HSX_SPECIE0)(string,int*,int*,int*,int*,int*,size_t); */
+static PyObject *f2py_rout__siesta_read_hsx_specie0(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,int*,int*,int*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int ispecie = 0;
+    PyObject *ispecie_capi = Py_None;
+    int no_specie = 0;
+    PyObject *no_specie_capi = Py_None;
+    int *n_specie = NULL;
+    npy_intp n_specie_Dims[1] = {-1};
+    const int n_specie_Rank = 1;
+    PyArrayObject *capi_n_specie_as_array = NULL;
+    int capi_n_specie_intent = 0;
+    int *l_specie = NULL;
+    npy_intp l_specie_Dims[1] = {-1};
+    const int l_specie_Rank = 1;
+    PyArrayObject *capi_l_specie_as_array = NULL;
+    int capi_l_specie_intent = 0;
+    int *zeta_specie = NULL;
+    npy_intp zeta_specie_Dims[1] = {-1};
+    const int zeta_specie_Rank = 1;
+    PyArrayObject *capi_zeta_specie_as_array = NULL;
+    int capi_zeta_specie_intent = 0;
+    static char *capi_kwlist[] = {"fname","ispecie","no_specie",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOO|:_siesta.read_hsx_specie0",\
+        capi_kwlist,&fname_capi,&ispecie_capi,&no_specie_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_hsx_specie0 to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable ispecie */
+        f2py_success = int_from_pyobj(&ispecie,ispecie_capi,"_siesta.read_hsx_specie0() 2nd argument (ispecie) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable no_specie */
+        f2py_success = int_from_pyobj(&no_specie,no_specie_capi,"_siesta.read_hsx_specie0() 3rd argument (no_specie) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable n_specie */
+    n_specie_Dims[0]=no_specie;
+    capi_n_specie_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_specie0: failed to create array from the hidden `n_specie`";
+    capi_n_specie_as_array = ndarray_from_pyobj(  NPY_INT,1,n_specie_Dims,n_specie_Rank,  capi_n_specie_intent,Py_None,capi_errmess);
+    if (capi_n_specie_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        n_specie = (int *)(PyArray_DATA(capi_n_specie_as_array));
+
+    /* Processing variable l_specie */
+    l_specie_Dims[0]=no_specie;
+    capi_l_specie_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_specie0: failed to create array from the hidden `l_specie`";
+    capi_l_specie_as_array = ndarray_from_pyobj(  NPY_INT,1,l_specie_Dims,l_specie_Rank,  capi_l_specie_intent,Py_None,capi_errmess);
+    if (capi_l_specie_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        l_specie = (int *)(PyArray_DATA(capi_l_specie_as_array));
+
+    /* Processing variable zeta_specie */
+    zeta_specie_Dims[0]=no_specie;
+    capi_zeta_specie_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_specie0: failed to create array from the hidden `zeta_specie`";
+    capi_zeta_specie_as_array = ndarray_from_pyobj(  NPY_INT,1,zeta_specie_Dims,zeta_specie_Rank,  capi_zeta_specie_intent,Py_None,capi_errmess);
+    if (capi_zeta_specie_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        zeta_specie = (int *)(PyArray_DATA(capi_zeta_specie_as_array));
+
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&ispecie,&no_specie,n_specie,l_specie,zeta_specie,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("NNN",capi_n_specie_as_array,capi_l_specie_as_array,capi_zeta_specie_as_array);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    }  /* if (capi_zeta_specie_as_array == NULL) ... else of zeta_specie */
+    /* End of cleaning variable zeta_specie */
+    }  /* if (capi_l_specie_as_array == NULL) ... else of l_specie */
+    /* End of cleaning variable l_specie */
+    }  /* if (capi_n_specie_as_array == NULL) ... else of n_specie */
+    /* End of cleaning variable n_specie */
+    } /*if (f2py_success) of no_specie*/
+    /* End of cleaning variable no_specie */
+    } /*if (f2py_success) of ispecie*/
+    /* End of cleaning variable ispecie */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/************************** end of read_hsx_specie0 **************************/
+
+/****************************** read_hsx_specie1 ******************************/
+static char doc_f2py_rout__siesta_read_hsx_specie1[] = "\
+n_specie,l_specie,zeta_specie = read_hsx_specie1(fname,ispecie,no_specie)\n\nWrapper for ``read_hsx_specie1``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"ispecie : input int\n"
+"no_specie : input int\n"
+"\nReturns\n-------\n"
+"n_specie : rank-1 array('i') with bounds (no_specie)\n"
+"l_specie : rank-1 array('i') with bounds (no_specie)\n"
+"zeta_specie : rank-1 array('i') with bounds (no_specie)";
+/* extern void F_FUNC_US(read_hsx_specie1,READ_HSX_SPECIE1)(string,int*,int*,int*,int*,int*,size_t); */
+static PyObject *f2py_rout__siesta_read_hsx_specie1(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,int*,int*,int*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int ispecie = 0;
+    PyObject *ispecie_capi = Py_None;
+    int no_specie = 0;
+    PyObject *no_specie_capi = Py_None;
+    int *n_specie = NULL;
+    npy_intp n_specie_Dims[1] = {-1};
+    const int n_specie_Rank = 1;
+    PyArrayObject *capi_n_specie_as_array = NULL;
+    int capi_n_specie_intent = 0;
+    int *l_specie = NULL;
+    npy_intp l_specie_Dims[1] = {-1};
+    const int l_specie_Rank = 1;
+    PyArrayObject *capi_l_specie_as_array = NULL;
+    int capi_l_specie_intent = 0;
+    int *zeta_specie = NULL;
+    npy_intp zeta_specie_Dims[1] = {-1};
+    const int zeta_specie_Rank = 1;
+    PyArrayObject *capi_zeta_specie_as_array = NULL;
+    int capi_zeta_specie_intent = 0;
+    static char *capi_kwlist[] = {"fname","ispecie","no_specie",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOO|:_siesta.read_hsx_specie1",\
+        capi_kwlist,&fname_capi,&ispecie_capi,&no_specie_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_hsx_specie1 to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable ispecie */
+        f2py_success = int_from_pyobj(&ispecie,ispecie_capi,"_siesta.read_hsx_specie1() 2nd argument (ispecie) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable no_specie */
+        f2py_success = int_from_pyobj(&no_specie,no_specie_capi,"_siesta.read_hsx_specie1() 3rd argument (no_specie) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable n_specie */
+    n_specie_Dims[0]=no_specie;
+    capi_n_specie_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_specie1: failed to create array from the hidden `n_specie`";
+    capi_n_specie_as_array = ndarray_from_pyobj(  NPY_INT,1,n_specie_Dims,n_specie_Rank,  capi_n_specie_intent,Py_None,capi_errmess);
+    if (capi_n_specie_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        n_specie = (int *)(PyArray_DATA(capi_n_specie_as_array));
+
+    /* Processing variable l_specie */
+    l_specie_Dims[0]=no_specie;
+    capi_l_specie_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_specie1: failed to create array from the hidden `l_specie`";
+    capi_l_specie_as_array = ndarray_from_pyobj(  NPY_INT,1,l_specie_Dims,l_specie_Rank,  capi_l_specie_intent,Py_None,capi_errmess);
+    if (capi_l_specie_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        l_specie = (int *)(PyArray_DATA(capi_l_specie_as_array));
+
+    /* Processing variable zeta_specie */
+    zeta_specie_Dims[0]=no_specie;
+    capi_zeta_specie_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hsx_specie1: failed to create array from the hidden `zeta_specie`";
+    capi_zeta_specie_as_array = ndarray_from_pyobj(  NPY_INT,1,zeta_specie_Dims,zeta_specie_Rank,  capi_zeta_specie_intent,Py_None,capi_errmess);
+    if (capi_zeta_specie_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        zeta_specie = (int *)(PyArray_DATA(capi_zeta_specie_as_array));
+
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&ispecie,&no_specie,n_specie,l_specie,zeta_specie,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("NNN",capi_n_specie_as_array,capi_l_specie_as_array,capi_zeta_specie_as_array);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    }  /* if (capi_zeta_specie_as_array == NULL) ... else of zeta_specie */
+    /* End of cleaning variable zeta_specie */
+    }  /* if (capi_l_specie_as_array == NULL) ... else of l_specie */
+    /* End of cleaning variable l_specie */
+    }  /* if (capi_n_specie_as_array == NULL) ... else of n_specie */
+    /* End of cleaning variable n_specie */
+    } /*if (f2py_success) of no_specie*/
+    /* End of cleaning variable no_specie */
+    } /*if (f2py_success) of ispecie*/
+    /* End of cleaning variable ispecie */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/************************** end of read_hsx_specie1 **************************/
+
+/********************************* write_hsx0 *********************************/
+static char doc_f2py_rout__siesta_write_hsx0[] = "\
+write_hsx0(fname,gamma,no_s,numh,listhptr,listh,h,s,xij,qtot,temp,[no_u,nspin,maxnh])\n\nWrapper for ``write_hsx0``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"gamma : input int\n"
+"no_s : input int\n"
+"numh : input rank-1 array('i') with bounds (no_u)\n"
+"listhptr : input rank-1 array('i') with bounds (no_u)\n"
+"listh : input rank-1 array('i') with bounds (maxnh)\n"
+"h : input rank-2 array('d') with bounds (maxnh,nspin)\n"
+"s : input rank-1 array('d') with bounds (maxnh)\n"
+"xij : input rank-2 array('d') with bounds (3,maxnh)\n"
+"qtot : input float\n"
+"temp : input float\n"
+"\nOther Parameters\n----------------\n"
+"no_u : input int, optional\n    Default: shape(numh, 0)\n"
+"nspin : input int, optional\n    Default: shape(h, 1)\n"
+"maxnh : input int, optional\n    Default: shape(listh, 0)";
+/* extern void F_FUNC_US(write_hsx0,WRITE_HSX0)(string,int*,int*,int*,int*,int*,int*,int*,int*,double*,double*,double*,double*,double*,size_t); */
+static PyObject *f2py_rout__siesta_write_hsx0(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,int*,int*,int*,int*,int*,int*,double*,double*,double*,double*,double*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int gamma = 0;
+    PyObject *gamma_capi = Py_None;
+    int no_u = 0;
+    PyObject *no_u_capi = Py_None;
+    int no_s = 0;
+    PyObject *no_s_capi = Py_None;
+    int nspin = 0;
+    PyObject *nspin_capi = Py_None;
+    int maxnh = 0;
+    PyObject *maxnh_capi = Py_None;
+    int *numh = NULL;
+    npy_intp numh_Dims[1] = {-1};
+    const int numh_Rank = 1;
+    PyArrayObject *capi_numh_as_array = NULL;
+    int capi_numh_intent = 0;
+    PyObject *numh_capi = Py_None;
+    int *listhptr = NULL;
+    npy_intp listhptr_Dims[1] = {-1};
+    const int listhptr_Rank = 1;
+    PyArrayObject *capi_listhptr_as_array = NULL;
+    int capi_listhptr_intent = 0;
+    PyObject *listhptr_capi = Py_None;
+    int *listh = NULL;
+    npy_intp listh_Dims[1] = {-1};
+    const int listh_Rank = 1;
+    PyArrayObject *capi_listh_as_array = NULL;
+    int capi_listh_intent = 0;
+    PyObject *listh_capi = Py_None;
+    double *h = NULL;
+    npy_intp h_Dims[2] = {-1, -1};
+    const int h_Rank = 2;
+    PyArrayObject *capi_h_as_array = NULL;
+    int capi_h_intent = 0;
+    PyObject *h_capi = Py_None;
+    double *s = NULL;
+    npy_intp s_Dims[1] = {-1};
+    const int s_Rank = 1;
+    PyArrayObject *capi_s_as_array = NULL;
+    int capi_s_intent = 0;
+    PyObject *s_capi = Py_None;
+    double *xij = NULL;
+    npy_intp xij_Dims[2] = {-1, -1};
+    const int xij_Rank = 2;
+    PyArrayObject *capi_xij_as_array = NULL;
+    int capi_xij_intent = 0;
+    PyObject *xij_capi = Py_None;
+    double qtot = 0;
+    PyObject *qtot_capi = Py_None;
+    double temp = 0;
+    PyObject *temp_capi = Py_None;
+    static char *capi_kwlist[] = {"fname","gamma","no_s","numh","listhptr","listh","h","s","xij","qtot","temp","no_u","nspin","maxnh",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOOOOOOOOOO|OOO:_siesta.write_hsx0",\
+        capi_kwlist,&fname_capi,&gamma_capi,&no_s_capi,&numh_capi,&listhptr_capi,&listh_capi,&h_capi,&s_capi,&xij_capi,&qtot_capi,&temp_capi,&no_u_capi,&nspin_capi,&maxnh_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.write_hsx0 to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable gamma */
+        gamma = (int)PyObject_IsTrue(gamma_capi);
+        f2py_success = 1;
+    if (f2py_success) {
+    /* Processing variable no_s */
+        f2py_success = int_from_pyobj(&no_s,no_s_capi,"_siesta.write_hsx0() 3rd argument (no_s) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable numh */
+    ;
+    capi_numh_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.write_hsx0: failed to create array from the 4th argument `numh`";
+    capi_numh_as_array = ndarray_from_pyobj(  NPY_INT,1,numh_Dims,numh_Rank,  capi_numh_intent,numh_capi,capi_errmess);
+    if (capi_numh_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        numh = (int *)(PyArray_DATA(capi_numh_as_array));
+
+    /* Processing variable listh */
+    ;
+    capi_listh_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.write_hsx0: failed to create array from the 6th argument `listh`";
+    capi_listh_as_array = ndarray_from_pyobj(  NPY_INT,1,listh_Dims,listh_Rank,  capi_listh_intent,listh_capi,capi_errmess);
+    if (capi_listh_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        listh = (int *)(PyArray_DATA(capi_listh_as_array));
+
+    /* Processing variable qtot */
+        f2py_success = double_from_pyobj(&qtot,qtot_capi,"_siesta.write_hsx0() 10th argument (qtot) can't be converted to double");
+    if (f2py_success) {
+    /* Processing variable temp */
+        f2py_success = double_from_pyobj(&temp,temp_capi,"_siesta.write_hsx0() 11st argument (temp) can't be converted to double");
+    if (f2py_success) {
+    /* Processing variable no_u */
+    if (no_u_capi == Py_None) no_u = shape(numh, 0); else
+        f2py_success = int_from_pyobj(&no_u,no_u_capi,"_siesta.write_hsx0() 1st keyword (no_u) can't be converted to int");
+    if (f2py_success) {
+    CHECKSCALAR(shape(numh, 0) == no_u,"shape(numh, 0) == no_u","1st keyword no_u","write_hsx0:no_u=%d",no_u) {
+    /* Processing variable maxnh */
+    if (maxnh_capi == Py_None) maxnh = shape(listh, 0); else
+        f2py_success = int_from_pyobj(&maxnh,maxnh_capi,"_siesta.write_hsx0() 3rd keyword (maxnh) can't be converted to int");
+    if (f2py_success) {
+    CHECKSCALAR(shape(listh, 0) == maxnh,"shape(listh, 0) == maxnh","3rd keyword maxnh","write_hsx0:maxnh=%d",maxnh) {
+    /* Processing variable listhptr */
+    listhptr_Dims[0]=no_u;
+    capi_listhptr_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.write_hsx0: failed to create array from the 5th argument `listhptr`";
+    capi_listhptr_as_array = ndarray_from_pyobj(  NPY_INT,1,listhptr_Dims,listhptr_Rank,  capi_listhptr_intent,listhptr_capi,capi_errmess);
+    if (capi_listhptr_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        listhptr = (int *)(PyArray_DATA(capi_listhptr_as_array));
+
+    /* Processing variable h */
+    h_Dims[0]=maxnh;
+    capi_h_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.write_hsx0: failed to create array from the 7th argument `h`";
+    capi_h_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,h_Dims,h_Rank,  capi_h_intent,h_capi,capi_errmess);
+    if (capi_h_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        h = (double *)(PyArray_DATA(capi_h_as_array));
+
+    /* Processing variable s */
+    s_Dims[0]=maxnh;
+    capi_s_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.write_hsx0: failed to create array from the 8th argument `s`";
+    capi_s_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,s_Dims,s_Rank,  capi_s_intent,s_capi,capi_errmess);
+    if (capi_s_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        s = (double *)(PyArray_DATA(capi_s_as_array));
+
+    /* Processing variable xij */
+    xij_Dims[0]=3,xij_Dims[1]=maxnh;
+    capi_xij_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.write_hsx0: failed to create array from the 9th argument `xij`";
+    capi_xij_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,xij_Dims,xij_Rank,  capi_xij_intent,xij_capi,capi_errmess);
+    if (capi_xij_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        xij = (double *)(PyArray_DATA(capi_xij_as_array));
+
+    /* Processing variable nspin */
+    if (nspin_capi == Py_None) nspin = shape(h, 1); else
+        f2py_success = int_from_pyobj(&nspin,nspin_capi,"_siesta.write_hsx0() 2nd keyword (nspin) can't be converted to int");
+    if (f2py_success) {
+    CHECKSCALAR(shape(h, 1) == nspin,"shape(h, 1) == nspin","2nd keyword nspin","write_hsx0:nspin=%d",nspin) {
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&gamma,&no_u,&no_s,&nspin,&maxnh,numh,listhptr,listh,h,s,xij,&qtot,&temp,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("");
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    } /*CHECKSCALAR(shape(h, 1) == nspin)*/
+    } /*if (f2py_success) of nspin*/
+    /* End of cleaning variable nspin */
+    if((PyObject *)capi_xij_as_array!=xij_capi) {
+        Py_XDECREF(capi_xij_as_array); }
+    }  /* if (capi_xij_as_array == NULL) ... else of xij */
+    /* End of cleaning variable xij */
+    if((PyObject *)capi_s_as_array!=s_capi) {
+        Py_XDECREF(capi_s_as_array); }
+    }  /* if (capi_s_as_array == NULL) ... else of s */
+    /* End of cleaning variable s */
+    if((PyObject *)capi_h_as_array!=h_capi) {
+        Py_XDECREF(capi_h_as_array); }
+    }  /* if (capi_h_as_array == NULL) ... else of h */
+    /* End of cleaning variable h */
+    if((PyObject *)capi_listhptr_as_array!=listhptr_capi) {
+        Py_XDECREF(capi_listhptr_as_array); }
+    }  /* if (capi_listhptr_as_array == NULL) ... else of listhptr */
+    /* End of cleaning variable listhptr */
+    } /*CHECKSCALAR(shape(listh, 0) == maxnh)*/
+    } /*if (f2py_success) of maxnh*/
+    /* End of cleaning variable maxnh */
+    } /*CHECKSCALAR(shape(numh, 0) == no_u)*/
+    } /*if (f2py_success) of no_u*/
+    /* End of cleaning variable no_u */
+    } /*if (f2py_success) of temp*/
+    /* End of cleaning variable temp */
+    } /*if (f2py_success) of qtot*/
+    /* End of cleaning variable qtot */
+    if((PyObject *)capi_listh_as_array!=listh_capi) {
+        Py_XDECREF(capi_listh_as_array); }
+    }  /* if (capi_listh_as_array == NULL) ... else of listh */
+    /* End of cleaning variable listh */
+    if((PyObject *)capi_numh_as_array!=numh_capi) {
+        Py_XDECREF(capi_numh_as_array); }
+    }  /* if (capi_numh_as_array == NULL) ... else of numh */
+    /* End of cleaning variable numh */
+    } /*if (f2py_success) of no_s*/
+    /* End of cleaning variable no_s */
+    } /*if (f2py_success) of gamma*/
+    /* End of cleaning variable gamma */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/***************************** end of write_hsx0 *****************************/
+
+/******************************* read_dm_sizes *******************************/
+static char doc_f2py_rout__siesta_read_dm_sizes[] = "\
+nspin,no_u,nsc,nnz = read_dm_sizes(fname)\n\nWrapper for ``read_dm_sizes``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"\nReturns\n-------\n"
+"nspin : int\n"
+"no_u : int\n"
+"nsc : rank-1 array('i') with bounds (3)\n"
+"nnz : int";
+/* extern void F_FUNC_US(read_dm_sizes,READ_DM_SIZES)(string,int*,int*,int*,int*,size_t); */
+static PyObject *f2py_rout__siesta_read_dm_sizes(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,int*,int*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int nspin = 0;
+    int no_u = 0;
+    int *nsc = NULL;
+    npy_intp nsc_Dims[1] = {-1};
+    const int nsc_Rank = 1;
+    PyArrayObject *capi_nsc_as_array = NULL;
+    int capi_nsc_intent = 0;
+    int nnz = 0;
+    static char *capi_kwlist[] = {"fname",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "O|:_siesta.read_dm_sizes",\
+        capi_kwlist,&fname_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_dm_sizes to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable nspin */
+    /* Processing variable no_u */
+    /* Processing variable nsc */
+    nsc_Dims[0]=3;
+    capi_nsc_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_dm_sizes: failed to create array from the hidden `nsc`";
+    capi_nsc_as_array = ndarray_from_pyobj(  NPY_INT,1,nsc_Dims,nsc_Rank,  capi_nsc_intent,Py_None,capi_errmess);
+    if (capi_nsc_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        nsc = (int *)(PyArray_DATA(capi_nsc_as_array));
+
+    /* Processing variable nnz */
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&nspin,&no_u,nsc,&nnz,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("iiNi",nspin,no_u,capi_nsc_as_array,nnz);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    /* End of cleaning variable nnz */
+    }  /* if (capi_nsc_as_array == NULL) ... else of nsc */
+    /* End of cleaning variable nsc */
+    /* End of cleaning variable no_u */
+    /* End of cleaning variable nspin */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/**************************** end of read_dm_sizes ****************************/
+
+/********************************** read_dm **********************************/
+static char doc_f2py_rout__siesta_read_dm[] = "\
+ncol,list_col,dm = read_dm(fname,nspin,no_u,nsc,nnz)\n\nWrapper for ``read_dm``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"nspin : input int\n"
+"no_u : input int\n"
+"nsc : input rank-1 array('i') with bounds (3)\n"
+"nnz : input int\n"
+"\nReturns\n-------\n"
+"ncol : rank-1 array('i') with bounds (no_u)\n"
+"list_col : rank-1 array('i') with bounds (nnz)\n"
+"dm : rank-2 array('d') with bounds (nnz,nspin)";
+/* extern void F_FUNC_US(read_dm,READ_DM)(string,int*,int*,int*,int*,int*,int*,double*,size_t); */
+static PyObject *f2py_rout__siesta_read_dm(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,int*,int*,int*,int*,double*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int nspin = 0;
+    PyObject *nspin_capi = Py_None;
+    int no_u = 0;
+    PyObject *no_u_capi = Py_None;
+    int *nsc = NULL;
+    npy_intp nsc_Dims[1] = {-1};
+    const int nsc_Rank = 1;
+    PyArrayObject *capi_nsc_as_array = NULL;
+    int capi_nsc_intent = 0;
+    PyObject *nsc_capi = Py_None;
+    int nnz = 0;
+    PyObject *nnz_capi = Py_None;
+    int *ncol = NULL;
+    npy_intp ncol_Dims[1] = {-1};
+    const int ncol_Rank = 1;
+    PyArrayObject *capi_ncol_as_array = NULL;
+    int capi_ncol_intent = 0;
+    int *list_col = NULL;
+    npy_intp list_col_Dims[1] = {-1};
+    const int list_col_Rank = 1;
+    PyArrayObject *capi_list_col_as_array = NULL;
+    int capi_list_col_intent = 0;
+    double *dm = NULL;
+    npy_intp dm_Dims[2] = {-1, -1};
+    const int dm_Rank = 2;
+    PyArrayObject *capi_dm_as_array = NULL;
+    int capi_dm_intent = 0;
+    static char *capi_kwlist[] = {"fname","nspin","no_u","nsc","nnz",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOOOO|:_siesta.read_dm",\
+        capi_kwlist,&fname_capi,&nspin_capi,&no_u_capi,&nsc_capi,&nnz_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_dm to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable nspin */
+        f2py_success = int_from_pyobj(&nspin,nspin_capi,"_siesta.read_dm() 2nd argument (nspin) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable no_u */
+        f2py_success = int_from_pyobj(&no_u,no_u_capi,"_siesta.read_dm() 3rd argument (no_u) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable nsc */
+    nsc_Dims[0]=3;
+    capi_nsc_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.read_dm: failed to create array from the 4th argument `nsc`";
+    capi_nsc_as_array = ndarray_from_pyobj(  NPY_INT,1,nsc_Dims,nsc_Rank,  capi_nsc_intent,nsc_capi,capi_errmess);
+    if (capi_nsc_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        nsc = (int *)(PyArray_DATA(capi_nsc_as_array));
+
+    /* Processing variable nnz */
+        f2py_success = int_from_pyobj(&nnz,nnz_capi,"_siesta.read_dm() 5th argument (nnz) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable ncol */
+    ncol_Dims[0]=no_u;
+    capi_ncol_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_dm: failed to create array from the hidden `ncol`";
+    capi_ncol_as_array = ndarray_from_pyobj(  NPY_INT,1,ncol_Dims,ncol_Rank,  capi_ncol_intent,Py_None,capi_errmess);
+    if (capi_ncol_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        ncol = (int *)(PyArray_DATA(capi_ncol_as_array));
+
+    /* Processing variable list_col */
+    list_col_Dims[0]=nnz;
+    capi_list_col_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_dm: failed to create array from the hidden `list_col`";
+    capi_list_col_as_array = ndarray_from_pyobj(  NPY_INT,1,list_col_Dims,list_col_Rank,  capi_list_col_intent,Py_None,capi_errmess);
+    if (capi_list_col_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        list_col = (int *)(PyArray_DATA(capi_list_col_as_array));
+
+    /* Processing variable dm */
+    dm_Dims[0]=nnz,dm_Dims[1]=nspin;
+    capi_dm_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_dm: failed to create array from the hidden `dm`";
+    capi_dm_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,dm_Dims,dm_Rank,  capi_dm_intent,Py_None,capi_errmess);
+    if (capi_dm_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        dm = (double *)(PyArray_DATA(capi_dm_as_array));
+
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&nspin,&no_u,nsc,&nnz,ncol,list_col,dm,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("NNN",capi_ncol_as_array,capi_list_col_as_array,capi_dm_as_array);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    }  /* if (capi_dm_as_array == NULL) ... else of dm */
+    /* End of cleaning variable dm */
+    }  /* if (capi_list_col_as_array == NULL) ... else of list_col */
+    /* End of cleaning variable list_col */
+    }  /* if (capi_ncol_as_array == NULL) ... else of ncol */
+    /* End of cleaning variable ncol */
+    } /*if (f2py_success) of nnz*/
+    /* End of cleaning variable nnz */
+    if((PyObject *)capi_nsc_as_array!=nsc_capi) {
+        Py_XDECREF(capi_nsc_as_array); }
+    }  /* if (capi_nsc_as_array == NULL) ... else of nsc */
+    /* End of cleaning variable nsc */
+    } /*if (f2py_success) of no_u*/
+    /* End of cleaning variable no_u */
+    } /*if (f2py_success) of nspin*/
+    /* End of cleaning variable nspin */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/******************************* end of read_dm *******************************/
+
+/********************************** write_dm **********************************/
+static char doc_f2py_rout__siesta_write_dm[] = "\
+write_dm(fname,nsc,ncol,list_col,dm,[nspin,no_u,nnz])\n\nWrapper for ``write_dm``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"nsc : input rank-1 array('i') with bounds (3)\n"
+"ncol : input rank-1 array('i') with bounds (no_u)\n"
+"list_col : input rank-1 array('i') with bounds (nnz)\n"
+"dm : input rank-2 array('d') with bounds (nnz,nspin)\n"
+"\nOther Parameters\n----------------\n"
+"nspin : input int, optional\n    Default: shape(dm, 1)\n"
+"no_u : input int, optional\n    Default: shape(ncol, 0)\n"
+"nnz : input int, optional\n    Default: shape(list_col, 0)";
+/* extern void F_FUNC_US(write_dm,WRITE_DM)(string,int*,int*,int*,int*,int*,int*,double*,size_t); */
+static PyObject *f2py_rout__siesta_write_dm(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,int*,int*,int*,int*,double*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int nspin = 0;
+    PyObject *nspin_capi = Py_None;
+    int no_u = 0;
+    PyObject *no_u_capi = Py_None;
+    int *nsc = NULL;
+    npy_intp nsc_Dims[1] = {-1};
+    const int nsc_Rank = 1;
+    PyArrayObject *capi_nsc_as_array = NULL;
+    int capi_nsc_intent = 0;
+    PyObject *nsc_capi = Py_None;
+    int nnz = 0;
+    PyObject *nnz_capi = Py_None;
+    int *ncol = NULL;
+    npy_intp ncol_Dims[1] = {-1};
+    const int ncol_Rank = 1;
+    PyArrayObject *capi_ncol_as_array = NULL;
+    int capi_ncol_intent = 0;
+    PyObject *ncol_capi = Py_None;
+    int *list_col = NULL;
+    npy_intp list_col_Dims[1] = {-1};
+    const int list_col_Rank = 1;
+    PyArrayObject *capi_list_col_as_array = NULL;
+    int capi_list_col_intent = 0;
+    PyObject *list_col_capi = Py_None;
+    double *dm = NULL;
+    npy_intp dm_Dims[2] = {-1, -1};
+    const int dm_Rank = 2;
+    PyArrayObject *capi_dm_as_array = NULL;
+    int capi_dm_intent = 0;
+    PyObject *dm_capi = Py_None;
+    static char *capi_kwlist[] = {"fname","nsc","ncol","list_col","dm","nspin","no_u","nnz",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOOOO|OOO:_siesta.write_dm",\
+        capi_kwlist,&fname_capi,&nsc_capi,&ncol_capi,&list_col_capi,&dm_capi,&nspin_capi,&no_u_capi,&nnz_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.write_dm to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable nsc */
+    nsc_Dims[0]=3;
+    capi_nsc_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.write_dm: failed to create array from the 2nd argument `nsc`";
+    capi_nsc_as_array = ndarray_from_pyobj(  NPY_INT,1,nsc_Dims,nsc_Rank,  capi_nsc_intent,nsc_capi,capi_errmess);
+    if (capi_nsc_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        nsc = (int *)(PyArray_DATA(capi_nsc_as_array));
+
+    /* Processing variable ncol */
+    ;
+    capi_ncol_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.write_dm: failed to create array from the 3rd argument `ncol`";
+    capi_ncol_as_array = ndarray_from_pyobj(  NPY_INT,1,ncol_Dims,ncol_Rank,  capi_ncol_intent,ncol_capi,capi_errmess);
+    if (capi_ncol_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        ncol = (int *)(PyArray_DATA(capi_ncol_as_array));
+
+    /* Processing variable list_col */
+    ;
+    capi_list_col_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.write_dm: failed to create array from the 4th argument `list_col`";
+    capi_list_col_as_array = ndarray_from_pyobj(  NPY_INT,1,list_col_Dims,list_col_Rank,  capi_list_col_intent,list_col_capi,capi_errmess);
+    if (capi_list_col_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        list_col = (int *)(PyArray_DATA(capi_list_col_as_array));
+
+    /* Processing variable no_u */
+    if (no_u_capi == Py_None) no_u = shape(ncol, 0); else
+        f2py_success = int_from_pyobj(&no_u,no_u_capi,"_siesta.write_dm() 2nd keyword (no_u) can't be converted to int");
+    if (f2py_success) {
+    CHECKSCALAR(shape(ncol, 0) == no_u,"shape(ncol, 0) == no_u","2nd keyword no_u","write_dm:no_u=%d",no_u) {
+    /* Processing variable nnz */
+    if (nnz_capi == Py_None) nnz = shape(list_col, 0); else
+        f2py_success = int_from_pyobj(&nnz,nnz_capi,"_siesta.write_dm() 3rd keyword (nnz) can't be converted to int");
+    if (f2py_success) {
+    CHECKSCALAR(shape(list_col, 0) == nnz,"shape(list_col, 0) == nnz","3rd keyword nnz","write_dm:nnz=%d",nnz) {
+    /* Processing variable dm */
+    dm_Dims[0]=nnz;
+    capi_dm_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.write_dm: failed to create array from the 5th argument `dm`";
+    capi_dm_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,dm_Dims,dm_Rank,  capi_dm_intent,dm_capi,capi_errmess);
+    if (capi_dm_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        dm = (double *)(PyArray_DATA(capi_dm_as_array));
+
+    /* Processing variable nspin */
+    if (nspin_capi == Py_None) nspin = shape(dm, 1); else
+        f2py_success = int_from_pyobj(&nspin,nspin_capi,"_siesta.write_dm() 1st keyword (nspin) can't be converted to int");
+    if (f2py_success) {
+    CHECKSCALAR(shape(dm, 1) == nspin,"shape(dm, 1) == nspin","1st keyword nspin","write_dm:nspin=%d",nspin) {
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&nspin,&no_u,nsc,&nnz,ncol,list_col,dm,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("");
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    } /*CHECKSCALAR(shape(dm, 1) == nspin)*/
+    } /*if (f2py_success) of nspin*/
+    /* End of cleaning variable nspin */
+    if((PyObject *)capi_dm_as_array!=dm_capi) {
+        Py_XDECREF(capi_dm_as_array); }
+    }  /* if (capi_dm_as_array == NULL) ... else of dm */
+    /* End of cleaning variable dm */
+    } /*CHECKSCALAR(shape(list_col, 0) == nnz)*/
+    } /*if (f2py_success) of nnz*/
+    /* End of cleaning variable nnz */
+    } /*CHECKSCALAR(shape(ncol, 0) == no_u)*/
+    } /*if (f2py_success) of no_u*/
+    /* End of cleaning variable no_u */
+    if((PyObject *)capi_list_col_as_array!=list_col_capi) {
+        Py_XDECREF(capi_list_col_as_array); }
+    }  /* if (capi_list_col_as_array == NULL) ... else of list_col */
+    /* End of cleaning variable list_col */
+    if((PyObject *)capi_ncol_as_array!=ncol_capi) {
+        Py_XDECREF(capi_ncol_as_array); }
+    }  /* if (capi_ncol_as_array == NULL) ... else of ncol */
+    /* End of cleaning variable ncol */
+    if((PyObject *)capi_nsc_as_array!=nsc_capi) {
+        Py_XDECREF(capi_nsc_as_array); }
+    }  /* if (capi_nsc_as_array == NULL) ... else of nsc */
+    /* End of cleaning variable nsc */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/****************************** end of write_dm ******************************/
+
+/***************************** read_tshs_version *****************************/
+static char doc_f2py_rout__siesta_read_tshs_version[] = "\
+version = read_tshs_version(fname)\n\nWrapper for ``read_tshs_version``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"\nReturns\n-------\n"
+"version : int";
+/* extern void F_FUNC_US(read_tshs_version,READ_TSHS_VERSION)(string,int*,size_t); */
+static PyObject *f2py_rout__siesta_read_tshs_version(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int version = 0;
+    static char *capi_kwlist[] = {"fname",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "O|:_siesta.read_tshs_version",\
+        capi_kwlist,&fname_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_tshs_version to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable version */
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&version,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("i",version);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    /* End of cleaning variable version */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/************************** end of read_tshs_version **************************/
+
+/****************************** read_tshs_sizes ******************************/
+static char doc_f2py_rout__siesta_read_tshs_sizes[] = "\
+nspin,na_u,no_u,n_s,nnz = read_tshs_sizes(fname)\n\nWrapper for ``read_tshs_sizes``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"\nReturns\n-------\n"
+"nspin : int\n"
+"na_u : int\n"
+"no_u : int\n"
+"n_s : int\n"
+"nnz : int";
+/* extern void F_FUNC_US(read_tshs_sizes,READ_TSHS_SIZES)(string,int*,int*,int*,int*,int*,size_t); */
+static PyObject *f2py_rout__siesta_read_tshs_sizes(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,int*,int*,int*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int nspin = 0;
+    int na_u = 0;
+    int no_u = 0;
+    int n_s = 0;
+    int nnz = 0;
+    static char *capi_kwlist[] = {"fname",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "O|:_siesta.read_tshs_sizes",\
+        capi_kwlist,&fname_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_tshs_sizes to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable nspin */
+    /* Processing variable na_u */
+    /* Processing variable no_u */
+    /* Processing variable n_s */
+    /* Processing variable nnz */
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&nspin,&na_u,&no_u,&n_s,&nnz,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("iiiii",nspin,na_u,no_u,n_s,nnz);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    /* End of cleaning variable nnz */
+    /* End of cleaning variable n_s */
+    /* End of cleaning variable no_u */
+    /* End of cleaning variable na_u */
+    /* End of cleaning variable nspin */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/*************************** end of read_tshs_sizes ***************************/
+
+/******************************** read_tshs_ef ********************************/
+static char doc_f2py_rout__siesta_read_tshs_ef[] = "\
+ef = read_tshs_ef(fname)\n\nWrapper for ``read_tshs_ef``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"\nReturns\n-------\n"
+"ef : float";
+/* extern void F_FUNC_US(read_tshs_ef,READ_TSHS_EF)(string,double*,size_t); */
+static PyObject *f2py_rout__siesta_read_tshs_ef(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,double*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    double ef = 0;
+    static char *capi_kwlist[] = {"fname",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "O|:_siesta.read_tshs_ef",\
+        capi_kwlist,&fname_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_tshs_ef to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable ef */
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&ef,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("d",ef);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    /* End of cleaning variable ef */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/**************************** end of read_tshs_ef ****************************/
+
+/******************************* read_tshs_cell *******************************/
+static char doc_f2py_rout__siesta_read_tshs_cell[] = "\
+nsc,cell,isc = read_tshs_cell(fname,n_s)\n\nWrapper for ``read_tshs_cell``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"n_s : input int\n"
+"\nReturns\n-------\n"
+"nsc : rank-1 array('i') with bounds (3)\n"
+"cell : rank-2 array('d') with bounds (3,3)\n"
+"isc : rank-2 array('i') with bounds (3,n_s)";
+/* extern void F_FUNC_US(read_tshs_cell,READ_TSHS_CELL)(string,int*,int*,double*,int*,size_t); */
+static PyObject *f2py_rout__siesta_read_tshs_cell(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,double*,int*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int n_s = 0;
+    PyObject *n_s_capi = Py_None;
+    int *nsc = NULL;
+    npy_intp nsc_Dims[1] = {-1};
+    const int nsc_Rank = 1;
+    PyArrayObject *capi_nsc_as_array = NULL;
+    int capi_nsc_intent = 0;
+    double *cell = NULL;
+    npy_intp cell_Dims[2] = {-1, -1};
+    const int cell_Rank = 2;
+    PyArrayObject *capi_cell_as_array = NULL;
+    int capi_cell_intent = 0;
+    int *isc = NULL;
+    npy_intp isc_Dims[2] = {-1, -1};
+    const int isc_Rank = 2;
+    PyArrayObject *capi_isc_as_array = NULL;
+    int capi_isc_intent = 0;
+    static char *capi_kwlist[] = {"fname","n_s",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OO|:_siesta.read_tshs_cell",\
+        capi_kwlist,&fname_capi,&n_s_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_tshs_cell to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable n_s */
+        f2py_success = int_from_pyobj(&n_s,n_s_capi,"_siesta.read_tshs_cell() 2nd argument (n_s) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable nsc */
+    nsc_Dims[0]=3;
+    capi_nsc_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_tshs_cell: failed to create array from the hidden `nsc`";
+    capi_nsc_as_array = ndarray_from_pyobj(  NPY_INT,1,nsc_Dims,nsc_Rank,  capi_nsc_intent,Py_None,capi_errmess);
+    if (capi_nsc_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        nsc = (int *)(PyArray_DATA(capi_nsc_as_array));
+
+    /* Processing variable cell */
+    cell_Dims[0]=3,cell_Dims[1]=3;
+    capi_cell_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_tshs_cell: failed to create array from the hidden `cell`";
+    capi_cell_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,cell_Dims,cell_Rank,  capi_cell_intent,Py_None,capi_errmess);
+    if (capi_cell_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        cell = (double *)(PyArray_DATA(capi_cell_as_array));
+
+    /* Processing variable isc */
+    isc_Dims[0]=3,isc_Dims[1]=n_s;
+    capi_isc_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_tshs_cell: failed to create array from the hidden `isc`";
+    capi_isc_as_array = ndarray_from_pyobj(  NPY_INT,1,isc_Dims,isc_Rank,  capi_isc_intent,Py_None,capi_errmess);
+    if (capi_isc_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        isc = (int *)(PyArray_DATA(capi_isc_as_array));
+
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&n_s,nsc,cell,isc,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("NNN",capi_nsc_as_array,capi_cell_as_array,capi_isc_as_array);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    }  /* if (capi_isc_as_array == NULL) ... else of isc */
+    /* End of cleaning variable isc */
+    }  /* if (capi_cell_as_array == NULL) ... else of cell */
+    /* End of cleaning variable cell */
+    }  /* if (capi_nsc_as_array == NULL) ... else of nsc */
+    /* End of cleaning variable nsc */
+    } /*if (f2py_success) of n_s*/
+    /* End of cleaning variable n_s */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/*************************** end of read_tshs_cell ***************************/
+
+/******************************* read_tshs_geom *******************************/
+static char doc_f2py_rout__siesta_read_tshs_geom[] = "\
+xa,lasto = read_tshs_geom(fname,na_u)\n\nWrapper for ``read_tshs_geom``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"na_u : input int\n"
+"\nReturns\n-------\n"
+"xa : rank-2 array('d') with bounds (3,na_u)\n"
+"lasto : rank-1 array('i') with bounds (1 + na_u)";
+/* extern void F_FUNC_US(read_tshs_geom,READ_TSHS_GEOM)(string,int*,double*,int*,size_t); */
+static PyObject *f2py_rout__siesta_read_tshs_geom(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,double*,int*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int na_u = 0;
+    PyObject *na_u_capi = Py_None;
+    double *xa = NULL;
+    npy_intp xa_Dims[2] = {-1, -1};
+    const int xa_Rank = 2;
+    PyArrayObject *capi_xa_as_array = NULL;
+    int capi_xa_intent = 0;
+    int *lasto = NULL;
+    npy_intp lasto_Dims[1] = {-1};
+    const int lasto_Rank = 1;
+    PyArrayObject *capi_lasto_as_array = NULL;
+    int capi_lasto_intent = 0;
+    static char *capi_kwlist[] = {"fname","na_u",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OO|:_siesta.read_tshs_geom",\
+        capi_kwlist,&fname_capi,&na_u_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_tshs_geom to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable na_u */
+        f2py_success = int_from_pyobj(&na_u,na_u_capi,"_siesta.read_tshs_geom() 2nd argument (na_u) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable xa */
+    xa_Dims[0]=3,xa_Dims[1]=na_u;
+    capi_xa_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_tshs_geom: failed to create array from the hidden `xa`";
+    capi_xa_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,xa_Dims,xa_Rank,  capi_xa_intent,Py_None,capi_errmess);
+    if (capi_xa_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        xa = (double *)(PyArray_DATA(capi_xa_as_array));
+
+    /* Processing variable lasto */
+    lasto_Dims[0]=1 + na_u;
+    capi_lasto_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_tshs_geom: failed to create array from the hidden `lasto`";
+    capi_lasto_as_array = ndarray_from_pyobj(  NPY_INT,1,lasto_Dims,lasto_Rank,  capi_lasto_intent,Py_None,capi_errmess);
+    if (capi_lasto_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        lasto = (int *)(PyArray_DATA(capi_lasto_as_array));
+
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&na_u,xa,lasto,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("NN",capi_xa_as_array,capi_lasto_as_array);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    }  /* if (capi_lasto_as_array == NULL) ... else of lasto */
+    /* End of cleaning variable lasto */
+    }  /* if (capi_xa_as_array == NULL) ... else of xa */
+    /* End of cleaning variable xa */
+    } /*if (f2py_success) of na_u*/
+    /* End of cleaning variable na_u */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/*************************** end of read_tshs_geom ***************************/
+
+/******************************** read_tshs_hs ********************************/
+static char doc_f2py_rout__siesta_read_tshs_hs[] = "\
+ncol,list_col,h,s = read_tshs_hs(fname,nspin,no_u,nnz)\n\nWrapper for ``read_tshs_hs``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"nspin : input int\n"
+"no_u : input int\n"
+"nnz : input int\n"
+"\nReturns\n-------\n"
+"ncol : rank-1 array('i') with bounds (no_u)\n"
+"list_col : rank-1 array('i') with bounds (nnz)\n"
+"h : rank-2 array('d') with bounds (nnz,nspin)\n"
+"s : rank-1 array('d') with bounds (nnz)";
+/* extern void F_FUNC_US(read_tshs_hs,READ_TSHS_HS)(string,int*,int*,int*,int*,int*,double*,double*,size_t); */
+static PyObject *f2py_rout__siesta_read_tshs_hs(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,int*,int*,int*,double*,double*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int nspin = 0;
+    PyObject *nspin_capi = Py_None;
+    int no_u = 0;
+    PyObject *no_u_capi = Py_None;
+    int nnz = 0;
+    PyObject *nnz_capi = Py_None;
+    int *ncol = NULL;
+    npy_intp ncol_Dims[1] = {-1};
+    const int ncol_Rank = 1;
+    PyArrayObject *capi_ncol_as_array = NULL;
+    int capi_ncol_intent = 0;
+    int *list_col = NULL;
+    npy_intp list_col_Dims[1] = {-1};
+    const int list_col_Rank = 1;
+    PyArrayObject *capi_list_col_as_array = NULL;
+    int capi_list_col_intent = 0;
+    double *h = NULL;
+    npy_intp h_Dims[2] = {-1, -1};
+    const int h_Rank = 2;
+    PyArrayObject *capi_h_as_array = NULL;
+    int capi_h_intent = 0;
+    double *s = NULL;
+    npy_intp s_Dims[1] = {-1};
+    const int s_Rank = 1;
+    PyArrayObject *capi_s_as_array = NULL;
+    int capi_s_intent = 0;
+    static char *capi_kwlist[] = {"fname","nspin","no_u","nnz",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOOO|:_siesta.read_tshs_hs",\
+        capi_kwlist,&fname_capi,&nspin_capi,&no_u_capi,&nnz_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_tshs_hs to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable nspin */
+        f2py_success = int_from_pyobj(&nspin,nspin_capi,"_siesta.read_tshs_hs() 2nd argument (nspin) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable no_u */
+        f2py_success = int_from_pyobj(&no_u,no_u_capi,"_siesta.read_tshs_hs() 3rd argument (no_u) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable nnz */
+        f2py_success = int_from_pyobj(&nnz,nnz_capi,"_siesta.read_tshs_hs() 4th argument (nnz) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable ncol */
+    ncol_Dims[0]=no_u;
+    capi_ncol_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_tshs_hs: failed to create array from the hidden `ncol`";
+    capi_ncol_as_array = ndarray_from_pyobj(  NPY_INT,1,ncol_Dims,ncol_Rank,  capi_ncol_intent,Py_None,capi_errmess);
+    if (capi_ncol_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        ncol = (int *)(PyArray_DATA(capi_ncol_as_array));
+
+    /* Processing variable list_col */
+    list_col_Dims[0]=nnz;
+    capi_list_col_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_tshs_hs: failed to create array from the hidden `list_col`";
+    capi_list_col_as_array = ndarray_from_pyobj(  NPY_INT,1,list_col_Dims,list_col_Rank,  capi_list_col_intent,Py_None,capi_errmess);
+    if (capi_list_col_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        list_col = (int *)(PyArray_DATA(capi_list_col_as_array));
+
+    /* Processing variable h */
+    h_Dims[0]=nnz,h_Dims[1]=nspin;
+    capi_h_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_tshs_hs: failed to create array from the hidden `h`";
+    capi_h_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,h_Dims,h_Rank,  capi_h_intent,Py_None,capi_errmess);
+    if (capi_h_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        h = (double *)(PyArray_DATA(capi_h_as_array));
+
+    /* Processing variable s */
+    s_Dims[0]=nnz;
+    capi_s_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_tshs_hs: failed to create array from the hidden `s`";
+    capi_s_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,s_Dims,s_Rank,  capi_s_intent,Py_None,capi_errmess);
+    if (capi_s_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        s = (double *)(PyArray_DATA(capi_s_as_array));
+
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&nspin,&no_u,&nnz,ncol,list_col,h,s,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("NNNN",capi_ncol_as_array,capi_list_col_as_array,capi_h_as_array,capi_s_as_array);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    }  /* if (capi_s_as_array == NULL) ... else of s */
+    /* End of cleaning variable s */
+    }  /* if (capi_h_as_array == NULL) ... else of h */
+    /* End of cleaning variable h */
+    }  /* if (capi_list_col_as_array == NULL) ... else of list_col */
+    /* End of cleaning variable list_col */
+    }  /* if (capi_ncol_as_array == NULL) ... else of ncol */
+    /* End of cleaning variable ncol */
+    } /*if (f2py_success) of nnz*/
+    /* End of cleaning variable nnz */
+    } /*if (f2py_success) of no_u*/
+    /* End of cleaning variable no_u */
+    } /*if (f2py_success) of nspin*/
+    /* End of cleaning variable nspin */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/**************************** end of read_tshs_hs ****************************/
+
+/******************************** read_tshs_s ********************************/
+static char doc_f2py_rout__siesta_read_tshs_s[] = "\
+ncol,list_col,s = read_tshs_s(fname,no_u,nnz)\n\nWrapper for ``read_tshs_s``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"no_u : input int\n"
+"nnz : input int\n"
+"\nReturns\n-------\n"
+"ncol : rank-1 array('i') with bounds (no_u)\n"
+"list_col : rank-1 array('i') with bounds (nnz)\n"
+"s : rank-1 array('d') with bounds (nnz)";
+/* extern void F_FUNC_US(read_tshs_s,READ_TSHS_S)(string,int*,int*,int*,int*,double*,size_t); */
+static PyObject *f2py_rout__siesta_read_tshs_s(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,int*,int*,double*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int no_u = 0;
+    PyObject *no_u_capi = Py_None;
+    int nnz = 0;
+    PyObject *nnz_capi = Py_None;
+    int *ncol = NULL;
+    npy_intp ncol_Dims[1] = {-1};
+    const int ncol_Rank = 1;
+    PyArrayObject *capi_ncol_as_array = NULL;
+    int capi_ncol_intent = 0;
+    int *list_col = NULL;
+    npy_intp list_col_Dims[1] = {-1};
+    const int list_col_Rank = 1;
+    PyArrayObject *capi_list_col_as_array = NULL;
+    int capi_list_col_intent = 0;
+    double *s = NULL;
+    npy_intp s_Dims[1] = {-1};
+    const int s_Rank = 1;
+    PyArrayObject *capi_s_as_array = NULL;
+    int capi_s_intent = 0;
+    static char *capi_kwlist[] = {"fname","no_u","nnz",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOO|:_siesta.read_tshs_s",\
+        capi_kwlist,&fname_capi,&no_u_capi,&nnz_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_tshs_s to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable no_u */
+        f2py_success = int_from_pyobj(&no_u,no_u_capi,"_siesta.read_tshs_s() 2nd argument (no_u) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable nnz */
+        f2py_success = int_from_pyobj(&nnz,nnz_capi,"_siesta.read_tshs_s() 3rd argument (nnz) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable ncol */
+    ncol_Dims[0]=no_u;
+    capi_ncol_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_tshs_s: failed to create array from the hidden `ncol`";
+    capi_ncol_as_array = ndarray_from_pyobj(  NPY_INT,1,ncol_Dims,ncol_Rank,  capi_ncol_intent,Py_None,capi_errmess);
+    if (capi_ncol_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        ncol = (int *)(PyArray_DATA(capi_ncol_as_array));
+
+    /* Processing variable list_col */
+    list_col_Dims[0]=nnz;
+    capi_list_col_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_tshs_s: failed to create array from the hidden `list_col`";
+    capi_list_col_as_array = ndarray_from_pyobj(  NPY_INT,1,list_col_Dims,list_col_Rank,  capi_list_col_intent,Py_None,capi_errmess);
+    if (capi_list_col_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        list_col = (int *)(PyArray_DATA(capi_list_col_as_array));
+
+    /* Processing variable s */
+    s_Dims[0]=nnz;
+    capi_s_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_tshs_s: failed to create array from the hidden `s`";
+    capi_s_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,s_Dims,s_Rank,  capi_s_intent,Py_None,capi_errmess);
+    if (capi_s_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        s = (double *)(PyArray_DATA(capi_s_as_array));
+
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&no_u,&nnz,ncol,list_col,s,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("NNN",capi_ncol_as_array,capi_list_col_as_array,capi_s_as_array);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    }  /* if (capi_s_as_array == NULL) ... else of s */
+    /* End of cleaning variable s */
+    }  /* if (capi_list_col_as_array == NULL) ... else of list_col */
+    /* End of cleaning variable list_col */
+    }  /* if (capi_ncol_as_array == NULL) ... else of ncol */
+    /* End of cleaning variable ncol */
+    } /*if (f2py_success) of nnz*/
+    /* End of cleaning variable nnz */
+    } /*if (f2py_success) of no_u*/
+    /* End of cleaning variable no_u */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/***************************** end of read_tshs_s *****************************/
+
+/******************************* write_tshs_hs *******************************/
+static char doc_f2py_rout__siesta_write_tshs_hs[] = "\
+write_tshs_hs(fname,nsc1,nsc2,nsc3,cell,xa,lasto,ncol,list_col,h,s,isc,[nspin,na_u,no_u,nnz])\n\nWrapper for ``write_tshs_hs``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"nsc1 : input int\n"
+"nsc2 : input int\n"
+"nsc3 : input int\n"
+"cell : input rank-2 array('d') with bounds (3,3)\n"
+"xa : input rank-2 array('d') with bounds (3,na_u)\n"
+"lasto : input rank-1 array('i') with bounds (1 + na_u)\n"
+"ncol : input rank-1 array('i') with bounds (no_u)\n"
+"list_col : input rank-1 array('i') with bounds (nnz)\n"
+"h : input rank-2 array('d') with bounds (nnz,nspin)\n"
+"s : input rank-1 array('d') with bounds (nnz)\n"
+"isc : input rank-2 array('i') with bounds (3,nsc1 * nsc2 * nsc3)\n"
+"\nOther Parameters\n----------------\n"
+"nspin : input int, optional\n    Default: shape(h, 1)\n"
+"na_u : input int, optional\n    Default: shape(xa, 1)\n"
+"no_u : input int, optional\n    Default: shape(ncol, 0)\n"
+"nnz : input int, optional\n    Default: shape(list_col, 0)";
+/* extern void F_FUNC_US(write_tshs_hs,WRITE_TSHS_HS)(string,int*,int*,int*,int*,int*,int*,int*,double*,double*,int*,int*,int*,double*,double*,int*,size_t); */
+static PyObject *f2py_rout__siesta_write_tshs_hs(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,int*,int*,int*,int*,int*,double*,double*,int*,int*,int*,double*,double*,int*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int nspin = 0;
+    PyObject *nspin_capi = Py_None;
+    int na_u = 0;
+    PyObject *na_u_capi = Py_None;
+    int no_u = 0;
+    PyObject *no_u_capi = Py_None;
+    int nnz = 0;
+    PyObject *nnz_capi = Py_None;
+    int nsc1 = 0;
+    PyObject *nsc1_capi = Py_None;
+    int nsc2 = 0;
+    PyObject *nsc2_capi = Py_None;
+    int nsc3 = 0;
+    PyObject *nsc3_capi = Py_None;
+    double *cell = NULL;
+    npy_intp cell_Dims[2] = {-1, -1};
+    const int cell_Rank = 2;
+    PyArrayObject *capi_cell_as_array = NULL;
+    int capi_cell_intent = 0;
+    PyObject *cell_capi = Py_None;
+    double *xa = NULL;
+    npy_intp xa_Dims[2] = {-1, -1};
+    const int xa_Rank = 2;
+    PyArrayObject *capi_xa_as_array = NULL;
+    int capi_xa_intent = 0;
+    PyObject *xa_capi = Py_None;
+    int *lasto = NULL;
+    npy_intp lasto_Dims[1] = {-1};
+    const int lasto_Rank = 1;
+    PyArrayObject *capi_lasto_as_array = NULL;
+    int capi_lasto_intent = 0;
+    PyObject *lasto_capi = Py_None;
+    int *ncol = NULL;
+    npy_intp ncol_Dims[1] = {-1};
+    const int ncol_Rank = 1;
+    PyArrayObject *capi_ncol_as_array = NULL;
+    int capi_ncol_intent = 0;
+    PyObject *ncol_capi = Py_None;
+    int *list_col = NULL;
+    npy_intp list_col_Dims[1] = {-1};
+    const int list_col_Rank = 1;
+    PyArrayObject *capi_list_col_as_array = NULL;
+    int capi_list_col_intent = 0;
+    PyObject *list_col_capi = Py_None;
+    double *h = NULL;
+    npy_intp h_Dims[2] = {-1, -1};
+    const int h_Rank = 2;
+    PyArrayObject *capi_h_as_array = NULL;
+    int capi_h_intent = 0;
+    PyObject *h_capi = Py_None;
+    double *s = NULL;
+    npy_intp s_Dims[1] = {-1};
+    const int s_Rank = 1;
+    PyArrayObject *capi_s_as_array = NULL;
+    int capi_s_intent = 0;
+    PyObject *s_capi = Py_None;
+    int *isc = NULL;
+    npy_intp isc_Dims[2] = {-1, -1};
+    const int isc_Rank = 2;
+    PyArrayObject *capi_isc_as_array = NULL;
+    int capi_isc_intent = 0;
+    PyObject *isc_capi = Py_None;
+    static char *capi_kwlist[] = {"fname","nsc1","nsc2","nsc3","cell","xa","lasto","ncol","list_col","h","s","isc","nspin","na_u","no_u","nnz",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOOOOOOOOOOO|OOOO:_siesta.write_tshs_hs",\
+        capi_kwlist,&fname_capi,&nsc1_capi,&nsc2_capi,&nsc3_capi,&cell_capi,&xa_capi,&lasto_capi,&ncol_capi,&list_col_capi,&h_capi,&s_capi,&isc_capi,&nspin_capi,&na_u_capi,&no_u_capi,&nnz_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.write_tshs_hs to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable nsc1 */
+        f2py_success = int_from_pyobj(&nsc1,nsc1_capi,"_siesta.write_tshs_hs() 2nd argument (nsc1) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable nsc2 */
+        f2py_success = int_from_pyobj(&nsc2,nsc2_capi,"_siesta.write_tshs_hs() 3rd argument (nsc2) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable nsc3 */
+        f2py_success = int_from_pyobj(&nsc3,nsc3_capi,"_siesta.write_tshs_hs() 4th argument (nsc3) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable cell */
+    cell_Dims[0]=3,cell_Dims[1]=3;
+    capi_cell_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.write_tshs_hs: failed to create array from the 5th argument `cell`";
+    capi_cell_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,cell_Dims,cell_Rank,  capi_cell_intent,cell_capi,capi_errmess);
+    if (capi_cell_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        cell = (double *)(PyArray_DATA(capi_cell_as_array));
+
+    /* Processing variable xa */
+    xa_Dims[0]=3;
+    capi_xa_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.write_tshs_hs: failed to create array from the 6th argument `xa`";
+    capi_xa_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,xa_Dims,xa_Rank,  capi_xa_intent,xa_capi,capi_errmess);
+    if (capi_xa_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        xa = (double *)(PyArray_DATA(capi_xa_as_array));
+
+    /* Processing variable ncol */
+    ;
+    capi_ncol_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.write_tshs_hs: failed to create array from the 8th argument `ncol`";
+    capi_ncol_as_array = ndarray_from_pyobj(  NPY_INT,1,ncol_Dims,ncol_Rank,  capi_ncol_intent,ncol_capi,capi_errmess);
+    if (capi_ncol_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        ncol = (int *)(PyArray_DATA(capi_ncol_as_array));
+
+    /* Processing variable list_col */
+    ;
+    capi_list_col_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.write_tshs_hs: failed to create array from the 9th argument `list_col`";
+    capi_list_col_as_array = ndarray_from_pyobj(  NPY_INT,1,list_col_Dims,list_col_Rank,  capi_list_col_intent,list_col_capi,capi_errmess);
+    if (capi_list_col_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        list_col = (int *)(PyArray_DATA(capi_list_col_as_array));
+
+    /* Processing variable na_u */
+    if (na_u_capi == Py_None) na_u = shape(xa, 1); else
+        f2py_success = int_from_pyobj(&na_u,na_u_capi,"_siesta.write_tshs_hs() 2nd keyword (na_u) can't be converted to int");
+    if (f2py_success) {
+    CHECKSCALAR(shape(xa, 1) == na_u,"shape(xa, 1) == na_u","2nd keyword na_u","write_tshs_hs:na_u=%d",na_u) {
+    /* Processing variable no_u */
+    if (no_u_capi == Py_None) no_u = shape(ncol, 0); else
+        f2py_success = int_from_pyobj(&no_u,no_u_capi,"_siesta.write_tshs_hs() 3rd keyword (no_u) can't be converted to int");
+    if (f2py_success) {
+    CHECKSCALAR(shape(ncol, 0) == no_u,"shape(ncol, 0) == no_u","3rd keyword no_u","write_tshs_hs:no_u=%d",no_u) {
+    /* Processing variable nnz */
+    if (nnz_capi == Py_None) nnz = shape(list_col, 0); else
+        f2py_success = int_from_pyobj(&nnz,nnz_capi,"_siesta.write_tshs_hs() 4th keyword (nnz) can't be converted to int");
+    if (f2py_success) {
+    CHECKSCALAR(shape(list_col, 0) == nnz,"shape(list_col, 0) == nnz","4th keyword nnz","write_tshs_hs:nnz=%d",nnz) {
+    /* Processing variable lasto */
+    lasto_Dims[0]=1 + na_u;
+    capi_lasto_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.write_tshs_hs: failed to create array from the 7th argument `lasto`";
+    capi_lasto_as_array = ndarray_from_pyobj(  NPY_INT,1,lasto_Dims,lasto_Rank,  capi_lasto_intent,lasto_capi,capi_errmess);
+    if (capi_lasto_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        lasto = (int *)(PyArray_DATA(capi_lasto_as_array));
+
+    /* Processing variable h */
+    h_Dims[0]=nnz;
+    capi_h_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.write_tshs_hs: failed to create array from the 10th argument `h`";
+    capi_h_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,h_Dims,h_Rank,  capi_h_intent,h_capi,capi_errmess);
+    if (capi_h_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        h = (double *)(PyArray_DATA(capi_h_as_array));
+
+    /* Processing variable s */
+    s_Dims[0]=nnz;
+    capi_s_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.write_tshs_hs: failed to create array from the 11st argument `s`";
+    capi_s_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,s_Dims,s_Rank,  capi_s_intent,s_capi,capi_errmess);
+    if (capi_s_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        s = (double *)(PyArray_DATA(capi_s_as_array));
+
+    /* Processing variable isc */
+    isc_Dims[0]=3,isc_Dims[1]=nsc1 * nsc2 * nsc3;
+    capi_isc_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.write_tshs_hs: failed to create array from the 12nd argument `isc`";
+    capi_isc_as_array = ndarray_from_pyobj(  NPY_INT,1,isc_Dims,isc_Rank,  capi_isc_intent,isc_capi,capi_errmess);
+    if (capi_isc_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        isc = (int *)(PyArray_DATA(capi_isc_as_array));
+
+    CHECKARRAY(shape(isc, 1) == nsc1 * nsc2 * nsc3,"shape(isc, 1) == nsc1 * nsc2 * nsc3","12nd argument isc") {
+    /* Processing variable nspin */
+    if (nspin_capi == Py_None) nspin = shape(h, 1); else
+        f2py_success = int_from_pyobj(&nspin,nspin_capi,"_siesta.write_tshs_hs() 1st keyword (nspin) can't be converted to int");
+    if (f2py_success) {
+    CHECKSCALAR(shape(h, 1) == nspin,"shape(h, 1) == nspin","1st keyword nspin","write_tshs_hs:nspin=%d",nspin) {
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&nspin,&na_u,&no_u,&nnz,&nsc1,&nsc2,&nsc3,cell,xa,lasto,ncol,list_col,h,s,isc,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("");
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    } /*CHECKSCALAR(shape(h, 1) == nspin)*/
+    } /*if (f2py_success) of nspin*/
+    /* End of cleaning variable nspin */
+    } /*CHECKARRAY(shape(isc, 1) == nsc1 * nsc2 * nsc3)*/
+    if((PyObject *)capi_isc_as_array!=isc_capi) {
+        Py_XDECREF(capi_isc_as_array); }
+    }  /* if (capi_isc_as_array == NULL) ... else of isc */
+    /* End of cleaning variable isc */
+    if((PyObject *)capi_s_as_array!=s_capi) {
+        Py_XDECREF(capi_s_as_array); }
+    }  /* if (capi_s_as_array == NULL) ... else of s */
+    /* End of cleaning variable s */
+    if((PyObject *)capi_h_as_array!=h_capi) {
+        Py_XDECREF(capi_h_as_array); }
+    }  /* if (capi_h_as_array == NULL) ... else of h */
+    /* End of cleaning variable h */
+    if((PyObject *)capi_lasto_as_array!=lasto_capi) {
+        Py_XDECREF(capi_lasto_as_array); }
+    }  /* if (capi_lasto_as_array == NULL) ... else of lasto */
+    /* End of cleaning variable lasto */
+    } /*CHECKSCALAR(shape(list_col, 0) == nnz)*/
+    } /*if (f2py_success) of nnz*/
+    /* End of cleaning variable nnz */
+    } /*CHECKSCALAR(shape(ncol, 0) == no_u)*/
+    } /*if (f2py_success) of no_u*/
+    /* End of cleaning variable no_u */
+    } /*CHECKSCALAR(shape(xa, 1) == na_u)*/
+    } /*if (f2py_success) of na_u*/
+    /* End of cleaning variable na_u */
+    if((PyObject *)capi_list_col_as_array!=list_col_capi) {
+        Py_XDECREF(capi_list_col_as_array); }
+    }  /* if (capi_list_col_as_array == NULL) ... else of list_col */
+    /* End of cleaning variable list_col */
+    if((PyObject *)capi_ncol_as_array!=ncol_capi) {
+        Py_XDECREF(capi_ncol_as_array); }
+    }  /* if (capi_ncol_as_array == NULL) ... else of ncol */
+    /* End of cleaning variable ncol */
+    if((PyObject *)capi_xa_as_array!=xa_capi) {
+        Py_XDECREF(capi_xa_as_array); }
+    }  /* if (capi_xa_as_array == NULL) ... else of xa */
+    /* End of cleaning variable xa */
+    if((PyObject *)capi_cell_as_array!=cell_capi) {
+        Py_XDECREF(capi_cell_as_array); }
+    }  /* if (capi_cell_as_array == NULL) ... else of cell */
+    /* End of cleaning variable cell */
+    } /*if (f2py_success) of nsc3*/
+    /* End of cleaning variable nsc3 */
+    } /*if (f2py_success) of nsc2*/
+    /* End of cleaning variable nsc2 */
+    } /*if (f2py_success) of nsc1*/
+    /* End of cleaning variable nsc1 */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/**************************** end of write_tshs_hs ****************************/
+
+/****************************** read_grid_sizes ******************************/
+static char doc_f2py_rout__siesta_read_grid_sizes[] = "\
+nspin,mesh = read_grid_sizes(fname)\n\nWrapper for ``read_grid_sizes``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"\nReturns\n-------\n"
+"nspin : int\n"
+"mesh : rank-1 array('i') with bounds (3)";
+/* extern void F_FUNC_US(read_grid_sizes,READ_GRID_SIZES)(string,int*,int*,size_t); */
+static PyObject *f2py_rout__siesta_read_grid_sizes(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int nspin = 0;
+    int *mesh = NULL;
+    npy_intp mesh_Dims[1] = {-1};
+    const int mesh_Rank = 1;
+    PyArrayObject *capi_mesh_as_array = NULL;
+    int capi_mesh_intent = 0;
+    static char *capi_kwlist[] = {"fname",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "O|:_siesta.read_grid_sizes",\
+        capi_kwlist,&fname_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_grid_sizes to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable nspin */
+    /* Processing variable mesh */
+    mesh_Dims[0]=3;
+    capi_mesh_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_grid_sizes: failed to create array from the hidden `mesh`";
+    capi_mesh_as_array = ndarray_from_pyobj(  NPY_INT,1,mesh_Dims,mesh_Rank,  capi_mesh_intent,Py_None,capi_errmess);
+    if (capi_mesh_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        mesh = (int *)(PyArray_DATA(capi_mesh_as_array));
+
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&nspin,mesh,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("iN",nspin,capi_mesh_as_array);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    }  /* if (capi_mesh_as_array == NULL) ... else of mesh */
+    /* End of cleaning variable mesh */
+    /* End of cleaning variable nspin */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/*************************** end of read_grid_sizes ***************************/
+
+/******************************* read_grid_cell *******************************/
+static char doc_f2py_rout__siesta_read_grid_cell[] = "\
+cell = read_grid_cell(fname)\n\nWrapper for ``read_grid_cell``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"\nReturns\n-------\n"
+"cell : rank-2 array('d') with bounds (3,3)";
+/* extern void F_FUNC_US(read_grid_cell,READ_GRID_CELL)(string,double*,size_t); */
+static PyObject *f2py_rout__siesta_read_grid_cell(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,double*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    double *cell = NULL;
+    npy_intp cell_Dims[2] = {-1, -1};
+    const int cell_Rank = 2;
+    PyArrayObject *capi_cell_as_array = NULL;
+    int capi_cell_intent = 0;
+    static char *capi_kwlist[] = {"fname",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "O|:_siesta.read_grid_cell",\
+        capi_kwlist,&fname_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_grid_cell to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable cell */
+    cell_Dims[0]=3,cell_Dims[1]=3;
+    capi_cell_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_grid_cell: failed to create array from the hidden `cell`";
+    capi_cell_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,cell_Dims,cell_Rank,  capi_cell_intent,Py_None,capi_errmess);
+    if (capi_cell_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        cell = (double *)(PyArray_DATA(capi_cell_as_array));
+
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,cell,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("N",capi_cell_as_array);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    }  /* if (capi_cell_as_array == NULL) ... else of cell */
+    /* End of cleaning variable cell */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/*************************** end of read_grid_cell ***************************/
+
+/********************************* read_grid *********************************/
+static char doc_f2py_rout__siesta_read_grid[] = "\
+grid = read_grid(fname,nspin,mesh1,mesh2,mesh3)\n\nWrapper for ``read_grid``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"nspin : input int\n"
+"mesh1 : input int\n"
+"mesh2 : input int\n"
+"mesh3 : input int\n"
+"\nReturns\n-------\n"
+"grid : rank-4 array('f') with bounds (mesh1,mesh2,mesh3,nspin)";
+/* extern void F_FUNC_US(read_grid,READ_GRID)(string,int*,int*,int*,int*,float*,size_t); */
+static PyObject *f2py_rout__siesta_read_grid(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,int*,int*,float*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int nspin = 0;
+    PyObject *nspin_capi = Py_None;
+    int mesh1 = 0;
+    PyObject *mesh1_capi = Py_None;
+    int mesh2 = 0;
+    PyObject *mesh2_capi = Py_None;
+    int mesh3 = 0;
+    PyObject *mesh3_capi = Py_None;
+    float *grid = NULL;
+    npy_intp grid_Dims[4] = {-1, -1, -1, -1};
+    const int grid_Rank = 4;
+    PyArrayObject *capi_grid_as_array = NULL;
+    int capi_grid_intent = 0;
+    static char *capi_kwlist[] = {"fname","nspin","mesh1","mesh2","mesh3",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOOOO|:_siesta.read_grid",\
+        capi_kwlist,&fname_capi,&nspin_capi,&mesh1_capi,&mesh2_capi,&mesh3_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_grid to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable nspin */
+        f2py_success = int_from_pyobj(&nspin,nspin_capi,"_siesta.read_grid() 2nd argument (nspin) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable mesh1 */
+        f2py_success = int_from_pyobj(&mesh1,mesh1_capi,"_siesta.read_grid() 3rd argument (mesh1) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable mesh2 */
+        f2py_success = int_from_pyobj(&mesh2,mesh2_capi,"_siesta.read_grid() 4th argument (mesh2) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable mesh3 */
+        f2py_success = int_from_pyobj(&mesh3,mesh3_capi,"_siesta.read_grid() 5th argument (mesh3) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable grid */
+    grid_Dims[0]=mesh1,grid_Dims[1]=mesh2,grid_Dims[2]=mesh3,grid_Dims[3]=nspin;
+    capi_grid_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_grid: failed to create array from the hidden `grid`";
+    capi_grid_as_array = ndarray_from_pyobj(  NPY_FLOAT,1,grid_Dims,grid_Rank,  capi_grid_intent,Py_None,capi_errmess);
+    if (capi_grid_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        grid = (float *)(PyArray_DATA(capi_grid_as_array));
+
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&nspin,&mesh1,&mesh2,&mesh3,grid,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("N",capi_grid_as_array);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    }  /* if (capi_grid_as_array == NULL) ... else of grid */
+    /* End of cleaning variable grid */
+    } /*if (f2py_success) of mesh3*/
+    /* End of cleaning variable mesh3 */
+    } /*if (f2py_success) of mesh2*/
+    /* End of cleaning variable mesh2 */
+    } /*if (f2py_success) of mesh1*/
+    /* End of cleaning variable mesh1 */
+    } /*if (f2py_success) of nspin*/
+    /* End of cleaning variable nspin */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/****************************** end of read_grid ******************************/
+
+/********************************* write_grid *********************************/
+static char doc_f2py_rout__siesta_write_grid[] = "\
+write_grid(fname,nspin,cell,grid,[mesh1,mesh2,mesh3])\n\nWrapper for ``write_grid``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"nspin : input int\n"
+"cell : input rank-2 array('d') with bounds (3,3)\n"
+"grid : input rank-3 array('f') with bounds (mesh1,mesh2,mesh3)\n"
+"\nOther Parameters\n----------------\n"
+"mesh1 : input int, optional\n    Default: shape(grid, 0)\n"
+"mesh2 : input int, optional\n    Default: shape(grid, 1)\n"
+"mesh3 : input int, optional\n    Default: shape(grid, 2)";
+/* extern void F_FUNC_US(write_grid,WRITE_GRID)(string,int*,int*,int*,int*,double*,float*,size_t); */
+static PyObject *f2py_rout__siesta_write_grid(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,int*,int*,double*,float*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int nspin = 0;
+    PyObject *nspin_capi = Py_None;
+    int mesh1 = 0;
+    PyObject *mesh1_capi = Py_None;
+    int mesh2 = 0;
+    PyObject *mesh2_capi = Py_None;
+    int mesh3 = 0;
+    PyObject *mesh3_capi = Py_None;
+    double *cell = NULL;
+    npy_intp cell_Dims[2] = {-1, -1};
+    const int cell_Rank = 2;
+    PyArrayObject *capi_cell_as_array = NULL;
+    int capi_cell_intent = 0;
+    PyObject *cell_capi = Py_None;
+    float *grid = NULL;
+    npy_intp grid_Dims[3] = {-1, -1, -1};
+    const int grid_Rank = 3;
+    PyArrayObject *capi_grid_as_array = NULL;
+    int capi_grid_intent = 0;
+    PyObject *grid_capi = Py_None;
+    static char *capi_kwlist[] = {"fname","nspin","cell","grid","mesh1","mesh2","mesh3",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOOO|OOO:_siesta.write_grid",\
+        capi_kwlist,&fname_capi,&nspin_capi,&cell_capi,&grid_capi,&mesh1_capi,&mesh2_capi,&mesh3_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.write_grid to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable nspin */
+        f2py_success = int_from_pyobj(&nspin,nspin_capi,"_siesta.write_grid() 2nd argument (nspin) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable cell */
+    cell_Dims[0]=3,cell_Dims[1]=3;
+    capi_cell_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.write_grid: failed to create array from the 3rd argument `cell`";
+    capi_cell_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,cell_Dims,cell_Rank,  capi_cell_intent,cell_capi,capi_errmess);
+    if (capi_cell_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        cell = (double *)(PyArray_DATA(capi_cell_as_array));
+
+    /* Processing variable grid */
+    ;
+    capi_grid_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.write_grid: failed to create array from the 4th argument `grid`";
+    capi_grid_as_array = ndarray_from_pyobj(  NPY_FLOAT,1,grid_Dims,grid_Rank,  capi_grid_intent,grid_capi,capi_errmess);
+    if (capi_grid_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        grid = (float *)(PyArray_DATA(capi_grid_as_array));
+
+    /* Processing variable mesh1 */
+    if (mesh1_capi == Py_None) mesh1 = shape(grid, 0); else
+        f2py_success = int_from_pyobj(&mesh1,mesh1_capi,"_siesta.write_grid() 1st keyword (mesh1) can't be converted to int");
+    if (f2py_success) {
+    CHECKSCALAR(shape(grid, 0) == mesh1,"shape(grid, 0) == mesh1","1st keyword mesh1","write_grid:mesh1=%d",mesh1) {
+    /* Processing variable mesh2 */
+    if (mesh2_capi == Py_None) mesh2 = shape(grid, 1); else
+        f2py_success = int_from_pyobj(&mesh2,mesh2_capi,"_siesta.write_grid() 2nd keyword (mesh2) can't be converted to int");
+    if (f2py_success) {
+    CHECKSCALAR(shape(grid, 1) == mesh2,"shape(grid, 1) == mesh2","2nd keyword mesh2","write_grid:mesh2=%d",mesh2) {
+    /* Processing variable mesh3 */
+    if (mesh3_capi == Py_None) mesh3 = shape(grid, 2); else
+        f2py_success = int_from_pyobj(&mesh3,mesh3_capi,"_siesta.write_grid() 3rd keyword (mesh3) can't be converted to int");
+    if (f2py_success) {
+    CHECKSCALAR(shape(grid, 2) == mesh3,"shape(grid, 2) == mesh3","3rd keyword mesh3","write_grid:mesh3=%d",mesh3) {
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&nspin,&mesh1,&mesh2,&mesh3,cell,grid,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("");
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    } /*CHECKSCALAR(shape(grid, 2) == mesh3)*/
+    } /*if (f2py_success) of mesh3*/
+    /* End of cleaning variable mesh3 */
+    } /*CHECKSCALAR(shape(grid, 1) == mesh2)*/
+    } /*if (f2py_success) of mesh2*/
+    /* End of cleaning variable mesh2 */
+    } /*CHECKSCALAR(shape(grid, 0) == mesh1)*/
+    } /*if (f2py_success) of mesh1*/
+    /* End of cleaning variable mesh1 */
+    if((PyObject *)capi_grid_as_array!=grid_capi) {
+        Py_XDECREF(capi_grid_as_array); }
+    }  /* if (capi_grid_as_array == NULL) ... else of grid */
+    /* End of cleaning variable grid */
+    if((PyObject *)capi_cell_as_array!=cell_capi) {
+        Py_XDECREF(capi_cell_as_array); }
+    }  /* if (capi_cell_as_array == NULL) ... else of cell */
+    /* End of cleaning variable cell */
+    } /*if (f2py_success) of nspin*/
+    /* End of cleaning variable nspin */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/***************************** end of write_grid *****************************/
+
+/******************************* read_gf_sizes *******************************/
+static char doc_f2py_rout__siesta_read_gf_sizes[] = "\
+nspin,no_u,nkpt,ne = read_gf_sizes(iu)\n\nWrapper for ``read_gf_sizes``.\
+\n\nParameters\n----------\n"
+"iu : input int\n"
+"\nReturns\n-------\n"
+"nspin : int\n"
+"no_u : int\n"
+"nkpt : int\n"
+"ne : int";
+/* extern void F_FUNC_US(read_gf_sizes,READ_GF_SIZES)(int*,int*,int*,int*,int*); */
+static PyObject *f2py_rout__siesta_read_gf_sizes(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(int*,int*,int*,int*,int*)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    int iu = 0;
+    PyObject *iu_capi = Py_None;
+    int nspin = 0;
+    int no_u = 0;
+    int nkpt = 0;
+    int ne = 0;
+    static char *capi_kwlist[] = {"iu",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "O|:_siesta.read_gf_sizes",\
+        capi_kwlist,&iu_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable iu */
+        f2py_success = int_from_pyobj(&iu,iu_capi,"_siesta.read_gf_sizes() 1st argument (iu) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable nspin */
+    /* Processing variable no_u */
+    /* Processing variable nkpt */
+    /* Processing variable ne */
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(&iu,&nspin,&no_u,&nkpt,&ne);
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("iiii",nspin,no_u,nkpt,ne);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    /* End of cleaning variable ne */
+    /* End of cleaning variable nkpt */
+    /* End of cleaning variable no_u */
+    /* End of cleaning variable nspin */
+    } /*if (f2py_success) of iu*/
+    /* End of cleaning variable iu */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/**************************** end of read_gf_sizes ****************************/
+
+/******************************* read_gf_header *******************************/
+static char doc_f2py_rout__siesta_read_gf_header[] = "\
+kpt,e = read_gf_header(iu,nkpt,ne)\n\nWrapper for ``read_gf_header``.\
+\n\nParameters\n----------\n"
+"iu : input int\n"
+"nkpt : input int\n"
+"ne : input int\n"
+"\nReturns\n-------\n"
+"kpt : rank-2 array('d') with bounds (3,nkpt)\n"
+"e : rank-1 array('D') with bounds (ne)";
+/* extern void F_FUNC_US(read_gf_header,READ_GF_HEADER)(int*,int*,double*,int*,complex_double*); */
+static PyObject *f2py_rout__siesta_read_gf_header(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(int*,int*,double*,int*,complex_double*)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    int iu = 0;
+    PyObject *iu_capi = Py_None;
+    int nkpt = 0;
+    PyObject *nkpt_capi = Py_None;
+    double *kpt = NULL;
+    npy_intp kpt_Dims[2] = {-1, -1};
+    const int kpt_Rank = 2;
+    PyArrayObject *capi_kpt_as_array = NULL;
+    int capi_kpt_intent = 0;
+    int ne = 0;
+    PyObject *ne_capi = Py_None;
+    complex_double *e = NULL;
+    npy_intp e_Dims[1] = {-1};
+    const int e_Rank = 1;
+    PyArrayObject *capi_e_as_array = NULL;
+    int capi_e_intent = 0;
+    static char *capi_kwlist[] = {"iu","nkpt","ne",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOO|:_siesta.read_gf_header",\
+        capi_kwlist,&iu_capi,&nkpt_capi,&ne_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable iu */
+        f2py_success = int_from_pyobj(&iu,iu_capi,"_siesta.read_gf_header() 1st argument (iu) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable nkpt */
+        f2py_success = int_from_pyobj(&nkpt,nkpt_capi,"_siesta.read_gf_header() 2nd argument (nkpt) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable ne */
+        f2py_success = int_from_pyobj(&ne,ne_capi,"_siesta.read_gf_header() 3rd argument (ne) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable kpt */
+    kpt_Dims[0]=3,kpt_Dims[1]=nkpt;
+    capi_kpt_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_gf_header: failed to create array from the hidden `kpt`";
+    capi_kpt_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,kpt_Dims,kpt_Rank,  capi_kpt_intent,Py_None,capi_errmess);
+    if (capi_kpt_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        kpt = (double *)(PyArray_DATA(capi_kpt_as_array));
+
+    /* Processing variable e */
+    e_Dims[0]=ne;
+    capi_e_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_gf_header: failed to create array from the hidden `e`";
+    capi_e_as_array = ndarray_from_pyobj(  NPY_CDOUBLE,1,e_Dims,e_Rank,  capi_e_intent,Py_None,capi_errmess);
+    if (capi_e_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        e = (complex_double *)(PyArray_DATA(capi_e_as_array));
+
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(&iu,&nkpt,kpt,&ne,e);
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("NN",capi_kpt_as_array,capi_e_as_array);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    }  /* if (capi_e_as_array == NULL) ... else of e */
+    /* End of cleaning variable e */
+    }  /* if (capi_kpt_as_array == NULL) ... else of kpt */
+    /* End of cleaning variable kpt */
+    } /*if (f2py_success) of ne*/
+    /* End of cleaning variable ne */
+    } /*if (f2py_success) of nkpt*/
+    /* End of cleaning variable nkpt */
+    } /*if (f2py_success) of iu*/
+    /* End of cleaning variable iu */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/*************************** end of read_gf_header ***************************/
+
+/******************************** read_gf_find ********************************/
+static char doc_f2py_rout__siesta_read_gf_find[] = "\
+read_gf_find(iu,nspin,nkpt,ne,cstate,cspin,ckpt,ce,cis_read,istate,ispin,ikpt,ie)\n\nWrapper for ``read_gf_find``.\
+\n\nParameters\n----------\n"
+"iu : input int\n"
+"nspin : input int\n"
+"nkpt : input int\n"
+"ne : input int\n"
+"cstate : input int\n"
+"cspin : input int\n"
+"ckpt : input int\n"
+"ce : input int\n"
+"cis_read : input int\n"
+"istate : input int\n"
+"ispin : input int\n"
+"ikpt : input int\n"
+"ie : input int";
+/* extern void F_FUNC_US(read_gf_find,READ_GF_FIND)(int*,int*,int*,int*,int*,int*,int*,int*,int*,int*,int*,int*,int*); */
+static PyObject *f2py_rout__siesta_read_gf_find(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(int*,int*,int*,int*,int*,int*,int*,int*,int*,int*,int*,int*,int*)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    int iu = 0;
+    PyObject *iu_capi = Py_None;
+    int nspin = 0;
+    PyObject *nspin_capi = Py_None;
+    int nkpt = 0;
+    PyObject *nkpt_capi = Py_None;
+    int ne = 0;
+    PyObject *ne_capi = Py_None;
+    int cstate = 0;
+    PyObject *cstate_capi = Py_None;
+    int cspin = 0;
+    PyObject *cspin_capi = Py_None;
+    int ckpt = 0;
+    PyObject *ckpt_capi = Py_None;
+    int ce = 0;
+    PyObject *ce_capi = Py_None;
+    int cis_read = 0;
+    PyObject *cis_read_capi = Py_None;
+    int istate = 0;
+    PyObject *istate_capi = Py_None;
+    int ispin = 0;
+    PyObject *ispin_capi = Py_None;
+    int ikpt = 0;
+    PyObject *ikpt_capi = Py_None;
+    int ie = 0;
+    PyObject *ie_capi = Py_None;
+    static char *capi_kwlist[] = {"iu","nspin","nkpt","ne","cstate","cspin","ckpt","ce","cis_read","istate","ispin","ikpt","ie",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOOOOOOOOOOOO|:_siesta.read_gf_find",\
+        capi_kwlist,&iu_capi,&nspin_capi,&nkpt_capi,&ne_capi,&cstate_capi,&cspin_capi,&ckpt_capi,&ce_capi,&cis_read_capi,&istate_capi,&ispin_capi,&ikpt_capi,&ie_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable iu */
+        f2py_success = int_from_pyobj(&iu,iu_capi,"_siesta.read_gf_find() 1st argument (iu) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable nspin */
+        f2py_success = int_from_pyobj(&nspin,nspin_capi,"_siesta.read_gf_find() 2nd argument (nspin) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable nkpt */
+        f2py_success = int_from_pyobj(&nkpt,nkpt_capi,"_siesta.read_gf_find() 3rd argument (nkpt) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable ne */
+        f2py_success = int_from_pyobj(&ne,ne_capi,"_siesta.read_gf_find() 4th argument (ne) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable cstate */
+        f2py_success = int_from_pyobj(&cstate,cstate_capi,"_siesta.read_gf_find() 5th argument (cstate) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable cspin */
+        f2py_success = int_from_pyobj(&cspin,cspin_capi,"_siesta.read_gf_find() 6th argument (cspin) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable ckpt */
+        f2py_success = int_from_pyobj(&ckpt,ckpt_capi,"_siesta.read_gf_find() 7th argument (ckpt) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable ce */
+        f2py_success = int_from_pyobj(&ce,ce_capi,"_siesta.read_gf_find() 8th argument (ce) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable cis_read */
+        f2py_success = int_from_pyobj(&cis_read,cis_read_capi,"_siesta.read_gf_find() 9th argument (cis_read) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable istate */
+        f2py_success = int_from_pyobj(&istate,istate_capi,"_siesta.read_gf_find() 10th argument (istate) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable ispin */
+        f2py_success = int_from_pyobj(&ispin,ispin_capi,"_siesta.read_gf_find() 11st argument (ispin) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable ikpt */
+        f2py_success = int_from_pyobj(&ikpt,ikpt_capi,"_siesta.read_gf_find() 12nd argument (ikpt) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable ie */
+        f2py_success = int_from_pyobj(&ie,ie_capi,"_siesta.read_gf_find() 13rd argument (ie) can't be converted to int");
+    if (f2py_success) {
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(&iu,&nspin,&nkpt,&ne,&cstate,&cspin,&ckpt,&ce,&cis_read,&istate,&ispin,&ikpt,&ie);
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("");
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    } /*if (f2py_success) of ie*/
+    /* End of cleaning variable ie */
+    } /*if (f2py_success) of ikpt*/
+    /* End of cleaning variable ikpt */
+    } /*if (f2py_success) of ispin*/
+    /* End of cleaning variable ispin */
+    } /*if (f2py_success) of istate*/
+    /* End of cleaning variable istate */
+    } /*if (f2py_success) of cis_read*/
+    /* End of cleaning variable cis_read */
+    } /*if (f2py_success) of ce*/
+    /* End of cleaning variable ce */
+    } /*if (f2py_success) of ckpt*/
+    /* End of cleaning variable ckpt */
+    } /*if (f2py_success) of cspin*/
+    /* End of cleaning variable cspin */
+    } /*if (f2py_success) of cstate*/
+    /* End of cleaning variable cstate */
+    } /*if (f2py_success) of ne*/
+    /* End of cleaning variable ne */
+    } /*if (f2py_success) of nkpt*/
+    /* End of cleaning variable nkpt */
+    } /*if (f2py_success) of nspin*/
+    /* End of cleaning variable nspin */
+    } /*if (f2py_success) of iu*/
+    /* End of cleaning variable iu */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/**************************** end of read_gf_find ****************************/
+
+/********************************* read_gf_hs *********************************/
+static char doc_f2py_rout__siesta_read_gf_hs[] = "\
+h,s = read_gf_hs(iu,no_u)\n\nWrapper for ``read_gf_hs``.\
+\n\nParameters\n----------\n"
+"iu : input int\n"
+"no_u : input int\n"
+"\nReturns\n-------\n"
+"h : rank-2 array('D') with bounds (no_u,no_u)\n"
+"s : rank-2 array('D') with bounds (no_u,no_u)";
+/* extern void F_FUNC_US(read_gf_hs,READ_GF_HS)(int*,int*,complex_double*,complex_double*); */
+static PyObject *f2py_rout__siesta_read_gf_hs(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(int*,int*,complex_double*,complex_double*)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    int iu = 0;
+    PyObject *iu_capi = Py_None;
+    int no_u = 0;
+    PyObject *no_u_capi = Py_None;
+    complex_double *h = NULL;
+    npy_intp h_Dims[2] = {-1, -1};
+    const int h_Rank = 2;
+    PyArrayObject *capi_h_as_array = NULL;
+    int capi_h_intent = 0;
+    complex_double *s = NULL;
+    npy_intp s_Dims[2] = {-1, -1};
+    const int s_Rank = 2;
+    PyArrayObject *capi_s_as_array = NULL;
+    int capi_s_intent = 0;
+    static char *capi_kwlist[] = {"iu","no_u",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OO|:_siesta.read_gf_hs",\
+        capi_kwlist,&iu_capi,&no_u_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable iu */
+        f2py_success = int_from_pyobj(&iu,iu_capi,"_siesta.read_gf_hs() 1st argument (iu) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable no_u */
+        f2py_success = int_from_pyobj(&no_u,no_u_capi,"_siesta.read_gf_hs() 2nd argument (no_u) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable h */
+    h_Dims[0]=no_u,h_Dims[1]=no_u;
+    capi_h_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_gf_hs: failed to create array from the hidden `h`";
+    capi_h_as_array = ndarray_from_pyobj(  NPY_CDOUBLE,1,h_Dims,h_Rank,  capi_h_intent,Py_None,capi_errmess);
+    if (capi_h_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        h = (complex_double *)(PyArray_DATA(capi_h_as_array));
+
+    /* Processing variable s */
+    s_Dims[0]=no_u,s_Dims[1]=no_u;
+    capi_s_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_gf_hs: failed to create array from the hidden `s`";
+    capi_s_as_array = ndarray_from_pyobj(  NPY_CDOUBLE,1,s_Dims,s_Rank,  capi_s_intent,Py_None,capi_errmess);
+    if (capi_s_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        s = (complex_double *)(PyArray_DATA(capi_s_as_array));
+
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(&iu,&no_u,h,s);
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("NN",capi_h_as_array,capi_s_as_array);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    }  /* if (capi_s_as_array == NULL) ... else of s */
+    /* End of cleaning variable s */
+    }  /* if (capi_h_as_array == NULL) ... else of h */
+    /* End of cleaning variable h */
+    } /*if (f2py_success) of no_u*/
+    /* End of cleaning variable no_u */
+    } /*if (f2py_success) of iu*/
+    /* End of cleaning variable iu */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/***************************** end of read_gf_hs *****************************/
+
+/********************************* read_gf_se *********************************/
+static char doc_f2py_rout__siesta_read_gf_se[] = "\
+se = read_gf_se(iu,no_u,ie)\n\nWrapper for ``read_gf_se``.\
+\n\nParameters\n----------\n"
+"iu : input int\n"
+"no_u : input int\n"
+"ie : input int\n"
+"\nReturns\n-------\n"
+"se : rank-2 array('D') with bounds (no_u,no_u)";
+/* extern void F_FUNC_US(read_gf_se,READ_GF_SE)(int*,int*,int*,complex_double*); */
+static PyObject *f2py_rout__siesta_read_gf_se(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(int*,int*,int*,complex_double*)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    int iu = 0;
+    PyObject *iu_capi = Py_None;
+    int no_u = 0;
+    PyObject *no_u_capi = Py_None;
+    int ie = 0;
+    PyObject *ie_capi = Py_None;
+    complex_double *se = NULL;
+    npy_intp se_Dims[2] = {-1, -1};
+    const int se_Rank = 2;
+    PyArrayObject *capi_se_as_array = NULL;
+    int capi_se_intent = 0;
+    static char *capi_kwlist[] = {"iu","no_u","ie",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOO|:_siesta.read_gf_se",\
+        capi_kwlist,&iu_capi,&no_u_capi,&ie_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable iu */
+        f2py_success = int_from_pyobj(&iu,iu_capi,"_siesta.read_gf_se() 1st argument (iu) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable no_u */
+        f2py_success = int_from_pyobj(&no_u,no_u_capi,"_siesta.read_gf_se() 2nd argument (no_u) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable ie */
+        f2py_success = int_from_pyobj(&ie,ie_capi,"_siesta.read_gf_se() 3rd argument (ie) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable se */
+    se_Dims[0]=no_u,se_Dims[1]=no_u;
+    capi_se_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_gf_se: failed to create array from the hidden `se`";
+    capi_se_as_array = ndarray_from_pyobj(  NPY_CDOUBLE,1,se_Dims,se_Rank,  capi_se_intent,Py_None,capi_errmess);
+    if (capi_se_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        se = (complex_double *)(PyArray_DATA(capi_se_as_array));
+
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(&iu,&no_u,&ie,se);
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("N",capi_se_as_array);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    }  /* if (capi_se_as_array == NULL) ... else of se */
+    /* End of cleaning variable se */
+    } /*if (f2py_success) of ie*/
+    /* End of cleaning variable ie */
+    } /*if (f2py_success) of no_u*/
+    /* End of cleaning variable no_u */
+    } /*if (f2py_success) of iu*/
+    /* End of cleaning variable iu */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/***************************** end of read_gf_se *****************************/
+
+/****************************** write_gf_header ******************************/
+static char doc_f2py_rout__siesta_write_gf_header[] = "\
+write_gf_header(iu,nspin,cell,na_u,no_u,no_used,xa_used,lasto_used,bloch,pre_expand,mu,kpt,kw,e,[na_used,nkpt,ne])\n\nWrapper for ``write_gf_header``.\
+\n\nParameters\n----------\n"
+"iu : input int\n"
+"nspin : input int\n"
+"cell : input rank-2 array('d') with bounds (3,3)\n"
+"na_u : input int\n"
+"no_u : input int\n"
+"no_used : input int\n"
+"xa_used : input rank-2 array('d') with bounds (3,na_used)\n"
+"lasto_used : input rank-1 array('i') with bounds (1 + na_used)\n"
+"bloch : input rank-1 array('i') with bounds (3)\n"
+"pre_expand : input int\n"
+"mu : input float\n"
+"kpt : input rank-2 array('d') with bounds (3,nkpt)\n"
+"kw : input rank-1 array('d') with bounds (nkpt)\n"
+"e : input rank-1 array('D') with bounds (ne)\n"
+"\nOther Parameters\n----------------\n"
+"na_used : input int, optional\n    Default: shape(xa_used, 1)\n"
+"nkpt : input int, optional\n    Default: shape(kpt, 1)\n"
+"ne : input int, optional\n    Default: shape(e, 0)";
+/* extern void F_FUNC_US(write_gf_header,WRITE_GF_HEADER)(int*,int*,double*,int*,int*,int*,int*,double*,int*,int*,int*,double*,int*,double*,double*,int*,complex_double*); */
+static PyObject *f2py_rout__siesta_write_gf_header(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(int*,int*,double*,int*,int*,int*,int*,double*,int*,int*,int*,double*,int*,double*,double*,int*,complex_double*)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    int iu = 0;
+    PyObject *iu_capi = Py_None;
+    int nspin = 0;
+    PyObject *nspin_capi = Py_None;
+    double *cell = NULL;
+    npy_intp cell_Dims[2] = {-1, -1};
+    const int cell_Rank = 2;
+    PyArrayObject *capi_cell_as_array = NULL;
+    int capi_cell_intent = 0;
+    PyObject *cell_capi = Py_None;
+    int na_u = 0;
+    PyObject *na_u_capi = Py_None;
+    int no_u = 0;
+    PyObject *no_u_capi = Py_None;
+    int na_used = 0;
+    PyObject *na_used_capi = Py_None;
+    int no_used = 0;
+    PyObject *no_used_capi = Py_None;
+    double *xa_used = NULL;
+    npy_intp xa_used_Dims[2] = {-1, -1};
+    const int xa_used_Rank = 2;
+    PyArrayObject *capi_xa_used_as_array = NULL;
+    int capi_xa_used_intent = 0;
+    PyObject *xa_used_capi = Py_None;
+    int *lasto_used = NULL;
+    npy_intp lasto_used_Dims[1] = {-1};
+    const int lasto_used_Rank = 1;
+    PyArrayObject *capi_lasto_used_as_array = NULL;
+    int capi_lasto_used_intent = 0;
+    PyObject *lasto_used_capi = Py_None;
+    int *bloch = NULL;
+    npy_intp bloch_Dims[1] = {-1};
+    const int bloch_Rank = 1;
+    PyArrayObject *capi_bloch_as_array = NULL;
+    int capi_bloch_intent = 0;
+    PyObject *bloch_capi = Py_None;
+    int pre_expand = 0;
+    PyObject *pre_expand_capi = Py_None;
+    double mu = 0;
+    PyObject *mu_capi = Py_None;
+    int nkpt = 0;
+    PyObject *nkpt_capi = Py_None;
+    double *kpt = NULL;
+    npy_intp kpt_Dims[2] = {-1, -1};
+    const int kpt_Rank = 2;
+    PyArrayObject *capi_kpt_as_array = NULL;
+    int capi_kpt_intent = 0;
+    PyObject *kpt_capi = Py_None;
+    double *kw = NULL;
+    npy_intp kw_Dims[1] = {-1};
+    const int kw_Rank = 1;
+    PyArrayObject *capi_kw_as_array = NULL;
+    int capi_kw_intent = 0;
+    PyObject *kw_capi = Py_None;
+    int ne = 0;
+    PyObject *ne_capi = Py_None;
+    complex_double *e = NULL;
+    npy_intp e_Dims[1] = {-1};
+    const int e_Rank = 1;
+    PyArrayObject *capi_e_as_array = NULL;
+    int capi_e_intent = 0;
+    PyObject *e_capi = Py_None;
+    static char *capi_kwlist[] = {"iu","nspin","cell","na_u","no_u","no_used","xa_used","lasto_used","bloch","pre_expand","mu","kpt","kw","e","na_used","nkpt","ne",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOOOOOOOOOOOOO|OOO:_siesta.write_gf_header",\
+        capi_kwlist,&iu_capi,&nspin_capi,&cell_capi,&na_u_capi,&no_u_capi,&no_used_capi,&xa_used_capi,&lasto_used_capi,&bloch_capi,&pre_expand_capi,&mu_capi,&kpt_capi,&kw_capi,&e_capi,&na_used_capi,&nkpt_capi,&ne_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable iu */
+        f2py_success = int_from_pyobj(&iu,iu_capi,"_siesta.write_gf_header() 1st argument (iu) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable nspin */
+        f2py_success = int_from_pyobj(&nspin,nspin_capi,"_siesta.write_gf_header() 2nd argument (nspin) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable cell */
+    cell_Dims[0]=3,cell_Dims[1]=3;
+    capi_cell_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.write_gf_header: failed to create array from the 3rd argument `cell`";
+    capi_cell_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,cell_Dims,cell_Rank,  capi_cell_intent,cell_capi,capi_errmess);
+    if (capi_cell_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        cell = (double *)(PyArray_DATA(capi_cell_as_array));
+
+    /* Processing variable na_u */
+        f2py_success = int_from_pyobj(&na_u,na_u_capi,"_siesta.write_gf_header() 4th argument (na_u) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable no_u */
+        f2py_success = int_from_pyobj(&no_u,no_u_capi,"_siesta.write_gf_header() 5th argument (no_u) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable no_used */
+        f2py_success = int_from_pyobj(&no_used,no_used_capi,"_siesta.write_gf_header() 6th argument (no_used) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable xa_used */
+    xa_used_Dims[0]=3;
+    capi_xa_used_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.write_gf_header: failed to create array from the 7th argument `xa_used`";
+    capi_xa_used_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,xa_used_Dims,xa_used_Rank,  capi_xa_used_intent,xa_used_capi,capi_errmess);
+    if (capi_xa_used_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        xa_used = (double *)(PyArray_DATA(capi_xa_used_as_array));
+
+    /* Processing variable bloch */
+    bloch_Dims[0]=3;
+    capi_bloch_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.write_gf_header: failed to create array from the 9th argument `bloch`";
+    capi_bloch_as_array = ndarray_from_pyobj(  NPY_INT,1,bloch_Dims,bloch_Rank,  capi_bloch_intent,bloch_capi,capi_errmess);
+    if (capi_bloch_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        bloch = (int *)(PyArray_DATA(capi_bloch_as_array));
+
+    /* Processing variable pre_expand */
+        f2py_success = int_from_pyobj(&pre_expand,pre_expand_capi,"_siesta.write_gf_header() 10th argument (pre_expand) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable mu */
+        f2py_success = double_from_pyobj(&mu,mu_capi,"_siesta.write_gf_header() 11st argument (mu) can't be converted to double");
+    if (f2py_success) {
+    /* Processing variable kpt */
+    kpt_Dims[0]=3;
+    capi_kpt_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.write_gf_header: failed to create array from the 12nd argument `kpt`";
+    capi_kpt_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,kpt_Dims,kpt_Rank,  capi_kpt_intent,kpt_capi,capi_errmess);
+    if (capi_kpt_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        kpt = (double *)(PyArray_DATA(capi_kpt_as_array));
+
+    /* Processing variable e */
+    ;
+    capi_e_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.write_gf_header: failed to create array from the 14th argument `e`";
+    capi_e_as_array = ndarray_from_pyobj(  NPY_CDOUBLE,1,e_Dims,e_Rank,  capi_e_intent,e_capi,capi_errmess);
+    if (capi_e_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        e = (complex_double *)(PyArray_DATA(capi_e_as_array));
+
+    /* Processing variable na_used */
+    if (na_used_capi == Py_None) na_used = shape(xa_used, 1); else
+        f2py_success = int_from_pyobj(&na_used,na_used_capi,"_siesta.write_gf_header() 1st keyword (na_used) can't be converted to int");
+    if (f2py_success) {
+    CHECKSCALAR(shape(xa_used, 1) == na_used,"shape(xa_used, 1) == na_used","1st keyword na_used","write_gf_header:na_used=%d",na_used) {
+    /* Processing variable lasto_used */
+    lasto_used_Dims[0]=1 + na_used;
+    capi_lasto_used_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.write_gf_header: failed to create array from the 8th argument `lasto_used`";
+    capi_lasto_used_as_array = ndarray_from_pyobj(  NPY_INT,1,lasto_used_Dims,lasto_used_Rank,  capi_lasto_used_intent,lasto_used_capi,capi_errmess);
+    if (capi_lasto_used_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        lasto_used = (int *)(PyArray_DATA(capi_lasto_used_as_array));
+
+    /* Processing variable nkpt */
+    if (nkpt_capi == Py_None) nkpt = shape(kpt, 1); else
+        f2py_success = int_from_pyobj(&nkpt,nkpt_capi,"_siesta.write_gf_header() 2nd keyword (nkpt) can't be converted to int");
+    if (f2py_success) {
+    CHECKSCALAR(shape(kpt, 1) == nkpt,"shape(kpt, 1) == nkpt","2nd keyword nkpt","write_gf_header:nkpt=%d",nkpt) {
+    /* Processing variable kw */
+    kw_Dims[0]=nkpt;
+    capi_kw_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.write_gf_header: failed to create array from the 13rd argument `kw`";
+    capi_kw_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,kw_Dims,kw_Rank,  capi_kw_intent,kw_capi,capi_errmess);
+    if (capi_kw_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        kw = (double *)(PyArray_DATA(capi_kw_as_array));
+
+    /* Processing variable ne */
+    if (ne_capi == Py_None) ne = shape(e, 0); else
+        f2py_success = int_from_pyobj(&ne,ne_capi,"_siesta.write_gf_header() 3rd keyword (ne) can't be converted to int");
+    if (f2py_success) {
+    CHECKSCALAR(shape(e, 0) == ne,"shape(e, 0) == ne","3rd keyword ne","write_gf_header:ne=%d",ne) {
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(&iu,&nspin,cell,&na_u,&no_u,&na_used,&no_used,xa_used,lasto_used,bloch,&pre_expand,&mu,&nkpt,kpt,kw,&ne,e);
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("");
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    } /*CHECKSCALAR(shape(e, 0) == ne)*/
+    } /*if (f2py_success) of ne*/
+    /* End of cleaning variable ne */
+    if((PyObject *)capi_kw_as_array!=kw_capi) {
+        Py_XDECREF(capi_kw_as_array); }
+    }  /* if (capi_kw_as_array == NULL) ... else of kw */
+    /* End of cleaning variable kw */
+    } /*CHECKSCALAR(shape(kpt, 1) == nkpt)*/
+    } /*if (f2py_success) of nkpt*/
+    /* End of cleaning variable nkpt */
+    if((PyObject *)capi_lasto_used_as_array!=lasto_used_capi) {
+        Py_XDECREF(capi_lasto_used_as_array); }
+    }  /* if (capi_lasto_used_as_array == NULL) ... else of lasto_used */
+    /* End of cleaning variable lasto_used */
+    } /*CHECKSCALAR(shape(xa_used, 1) == na_used)*/
+    } /*if (f2py_success) of na_used*/
+    /* End of cleaning variable na_used */
+    if((PyObject *)capi_e_as_array!=e_capi) {
+        Py_XDECREF(capi_e_as_array); }
+    }  /* if (capi_e_as_array == NULL) ... else of e */
+    /* End of cleaning variable e */
+    if((PyObject *)capi_kpt_as_array!=kpt_capi) {
+        Py_XDECREF(capi_kpt_as_array); }
+    }  /* if (capi_kpt_as_array == NULL) ... else of kpt */
+    /* End of cleaning variable kpt */
+    } /*if (f2py_success) of mu*/
+    /* End of cleaning variable mu */
+    } /*if (f2py_success) of pre_expand*/
+    /* End of cleaning variable pre_expand */
+    if((PyObject *)capi_bloch_as_array!=bloch_capi) {
+        Py_XDECREF(capi_bloch_as_array); }
+    }  /* if (capi_bloch_as_array == NULL) ... else of bloch */
+    /* End of cleaning variable bloch */
+    if((PyObject *)capi_xa_used_as_array!=xa_used_capi) {
+        Py_XDECREF(capi_xa_used_as_array); }
+    }  /* if (capi_xa_used_as_array == NULL) ... else of xa_used */
+    /* End of cleaning variable xa_used */
+    } /*if (f2py_success) of no_used*/
+    /* End of cleaning variable no_used */
+    } /*if (f2py_success) of no_u*/
+    /* End of cleaning variable no_u */
+    } /*if (f2py_success) of na_u*/
+    /* End of cleaning variable na_u */
+    if((PyObject *)capi_cell_as_array!=cell_capi) {
+        Py_XDECREF(capi_cell_as_array); }
+    }  /* if (capi_cell_as_array == NULL) ... else of cell */
+    /* End of cleaning variable cell */
+    } /*if (f2py_success) of nspin*/
+    /* End of cleaning variable nspin */
+    } /*if (f2py_success) of iu*/
+    /* End of cleaning variable iu */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/*************************** end of write_gf_header ***************************/
+
+/******************************** write_gf_hs ********************************/
+static char doc_f2py_rout__siesta_write_gf_hs[] = "\
+write_gf_hs(iu,ik,e,h,s,[no_u])\n\nWrapper for ``write_gf_hs``.\
+\n\nParameters\n----------\n"
+"iu : input int\n"
+"ik : input int\n"
+"e : input complex\n"
+"h : input rank-2 array('D') with bounds (no_u,no_u)\n"
+"s : input rank-2 array('D') with bounds (no_u,no_u)\n"
+"\nOther Parameters\n----------------\n"
+"no_u : input int, optional\n    Default: shape(h, 0)";
+/* extern void F_FUNC_US(write_gf_hs,WRITE_GF_HS)(int*,int*,complex_double*,int*,complex_double*,complex_double*); */
+static PyObject *f2py_rout__siesta_write_gf_hs(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(int*,int*,complex_double*,int*,complex_double*,complex_double*)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    int iu = 0;
+    PyObject *iu_capi = Py_None;
+    int ik = 0;
+    PyObject *ik_capi = Py_None;
+    complex_double e;
+    PyObject *e_capi = Py_None;
+    int no_u = 0;
+    PyObject *no_u_capi = Py_None;
+    complex_double *h = NULL;
+    npy_intp h_Dims[2] = {-1, -1};
+    const int h_Rank = 2;
+    PyArrayObject *capi_h_as_array = NULL;
+    int capi_h_intent = 0;
+    PyObject *h_capi = Py_None;
+    complex_double *s = NULL;
+    npy_intp s_Dims[2] = {-1, -1};
+    const int s_Rank = 2;
+    PyArrayObject *capi_s_as_array = NULL;
+    int capi_s_intent = 0;
+    PyObject *s_capi = Py_None;
+    static char *capi_kwlist[] = {"iu","ik","e","h","s","no_u",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOOOO|O:_siesta.write_gf_hs",\
+        capi_kwlist,&iu_capi,&ik_capi,&e_capi,&h_capi,&s_capi,&no_u_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable iu */
+        f2py_success = int_from_pyobj(&iu,iu_capi,"_siesta.write_gf_hs() 1st argument (iu) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable ik */
+        f2py_success = int_from_pyobj(&ik,ik_capi,"_siesta.write_gf_hs() 2nd argument (ik) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable e */
+        f2py_success = complex_double_from_pyobj(&e,e_capi,"_siesta.write_gf_hs() 3rd argument (e) can't be converted to complex_double");
+    if (f2py_success) {
+    /* Processing variable h */
+    ;
+    capi_h_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.write_gf_hs: failed to create array from the 4th argument `h`";
+    capi_h_as_array = ndarray_from_pyobj(  NPY_CDOUBLE,1,h_Dims,h_Rank,  capi_h_intent,h_capi,capi_errmess);
+    if (capi_h_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        h = (complex_double *)(PyArray_DATA(capi_h_as_array));
+
+    /* Processing variable no_u */
+    if (no_u_capi == Py_None) no_u = shape(h, 0); else
+        f2py_success = int_from_pyobj(&no_u,no_u_capi,"_siesta.write_gf_hs() 1st keyword (no_u) can't be converted to int");
+    if (f2py_success) {
+    CHECKSCALAR(shape(h, 0) == no_u,"shape(h, 0) == no_u","1st keyword no_u","write_gf_hs:no_u=%d",no_u) {
+    /* Processing variable s */
+    s_Dims[0]=no_u,s_Dims[1]=no_u;
+    capi_s_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.write_gf_hs: failed to create array from the 5th argument `s`";
+    capi_s_as_array = ndarray_from_pyobj(  NPY_CDOUBLE,1,s_Dims,s_Rank,  capi_s_intent,s_capi,capi_errmess);
+    if (capi_s_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        s = (complex_double *)(PyArray_DATA(capi_s_as_array));
+
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(&iu,&ik,&e,&no_u,h,s);
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("");
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    if((PyObject *)capi_s_as_array!=s_capi) {
+        Py_XDECREF(capi_s_as_array); }
+    }  /* if (capi_s_as_array == NULL) ... else of s */
+    /* End of cleaning variable s */
+    } /*CHECKSCALAR(shape(h, 0) == no_u)*/
+    } /*if (f2py_success) of no_u*/
+    /* End of cleaning variable no_u */
+    if((PyObject *)capi_h_as_array!=h_capi) {
+        Py_XDECREF(capi_h_as_array); }
+    }  /* if (capi_h_as_array == NULL) ... else of h */
+    /* End of cleaning variable h */
+    }  /*if (f2py_success) of e frompyobj*/
+    /* End of cleaning variable e */
+    } /*if (f2py_success) of ik*/
+    /* End of cleaning variable ik */
+    } /*if (f2py_success) of iu*/
+    /* End of cleaning variable iu */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/***************************** end of write_gf_hs *****************************/
+
+/******************************** write_gf_se ********************************/
+static char doc_f2py_rout__siesta_write_gf_se[] = "\
+write_gf_se(iu,ik,ie,e,se,[no_u])\n\nWrapper for ``write_gf_se``.\
+\n\nParameters\n----------\n"
+"iu : input int\n"
+"ik : input int\n"
+"ie : input int\n"
+"e : input complex\n"
+"se : input rank-2 array('D') with bounds (no_u,no_u)\n"
+"\nOther Parameters\n----------------\n"
+"no_u : input int, optional\n    Default: shape(se, 0)";
+/* extern void F_FUNC_US(write_gf_se,WRITE_GF_SE)(int*,int*,int*,complex_double*,int*,complex_double*); */
+static PyObject *f2py_rout__siesta_write_gf_se(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(int*,int*,int*,complex_double*,int*,complex_double*)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    int iu = 0;
+    PyObject *iu_capi = Py_None;
+    int ik = 0;
+    PyObject *ik_capi = Py_None;
+    int ie = 0;
+    PyObject *ie_capi = Py_None;
+    complex_double e;
+    PyObject *e_capi = Py_None;
+    int no_u = 0;
+    PyObject *no_u_capi = Py_None;
+    complex_double *se = NULL;
+    npy_intp se_Dims[2] = {-1, -1};
+    const int se_Rank = 2;
+    PyArrayObject *capi_se_as_array = NULL;
+    int capi_se_intent = 0;
+    PyObject *se_capi = Py_None;
+    static char *capi_kwlist[] = {"iu","ik","ie","e","se","no_u",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOOOO|O:_siesta.write_gf_se",\
+        capi_kwlist,&iu_capi,&ik_capi,&ie_capi,&e_capi,&se_capi,&no_u_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable iu */
+        f2py_success = int_from_pyobj(&iu,iu_capi,"_siesta.write_gf_se() 1st argument (iu) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable ik */
+        f2py_success = int_from_pyobj(&ik,ik_capi,"_siesta.write_gf_se() 2nd argument (ik) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable ie */
+        f2py_success = int_from_pyobj(&ie,ie_capi,"_siesta.write_gf_se() 3rd argument (ie) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable e */
+        f2py_success = complex_double_from_pyobj(&e,e_capi,"_siesta.write_gf_se() 4th argument (e) can't be converted to complex_double");
+    if (f2py_success) {
+    /* Processing variable se */
+    ;
+    capi_se_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.write_gf_se: failed to create array from the 5th argument `se`";
+    capi_se_as_array = ndarray_from_pyobj(  NPY_CDOUBLE,1,se_Dims,se_Rank,  capi_se_intent,se_capi,capi_errmess);
+    if (capi_se_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        se = (complex_double *)(PyArray_DATA(capi_se_as_array));
+
+    /* Processing variable no_u */
+    if (no_u_capi == Py_None) no_u = shape(se, 0); else
+        f2py_success = int_from_pyobj(&no_u,no_u_capi,"_siesta.write_gf_se() 1st keyword (no_u) can't be converted to int");
+    if (f2py_success) {
+    CHECKSCALAR(shape(se, 0) == no_u,"shape(se, 0) == no_u","1st keyword no_u","write_gf_se:no_u=%d",no_u) {
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(&iu,&ik,&ie,&e,&no_u,se);
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("");
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    } /*CHECKSCALAR(shape(se, 0) == no_u)*/
+    } /*if (f2py_success) of no_u*/
+    /* End of cleaning variable no_u */
+    if((PyObject *)capi_se_as_array!=se_capi) {
+        Py_XDECREF(capi_se_as_array); }
+    }  /* if (capi_se_as_array == NULL) ... else of se */
+    /* End of cleaning variable se */
+    }  /*if (f2py_success) of e frompyobj*/
+    /* End of cleaning variable e */
+    } /*if (f2py_success) of ie*/
+    /* End of cleaning variable ie */
+    } /*if (f2py_success) of ik*/
+    /* End of cleaning variable ik */
+    } /*if (f2py_success) of iu*/
+    /* End of cleaning variable iu */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/***************************** end of write_gf_se *****************************/
+
+/****************************** read_tsde_sizes ******************************/
+static char doc_f2py_rout__siesta_read_tsde_sizes[] = "\
+nspin,no_u,nsc,nnz = read_tsde_sizes(fname)\n\nWrapper for ``read_tsde_sizes``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"\nReturns\n-------\n"
+"nspin : int\n"
+"no_u : int\n"
+"nsc : rank-1 array('i') with bounds (3)\n"
+"nnz : int";
+/* extern void F_FUNC_US(read_tsde_sizes,READ_TSDE_SIZES)(string,int*,int*,int*,int*,size_t); */
+static PyObject *f2py_rout__siesta_read_tsde_sizes(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,int*,int*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int nspin = 0;
+    int no_u = 0;
+    int *nsc = NULL;
+    npy_intp nsc_Dims[1] = {-1};
+    const int nsc_Rank = 1;
+    PyArrayObject *capi_nsc_as_array = NULL;
+    int capi_nsc_intent = 0;
+    int nnz = 0;
+    static char *capi_kwlist[] = {"fname",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "O|:_siesta.read_tsde_sizes",\
+        capi_kwlist,&fname_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_tsde_sizes to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable nspin */
+    /* Processing variable no_u */
+    /* Processing variable nsc */
+    nsc_Dims[0]=3;
+    capi_nsc_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_tsde_sizes: failed to create array from the hidden `nsc`";
+    capi_nsc_as_array = ndarray_from_pyobj(  NPY_INT,1,nsc_Dims,nsc_Rank,  capi_nsc_intent,Py_None,capi_errmess);
+    if (capi_nsc_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        nsc = (int *)(PyArray_DATA(capi_nsc_as_array));
+
+    /* Processing variable nnz */
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&nspin,&no_u,nsc,&nnz,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("iiNi",nspin,no_u,capi_nsc_as_array,nnz);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    /* End of cleaning variable nnz */
+    }  /* if (capi_nsc_as_array == NULL) ... else of nsc */
+    /* End of cleaning variable nsc */
+    /* End of cleaning variable no_u */
+    /* End of cleaning variable nspin */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/*************************** end of read_tsde_sizes ***************************/
+
+/******************************** read_tsde_dm ********************************/
+static char doc_f2py_rout__siesta_read_tsde_dm[] = "\
+ncol,list_col,dm = read_tsde_dm(fname,nspin,no_u,nsc,nnz)\n\nWrapper for ``read_tsde_dm``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"nspin : input int\n"
+"no_u : input int\n"
+"nsc : input rank-1 array('i') with bounds (3)\n"
+"nnz : input int\n"
+"\nReturns\n-------\n"
+"ncol : rank-1 array('i') with bounds (no_u)\n"
+"list_col : rank-1 array('i') with bounds (nnz)\n"
+"dm : rank-2 array('d') with bounds (nnz,nspin)";
+/* extern void F_FUNC_US(read_tsde_dm,READ_TSDE_DM)(string,int*,int*,int*,int*,int*,int*,double*,size_t); */
+static PyObject *f2py_rout__siesta_read_tsde_dm(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,int*,int*,int*,int*,double*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int nspin = 0;
+    PyObject *nspin_capi = Py_None;
+    int no_u = 0;
+    PyObject *no_u_capi = Py_None;
+    int *nsc = NULL;
+    npy_intp nsc_Dims[1] = {-1};
+    const int nsc_Rank = 1;
+    PyArrayObject *capi_nsc_as_array = NULL;
+    int capi_nsc_intent = 0;
+    PyObject *nsc_capi = Py_None;
+    int nnz = 0;
+    PyObject *nnz_capi = Py_None;
+    int *ncol = NULL;
+    npy_intp ncol_Dims[1] = {-1};
+    const int ncol_Rank = 1;
+    PyArrayObject *capi_ncol_as_array = NULL;
+    int capi_ncol_intent = 0;
+    int *list_col = NULL;
+    npy_intp list_col_Dims[1] = {-1};
+    const int list_col_Rank = 1;
+    PyArrayObject *capi_list_col_as_array = NULL;
+    int capi_list_col_intent = 0;
+    double *dm = NULL;
+    npy_intp dm_Dims[2] = {-1, -1};
+    const int dm_Rank = 2;
+    PyArrayObject *capi_dm_as_array = NULL;
+    int capi_dm_intent = 0;
+    static char *capi_kwlist[] = {"fname","nspin","no_u","nsc","nnz",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOOOO|:_siesta.read_tsde_dm",\
+        capi_kwlist,&fname_capi,&nspin_capi,&no_u_capi,&nsc_capi,&nnz_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_tsde_dm to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable nspin */
+        f2py_success = int_from_pyobj(&nspin,nspin_capi,"_siesta.read_tsde_dm() 2nd argument (nspin) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable no_u */
+        f2py_success = int_from_pyobj(&no_u,no_u_capi,"_siesta.read_tsde_dm() 3rd argument (no_u) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable nsc */
+    nsc_Dims[0]=3;
+    capi_nsc_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.read_tsde_dm: failed to create array from the 4th argument `nsc`";
+    capi_nsc_as_array = ndarray_from_pyobj(  NPY_INT,1,nsc_Dims,nsc_Rank,  capi_nsc_intent,nsc_capi,capi_errmess);
+    if (capi_nsc_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        nsc = (int *)(PyArray_DATA(capi_nsc_as_array));
+
+    /* Processing variable nnz */
+        f2py_success = int_from_pyobj(&nnz,nnz_capi,"_siesta.read_tsde_dm() 5th argument (nnz) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable ncol */
+    ncol_Dims[0]=no_u;
+    capi_ncol_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_tsde_dm: failed to create array from the hidden `ncol`";
+    capi_ncol_as_array = ndarray_from_pyobj(  NPY_INT,1,ncol_Dims,ncol_Rank,  capi_ncol_intent,Py_None,capi_errmess);
+    if (capi_ncol_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        ncol = (int *)(PyArray_DATA(capi_ncol_as_array));
+
+    /* Processing variable list_col */
+    list_col_Dims[0]=nnz;
+    capi_list_col_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_tsde_dm: failed to create array from the hidden `list_col`";
+    capi_list_col_as_array = ndarray_from_pyobj(  NPY_INT,1,list_col_Dims,list_col_Rank,  capi_list_col_intent,Py_None,capi_errmess);
+    if (capi_list_col_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        list_col = (int *)(PyArray_DATA(capi_list_col_as_array));
+
+    /* Processing variable dm */
+    dm_Dims[0]=nnz,dm_Dims[1]=nspin;
+    capi_dm_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_tsde_dm: failed to create array from the hidden `dm`";
+    capi_dm_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,dm_Dims,dm_Rank,  capi_dm_intent,Py_None,capi_errmess);
+    if (capi_dm_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        dm = (double *)(PyArray_DATA(capi_dm_as_array));
+
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&nspin,&no_u,nsc,&nnz,ncol,list_col,dm,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("NNN",capi_ncol_as_array,capi_list_col_as_array,capi_dm_as_array);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    }  /* if (capi_dm_as_array == NULL) ... else of dm */
+    /* End of cleaning variable dm */
+    }  /* if (capi_list_col_as_array == NULL) ... else of list_col */
+    /* End of cleaning variable list_col */
+    }  /* if (capi_ncol_as_array == NULL) ... else of ncol */
+    /* End of cleaning variable ncol */
+    } /*if (f2py_success) of nnz*/
+    /* End of cleaning variable nnz */
+    if((PyObject *)capi_nsc_as_array!=nsc_capi) {
+        Py_XDECREF(capi_nsc_as_array); }
+    }  /* if (capi_nsc_as_array == NULL) ... else of nsc */
+    /* End of cleaning variable nsc */
+    } /*if (f2py_success) of no_u*/
+    /* End of cleaning variable no_u */
+    } /*if (f2py_success) of nspin*/
+    /* End of cleaning variable nspin */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/**************************** end of read_tsde_dm ****************************/
+
+/******************************** read_tsde_ef ********************************/
+static char doc_f2py_rout__siesta_read_tsde_ef[] = "\
+ef = read_tsde_ef(fname)\n\nWrapper for ``read_tsde_ef``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"\nReturns\n-------\n"
+"ef : float";
+/* extern void F_FUNC_US(read_tsde_ef,READ_TSDE_EF)(string,double*,size_t); */
+static PyObject *f2py_rout__siesta_read_tsde_ef(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,double*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    double ef = 0;
+    static char *capi_kwlist[] = {"fname",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "O|:_siesta.read_tsde_ef",\
+        capi_kwlist,&fname_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_tsde_ef to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable ef */
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&ef,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("d",ef);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    /* End of cleaning variable ef */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/**************************** end of read_tsde_ef ****************************/
+
+/******************************* read_tsde_edm *******************************/
+static char doc_f2py_rout__siesta_read_tsde_edm[] = "\
+ncol,list_col,edm = read_tsde_edm(fname,nspin,no_u,nsc,nnz)\n\nWrapper for ``read_tsde_edm``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"nspin : input int\n"
+"no_u : input int\n"
+"nsc : input rank-1 array('i') with bounds (3)\n"
+"nnz : input int\n"
+"\nReturns\n-------\n"
+"ncol : rank-1 array('i') with bounds (no_u)\n"
+"list_col : rank-1 array('i') with bounds (nnz)\n"
+"edm : rank-2 array('d') with bounds (nnz,nspin)";
+/* extern void F_FUNC_US(read_tsde_edm,READ_TSDE_EDM)(string,int*,int*,int*,int*,int*,int*,double*,size_t); */
+static PyObject *f2py_rout__siesta_read_tsde_edm(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,int*,int*,int*,int*,double*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int nspin = 0;
+    PyObject *nspin_capi = Py_None;
+    int no_u = 0;
+    PyObject *no_u_capi = Py_None;
+    int *nsc = NULL;
+    npy_intp nsc_Dims[1] = {-1};
+    const int nsc_Rank = 1;
+    PyArrayObject *capi_nsc_as_array = NULL;
+    int capi_nsc_intent = 0;
+    PyObject *nsc_capi = Py_None;
+    int nnz = 0;
+    PyObject *nnz_capi = Py_None;
+    int *ncol = NULL;
+    npy_intp ncol_Dims[1] = {-1};
+    const int ncol_Rank = 1;
+    PyArrayObject *capi_ncol_as_array = NULL;
+    int capi_ncol_intent = 0;
+    int *list_col = NULL;
+    npy_intp list_col_Dims[1] = {-1};
+    const int list_col_Rank = 1;
+    PyArrayObject *capi_list_col_as_array = NULL;
+    int capi_list_col_intent = 0;
+    double *edm = NULL;
+    npy_intp edm_Dims[2] = {-1, -1};
+    const int edm_Rank = 2;
+    PyArrayObject *capi_edm_as_array = NULL;
+    int capi_edm_intent = 0;
+    static char *capi_kwlist[] = {"fname","nspin","no_u","nsc","nnz",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOOOO|:_siesta.read_tsde_edm",\
+        capi_kwlist,&fname_capi,&nspin_capi,&no_u_capi,&nsc_capi,&nnz_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_tsde_edm to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable nspin */
+        f2py_success = int_from_pyobj(&nspin,nspin_capi,"_siesta.read_tsde_edm() 2nd argument (nspin) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable no_u */
+        f2py_success = int_from_pyobj(&no_u,no_u_capi,"_siesta.read_tsde_edm() 3rd argument (no_u) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable nsc */
+    nsc_Dims[0]=3;
+    capi_nsc_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.read_tsde_edm: failed to create array from the 4th argument `nsc`";
+    capi_nsc_as_array = ndarray_from_pyobj(  NPY_INT,1,nsc_Dims,nsc_Rank,  capi_nsc_intent,nsc_capi,capi_errmess);
+    if (capi_nsc_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        nsc = (int *)(PyArray_DATA(capi_nsc_as_array));
+
+    /* Processing variable nnz */
+        f2py_success = int_from_pyobj(&nnz,nnz_capi,"_siesta.read_tsde_edm() 5th argument (nnz) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable ncol */
+    ncol_Dims[0]=no_u;
+    capi_ncol_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_tsde_edm: failed to create array from the hidden `ncol`";
+    capi_ncol_as_array = ndarray_from_pyobj(  NPY_INT,1,ncol_Dims,ncol_Rank,  capi_ncol_intent,Py_None,capi_errmess);
+    if (capi_ncol_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        ncol = (int *)(PyArray_DATA(capi_ncol_as_array));
+
+    /* Processing variable list_col */
+    list_col_Dims[0]=nnz;
+    capi_list_col_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_tsde_edm: failed to create array from the hidden `list_col`";
+    capi_list_col_as_array = ndarray_from_pyobj(  NPY_INT,1,list_col_Dims,list_col_Rank,  capi_list_col_intent,Py_None,capi_errmess);
+    if (capi_list_col_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        list_col = (int *)(PyArray_DATA(capi_list_col_as_array));
+
+    /* Processing variable edm */
+    edm_Dims[0]=nnz,edm_Dims[1]=nspin;
+    capi_edm_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_tsde_edm: failed to create array from the hidden `edm`";
+    capi_edm_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,edm_Dims,edm_Rank,  capi_edm_intent,Py_None,capi_errmess);
+    if (capi_edm_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        edm = (double *)(PyArray_DATA(capi_edm_as_array));
+
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&nspin,&no_u,nsc,&nnz,ncol,list_col,edm,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("NNN",capi_ncol_as_array,capi_list_col_as_array,capi_edm_as_array);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    }  /* if (capi_edm_as_array == NULL) ... else of edm */
+    /* End of cleaning variable edm */
+    }  /* if (capi_list_col_as_array == NULL) ... else of list_col */
+    /* End of cleaning variable list_col */
+    }  /* if (capi_ncol_as_array == NULL) ... else of ncol */
+    /* End of cleaning variable ncol */
+    } /*if (f2py_success) of nnz*/
+    /* End of cleaning variable nnz */
+    if((PyObject *)capi_nsc_as_array!=nsc_capi) {
+        Py_XDECREF(capi_nsc_as_array); }
+    }  /* if (capi_nsc_as_array == NULL) ... else of nsc */
+    /* End of cleaning variable nsc */
+    } /*if (f2py_success) of no_u*/
+    /* End of cleaning variable no_u */
+    } /*if (f2py_success) of nspin*/
+    /* End of cleaning variable nspin */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/**************************** end of read_tsde_edm ****************************/
+
+/***************************** write_tsde_dm_edm *****************************/
+static char doc_f2py_rout__siesta_write_tsde_dm_edm[] = "\
+write_tsde_dm_edm(fname,nsc,ncol,list_col,dm,edm,ef,[nspin,no_u,nnz])\n\nWrapper for ``write_tsde_dm_edm``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"nsc : input rank-1 array('i') with bounds (3)\n"
+"ncol : input rank-1 array('i') with bounds (no_u)\n"
+"list_col : input rank-1 array('i') with bounds (nnz)\n"
+"dm : input rank-2 array('d') with bounds (nnz,nspin)\n"
+"edm : input rank-2 array('d') with bounds (nnz,nspin)\n"
+"ef : input float\n"
+"\nOther Parameters\n----------------\n"
+"nspin : input int, optional\n    Default: shape(dm, 1)\n"
+"no_u : input int, optional\n    Default: shape(ncol, 0)\n"
+"nnz : input int, optional\n    Default: shape(list_col, 0)";
+/* extern void F_FUNC_US(write_tsde_dm_edm,WRITE_TSDE_DM_EDM)(string,int*,int*,int*,int*,int*,int*,double*,double*,double*,size_t); */
+static PyObject *f2py_rout__siesta_write_tsde_dm_edm(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,int*,int*,int*,int*,double*,double*,double*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int nspin = 0;
+    PyObject *nspin_capi = Py_None;
+    int no_u = 0;
+    PyObject *no_u_capi = Py_None;
+    int *nsc = NULL;
+    npy_intp nsc_Dims[1] = {-1};
+    const int nsc_Rank = 1;
+    PyArrayObject *capi_nsc_as_array = NULL;
+    int capi_nsc_intent = 0;
+    PyObject *nsc_capi = Py_None;
+    int nnz = 0;
+    PyObject *nnz_capi = Py_None;
+    int *ncol = NULL;
+    npy_intp ncol_Dims[1] = {-1};
+    const int ncol_Rank = 1;
+    PyArrayObject *capi_ncol_as_array = NULL;
+    int capi_ncol_intent = 0;
+    PyObject *ncol_capi = Py_None;
+    int *list_col = NULL;
+    npy_intp list_col_Dims[1] = {-1};
+    const int list_col_Rank = 1;
+    PyArrayObject *capi_list_col_as_array = NULL;
+    int capi_list_col_intent = 0;
+    PyObject *list_col_capi = Py_None;
+    double *dm = NULL;
+    npy_intp dm_Dims[2] = {-1, -1};
+    const int dm_Rank = 2;
+    PyArrayObject *capi_dm_as_array = NULL;
+    int capi_dm_intent = 0;
+    PyObject *dm_capi = Py_None;
+    double *edm = NULL;
+    npy_intp edm_Dims[2] = {-1, -1};
+    const int edm_Rank = 2;
+    PyArrayObject *capi_edm_as_array = NULL;
+    int capi_edm_intent = 0;
+    PyObject *edm_capi = Py_None;
+    double ef = 0;
+    PyObject *ef_capi = Py_None;
+    static char *capi_kwlist[] = {"fname","nsc","ncol","list_col","dm","edm","ef","nspin","no_u","nnz",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOOOOOO|OOO:_siesta.write_tsde_dm_edm",\
+        capi_kwlist,&fname_capi,&nsc_capi,&ncol_capi,&list_col_capi,&dm_capi,&edm_capi,&ef_capi,&nspin_capi,&no_u_capi,&nnz_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.write_tsde_dm_edm to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable nsc */
+    nsc_Dims[0]=3;
+    capi_nsc_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.write_tsde_dm_edm: failed to create array from the 2nd argument `nsc`";
+    capi_nsc_as_array = ndarray_from_pyobj(  NPY_INT,1,nsc_Dims,nsc_Rank,  capi_nsc_intent,nsc_capi,capi_errmess);
+    if (capi_nsc_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        nsc = (int *)(PyArray_DATA(capi_nsc_as_array));
+
+    /* Processing variable ncol */
+    ;
+    capi_ncol_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.write_tsde_dm_edm: failed to create array from the 3rd argument `ncol`";
+    capi_ncol_as_array = ndarray_from_pyobj(  NPY_INT,1,ncol_Dims,ncol_Rank,  capi_ncol_intent,ncol_capi,capi_errmess);
+    if (capi_ncol_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        ncol = (int *)(PyArray_DATA(capi_ncol_as_array));
+
+    /* Processing variable list_col */
+    ;
+    capi_list_col_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.write_tsde_dm_edm: failed to create array from the 4th argument `list_col`";
+    capi_list_col_as_array = ndarray_from_pyobj(  NPY_INT,1,list_col_Dims,list_col_Rank,  capi_list_col_intent,list_col_capi,capi_errmess);
+    if (capi_list_col_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        list_col = (int *)(PyArray_DATA(capi_list_col_as_array));
+
+    /* Processing variable ef */
+        f2py_success = double_from_pyobj(&ef,ef_capi,"_siesta.write_tsde_dm_edm() 7th argument (ef) can't be converted to double");
+    if (f2py_success) {
+    /* Processing variable no_u */
+    if (no_u_capi == Py_None) no_u = shape(ncol, 0); else
+        f2py_success = int_from_pyobj(&no_u,no_u_capi,"_siesta.write_tsde_dm_edm() 2nd keyword (no_u) can't be converted to int");
+    if (f2py_success) {
+    CHECKSCALAR(shape(ncol, 0) == no_u,"shape(ncol, 0) == no_u","2nd keyword no_u","write_tsde_dm_edm:no_u=%d",no_u) {
+    /* Processing variable nnz */
+    if (nnz_capi == Py_None) nnz = shape(list_col, 0); else
+        f2py_success = int_from_pyobj(&nnz,nnz_capi,"_siesta.write_tsde_dm_edm() 3rd keyword (nnz) can't be converted to int");
+    if (f2py_success) {
+    CHECKSCALAR(shape(list_col, 0) == nnz,"shape(list_col, 0) == nnz","3rd keyword nnz","write_tsde_dm_edm:nnz=%d",nnz) {
+    /* Processing variable dm */
+    dm_Dims[0]=nnz;
+    capi_dm_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.write_tsde_dm_edm: failed to create array from the 5th argument `dm`";
+    capi_dm_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,dm_Dims,dm_Rank,  capi_dm_intent,dm_capi,capi_errmess);
+    if (capi_dm_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        dm = (double *)(PyArray_DATA(capi_dm_as_array));
+
+    /* Processing variable nspin */
+    if (nspin_capi == Py_None) nspin = shape(dm, 1); else
+        f2py_success = int_from_pyobj(&nspin,nspin_capi,"_siesta.write_tsde_dm_edm() 1st keyword (nspin) can't be converted to int");
+    if (f2py_success) {
+    CHECKSCALAR(shape(dm, 1) == nspin,"shape(dm, 1) == nspin","1st keyword nspin","write_tsde_dm_edm:nspin=%d",nspin) {
+    /* Processing variable edm */
+    edm_Dims[0]=nnz,edm_Dims[1]=nspin;
+    capi_edm_intent |= F2PY_INTENT_IN;
+    const char capi_errmess[] = "_siesta._siesta.write_tsde_dm_edm: failed to create array from the 6th argument `edm`";
+    capi_edm_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,edm_Dims,edm_Rank,  capi_edm_intent,edm_capi,capi_errmess);
+    if (capi_edm_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        edm = (double *)(PyArray_DATA(capi_edm_as_array));
+
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&nspin,&no_u,nsc,&nnz,ncol,list_col,dm,edm,&ef,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("");
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    if((PyObject *)capi_edm_as_array!=edm_capi) {
+        Py_XDECREF(capi_edm_as_array); }
+    }  /* if (capi_edm_as_array == NULL) ... else of edm */
+    /* End of cleaning variable edm */
+    } /*CHECKSCALAR(shape(dm, 1) == nspin)*/
+    } /*if (f2py_success) of nspin*/
+    /* End of cleaning variable nspin */
+    if((PyObject *)capi_dm_as_array!=dm_capi) {
+        Py_XDECREF(capi_dm_as_array); }
+    }  /* if (capi_dm_as_array == NULL) ... else of dm */
+    /* End of cleaning variable dm */
+    } /*CHECKSCALAR(shape(list_col, 0) == nnz)*/
+    } /*if (f2py_success) of nnz*/
+    /* End of cleaning variable nnz */
+    } /*CHECKSCALAR(shape(ncol, 0) == no_u)*/
+    } /*if (f2py_success) of no_u*/
+    /* End of cleaning variable no_u */
+    } /*if (f2py_success) of ef*/
+    /* End of cleaning variable ef */
+    if((PyObject *)capi_list_col_as_array!=list_col_capi) {
+        Py_XDECREF(capi_list_col_as_array); }
+    }  /* if (capi_list_col_as_array == NULL) ... else of list_col */
+    /* End of cleaning variable list_col */
+    if((PyObject *)capi_ncol_as_array!=ncol_capi) {
+        Py_XDECREF(capi_ncol_as_array); }
+    }  /* if (capi_ncol_as_array == NULL) ... else of ncol */
+    /* End of cleaning variable ncol */
+    if((PyObject *)capi_nsc_as_array!=nsc_capi) {
+        Py_XDECREF(capi_nsc_as_array); }
+    }  /* if (capi_nsc_as_array == NULL) ... else of nsc */
+    /* End of cleaning variable nsc */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/************************** end of write_tsde_dm_edm **************************/
+
+/******************************* read_hs_header *******************************/
+static char doc_f2py_rout__siesta_read_hs_header[] = "\
+gamma,nspin,no_u,no_s,maxnh = read_hs_header(fname)\n\nWrapper for ``read_hs_header``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"\nReturns\n-------\n"
+"gamma : int\n"
+"nspin : int\n"
+"no_u : int\n"
+"no_s : int\n"
+"maxnh : int";
+/* extern void F_FUNC_US(read_hs_header,READ_HS_HEADER)(string,int*,int*,int*,int*,int*,size_t); */
+static PyObject *f2py_rout__siesta_read_hs_header(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,int*,int*,int*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int gamma = 0;
+    int nspin = 0;
+    int no_u = 0;
+    int no_s = 0;
+    int maxnh = 0;
+    static char *capi_kwlist[] = {"fname",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "O|:_siesta.read_hs_header",\
+        capi_kwlist,&fname_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_hs_header to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable gamma */
+    /* Processing variable nspin */
+    /* Processing variable no_u */
+    /* Processing variable no_s */
+    /* Processing variable maxnh */
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&gamma,&nspin,&no_u,&no_s,&maxnh,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("iiiii",gamma,nspin,no_u,no_s,maxnh);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    /* End of cleaning variable maxnh */
+    /* End of cleaning variable no_s */
+    /* End of cleaning variable no_u */
+    /* End of cleaning variable nspin */
+    /* End of cleaning variable gamma */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/*************************** end of read_hs_header ***************************/
+
+/********************************** read_hs **********************************/
+static char doc_f2py_rout__siesta_read_hs[] = "\
+numh,listhptr,listh,h,s,xij = read_hs(fname,nspin,no_u,no_s,maxnh)\n\nWrapper for ``read_hs``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"nspin : input int\n"
+"no_u : input int\n"
+"no_s : input int\n"
+"maxnh : input int\n"
+"\nReturns\n-------\n"
+"numh : rank-1 array('i') with bounds (no_u)\n"
+"listhptr : rank-1 array('i') with bounds (no_u)\n"
+"listh : rank-1 array('i') with bounds (maxnh)\n"
+"h : rank-2 array('d') with bounds (maxnh,nspin)\n"
+"s : rank-1 array('d') with bounds (maxnh)\n"
+"xij : rank-2 array('d') with bounds (3,maxnh)";
+/* extern void F_FUNC_US(read_hs,READ_HS)(string,int*,int*,int*,int*,int*,int*,int*,double*,double*,double*,size_t); */
+static PyObject *f2py_rout__siesta_read_hs(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,int*,int*,int*,int*,int*,double*,double*,double*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int nspin = 0;
+    PyObject *nspin_capi = Py_None;
+    int no_u = 0;
+    PyObject *no_u_capi = Py_None;
+    int no_s = 0;
+    PyObject *no_s_capi = Py_None;
+    int maxnh = 0;
+    PyObject *maxnh_capi = Py_None;
+    int *numh = NULL;
+    npy_intp numh_Dims[1] = {-1};
+    const int numh_Rank = 1;
+    PyArrayObject *capi_numh_as_array = NULL;
+    int capi_numh_intent = 0;
+    int *listhptr = NULL;
+    npy_intp listhptr_Dims[1] = {-1};
+    const int listhptr_Rank = 1;
+    PyArrayObject *capi_listhptr_as_array = NULL;
+    int capi_listhptr_intent = 0;
+    int *listh = NULL;
+    npy_intp listh_Dims[1] = {-1};
+    const int listh_Rank = 1;
+    PyArrayObject *capi_listh_as_array = NULL;
+    int capi_listh_intent = 0;
+    double *h = NULL;
+    npy_intp h_Dims[2] = {-1, -1};
+    const int h_Rank = 2;
+    PyArrayObject *capi_h_as_array = NULL;
+    int capi_h_intent = 0;
+    double *s = NULL;
+    npy_intp s_Dims[1] = {-1};
+    const int s_Rank = 1;
+    PyArrayObject *capi_s_as_array = NULL;
+    int capi_s_intent = 0;
+    double *xij = NULL;
+    npy_intp xij_Dims[2] = {-1, -1};
+    const int xij_Rank = 2;
+    PyArrayObject *capi_xij_as_array = NULL;
+    int capi_xij_intent = 0;
+    static char *capi_kwlist[] = {"fname","nspin","no_u","no_s","maxnh",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOOOO|:_siesta.read_hs",\
+        capi_kwlist,&fname_capi,&nspin_capi,&no_u_capi,&no_s_capi,&maxnh_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_hs to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable nspin */
+        f2py_success = int_from_pyobj(&nspin,nspin_capi,"_siesta.read_hs() 2nd argument (nspin) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable no_u */
+        f2py_success = int_from_pyobj(&no_u,no_u_capi,"_siesta.read_hs() 3rd argument (no_u) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable no_s */
+        f2py_success = int_from_pyobj(&no_s,no_s_capi,"_siesta.read_hs() 4th argument (no_s) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable maxnh */
+        f2py_success = int_from_pyobj(&maxnh,maxnh_capi,"_siesta.read_hs() 5th argument (maxnh) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable numh */
+    numh_Dims[0]=no_u;
+    capi_numh_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hs: failed to create array from the hidden `numh`";
+    capi_numh_as_array = ndarray_from_pyobj(  NPY_INT,1,numh_Dims,numh_Rank,  capi_numh_intent,Py_None,capi_errmess);
+    if (capi_numh_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        numh = (int *)(PyArray_DATA(capi_numh_as_array));
+
+    /* Processing variable listhptr */
+    listhptr_Dims[0]=no_u;
+    capi_listhptr_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hs: failed to create array from the hidden `listhptr`";
+    capi_listhptr_as_array = ndarray_from_pyobj(  NPY_INT,1,listhptr_Dims,listhptr_Rank,  capi_listhptr_intent,Py_None,capi_errmess);
+    if (capi_listhptr_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        listhptr = (int *)(PyArray_DATA(capi_listhptr_as_array));
+
+    /* Processing variable listh */
+    listh_Dims[0]=maxnh;
+    capi_listh_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hs: failed to create array from the hidden `listh`";
+    capi_listh_as_array = ndarray_from_pyobj(  NPY_INT,1,listh_Dims,listh_Rank,  capi_listh_intent,Py_None,capi_errmess);
+    if (capi_listh_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        listh = (int *)(PyArray_DATA(capi_listh_as_array));
+
+    /* Processing variable h */
+    h_Dims[0]=maxnh,h_Dims[1]=nspin;
+    capi_h_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hs: failed to create array from the hidden `h`";
+    capi_h_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,h_Dims,h_Rank,  capi_h_intent,Py_None,capi_errmess);
+    if (capi_h_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        h = (double *)(PyArray_DATA(capi_h_as_array));
+
+    /* Processing variable s */
+    s_Dims[0]=maxnh;
+    capi_s_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hs: failed to create array from the hidden `s`";
+    capi_s_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,s_Dims,s_Rank,  capi_s_intent,Py_None,capi_errmess);
+    if (capi_s_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        s = (double *)(PyArray_DATA(capi_s_as_array));
+
+    /* Processing variable xij */
+    xij_Dims[0]=3,xij_Dims[1]=maxnh;
+    capi_xij_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_hs: failed to create array from the hidden `xij`";
+    capi_xij_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,xij_Dims,xij_Rank,  capi_xij_intent,Py_None,capi_errmess);
+    if (capi_xij_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        xij = (double *)(PyArray_DATA(capi_xij_as_array));
+
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&nspin,&no_u,&no_s,&maxnh,numh,listhptr,listh,h,s,xij,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("NNNNNN",capi_numh_as_array,capi_listhptr_as_array,capi_listh_as_array,capi_h_as_array,capi_s_as_array,capi_xij_as_array);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    }  /* if (capi_xij_as_array == NULL) ... else of xij */
+    /* End of cleaning variable xij */
+    }  /* if (capi_s_as_array == NULL) ... else of s */
+    /* End of cleaning variable s */
+    }  /* if (capi_h_as_array == NULL) ... else of h */
+    /* End of cleaning variable h */
+    }  /* if (capi_listh_as_array == NULL) ... else of listh */
+    /* End of cleaning variable listh */
+    }  /* if (capi_listhptr_as_array == NULL) ... else of listhptr */
+    /* End of cleaning variable listhptr */
+    }  /* if (capi_numh_as_array == NULL) ... else of numh */
+    /* End of cleaning variable numh */
+    } /*if (f2py_success) of maxnh*/
+    /* End of cleaning variable maxnh */
+    } /*if (f2py_success) of no_s*/
+    /* End of cleaning variable no_s */
+    } /*if (f2py_success) of no_u*/
+    /* End of cleaning variable no_u */
+    } /*if (f2py_success) of nspin*/
+    /* End of cleaning variable nspin */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/******************************* end of read_hs *******************************/
+
+/**************************** read_wfsx_next_sizes ****************************/
+static char doc_f2py_rout__siesta_read_wfsx_next_sizes[] = "\
+nspin,no_u,nk,gamma = read_wfsx_next_sizes(iu,skip_basis)\n\nWrapper for ``read_wfsx_next_sizes``.\
+\n\nParameters\n----------\n"
+"iu : input int\n"
+"skip_basis : input int\n"
+"\nReturns\n-------\n"
+"nspin : int\n"
+"no_u : int\n"
+"nk : int\n"
+"gamma : int";
+/* extern void F_FUNC_US(read_wfsx_next_sizes,READ_WFSX_NEXT_SIZES)(int*,int*,int*,int*,int*,int*); */
+static PyObject *f2py_rout__siesta_read_wfsx_next_sizes(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(int*,int*,int*,int*,int*,int*)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    int iu = 0;
+    PyObject *iu_capi = Py_None;
+    int skip_basis = 0;
+    PyObject *skip_basis_capi = Py_None;
+    int nspin = 0;
+    int no_u = 0;
+    int nk = 0;
+    int gamma = 0;
+    static char *capi_kwlist[] = {"iu","skip_basis",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OO|:_siesta.read_wfsx_next_sizes",\
+        capi_kwlist,&iu_capi,&skip_basis_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable iu */
+        f2py_success = int_from_pyobj(&iu,iu_capi,"_siesta.read_wfsx_next_sizes() 1st argument (iu) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable skip_basis */
+        skip_basis = (int)PyObject_IsTrue(skip_basis_capi);
+        f2py_success = 1;
+    if (f2py_success) {
+    /* Processing variable nspin */
+    /* Processing variable no_u */
+    /* Processing variable nk */
+    /* Processing variable gamma */
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(&iu,&skip_basis,&nspin,&no_u,&nk,&gamma);
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("iiii",nspin,no_u,nk,gamma);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    /* End of cleaning variable gamma */
+    /* End of cleaning variable nk */
+    /* End of cleaning variable no_u */
+    /* End of cleaning variable nspin */
+    } /*if (f2py_success) of skip_basis*/
+    /* End of cleaning variable skip_basis */
+    } /*if (f2py_success) of iu*/
+    /* End of cleaning variable iu */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/************************ end of read_wfsx_next_sizes ************************/
+
+/****************************** read_wfsx_sizes ******************************/
+static char doc_f2py_rout__siesta_read_wfsx_sizes[] = "\
+nspin,no_u,nk,gamma = read_wfsx_sizes(fname)\n\nWrapper for ``read_wfsx_sizes``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"\nReturns\n-------\n"
+"nspin : int\n"
+"no_u : int\n"
+"nk : int\n"
+"gamma : int";
+/* extern void F_FUNC_US(read_wfsx_sizes,READ_WFSX_SIZES)(string,int*,int*,int*,int*,size_t); */
+static PyObject *f2py_rout__siesta_read_wfsx_sizes(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,int*,int*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int nspin = 0;
+    int no_u = 0;
+    int nk = 0;
+    int gamma = 0;
+    static char *capi_kwlist[] = {"fname",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "O|:_siesta.read_wfsx_sizes",\
+        capi_kwlist,&fname_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_wfsx_sizes to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable nspin */
+    /* Processing variable no_u */
+    /* Processing variable nk */
+    /* Processing variable gamma */
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&nspin,&no_u,&nk,&gamma,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("iiii",nspin,no_u,nk,gamma);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    /* End of cleaning variable gamma */
+    /* End of cleaning variable nk */
+    /* End of cleaning variable no_u */
+    /* End of cleaning variable nspin */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/*************************** end of read_wfsx_sizes ***************************/
+
+/**************************** read_wfsx_next_basis ****************************/
+static char doc_f2py_rout__siesta_read_wfsx_next_basis[] = "\
+atom_indices,atom_labels,orb_index_atom,orb_n,orb_simmetry = read_wfsx_next_basis(iu,no_u)\n\nWrapper for ``read_wfsx_next_basis``.\
+\n\nParameters\n----------\n"
+"iu : input int\n"
+"no_u : input int\n"
+"\nReturns\n-------\n"
+"atom_indices : rank-1 array('i') with bounds (no_u)\n"
+"atom_labels : rank-2 array('c') with bounds (no_u,20)\n"
+"orb_index_atom : rank-1 array('i') with bounds (no_u)\n"
+"orb_n : rank-1 array('i') with bounds (no_u)\n"
+"orb_simmetry : rank-2 array('c') with bounds (no_u,20)";
+/* extern void F_FUNC_US(read_wfsx_next_basis,READ_WFSX_NEXT_BASIS)(int*,int*,int*,character*,int*,int*,character*); */
+static PyObject *f2py_rout__siesta_read_wfsx_next_basis(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(int*,int*,int*,character*,int*,int*,character*)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    int iu = 0;
+    PyObject *iu_capi = Py_None;
+    int no_u = 0;
+    PyObject *no_u_capi = Py_None;
+    int *atom_indices = NULL;
+    npy_intp atom_indices_Dims[1] = {-1};
+    const int atom_indices_Rank = 1;
+    PyArrayObject *capi_atom_indices_as_array = NULL;
+    int capi_atom_indices_intent = 0;
+    character *atom_labels = NULL;
+    npy_intp atom_labels_Dims[2] = {-1, -1};
+    const int atom_labels_Rank = 2;
+    PyArrayObject *capi_atom_labels_as_array = NULL;
+    int capi_atom_labels_intent = 0;
+    int *orb_index_atom = NULL;
+    npy_intp orb_index_atom_Dims[1] = {-1};
+    const int orb_index_atom_Rank = 1;
+    PyArrayObject *capi_orb_index_atom_as_array = NULL;
+    int capi_orb_index_atom_intent = 0;
+    int *orb_n = NULL;
+    npy_intp orb_n_Dims[1] = {-1};
+    const int orb_n_Rank = 1;
+    PyArrayObject *capi_orb_n_as_array = NULL;
+    int capi_orb_n_intent = 0;
+    character *orb_simmetry = NULL;
+    npy_intp orb_simmetry_Dims[2] = {-1, -1};
+    const int orb_simmetry_Rank = 2;
+    PyArrayObject *capi_orb_simmetry_as_array = NULL;
+    int capi_orb_simmetry_intent = 0;
+    static char *capi_kwlist[] = {"iu","no_u",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OO|:_siesta.read_wfsx_next_basis",\
+        capi_kwlist,&iu_capi,&no_u_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable iu */
+        f2py_success = int_from_pyobj(&iu,iu_capi,"_siesta.read_wfsx_next_basis() 1st argument (iu) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable no_u */
+        f2py_success = int_from_pyobj(&no_u,no_u_capi,"_siesta.read_wfsx_next_basis() 2nd argument (no_u) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable atom_indices */
+    atom_indices_Dims[0]=no_u;
+    capi_atom_indices_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_wfsx_next_basis: failed to create array from the hidden `atom_indices`";
+    capi_atom_indices_as_array = ndarray_from_pyobj(  NPY_INT,1,atom_indices_Dims,atom_indices_Rank,  capi_atom_indices_intent,Py_None,capi_errmess);
+    if (capi_atom_indices_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        atom_indices = (int *)(PyArray_DATA(capi_atom_indices_as_array));
+
+    /* Processing variable atom_labels */
+    atom_labels_Dims[0]=no_u,atom_labels_Dims[1]=20;
+    capi_atom_labels_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_wfsx_next_basis: failed to create array from the hidden `atom_labels`";
+    capi_atom_labels_as_array = ndarray_from_pyobj(  NPY_STRING,1,atom_labels_Dims,atom_labels_Rank,  capi_atom_labels_intent,Py_None,capi_errmess);
+    if (capi_atom_labels_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        atom_labels = (character *)(PyArray_DATA(capi_atom_labels_as_array));
+
+    /* Processing variable orb_index_atom */
+    orb_index_atom_Dims[0]=no_u;
+    capi_orb_index_atom_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_wfsx_next_basis: failed to create array from the hidden `orb_index_atom`";
+    capi_orb_index_atom_as_array = ndarray_from_pyobj(  NPY_INT,1,orb_index_atom_Dims,orb_index_atom_Rank,  capi_orb_index_atom_intent,Py_None,capi_errmess);
+    if (capi_orb_index_atom_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        orb_index_atom = (int *)(PyArray_DATA(capi_orb_index_atom_as_array));
+
+    /* Processing variable orb_n */
+    orb_n_Dims[0]=no_u;
+    capi_orb_n_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_wfsx_next_basis: failed to create array from the hidden `orb_n`";
+    capi_orb_n_as_array = ndarray_from_pyobj(  NPY_INT,1,orb_n_Dims,orb_n_Rank,  capi_orb_n_intent,Py_None,capi_errmess);
+    if (capi_orb_n_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        orb_n = (int *)(PyArray_DATA(capi_orb_n_as_array));
+
+    /* Processing variable orb_simmetry */
+    orb_simmetry_Dims[0]=no_u,orb_simmetry_Dims[1]=20;
+    capi_orb_simmetry_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_wfsx_next_basis: failed to create array from the hidden `orb_simmetry`";
+    capi_orb_simmetry_as_array = ndarray_from_pyobj(  NPY_STRING,1,orb_simmetry_Dims,orb_simmetry_Rank,  capi_orb_simmetry_intent,Py_None,capi_errmess);
+    if (capi_orb_simmetry_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        orb_simmetry = (character *)(PyArray_DATA(capi_orb_simmetry_as_array));
+
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(&iu,&no_u,atom_indices,atom_labels,orb_index_atom,orb_n,orb_simmetry);
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("NNNNN",capi_atom_indices_as_array,capi_atom_labels_as_array,capi_orb_index_atom_as_array,capi_orb_n_as_array,capi_orb_simmetry_as_array);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    }  /* if (capi_orb_simmetry_as_array == NULL) ... else of orb_simmetry */
+    /* End of cleaning variable orb_simmetry */
+    }  /* if (capi_orb_n_as_array == NULL) ... else of orb_n */
+    /* End of cleaning variable orb_n */
+    }  /* if (capi_orb_index_atom_as_array == NULL) ... else of orb_index_atom */
+    /* End of cleaning variable orb_index_atom */
+    }  /* if (capi_atom_labels_as_array == NULL) ... else of atom_labels */
+    /* End of cleaning variable atom_labels */
+    }  /* if (capi_atom_indices_as_array == NULL) ... else of atom_indices */
+    /* End of cleaning variable atom_indices */
+    } /*if (f2py_success) of no_u*/
+    /* End of cleaning variable no_u */
+    } /*if (f2py_success) of iu*/
+    /* End of cleaning variable iu */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/************************ end of read_wfsx_next_basis ************************/
+
+/**************************** read_wfsx_next_info ****************************/
+static char doc_f2py_rout__siesta_read_wfsx_next_info[] = "\
+ispin,ik,k,kw,nwf = read_wfsx_next_info(iu)\n\nWrapper for ``read_wfsx_next_info``.\
+\n\nParameters\n----------\n"
+"iu : input int\n"
+"\nReturns\n-------\n"
+"ispin : int\n"
+"ik : int\n"
+"k : rank-1 array('d') with bounds (3)\n"
+"kw : float\n"
+"nwf : int";
+/* extern void F_FUNC_US(read_wfsx_next_info,READ_WFSX_NEXT_INFO)(int*,int*,int*,double*,double*,int*); */
+static PyObject *f2py_rout__siesta_read_wfsx_next_info(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(int*,int*,int*,double*,double*,int*)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    int iu = 0;
+    PyObject *iu_capi = Py_None;
+    int ispin = 0;
+    int ik = 0;
+    double *k = NULL;
+    npy_intp k_Dims[1] = {-1};
+    const int k_Rank = 1;
+    PyArrayObject *capi_k_as_array = NULL;
+    int capi_k_intent = 0;
+    double kw = 0;
+    int nwf = 0;
+    static char *capi_kwlist[] = {"iu",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "O|:_siesta.read_wfsx_next_info",\
+        capi_kwlist,&iu_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable iu */
+        f2py_success = int_from_pyobj(&iu,iu_capi,"_siesta.read_wfsx_next_info() 1st argument (iu) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable ispin */
+    /* Processing variable ik */
+    /* Processing variable k */
+    k_Dims[0]=3;
+    capi_k_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_wfsx_next_info: failed to create array from the hidden `k`";
+    capi_k_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,k_Dims,k_Rank,  capi_k_intent,Py_None,capi_errmess);
+    if (capi_k_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        k = (double *)(PyArray_DATA(capi_k_as_array));
+
+    /* Processing variable kw */
+    /* Processing variable nwf */
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(&iu,&ispin,&ik,k,&kw,&nwf);
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("iiNdi",ispin,ik,capi_k_as_array,kw,nwf);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    /* End of cleaning variable nwf */
+    /* End of cleaning variable kw */
+    }  /* if (capi_k_as_array == NULL) ... else of k */
+    /* End of cleaning variable k */
+    /* End of cleaning variable ik */
+    /* End of cleaning variable ispin */
+    } /*if (f2py_success) of iu*/
+    /* End of cleaning variable iu */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/************************* end of read_wfsx_next_info *************************/
+
+/**************************** read_wfsx_index_info ****************************/
+static char doc_f2py_rout__siesta_read_wfsx_index_info[] = "\
+k,kw,nwf = read_wfsx_index_info(fname,ispin,ik)\n\nWrapper for ``read_wfsx_index_info``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"ispin : input int\n"
+"ik : input int\n"
+"\nReturns\n-------\n"
+"k : rank-1 array('d') with bounds (3)\n"
+"kw : float\n"
+"nwf : int";
+/* extern void F_FUNC_US(read_wfsx_index_info,READ_WFSX_INDEX_INFO)(string,int*,int*,double*,double*,int*,size_t); */
+static PyObject *f2py_rout__siesta_read_wfsx_index_info(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,double*,double*,int*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int ispin = 0;
+    PyObject *ispin_capi = Py_None;
+    int ik = 0;
+    PyObject *ik_capi = Py_None;
+    double *k = NULL;
+    npy_intp k_Dims[1] = {-1};
+    const int k_Rank = 1;
+    PyArrayObject *capi_k_as_array = NULL;
+    int capi_k_intent = 0;
+    double kw = 0;
+    int nwf = 0;
+    static char *capi_kwlist[] = {"fname","ispin","ik",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOO|:_siesta.read_wfsx_index_info",\
+        capi_kwlist,&fname_capi,&ispin_capi,&ik_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_wfsx_index_info to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable ispin */
+        f2py_success = int_from_pyobj(&ispin,ispin_capi,"_siesta.read_wfsx_index_info() 2nd argument (ispin) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable ik */
+        f2py_success = int_from_pyobj(&ik,ik_capi,"_siesta.read_wfsx_index_info() 3rd argument (ik) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable k */
+    k_Dims[0]=3;
+    capi_k_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_wfsx_index_info: failed to create array from the hidden `k`";
+    capi_k_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,k_Dims,k_Rank,  capi_k_intent,Py_None,capi_errmess);
+    if (capi_k_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        k = (double *)(PyArray_DATA(capi_k_as_array));
+
+    /* Processing variable kw */
+    /* Processing variable nwf */
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&ispin,&ik,k,&kw,&nwf,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("Ndi",capi_k_as_array,kw,nwf);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    /* End of cleaning variable nwf */
+    /* End of cleaning variable kw */
+    }  /* if (capi_k_as_array == NULL) ... else of k */
+    /* End of cleaning variable k */
+    } /*if (f2py_success) of ik*/
+    /* End of cleaning variable ik */
+    } /*if (f2py_success) of ispin*/
+    /* End of cleaning variable ispin */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/************************ end of read_wfsx_index_info ************************/
+
+/************************* read_wfsx_next_index_check *************************/
+static char doc_f2py_rout__siesta_read_wfsx_next_index_check[] = "\
+read_wfsx_next_index_check(iu,ispin,ik,nwf,fail)\n\nWrapper for ``read_wfsx_next_index_check``.\
+\n\nParameters\n----------\n"
+"iu : input int\n"
+"ispin : input int\n"
+"ik : input int\n"
+"nwf : input int\n"
+"fail : in/output rank-0 array(int,'i')";
+/* extern void F_FUNC_US(read_wfsx_next_index_check,READ_WFSX_NEXT_INDEX_CHECK)(int*,int*,int*,int*,int*); */
+static PyObject *f2py_rout__siesta_read_wfsx_next_index_check(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(int*,int*,int*,int*,int*)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    int iu = 0;
+    PyObject *iu_capi = Py_None;
+    int ispin = 0;
+    PyObject *ispin_capi = Py_None;
+    int ik = 0;
+    PyObject *ik_capi = Py_None;
+    int nwf = 0;
+    PyObject *nwf_capi = Py_None;
+    int fail = 0;
+    PyObject *fail_capi = Py_None;
+    static char *capi_kwlist[] = {"iu","ispin","ik","nwf","fail",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOOOO|:_siesta.read_wfsx_next_index_check",\
+        capi_kwlist,&iu_capi,&ispin_capi,&ik_capi,&nwf_capi,&fail_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable iu */
+        f2py_success = int_from_pyobj(&iu,iu_capi,"_siesta.read_wfsx_next_index_check() 1st argument (iu) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable ispin */
+        f2py_success = int_from_pyobj(&ispin,ispin_capi,"_siesta.read_wfsx_next_index_check() 2nd argument (ispin) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable ik */
+        f2py_success = int_from_pyobj(&ik,ik_capi,"_siesta.read_wfsx_next_index_check() 3rd argument (ik) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable nwf */
+        f2py_success = int_from_pyobj(&nwf,nwf_capi,"_siesta.read_wfsx_next_index_check() 4th argument (nwf) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable fail */
+        f2py_success = int_from_pyobj(&fail,fail_capi,"_siesta.read_wfsx_next_index_check() 5th argument (fail) can't be converted to int");
+    if (f2py_success) {
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(&iu,&ispin,&ik,&nwf,&fail);
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+    f2py_success = try_pyarr_from_int(fail_capi,&fail);
+    if (f2py_success) {
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("");
+/*closepyobjfrom*/
+    } /*if (f2py_success) of fail pyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    } /*if (f2py_success) of fail*/
+    /* End of cleaning variable fail */
+    } /*if (f2py_success) of nwf*/
+    /* End of cleaning variable nwf */
+    } /*if (f2py_success) of ik*/
+    /* End of cleaning variable ik */
+    } /*if (f2py_success) of ispin*/
+    /* End of cleaning variable ispin */
+    } /*if (f2py_success) of iu*/
+    /* End of cleaning variable iu */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/********************* end of read_wfsx_next_index_check *********************/
+
+/************************* skip_wfsx_next_eigenstate *************************/
+static char doc_f2py_rout__siesta_skip_wfsx_next_eigenstate[] = "\
+skip_wfsx_next_eigenstate(iu)\n\nWrapper for ``skip_wfsx_next_eigenstate``.\
+\n\nParameters\n----------\n"
+"iu : input int";
+/* extern void F_FUNC_US(skip_wfsx_next_eigenstate,SKIP_WFSX_NEXT_EIGENSTATE)(int*); */
+static PyObject *f2py_rout__siesta_skip_wfsx_next_eigenstate(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(int*)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    int iu = 0;
+    PyObject *iu_capi = Py_None;
+    static char *capi_kwlist[] = {"iu",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "O|:_siesta.skip_wfsx_next_eigenstate",\
+        capi_kwlist,&iu_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable iu */
+        f2py_success = int_from_pyobj(&iu,iu_capi,"_siesta.skip_wfsx_next_eigenstate() 1st argument (iu) can't be converted to int");
+    if (f2py_success) {
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(&iu);
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("");
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    } /*if (f2py_success) of iu*/
+    /* End of cleaning variable iu */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/********************** end of skip_wfsx_next_eigenstate **********************/
+
+/**************************** skip_wfsx_next_vals ****************************/
+static char doc_f2py_rout__siesta_skip_wfsx_next_vals[] = "\
+skip_wfsx_next_vals(iu,nwf)\n\nWrapper for ``skip_wfsx_next_vals``.\
+\n\nParameters\n----------\n"
+"iu : input int\n"
+"nwf : input int";
+/* extern void F_FUNC_US(skip_wfsx_next_vals,SKIP_WFSX_NEXT_VALS)(int*,int*); */
+static PyObject *f2py_rout__siesta_skip_wfsx_next_vals(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(int*,int*)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    int iu = 0;
+    PyObject *iu_capi = Py_None;
+    int nwf = 0;
+    PyObject *nwf_capi = Py_None;
+    static char *capi_kwlist[] = {"iu","nwf",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OO|:_siesta.skip_wfsx_next_vals",\
+        capi_kwlist,&iu_capi,&nwf_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable iu */
+        f2py_success = int_from_pyobj(&iu,iu_capi,"_siesta.skip_wfsx_next_vals() 1st argument (iu) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable nwf */
+        f2py_success = int_from_pyobj(&nwf,nwf_capi,"_siesta.skip_wfsx_next_vals() 2nd argument (nwf) can't be converted to int");
+    if (f2py_success) {
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(&iu,&nwf);
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("");
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    } /*if (f2py_success) of nwf*/
+    /* End of cleaning variable nwf */
+    } /*if (f2py_success) of iu*/
+    /* End of cleaning variable iu */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/************************* end of skip_wfsx_next_vals *************************/
+
+/****************************** skip_wfsx_index ******************************/
+static char doc_f2py_rout__siesta_skip_wfsx_index[] = "\
+skip_wfsx_index(iu,ispin,ik)\n\nWrapper for ``skip_wfsx_index``.\
+\n\nParameters\n----------\n"
+"iu : input int\n"
+"ispin : input int\n"
+"ik : input int";
+/* extern void F_FUNC_US(skip_wfsx_index,SKIP_WFSX_INDEX)(int*,int*,int*); */
+static PyObject *f2py_rout__siesta_skip_wfsx_index(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(int*,int*,int*)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    int iu = 0;
+    PyObject *iu_capi = Py_None;
+    int ispin = 0;
+    PyObject *ispin_capi = Py_None;
+    int ik = 0;
+    PyObject *ik_capi = Py_None;
+    static char *capi_kwlist[] = {"iu","ispin","ik",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOO|:_siesta.skip_wfsx_index",\
+        capi_kwlist,&iu_capi,&ispin_capi,&ik_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable iu */
+        f2py_success = int_from_pyobj(&iu,iu_capi,"_siesta.skip_wfsx_index() 1st argument (iu) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable ispin */
+        f2py_success = int_from_pyobj(&ispin,ispin_capi,"_siesta.skip_wfsx_index() 2nd argument (ispin) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable ik */
+        f2py_success = int_from_pyobj(&ik,ik_capi,"_siesta.skip_wfsx_index() 3rd argument (ik) can't be converted to int");
+    if (f2py_success) {
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(&iu,&ispin,&ik);
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("");
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    } /*if (f2py_success) of ik*/
+    /* End of cleaning variable ik */
+    } /*if (f2py_success) of ispin*/
+    /* End of cleaning variable ispin */
+    } /*if (f2py_success) of iu*/
+    /* End of cleaning variable iu */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/*************************** end of skip_wfsx_index ***************************/
+
+/****************************** read_wfsx_next_1 ******************************/
+static char doc_f2py_rout__siesta_read_wfsx_next_1[] = "\
+idx,eig,state = read_wfsx_next_1(iu,no_u,nwf)\n\nWrapper for ``read_wfsx_next_1``.\
+\n\nParameters\n----------\n"
+"iu : input int\n"
+"no_u : input int\n"
+"nwf : input int\n"
+"\nReturns\n-------\n"
+"idx : rank-1 array('i') with bounds (nwf)\n"
+"eig : rank-1 array('d') with bounds (nwf)\n"
+"state : rank-2 array('f') with bounds (no_u,nwf)";
+/* extern void F_FUNC_US(read_wfsx_next_1,READ_WFSX_NEXT_1)(int*,int*,int*,int*,double*,float*); */
+static PyObject *f2py_rout__siesta_read_wfsx_next_1(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(int*,int*,int*,int*,double*,float*)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    int iu = 0;
+    PyObject *iu_capi = Py_None;
+    int no_u = 0;
+    PyObject *no_u_capi = Py_None;
+    int nwf = 0;
+    PyObject *nwf_capi = Py_None;
+    int *idx = NULL;
+    npy_intp idx_Dims[1] = {-1};
+    const int idx_Rank = 1;
+    PyArrayObject *capi_idx_as_array = NULL;
+    int capi_idx_intent = 0;
+    double *eig = NULL;
+    npy_intp eig_Dims[1] = {-1};
+    const int eig_Rank = 1;
+    PyArrayObject *capi_eig_as_array = NULL;
+    int capi_eig_intent = 0;
+    float *state = NULL;
+    npy_intp state_Dims[2] = {-1, -1};
+    const int state_Rank = 2;
+    PyArrayObject *capi_state_as_array = NULL;
+    int capi_state_intent = 0;
+    static char *capi_kwlist[] = {"iu","no_u","nwf",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOO|:_siesta.read_wfsx_next_1",\
+        capi_kwlist,&iu_capi,&no_u_capi,&nwf_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable iu */
+        f2py_success = int_from_pyobj(&iu,iu_capi,"_siesta.read_wfsx_next_1() 1st argument (iu) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable no_u */
+        f2py_success = int_from_pyobj(&no_u,no_u_capi,"_siesta.read_wfsx_next_1() 2nd argument (no_u) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable nwf */
+        f2py_success = int_from_pyobj(&nwf,nwf_capi,"_siesta.read_wfsx_next_1() 3rd argument (nwf) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable idx */
+    idx_Dims[0]=nwf;
+    capi_idx_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_wfsx_next_1: failed to create array from the hidden `idx`";
+    capi_idx_as_array = ndarray_from_pyobj(  NPY_INT,1,idx_Dims,idx_Rank,  capi_idx_intent,Py_None,capi_errmess);
+    if (capi_idx_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        idx = (int *)(PyArray_DATA(capi_idx_as_array));
+
+    /* Processing variable eig */
+    eig_Dims[0]=nwf;
+    capi_eig_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_wfsx_next_1: failed to create array from the hidden `eig`";
+    capi_eig_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,eig_Dims,eig_Rank,  capi_eig_intent,Py_None,capi_errmess);
+    if (capi_eig_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        eig = (double *)(PyArray_DATA(capi_eig_as_array));
+
+    /* Processing variable state */
+    state_Dims[0]=no_u,state_Dims[1]=nwf;
+    capi_state_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_wfsx_next_1: failed to create array from the hidden `state`";
+    capi_state_as_array = ndarray_from_pyobj(  NPY_FLOAT,1,state_Dims,state_Rank,  capi_state_intent,Py_None,capi_errmess);
+    if (capi_state_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        state = (float *)(PyArray_DATA(capi_state_as_array));
+
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(&iu,&no_u,&nwf,idx,eig,state);
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("NNN",capi_idx_as_array,capi_eig_as_array,capi_state_as_array);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    }  /* if (capi_state_as_array == NULL) ... else of state */
+    /* End of cleaning variable state */
+    }  /* if (capi_eig_as_array == NULL) ... else of eig */
+    /* End of cleaning variable eig */
+    }  /* if (capi_idx_as_array == NULL) ... else of idx */
+    /* End of cleaning variable idx */
+    } /*if (f2py_success) of nwf*/
+    /* End of cleaning variable nwf */
+    } /*if (f2py_success) of no_u*/
+    /* End of cleaning variable no_u */
+    } /*if (f2py_success) of iu*/
+    /* End of cleaning variable iu */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/************************** end of read_wfsx_next_1 **************************/
+
+/****************************** read_wfsx_next_2 ******************************/
+static char doc_f2py_rout__siesta_read_wfsx_next_2[] = "\
+idx,eig,state = read_wfsx_next_2(iu,no_u,nwf)\n\nWrapper for ``read_wfsx_next_2``.\
+\n\nParameters\n----------\n"
+"iu : input int\n"
+"no_u : input int\n"
+"nwf : input int\n"
+"\nReturns\n-------\n"
+"idx : rank-1 array('i') with bounds (nwf)\n"
+"eig : rank-1 array('d') with bounds (nwf)\n"
+"state : rank-2 array('F') with bounds (no_u,nwf)";
+/* extern void F_FUNC_US(read_wfsx_next_2,READ_WFSX_NEXT_2)(int*,int*,int*,int*,double*,complex_float*); */
+static PyObject *f2py_rout__siesta_read_wfsx_next_2(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(int*,int*,int*,int*,double*,complex_float*)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    int iu = 0;
+    PyObject *iu_capi = Py_None;
+    int no_u = 0;
+    PyObject *no_u_capi = Py_None;
+    int nwf = 0;
+    PyObject *nwf_capi = Py_None;
+    int *idx = NULL;
+    npy_intp idx_Dims[1] = {-1};
+    const int idx_Rank = 1;
+    PyArrayObject *capi_idx_as_array = NULL;
+    int capi_idx_intent = 0;
+    double *eig = NULL;
+    npy_intp eig_Dims[1] = {-1};
+    const int eig_Rank = 1;
+    PyArrayObject *capi_eig_as_array = NULL;
+    int capi_eig_intent = 0;
+    complex_float *state = NULL;
+    npy_intp state_Dims[2] = {-1, -1};
+    const int state_Rank = 2;
+    PyArrayObject *capi_state_as_array = NULL;
+    int capi_state_intent = 0;
+    static char *capi_kwlist[] = {"iu","no_u","nwf",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOO|:_siesta.read_wfsx_next_2",\
+        capi_kwlist,&iu_capi,&no_u_capi,&nwf_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable iu */
+        f2py_success = int_from_pyobj(&iu,iu_capi,"_siesta.read_wfsx_next_2() 1st argument (iu) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable no_u */
+        f2py_success = int_from_pyobj(&no_u,no_u_capi,"_siesta.read_wfsx_next_2() 2nd argument (no_u) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable nwf */
+        f2py_success = int_from_pyobj(&nwf,nwf_capi,"_siesta.read_wfsx_next_2() 3rd argument (nwf) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable idx */
+    idx_Dims[0]=nwf;
+    capi_idx_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_wfsx_next_2: failed to create array from the hidden `idx`";
+    capi_idx_as_array = ndarray_from_pyobj(  NPY_INT,1,idx_Dims,idx_Rank,  capi_idx_intent,Py_None,capi_errmess);
+    if (capi_idx_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        idx = (int *)(PyArray_DATA(capi_idx_as_array));
+
+    /* Processing variable eig */
+    eig_Dims[0]=nwf;
+    capi_eig_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_wfsx_next_2: failed to create array from the hidden `eig`";
+    capi_eig_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,eig_Dims,eig_Rank,  capi_eig_intent,Py_None,capi_errmess);
+    if (capi_eig_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        eig = (double *)(PyArray_DATA(capi_eig_as_array));
+
+    /* Processing variable state */
+    state_Dims[0]=no_u,state_Dims[1]=nwf;
+    capi_state_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_wfsx_next_2: failed to create array from the hidden `state`";
+    capi_state_as_array = ndarray_from_pyobj(  NPY_CFLOAT,1,state_Dims,state_Rank,  capi_state_intent,Py_None,capi_errmess);
+    if (capi_state_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        state = (complex_float *)(PyArray_DATA(capi_state_as_array));
+
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(&iu,&no_u,&nwf,idx,eig,state);
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("NNN",capi_idx_as_array,capi_eig_as_array,capi_state_as_array);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    }  /* if (capi_state_as_array == NULL) ... else of state */
+    /* End of cleaning variable state */
+    }  /* if (capi_eig_as_array == NULL) ... else of eig */
+    /* End of cleaning variable eig */
+    }  /* if (capi_idx_as_array == NULL) ... else of idx */
+    /* End of cleaning variable idx */
+    } /*if (f2py_success) of nwf*/
+    /* End of cleaning variable nwf */
+    } /*if (f2py_success) of no_u*/
+    /* End of cleaning variable no_u */
+    } /*if (f2py_success) of iu*/
+    /* End of cleaning variable iu */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/************************** end of read_wfsx_next_2 **************************/
+
+/****************************** read_wfsx_next_4 ******************************/
+static char doc_f2py_rout__siesta_read_wfsx_next_4[] = "\
+idx,eig,state = read_wfsx_next_4(iu,no_u,nwf)\n\nWrapper for ``read_wfsx_next_4``.\
+\n\nParameters\n----------\n"
+"iu : input int\n"
+"no_u : input int\n"
+"nwf : input int\n"
+"\nReturns\n-------\n"
+"idx : rank-1 array('i') with bounds (nwf)\n"
+"eig : rank-1 array('d') with bounds (nwf)\n"
+"state : rank-2 array('F') with bounds (2 * no_u,nwf)";
+/* extern void F_FUNC_US(read_wfsx_next_4,READ_WFSX_NEXT_4)(int*,int*,int*,int*,double*,complex_float*); */
+static PyObject *f2py_rout__siesta_read_wfsx_next_4(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(int*,int*,int*,int*,double*,complex_float*)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    int iu = 0;
+    PyObject *iu_capi = Py_None;
+    int no_u = 0;
+    PyObject *no_u_capi = Py_None;
+    int nwf = 0;
+    PyObject *nwf_capi = Py_None;
+    int *idx = NULL;
+    npy_intp idx_Dims[1] = {-1};
+    const int idx_Rank = 1;
+    PyArrayObject *capi_idx_as_array = NULL;
+    int capi_idx_intent = 0;
+    double *eig = NULL;
+    npy_intp eig_Dims[1] = {-1};
+    const int eig_Rank = 1;
+    PyArrayObject *capi_eig_as_array = NULL;
+    int capi_eig_intent = 0;
+    complex_float *state = NULL;
+    npy_intp state_Dims[2] = {-1, -1};
+    const int state_Rank = 2;
+    PyArrayObject *capi_state_as_array = NULL;
+    int capi_state_intent = 0;
+    static char *capi_kwlist[] = {"iu","no_u","nwf",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOO|:_siesta.read_wfsx_next_4",\
+        capi_kwlist,&iu_capi,&no_u_capi,&nwf_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable iu */
+        f2py_success = int_from_pyobj(&iu,iu_capi,"_siesta.read_wfsx_next_4() 1st argument (iu) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable no_u */
+        f2py_success = int_from_pyobj(&no_u,no_u_capi,"_siesta.read_wfsx_next_4() 2nd argument (no_u) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable nwf */
+        f2py_success = int_from_pyobj(&nwf,nwf_capi,"_siesta.read_wfsx_next_4() 3rd argument (nwf) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable idx */
+    idx_Dims[0]=nwf;
+    capi_idx_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_wfsx_next_4: failed to create array from the hidden `idx`";
+    capi_idx_as_array = ndarray_from_pyobj(  NPY_INT,1,idx_Dims,idx_Rank,  capi_idx_intent,Py_None,capi_errmess);
+    if (capi_idx_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        idx = (int *)(PyArray_DATA(capi_idx_as_array));
+
+    /* Processing variable eig */
+    eig_Dims[0]=nwf;
+    capi_eig_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_wfsx_next_4: failed to create array from the hidden `eig`";
+    capi_eig_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,eig_Dims,eig_Rank,  capi_eig_intent,Py_None,capi_errmess);
+    if (capi_eig_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        eig = (double *)(PyArray_DATA(capi_eig_as_array));
+
+    /* Processing variable state */
+    state_Dims[0]=2 * no_u,state_Dims[1]=nwf;
+    capi_state_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_wfsx_next_4: failed to create array from the hidden `state`";
+    capi_state_as_array = ndarray_from_pyobj(  NPY_CFLOAT,1,state_Dims,state_Rank,  capi_state_intent,Py_None,capi_errmess);
+    if (capi_state_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        state = (complex_float *)(PyArray_DATA(capi_state_as_array));
+
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(&iu,&no_u,&nwf,idx,eig,state);
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("NNN",capi_idx_as_array,capi_eig_as_array,capi_state_as_array);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    }  /* if (capi_state_as_array == NULL) ... else of state */
+    /* End of cleaning variable state */
+    }  /* if (capi_eig_as_array == NULL) ... else of eig */
+    /* End of cleaning variable eig */
+    }  /* if (capi_idx_as_array == NULL) ... else of idx */
+    /* End of cleaning variable idx */
+    } /*if (f2py_success) of nwf*/
+    /* End of cleaning variable nwf */
+    } /*if (f2py_success) of no_u*/
+    /* End of cleaning variable no_u */
+    } /*if (f2py_success) of iu*/
+    /* End of cleaning variable iu */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/************************** end of read_wfsx_next_4 **************************/
+
+/***************************** read_wfsx_index_1 *****************************/
+static char doc_f2py_rout__siesta_read_wfsx_index_1[] = "\
+idx,eig,state = read_wfsx_index_1(fname,ispin,ik,no_u,nwf)\n\nWrapper for ``read_wfsx_index_1``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"ispin : input int\n"
+"ik : input int\n"
+"no_u : input int\n"
+"nwf : input int\n"
+"\nReturns\n-------\n"
+"idx : rank-1 array('i') with bounds (nwf)\n"
+"eig : rank-1 array('d') with bounds (nwf)\n"
+"state : rank-2 array('f') with bounds (no_u,nwf)";
+/* extern void F_FUNC_US(read_wfsx_index_1,READ_WFSX_INDEX_1)(string,int*,int*,int*,int*,int*,double*,float*,size_t); */
+static PyObject *f2py_rout__siesta_read_wfsx_index_1(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,int*,int*,int*,double*,float*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int ispin = 0;
+    PyObject *ispin_capi = Py_None;
+    int ik = 0;
+    PyObject *ik_capi = Py_None;
+    int no_u = 0;
+    PyObject *no_u_capi = Py_None;
+    int nwf = 0;
+    PyObject *nwf_capi = Py_None;
+    int *idx = NULL;
+    npy_intp idx_Dims[1] = {-1};
+    const int idx_Rank = 1;
+    PyArrayObject *capi_idx_as_array = NULL;
+    int capi_idx_intent = 0;
+    double *eig = NULL;
+    npy_intp eig_Dims[1] = {-1};
+    const int eig_Rank = 1;
+    PyArrayObject *capi_eig_as_array = NULL;
+    int capi_eig_intent = 0;
+    float *state = NULL;
+    npy_intp state_Dims[2] = {-1, -1};
+    const int state_Rank = 2;
+    PyArrayObject *capi_state_as_array = NULL;
+    int capi_state_intent = 0;
+    static char *capi_kwlist[] = {"fname","ispin","ik","no_u","nwf",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOOOO|:_siesta.read_wfsx_index_1",\
+        capi_kwlist,&fname_capi,&ispin_capi,&ik_capi,&no_u_capi,&nwf_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_wfsx_index_1 to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable ispin */
+        f2py_success = int_from_pyobj(&ispin,ispin_capi,"_siesta.read_wfsx_index_1() 2nd argument (ispin) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable ik */
+        f2py_success = int_from_pyobj(&ik,ik_capi,"_siesta.read_wfsx_index_1() 3rd argument (ik) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable no_u */
+        f2py_success = int_from_pyobj(&no_u,no_u_capi,"_siesta.read_wfsx_index_1() 4th argument (no_u) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable nwf */
+        f2py_success = int_from_pyobj(&nwf,nwf_capi,"_siesta.read_wfsx_index_1() 5th argument (nwf) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable idx */
+    idx_Dims[0]=nwf;
+    capi_idx_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_wfsx_index_1: failed to create array from the hidden `idx`";
+    capi_idx_as_array = ndarray_from_pyobj(  NPY_INT,1,idx_Dims,idx_Rank,  capi_idx_intent,Py_None,capi_errmess);
+    if (capi_idx_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        idx = (int *)(PyArray_DATA(capi_idx_as_array));
+
+    /* Processing variable eig */
+    eig_Dims[0]=nwf;
+    capi_eig_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_wfsx_index_1: failed to create array from the hidden `eig`";
+    capi_eig_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,eig_Dims,eig_Rank,  capi_eig_intent,Py_None,capi_errmess);
+    if (capi_eig_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        eig = (double *)(PyArray_DATA(capi_eig_as_array));
+
+    /* Processing variable state */
+    state_Dims[0]=no_u,state_Dims[1]=nwf;
+    capi_state_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_wfsx_index_1: failed to create array from the hidden `state`";
+    capi_state_as_array = ndarray_from_pyobj(  NPY_FLOAT,1,state_Dims,state_Rank,  capi_state_intent,Py_None,capi_errmess);
+    if (capi_state_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        state = (float *)(PyArray_DATA(capi_state_as_array));
+
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&ispin,&ik,&no_u,&nwf,idx,eig,state,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("NNN",capi_idx_as_array,capi_eig_as_array,capi_state_as_array);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    }  /* if (capi_state_as_array == NULL) ... else of state */
+    /* End of cleaning variable state */
+    }  /* if (capi_eig_as_array == NULL) ... else of eig */
+    /* End of cleaning variable eig */
+    }  /* if (capi_idx_as_array == NULL) ... else of idx */
+    /* End of cleaning variable idx */
+    } /*if (f2py_success) of nwf*/
+    /* End of cleaning variable nwf */
+    } /*if (f2py_success) of no_u*/
+    /* End of cleaning variable no_u */
+    } /*if (f2py_success) of ik*/
+    /* End of cleaning variable ik */
+    } /*if (f2py_success) of ispin*/
+    /* End of cleaning variable ispin */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/************************** end of read_wfsx_index_1 **************************/
+
+/***************************** read_wfsx_index_2 *****************************/
+static char doc_f2py_rout__siesta_read_wfsx_index_2[] = "\
+idx,eig,state = read_wfsx_index_2(fname,ispin,ik,no_u,nwf)\n\nWrapper for ``read_wfsx_index_2``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"ispin : input int\n"
+"ik : input int\n"
+"no_u : input int\n"
+"nwf : input int\n"
+"\nReturns\n-------\n"
+"idx : rank-1 array('i') with bounds (nwf)\n"
+"eig : rank-1 array('d') with bounds (nwf)\n"
+"state : rank-2 array('F') with bounds (no_u,nwf)";
+/* extern void F_FUNC_US(read_wfsx_index_2,READ_WFSX_INDEX_2)(string,int*,int*,int*,int*,int*,double*,complex_float*,size_t); */
+static PyObject *f2py_rout__siesta_read_wfsx_index_2(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,int*,int*,int*,double*,complex_float*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int ispin = 0;
+    PyObject *ispin_capi = Py_None;
+    int ik = 0;
+    PyObject *ik_capi = Py_None;
+    int no_u = 0;
+    PyObject *no_u_capi = Py_None;
+    int nwf = 0;
+    PyObject *nwf_capi = Py_None;
+    int *idx = NULL;
+    npy_intp idx_Dims[1] = {-1};
+    const int idx_Rank = 1;
+    PyArrayObject *capi_idx_as_array = NULL;
+    int capi_idx_intent = 0;
+    double *eig = NULL;
+    npy_intp eig_Dims[1] = {-1};
+    const int eig_Rank = 1;
+    PyArrayObject *capi_eig_as_array = NULL;
+    int capi_eig_intent = 0;
+    complex_float *state = NULL;
+    npy_intp state_Dims[2] = {-1, -1};
+    const int state_Rank = 2;
+    PyArrayObject *capi_state_as_array = NULL;
+    int capi_state_intent = 0;
+    static char *capi_kwlist[] = {"fname","ispin","ik","no_u","nwf",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOOOO|:_siesta.read_wfsx_index_2",\
+        capi_kwlist,&fname_capi,&ispin_capi,&ik_capi,&no_u_capi,&nwf_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_wfsx_index_2 to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable ispin */
+        f2py_success = int_from_pyobj(&ispin,ispin_capi,"_siesta.read_wfsx_index_2() 2nd argument (ispin) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable ik */
+        f2py_success = int_from_pyobj(&ik,ik_capi,"_siesta.read_wfsx_index_2() 3rd argument (ik) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable no_u */
+        f2py_success = int_from_pyobj(&no_u,no_u_capi,"_siesta.read_wfsx_index_2() 4th argument (no_u) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable nwf */
+        f2py_success = int_from_pyobj(&nwf,nwf_capi,"_siesta.read_wfsx_index_2() 5th argument (nwf) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable idx */
+    idx_Dims[0]=nwf;
+    capi_idx_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_wfsx_index_2: failed to create array from the hidden `idx`";
+    capi_idx_as_array = ndarray_from_pyobj(  NPY_INT,1,idx_Dims,idx_Rank,  capi_idx_intent,Py_None,capi_errmess);
+    if (capi_idx_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        idx = (int *)(PyArray_DATA(capi_idx_as_array));
+
+    /* Processing variable eig */
+    eig_Dims[0]=nwf;
+    capi_eig_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_wfsx_index_2: failed to create array from the hidden `eig`";
+    capi_eig_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,eig_Dims,eig_Rank,  capi_eig_intent,Py_None,capi_errmess);
+    if (capi_eig_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        eig = (double *)(PyArray_DATA(capi_eig_as_array));
+
+    /* Processing variable state */
+    state_Dims[0]=no_u,state_Dims[1]=nwf;
+    capi_state_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_wfsx_index_2: failed to create array from the hidden `state`";
+    capi_state_as_array = ndarray_from_pyobj(  NPY_CFLOAT,1,state_Dims,state_Rank,  capi_state_intent,Py_None,capi_errmess);
+    if (capi_state_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        state = (complex_float *)(PyArray_DATA(capi_state_as_array));
+
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&ispin,&ik,&no_u,&nwf,idx,eig,state,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("NNN",capi_idx_as_array,capi_eig_as_array,capi_state_as_array);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    }  /* if (capi_state_as_array == NULL) ... else of state */
+    /* End of cleaning variable state */
+    }  /* if (capi_eig_as_array == NULL) ... else of eig */
+    /* End of cleaning variable eig */
+    }  /* if (capi_idx_as_array == NULL) ... else of idx */
+    /* End of cleaning variable idx */
+    } /*if (f2py_success) of nwf*/
+    /* End of cleaning variable nwf */
+    } /*if (f2py_success) of no_u*/
+    /* End of cleaning variable no_u */
+    } /*if (f2py_success) of ik*/
+    /* End of cleaning variable ik */
+    } /*if (f2py_success) of ispin*/
+    /* End of cleaning variable ispin */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/************************** end of read_wfsx_index_2 **************************/
+
+/***************************** read_wfsx_index_4 *****************************/
+static char doc_f2py_rout__siesta_read_wfsx_index_4[] = "\
+idx,eig,state = read_wfsx_index_4(fname,ispin,ik,no_u,nwf)\n\nWrapper for ``read_wfsx_index_4``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"ispin : input int\n"
+"ik : input int\n"
+"no_u : input int\n"
+"nwf : input int\n"
+"\nReturns\n-------\n"
+"idx : rank-1 array('i') with bounds (nwf)\n"
+"eig : rank-1 array('d') with bounds (nwf)\n"
+"state : rank-2 array('F') with bounds (2 * no_u,nwf)";
+/* extern void F_FUNC_US(read_wfsx_index_4,READ_WFSX_INDEX_4)(string,int*,int*,int*,int*,int*,double*,complex_float*,size_t); */
+static PyObject *f2py_rout__siesta_read_wfsx_index_4(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,int*,int*,int*,int*,double*,complex_float*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int ispin = 0;
+    PyObject *ispin_capi = Py_None;
+    int ik = 0;
+    PyObject *ik_capi = Py_None;
+    int no_u = 0;
+    PyObject *no_u_capi = Py_None;
+    int nwf = 0;
+    PyObject *nwf_capi = Py_None;
+    int *idx = NULL;
+    npy_intp idx_Dims[1] = {-1};
+    const int idx_Rank = 1;
+    PyArrayObject *capi_idx_as_array = NULL;
+    int capi_idx_intent = 0;
+    double *eig = NULL;
+    npy_intp eig_Dims[1] = {-1};
+    const int eig_Rank = 1;
+    PyArrayObject *capi_eig_as_array = NULL;
+    int capi_eig_intent = 0;
+    complex_float *state = NULL;
+    npy_intp state_Dims[2] = {-1, -1};
+    const int state_Rank = 2;
+    PyArrayObject *capi_state_as_array = NULL;
+    int capi_state_intent = 0;
+    static char *capi_kwlist[] = {"fname","ispin","ik","no_u","nwf",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOOOO|:_siesta.read_wfsx_index_4",\
+        capi_kwlist,&fname_capi,&ispin_capi,&ik_capi,&no_u_capi,&nwf_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.read_wfsx_index_4 to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable ispin */
+        f2py_success = int_from_pyobj(&ispin,ispin_capi,"_siesta.read_wfsx_index_4() 2nd argument (ispin) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable ik */
+        f2py_success = int_from_pyobj(&ik,ik_capi,"_siesta.read_wfsx_index_4() 3rd argument (ik) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable no_u */
+        f2py_success = int_from_pyobj(&no_u,no_u_capi,"_siesta.read_wfsx_index_4() 4th argument (no_u) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable nwf */
+        f2py_success = int_from_pyobj(&nwf,nwf_capi,"_siesta.read_wfsx_index_4() 5th argument (nwf) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable idx */
+    idx_Dims[0]=nwf;
+    capi_idx_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_wfsx_index_4: failed to create array from the hidden `idx`";
+    capi_idx_as_array = ndarray_from_pyobj(  NPY_INT,1,idx_Dims,idx_Rank,  capi_idx_intent,Py_None,capi_errmess);
+    if (capi_idx_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        idx = (int *)(PyArray_DATA(capi_idx_as_array));
+
+    /* Processing variable eig */
+    eig_Dims[0]=nwf;
+    capi_eig_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_wfsx_index_4: failed to create array from the hidden `eig`";
+    capi_eig_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,eig_Dims,eig_Rank,  capi_eig_intent,Py_None,capi_errmess);
+    if (capi_eig_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        eig = (double *)(PyArray_DATA(capi_eig_as_array));
+
+    /* Processing variable state */
+    state_Dims[0]=2 * no_u,state_Dims[1]=nwf;
+    capi_state_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_wfsx_index_4: failed to create array from the hidden `state`";
+    capi_state_as_array = ndarray_from_pyobj(  NPY_CFLOAT,1,state_Dims,state_Rank,  capi_state_intent,Py_None,capi_errmess);
+    if (capi_state_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        state = (complex_float *)(PyArray_DATA(capi_state_as_array));
+
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&ispin,&ik,&no_u,&nwf,idx,eig,state,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("NNN",capi_idx_as_array,capi_eig_as_array,capi_state_as_array);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    }  /* if (capi_state_as_array == NULL) ... else of state */
+    /* End of cleaning variable state */
+    }  /* if (capi_eig_as_array == NULL) ... else of eig */
+    /* End of cleaning variable eig */
+    }  /* if (capi_idx_as_array == NULL) ... else of idx */
+    /* End of cleaning variable idx */
+    } /*if (f2py_success) of nwf*/
+    /* End of cleaning variable nwf */
+    } /*if (f2py_success) of no_u*/
+    /* End of cleaning variable no_u */
+    } /*if (f2py_success) of ik*/
+    /* End of cleaning variable ik */
+    } /*if (f2py_success) of ispin*/
+    /* End of cleaning variable ispin */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/************************** end of read_wfsx_index_4 **************************/
+
+/************************** read_wfsx_next_all_info **************************/
+static char doc_f2py_rout__siesta_read_wfsx_next_all_info[] = "\
+ks,kw,nwf = read_wfsx_next_all_info(iu,nspin,nk)\n\nWrapper for ``read_wfsx_next_all_info``.\
+\n\nParameters\n----------\n"
+"iu : input int\n"
+"nspin : input int\n"
+"nk : input int\n"
+"\nReturns\n-------\n"
+"ks : rank-2 array('d') with bounds (nk,3)\n"
+"kw : rank-1 array('d') with bounds (nk)\n"
+"nwf : rank-2 array('i') with bounds (nspin,nk)";
+/* extern void F_FUNC_US(read_wfsx_next_all_info,READ_WFSX_NEXT_ALL_INFO)(int*,int*,int*,double*,double*,int*); */
+static PyObject *f2py_rout__siesta_read_wfsx_next_all_info(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(int*,int*,int*,double*,double*,int*)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    int iu = 0;
+    PyObject *iu_capi = Py_None;
+    int nspin = 0;
+    PyObject *nspin_capi = Py_None;
+    int nk = 0;
+    PyObject *nk_capi = Py_None;
+    double *ks = NULL;
+    npy_intp ks_Dims[2] = {-1, -1};
+    const int ks_Rank = 2;
+    PyArrayObject *capi_ks_as_array = NULL;
+    int capi_ks_intent = 0;
+    double *kw = NULL;
+    npy_intp kw_Dims[1] = {-1};
+    const int kw_Rank = 1;
+    PyArrayObject *capi_kw_as_array = NULL;
+    int capi_kw_intent = 0;
+    int *nwf = NULL;
+    npy_intp nwf_Dims[2] = {-1, -1};
+    const int nwf_Rank = 2;
+    PyArrayObject *capi_nwf_as_array = NULL;
+    int capi_nwf_intent = 0;
+    static char *capi_kwlist[] = {"iu","nspin","nk",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOO|:_siesta.read_wfsx_next_all_info",\
+        capi_kwlist,&iu_capi,&nspin_capi,&nk_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable iu */
+        f2py_success = int_from_pyobj(&iu,iu_capi,"_siesta.read_wfsx_next_all_info() 1st argument (iu) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable nspin */
+        f2py_success = int_from_pyobj(&nspin,nspin_capi,"_siesta.read_wfsx_next_all_info() 2nd argument (nspin) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable nk */
+        f2py_success = int_from_pyobj(&nk,nk_capi,"_siesta.read_wfsx_next_all_info() 3rd argument (nk) can't be converted to int");
+    if (f2py_success) {
+    /* Processing variable ks */
+    ks_Dims[0]=nk,ks_Dims[1]=3;
+    capi_ks_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_wfsx_next_all_info: failed to create array from the hidden `ks`";
+    capi_ks_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,ks_Dims,ks_Rank,  capi_ks_intent,Py_None,capi_errmess);
+    if (capi_ks_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        ks = (double *)(PyArray_DATA(capi_ks_as_array));
+
+    /* Processing variable kw */
+    kw_Dims[0]=nk;
+    capi_kw_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_wfsx_next_all_info: failed to create array from the hidden `kw`";
+    capi_kw_as_array = ndarray_from_pyobj(  NPY_DOUBLE,1,kw_Dims,kw_Rank,  capi_kw_intent,Py_None,capi_errmess);
+    if (capi_kw_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        kw = (double *)(PyArray_DATA(capi_kw_as_array));
+
+    /* Processing variable nwf */
+    nwf_Dims[0]=nspin,nwf_Dims[1]=nk;
+    capi_nwf_intent |= F2PY_INTENT_OUT|F2PY_INTENT_HIDE;
+    const char capi_errmess[] = "_siesta._siesta.read_wfsx_next_all_info: failed to create array from the hidden `nwf`";
+    capi_nwf_as_array = ndarray_from_pyobj(  NPY_INT,1,nwf_Dims,nwf_Rank,  capi_nwf_intent,Py_None,capi_errmess);
+    if (capi_nwf_as_array == NULL) {
+        PyObject* capi_err = PyErr_Occurred();
+        if (capi_err == NULL) {
+            capi_err = _siesta_error;
+            PyErr_SetString(capi_err, capi_errmess);
+        }
+    } else {
+        nwf = (int *)(PyArray_DATA(capi_nwf_as_array));
+
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(&iu,&nspin,&nk,ks,kw,nwf);
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("NNN",capi_ks_as_array,capi_kw_as_array,capi_nwf_as_array);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    }  /* if (capi_nwf_as_array == NULL) ... else of nwf */
+    /* End of cleaning variable nwf */
+    }  /* if (capi_kw_as_array == NULL) ... else of kw */
+    /* End of cleaning variable kw */
+    }  /* if (capi_ks_as_array == NULL) ... else of ks */
+    /* End of cleaning variable ks */
+    } /*if (f2py_success) of nk*/
+    /* End of cleaning variable nk */
+    } /*if (f2py_success) of nspin*/
+    /* End of cleaning variable nspin */
+    } /*if (f2py_success) of iu*/
+    /* End of cleaning variable iu */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/*********************** end of read_wfsx_next_all_info ***********************/
+
+/********************************* open_file *********************************/
+static char doc_f2py_rout__siesta_io_m_open_file[] = "\
+unit = open_file(file,action,status,form)\n\nWrapper for ``open_file``.\
+\n\nParameters\n----------\n"
+"file : input string(len=-1)\n"
+"action : input string(len=-1)\n"
+"status : input string(len=-1)\n"
+"form : input string(len=-1)\n"
+"\nReturns\n-------\n"
+"unit : int";
+/*  */
+static PyObject *f2py_rout__siesta_io_m_open_file(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,string,string,string,int*,size_t,size_t,size_t,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string file = NULL;
+    int slen(file);
+    PyObject *file_capi = Py_None;
+    string action = NULL;
+    int slen(action);
+    PyObject *action_capi = Py_None;
+    string status = NULL;
+    int slen(status);
+    PyObject *status_capi = Py_None;
+    string form = NULL;
+    int slen(form);
+    PyObject *form_capi = Py_None;
+    int unit = 0;
+    static char *capi_kwlist[] = {"file","action","status","form",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "OOOO|:_siesta.io_m.open_file",\
+        capi_kwlist,&file_capi,&action_capi,&status_capi,&form_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable file */
+    slen(file) = -1;
+    f2py_success = string_from_pyobj(&file,&slen(file),"",file_capi,"string_from_pyobj failed in converting 1st argument`file' of _siesta.io_m.open_file to C string");
+    if (f2py_success) {
+        STRINGPADN(file, slen(file), '\0', ' ');
+    /* Processing variable action */
+    slen(action) = -1;
+    f2py_success = string_from_pyobj(&action,&slen(action),"",action_capi,"string_from_pyobj failed in converting 2nd argument`action' of _siesta.io_m.open_file to C string");
+    if (f2py_success) {
+        STRINGPADN(action, slen(action), '\0', ' ');
+    /* Processing variable status */
+    slen(status) = -1;
+    f2py_success = string_from_pyobj(&status,&slen(status),"",status_capi,"string_from_pyobj failed in converting 3rd argument`status' of _siesta.io_m.open_file to C string");
+    if (f2py_success) {
+        STRINGPADN(status, slen(status), '\0', ' ');
+    /* Processing variable form */
+    slen(form) = -1;
+    f2py_success = string_from_pyobj(&form,&slen(form),"",form_capi,"string_from_pyobj failed in converting 4th argument`form' of _siesta.io_m.open_file to C string");
+    if (f2py_success) {
+        STRINGPADN(form, slen(form), '\0', ' ');
+    /* Processing variable unit */
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(file,action,status,form,&unit,slen(file),slen(action),slen(status),slen(form));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("i",unit);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    /* End of cleaning variable unit */
+        STRINGFREE(form);
+    }  /*if (f2py_success) of form*/
+    /* End of cleaning variable form */
+        STRINGFREE(status);
+    }  /*if (f2py_success) of status*/
+    /* End of cleaning variable status */
+        STRINGFREE(action);
+    }  /*if (f2py_success) of action*/
+    /* End of cleaning variable action */
+        STRINGFREE(file);
+    }  /*if (f2py_success) of file*/
+    /* End of cleaning variable file */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/****************************** end of open_file ******************************/
+
+/********************************* close_file *********************************/
+static char doc_f2py_rout__siesta_io_m_close_file[] = "\
+close_file(iu)\n\nWrapper for ``close_file``.\
+\n\nParameters\n----------\n"
+"iu : input int";
+/*  */
+static PyObject *f2py_rout__siesta_io_m_close_file(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(int*)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    int iu = 0;
+    PyObject *iu_capi = Py_None;
+    static char *capi_kwlist[] = {"iu",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "O|:_siesta.io_m.close_file",\
+        capi_kwlist,&iu_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable iu */
+        f2py_success = int_from_pyobj(&iu,iu_capi,"_siesta.io_m.close_file() 1st argument (iu) can't be converted to int");
+    if (f2py_success) {
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(&iu);
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("");
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    } /*if (f2py_success) of iu*/
+    /* End of cleaning variable iu */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/***************************** end of close_file *****************************/
+
+/******************************* open_file_read *******************************/
+static char doc_f2py_rout__siesta_io_m_open_file_read[] = "\
+iu = open_file_read(fname)\n\nWrapper for ``open_file_read``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"\nReturns\n-------\n"
+"iu : int";
+/*  */
+static PyObject *f2py_rout__siesta_io_m_open_file_read(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int iu = 0;
+    static char *capi_kwlist[] = {"fname",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "O|:_siesta.io_m.open_file_read",\
+        capi_kwlist,&fname_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.io_m.open_file_read to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable iu */
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&iu,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("i",iu);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    /* End of cleaning variable iu */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/*************************** end of open_file_read ***************************/
+
+/****************************** open_file_write ******************************/
+static char doc_f2py_rout__siesta_io_m_open_file_write[] = "\
+iu = open_file_write(fname)\n\nWrapper for ``open_file_write``.\
+\n\nParameters\n----------\n"
+"fname : input string(len=-1)\n"
+"\nReturns\n-------\n"
+"iu : int";
+/*  */
+static PyObject *f2py_rout__siesta_io_m_open_file_write(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(string,int*,size_t)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    string fname = NULL;
+    int slen(fname);
+    PyObject *fname_capi = Py_None;
+    int iu = 0;
+    static char *capi_kwlist[] = {"fname",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "O|:_siesta.io_m.open_file_write",\
+        capi_kwlist,&fname_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable fname */
+    slen(fname) = -1;
+    f2py_success = string_from_pyobj(&fname,&slen(fname),"",fname_capi,"string_from_pyobj failed in converting 1st argument`fname' of _siesta.io_m.open_file_write to C string");
+    if (f2py_success) {
+        STRINGPADN(fname, slen(fname), '\0', ' ');
+    /* Processing variable iu */
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(fname,&iu,slen(fname));
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("i",iu);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    /* End of cleaning variable iu */
+        STRINGFREE(fname);
+    }  /*if (f2py_success) of fname*/
+    /* End of cleaning variable fname */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/*************************** end of open_file_write ***************************/
+
+/******************************** rewind_file ********************************/
+static char doc_f2py_rout__siesta_io_m_rewind_file[] = "\
+rewind_file(iu)\n\nWrapper for ``rewind_file``.\
+\n\nParameters\n----------\n"
+"iu : input int";
+/*  */
+static PyObject *f2py_rout__siesta_io_m_rewind_file(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(int*)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    int iu = 0;
+    PyObject *iu_capi = Py_None;
+    static char *capi_kwlist[] = {"iu",NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "O|:_siesta.io_m.rewind_file",\
+        capi_kwlist,&iu_capi))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable iu */
+        f2py_success = int_from_pyobj(&iu,iu_capi,"_siesta.io_m.rewind_file() 1st argument (iu) can't be converted to int");
+    if (f2py_success) {
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(&iu);
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("");
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    } /*if (f2py_success) of iu*/
+    /* End of cleaning variable iu */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/***************************** end of rewind_file *****************************/
+
+/******************************** iostat_query ********************************/
+static char doc_f2py_rout__siesta_io_m_iostat_query[] = "\
+iostat = iostat_query()\n\nWrapper for ``iostat_query``.\
+\n\nReturns\n-------\n"
+"iostat : int";
+/*  */
+static PyObject *f2py_rout__siesta_io_m_iostat_query(const PyObject *capi_self,
+                           PyObject *capi_args,
+                           PyObject *capi_keywds,
+                           void (*f2py_func)(int*)) {
+    PyObject * volatile capi_buildvalue = NULL;
+    volatile int f2py_success = 1;
+/*decl*/
+
+    int iostat = 0;
+    static char *capi_kwlist[] = {NULL};
+
+/*routdebugenter*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_clock();
+#endif
+    if (!PyArg_ParseTupleAndKeywords(capi_args,capi_keywds,\
+        "|:_siesta.io_m.iostat_query",\
+        capi_kwlist))
+        return NULL;
+/*frompyobj*/
+    /* Processing variable iostat */
+/*end of frompyobj*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_start_call_clock();
+#endif
+/*callfortranroutine*/
+                (*f2py_func)(&iostat);
+if (PyErr_Occurred())
+  f2py_success = 0;
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_call_clock();
+#endif
+/*end of callfortranroutine*/
+        if (f2py_success) {
+/*pyobjfrom*/
+/*end of pyobjfrom*/
+        CFUNCSMESS("Building return value.\n");
+        capi_buildvalue = Py_BuildValue("i",iostat);
+/*closepyobjfrom*/
+/*end of closepyobjfrom*/
+        } /*if (f2py_success) after callfortranroutine*/
+/*cleanupfrompyobj*/
+    /* End of cleaning variable iostat */
+/*end of cleanupfrompyobj*/
+    if (capi_buildvalue == NULL) {
+/*routdebugfailure*/
+    } else {
+/*routdebugleave*/
+    }
+    CFUNCSMESS("Freeing memory.\n");
+/*freemem*/
+#ifdef F2PY_REPORT_ATEXIT
+f2py_stop_clock();
+#endif
+    return capi_buildvalue;
+}
+/**************************** end of iostat_query ****************************/
+/*eof body*/
+
+/******************* See f2py2e/f90mod_rules.py: buildhooks *******************/
+
+static FortranDataDef f2py_precision_def[] = {
+  {"r4",0,{{-1}},NPY_INT, 1},
+  {"r8",0,{{-1}},NPY_INT, 1},
+  {"i4",0,{{-1}},NPY_INT, 1},
+  {"i8",0,{{-1}},NPY_INT, 1},
+  {NULL}
+};
+
+static void f2py_setup_precision(char *r4,char *r8,char *i4,char *i8) {
+  int i_f2py=0;
+  f2py_precision_def[i_f2py++].data = r4;
+  f2py_precision_def[i_f2py++].data = r8;
+  f2py_precision_def[i_f2py++].data = i4;
+  f2py_precision_def[i_f2py++].data = i8;
+}
+extern void F_FUNC(f2pyinitprecision,F2PYINITPRECISION)(void (*)(char*,char*,char*,char*));
+static void f2py_init_precision(void) {
+  F_FUNC(f2pyinitprecision,F2PYINITPRECISION)(f2py_setup_precision);
+}
+
+
+static FortranDataDef f2py_io_m_def[] = {
+  {"open_file",-1,{{-1}},0,0,NULL,(void *)f2py_rout__siesta_io_m_open_file,doc_f2py_rout__siesta_io_m_open_file},
+  {"close_file",-1,{{-1}},0,0,NULL,(void *)f2py_rout__siesta_io_m_close_file,doc_f2py_rout__siesta_io_m_close_file},
+  {"open_file_read",-1,{{-1}},0,0,NULL,(void *)f2py_rout__siesta_io_m_open_file_read,doc_f2py_rout__siesta_io_m_open_file_read},
+  {"open_file_write",-1,{{-1}},0,0,NULL,(void *)f2py_rout__siesta_io_m_open_file_write,doc_f2py_rout__siesta_io_m_open_file_write},
+  {"rewind_file",-1,{{-1}},0,0,NULL,(void *)f2py_rout__siesta_io_m_rewind_file,doc_f2py_rout__siesta_io_m_rewind_file},
+  {"iostat_query",-1,{{-1}},0,0,NULL,(void *)f2py_rout__siesta_io_m_iostat_query,doc_f2py_rout__siesta_io_m_iostat_query},
+  {NULL}
+};
+
+static void f2py_setup_io_m(char *open_file,char *close_file,char *open_file_read,char *open_file_write,char *rewind_file,char *iostat_query) {
+  int i_f2py=0;
+  f2py_io_m_def[i_f2py++].data = open_file;
+  f2py_io_m_def[i_f2py++].data = close_file;
+  f2py_io_m_def[i_f2py++].data = open_file_read;
+  f2py_io_m_def[i_f2py++].data = open_file_write;
+  f2py_io_m_def[i_f2py++].data = rewind_file;
+  f2py_io_m_def[i_f2py++].data = iostat_query;
+}
+extern void F_FUNC_US(f2pyinitio_m,F2PYINITIO_M)(void (*)(char *,char *,char *,char *,char *,char *));
+static void f2py_init_io_m(void) {
+  F_FUNC_US(f2pyinitio_m,F2PYINITIO_M)(f2py_setup_io_m);
+}
+
+/*need_f90modhooks*/
+
+/************** See f2py2e/rules.py: module_rules['modulebody'] **************/
+
+/******************* See f2py2e/common_rules.py: buildhooks *******************/
+
+/*need_commonhooks*/
+
+/**************************** See f2py2e/rules.py ****************************/
+
+static FortranDataDef f2py_routine_defs[] = {
+    {"siesta_sc_off",-1,{{-1}},0,0,(char *)  F_FUNC_US(siesta_sc_off,SIESTA_SC_OFF),  (f2py_init_func)f2py_rout__siesta_siesta_sc_off,doc_f2py_rout__siesta_siesta_sc_off},
+    {"read_hsx_version",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_hsx_version,READ_HSX_VERSION),  (f2py_init_func)f2py_rout__siesta_read_hsx_version,doc_f2py_rout__siesta_read_hsx_version},
+    {"read_hsx_sizes",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_hsx_sizes,READ_HSX_SIZES),  (f2py_init_func)f2py_rout__siesta_read_hsx_sizes,doc_f2py_rout__siesta_read_hsx_sizes},
+    {"read_hsx_sizes0",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_hsx_sizes0,READ_HSX_SIZES0),  (f2py_init_func)f2py_rout__siesta_read_hsx_sizes0,doc_f2py_rout__siesta_read_hsx_sizes0},
+    {"read_hsx_sizes1",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_hsx_sizes1,READ_HSX_SIZES1),  (f2py_init_func)f2py_rout__siesta_read_hsx_sizes1,doc_f2py_rout__siesta_read_hsx_sizes1},
+    {"read_hsx_ef",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_hsx_ef,READ_HSX_EF),  (f2py_init_func)f2py_rout__siesta_read_hsx_ef,doc_f2py_rout__siesta_read_hsx_ef},
+    {"read_hsx_ef0",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_hsx_ef0,READ_HSX_EF0),  (f2py_init_func)f2py_rout__siesta_read_hsx_ef0,doc_f2py_rout__siesta_read_hsx_ef0},
+    {"read_hsx_ef1",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_hsx_ef1,READ_HSX_EF1),  (f2py_init_func)f2py_rout__siesta_read_hsx_ef1,doc_f2py_rout__siesta_read_hsx_ef1},
+    {"internal_read_hsx_skip_specie1",-1,{{-1}},0,0,(char *)  F_FUNC_US(internal_read_hsx_skip_specie1,INTERNAL_READ_HSX_SKIP_SPECIE1),  (f2py_init_func)f2py_rout__siesta_internal_read_hsx_skip_specie1,doc_f2py_rout__siesta_internal_read_hsx_skip_specie1},
+    {"read_hsx_hsx0",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_hsx_hsx0,READ_HSX_HSX0),  (f2py_init_func)f2py_rout__siesta_read_hsx_hsx0,doc_f2py_rout__siesta_read_hsx_hsx0},
+    {"read_hsx_hsx1",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_hsx_hsx1,READ_HSX_HSX1),  (f2py_init_func)f2py_rout__siesta_read_hsx_hsx1,doc_f2py_rout__siesta_read_hsx_hsx1},
+    {"read_hsx_sx0",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_hsx_sx0,READ_HSX_SX0),  (f2py_init_func)f2py_rout__siesta_read_hsx_sx0,doc_f2py_rout__siesta_read_hsx_sx0},
+    {"read_hsx_sx1",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_hsx_sx1,READ_HSX_SX1),  (f2py_init_func)f2py_rout__siesta_read_hsx_sx1,doc_f2py_rout__siesta_read_hsx_sx1},
+    {"read_hsx_geom1",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_hsx_geom1,READ_HSX_GEOM1),  (f2py_init_func)f2py_rout__siesta_read_hsx_geom1,doc_f2py_rout__siesta_read_hsx_geom1},
+    {"read_hsx_specie_sizes",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_hsx_specie_sizes,READ_HSX_SPECIE_SIZES),  (f2py_init_func)f2py_rout__siesta_read_hsx_specie_sizes,doc_f2py_rout__siesta_read_hsx_specie_sizes},
+    {"read_hsx_specie_sizes0",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_hsx_specie_sizes0,READ_HSX_SPECIE_SIZES0),  (f2py_init_func)f2py_rout__siesta_read_hsx_specie_sizes0,doc_f2py_rout__siesta_read_hsx_specie_sizes0},
+    {"read_hsx_specie_sizes1",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_hsx_specie_sizes1,READ_HSX_SPECIE_SIZES1),  (f2py_init_func)f2py_rout__siesta_read_hsx_specie_sizes1,doc_f2py_rout__siesta_read_hsx_specie_sizes1},
+    {"read_hsx_species",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_hsx_species,READ_HSX_SPECIES),  (f2py_init_func)f2py_rout__siesta_read_hsx_species,doc_f2py_rout__siesta_read_hsx_species},
+    {"read_hsx_species0",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_hsx_species0,READ_HSX_SPECIES0),  (f2py_init_func)f2py_rout__siesta_read_hsx_species0,doc_f2py_rout__siesta_read_hsx_species0},
+    {"read_hsx_species1",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_hsx_species1,READ_HSX_SPECIES1),  (f2py_init_func)f2py_rout__siesta_read_hsx_species1,doc_f2py_rout__siesta_read_hsx_species1},
+    {"read_hsx_specie",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_hsx_specie,READ_HSX_SPECIE),  (f2py_init_func)f2py_rout__siesta_read_hsx_specie,doc_f2py_rout__siesta_read_hsx_specie},
+    {"read_hsx_specie0",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_hsx_specie0,READ_HSX_SPECIE0),  (f2py_init_func)f2py_rout__siesta_read_hsx_specie0,doc_f2py_rout__siesta_read_hsx_specie0},
+    {"read_hsx_specie1",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_hsx_specie1,READ_HSX_SPECIE1),  (f2py_init_func)f2py_rout__siesta_read_hsx_specie1,doc_f2py_rout__siesta_read_hsx_specie1},
+    {"write_hsx0",-1,{{-1}},0,0,(char *)  F_FUNC_US(write_hsx0,WRITE_HSX0),  (f2py_init_func)f2py_rout__siesta_write_hsx0,doc_f2py_rout__siesta_write_hsx0},
+    {"read_dm_sizes",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_dm_sizes,READ_DM_SIZES),  (f2py_init_func)f2py_rout__siesta_read_dm_sizes,doc_f2py_rout__siesta_read_dm_sizes},
+    {"read_dm",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_dm,READ_DM),  (f2py_init_func)f2py_rout__siesta_read_dm,doc_f2py_rout__siesta_read_dm},
+    {"write_dm",-1,{{-1}},0,0,(char *)  F_FUNC_US(write_dm,WRITE_DM),  (f2py_init_func)f2py_rout__siesta_write_dm,doc_f2py_rout__siesta_write_dm},
+    {"read_tshs_version",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_tshs_version,READ_TSHS_VERSION),  (f2py_init_func)f2py_rout__siesta_read_tshs_version,doc_f2py_rout__siesta_read_tshs_version},
+    {"read_tshs_sizes",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_tshs_sizes,READ_TSHS_SIZES),  (f2py_init_func)f2py_rout__siesta_read_tshs_sizes,doc_f2py_rout__siesta_read_tshs_sizes},
+    {"read_tshs_ef",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_tshs_ef,READ_TSHS_EF),  (f2py_init_func)f2py_rout__siesta_read_tshs_ef,doc_f2py_rout__siesta_read_tshs_ef},
+    {"read_tshs_cell",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_tshs_cell,READ_TSHS_CELL),  (f2py_init_func)f2py_rout__siesta_read_tshs_cell,doc_f2py_rout__siesta_read_tshs_cell},
+    {"read_tshs_geom",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_tshs_geom,READ_TSHS_GEOM),  (f2py_init_func)f2py_rout__siesta_read_tshs_geom,doc_f2py_rout__siesta_read_tshs_geom},
+    {"read_tshs_hs",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_tshs_hs,READ_TSHS_HS),  (f2py_init_func)f2py_rout__siesta_read_tshs_hs,doc_f2py_rout__siesta_read_tshs_hs},
+    {"read_tshs_s",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_tshs_s,READ_TSHS_S),  (f2py_init_func)f2py_rout__siesta_read_tshs_s,doc_f2py_rout__siesta_read_tshs_s},
+    {"write_tshs_hs",-1,{{-1}},0,0,(char *)  F_FUNC_US(write_tshs_hs,WRITE_TSHS_HS),  (f2py_init_func)f2py_rout__siesta_write_tshs_hs,doc_f2py_rout__siesta_write_tshs_hs},
+    {"read_grid_sizes",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_grid_sizes,READ_GRID_SIZES),  (f2py_init_func)f2py_rout__siesta_read_grid_sizes,doc_f2py_rout__siesta_read_grid_sizes},
+    {"read_grid_cell",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_grid_cell,READ_GRID_CELL),  (f2py_init_func)f2py_rout__siesta_read_grid_cell,doc_f2py_rout__siesta_read_grid_cell},
+    {"read_grid",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_grid,READ_GRID),  (f2py_init_func)f2py_rout__siesta_read_grid,doc_f2py_rout__siesta_read_grid},
+    {"write_grid",-1,{{-1}},0,0,(char *)  F_FUNC_US(write_grid,WRITE_GRID),  (f2py_init_func)f2py_rout__siesta_write_grid,doc_f2py_rout__siesta_write_grid},
+    {"read_gf_sizes",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_gf_sizes,READ_GF_SIZES),  (f2py_init_func)f2py_rout__siesta_read_gf_sizes,doc_f2py_rout__siesta_read_gf_sizes},
+    {"read_gf_header",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_gf_header,READ_GF_HEADER),  (f2py_init_func)f2py_rout__siesta_read_gf_header,doc_f2py_rout__siesta_read_gf_header},
+    {"read_gf_find",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_gf_find,READ_GF_FIND),  (f2py_init_func)f2py_rout__siesta_read_gf_find,doc_f2py_rout__siesta_read_gf_find},
+    {"read_gf_hs",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_gf_hs,READ_GF_HS),  (f2py_init_func)f2py_rout__siesta_read_gf_hs,doc_f2py_rout__siesta_read_gf_hs},
+    {"read_gf_se",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_gf_se,READ_GF_SE),  (f2py_init_func)f2py_rout__siesta_read_gf_se,doc_f2py_rout__siesta_read_gf_se},
+    {"write_gf_header",-1,{{-1}},0,0,(char *)  F_FUNC_US(write_gf_header,WRITE_GF_HEADER),  (f2py_init_func)f2py_rout__siesta_write_gf_header,doc_f2py_rout__siesta_write_gf_header},
+    {"write_gf_hs",-1,{{-1}},0,0,(char *)  F_FUNC_US(write_gf_hs,WRITE_GF_HS),  (f2py_init_func)f2py_rout__siesta_write_gf_hs,doc_f2py_rout__siesta_write_gf_hs},
+    {"write_gf_se",-1,{{-1}},0,0,(char *)  F_FUNC_US(write_gf_se,WRITE_GF_SE),  (f2py_init_func)f2py_rout__siesta_write_gf_se,doc_f2py_rout__siesta_write_gf_se},
+    {"read_tsde_sizes",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_tsde_sizes,READ_TSDE_SIZES),  (f2py_init_func)f2py_rout__siesta_read_tsde_sizes,doc_f2py_rout__siesta_read_tsde_sizes},
+    {"read_tsde_dm",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_tsde_dm,READ_TSDE_DM),  (f2py_init_func)f2py_rout__siesta_read_tsde_dm,doc_f2py_rout__siesta_read_tsde_dm},
+    {"read_tsde_ef",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_tsde_ef,READ_TSDE_EF),  (f2py_init_func)f2py_rout__siesta_read_tsde_ef,doc_f2py_rout__siesta_read_tsde_ef},
+    {"read_tsde_edm",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_tsde_edm,READ_TSDE_EDM),  (f2py_init_func)f2py_rout__siesta_read_tsde_edm,doc_f2py_rout__siesta_read_tsde_edm},
+    {"write_tsde_dm_edm",-1,{{-1}},0,0,(char *)  F_FUNC_US(write_tsde_dm_edm,WRITE_TSDE_DM_EDM),  (f2py_init_func)f2py_rout__siesta_write_tsde_dm_edm,doc_f2py_rout__siesta_write_tsde_dm_edm},
+    {"read_hs_header",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_hs_header,READ_HS_HEADER),  (f2py_init_func)f2py_rout__siesta_read_hs_header,doc_f2py_rout__siesta_read_hs_header},
+    {"read_hs",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_hs,READ_HS),  (f2py_init_func)f2py_rout__siesta_read_hs,doc_f2py_rout__siesta_read_hs},
+    {"read_wfsx_next_sizes",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_wfsx_next_sizes,READ_WFSX_NEXT_SIZES),  (f2py_init_func)f2py_rout__siesta_read_wfsx_next_sizes,doc_f2py_rout__siesta_read_wfsx_next_sizes},
+    {"read_wfsx_sizes",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_wfsx_sizes,READ_WFSX_SIZES),  (f2py_init_func)f2py_rout__siesta_read_wfsx_sizes,doc_f2py_rout__siesta_read_wfsx_sizes},
+    {"read_wfsx_next_basis",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_wfsx_next_basis,READ_WFSX_NEXT_BASIS),  (f2py_init_func)f2py_rout__siesta_read_wfsx_next_basis,doc_f2py_rout__siesta_read_wfsx_next_basis},
+    {"read_wfsx_next_info",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_wfsx_next_info,READ_WFSX_NEXT_INFO),  (f2py_init_func)f2py_rout__siesta_read_wfsx_next_info,doc_f2py_rout__siesta_read_wfsx_next_info},
+    {"read_wfsx_index_info",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_wfsx_index_info,READ_WFSX_INDEX_INFO),  (f2py_init_func)f2py_rout__siesta_read_wfsx_index_info,doc_f2py_rout__siesta_read_wfsx_index_info},
+    {"read_wfsx_next_index_check",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_wfsx_next_index_check,READ_WFSX_NEXT_INDEX_CHECK),  (f2py_init_func)f2py_rout__siesta_read_wfsx_next_index_check,doc_f2py_rout__siesta_read_wfsx_next_index_check},
+    {"skip_wfsx_next_eigenstate",-1,{{-1}},0,0,(char *)  F_FUNC_US(skip_wfsx_next_eigenstate,SKIP_WFSX_NEXT_EIGENSTATE),  (f2py_init_func)f2py_rout__siesta_skip_wfsx_next_eigenstate,doc_f2py_rout__siesta_skip_wfsx_next_eigenstate},
+    {"skip_wfsx_next_vals",-1,{{-1}},0,0,(char *)  F_FUNC_US(skip_wfsx_next_vals,SKIP_WFSX_NEXT_VALS),  (f2py_init_func)f2py_rout__siesta_skip_wfsx_next_vals,doc_f2py_rout__siesta_skip_wfsx_next_vals},
+    {"skip_wfsx_index",-1,{{-1}},0,0,(char *)  F_FUNC_US(skip_wfsx_index,SKIP_WFSX_INDEX),  (f2py_init_func)f2py_rout__siesta_skip_wfsx_index,doc_f2py_rout__siesta_skip_wfsx_index},
+    {"read_wfsx_next_1",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_wfsx_next_1,READ_WFSX_NEXT_1),  (f2py_init_func)f2py_rout__siesta_read_wfsx_next_1,doc_f2py_rout__siesta_read_wfsx_next_1},
+    {"read_wfsx_next_2",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_wfsx_next_2,READ_WFSX_NEXT_2),  (f2py_init_func)f2py_rout__siesta_read_wfsx_next_2,doc_f2py_rout__siesta_read_wfsx_next_2},
+    {"read_wfsx_next_4",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_wfsx_next_4,READ_WFSX_NEXT_4),  (f2py_init_func)f2py_rout__siesta_read_wfsx_next_4,doc_f2py_rout__siesta_read_wfsx_next_4},
+    {"read_wfsx_index_1",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_wfsx_index_1,READ_WFSX_INDEX_1),  (f2py_init_func)f2py_rout__siesta_read_wfsx_index_1,doc_f2py_rout__siesta_read_wfsx_index_1},
+    {"read_wfsx_index_2",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_wfsx_index_2,READ_WFSX_INDEX_2),  (f2py_init_func)f2py_rout__siesta_read_wfsx_index_2,doc_f2py_rout__siesta_read_wfsx_index_2},
+    {"read_wfsx_index_4",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_wfsx_index_4,READ_WFSX_INDEX_4),  (f2py_init_func)f2py_rout__siesta_read_wfsx_index_4,doc_f2py_rout__siesta_read_wfsx_index_4},
+    {"read_wfsx_next_all_info",-1,{{-1}},0,0,(char *)  F_FUNC_US(read_wfsx_next_all_info,READ_WFSX_NEXT_ALL_INFO),  (f2py_init_func)f2py_rout__siesta_read_wfsx_next_all_info,doc_f2py_rout__siesta_read_wfsx_next_all_info},
+
+/*eof routine_defs*/
+    {NULL}
+};
+
+static PyMethodDef f2py_module_methods[] = {
+
+    {NULL,NULL}
+};
+
+static struct PyModuleDef moduledef = {
+    PyModuleDef_HEAD_INIT,
+    "_siesta",
+    NULL,
+    -1,
+    f2py_module_methods,
+    NULL,
+    NULL,
+    NULL,
+    NULL
+};
+
+PyMODINIT_FUNC PyInit__siesta(void) {
+    int i;
+    PyObject *m,*d, *s, *tmp;
+    m = _siesta_module = PyModule_Create(&moduledef);
+    Py_SET_TYPE(&PyFortran_Type, &PyType_Type);
+    import_array();
+    if (PyErr_Occurred())
+        {PyErr_SetString(PyExc_ImportError, "can't initialize module _siesta (failed to import numpy)"); return m;}
+    d = PyModule_GetDict(m);
+    s = PyUnicode_FromString("2.4.6");
+    PyDict_SetItemString(d, "__version__", s);
+    Py_DECREF(s);
+    s = PyUnicode_FromString(
+        "This module '_siesta' is auto-generated with f2py (version:2.4.6).\nFunctions:\n"
+"    isc = siesta_sc_off(nsa,nsb,nsc)\n"
+"    version = read_hsx_version(fname)\n"
+"    nspin,na_u,no_u,no_s,maxnh = read_hsx_sizes(fname)\n"
+"    nspin,na_u,no_u,no_s,maxnh = read_hsx_sizes0(fname)\n"
+"    nspin,na_u,no_u,no_s,maxnh = read_hsx_sizes1(fname)\n"
+"    ef = read_hsx_ef(fname)\n"
+"    ef = read_hsx_ef0(fname)\n"
+"    ef = read_hsx_ef1(fname)\n"
+"    internal_read_hsx_skip_specie1(iu,nspecies)\n"
+"    numh,listh,h,s,xij = read_hsx_hsx0(fname,nspin,no_u,no_s,maxnh)\n"
+"    numh,listh,h,s,isc = read_hsx_hsx1(fname,nspin,no_u,no_s,maxnh)\n"
+"    numh,listh,s,xij = read_hsx_sx0(fname,nspin,no_u,no_s,maxnh)\n"
+"    numh,listh,s,isc = read_hsx_sx1(fname,nspin,no_u,no_s,maxnh)\n"
+"    cell,nsc,xa,lasto = read_hsx_geom1(fname,na_u)\n"
+"    no_u,na_u,nspecies = read_hsx_specie_sizes(fname)\n"
+"    no_u,na_u,nspecies = read_hsx_specie_sizes0(fname)\n"
+"    no_u,na_u,nspecies = read_hsx_specie_sizes1(fname)\n"
+"    label,zval,no,isa = read_hsx_species(fname,nspecies,no_u,na_u)\n"
+"    label,zval,no,isa = read_hsx_species0(fname,nspecies,no_u,na_u)\n"
+"    label,zval,no,isa = read_hsx_species1(fname,nspecies,no_u,na_u)\n"
+"    n_specie,l_specie,zeta_specie = read_hsx_specie(fname,ispecie,no_specie)\n"
+"    n_specie,l_specie,zeta_specie = read_hsx_specie0(fname,ispecie,no_specie)\n"
+"    n_specie,l_specie,zeta_specie = read_hsx_specie1(fname,ispecie,no_specie)\n"
+"    write_hsx0(fname,gamma,no_s,numh,listhptr,listh,h,s,xij,qtot,temp,no_u=shape(numh, 0),nspin=shape(h, 1),maxnh=shape(listh, 0))\n"
+"    nspin,no_u,nsc,nnz = read_dm_sizes(fname)\n"
+"    ncol,list_col,dm = read_dm(fname,nspin,no_u,nsc,nnz)\n"
+"    write_dm(fname,nsc,ncol,list_col,dm,nspin=shape(dm, 1),no_u=shape(ncol, 0),nnz=shape(list_col, 0))\n"
+"    version = read_tshs_version(fname)\n"
+"    nspin,na_u,no_u,n_s,nnz = read_tshs_sizes(fname)\n"
+"    ef = read_tshs_ef(fname)\n"
+"    nsc,cell,isc = read_tshs_cell(fname,n_s)\n"
+"    xa,lasto = read_tshs_geom(fname,na_u)\n"
+"    ncol,list_col,h,s = read_tshs_hs(fname,nspin,no_u,nnz)\n"
+"    ncol,list_col,s = read_tshs_s(fname,no_u,nnz)\n"
+"    write_tshs_hs(fname,nsc1,nsc2,nsc3,cell,xa,lasto,ncol,list_col,h,s,isc,nspin=shape(h, 1),na_u=shape(xa, 1),no_u=shape(ncol, 0),nnz=shape(list_col, 0))\n"
+"    nspin,mesh = read_grid_sizes(fname)\n"
+"    cell = read_grid_cell(fname)\n"
+"    grid = read_grid(fname,nspin,mesh1,mesh2,mesh3)\n"
+"    write_grid(fname,nspin,cell,grid,mesh1=shape(grid, 0),mesh2=shape(grid, 1),mesh3=shape(grid, 2))\n"
+"    nspin,no_u,nkpt,ne = read_gf_sizes(iu)\n"
+"    kpt,e = read_gf_header(iu,nkpt,ne)\n"
+"    read_gf_find(iu,nspin,nkpt,ne,cstate,cspin,ckpt,ce,cis_read,istate,ispin,ikpt,ie)\n"
+"    h,s = read_gf_hs(iu,no_u)\n"
+"    se = read_gf_se(iu,no_u,ie)\n"
+"    write_gf_header(iu,nspin,cell,na_u,no_u,no_used,xa_used,lasto_used,bloch,pre_expand,mu,kpt,kw,e,na_used=shape(xa_used, 1),nkpt=shape(kpt, 1),ne=shape(e, 0))\n"
+"    write_gf_hs(iu,ik,e,h,s,no_u=shape(h, 0))\n"
+"    write_gf_se(iu,ik,ie,e,se,no_u=shape(se, 0))\n"
+"    nspin,no_u,nsc,nnz = read_tsde_sizes(fname)\n"
+"    ncol,list_col,dm = read_tsde_dm(fname,nspin,no_u,nsc,nnz)\n"
+"    ef = read_tsde_ef(fname)\n"
+"    ncol,list_col,edm = read_tsde_edm(fname,nspin,no_u,nsc,nnz)\n"
+"    write_tsde_dm_edm(fname,nsc,ncol,list_col,dm,edm,ef,nspin=shape(dm, 1),no_u=shape(ncol, 0),nnz=shape(list_col, 0))\n"
+"    gamma,nspin,no_u,no_s,maxnh = read_hs_header(fname)\n"
+"    numh,listhptr,listh,h,s,xij = read_hs(fname,nspin,no_u,no_s,maxnh)\n"
+"    nspin,no_u,nk,gamma = read_wfsx_next_sizes(iu,skip_basis)\n"
+"    nspin,no_u,nk,gamma = read_wfsx_sizes(fname)\n"
+"    atom_indices,atom_labels,orb_index_atom,orb_n,orb_simmetry = read_wfsx_next_basis(iu,no_u)\n"
+"    ispin,ik,k,kw,nwf = read_wfsx_next_info(iu)\n"
+"    k,kw,nwf = read_wfsx_index_info(fname,ispin,ik)\n"
+"    read_wfsx_next_index_check(iu,ispin,ik,nwf,fail)\n"
+"    skip_wfsx_next_eigenstate(iu)\n"
+"    skip_wfsx_next_vals(iu,nwf)\n"
+"    skip_wfsx_index(iu,ispin,ik)\n"
+"    idx,eig,state = read_wfsx_next_1(iu,no_u,nwf)\n"
+"    idx,eig,state = read_wfsx_next_2(iu,no_u,nwf)\n"
+"    idx,eig,state = read_wfsx_next_4(iu,no_u,nwf)\n"
+"    idx,eig,state = read_wfsx_index_1(fname,ispin,ik,no_u,nwf)\n"
+"    idx,eig,state = read_wfsx_index_2(fname,ispin,ik,no_u,nwf)\n"
+"    idx,eig,state = read_wfsx_index_4(fname,ispin,ik,no_u,nwf)\n"
+"    ks,kw,nwf = read_wfsx_next_all_info(iu,nspin,nk)\n"
+"Fortran 90/95 modules:\n""  precision --- r4,r8,i4,i8""  io_m --- open_file(),close_file(),open_file_read(),open_file_write(),rewind_file(),iostat_query()"".");
+    PyDict_SetItemString(d, "__doc__", s);
+    Py_DECREF(s);
+    s = PyUnicode_FromString("2.4.6");
+    PyDict_SetItemString(d, "__f2py_numpy_version__", s);
+    Py_DECREF(s);
+    _siesta_error = PyErr_NewException ("_siesta.error", NULL, NULL);
+    /*
+     * Store the error object inside the dict, so that it could get deallocated.
+     * (in practice, this is a module, so it likely will not and cannot.)
+     */
+    PyDict_SetItemString(d, "__siesta_error", _siesta_error);
+    Py_DECREF(_siesta_error);
+    for(i=0;f2py_routine_defs[i].name!=NULL;i++) {
+        tmp = PyFortranObject_NewAsAttr(&f2py_routine_defs[i]);
+        PyDict_SetItemString(d, f2py_routine_defs[i].name, tmp);
+        Py_DECREF(tmp);
+    }
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+/*eof initf2pywraphooks*/
+  PyDict_SetItemString(d, "io_m", PyFortranObject_New(f2py_io_m_def,f2py_init_io_m));
+  PyDict_SetItemString(d, "precision", PyFortranObject_New(f2py_precision_def,f2py_init_precision));
+/*eof initf90modhooks*/
+
+/*eof initcommonhooks*/
+
+
+#ifdef Py_GIL_DISABLED
+    // signal whether this module supports running with the GIL disabled
+    PyUnstable_Module_SetGIL(m , Py_MOD_GIL_USED);
+#endif
+
+#ifdef F2PY_REPORT_ATEXIT
+    if (! PyErr_Occurred())
+        on_exit(f2py_report_on_exit,(void*)"_siesta");
+#endif
+
+    if (PyType_Ready(&PyFortran_Type) < 0) {
+        return NULL;
+    }
+
+    return m;
+}
+#ifdef __cplusplus
+}
+#endif
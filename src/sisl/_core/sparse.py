@@ -1404,6 +1404,93 @@ column indices of the sparse elements
                 # each element have different data
                 self._D[index, :] = data[:, :]
 
+    def set_coo(self, rows, cols, data, mode: str = "add"):
+        """Set many elements at once from coordinate (COO) formatted data
+
+        Contrary to item assignment (``csr[i, j] = v``) the sparsity pattern is
+        not grown row by row. Instead all elements (existing and new) are
+        merged in one sort.
+        After this call the matrix is finalized (sorted and without non-used elements).
+
+        Parameters
+        ----------
+        rows : array_like
+           row indices of the elements
+        cols : array_like
+           column indices of the elements
+        data : array_like
+           values of the elements, either of shape ``(n,)`` (same value for all
+           dimensions), ``(n, dim)``, or anything broadcastable to ``(n, dim)``
+        mode : {"add", "replace"}
+           ``add`` adds the values to existing elements (duplicate entries are summed).
+           ``replace`` overwrites existing elements (for duplicate entries, the last
+           one takes precedence).
+
+        Raises
+        ------
+        IndexError
+            for indices out of bounds
+
+        Examples
+        --------
+        >>> csr = SparseCSR((2, 2))
+        >>> csr.set_coo([0, 1, 1], [0, 1, 1], [1., 2., 3.])
+        >>> csr.tocsr().toarray()
+        array([[1., 0.],
+               [0., 5.]])
+        """
+        if mode not in ("add", "replace"):
+            raise ValueError(
+                f"{self.__class__.__name__}.set_coo mode must be one of [add, replace]"
+            )
+        rows = _a.asarrayl(rows).ravel()
+        cols = _a.asarrayl(cols).ravel()
+        n = len(rows)
+        if len(cols) != n:
+            raise ValueError(
+                f"{self.__class__.__name__}.set_coo requires rows and cols to have same length"
+            )
+        if n == 0:
+            return
+
+        M, N, K = self.shape
+        if rows.min() < 0 or rows.max() >= M:
+            raise IndexError(f"row index is out-of-bounds {M}")
+        if cols.min() < 0 or cols.max() >= N:
+            raise IndexError(f"column index is out-of-bounds {N}")
+
+        data = asarray(data, dtype=self._D.dtype)
+        if data.ndim == 1 and data.shape[0] == n:
+            data = data.reshape(-1, 1)
+        data = np.broadcast_to(data, (n, K))
+
+        # Existing elements are placed first, a stable sort then
+        # ensures the new elements have precedence for mode=replace
+        r0, c0, D0 = _to_coo(self)
+        key = concatenate((r0.astype(np.int64) * N + c0, rows * N + cols))
+        D = concatenate((D0, data), axis=0)
+        del r0, c0, D0, rows, cols, data
+
+        idx = argsort(key, kind="stable")
+        key = key[idx]
+        D = D[idx]
+        del idx
+
+        # first index of each unique element
+        first = concatenate(([0], (diff(key) != 0).nonzero()[0] + 1))
+        if mode == "add":
+            D = np.add.reduceat(D, first, axis=0)
+        else:
+            D = D[concatenate((first[1:] - 1, [len(key) - 1]))]
+        rows, cols = np.divmod(key[first], N)
+
+        self.ncol = np.bincount(rows, minlength=M).astype(int32)
+        self.ptr = _ncol_to_indptr(self.ncol)
+        self.col = cols.astype(int32)
+        self._D = np.ascontiguousarray(D)
+        self._nnz = len(self.col)
+        self._finalized = True
+
     def __contains__(self, key):
         """Check whether a sparse index is non-zero"""
         # Get indices of sparse data (-1 if non-existing)
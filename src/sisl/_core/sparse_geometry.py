@@ -41,6 +41,117 @@ from .sparse import SparseCSR, _ncol_to_indptr, issparse
 __all__ = ["SparseAtom", "SparseOrbital"]
 
 
+def _construct_params(params):
+    """Parameters per shell as a 2D array, broadcasting scalars (as in ``self[ia, ix] = p``)"""
+    params = [np.atleast_1d(p) for p in params]
+    n = max(p.size for p in params)
+    return np.array([np.broadcast_to(p.ravel(), n) for p in params])
+
+
+def _construct_pairs(geometry, ias, atoms, atoms_xyz, R):
+    """All couplings between `ias` and `atoms` (in all supercells) within the shells of `R`
+
+    This is the vectorized equivalent of calling `Geometry.close` for each
+    atom in `ias`.
+
+    Returns
+    -------
+    rows : numpy.ndarray
+        the atoms in `ias` (one per coupling)
+    cols : numpy.ndarray
+        the supercell atomic indices (one per coupling)
+    shell : numpy.ndarray
+        the shell index (in `R`) of each coupling
+    """
+    R = _a.asarrayd(R).ravel()
+    ias = _a.asarrayi(ias).ravel()
+    atoms = _a.asarrayi(atoms).ravel()
+    xyz = geometry.xyz[ias]
+    na = geometry.na
+    lattice = geometry.lattice
+
+    rows, cols, shells = [], [], []
+    for s, isc in enumerate(lattice.sc_off):
+        dxa = atoms_xyz.reshape(1, -1, 3) + (lattice.offset(isc) - xyz).reshape(
+            -1, 1, 3
+        )
+        d = np.sqrt((dxa**2).sum(-1))
+        # d <= R[0] -> 0, R[0] < d <= R[1] -> 1, etc.
+        shell = searchsorted(R, d, side="left")
+        i, j = (shell < len(R)).nonzero()
+        rows.append(ias[i])
+        cols.append(atoms[j] + s * na)
+        shells.append(shell[i, j])
+
+    return concatenate(rows), concatenate(cols), concatenate(shells)
+
+
+def _construct_neighbor_pairs(geometry, R):
+    """All couplings in `geometry` within the shells of `R`, found using `NeighborFinder`
+
+    This is equivalent to calling `_construct_pairs` for all atoms, but the pairs
+    are found by binning the atoms, i.e. it scales linearly with the number of atoms.
+
+    Returns
+    -------
+    rows, cols, shell :
+        see `_construct_pairs`, or None if the lattice is too small for the
+        binning of the neighbor finder, or atoms are outside the cell along
+        directions without supercells (one should then use `_construct_pairs`)
+    """
+    from sisl.geom import NeighborFinder
+
+    R = _a.asarrayd(R).ravel()
+    lattice = geometry.lattice
+    na = geometry.na
+    pbc = lattice.nsc > 1
+
+    # The finder bins atoms wrapped into the unit cell, so we pass it the
+    # wrapped atoms and correct the supercell indices afterwards.
+    fxyz = geometry.fxyz
+    wrap = np.floor(fxyz).astype(np.int32)
+    if wrap[:, ~pbc].any():
+        # atoms outside the cell along directions without supercells
+        return None
+    # Atoms are kept strictly inside the cell (fxyz % 1 is used for the binning,
+    # so rounding errors at the cell boundaries would bin them in the wrong cell).
+    # The distances are calculated from the original coordinates.
+    wrapped = geometry.copy()
+    wrapped.xyz = np.clip(fxyz - wrap, 1e-12, 1 - 1e-12) @ lattice.cell
+
+    # The finder uses d < R, while the shells are using d <= R
+    finder = NeighborFinder(wrapped, R=R[-1] * (1 + 1e-10) + 1e-10)
+    if finder._R_too_big:
+        return None
+
+    # only search periodic images in directions with supercells
+    pairs = finder.find_all_unique_pairs(self_interaction=True, pbc=pbc)
+    i, j, isc = pairs[:, 0], pairs[:, 1], pairs[:, 2:]
+
+    # the finder only returns one of the unit-cell pairs (i, j) and (j, i)
+    # (supercell pairs are returned in both directions).
+    # So we add the transposed unit-cell couplings, except for the on-site ones
+    idx = ((i != j) & ~isc.any(1)).nonzero()[0]
+    i, j = concatenate((i, j[idx])), concatenate((j, i[idx]))
+    isc = concatenate((isc, isc[idx]))
+
+    # supercell indices of the (unwrapped) atoms
+    isc = isc - wrap[j] + wrap[i]
+
+    # remove couplings outside of the supercell
+    idx = (np.abs(isc) <= lattice.nsc // 2).all(1).nonzero()[0]
+    i, j, isc = i[idx], j[idx], isc[idx]
+
+    # shell index of each pair
+    xyz = geometry.xyz
+    d = np.sqrt(((xyz[j] - xyz[i] + isc @ lattice.cell) ** 2).sum(1))
+    shell = searchsorted(R, d, side="left")
+    idx = (shell < len(R)).nonzero()[0]
+    i, j, isc, shell = i[idx], j[idx], isc[idx], shell[idx]
+
+    return i, j + lattice.sc_index(isc) * na, shell
+
+
 class _SparseGeometry(NDArrayOperatorsMixin):
     """Sparse object containing sparse elements for a given geometry.
 
@@ -615,7 +726,7 @@ class _SparseGeometry(NDArrayOperatorsMixin):
 
     __iter__ = iter_nnz
 
-    def create_construct(self, R, params):
+    def create_construct(self, R, params, vectorized: bool = False):
         """Create a simple function for passing to the `construct` function.
 
         This is simply to leviate the creation of simplistic
@@ -644,6 +755,9 @@ class _SparseGeometry(NDArrayOperatorsMixin):
            coupling constants corresponding to the `R`
            ranges. ``params[0, :]`` are the elements
            for the all atoms within ``R[0]`` of each atom.
+        vectorized : bool, optional
+           return a vectorized function which handles all atoms in a block
+           at once (see `construct`).
 
         See Also
         --------
@@ -654,13 +768,31 @@ class _SparseGeometry(NDArrayOperatorsMixin):
                 f"{self.__class__.__name__}.create_construct got different lengths of `R` and `param`"
             )
 
-        def func(self, ia, atoms, atoms_xyz=None):
-            idx = self.geometry.close(ia, R=R, atoms=atoms, atoms_xyz=atoms_xyz)
-            for ix, p in zip(idx, params):
-                self[ia, ix] = p
+        P = _construct_params(params)
+
+        def values(self, rows, cols, shell):
+            return P[shell]
+
+        if vectorized:
+
+            def func(self, ias, atoms, atoms_xyz=None):
+                rows, cols, shell = _construct_pairs(
+                    self.geometry, ias, atoms, atoms_xyz, R
+                )
+                return rows, cols, values(self, rows, cols, shell)
+
+            func.vectorized = True
+
+        else:
+
+            def func(self, ia, atoms, atoms_xyz=None):
+                idx = self.geometry.close(ia, R=R, atoms=atoms, atoms_xyz=atoms_xyz)
+                for ix, p in zip(idx, params):
+                    self[ia, ix] = p
 
         func.R = R
         func.params = params
+        func.values = values
 
         return func
 
@@ -697,11 +829,31 @@ class _SparseGeometry(NDArrayOperatorsMixin):
         na_iR : int, optional
            number of atoms within the sphere for speeding
            up the `iter_block` loop.
-        method : {'rand', str}
-           method used in `Geometry.iter_block`, see there for details
+        method : {'rand', 'neighbors', str}
+           method used in `Geometry.iter_block`, see there for details.
+           If ``'neighbors'`` all couplings are found at once using the (linear scaling)
+           neighbor finder (`~sisl.geom.NeighborFinder`) and inserted in one go.
+           This requires `func` to be created by `create_construct`.
+           For lattices smaller than the neighbor binning this falls back
+           to the ``'rand'`` method.
+           Only ``'neighbors'`` scales linearly with the number of atoms, the
+           `Geometry.iter_block` methods calculate the distances between blocks of atoms.
         eta : bool, optional
            whether an ETA will be printed
 
+        Notes
+        -----
+        If `func` has the attribute ``vectorized`` set to true, it will be called
+        once per block of atoms (``ias`` instead of ``ia``) and it should *return*
+        the elements as ``rows, cols, data`` (coordinate format).
+        All elements are then inserted at once using `SparseCSR.set_coo`
+        (replacing existing elements) which is much faster for large systems.
+
+        >>> def func(self, ias, atoms, atoms_xyz=None):
+        ...     # calculate all couplings for the atoms in ias
+        ...     return rows, cols, data
+        >>> func.vectorized = True
+
         See Also
         --------
         create_construct : a generic function used to create a generic function which this routine requires
@@ -722,7 +874,7 @@ class _SparseGeometry(NDArrayOperatorsMixin):
                 )
 
             # Convert to a proper function
-            func = self.create_construct(func[0], func[1])
+            func = self.create_construct(func[0], func[1], vectorized=True)
 
         try:
             # if the function was created through `create_construct`, then
@@ -736,11 +888,47 @@ class _SparseGeometry(NDArrayOperatorsMixin):
         except AttributeError:
             R = None
 
+        if method == "neighbors":
+            values = getattr(func, "values", None)
+            if values is None:
+                raise ValueError(
+                    f"{self.__class__.__name__}.construct(method='neighbors') requires "
+                    "a function created by `create_construct`"
+                )
+            pairs = _construct_neighbor_pairs(self.geometry, func.R)
+            if pairs is not None:
+                rows, cols, shell = pairs
+                self._csr.set_coo(
+                    rows, cols, values(self, rows, cols, shell), mode="replace"
+                )
+                return
+            method = "rand"
+
         iR = self.geometry.iR(na_iR, R=R)
 
         # Create eta-object
         eta = progressbar(self.na, f"{self.__class__.__name__ }.construct", "atom", eta)
 
+        if getattr(func, "vectorized", False):
+            # Collect all elements and insert them at once
+            coo = []
+            for ias, idxs in self.geometry.iter_block(iR=iR, method=method, R=R):
+                idxs_xyz = self.geometry[idxs]
+                coo.append(func(self, ias, idxs, idxs_xyz))
+                eta.update(len(ias))
+
+            if len(coo) > 0:
+                rows, cols, data = zip(*coo)
+                del coo
+                self._csr.set_coo(
+                    concatenate(rows),
+                    concatenate(cols),
+                    concatenate(data, axis=0),
+                    mode="replace",
+                )
+            eta.close()
+            return
+
         # Do the loop
         for ias, idxs in self.geometry.iter_block(iR=iR, method=method, R=R):
             # Get all the indexed atoms...
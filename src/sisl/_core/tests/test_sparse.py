@@ -1610,3 +1610,36 @@ def test_fromsp_csr_large():
             csr_._D[idx, ic] += c.data[sl]
     if print_time:
         print(f"timing: slice(ptr[]:ptr[]) {time() - t0}")
+
+
+def test_set_coo_add():
+    s = SparseCSR((4, 6, 2))
+    s[0, 1] = 1.0
+    rows = [0, 0, 2, 2, 3]
+    cols = [1, 2, 3, 3, 5]
+    s.set_coo(rows, cols, np.ones(len(rows)))
+    assert s.finalized
+    assert s.nnz == 4
+    assert np.allclose(s[0, 1], 2.0)
+    assert np.allclose(s[0, 2], 1.0)
+    assert np.allclose(s[2, 3], 2.0)
+    assert np.allclose(s[3, 5], 1.0)
+
+
+def test_set_coo_replace():
+    s = SparseCSR((4, 6))
+    s[0, 1] = 1.0
+    s[1, 1] = 1.0
+    s.set_coo([0, 2, 2], [1, 3, 3], [4.0, 5.0, 6.0], mode="replace")
+    assert s.nnz == 3
+    assert s[0, 1] == 4.0
+    assert s[1, 1] == 1.0
+    assert s[2, 3] == 6.0
+
+
+def test_set_coo_fail():
+    s = SparseCSR((4, 6))
+    with pytest.raises(IndexError):
+        s.set_coo([4], [0], [1.0])
+    with pytest.raises(ValueError):
+        s.set_coo([0], [0], [1.0], mode="unknown")
@@ -109,6 +109,23 @@ class TestSparseAtom:
         with pytest.raises(ValueError):
             s1.construct([[0.1, 1.5], [1]])
 
+    @pytest.mark.parametrize("move", ["none", "outside", "jitter"])
+    def test_construct_neighbors_rand(self, move):
+        g = graphene().tile(8, 0).tile(8, 1)
+        if move == "outside":
+            g = g.move([-3, 7, 0])
+        elif move == "jitter":
+            rng = np.random.default_rng(2)
+            g = g.move(rng.uniform(-0.05, 0.05, g.xyz.shape) * [1, 1, 0])
+        R = [0.1, 1.5, 2.6]
+        s1 = SparseAtom(g)
+        s1.construct([R, [1, 2, 3]], method="rand")
+        s2 = SparseAtom(g)
+        s2.construct([R, [1, 2, 3]], method="neighbors")
+        assert s1.nnz == s2.nnz
+        assert s1.spsame(s2)
+        assert np.allclose((s1 - s2)._csr._D, 0)
+
     def test_untile1(self, setup):
         s1 = SparseAtom(setup.g)
         s1.construct([[0.1, 1.5], [1, 2]])
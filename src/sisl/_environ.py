@@ -105,6 +105,25 @@ register_environ_variable(
     process=int,
 )
 
+register_environ_variable(
+    "SISL_NUM_THREADS",
+    1,
+    "Number of threads used in compiled kernels (e.g. matrices at k-points)",
+    process=int,
+)
+
+register_environ_variable(
+    "SISL_POOL_BACKEND",
+    "auto",
+    dedent(
+        """\
+                          Backend used for parallel pools [auto, pathos, multiprocessing].
+                          auto uses pathos if available, otherwise the standard library.
+                          """
+    ),
+    process=lambda val: val.lower().strip(),
+)
+
 register_environ_variable(
     "SISL_TMP", ".sisl_tmp", "Path where temporary files should be stored", process=Path
 )
@@ -135,6 +154,27 @@ register_environ_variable(
     process=lambda val: val and val.lower().strip() in ["1", "t", "true"],
 )
 
+register_environ_variable(
+    "SISL_BATCH_SIZE",
+    128,
+    "Maximum size (in MB) of in-memory batches in calculations (e.g. energies in RecursiveSI, states in BasisGrid).",
+    process=float,
+)
+
+register_environ_variable(
+    "SISL_IO_BUFFER_SIZE",
+    128,
+    "Maximum size (in MB) of data blocks read at once from files (e.g. k-averaging of TBtrans quantities).",
+    process=float,
+)
+
+register_environ_variable(
+    "SISL_IO_CACHE_SIZE",
+    0,
+    "Maximum size (in MB) of the cache of data read from NetCDF files (per file), 0 disables the cache.",
+    process=float,
+)
+
 register_environ_variable(
     "SISL_IO_DEFAULT",
     "",
@@ -0,0 +1,285 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+r""" Internal persistent worker pools
+
+Worker pools are costly to create. Here we retain pools across calls
+so that subsequent parallel invocations re-use the already spawned
+processes.
+
+Large objects (e.g. a sparse matrix) are shipped to the workers
+through a memory-mapped file (located in shared memory when possible).
+Every task only holds a *reference* to the file, and the workers
+unpickle the object once, retaining it until a new object
+is requested.
+The numpy arrays contained in the object are pickled out-of-band
+and the workers map them directly from the file.
+"""
+import atexit
+import mmap
+import os
+import pickle
+import tempfile
+from pathlib import Path
+
+from ._environ import get_environ_variable
+
+__all__ = ["SharedPayload", "WorkerPool", "get_pool", "shutdown_pools", "chunk_ranges"]
+
+
+# The alignment of out-of-band buffers in the payload file
+_ALIGN = 64
+
+# Retained pools, keyed by (backend, nprocs)
+_POOLS = {}
+
+# Worker-side cache of loaded payloads, keyed by file path.
+# Only the last loaded payloads are retained.
+_LOADED = {}
+_LOADED_MAX = 2
+
+
+def _closure_pickle():
+    """Return a module capable of pickling closures/lambdas (``dill``), if available"""
+    try:
+        import dill
+
+        return dill
+    except ImportError:
+        return pickle
+
+
+def _shared_dir():
+    """Directory for storing payload files, preferably located in memory"""
+    shm = Path("/dev/shm")
+    if shm.is_dir() and os.access(shm, os.W_OK):
+        return str(shm)
+    return None
+
+
+class SharedPayload:
+    r"""An object stored once in a memory-mapped file, and lazily loaded by workers
+
+    Pickling this object only pickles the reference to the file, hence it
+    is cheap to pass to tasks.
+
+    Parameters
+    ----------
+    data :
+       the object that gets pickled with `pickle` (protocol 5) where contiguous
+       numpy arrays are stored out-of-band, i.e. workers do not copy them.
+    closure :
+       additional data which may contain lambdas or closures, these are
+       pickled with ``dill`` (if available).
+    """
+
+    __slots__ = ("path", "layout")
+
+    def __init__(self, data, closure=None):
+        buffers = []
+        data = pickle.dumps(data, protocol=5, buffer_callback=buffers.append)
+        closure = _closure_pickle().dumps(closure)
+
+        fd, path = tempfile.mkstemp(prefix="sisl_payload_", dir=_shared_dir())
+        layout = []
+        with os.fdopen(fd, "wb") as fh:
+
+            def write(b):
+                offset = fh.tell()
+                fh.write(b)
+                layout.append((offset, len(b)))
+
+            write(data)
+            write(closure)
+            for buf in buffers:
+                raw = buf.raw()
+                pad = -fh.tell() % _ALIGN
+                fh.write(b"\0" * pad)
+                write(raw)
+                raw.release()
+
+        self.path = path
+        self.layout = tuple(layout)
+
+    def __getstate__(self):
+        return self.path, self.layout
+
+    def __setstate__(self, state):
+        self.path, self.layout = state
+
+    def load(self):
+        """Load the payload (once per process), returns ``(data, closure)``"""
+        obj = _LOADED.get(self.path)
+        if obj is not None:
+            return obj
+
+        with open(self.path, "rb") as fh:
+            # copy-on-write, this ensures writeable arrays without
+            # altering the file (nor other workers arrays)
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_COPY)
+        view = memoryview(mm)
+        (off_d, n_d), (off_c, n_c), *layout = self.layout
+        buffers = [view[off : off + n] for off, n in layout]
+        data = pickle.loads(view[off_d : off_d + n_d], buffers=buffers)
+        closure = _closure_pickle().loads(view[off_c : off_c + n_c])
+
+        while len(_LOADED) >= _LOADED_MAX:
+            del _LOADED[next(iter(_LOADED))]
+        obj = _LOADED[self.path] = (data, closure)
+        return obj
+
+    def close(self):
+        """Remove the payload file (workers that have loaded it retains their data)"""
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def chunk_ranges(n: int, nprocs: int, chunks_per_proc: int = 4):
+    """Split ``range(n)`` into contiguous ``(start, stop)`` chunks suitable for `nprocs` workers"""
+    nchunks = max(1, min(n, nprocs * chunks_per_proc))
+    size, rem = divmod(n, nchunks)
+    ranges = []
+    start = 0
+    for i in range(nchunks):
+        stop = start + size + (1 if i < rem else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+class WorkerPool:
+    r"""Thin wrapper around different pool backends with a common interface
+
+    Parameters
+    ----------
+    pool :
+       the actual pool object, either a `concurrent.futures.Executor` or
+       a ``pathos`` like pool (implementing ``imap`` and ``uimap``)
+    nprocs :
+       number of workers in the pool
+    owned :
+       whether the pool is created (and hence retained and closed) by sisl
+    """
+
+    def __init__(self, pool, nprocs: int, owned: bool = True):
+        self.pool = pool
+        self.nprocs = nprocs
+        self.owned = owned
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.pool.__class__.__name__}, nprocs={self.nprocs}>"
+
+    def imap(self, func, *iterables, ordered: bool = True):
+        """Map `func` on the arguments, yielding results (in order if `ordered`)"""
+        from concurrent.futures import Executor, as_completed
+
+        if isinstance(self.pool, Executor):
+            if ordered:
+                yield from self.pool.map(func, *iterables)
+            else:
+                futures = [self.pool.submit(func, *args) for args in zip(*iterables)]
+                for future in as_completed(futures):
+                    yield future.result()
+        elif ordered:
+            yield from self.pool.imap(func, *iterables)
+        else:
+            yield from self.pool.uimap(func, *iterables)
+
+    def close(self):
+        """Shut down the pool (only if owned by sisl)"""
+        if not self.owned:
+            return
+        pool = self.pool
+        if hasattr(pool, "shutdown"):
+            pool.shutdown(wait=True)
+        else:
+            pool.close()
+            pool.join()
+            pool.clear()
+
+
+def _create_pool(backend: str, nprocs: int):
+    if backend == "auto":
+        try:
+            import pathos  # noqa: F401
+
+            backend = "pathos"
+        except ImportError:
+            backend = "multiprocessing"
+
+    if backend == "pathos":
+        import pathos as pos
+
+        pool = pos.pools.ProcessPool(nodes=nprocs)
+    elif backend == "multiprocessing":
+        from concurrent.futures import ProcessPoolExecutor
+
+        pool = ProcessPoolExecutor(max_workers=nprocs)
+    else:
+        raise ValueError(
+            f"sisl: unknown pool backend '{backend}', "
+            "should be one of [auto, pathos, multiprocessing]"
+        )
+    return WorkerPool(pool, nprocs)
+
+
+def get_pool(pool, backend: str = None):
+    r"""Retrieve a (persistent) pool from a user-argument
+
+    Parameters
+    ----------
+    pool : bool or int or WorkerPool or Executor or pathos-pool or None
+       if false or None, no pool is returned.
+       If true the number of processors will be ``SISL_NUM_PROCS``, an
+       integer explicitly requests that number of processors.
+       Otherwise a user-created pool will be wrapped (and *not* closed by sisl).
+    backend : {"auto", "pathos", "multiprocessing"}
+       which backend to use for creating pools, defaults to ``SISL_POOL_BACKEND``.
+       ``multiprocessing`` uses the standard library `concurrent.futures`.
+
+    Returns
+    -------
+    WorkerPool or None
+        None if no parallel execution is requested
+    """
+    if pool is False or pool is None:
+        return None
+    if isinstance(pool, WorkerPool):
+        return pool
+
+    if pool is True:
+        nprocs = get_environ_variable("SISL_NUM_PROCS")
+    elif isinstance(pool, int):
+        nprocs = pool
+    else:
+        # a user-defined pool
+        nprocs = getattr(pool, "_max_workers", None)
+        if nprocs is None:
+            nprocs = getattr(pool, "nodes", 1)
+        return WorkerPool(pool, nprocs, owned=False)
+
+    if nprocs <= 1:
+        return None
+    if backend is None:
+        backend = get_environ_variable("SISL_POOL_BACKEND")
+
+    key = (backend, nprocs)
+    if key not in _POOLS:
+        _POOLS[key] = _create_pool(backend, nprocs)
+    return _POOLS[key]
+
+
+@atexit.register
+def shutdown_pools():
+    """Shut down all pools retained by sisl"""
+    while _POOLS:
+        _, pool = _POOLS.popitem()
+        pool.close()
@@ -164,7 +164,10 @@ class NeighborFinder:
         # a position is exactly at the center of a bin.
         bin_size += 0.001
 
-        lattice_sizes = self.geometry.length
+        # The bins must be at least `bin_size` wide, perpendicular to
+        # the lattice planes (for non-orthogonal cells this is smaller
+        # than the lattice vector lengths).
+        lattice_sizes = self._plane_distances(self.geometry)
 
         self._R_too_big = np.any(bin_size > lattice_sizes)
         if self._R_too_big:
@@ -188,7 +191,7 @@ class NeighborFinder:
             )
 
             # Recompute lattice sizes
-            lattice_sizes = self._bins_geometry.length
+            lattice_sizes = self._plane_distances(self._bins_geometry)
 
         else:
             self._bins_geometry = self.geometry
@@ -205,6 +208,11 @@ class NeighborFinder:
         # and linear scaling manner.
         self._build_table(scalar_bin_indices)
 
+    @staticmethod
+    def _plane_distances(geometry):
+        """Distance between the lattice planes spanned by the other two lattice vectors"""
+        return 1 / np.linalg.norm(geometry.icell, axis=1)
+
     def _build_table(self, bin_indices):
         """Builds the tables that will allow efficient linear scaling neighbor search.
 
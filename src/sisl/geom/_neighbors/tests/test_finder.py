@@ -283,3 +283,21 @@ def test_bin_sizes():
     assert n3.nbins[0] == n4.nbins[0]
     assert n3.nbins[1] > n4.nbins[1]
     assert n3.nbins[2] > n4.nbins[2]
+
+
+def test_non_orthogonal_cell():
+    """Bins should be wide enough perpendicular to the lattice planes"""
+    geom = (
+        Geometry(
+            [[0, 0, 0], [1.42, 0, 0]],
+            lattice=np.array([[2.13, 1.229756, 0], [2.13, -1.229756, 0], [0, 0, 10]]),
+        )
+        .tile(20, 0)
+        .tile(20, 1)
+    )
+
+    finder = NeighborFinder(geom, R=1.5)
+    neighs = finder.find_neighbors(as_pairs=True, pbc=(True, True, False))
+
+    # all atoms in graphene have 3 neighbors
+    assert np.all(np.bincount(neighs[:, 0]) == 3)
@@ -4,8 +4,12 @@
 from re import compile as re_compile
 
 import numpy as np
+from numpy.lib.mixins import NDArrayOperatorsMixin
+
+from sisl._environ import get_environ_variable
 
 __all__ = ["starts_with_list", "header_to_dict", "grid_reduce_indices"]
+__all__ += ["LazyGridArray"]
 
 
 def starts_with_list(l, comments):
@@ -56,3 +60,120 @@ def grid_reduce_indices(grids, factors, axis=0, out=None):
         grid += np.take(grids, idx, axis=axis) * factor
 
     return grid
+
+
+class LazyGridArray(NDArrayOperatorsMixin):
+    r"""Grid values calculated on demand from (memory-mapped) arrays
+
+    The values are :math:`s\sum_i f_i A_i` where the arrays :math:`A_i`
+    (e.g. spin components) are typically memory-mapped views of a file.
+    Indexing only reads (and reduces) the indexed elements, and `sum` is
+    calculated in blocks.
+    Any other numpy operation, or `numpy.ndarray` method (e.g. ``max`` or ``reshape``),
+    reads the full array, as does `numpy.asarray`.
+
+    Parameters
+    ----------
+    arrays : list of numpy.ndarray
+       arrays with the same shape
+    factors : list of float
+       the factors of each array
+    scale : float, optional
+       a common scale of all arrays (e.g. unit conversion)
+    dtype : numpy.dtype, optional
+       data-type of the returned values
+    """
+
+    def __init__(self, arrays, factors, scale=1.0, dtype=np.float64):
+        self._arrays = [a for a, f in zip(arrays, factors) if f != 0]
+        self._factors = [f * scale for f in factors if f != 0]
+        if len(self._arrays) == 0:
+            # retain the shape
+            self._arrays = arrays[:1]
+            self._factors = [0.0]
+        self.dtype = np.dtype(dtype)
+        self.shape = self._arrays[0].shape
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def size(self):
+        return int(np.prod(self.shape))
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} shape={self.shape}, dtype={self.dtype}>"
+
+    def __getitem__(self, key):
+        out = None
+        for a, f in zip(self._arrays, self._factors):
+            if out is None:
+                out = np.multiply(a[key], f, dtype=self.dtype)
+            else:
+                out += a[key] * f
+        return out
+
+    def _blocks(self, axis):
+        """Slices of the array in blocks along `axis`, bounded by ``SISL_IO_BUFFER_SIZE``"""
+        size = get_environ_variable("SISL_IO_BUFFER_SIZE") * 1024**2
+        plane = self.size // max(1, self.shape[axis]) * self.dtype.itemsize
+        n = max(1, int(size // max(1, plane)))
+        for i in range(0, self.shape[axis], n):
+            key = [slice(None)] * self.ndim
+            key[axis] = slice(i, i + n)
+            yield tuple(key)
+
+    def __array__(self, dtype=None, copy=None):
+        out = np.empty(self.shape, dtype=self.dtype)
+        for key in self._blocks(self.ndim - 1):
+            out[key] = self[key]
+        if dtype is not None:
+            out = out.astype(dtype, copy=False)
+        return out
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        def conv(x):
+            if isinstance(x, LazyGridArray):
+                return np.asarray(x)
+            return x
+
+        inputs = tuple(map(conv, inputs))
+        if "out" in kwargs:
+            kwargs["out"] = tuple(map(conv, kwargs["out"]))
+        return getattr(ufunc, method)(*inputs, **kwargs)
+
+    def __getattr__(self, attr):
+        """Other `numpy.ndarray` attributes and methods (e.g. `max`, `reshape`), reading the full array"""
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+        return getattr(np.asarray(self), attr)
+
+    def astype(self, dtype, copy=True):
+        """Read the full array with data-type `dtype`"""
+        return np.asarray(self).astype(dtype, copy=False)
+
+    def sum(self, axis=None, dtype=None, out=None, keepdims=False, **kwargs):
+        """Sum of the values, calculated in blocks (see `numpy.sum`)"""
+        if axis is None or self.ndim == 1:
+            res = sum(self[key].sum(dtype=dtype) for key in self._blocks(self.ndim - 1))
+            if keepdims:
+                res = np.full([1] * self.ndim, res)
+        else:
+            axis = axis % self.ndim
+            # block along the slowest axis (in the files) not being summed
+            b = self.ndim - 1 if axis != self.ndim - 1 else self.ndim - 2
+            shape = list(self.shape)
+            shape[axis] = 1
+            res = np.empty(shape, dtype=dtype or self.dtype)
+            for key in self._blocks(b):
+                res[key] = self[key].sum(axis=axis, keepdims=True, dtype=dtype)
+            if not keepdims:
+                res = res.reshape(shape[:axis] + shape[axis + 1 :])
+        if out is not None:
+            out[...] = res
+            return out
+        return res
@@ -1,9 +1,13 @@
 # This Source Code Form is subject to the terms of the Mozilla Public
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import re
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 
 from sisl import Atom, Geometry, Grid, Lattice, SislError
+from sisl._environ import get_environ_variable
 from sisl._internal import set_module
 
 # Import sile objects
@@ -16,6 +20,116 @@ from ._help import header_to_dict
 __all__ = ["cubeSile"]
 
 
+# formats that can be handled by the fixed-width formatter, i.e. ``.5e``
+_FMT_E = re.compile(r"^\.([1-9])e$")
+
+
+def _fmt_e(values, prec: int):
+    """Characters of `values` formatted as ``{:.<prec>e}`` (non-negative values with a leading space)
+
+    The digits are rounded in floating point, values too close to a rounding
+    boundary (where this may differ from the correctly rounded digits) are
+    formatted by `str.format`.
+
+    Returns
+    -------
+    numpy.ndarray
+        ``uint8`` array of shape ``(values.size, prec + 7)``, or None if
+        the values can not be formatted with 2-digit exponents (or are not finite)
+    """
+    values = values.ravel()
+    a = np.fabs(values)
+    if not np.isfinite(a).all():
+        return None
+
+    nonzero = a > 0
+    e = np.zeros(a.shape, np.int64)
+    e[nonzero] = np.floor(np.log10(a[nonzero]))
+    if np.any(np.abs(e) > 99):
+        return None
+
+    scale = 10**prec
+
+    # values whose digits are too close to a rounding boundary (x.5)
+    close = np.zeros(a.shape, dtype=bool)
+
+    def mantissa(idx, e):
+        # powers of 10 are exact up to 1e22, dividing keeps a single rounding
+        p = prec - e
+        x = np.where(p >= 0, a[idx] * 10.0 ** np.abs(p), a[idx] / 10.0 ** np.abs(p))
+        close[idx] |= np.fabs(x - np.floor(x) - 0.5) <= 8 * np.spacing(x)
+        return np.rint(x)
+
+    d = mantissa(slice(None), e)
+    # correct for inaccuracies of log10 and rounding to the next decade
+    idx = (nonzero & (d < scale)).nonzero()[0]
+    e[idx] -= 1
+    d[idx] = mantissa(idx, e[idx])
+    idx = (d >= scale * 10).nonzero()[0]
+    e[idx] += 1
+    d[idx] = mantissa(idx, e[idx])
+    if np.any(np.abs(e) > 99):
+        return None
+
+    d = d.astype(np.int64)
+    out = np.empty([len(a), prec + 7], np.uint8)
+    out[:, 0] = np.where(np.signbit(values), ord("-"), ord(" "))
+    for i in range(prec + 2, 2, -1):
+        out[:, i] = ord("0") + d % 10
+        d //= 10
+    out[:, 1] = ord("0") + d
+    out[:, 2] = ord(".")
+    out[:, prec + 3] = ord("e")
+    out[:, prec + 4] = np.where(e < 0, ord("-"), ord("+"))
+    e = np.abs(e)
+    out[:, prec + 5] = ord("0") + e // 10
+    out[:, prec + 6] = ord("0") + e % 10
+
+    idx = close.nonzero()[0]
+    if len(idx) > 0:
+        _fmt = "{:" + f".{prec}e" + "}"
+        for i in idx:
+            v = _fmt.format(values[i])
+            if v[0] != "-":
+                v = f" {v}"
+            if len(v) != out.shape[1]:
+                return None
+            out[i] = np.frombuffer(v.encode("ascii"), np.uint8)
+    return out
+
+
+def _cube_lines(values, fmt: str) -> str:
+    """Format the rows of `values` as lines of at most 6 values
+
+    Each row (last dimension) of `values` starts on a new line.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = values.shape[-1]
+    nrow = values.size // n
+    sep = np.full(n, ord(" "), np.uint8)
+    sep[5::6] = ord("\n")
+    sep[-1] = ord("\n")
+
+    m = _FMT_E.match(fmt)
+    chars = None
+    if m is not None:
+        chars = _fmt_e(values, int(m.group(1)))
+
+    if chars is None:
+        # generic (slow) formatting
+        _fmt = "".join("{:" + fmt + "}" + chr(c) for c in sep)
+        return (_fmt * nrow).format(*values.ravel().tolist())
+
+    w = chars.shape[1]
+    out = np.empty([nrow * n, w + 1], np.uint8)
+    out[:, :w] = chars
+    out[:, w] = np.tile(sep, nrow)
+    # remove the leading space of non-negative values
+    keep = np.ones(out.shape, dtype=bool)
+    keep[:, 0] = chars[:, 0] != ord(" ")
+    return out[keep].tobytes().decode("ascii")
+
+
 @set_module("sisl.io")
 class cubeSile(Sile):
     """CUBE file object
@@ -144,32 +258,64 @@ class cubeSile(Sile):
         self,
         grid: Grid,
         fmt: str = ".5e",
-        imag: bool = False,
+        imag=False,
         unit: str = "Bohr",
         *args,
         **kwargs,
     ):
         """Write `Grid` to the contained file
 
+        The grid is written plane-by-plane (along the first lattice vector)
+        to limit the memory usage. Formats of the form ``.Ne`` (such as the
+        default) use a fast fixed-width formatter, other formats are
+        formatted with `str.format`.
+
+        Files ending with ``.gz`` are compressed while writing.
+
         Parameters
         ----------
         grid :
            the grid to be written in the CUBE file
         fmt :
            format used for precision output
-        imag :
+        imag : bool or str or Sile
            write only imaginary part of the grid, default to only writing the
            real part.
+           If a file (or Sile), the real part is written to this file
+           and the imaginary part to `imag`, concurrently in two threads.
         unit:
             what length unit should the cube file data be written in.
             The grid data is assumed to be unit-less, this unit only refers
             to the lattice vectors and atomic coordinates.
-        buffersize : int, optional
-           size of the buffer while writing the data, (6144)
+
+        Examples
+        --------
+        Write the real and imaginary part of a wavefunction to separate (compressed) files
+
+        >>> psi = Grid(0.1, geometry=geom, dtype=np.complex128)
+        >>> cubeSile("psi_real.cube.gz", "w").write_grid(psi, imag="psi_imag.cube.gz")
         """
         # Check that we can write to the file
         sile_raise_write(self)
 
+        if imag is None or isinstance(imag, (bool, np.bool_)):
+            self._w_grid(grid, fmt, bool(imag), unit, *args, **kwargs)
+            return
+
+        if not isinstance(imag, BaseSile):
+            imag = self.__class__(imag, mode="w")
+        with ThreadPoolExecutor(2) as executor:
+            jobs = [
+                executor.submit(self._w_grid, grid, fmt, False, unit, *args, **kwargs),
+                executor.submit(
+                    imag.write_grid, grid, fmt, True, unit, *args, **kwargs
+                ),
+            ]
+            for job in jobs:
+                job.result()
+
+    def _w_grid(self, grid, fmt, imag, unit, *args, **kwargs):
+        """Write the header and the real (or imaginary) part of the grid data"""
         if grid.geometry is None:
             self.write_lattice(
                 grid.lattice, size=grid.shape, unit=unit, *args, **kwargs
@@ -179,42 +325,21 @@ class cubeSile(Sile):
                 grid.geometry, size=grid.shape, unit=unit, *args, **kwargs
             )
 
-        buffersize = kwargs.get("buffersize", min(6144, grid.grid.size))
-        buffersize += buffersize % 6  # ensure multiple of 6
-
         # A CUBE file contains grid-points aligned like this:
         # for x
         #   for y
         #     for z
         #       write...
-        _fmt1 = "{:" + fmt + "} "
-        _fmt6 = (_fmt1 * 6)[:-1] + "\n"
-        __fmt = _fmt6 * (buffersize // 6)
-
-        if imag:
-            for z in np.nditer(
-                np.asarray(grid.grid.imag, order="C").reshape(-1),
-                flags=["external_loop", "buffered"],
-                op_flags=[["readonly"]],
-                order="C",
-                buffersize=buffersize,
-            ):
-                if z.shape[0] != buffersize:
-                    s = z.shape[0]
-                    __fmt = _fmt6 * (s // 6) + _fmt1 * (s % 6) + "\n"
-                self._write(__fmt.format(*z.tolist()))
-        else:
-            for z in np.nditer(
-                np.asarray(grid.grid.real, order="C").reshape(-1),
-                flags=["external_loop", "buffered"],
-                op_flags=[["readonly"]],
-                order="C",
-                buffersize=buffersize,
-            ):
-                if z.shape[0] != buffersize:
-                    s = z.shape[0]
-                    __fmt = _fmt6 * (s // 6) + _fmt1 * (s % 6) + "\n"
-                self._write(__fmt.format(*z.tolist()))
+        # with z-rows broken in lines of 6 values.
+        # Write a plane at a time to not hold the formatted grid in memory.
+        data = grid.grid
+        for ix in range(grid.shape[0]):
+            plane = np.asarray(data[ix])
+            if imag:
+                plane = plane.imag
+            else:
+                plane = plane.real
+            self._write(_cube_lines(plane, fmt))
 
         # Add a finishing line to ensure empty ending
         self._write("\n")
@@ -277,10 +402,56 @@ class cubeSile(Sile):
 
         return Geometry(xyz * unit2Ang, atom, lattice=lattice)
 
+    def _r_grid_values(self, out):
+        """Parse the grid values into the flat array `out`, in blocks of text
+
+        Values may be distributed over lines arbitrarily (1-column and 6-column
+        data are both accepted). Only a block (at most ``SISL_IO_BUFFER_SIZE`` MB)
+        of the text is held in memory.
+        """
+        size = max(1024, int(get_environ_variable("SISL_IO_BUFFER_SIZE") * 1024**2))
+        n = len(out)
+        i = 0
+        rest = ""
+
+        def parse(text):
+            nonlocal i
+            values = np.fromstring(text, dtype=out.dtype, sep=" ")
+            if i + len(values) > n:
+                raise SileError(
+                    f"{self!s} contains more grid values than the grid shape allows."
+                )
+            out[i : i + len(values)] = values
+            i += len(values)
+
+        while True:
+            text = self.fh.read(size)
+            if not text:
+                break
+            text = rest + text
+            # the last value may be split in the next block
+            idx = max(text.rfind(" "), text.rfind("\n"))
+            if idx < 0:
+                rest = text
+                continue
+            rest = text[idx:]
+            parse(text[:idx])
+        if rest.strip():
+            parse(rest)
+
+        if i != n:
+            raise SileError(
+                f"{self!s} contains {i} grid values, expected {n} from the grid shape."
+            )
+
     @sile_fh_open()
     def read_grid(self, imag=None):
         """Returns `Grid` object from the CUBE file
 
+        The grid values are parsed in blocks of text, and may be stored
+        with any number of values per line. Files ending with ``.gz`` are
+        decompressed while reading.
+
         Parameters
         ----------
         imag : str or Sile or Grid
@@ -317,11 +488,7 @@ class cubeSile(Sile):
             grid = Grid(ngrid, dtype=np.float64, geometry=geom)
         grid.grid.shape = (-1,)
 
-        # TODO check performance of this
-        # We are currently doing this to enable reading
-        #  1-column data and 6-column data.
-        lines = [item for sublist in self.fh.readlines() for item in sublist.split()]
-        grid.grid[:] = np.array(lines).astype(grid.dtype, copy=False)
+        self._r_grid_values(grid.grid)
         grid.grid.shape = ngrid
 
         if imag is None:
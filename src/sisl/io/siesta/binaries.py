@@ -34,7 +34,7 @@ from sisl.physics.overlap import Overlap
 from sisl.physics.sparse import SparseOrbitalBZ
 from sisl.unit.siesta import unit_convert
 
-from .._help import grid_reduce_indices
+from .._help import LazyGridArray, grid_reduce_indices
 from ..sile import SileError, SileWarning, add_sile
 from ._help import *
 from .sile import SileBinSiesta
@@ -1917,7 +1917,39 @@ class _gridSileSiesta(SileBinSiesta):
         self._fortran_check("read_grid_size", "could not read grid sizes.")
         return nspin, mesh
 
-    def read_grid(self, index=0, dtype=np.float64, *args, **kwargs):
+    def _grid_arrays(self, nspin, mesh):
+        """Memory-mapped spin components of the grid (shape `mesh`)
+
+        The file consists of (Fortran sequential) records, the cell, the mesh and
+        number of spin components, and then one record per ``(y, z, spin)`` line of the grid.
+        If the file does not have the expected layout (record markers or precision)
+        None is returned.
+        """
+        fsize = self.file.stat().st_size
+        nrec = nspin * mesh[1] * mesh[2]
+        for marker in (np.int32, np.int64):
+            msize = np.dtype(marker).itemsize
+            offset = 4 * msize + 9 * 8 + 4 * 4
+            for value in (np.float32, np.float64):
+                vsize = np.dtype(value).itemsize
+                if offset + nrec * (2 * msize + mesh[0] * vsize) != fsize:
+                    continue
+                head = np.fromfile(self.file, dtype=marker, count=1)
+                first = np.fromfile(self.file, dtype=marker, count=1, offset=offset)
+                if head[0] != 9 * 8 or first[0] != mesh[0] * vsize:
+                    continue
+                rec = np.dtype([("h", marker), ("v", value, mesh[0]), ("t", marker)])
+                data = np.memmap(
+                    self.file,
+                    dtype=rec,
+                    mode="r",
+                    offset=offset,
+                    shape=(nspin, mesh[2], mesh[1]),
+                )["v"]
+                return [data[ispin].transpose(2, 1, 0) for ispin in range(nspin)]
+        return None
+
+    def read_grid(self, index=0, dtype=np.float64, *args, lazy: bool = False, **kwargs):
         """Read grid contained in the Grid file
 
         Parameters
@@ -1929,6 +1961,11 @@ class _gridSileSiesta(SileBinSiesta):
            Default to the first component.
         dtype : numpy.float64, optional
            default data-type precision
+        lazy : bool, optional
+           the grid values are read on demand from the memory-mapped file (see `LazyGridArray`).
+           Only the requested values are read when indexing the grid (e.g. `Grid.sub` and
+           `Grid.sub_part`), and `Grid.sum` and `Grid.average` are calculated in blocks.
+           Other operations (e.g. in-place arithmetic) read the full grid.
         spin : optional
            same as `index` argument. `spin` argument has precedence.
         """
@@ -1936,8 +1973,6 @@ class _gridSileSiesta(SileBinSiesta):
         # Read the sizes and cell
         nspin, mesh = self.read_grid_size()
         lattice = self.read_lattice()
-        grid = _siesta.read_grid(self.file, nspin, mesh[0], mesh[1], mesh[2])
-        self._fortran_check("read_grid", "could not read grid.")
 
         if isinstance(index, str):
             index = index.lower()
@@ -1957,17 +1992,42 @@ class _gridSileSiesta(SileBinSiesta):
                     f"{self.__class__.__name__}.read_grid got a wrong spin request for the grid values."
                 )
 
-        if isinstance(index, Integral):
-            grid = grid[:, :, :, index]
-        else:
-            grid = grid_reduce_indices(grid, index, axis=-1)
-
         # Simply create the grid (with no information)
         # We will overwrite the actual grid
         g = Grid([1, 1, 1], lattice=lattice)
-        # NOTE: there is no need to swap-axes since the returned array is in F ordering
-        #       and thus the first axis is the fast (x, y, z) is retained
-        g.grid = grid * self.grid_unit
+
+        arrays = self._grid_arrays(nspin, mesh)
+        if arrays is None:
+            if lazy:
+                warn(
+                    f"{self.__class__.__name__}.read_grid could not memory-map the file, reading the full grid."
+                )
+            grid = _siesta.read_grid(self.file, nspin, mesh[0], mesh[1], mesh[2])
+            self._fortran_check("read_grid", "could not read grid.")
+
+            if isinstance(index, Integral):
+                grid = grid[:, :, :, index]
+            else:
+                grid = grid_reduce_indices(grid, index, axis=-1)
+
+            # NOTE: there is no need to swap-axes since the returned array is in F ordering
+            #       and thus the first axis is the fast (x, y, z) is retained
+            g.grid = (grid * self.grid_unit).astype(dtype, copy=False)
+            return g
+
+        if isinstance(index, Integral):
+            factors = _a.zerosd(nspin)
+            factors[index] = 1.0
+        else:
+            factors = index
+            if len(factors) > nspin:
+                raise ValueError(
+                    f"{self.__class__.__name__}.read_grid got a wrong spin request for the grid values."
+                )
+        grid = LazyGridArray(arrays, factors, scale=self.grid_unit, dtype=dtype)
+        if not lazy:
+            grid = np.asarray(grid)
+        g.grid = grid
         return g
 
 
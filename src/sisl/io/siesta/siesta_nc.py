@@ -150,7 +150,7 @@ class ncSileSiesta(SileCDFSiesta):
 
         if "BASIS" in self.groups:
             basis = self.read_basis()
-            species = self.groups["BASIS"].variables["basis"][:] - 1
+            species = self._value("basis", "BASIS") - 1
             atom = Atoms([basis[i] for i in species])
         else:
             atom = Atom(1)
@@ -176,24 +176,21 @@ class ncSileSiesta(SileCDFSiesta):
         # First read the geometry
         geom = self.read_geometry()
 
-        # Populate the things
-        sp = self.groups["SPARSE"]
-
         # Now create the tight-binding stuff (we re-create the
         # array, hence just allocate the smallest amount possible)
         C = cls(geom, dim, nnzpr=1)
 
-        C._csr.ncol = np.array(sp.variables["n_col"][:], np.int32)
+        C._csr.ncol = np.array(self._value("n_col", "SPARSE"), np.int32)
         # Update maximum number of connections (in case future stuff happens)
         C._csr.ptr = _ncol_to_indptr(C._csr.ncol)
-        C._csr.col = np.array(sp.variables["list_col"][:], np.int32) - 1
+        C._csr.col = np.array(self._value("list_col", "SPARSE"), np.int32) - 1
 
         # Copy information over
         C._csr._nnz = len(C._csr.col)
         C._csr._D = np.empty([C._csr.ptr[-1], dim], np.float64)
 
         # Convert from isc to sisl isc
-        _csr_from_sc_off(C.geometry, sp.variables["isc_off"][:, :], C._csr)
+        _csr_from_sc_off(C.geometry, self._value("isc_off", "SPARSE"), C._csr)
 
         return C
 
@@ -204,23 +201,20 @@ class ncSileSiesta(SileCDFSiesta):
         # First read the geometry
         geom = self.read_geometry()
 
-        # Populate the things
-        sp = self.groups["SPARSE"]
-
         # Since we may read in an orthogonal basis (stored in a Siesta compliant file)
         # we can check whether it is orthogonal by checking the sum of the absolute S
         # I.e. whether only diagonal elements are present.
-        S = np.array(sp.variables["S"][:], np.float64)
+        S = np.array(self._value("S", "SPARSE"), np.float64)
         orthogonal = np.abs(S).sum() == geom.no
 
         # Now create the tight-binding stuff (we re-create the
         # array, hence just allocate the smallest amount possible)
         C = cls(geom, spin, nnzpr=1, orthogonal=orthogonal)
 
-        C._csr.ncol = np.array(sp.variables["n_col"][:], np.int32)
+        C._csr.ncol = np.array(self._value("n_col", "SPARSE"), np.int32)
         # Update maximum number of connections (in case future stuff happens)
         C._csr.ptr = _ncol_to_indptr(C._csr.ncol)
-        C._csr.col = np.array(sp.variables["list_col"][:], np.int32) - 1
+        C._csr.col = np.array(self._value("list_col", "SPARSE"), np.int32) - 1
 
         # Copy information over
         C._csr._nnz = len(C._csr.col)
@@ -231,7 +225,7 @@ class ncSileSiesta(SileCDFSiesta):
             C._csr._D[:, C.S_idx] = S
 
         # Convert from isc to sisl isc
-        _csr_from_sc_off(C.geometry, sp.variables["isc_off"][:, :], C._csr)
+        _csr_from_sc_off(C.geometry, self._value("isc_off", "SPARSE"), C._csr)
 
         return C
 
@@ -239,8 +233,7 @@ class ncSileSiesta(SileCDFSiesta):
         """Returns a overlap matrix from the underlying NetCDF file"""
         S = self._r_class(Overlap, **kwargs)
 
-        sp = self.groups["SPARSE"]
-        S._csr._D[:, 0] = sp.variables["S"][:]
+        S._csr._D[:, 0] = self._value("S", "SPARSE")
 
         return S.transpose(sort=kwargs.get("sort", True))
 
@@ -255,7 +248,7 @@ class ncSileSiesta(SileCDFSiesta):
             )
 
         for i in range(len(H.spin)):
-            H._csr._D[:, i] = sp.variables["H"][i, :] * Ry2eV
+            H._csr._D[:, i] = self._value("H", "SPARSE", i) * Ry2eV
 
         # fix siesta specific notation
         _mat_spin_convert(H)
@@ -279,7 +272,7 @@ class ncSileSiesta(SileCDFSiesta):
             raise SileError(
                 f"{self}.read_dynamical_matrix requires the stored matrix to be in Ry**2!"
             )
-        D._csr._D[:, 0] = sp.variables["H"][0, :] * Ry2eV**2
+        D._csr._D[:, 0] = self._value("H", "SPARSE", 0) * Ry2eV**2
 
         return D.transpose(sort=kwargs.get("sort", True))
 
@@ -288,9 +281,8 @@ class ncSileSiesta(SileCDFSiesta):
         # This also adds the spin matrix
         DM = self._r_class_spin(DensityMatrix, **kwargs)
 
-        sp = self.groups["SPARSE"]
         for i in range(len(DM.spin)):
-            DM._csr._D[:, i] = sp.variables["DM"][i, :]
+            DM._csr._D[:, i] = self._value("DM", "SPARSE", i)
 
         # fix siesta specific notation
         _mat_spin_convert(DM)
@@ -308,9 +300,9 @@ class ncSileSiesta(SileCDFSiesta):
 
         sp = self.groups["SPARSE"]
         for i in range(len(EDM.spin)):
-            EDM._csr._D[:, i] = sp.variables["EDM"][i, :] * Ry2eV
+            EDM._csr._D[:, i] = self._value("EDM", "SPARSE", i) * Ry2eV
             if i < 2 and "DM" in sp.variables:
-                EDM._csr._D[:, i] -= sp.variables["DM"][i, :] * Ef[i]
+                EDM._csr._D[:, i] -= self._value("DM", "SPARSE", i) * Ef[i]
 
         # fix siesta specific notation
         _mat_spin_convert(EDM)
@@ -393,10 +385,10 @@ class ncSileSiesta(SileCDFSiesta):
             "Chlocal": 1.0 / BohrC2AngC,
         }.get(name, 1.0)
 
-        if len(v[:].shape) == 3:
-            grid.grid = v[:, :, :] * unit
+        if v.ndim == 3:
+            grid.grid = self._value(name, "GRID") * unit
         elif isinstance(index, Integral):
-            grid.grid = v[index, :, :, :] * unit
+            grid.grid = self._value(name, "GRID", index) * unit
         else:
             grid_reduce_indices(v, np.array(index) * unit, axis=0, out=grid.grid)
 
@@ -35,3 +35,77 @@ def test_si_pdos_kgrid_grid_fdf(sisl_files):
     VT = si.read_grid("VT", order="bin")
     TotPot = si.read_grid("totalpotential", order="bin")
     assert np.allclose(VT.grid, TotPot.grid)
+
+
+def _write_grid_bin(f, cell, grid):
+    """Write a grid file with the Fortran record layout, `grid` is (nspin, nx, ny, nz)"""
+
+    def record(a):
+        a = np.asarray(a)
+        n = np.array([a.nbytes], dtype=np.int32)
+        return n.tobytes() + a.tobytes() + n.tobytes()
+
+    nspin, nx, ny, nz = grid.shape
+    with open(f, "wb") as fh:
+        fh.write(record(np.asarray(cell, dtype=np.float64).T))
+        fh.write(record(np.array([nx, ny, nz, nspin], dtype=np.int32)))
+        for ispin in range(nspin):
+            for iz in range(nz):
+                for iy in range(ny):
+                    fh.write(record(grid[ispin, :, iy, iz].astype(np.float32)))
+
+
+@pytest.mark.parametrize("lazy", [True, False])
+def test_grid_bin_lazy(sisl_tmp, lazy):
+    f = sisl_tmp("lazy.RHO")
+    rng = np.random.default_rng(5)
+    data = rng.random([2, 4, 5, 6]).astype(np.float32)
+    cell = np.diag([2.0, 3.0, 4.0])
+    _write_grid_bin(f, cell, data)
+    unit = 1 / sisl.unit.siesta.unit_convert("Bohr", "Ang") ** 3
+
+    sile = sisl.get_sile(f)
+    grid = sile.read_grid(lazy=lazy)
+    assert isinstance(grid.grid, sisl.io._help.LazyGridArray) == lazy
+    assert grid.shape == (4, 5, 6)
+    assert np.allclose(grid.cell, cell * sisl.unit.siesta.unit_convert("Bohr", "Ang"))
+    assert np.allclose(grid.grid, data[0] * unit)
+    assert np.allclose(grid[1, 2:4, -1], data[0, 1, 2:4, -1] * unit)
+    assert np.allclose(grid.sub_part(3, 2, True).grid, data[0, :, :, 3:] * unit)
+    for axis in range(3):
+        assert np.allclose(
+            grid.average(axis).grid, data[0].mean(axis, keepdims=True) * unit
+        )
+
+    # ndarray methods read the full grid
+    assert grid.grid.max() == pytest.approx(data[0].max() * unit)
+    assert grid.grid.min() == pytest.approx(data[0].min() * unit)
+    assert grid.grid.mean() == pytest.approx(data[0].mean() * unit)
+    assert np.allclose(grid.grid.reshape(-1), data[0].reshape(-1) * unit)
+
+    grid = sile.read_grid(index=[0.5, -1], lazy=lazy)
+    assert np.allclose(grid.grid, (data[0] * 0.5 - data[1]) * unit)
+    grid = sile.read_grid(spin=1, lazy=lazy)
+    assert np.allclose(grid.grid, data[1] * unit)
+    assert np.allclose(grid.sum(1).grid, data[1].sum(1, keepdims=True) * unit)
+    # arithmetic reads the full grid
+    grid *= 2
+    assert isinstance(grid.grid, np.ndarray)
+    assert np.allclose(grid.grid, data[1] * unit * 2)
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+def test_grid_bin_fortran(sisl_tmp, monkeypatch, dtype):
+    pytest.importorskip("sisl.io.siesta._siesta")
+    f = sisl_tmp("fortran.VT")
+    rng = np.random.default_rng(6)
+    data = rng.random([2, 3, 4, 5]).astype(np.float32)
+    _write_grid_bin(f, np.diag([2.0, 3.0, 4.0]), data)
+    sile = sisl.get_sile(f)
+    grid = sile.read_grid(index=[1, 1], dtype=dtype)
+    assert grid.grid.dtype == dtype
+    # force reading through the Fortran routines
+    monkeypatch.setattr(sile, "_grid_arrays", lambda nspin, mesh: None)
+    fgrid = sile.read_grid(index=[1, 1], dtype=dtype)
+    assert fgrid.grid.dtype == dtype
+    assert np.allclose(grid.grid, fgrid.grid)
@@ -1,6 +1,7 @@
 # This Source Code Form is subject to the terms of the Mozilla Public
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import os
 import os.path as osp
 
 import numpy as np
@@ -59,6 +60,48 @@ def test_nc2(sisl_tmp, sisl_system):
     assert sisl_system.g.atoms.equal(ntb.atoms, R=False)
 
 
+def test_nc_cache(sisl_tmp, sisl_system):
+    f = sisl_tmp("gr_cache.nc", _dir)
+    tb = Hamiltonian(sisl_system.gtb, orthogonal=False)
+    tb.construct([sisl_system.R, sisl_system.tS])
+    tb.write(ncSileSiesta(f, "w"))
+
+    nc = ncSileSiesta(f, cache_size=1)
+    H1 = nc.read_hamiltonian()
+    info = nc.cache_info()
+    assert info.hits == 0
+    assert info.entries == info.misses
+    assert 0 < info.size <= info.max_size
+
+    H2 = nc.read_hamiltonian()
+    # the matrix is read from the cache (the geometry is only read once)
+    assert nc.cache_info().misses == info.misses
+    nread = nc.cache_info().hits
+    assert nread > 0
+    assert np.allclose(H1._csr._D, H2._csr._D)
+
+    # modifying the returned data does not change the cache
+    nc._value("H", "SPARSE", 0)[:] = 0.0
+    assert np.allclose(H1._csr._D, nc.read_hamiltonian()._csr._D)
+
+    # touching the file invalidates the cache
+    stat = osp.getmtime(f)
+    os.utime(f, (stat + 10, stat + 10))
+    nc.read_hamiltonian()
+    assert nc.cache_info().misses == info.misses + nread
+
+    nc.cache_clear()
+    info = nc.cache_info()
+    assert info.hits == info.misses == info.entries == info.size == 0
+
+    # too small cache, nothing gets stored
+    nc = ncSileSiesta(f, cache_size=1e-6)
+    nc.read_hamiltonian()
+    nc.read_hamiltonian()
+    info = nc.cache_info()
+    assert info.hits == info.entries == 0
+
+
 def test_nc_multiple_fail(sisl_tmp, sisl_system):
     # writing two different sparse matrices to the same
     # file will fail
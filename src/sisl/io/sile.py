@@ -4,7 +4,9 @@
 from __future__ import annotations
 
 import gzip
+import os
 import re
+from collections import OrderedDict
 from functools import reduce, wraps
 from io import TextIOBase
 from itertools import product
@@ -14,11 +16,13 @@ from pathlib import Path
 from textwrap import dedent, indent
 from typing import Any, Callable, Optional, Union
 
+import numpy as np
+
 import sisl.io._exceptions as _exceptions
 from sisl._environ import get_environ_variable
 from sisl._internal import set_module
 from sisl.messages import SislInfo, SislWarning, deprecate, info, warn
-from sisl.utils.misc import str_spec
+from sisl.utils.misc import PropertyDict, str_spec
 
 from ._exceptions import *
 from ._help import *
@@ -1059,8 +1063,11 @@ class Sile(Info, BaseSile):
                     # assume the file is a text file and open in text-mode
                     self.fh = gzip.open(str(self.file), mode="rt")
                 else:
-                    # assume this is opening in binary or write mode
-                    self.fh = gzip.open(str(self.file), mode=self._mode)
+                    # text siles are written in text-mode, gzip defaults to binary
+                    mode = self._mode
+                    if "b" not in mode and "t" not in mode:
+                        mode = mode + "t"
+                    self.fh = gzip.open(str(self.file), mode=mode)
             else:
                 self.fh = self.file.open(self._mode)
 
@@ -1248,6 +1255,94 @@ def _import_netCDF4():
             raise SileError(msg) from e
 
 
+def _cache_key(obj):
+    """Convert `obj` (slices, arrays, lists) to a hashable key"""
+    if isinstance(obj, slice):
+        return ("slice", obj.start, obj.stop, obj.step)
+    if isinstance(obj, np.ndarray):
+        return ("array", obj.dtype.str, obj.shape, obj.tobytes())
+    if isinstance(obj, (tuple, list)):
+        return (type(obj).__name__,) + tuple(_cache_key(o) for o in obj)
+    if isinstance(obj, (bool, np.bool_)):
+        # True == 1 and hash(True) == hash(1), they must not share a key
+        return ("bool", bool(obj))
+    return obj
+
+
+class _SileCache:
+    """LRU cache of arrays read from a file, with a memory budget
+
+    The cache is emptied when the modification time of the file changes.
+    Cached arrays are never exposed, copies are returned.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+       the file the data is read from
+    max_size : int
+       maximum size of the cached arrays (in bytes), the cache is disabled
+       if this is 0
+    """
+
+    def __init__(self, path, max_size=0):
+        self.path = path
+        self.max_size = max_size
+        self.clear()
+
+    def clear(self):
+        """Remove all cached arrays and reset the statistics"""
+        self._data = OrderedDict()
+        self._mtime = None
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _check_mtime(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime != self._mtime:
+            self._data.clear()
+            self.size = 0
+            self._mtime = mtime
+
+    def __call__(self, key, func):
+        """Return the cached array for `key`, or the (cached) result of ``func()``"""
+        if self.max_size <= 0:
+            return func()
+        self._check_mtime()
+
+        key = _cache_key(key)
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value.copy()
+
+        self.misses += 1
+        value = func()
+        if not isinstance(value, np.ndarray) or value.nbytes > self.max_size:
+            return value
+
+        # remove the least recently used arrays
+        while self.size + value.nbytes > self.max_size:
+            self.size -= self._data.popitem(last=False)[1].nbytes
+        self._data[key] = value
+        self.size += value.nbytes
+        return value.copy()
+
+    def info(self):
+        """Statistics of the cache"""
+        return PropertyDict(
+            hits=self.hits,
+            misses=self.misses,
+            entries=len(self._data),
+            size=self.size,
+            max_size=self.max_size,
+        )
+
+
 @set_module("sisl.io")
 class SileCDF(BaseSile):
     """Creates/Opens a SileCDF
@@ -1261,6 +1356,11 @@ class SileCDF(BaseSile):
 
     0) means direct file access for every variable read
     1) means stores certain variables in the object.
+
+    In read-mode (r) the read data may be kept in a least-recently-used cache by passing
+    ``cache_size`` (in MB, defaults to ``SISL_IO_CACHE_SIZE``). Repeated reads of
+    the same variables (or slices) are then returned from memory. The cache is emptied
+    if the file is modified, see `cache_info` and `cache_clear`.
     """
 
     def __init__(self, filename, mode="r", lvl=0, access=1, *args, **kwargs):
@@ -1273,6 +1373,13 @@ class SileCDF(BaseSile):
         self._lvl = lvl
         # Initialize the _data dictionary for access == 1
         self._data = dict()
+        # LRU cache of read data (only when reading)
+        cache_size = kwargs.pop("cache_size", None)
+        if cache_size is None:
+            cache_size = get_environ_variable("SISL_IO_CACHE_SIZE")
+        if mode != "r":
+            cache_size = 0
+        self._cache = _SileCache(self.file, int(cache_size * 1024**2))
         if self.file.is_file():
             self._access = access
         else:
@@ -1342,12 +1449,38 @@ class SileCDF(BaseSile):
                 return self._data[name]
         return self._variables(self, name, tree=tree)
 
-    def _value(self, name, tree=None):
+    def _value(self, name, tree=None, index=slice(None)):
         """Local method for obtaining the data from the SileCDF.
 
-        This method returns the value of the variable.
+        This method returns the value of the variable (``variable[index]``).
+        The value is cached if caching is enabled.
+        """
+        return self._cache(
+            ("value", name, tree, index), lambda: self._variable(name, tree)[index]
+        )
+
+    def _cached(self, key, func):
+        """Return ``func()`` through the cache of this sile
+
+        The `key` should uniquely define the data returned by `func`, it
+        may contain slices, arrays and lists.
         """
-        return self._variable(name, tree)[:]
+        return self._cache(key, func)
+
+    def cache_info(self):
+        """Statistics of the cache of read data
+
+        Returns
+        -------
+        PropertyDict
+            with ``hits``, ``misses``, ``entries`` (number of cached arrays), ``size`` and
+            ``max_size`` (in bytes) of the cache
+        """
+        return self._cache.info()
+
+    def cache_clear(self):
+        """Remove all cached data and reset the cache statistics"""
+        self._cache.clear()
 
     @staticmethod
     def _variables(n, name, tree=None):
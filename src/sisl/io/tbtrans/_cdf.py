@@ -235,6 +235,63 @@ class _ncSileTBtrans(SileCDFTBtrans):
 
         return integrator
 
+    def _bias_window_weights(
+        self,
+        elec_from=0,
+        elec_to=1,
+        mu_from=None,
+        kt_from=None,
+        mu_to=None,
+        kt_to=None,
+    ):
+        r"""Integration weights of the energy points in the bias window(s) between two electrodes
+
+        The weights are those of `_bias_window_integrator`, however, the chemical potentials
+        and electronic temperatures (in eV) may be specified (they default to the
+        values of the electrodes).
+        Passing arrays will return the weights of several bias windows (the arrays
+        are broadcasted).
+
+        Parameters
+        ----------
+        elec_from: str, int
+           the originating electrode
+        elec_to: str, int
+           the absorbing electrode (different from `elec_from`)
+        mu_from, kt_from, mu_to, kt_to: float or array_like, optional
+           chemical potentials and electronic temperatures of the electrodes
+
+        Returns
+        -------
+        index : numpy.ndarray
+            indices of the energy points with non-zero weights (in any bias window)
+        weights : numpy.ndarray
+            the weights with shape ``(nwindow, len(index))``
+        stacked : bool
+            whether multiple bias windows are requested
+        """
+        elec_from = self._elec(elec_from)
+        elec_to = self._elec(elec_to)
+        if mu_from is None:
+            mu_from = self.chemical_potential(elec_from)
+        if kt_from is None:
+            kt_from = self.kT(elec_from)
+        if mu_to is None:
+            mu_to = self.chemical_potential(elec_to)
+        if kt_to is None:
+            kt_to = self.kT(elec_to)
+        stacked = any(np.ndim(x) > 0 for x in (mu_from, kt_from, mu_to, kt_to))
+        mu_from, kt_from, mu_to, kt_to = (
+            np.reshape(x, (-1, 1))
+            for x in np.broadcast_arrays(mu_from, kt_from, mu_to, kt_to)
+        )
+
+        E = self.E
+        dE = np.diff(np.sort(E)[:2])[0]
+        weights = dE * (fermi_dirac(E, kt_from, mu_from) - fermi_dirac(E, kt_to, mu_to))
+        index = np.any(weights != 0, axis=0).nonzero()[0]
+        return index, weights[:, index], stacked
+
     def kindex(self, k):
         """Return the index of the k-point that is closests to the queried k-point (in reduced coordinates)
 
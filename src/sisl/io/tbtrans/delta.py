@@ -1,6 +1,7 @@
 # This Source Code Form is subject to the terms of the Mozilla Public
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import itertools
 from pathlib import Path
 
 import numpy as np
@@ -37,6 +38,95 @@ Ry2eV = unit_convert("Ry", "eV")
 eV2Ry = unit_convert("eV", "Ry")
 
 
+def _merge_level(cls, geom, deltas, ilvl):
+    """Check the compatibility and create the union of level `ilvl` of all `deltas`
+
+    Returns
+    -------
+    ncol, col :
+        the union sparsity pattern (0-based column indices)
+    isc_off :
+        the supercell offsets of the level
+    is_complex :
+        whether any of the `deltas` contain complex values
+    axes : dict
+        the (unique) k-points and/or energy points of the level (in file units)
+    inputs : list
+        for each delta, the index of its elements in the union sparsity
+        pattern and the mapping of the `axes` to its own indices (-1 if not present)
+    """
+    tree = f"LEVEL-{ilvl}"
+    no_u = geom.no
+    no_s = geom.no_s
+
+    isc_off = None
+    keys = []
+    for delta in deltas:
+        ncol = _a.arrayi(delta._value("n_col", tree))
+        col = _a.arrayi(delta._value("list_col", tree)) - 1
+        if len(ncol) != no_u or ncol.sum() != len(col):
+            raise ValueError(
+                f"{cls.__name__}.merge found an inconsistent sparsity pattern "
+                f"[n_col] in {delta.file} ({tree})."
+            )
+        if len(col) > 0 and (col.min() < 0 or col.max() >= no_s):
+            raise ValueError(
+                f"{cls.__name__}.merge found an inconsistent sparsity pattern "
+                f"[list_col] in {delta.file} ({tree})."
+            )
+        off = _a.arrayi(delta._value("isc_off", tree))
+        if isc_off is None:
+            isc_off = off
+        elif not np.array_equal(isc_off, off):
+            raise ValueError(
+                f"{cls.__name__}.merge requires that the input files all contain the same "
+                f"supercell offsets [isc_off] ({tree})."
+            )
+        row = np.repeat(np.arange(no_u, dtype=np.int64), ncol)
+        keys.append(row * no_s + col)
+
+    # The union of all sparsity patterns (sorted by row, then column)
+    ukeys = np.unique(np.concatenate(keys))
+    ncol = _a.arrayi(np.bincount(ukeys // no_s, minlength=no_u))
+    col = _a.arrayi(ukeys % no_s)
+
+    is_complex = any("Redelta" in delta._get_lvl(ilvl).variables for delta in deltas)
+
+    axes = {}
+    if ilvl in (2, 4):
+        kpts = [_a.arrayd(delta._value("kpt", tree)).reshape(-1, 3) for delta in deltas]
+        kpt = []
+        for k in np.unique(np.concatenate(kpts), axis=0):
+            if not any(np.allclose(k, k_, atol=0.0001) for k_ in kpt):
+                kpt.append(k)
+        axes["kpt"] = _a.arrayd(kpt).reshape(-1, 3)
+    if ilvl in (3, 4):
+        Es = [_a.arrayd(delta._value("E", tree)).ravel() for delta in deltas]
+        E = np.unique(np.concatenate(Es))
+        if len(E) > 0:
+            # the same tolerance as used when writing
+            E = E[np.insert(np.diff(E) > 0.0001, 0, True)]
+        axes["E"] = E
+
+    inputs = []
+    for i, delta in enumerate(deltas):
+        maps = []
+        if "kpt" in axes:
+            m = _a.fulli(len(axes["kpt"]), -1)
+            for ik, k in enumerate(kpts[i]):
+                m[np.argmin(np.abs(axes["kpt"] - k).sum(1))] = ik
+            maps.append(m)
+        if "E" in axes:
+            m = _a.fulli(len(axes["E"]), -1)
+            if len(Es[i]) > 0:
+                iE = np.searchsorted(axes["E"], Es[i] - 0.0001)
+                m[np.clip(iE, 0, len(axes["E"]) - 1)] = _a.arangei(len(Es[i]))
+            maps.append(m)
+        inputs.append((delta, np.searchsorted(ukeys, keys[i]), maps))
+
+    return ncol, col, isc_off, is_complex, axes, inputs
+
+
 # The delta nc file
 @set_module("sisl.io.tbtrans")
 class deltancSileTBtrans(SileCDFTBtrans):
@@ -72,17 +162,30 @@ class deltancSileTBtrans(SileCDFTBtrans):
     """
 
     @classmethod
-    def merge(cls, fname, *deltas, **kwargs):
-        """Merge several delta files into one Sile which contains the sum of the content
+    def merge(cls, fname, *deltas, chunk_nnz=None, **kwargs):
+        r"""Merge several delta files into one Sile which contains the sum of the content
 
         In cases where implementors use several different delta files it is necessary
         to merge them into a single delta file before use in TBtrans.
         This method does exactly that.
 
+        The merge is streamed, one level, k-point and energy point at a time.
+        Hence the memory usage is bounded by the size of a single :math:`\delta` term
+        (for all spin components) and does not depend on the number of k-points
+        and energy points.
+        The sparsity pattern of each level is the union of the sparsity patterns
+        in the `deltas`.
+
         Notes
         -----
         The code checks whether `fname` is different from all `deltas` and that
         all `deltas` are the same class.
+        All `deltas` are checked for compatibility (geometry, spin and sparsity pattern)
+        before anything is written.
+
+        k-points or energy points missing in some of the `deltas` are treated
+        as zero. For level-4 terms all combinations of the k-points and energy
+        points are written.
 
         Parameters
         ----------
@@ -90,8 +193,19 @@ class deltancSileTBtrans(SileCDFTBtrans):
           the output name of the merged file
         *deltas : deltancSileTBtrans, str, Path
           all the delta files that should be merged
+        chunk_nnz : int, optional
+          maximum number of non-zero elements in each chunk of the written data.
+          Defaults to all elements, i.e. each chunk contains a single k-point, energy point
+          and spin component, which is optimal for TBtrans reading the energy points
+          one at a time.
         **kwargs :
-          arguments passed directly to the init of ``cls(fname, **kwargs)``
+          arguments passed directly to the init of ``cls(fname, **kwargs)``,
+          e.g. ``lvl`` for the compression level
+
+        Raises
+        ------
+        ValueError
+          if the `deltas` are incompatible
         """
         file = Path(fname)
         deltas_obj = []
@@ -111,93 +225,57 @@ class deltancSileTBtrans(SileCDFTBtrans):
         # be sure to overwrite the input with objects
         deltas = deltas_obj
 
-        out = cls(fname, mode="w", **kwargs)
-
-        # Now create and simultaneously check for the same arguments
+        # Check for the same geometry and spin
         geom = deltas[0].read_geometry()
+        nspin = len(deltas[0].dimensions["spin"])
         for delta in deltas[1:]:
             if not geom.equal(delta.read_geometry()):
                 raise ValueError(
                     f"{cls.__name__}.merge requires that the input files all contain the same geometry."
                 )
+            if len(delta.dimensions["spin"]) != nspin:
+                raise ValueError(
+                    f"{cls.__name__}.merge requires that the input files all contain the same number of spin components."
+                )
 
-        # Now we are ready to write
-        out.write_geometry(geom)
-
-        # Now loop all different sparse stuff
-
-        # Level 1
-        deltas_lvl = []
-        m = 0
-        for delta in deltas:
-            if delta.has_level(1):
-                m = m + delta.read_delta()
-                deltas_lvl.append(delta)
-        if len(deltas_lvl) > 0:
-            out.write_delta(m)
-
-        # Level 2
-        deltas_lvl = []
-        ks = []
-        for delta in deltas:
-            if delta.has_level(2):
-                ks.append(delta._get_lvl(2).variables["kpt"][:])
-                deltas_lvl.append(delta)
-        ks = np.concatenate(ks)
-        ks = np.unique(ks, axis=0)
-        for k in ks:
-            m = 0
-            for delta in deltas_lvl:
-                try:
-                    # it could be that the k does not exist in this delta
-                    m = m + delta.read_delta(k=k)
-                except ValueError:
-                    pass
-            out.write_delta(m, k=k)
-
-        # Level 3
-        deltas_lvl = []
-        Es = []
-        for delta in deltas:
-            if delta.has_level(3):
-                Es.append(delta._get_lvl(3).variables["E"][:] * Ry2eV)
-                deltas_lvl.append(delta)
-        Es = np.concatenate(Es)
-        Es = np.unique(Es)
-        for E in Es:
-            m = 0
-            for delta in deltas_lvl:
-                try:
-                    # it could be that the E does not exist in this delta
-                    m = m + delta.read_delta(E=E)
-                except ValueError:
-                    pass
-            out.write_delta(m, E=E)
-
-        # Level 4
-        deltas_lvl = []
-        ks, Es = [], []
-        for delta in deltas:
-            if delta.has_level(4):
-                lvl = delta._get_lvl(4)
-                ks.append(lvl.variables["kpt"][:])
-                Es.append(lvl.variables["E"][:] * Ry2eV)
-                deltas_lvl.append(delta)
-        ks = np.concatenate(ks)
-        ks = np.unique(ks, axis=0)
-        Es = np.concatenate(Es)
-        Es = np.unique(Es)
-
-        for k in ks:
-            for E in Es:
-                m = 0
-                for delta in deltas_lvl:
-                    try:
-                        # it could be that the E does not exist in this delta
-                        m = m + delta.read_delta(E=E, k=k)
-                    except ValueError:
-                        pass
-                out.write_delta(m, E=E, k=k)
+        # Gather all levels (and their sparsity patterns) before writing anything
+        levels = {}
+        for ilvl in (1, 2, 3, 4):
+            deltas_lvl = [delta for delta in deltas if delta.has_level(ilvl)]
+            if len(deltas_lvl) > 0:
+                levels[ilvl] = _merge_level(cls, geom, deltas_lvl, ilvl)
+
+        with cls(fname, mode="w", **kwargs) as out:
+            out.write_geometry(geom)
+            out._crt_dim(out, "spin", nspin)
+
+            for ilvl, (ncol, col, isc_off, is_complex, axes, inputs) in levels.items():
+                lvl = out._add_lvl(ilvl)
+                out._crt_lvl_sparsity(lvl, ncol, col, isc_off)
+                if "kpt" in axes:
+                    lvl.variables["kpt"][0 : len(axes["kpt"]), :] = axes["kpt"]
+                if "E" in axes:
+                    lvl.variables["E"][0 : len(axes["E"])] = axes["E"]
+                vs = out._crt_lvl_delta(lvl, ilvl, is_complex, len(col), chunk_nnz)
+
+                for islot in itertools.product(*map(range, map(len, axes.values()))):
+                    D = np.zeros([nspin, len(col)], dtype=vs[0].dtype)
+                    if is_complex:
+                        DI = np.zeros_like(D)
+                    for delta, idx, maps in inputs:
+                        dslot = tuple(m[i] for m, i in zip(maps, islot))
+                        if any(i < 0 for i in dslot):
+                            # this point does not exist in this delta
+                            continue
+                        dlvl = delta._get_lvl(ilvl)
+                        if "Redelta" in dlvl.variables:
+                            D[:, idx] += dlvl.variables["Redelta"][dslot]
+                            DI[:, idx] += dlvl.variables["Imdelta"][dslot]
+                        else:
+                            D[:, idx] += dlvl.variables["delta"][dslot]
+                    vs[0][islot] = D
+                    if is_complex:
+                        vs[1][islot] = DI
 
     def has_level(self, ilvl):
         """Query whether the file has level `ilvl` content
@@ -365,7 +443,7 @@ class deltancSileTBtrans(SileCDFTBtrans):
         iE = -1
         if ilvl in (3, 4):
             if lvl.variables["E"].size != 0:
-                Es = _a.arrayd(lvl.variables["E"][:])
+                Es = _a.arrayd(self._value("E", f"LEVEL-{ilvl}"))
                 iE = np.argmin(np.abs(Es - E))
                 if abs(Es[iE] - E) > 0.0001:
                     iE = -1
@@ -373,7 +451,7 @@ class deltancSileTBtrans(SileCDFTBtrans):
         ik = -1
         if ilvl in (2, 4):
             if lvl.variables["kpt"].size != 0:
-                kpt = _a.arrayd(lvl.variables["kpt"][:])
+                kpt = _a.arrayd(self._value("kpt", f"LEVEL-{ilvl}"))
                 kpt.shape = (-1, 3)
                 ik = np.argmin(np.abs(kpt - k[None, :]).sum(axis=1))
                 if not np.allclose(kpt[ik, :], k, atol=0.0001):
@@ -414,6 +492,62 @@ class deltancSileTBtrans(SileCDFTBtrans):
 
         return lvl
 
+    def _crt_lvl_sparsity(self, lvl, ncol, col, isc_off):
+        """Create the sparsity pattern of a level, `col` are 0-based indices"""
+        self._crt_dim(lvl, "nnzs", len(col))
+        v = self._crt_var(lvl, "n_col", "i4", ("no_u",))
+        v.info = "Number of non-zero elements per row"
+        v[:] = ncol[:]
+        v = self._crt_var(
+            lvl,
+            "list_col",
+            "i4",
+            ("nnzs",),
+            chunksizes=(len(col),),
+            **self._cmp_args,
+        )
+        v.info = "Supercell column indices in the sparse format"
+        v[:] = col[:] + 1  # correct for fortran indices
+        v = self._crt_var(lvl, "isc_off", "i4", ("n_s", "xyz"))
+        v.info = "Index of supercell coordinates"
+        v[:] = isc_off
+
+    def _crt_lvl_delta(self, lvl, ilvl, is_complex, nnz, chunk_nnz=None):
+        """Create (or return) the delta variables of a level
+
+        The chunks contain a single k, E and spin, and at most `chunk_nnz` elements.
+        """
+        dim = {
+            1: ("spin", "nnzs"),
+            2: ("nkpt", "spin", "nnzs"),
+            3: ("ne", "spin", "nnzs"),
+            4: ("nkpt", "ne", "spin", "nnzs"),
+        }[ilvl]
+        csize = [1] * len(dim)
+        if chunk_nnz is None:
+            chunk_nnz = nnz
+        csize[-1] = max(1, min(nnz, chunk_nnz))
+
+        if is_complex:
+            names = [
+                ("Redelta", "Real part of delta"),
+                ("Imdelta", "Imaginary part of delta"),
+            ]
+        else:
+            names = [("delta", "delta")]
+        return [
+            self._crt_var(
+                lvl,
+                name,
+                "f8",
+                dim,
+                chunksizes=csize,
+                attrs={"info": info, "unit": "Ry"},
+                **self._cmp_args,
+            )
+            for name, info in names
+        ]
+
     def write_delta(self, delta, **kwargs):
         r"""Writes a :math:`\delta` Hamiltonian to the file
 
@@ -486,23 +620,9 @@ class deltancSileTBtrans(SileCDFTBtrans):
                     "all delta entries [sc_off]."
                 )
         else:
-            self._crt_dim(lvl, "nnzs", csr.nnz)
-            v = self._crt_var(lvl, "n_col", "i4", ("no_u",))
-            v.info = "Number of non-zero elements per row"
-            v[:] = csr.ncol[:]
-            v = self._crt_var(
-                lvl,
-                "list_col",
-                "i4",
-                ("nnzs",),
-                chunksizes=(csr.nnz,),
-                **self._cmp_args,
+            self._crt_lvl_sparsity(
+                lvl, csr.ncol, csr.col, siesta_sc_off(*delta.geometry.lattice.nsc).T
             )
-            v.info = "Supercell column indices in the sparse format"
-            v[:] = csr.col[:] + 1  # correct for fortran indices
-            v = self._crt_var(lvl, "isc_off", "i4", ("n_s", "xyz"))
-            v.info = "Index of supercell coordinates"
-            v[:] = siesta_sc_off(*delta.geometry.lattice.nsc).T
 
         warn_E = True
         if ilvl in (3, 4):
@@ -532,28 +652,17 @@ class deltancSileTBtrans(SileCDFTBtrans):
             warn(f"Overwriting k-point {ik} correction.")
 
         if ilvl == 1:
-            dim = ("spin", "nnzs")
             sl = [slice(None)] * 2
-            csize = [1] * 2
         elif ilvl == 2:
-            dim = ("nkpt", "spin", "nnzs")
             sl = [slice(None)] * 3
             sl[0] = ik
-            csize = [1] * 3
         elif ilvl == 3:
-            dim = ("ne", "spin", "nnzs")
             sl = [slice(None)] * 3
             sl[0] = iE
-            csize = [1] * 3
         elif ilvl == 4:
-            dim = ("nkpt", "ne", "spin", "nnzs")
             sl = [slice(None)] * 4
             sl[0] = ik
             sl[1] = iE
-            csize = [1] * 4
-
-        # Number of non-zero elements
-        csize[-1] = csr.nnz
 
         if delta.spin.kind > delta.spin.POLARIZED:
             print(delta.spin)
@@ -562,39 +671,14 @@ class deltancSileTBtrans(SileCDFTBtrans):
             )
 
         if delta.dtype.kind == "c":
-            v1 = self._crt_var(
-                lvl,
-                "Redelta",
-                "f8",
-                dim,
-                chunksizes=csize,
-                attrs={"info": "Real part of delta", "unit": "Ry"},
-                **self._cmp_args,
-            )
-            v2 = self._crt_var(
-                lvl,
-                "Imdelta",
-                "f8",
-                dim,
-                chunksizes=csize,
-                attrs={"info": "Imaginary part of delta", "unit": "Ry"},
-                **self._cmp_args,
-            )
+            v1, v2 = self._crt_lvl_delta(lvl, ilvl, True, csr.nnz)
             for i in range(len(delta.spin)):
                 sl[-2] = i
                 v1[sl] = csr._D[:, i].real * eV2Ry
                 v2[sl] = csr._D[:, i].imag * eV2Ry
 
         else:
-            v = self._crt_var(
-                lvl,
-                "delta",
-                "f8",
-                dim,
-                chunksizes=csize,
-                attrs={"info": "delta", "unit": "Ry"},
-                **self._cmp_args,
-            )
+            (v,) = self._crt_lvl_delta(lvl, ilvl, False, csr.nnz)
             for i in range(len(delta.spin)):
                 sl[-2] = i
                 v[sl] = csr._D[:, i] * eV2Ry
@@ -610,6 +694,7 @@ class deltancSileTBtrans(SileCDFTBtrans):
 
         # Get the level
         lvl = self._get_lvl(ilvl)
+        tree = f"LEVEL-{ilvl}"
 
         if iE < 0 and ilvl in (3, 4):
             E = kwargs.get("E", None)
@@ -646,10 +731,10 @@ class deltancSileTBtrans(SileCDFTBtrans):
         # array, hence just allocate the smallest amount possible)
         C = cls(geom, nspin, nnzpr=1, dtype=dtype, orthogonal=True)
 
-        C._csr.ncol = _a.arrayi(lvl.variables["n_col"][:])
+        C._csr.ncol = _a.arrayi(self._value("n_col", tree))
         # Update maximum number of connections (in case future stuff happens)
         C._csr.ptr = _ncol_to_indptr(C._csr.ncol)
-        C._csr.col = _a.arrayi(lvl.variables["list_col"][:]) - 1
+        C._csr.col = _a.arrayi(self._value("list_col", tree)) - 1
 
         # Copy information over
         C._csr._nnz = len(C._csr.col)
@@ -657,15 +742,15 @@ class deltancSileTBtrans(SileCDFTBtrans):
         if is_complex:
             for ispin in range(nspin):
                 sl[-2] = ispin
-                C._csr._D[:, ispin].real = lvl.variables["Redelta"][sl] * Ry2eV
-                C._csr._D[:, ispin].imag = lvl.variables["Imdelta"][sl] * Ry2eV
+                C._csr._D[:, ispin].real = self._value("Redelta", tree, sl) * Ry2eV
+                C._csr._D[:, ispin].imag = self._value("Imdelta", tree, sl) * Ry2eV
         else:
             for ispin in range(nspin):
                 sl[-2] = ispin
-                C._csr._D[:, ispin] = lvl.variables["delta"][sl] * Ry2eV
+                C._csr._D[:, ispin] = self._value("delta", tree, sl) * Ry2eV
 
         # Convert from isc to sisl isc
-        _csr_from_sc_off(C.geometry, lvl.variables["isc_off"][:, :], C._csr)
+        _csr_from_sc_off(C.geometry, self._value("isc_off", tree), C._csr)
         _mat_spin_convert(C)
 
         return C
@@ -8,8 +8,12 @@ try:
 except Exception:
     from io import StringIO
 
+import fnmatch
 import itertools
-from functools import reduce
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import lru_cache
 from typing import List, Optional, Union
 
 import numpy as np
@@ -17,14 +21,21 @@ import numpy as np
 ndarray = np.ndarray
 
 # The sparse matrix for the orbital/bond currents
-from scipy.sparse import SparseEfficiencyWarning, csr_matrix, issparse
+from scipy.sparse import csr_matrix, issparse
 
 import sisl._array as _a
 from sisl import Atoms, Geometry, constant
 from sisl._core.sparse import _ncol_to_indptr
-from sisl._help import wrap_filterwarnings
+from sisl._environ import get_environ_variable
 from sisl._internal import set_module
-from sisl.messages import SislError, deprecate, deprecate_argument, info, warn
+from sisl.messages import (
+    SislError,
+    deprecate,
+    deprecate_argument,
+    info,
+    progressbar,
+    warn,
+)
 from sisl.physics.densitymatrix import DensityMatrix
 from sisl.physics.distribution import fermi_dirac
 from sisl.unit.siesta import unit_convert
@@ -40,7 +51,7 @@ from sisl.utils import (
     strmap,
 )
 
-from ..sile import add_sile, get_sile, sile_raise_write
+from ..sile import _cache_key, add_sile, get_sile, sile_raise_write
 from ._cdf import _devncSileTBtrans
 from .sile import missing_input_fdf
 
@@ -102,6 +113,244 @@ def window_warning(
         )
 
 
+def _sorted_selection(idx, n):
+    """Sorted unique indices of the selection `idx` in ``range(n)``
+
+    Returns the sorted indices, the inverse (to the requested order, or None if
+    not needed) and whether the selection is a scalar.
+    """
+    idx = _a.arangei(n)[idx]
+    scalar = idx.ndim == 0
+    idx = idx.ravel()
+    uniq, inv = np.unique(idx, return_inverse=True)
+    if len(uniq) == len(idx) and np.all(uniq == idx):
+        inv = None
+    return uniq, inv, scalar
+
+
+def _read_k_blocks(v, wk, kavg, E=None, index=None, weights=None, func=None, lock=None):
+    r"""Read (and possibly k-average) a variable in blocks of k-points and energies
+
+    The variable is read in blocks aligned with the chunking of the variable
+    (multiples of the chunks), with at most ``SISL_IO_BUFFER_SIZE`` MB per block.
+    The k-average is accumulated in-place per block, and the next block is read
+    in a background thread while the current block is accumulated.
+
+    Parameters
+    ----------
+    v : netCDF4.Variable or numpy.ndarray
+       variable with dimensions ``(nk, nE, ...)``, or ``(nE, ...)`` if `wk` is None
+    wk : numpy.ndarray or None
+       k-point weights, None if the variable has no k-point dimension
+    kavg : bool or int
+       whether the k-points are averaged (using `wk`), or a single k-point index
+    E : int, slice or array_like of int, optional
+       energy indices to read, an integer removes the energy dimension
+    index : array_like of int, optional
+       indices of the last dimension to read, the bounding range is read and
+       the indices are selected in memory
+    weights : array_like, optional
+       integrate the energies with these weights, shape ``(nw, len(E))``,
+       the energy dimension of the returned array has length ``nw``
+    func : callable, optional
+       applied to the (k-averaged) data of each block of energies before the
+       integration with `weights`, e.g. ``func(data)`` to remove negative values
+       (the data may be modified in-place)
+    lock : threading.Lock, optional
+       lock held while reading from `v`, for concurrent access to the same file
+    """
+    has_k = wk is not None
+    if lock is None:
+        lock = nullcontext()
+    shape = v.shape
+    eax = 1 if has_k else 0
+    if E is None:
+        E = slice(None)
+    Eu, Einv, Escalar = _sorted_selection(E, shape[eax])
+
+    # sub-selection of the last dimension
+    last = slice(None)
+    rest = list(shape[eax + 1 :])
+    if index is not None:
+        if len(rest) == 0:
+            raise ValueError(
+                "_read_k_blocks cannot select indices of a variable without trailing dimensions"
+            )
+        iu, iinv, iscalar = _sorted_selection(index, rest[-1])
+        if len(iu) > 0:
+            last = slice(iu[0], iu[-1] + 1)
+            iu = iu - iu[0]
+        else:
+            last = slice(0, 0)
+        if len(iu) == last.stop - last.start:
+            iu = None
+        rest[-1] = last.stop - last.start if iu is None else len(iu)
+    else:
+        iu = iinv = None
+        iscalar = False
+
+    # k-points to read
+    if has_k:
+        nk = shape[0]
+        if isinstance(kavg, bool):
+            k0, k1 = 0, nk
+        else:
+            k0 = _a.arangei(nk)[kavg]
+            k1 = k0 + 1
+    else:
+        k0, k1 = 0, 1
+    nks = k1 - k0
+
+    # determine block sizes (in number of k-points and energies)
+    try:
+        chunks = v.chunking()
+    except AttributeError:
+        chunks = "contiguous"
+    if isinstance(chunks, str):
+        kc, ec = 1, 1
+    else:
+        kc = chunks[0] if has_k else 1
+        ec = chunks[eax]
+    itemsize = np.dtype(v.dtype).itemsize
+    # size of a single (k, E) pair as read (the bounding range of `index`)
+    size_pair = itemsize * max(1, np.prod(shape[eax + 1 : -1], dtype=np.int64))
+    if len(rest) > 0:
+        size_pair *= max(1, len(range(shape[-1])[last]))
+    npair = max(
+        1, int(get_environ_variable("SISL_IO_BUFFER_SIZE") * 1024**2 // size_pair)
+    )
+    kb = min(kc, nks)
+    if func is not None:
+        # func acts on the full k-average
+        kb = nks
+    eb = npair // kb
+    if eb >= ec:
+        eb = eb // ec * ec
+    eb = max(1, min(eb, shape[eax]))
+    if eb >= shape[eax] and func is None:
+        # all energies fits, grow the k-blocks
+        kb = max(kb, min(nks, npair // eb))
+        if kb >= kc:
+            kb = kb // kc * kc
+
+    # the blocks of energies, an energy block is the contiguous range
+    # [Eu[p0], Eu[p1-1]] with less than eb energies
+    Eblocks = []
+    p0 = 0
+    while p0 < len(Eu):
+        p1 = np.searchsorted(Eu, Eu[p0] + eb, side="left")
+        Eblocks.append((p0, p1))
+        p0 = p1
+
+    tasks = [
+        (p0, p1, k, min(k + kb, k1)) for p0, p1 in Eblocks for k in range(k0, k1, kb)
+    ]
+
+    def read(task):
+        p0, p1, kl, ku = task
+        e = Eu[p0:p1]
+        es = slice(e[0], e[-1] + 1)
+        key = (slice(kl, ku), es) if has_k else (es,)
+        with lock:
+            blk = v[key + (Ellipsis, last)] if len(rest) > 0 else v[key]
+        # func may change the data in-place
+        blk = np.array(blk) if isinstance(v, np.ndarray) else np.asarray(blk)
+        if len(e) != es.stop - es.start:
+            blk = blk.take(e - es.start, axis=eax)
+        if iu is not None:
+            blk = blk.take(iu, axis=-1)
+        return blk
+
+    # allocate output, the k-point dimension is retained when not averaged
+    kdim = has_k and kavg is not True
+    dtype = v.dtype
+    if has_k and kavg is True:
+        wk = np.asarray(wk)
+        dtype = np.result_type(dtype, wk.dtype)
+    if weights is None:
+        nw = len(Eu)
+    else:
+        # weights of the sorted energies (duplicate energies are summed)
+        weights = np.asarray(weights).reshape(len(weights), -1)
+        nw = len(weights)
+        dtype = np.result_type(dtype, weights.dtype)
+        w = np.zeros([nw, len(Eu)], dtype=weights.dtype)
+        for i, ie in enumerate(range(len(Eu)) if Einv is None else Einv):
+            w[:, ie] += weights[:, i]
+        weights = w
+        del w
+    out = np.zeros(([nks] if kdim else []) + [nw] + rest, dtype=dtype)
+
+    def accumulate(task, blk):
+        p0, p1, kl, ku = task
+        if has_k and kavg is True:
+            blk = np.tensordot(wk[kl:ku], blk, axes=(0, 0))
+        if func is not None:
+            blk = func(blk)
+        ks = (slice(kl - k0, ku - k0),) if kdim else ()
+        if weights is None:
+            out[ks + (slice(p0, p1),)] += blk
+        else:
+            eaxb = 1 if kdim else 0
+            blk = np.tensordot(blk, weights[:, p0:p1], axes=(eaxb, 1))
+            out[ks] += np.moveaxis(blk, -1, eaxb)
+
+    if len(tasks) > 1:
+        # overlap reading the next block with accumulating the current one
+        # NetCDF is not thread-safe, so only a single thread reads
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(read, tasks[0])
+            for i, task in enumerate(tasks):
+                blk = future.result()
+                if i + 1 < len(tasks):
+                    future = executor.submit(read, tasks[i + 1])
+                accumulate(task, blk)
+    else:
+        for task in tasks:
+            accumulate(task, read(task))
+
+    # restore the requested order and dimensionality
+    oax = 1 if kdim else 0
+    if weights is None and Einv is not None:
+        out = out.take(Einv, axis=oax)
+    if iinv is not None:
+        out = out.take(iinv, axis=-1)
+    if iscalar:
+        out = out[..., 0]
+    if weights is None and Escalar:
+        out = out[(slice(None),) * oax + (0,)]
+    if has_k and not isinstance(kavg, bool):
+        out = out[0]
+    return out
+
+
+def _what_filter(what, routine):
+    """Function removing negative (``what="+"``) or positive (``what="-"``) values
+
+    Returns None if all values are retained.
+    """
+    if what in ("+", "out"):
+
+        def func(data):
+            data[data < 0] = 0
+            return data
+
+    elif what in ("-", "in"):
+
+        def func(data):
+            data[data > 0] = 0
+            return data
+
+    elif what in ("all", "both", "+-", "-+", "inout", "outin"):
+        func = None
+    else:
+        raise ValueError(
+            f"{routine} 'what' keyword has "
+            "wrong value [all/both/+-/inout, +/out,-/in] allowed."
+        )
+    return func
+
+
 @set_module("sisl.io.tbtrans")
 class tbtncSileTBtrans(_devncSileTBtrans):
     r"""TBtrans output file object
@@ -146,24 +395,37 @@ class tbtncSileTBtrans(_devncSileTBtrans):
         ----------
         file : str
             output filename
+        **kwargs :
+            passed to `tbtavncSileTBtrans.write_tbtav`, e.g. ``variables``,
+            ``nthreads`` and ``eta``
         """
         f = self._file.with_suffix(".AV.nc")
         if len(args) > 0:
             f = args[0]
-        f = kwargs.get("file", f)
-        tbtavncSileTBtrans(f, mode="w", access=0).write_tbtav(self)
+        f = kwargs.pop("file", f)
+        with tbtavncSileTBtrans(f, mode="w", access=0) as sile:
+            sile.write_tbtav(self, **kwargs)
 
     def _value_avg(
         self,
         name: str,
         tree: Optional[Union[str, List[str]]] = None,
         kavg: bool = False,
+        E=None,
+        index=None,
+        weights=None,
+        func=None,
     ):
         """Local method for obtaining the data from the SileCDF.
 
         This method checks how the file is accessed, i.e. whether
         data is stored in the object or it should be read consequtively.
 
+        The variable is read in blocks of k-points and energies (aligned with the
+        chunking of the variable in the file), and k-averaging is accumulated
+        per block. Hence the full ``(nk, nE, ...)`` variable is never
+        read into memory when k-averaging, see `_read_k_blocks`.
+
         Parameters
         ----------
         name: str
@@ -172,37 +434,38 @@ class tbtncSileTBtrans(_devncSileTBtrans):
             the group location of the variable
         kavg: bool, optional
             whether to k-average the quantity
+        E: int, slice or array_like of int, optional
+            energy indices to read, an integer removes the energy dimension
+        index: array_like of int, optional
+            only read these indices of the last dimension (e.g. orbitals
+            or sparse elements)
+        weights: array_like, optional
+            integrate the energies `E` with these weights (one row per integral)
+        func: callable, optional
+            applied to the k-averaged data before integrating the energies
         """
         if self._access > 0:
             if name in self._data:
                 return self._data[name]
 
-        v = self._variable(name, tree=tree)
-
         if self._k_avg:
-            return v[:]
-
-        # Perform normalization
-        if isinstance(kavg, bool):
-            if kavg:
-                wkpt = self.wk
-                nk = len(wkpt)
-                data = v[0, ...] * wkpt[0]
-                for i in range(1, nk):
-                    data += v[i, :] * wkpt[i]
-            else:
-                data = v[:]
-
-        elif isinstance(kavg, Integral):
-            data = v[kavg, ...]
-
+            wk = None
+        elif isinstance(kavg, (bool, Integral)):
+            wk = self.wk
         else:
             raise ValueError(
                 f"{self.__class__.__name__} requires kavg argument to be either bool or an integer corresponding to the k-point index."
             )
 
-        # Return data
-        return data
+        def read():
+            v = self._variable(name, tree=tree)
+            return _read_k_blocks(v, wk, kavg, E, index, weights, func)
+
+        if func is not None:
+            # we cannot distinguish functions
+            return read()
+        key = ("avg", name, tree) + tuple(map(_cache_key, (kavg, E, index, weights)))
+        return self._cached(key, read)
 
     def _value_E(
         self,
@@ -210,6 +473,7 @@ class tbtncSileTBtrans(_devncSileTBtrans):
         tree: Optional[Union[str, List[str]]] = None,
         kavg: bool = False,
         E: Optional[Union[int, float]] = None,
+        index=None,
     ):
         """Local method for obtaining energy resolved data from the SileCDF.
 
@@ -224,42 +488,31 @@ class tbtncSileTBtrans(_devncSileTBtrans):
             the group location of the variable
         kavg: bool, optional
             whether to k-average the quantity
-        E: int or float, optional
+        E: int or float or array_like or slice, optional
             if provided, only extract the quantity based on the energy `E`.
+            For multiple energies the data is stacked along the energy dimension.
+        index: array_like of int, optional
+            only read these indices of the last dimension
         """
         if E is None:
-            return self._value_avg(name, tree, kavg)
+            return self._value_avg(name, tree, kavg, index=index)
 
         # Ensure that it is an index
-        iE = self.Eindex(E)
-
-        v = self._variable(name, tree=tree)
+        return self._value_avg(name, tree, kavg, E=self._Eindices(E)[0], index=index)
 
-        if self._k_avg:
-            return v[iE, ...]
+    def _Eindices(self, E):
+        """Energy indices of a single, or multiple energies
 
-        wkpt = self.wk
-
-        # Perform normalization
-        if isinstance(kavg, bool):
-            if kavg:
-                nk = len(wkpt)
-                data = np.array(v[0, iE, ...]) * wkpt[0]
-                for i in range(1, nk):
-                    data += v[i, iE, ...] * wkpt[i]
-            else:
-                data = v[:, iE, ...]
-
-        elif isinstance(kavg, Integral):
-            data = v[kavg, iE, ...]
-
-        else:
-            raise ValueError(
-                f"{self.__class__.__name__} requires kavg argument to be either bool or an integer corresponding to the k-point index."
-            )
-
-        # Return data
-        return data
+        Returns the indices and whether `E` contains multiple energies.
+        A `slice` is interpreted as a range of energy indices.
+        """
+        if isinstance(E, slice):
+            return _a.arangei(self.ne)[E], True
+        if np.ndim(E) == 0:
+            if isinstance(E, np.ndarray):
+                E = E.item()
+            return self.Eindex(E), False
+        return _a.arrayi([self.Eindex(e) for e in np.asarray(E).tolist()]), True
 
     @missing_input_fdf([("TBT.T.All", "True")])
     def transmission(self, elec_from=0, elec_to=1, kavg=True) -> ndarray:
@@ -1095,16 +1348,33 @@ class tbtncSileTBtrans(_devncSileTBtrans):
         fano[T <= 0.0] = 0.0
         return fano
 
-    def _sparse_data(self, name, elec, E, kavg=True) -> ndarray:
-        """Internal routine for retrieving sparse data (orbital current, COOP)"""
+    def _sparse_data(
+        self, name, elec, E, kavg=True, index=None, weights=None, func=None
+    ) -> ndarray:
+        """Internal routine for retrieving sparse data (orbital current, COOP)
+
+        If `weights` is passed, `E` are energy indices integrated with the weights.
+        """
         if elec is not None:
             elec = self._elec(elec)
 
         # retrieve and return data
-        return self._value_E(name, elec, kavg, E)
+        if weights is None:
+            return self._value_E(name, elec, kavg, E, index=index)
+        return self._value_avg(name, elec, kavg, E, index, weights, func)
 
-    def _sparse_data_to_matrix(self, data, isc=None, orbitals=None) -> csr_matrix:
-        """Internal routine for retrieving sparse data (orbital current, COOP)"""
+    def _sparse_data_index(self, isc=None, orbitals=None):
+        """Internal routine for the sparse elements of a subset of orbitals and supercells
+
+        Returns
+        -------
+        index : numpy.ndarray or None
+            indices of the retained sparse elements, None if all are retained
+        ncol : numpy.ndarray
+            number of retained elements per row
+        col : numpy.ndarray
+            column indices of the retained elements
+        """
         # Get the geometry for obtaining the sparsity pattern.
         geom = self.geometry
 
@@ -1114,6 +1384,11 @@ class tbtncSileTBtrans(_devncSileTBtrans):
         # Get column indices
         col = self._value("list_col") - 1
 
+        if isc is None:
+            isc = [None, None, None]
+
+        keep = None
+
         # get subset orbitals
         if not orbitals is None:
             orbitals = geom._sanitize_orbs(orbitals)
@@ -1128,32 +1403,11 @@ class tbtncSileTBtrans(_devncSileTBtrans):
 
             # now figure out all places where we
             # have the corresponding values
-            all_col = np.logical_and(np.isin(row, all_col), np.isin(col, all_col))
-
-            # reduce space
-            col = col[all_col]
-            data = data[..., all_col]
-
-            # now calculate new subset rows
-            row, nrow = np.unique(row[all_col], return_counts=True)
-            ncol = _a.zerosi(geom.no)
-            ncol[row] = nrow
-            del row, nrow
-
-        rptr = _ncol_to_indptr(ncol)
-
-        # Default matrix size
-        mat_size = [geom.no, geom.no_s]
+            keep = np.logical_and(np.isin(row, all_col), np.isin(col, all_col))
 
         # Figure out the super-cell indices that are requested
         # First we figure out the indices, then
         # we build the array of allowed columns
-        if isc is None:
-            isc = [None, None, None]
-
-        # reset for next phase
-        all_col = None
-
         if not (isc[0] is None and isc[1] is None and isc[2] is None):
             # The user has requested specific supercells
             # Here we create a list of supercell interactions.
@@ -1188,34 +1442,191 @@ class tbtncSileTBtrans(_devncSileTBtrans):
                 all_col * geom.no, n=_a.fulli(len(all_col), geom.no)
             )
 
-            # get both row and column indices
-            row_nonzero = (ncol > 0).nonzero()[0]
-            # Now we have [0 0 0 0 1 1 1 1 2 2 ... no-1 no-1]
-            row = np.repeat(row_nonzero, ncol[row_nonzero])
-
             # Create a logical array for sub-indexing
-            all_col = np.isin(col, all_col)
-            row = row[all_col]
-            col = col[all_col]
+            if keep is None:
+                keep = np.isin(col, all_col)
+            else:
+                keep = np.logical_and(keep, np.isin(col, all_col))
 
-            # now calculate new subset rows
-            row, nrow = np.unique(row, return_counts=True)
-            ncol = _a.zerosi(geom.no)
-            ncol[row] = nrow
+        if keep is None:
+            return None, ncol, col
 
-            rptr = _ncol_to_indptr(ncol)
-            del ncol, row, nrow
+        # get both row and column indices
+        row_nonzero = (ncol > 0).nonzero()[0]
+        # Now we have [0 0 0 0 1 1 1 1 2 2 ... no-1 no-1]
+        row = np.repeat(row_nonzero, ncol[row_nonzero])
 
-            data = data[..., all_col]
+        # now calculate new subset rows
+        index = keep.nonzero()[0]
+        row, nrow = np.unique(row[index], return_counts=True)
+        ncol = _a.zerosi(geom.no)
+        ncol[row] = nrow
+        return index, ncol, col[index]
 
-        return csr_matrix((data, col, rptr), shape=mat_size)
+    def _sparse_data_to_matrix(self, data, isc=None, orbitals=None) -> csr_matrix:
+        """Internal routine for retrieving sparse data (orbital current, COOP)"""
+        index, ncol, col = self._sparse_data_index(isc, orbitals)
+        if index is not None:
+            data = data[..., index]
+        return self._sparse_index_to_matrix(data, ncol, col)
+
+    def _sparse_index_to_matrix(self, data, ncol, col) -> csr_matrix:
+        """Internal routine for creating the sparse matrix of (subset) sparse data"""
+        geom = self.geometry
+        return csr_matrix(
+            (data, col, _ncol_to_indptr(ncol)), shape=[geom.no, geom.no_s]
+        )
 
     def _sparse_matrix(
         self, name, elec, E, kavg=True, isc=None, orbitals=None
     ) -> csr_matrix:
-        """Internal routine for retrieving sparse matrices (orbital current, COOP)"""
-        data = self._sparse_data(name, elec, E, kavg)
-        return self._sparse_data_to_matrix(data, isc, orbitals)
+        """Internal routine for retrieving sparse matrices (orbital current, COOP)
+
+        Only the requested sparse elements are read from the file.
+        """
+        index, ncol, col = self._sparse_data_index(isc, orbitals)
+        data = self._sparse_data(name, elec, E, kavg, index=index)
+        return self._sparse_index_to_matrix(data, ncol, col)
+
+    @lru_cache(maxsize=2)
+    def _sparse_orbital_to_atom_operator(self, uc=False):
+        """Operator reducing the sparse elements (in the file) to atomic bonds (cached)
+
+        Returns
+        -------
+        P : scipy.sparse.csr_matrix
+            ``P[i, b] = 1`` if the sparse element ``i`` belongs to bond ``b``
+        bonds : numpy.ndarray
+            the (sorted) bonds as ``ia * nc + ja``
+        nc : int
+            number of atomic columns, ``na`` for `uc`, else ``na * n_s``
+        """
+        geom = self.geometry
+        ncol = self._value("n_col")
+        col = geom.o2a(self._value("list_col") - 1)
+        row = np.repeat(geom.o2a(_a.arangei(geom.no)), ncol).astype(np.int64)
+        if uc:
+            nc = geom.na
+            col = col % nc
+        else:
+            nc = geom.na_s
+        bonds, inv = np.unique(row * nc + col, return_inverse=True)
+        n = len(inv)
+        P = csr_matrix(
+            (np.ones(n), (_a.arangei(n), inv)), shape=(n, len(bonds)), dtype=np.float64
+        )
+        return P, bonds, nc
+
+    def _sparse_orbital_to_atom_data(self, data, index=None, uc=False):
+        """Reduce stacked sparse data to atomic bonds using the cached operator
+
+        Parameters
+        ----------
+        data : numpy.ndarray
+           sparse data of shape ``(n, len(index))``
+        index : numpy.ndarray, optional
+           the sparse elements in `data`, default to all elements
+        uc : bool, optional
+           whether the bonds are folded into the unit-cell
+
+        Returns
+        -------
+        Dab : numpy.ndarray
+            the bond data with shape ``(n, nbonds)``
+        ia, ja : numpy.ndarray
+            atomic row and column of the bonds
+        nc : int
+            number of atomic columns
+        """
+        P, bonds, nc = self._sparse_orbital_to_atom_operator(uc)
+        if index is not None:
+            P = P[index]
+            used = np.unique(P.indices)
+            P = P[:, used]
+            bonds = bonds[used]
+        Dab = np.asarray(P.T @ data.T).T
+        return Dab, bonds // nc, bonds % nc, nc
+
+    def _bond_to_matrix(self, Dab, ia, ja, nc) -> List[csr_matrix]:
+        """Sparse matrices (in atomic indices) of stacked bond data"""
+        na = self.geometry.na
+        indptr = _ncol_to_indptr(np.bincount(ia, minlength=na))
+        return [csr_matrix((D, ja, indptr), shape=(na, nc)) for D in Dab]
+
+    def _bond_to_vector(self, Dab, ia, ja) -> ndarray:
+        """Vector contribution of each atom from stacked bond data, shape ``(n, na, 3)``"""
+        geom = self.geometry
+        na = geom.na
+
+        # Only the device atoms have vector contributions, and the
+        # on-site bond is removed (the zero vector cannot be normalized)
+        idx = np.logical_and(np.isin(ia, self.a_dev), ia != ja).nonzero()[0]
+        ia = ia[idx]
+        # Remark that the vector goes from ia -> ja
+        rv = geom.axyz(ja[idx]) - geom.xyz[ia]
+        rv /= np.sqrt((rv**2).sum(1))[:, None]
+
+        # sum the bonds of each atom
+        M = csr_matrix(
+            (np.ones(len(idx)), (ia, _a.arangei(len(idx)))), shape=(na, len(idx))
+        )
+        Dab = Dab[:, idx]
+        V = _a.emptyd([len(Dab), na, 3])
+        for i in range(3):
+            V[..., i] = np.asarray(M @ (Dab * rv[:, i]).T).T
+        return V
+
+    def _sparse_orbital_to_scalar_data(
+        self, data, index=None, activity=True
+    ) -> ndarray:
+        """Atomic scalar contribution of stacked sparse data, see `sparse_orbital_to_scalar`"""
+        na = self.geometry.na
+
+        def atom_sum(data):
+            Dab, ia, _, _ = self._sparse_orbital_to_atom_data(data, index)
+            M = csr_matrix(
+                (np.ones(len(ia)), (ia, _a.arangei(len(ia)))), shape=(na, len(ia))
+            )
+            return np.asarray(M @ abs(Dab).T).T
+
+        Da = atom_sum(data)
+        if activity:
+            Da = np.sqrt(Da * atom_sum(abs(data)))
+        return Da * 0.5
+
+    def _orbital_transmission_data(self, E, elec, kavg, isc, what, orbitals):
+        """Orbital transmissions at one or more energies as stacked sparse data
+
+        Returns the data (shape ``(nE, nnz)``), the indices of the sparse elements and
+        the sparse pattern (see `_sparse_data_index`), and whether `E` is multiple energies.
+        """
+        E, stacked = self._Eindices(E)
+        func = _what_filter(what, f"{self.__class__.__name__}.orbital_transmission")
+        index, ncol, col = self._sparse_data_index(isc, orbitals)
+        J = self._sparse_data("J", elec, E, kavg, index=index)
+        if func is not None:
+            J = func(J)
+        if not stacked:
+            J = J.reshape(1, -1)
+        return J, index, ncol, col, stacked
+
+    def _orbital_current_data(
+        self, elec, elec_other, kavg, isc, what, orbitals, mu, kt, mu_other, kt_other
+    ):
+        """Orbital currents in one or more bias windows as stacked sparse data
+
+        All bias windows are integrated in a single pass over the file.
+        Returns the data (shape ``(nwindow, nnz)``), the indices of the sparse elements and
+        the sparse pattern (see `_sparse_data_index`), and whether multiple windows are requested.
+        """
+        E, weights, stacked = self._bias_window_weights(
+            elec, elec_other, mu, kt, mu_other, kt_other
+        )
+        func = _what_filter(what, f"{self.__class__.__name__}.orbital_current")
+        index, ncol, col = self._sparse_data_index(isc, orbitals)
+        J = self._sparse_data("J", elec, E, kavg, index, weights, func)
+        J *= constant.q / constant.h("eV s")
+        return J, index, ncol, col, stacked
 
     def sparse_orbital_to_atom(self, Dij, uc=False, sum_dup=True) -> csr_matrix:
         """Reduce a sparse matrix in orbital sparse to a sparse matrix in atomic indices
@@ -1304,7 +1715,6 @@ class tbtncSileTBtrans(_devncSileTBtrans):
 
         return Dab
 
-    @wrap_filterwarnings("ignore", category=SparseEfficiencyWarning)
     def sparse_atom_to_vector(self, Dab) -> ndarray:
         """Reduce an atomic sparse matrix to a vector contribution of each atom
 
@@ -1318,35 +1728,11 @@ class tbtncSileTBtrans(_devncSileTBtrans):
         Dab : scipy.sparse.csr_matrix
            the input sparse matrix in atomic indices
         """
-        geom = self.geometry
-        na = geom.na
-
-        # vector
-        V = _a.zerosd([na, 3])
-
-        # Loop atoms in the device region
-        # These are the only atoms which may have vector contributions
-        # So no need to loop over any other atoms
-        getrow = Dab.getrow
-        Rij = geom.Rij
-
-        for ia in self.a_dev:
-            # Get csr matrix
-            Dia = getrow(ia)
-
-            # Set diagonal to zero
-            Dia[0, ia] = 0.0
-            # Remove the diagonal (prohibits the calculation of the
-            # norm of the zero vector, hence required)
-            Dia.eliminate_zeros()
-
-            # Now calculate the vector elements
-            # Remark that the vector goes from ia -> ja
-            rv = Rij(ia, Dia.indices)
-            rv = rv / np.sqrt((rv**2).sum(1))[:, None]
-            V[ia, :] = (Dia.data[:, None] * rv).sum(0)
-
-        return V
+        na = self.geometry.na
+        if not (issparse(Dab) and Dab.format == "csr"):
+            Dab = Dab.tocsr()
+        ia = np.repeat(_a.arangei(na), np.diff(Dab.indptr))
+        return self._bond_to_vector(Dab.data.reshape(1, -1), ia, Dab.indices)[0]
 
     def sparse_orbital_to_vector(self, Dij, uc=False, sum_dup=True) -> ndarray:
         """Reduce an orbital sparse matrix to a vector contribution of each atom
@@ -1479,11 +1865,13 @@ class tbtncSileTBtrans(_devncSileTBtrans):
 
         Parameters
         ----------
-        E: float or int
+        E: float or int or array_like or slice
            the energy or the energy index of the orbital transmission. If an integer
            is passed it is the index, otherwise the index corresponding to
            ``Eindex(E)`` is used. Be careful about passing ``0`` as that will be interpreted
            as an index.
+           For multiple energies (or a `slice` of energy indices) the results of
+           all energies are returned (read in a single pass over the file).
         elec: str, int, optional
            the electrode of originating electrons
         kavg: bool, int, optional
@@ -1501,7 +1889,7 @@ class tbtncSileTBtrans(_devncSileTBtrans):
         Returns
         -------
         A `scipy.sparse.csr_matrix` containing the supercell transmission pathways, or
-        orbital transmissions.
+        orbital transmissions. A list of matrices for multiple energies.
 
         Examples
         --------
@@ -1524,23 +1912,17 @@ class tbtncSileTBtrans(_devncSileTBtrans):
         atom_transmission : energy resolved atomic transmission for each atom (scalar representation of bond-transmissions)
         atom_current : the atomic current for each atom (scalar representation of bond-currents)
         """
-        J = self._sparse_matrix("J", elec, E, kavg, isc, orbitals)
-
-        if what in ("+", "out"):
-            J.data[J.data < 0] = 0
-        elif what in ("-", "in"):
-            J.data[J.data > 0] = 0
-        elif what not in ("all", "both", "+-", "-+", "inout", "outin"):
-            raise ValueError(
-                f"{self.__class__.__name__}.orbital_transmission 'what' keyword has "
-                "wrong value [all/both/+-, +/out,-/in] allowed."
-            )
+        J, _, ncol, col, stacked = self._orbital_transmission_data(
+            E, elec, kavg, isc, what, orbitals
+        )
 
         # do not delete explicit 0's as the user can then know the sparse matrices
         # calculated.
         # Users can them-selves remove them (eliminate_zeros)
-
-        return J
+        J = [self._sparse_index_to_matrix(j, ncol, col) for j in J]
+        if stacked:
+            return J
+        return J[0]
 
     @deprecate_argument(
         "only",
@@ -1557,6 +1939,10 @@ class tbtncSileTBtrans(_devncSileTBtrans):
         isc=None,
         what: str = "all",
         orbitals=None,
+        mu=None,
+        kt=None,
+        mu_other=None,
+        kt_other=None,
     ) -> csr_matrix:
         r"""Orbital current originating from `elec` as a sparse matrix
 
@@ -1588,6 +1974,19 @@ class tbtncSileTBtrans(_devncSileTBtrans):
            arguments for `sparse_orbital_to_atom` and `sparse_orbital_to_scalar`.
         orbitals : array-like or dict, optional
            only retain orbital currents for a subset of orbitals.
+        mu, kt: float or array_like, optional
+           chemical potential and electronic temperature (in eV) of `elec`, defaults to the
+           values in the file. See `current_parameter`.
+        mu_other, kt_other: float or array_like, optional
+           chemical potential and electronic temperature (in eV) of `elec_other`, defaults to the
+           values in the file.
+           If any of the window parameters are arrays the orbital currents are calculated for
+           all bias windows (arrays are broadcasted) in a single pass over the file.
+
+        Returns
+        -------
+        A `scipy.sparse.csr_matrix` containing the orbital currents, a list of
+        matrices for multiple bias windows.
 
         Notes
         -----
@@ -1597,6 +1996,15 @@ class tbtncSileTBtrans(_devncSileTBtrans):
 
         The currents does not reflect the current going from `elec_from` *to* `elec_other`!
 
+        Examples
+        --------
+        Orbital currents for a range of bias windows (symmetric chemical potentials)
+
+        >>> V = np.linspace(0, 1, 11)
+        >>> Jij = tbt.orbital_current(0, 1, mu=V / 2, mu_other=-V / 2)
+        >>> len(Jij)
+        11
+
         See Also
         --------
         orbital_transmission : energy resolved transmission between orbitals
@@ -1607,54 +2015,13 @@ class tbtncSileTBtrans(_devncSileTBtrans):
         atom_transmission : energy resolved atomic transmission for each atom (scalar representation of bond-transmissions)
         atom_current : the atomic current for each atom (scalar representation of bond-currents)
         """
-        # Get integrator
-        integrator = self._bias_window_integrator(elec, elec_other)
-
-        # Do integration of data
-        def func_out(data, A):
-            i, weight = A
-            D = self._sparse_data("J", elec, i, kavg=kavg)
-            D[D < 0] = 0
-            return data + D * weight
-
-        def func_in(data, A):
-            i, weight = A
-            D = self._sparse_data("J", elec, i, kavg=kavg)
-            D[D > 0] = 0
-            return data + D * weight
-
-        def func_all(data, A):
-            i, weight = A
-            D = self._sparse_data("J", elec, i, kavg=kavg)
-            return data + D * weight
-
-        # nonlocal cannot be used in an if-statement
-        getdata = {
-            "+": func_out,
-            "out": func_out,
-            "-": func_in,
-            "in": func_in,
-            "all": func_all,
-            "inout": func_all,
-            "outin": func_all,
-            "+-": func_all,
-            "-+": func_all,
-            "both": func_all,
-        }.get(what)
-
-        if getdata is None:
-            raise ValueError(
-                f"{self.__class__.__name__}.orbital_current 'what' keyword has "
-                "wrong value [all/both/+-/inout, +/out,-/in] allowed."
-            )
-
-        J = reduce(getdata, enumerate(integrator(self.E)), 0.0)
-
-        return (
-            self._sparse_data_to_matrix(J, isc, orbitals)
-            * constant.q
-            / constant.h("eV s")
+        J, _, ncol, col, stacked = self._orbital_current_data(
+            elec, elec_other, kavg, isc, what, orbitals, mu, kt, mu_other, kt_other
         )
+        J = [self._sparse_index_to_matrix(j, ncol, col) for j in J]
+        if stacked:
+            return J
+        return J[0]
 
     @deprecate_argument(
         "only",
@@ -1676,11 +2043,13 @@ class tbtncSileTBtrans(_devncSileTBtrans):
 
         Parameters
         ----------
-        E: float or int
+        E: float or int or array_like or slice
            the energy or the energy index of the transmission. If an integer
            is passed it is the index, otherwise the index corresponding to
            ``Eindex(E)`` is used. Be careful about passing ``0`` as that will be interpreted
            as an index.
+           For multiple energies (or a `slice` of energy indices) the results of
+           all energies are returned (read in a single pass over the file).
         elec : str, int, optional
            the electrode of originating electrons
         kavg : bool, int, optional
@@ -1720,11 +2089,13 @@ class tbtncSileTBtrans(_devncSileTBtrans):
         atom_transmission : energy resolved atomic transmission for each atom (scalar representation of bond-transmissions)
         atom_current : the atomic current for each atom (scalar representation of bond-currents)
         """
-        Jij = self.orbital_transmission(
-            E, elec, kavg=kavg, isc=isc, what=what, orbitals=orbitals
+        J, index, _, _, stacked = self._orbital_transmission_data(
+            E, elec, kavg, isc, what, orbitals
         )
-
-        return self.sparse_orbital_to_atom(Jij, uc=uc)
+        Jab = self._bond_to_matrix(*self._sparse_orbital_to_atom_data(J, index, uc))
+        if stacked:
+            return Jab
+        return Jab[0]
 
     @deprecate_argument(
         "only",
@@ -1741,6 +2112,10 @@ class tbtncSileTBtrans(_devncSileTBtrans):
         what: str = "all",
         orbitals=None,
         uc=False,
+        mu=None,
+        kt=None,
+        mu_other=None,
+        kt_other=None,
     ) -> csr_matrix:
         r"""Bond current between atoms (sum of orbital currents)
 
@@ -1778,6 +2153,14 @@ class tbtncSileTBtrans(_devncSileTBtrans):
            If `True` this will return a sparse matrix of ``shape = (self.na, self.na)``,
            else, it will return a sparse matrix of ``shape = (self.na, self.na * self.n_s)``.
            One may figure out the connections via `~sisl._core.geometry.Geometry.sc_index`.
+        mu, kt: float or array_like, optional
+           chemical potential and electronic temperature (in eV) of `elec`, defaults to the
+           values in the file. See `current_parameter`.
+        mu_other, kt_other: float or array_like, optional
+           chemical potential and electronic temperature (in eV) of `elec_other`, defaults to the
+           values in the file.
+           If any of the window parameters are arrays the bond currents are calculated for
+           all bias windows (arrays are broadcasted) in a single pass over the file.
 
         Examples
         --------
@@ -1805,11 +2188,13 @@ class tbtncSileTBtrans(_devncSileTBtrans):
         atom_transmission : energy resolved atomic transmission for each atom (scalar representation of bond-transmissions)
         atom_current : the atomic current for each atom (scalar representation of bond-currents)
         """
-        Jij = self.orbital_current(
-            elec, elec_other, kavg=kavg, isc=isc, what=what, orbitals=orbitals
+        J, index, _, _, stacked = self._orbital_current_data(
+            elec, elec_other, kavg, isc, what, orbitals, mu, kt, mu_other, kt_other
         )
-
-        return self.sparse_orbital_to_atom(Jij, uc=uc)
+        Jab = self._bond_to_matrix(*self._sparse_orbital_to_atom_data(J, index, uc))
+        if stacked:
+            return Jab
+        return Jab[0]
 
     @deprecate_argument(
         "only",
@@ -1832,11 +2217,13 @@ class tbtncSileTBtrans(_devncSileTBtrans):
 
         Parameters
         ----------
-        E: float or int
+        E: float or int or array_like or slice
            the energy or the energy index of the transmission. If an integer
            is passed it is the index, otherwise the index corresponding to
            ``Eindex(E)`` is used. Be careful about passing ``0`` as that will be interpreted
            as an index.
+           For multiple energies (or a `slice` of energy indices) the results of
+           all energies are returned (read in a single pass over the file).
         elec: str or int, optional
            the electrode of originating electrons
         kavg: bool, int, optional
@@ -1859,7 +2246,8 @@ class tbtncSileTBtrans(_devncSileTBtrans):
         Returns
         -------
         numpy.ndarray
-            array of vectors per atom in the Geometry (only non-zero for device atoms)
+            array of vectors per atom in the Geometry (only non-zero for device atoms),
+            for multiple energies the shape is ``(nE, na, 3)``
 
         See Also
         --------
@@ -1871,18 +2259,22 @@ class tbtncSileTBtrans(_devncSileTBtrans):
         atom_transmission : energy resolved atomic transmission for each atom (scalar representation of bond-transmissions)
         atom_current : the atomic current for each atom (scalar representation of bond-currents)
         """
-        Jab = self.bond_transmission(
-            E, elec, kavg=kavg, isc=isc, what=what, orbitals=orbitals
+        J, index, _, _, stacked = self._orbital_transmission_data(
+            E, elec, kavg, isc, what, orbitals
         )
+        Dab, ia, ja, _ = self._sparse_orbital_to_atom_data(J, index)
+        V = self._bond_to_vector(Dab, ia, ja)
 
         if what in ("all", "both", "+-", "-+", "inout", "outin"):
             # When we divide by two one can *always* compare the bulk
             # vector currents using either of the sum-rules.
             # I.e. it will be much easier to distinguish differences
             # between "incoming" and "outgoing".
-            return self.sparse_atom_to_vector(Jab) / 2
+            V /= 2
 
-        return self.sparse_atom_to_vector(Jab)
+        if stacked:
+            return V
+        return V[0]
 
     @deprecate_argument(
         "only",
@@ -1898,6 +2290,10 @@ class tbtncSileTBtrans(_devncSileTBtrans):
         isc=None,
         what: str = "all",
         orbitals=None,
+        mu=None,
+        kt=None,
+        mu_other=None,
+        kt_other=None,
     ) -> ndarray:
         r"""Vector for each atom being the sum of bond currents times the normalized bond vector between the atoms
 
@@ -1932,6 +2328,14 @@ class tbtncSileTBtrans(_devncSileTBtrans):
         orbitals : array-like or dict, optional
            only retain currents for a subset of orbitals before calculating currents
            Passed directly to `orbital_current`.
+        mu, kt: float or array_like, optional
+           chemical potential and electronic temperature (in eV) of `elec`, defaults to the
+           values in the file. See `current_parameter`.
+        mu_other, kt_other: float or array_like, optional
+           chemical potential and electronic temperature (in eV) of `elec_other`, defaults to the
+           values in the file.
+           If any of the window parameters are arrays the vector currents are calculated for
+           all bias windows (arrays are broadcasted) in a single pass over the file.
 
         Notes
         -----
@@ -1944,7 +2348,8 @@ class tbtncSileTBtrans(_devncSileTBtrans):
         Returns
         -------
         numpy.ndarray
-            array of vectors per atom in the Geometry (only non-zero for device atoms)
+            array of vectors per atom in the Geometry (only non-zero for device atoms),
+            for multiple bias windows the shape is ``(nwindow, na, 3)``
 
         See Also
         --------
@@ -1956,18 +2361,22 @@ class tbtncSileTBtrans(_devncSileTBtrans):
         atom_transmission : energy resolved atomic transmission for each atom (scalar representation of bond-transmissions)
         atom_current : the atomic current for each atom (scalar representation of bond-currents)
         """
-        Jab = self.bond_current(
-            elec, elec_other, kavg=kavg, isc=isc, what=what, orbitals=orbitals
+        J, index, _, _, stacked = self._orbital_current_data(
+            elec, elec_other, kavg, isc, what, orbitals, mu, kt, mu_other, kt_other
         )
+        Dab, ia, ja, _ = self._sparse_orbital_to_atom_data(J, index)
+        V = self._bond_to_vector(Dab, ia, ja)
 
         if what in ("all", "both", "+-", "-+", "inout", "outin"):
             # When we divide by two one can *always* compare the bulk
             # vector currents using either of the sum-rules.
             # I.e. it will be much easier to distinguish differences
             # between "incoming" and "outgoing".
-            return self.sparse_atom_to_vector(Jab) / 2
+            V /= 2
 
-        return self.sparse_atom_to_vector(Jab)
+        if stacked:
+            return V
+        return V[0]
 
     def atom_transmission(
         self, E, elec=0, activity=True, kavg=True, isc=None, orbitals=None
@@ -2001,11 +2410,13 @@ class tbtncSileTBtrans(_devncSileTBtrans):
 
         Parameters
         ----------
-        E: float or int
+        E: float or int or array_like or slice
            the energy or the energy index of the transmission. If an integer
            is passed it is the index, otherwise the index corresponding to
            ``Eindex(E)`` is used. Be careful about passing ``0`` as that will be interpreted
            as an index.
+           For multiple energies (or a `slice` of energy indices) the results of
+           all energies are returned (read in a single pass over the file).
         elec: str, int, optional
            the originating electrode
         activity: bool, optional
@@ -2035,14 +2446,26 @@ class tbtncSileTBtrans(_devncSileTBtrans):
         vector_current : an atomic field current for each atom (Cartesian representation of bond-currents)
         atom_current : the atomic current for each atom (scalar representation of bond-currents)
         """
-        Jij = self.orbital_transmission(
-            E, elec, kavg=kavg, isc=isc, what="all", orbitals=orbitals
+        J, index, _, _, stacked = self._orbital_transmission_data(
+            E, elec, kavg, isc, "all", orbitals
         )
-
-        return self.sparse_orbital_to_scalar(Jij, activity=activity)
+        Ja = self._sparse_orbital_to_scalar_data(J, index, activity)
+        if stacked:
+            return Ja
+        return Ja[0]
 
     def atom_current(
-        self, elec=0, elec_other=1, activity=True, kavg=True, isc=None, orbitals=None
+        self,
+        elec=0,
+        elec_other=1,
+        activity=True,
+        kavg=True,
+        isc=None,
+        orbitals=None,
+        mu=None,
+        kt=None,
+        mu_other=None,
+        kt_other=None,
     ) -> ndarray:
         r""" Atomic current of atoms, a scalar quantity quantifying how much currents flows through an atom
 
@@ -2089,6 +2512,14 @@ class tbtncSileTBtrans(_devncSileTBtrans):
            To only get unit cell orbital currents, pass ``[0, 0, 0]``.
         orbitals : array-like or dict, optional
            only retain orbital currents for a subset of orbitals.
+        mu, kt: float or array_like, optional
+           chemical potential and electronic temperature (in eV) of `elec`, defaults to the
+           values in the file. See `current_parameter`.
+        mu_other, kt_other: float or array_like, optional
+           chemical potential and electronic temperature (in eV) of `elec_other`, defaults to the
+           values in the file.
+           If any of the window parameters are arrays the atomic currents are calculated for
+           all bias windows (arrays are broadcasted) in a single pass over the file.
 
         Examples
         --------
@@ -2113,11 +2544,13 @@ class tbtncSileTBtrans(_devncSileTBtrans):
         vector_current : an atomic field current for each atom (Cartesian representation of bond-currents)
         atom_transmission : energy resolved atomic transmission for each atom (scalar representation of bond-transmissions)
         """
-        Jij = self.orbital_current(
-            elec, elec_other, kavg=kavg, isc=isc, what="all", orbitals=orbitals
+        J, index, _, _, stacked = self._orbital_current_data(
+            elec, elec_other, kavg, isc, "all", orbitals, mu, kt, mu_other, kt_other
         )
-
-        return self.sparse_orbital_to_scalar(Jij, activity=activity)
+        Ja = self._sparse_orbital_to_scalar_data(J, index, activity)
+        if stacked:
+            return Ja
+        return Ja[0]
 
     @missing_input_fdf([("TBT.DM.Gf", "True")])
     def density_matrix(
@@ -3554,16 +3987,32 @@ class tbtavncSileTBtrans(tbtncSileTBtrans):
         """Always return [1.], this is to signal other routines"""
         return _a.onesd(1)
 
-    def write_tbtav(self, *args, **kwargs):
+    def write_tbtav(self, *args, variables=None, nthreads=None, eta=None, **kwargs):
         """Wrapper for writing the k-averaged TBT.AV.nc file.
 
         This write *requires* the TBT.nc `Sile` object passed as the first argument,
         or as the keyword ``from=tbt`` argument.
 
+        The k-dependent variables are averaged concurrently in `nthreads` threads
+        (one variable per thread). Each variable is processed in blocks of energy points
+        (or of its largest dimension if the k-points are not the leading dimension),
+        see ``SISL_IO_BUFFER_SIZE``, to limit the memory usage.
+        NetCDF is not thread-safe, hence reading and writing is serialized while
+        the k-averaging of one variable overlaps with the reading of the others.
+
         Parameters
         ----------
         from : tbtncSileTBtrans
           the TBT.nc file object that has the k-sampled quantities.
+        variables : str or list of str, optional
+          only carry over the k-dependent variables matching these names, either
+          the variable name (``"J"``) or the full path (``"Left/J"``), shell-style
+          wildcards are allowed. Variables without a k-point dimension are always written.
+          Defaults to all variables.
+        nthreads : int, optional
+          number of threads used, defaults to ``SISL_NUM_THREADS``.
+        eta : bool, optional
+          whether the progress is shown (in MB of averaged data), defaults to ``SISL_SHOW_PROGRESS``
         """
 
         if "from" in kwargs:
@@ -3583,14 +4032,19 @@ class tbtavncSileTBtrans(tbtncSileTBtrans):
         # Notify if the object is not in write mode.
         sile_raise_write(self)
 
+        if isinstance(variables, str):
+            variables = [variables]
+
         def copy_attr(f, t):
             t.setncatts({att: f.getncattr(att) for att in f.ncattrs()})
 
         # Retrieve k-weights
-        nkpt = len(tbt.dimensions["nkpt"])
         wkpt = _a.asarrayd(tbt.variables["wkpt"][:])
 
-        # First copy and re-create all entries in the output file
+        # First re-create all entries in the output file, and
+        # gather the variables to be copied
+        copies = []
+        averages = []
         for dvg in tbt:
             # Iterate all:
             #  root,
@@ -3634,47 +4088,121 @@ class tbtavncSileTBtrans(tbtncSileTBtrans):
                 continue
 
             # Down-scale the k-point dimension
-            if "nkpt" in dvg.dimensions:
+            dims = list(dvg.dimensions)
+            chunks = dvg.chunking()
+            if "nkpt" in dims:
+                if variables is not None:
+                    path = f"{dvg.group().path}/{dvg.name}".lstrip("/")
+                    if not any(
+                        fnmatch.fnmatchcase(dvg.name, var)
+                        or fnmatch.fnmatchcase(path, var)
+                        for var in variables
+                    ):
+                        continue
+
                 # Remove that dimension
-                dims = list(dvg.dimensions)
-                # Create slice
                 idx = dims.index("nkpt")
                 dims.pop(idx)
-                dims = tuple(dims)
-                has_kpt = True
-
+                if not isinstance(chunks, str):
+                    chunks.pop(idx)
             else:
-                dims = dvg.dimensions[:]
-                has_kpt = False
+                idx = None
+            if isinstance(chunks, str) or len(dims) == 0:
+                chunks = None
 
             # We can't use dvg.filters() since it doesn't always
             # work...
-            v = grp.createVariable(dvg.name, dvg.dtype, dimensions=dims)
+            v = grp.createVariable(
+                dvg.name, dvg.dtype, dimensions=tuple(dims), chunksizes=chunks
+            )
 
             # Copy attributes
             copy_attr(dvg, v)
 
-            # Copy values
-            if has_kpt:
-                # Instead of constantly reading-writing to disk
-                # (if buffer is too small)
-                # we create a temporary array to hold the averaged
-                # quantities.
-                # This should only be faster for very large variables
-                if idx == 0:
-                    dat = np.asarray(dvg[0][:] * wkpt[0])
-                    for k in range(1, nkpt):
-                        dat += dvg[k][:] * wkpt[k]
-                    v[:] = dat[:]
-                else:
-                    for slc in iter_shape(dvg.shape[:idx]):
-                        dat = np.asarray(dvg[slc][0][:] * wkpt[0])
-                        for k in range(1, nkpt):
-                            dat += dvg[slc][k][:] * wkpt[k]
-                        v[slc][:] = dat[:]
-                del dat
+            if idx is None:
+                copies.append((dvg, v))
             else:
-                v[:] = dvg[:]
+                averages.append((dvg, v, idx))
+
+        # Copy values
+        for dvg, v in copies:
+            v[:] = dvg[:]
+
+        if nthreads is None:
+            nthreads = get_environ_variable("SISL_NUM_THREADS")
+        nthreads = max(1, min(nthreads, len(averages)))
+
+        def nbytes(dvg):
+            return np.prod(dvg.shape, dtype=np.int64) * dvg.dtype.itemsize / 1024**2
+
+        eta = progressbar(
+            sum(nbytes(dvg) for dvg, _, _ in averages),
+            f"{self.__class__.__name__}.write_tbtav",
+            "MB",
+            eta,
+        )
+        # NetCDF is not thread-safe, all file access is guarded by this lock
+        lock = threading.Lock()
+
+        def average(job):
+            dvg, v, idx = job
+            shape = dvg.shape
+            if len(shape) == 1:
+                with lock:
+                    v[...] = np.dot(wkpt, dvg[:])
+                eta.update(nbytes(dvg))
+                return
+
+            if idx != 0:
+                # Average blocks of the largest other dimension
+                ax = max(
+                    (ax for ax in range(len(shape)) if ax != idx),
+                    key=lambda ax: shape[ax],
+                )
+                n = shape[ax]
+                size = np.prod(shape, dtype=np.int64) // n * dvg.dtype.itemsize
+                nb = int(get_environ_variable("SISL_IO_BUFFER_SIZE") * 1024**2 // size)
+                nb = max(1, min(nb, n))
+                # the averaged variable has no k-point dimension
+                vax = ax if ax < idx else ax - 1
+                for i0 in range(0, n, nb):
+                    i1 = min(i0 + nb, n)
+                    sl = [slice(None)] * len(shape)
+                    sl[ax] = slice(i0, i1)
+                    with lock:
+                        dat = np.asarray(dvg[tuple(sl)])
+                    dat = np.tensordot(wkpt, dat, axes=(0, idx))
+                    sl = [slice(None)] * (len(shape) - 1)
+                    sl[vax] = slice(i0, i1)
+                    with lock:
+                        v[tuple(sl)] = dat
+                    eta.update(nbytes(dvg) * (i1 - i0) / n)
+                return
+
+            # Average blocks of energies (the 2nd dimension)
+            ne = shape[1]
+            size = np.prod(shape[2:], dtype=np.int64) * dvg.dtype.itemsize
+            size = max(1, len(wkpt) * size)
+            eb = int(get_environ_variable("SISL_IO_BUFFER_SIZE") * 1024**2 // size)
+            chunks = dvg.chunking()
+            if not isinstance(chunks, str) and eb >= chunks[1]:
+                eb = eb // chunks[1] * chunks[1]
+            eb = max(1, min(eb, ne))
+            for e0 in range(0, ne, eb):
+                e1 = min(e0 + eb, ne)
+                dat = _read_k_blocks(dvg, wkpt, True, E=slice(e0, e1), lock=lock)
+                with lock:
+                    v[e0:e1] = dat
+                eta.update(nbytes(dvg) * (e1 - e0) / ne)
+
+        if nthreads > 1:
+            with ThreadPoolExecutor(max_workers=nthreads) as executor:
+                # consume to raise errors
+                list(executor.map(average, averages))
+        else:
+            for job in averages:
+                average(job)
+        eta.close()
 
         # Update the source attribute to signal the originating file
         self.setncattr("source", "k-average of: " + str(tbt._file))
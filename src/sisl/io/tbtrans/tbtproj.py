@@ -242,7 +242,7 @@ class tbtprojncSileTBtrans(tbtncSileTBtrans):
         DensityMatrix: the object containing the Geometry and the density matrix elements
         """
         mol_proj_elec = self._mol_proj_elec(elec_mol_proj)
-        dm = self._sparse_data("DM", mol_proj_elec, E, kavg, isc, orbitals) * eV2Ry
+        dm = self._sparse_matrix("DM", mol_proj_elec, E, kavg, isc, orbitals) * eV2Ry
         # Now create the density matrix object
         geom = self.read_geometry()
         if geometry is None:
@@ -161,3 +161,64 @@ def test_tbt_delta_merge(sisl_tmp, sisl_system):
             assert False
         except:
             assert True
+
+
+def test_tbt_delta_merge_stream(sisl_tmp, sisl_system):
+    f1 = sisl_tmp("gr1s.dH.nc", _dir)
+    f2 = sisl_tmp("gr2s.dH.nc", _dir)
+    fout = sisl_tmp("grmerged_s.dH.nc", _dir)
+
+    H = Hamiltonian(sisl_system.gtb)
+    H.construct([sisl_system.R, sisl_system.t])
+    H.finalize()
+    # on-site terms only, different sparsity pattern
+    H1 = Hamiltonian(sisl_system.gtb, dtype=np.complex128)
+    for i in range(H1.no):
+        H1[i, i] = 0.5 + 0.25j
+
+    with deltancSileTBtrans(f1, "w") as sile:
+        sile.write_delta(H)
+        sile.write_delta(H, E=-1.0)
+        sile.write_delta(H, E=1.0)
+        sile.write_delta(H, E=1.0, k=[0, 0.5, 0])
+
+    with deltancSileTBtrans(f2, "w") as sile:
+        sile.write_delta(H1)
+        sile.write_delta(H1, E=1.0)
+        sile.write_delta(H1, E=2.0)
+        sile.write_delta(H1, k=[0, 0.5, 0])
+
+    deltancSileTBtrans.merge(fout, f1, f2, chunk_nnz=4, lvl=1)
+
+    with deltancSileTBtrans(fout, "r") as sile:
+        assert sile._get_lvl(3).variables["Redelta"].chunking()[-1] == 4
+        assert np.allclose(
+            sile.read_delta().tocsr().toarray(), (H + H1).tocsr().toarray()
+        )
+        for E, M in [(-1.0, H), (1.0, H + H1), (2.0, H1)]:
+            h = sile.read_delta(E=E)
+            assert np.allclose(h.tocsr().toarray(), M.tocsr().toarray())
+            assert h.spsame(H + H1)
+        h = sile.read_delta(k=[0, 0.5, 0])
+        assert np.allclose(h.tocsr().toarray(), H1.tocsr().toarray())
+        h = sile.read_delta(E=1.0, k=[0, 0.5, 0])
+        assert np.allclose(h.tocsr().toarray(), H.tocsr().toarray())
+
+
+def test_tbt_delta_merge_incompatible(sisl_tmp, sisl_system):
+    f1 = sisl_tmp("gr1i.dH.nc", _dir)
+    f2 = sisl_tmp("gr2i.dH.nc", _dir)
+    fout = sisl_tmp("grmerged_i.dH.nc", _dir)
+
+    H = Hamiltonian(sisl_system.gtb)
+    H.construct([sisl_system.R, sisl_system.t])
+    with deltancSileTBtrans(f1, "w") as sile:
+        sile.write_delta(H)
+    H = H.tile(2, 0)
+    with deltancSileTBtrans(f2, "w") as sile:
+        sile.write_delta(H)
+
+    with pytest.raises(ValueError):
+        deltancSileTBtrans.merge(fout, f1, f2)
+    # nothing is written on errors
+    assert not osp.exists(fout)
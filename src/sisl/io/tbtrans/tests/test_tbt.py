@@ -8,6 +8,7 @@ import warnings
 
 import numpy as np
 import pytest
+from scipy.sparse import csr_matrix
 
 import sisl
 
@@ -650,3 +651,241 @@ def test_2_projection_raise(sisl_files):
 
     with pytest.raises(sisl.io.tbtrans.MissingFDFTBtransError):
         tbt.orbital_transmission(2, 0)
+
+
+@pytest.mark.parametrize("buffer", [128, 1e-4])
+@pytest.mark.parametrize("chunks", [None, (1, 3, 4), (2, 2, 7)])
+def test_tbt_value_avg_blocks(sisl_tmp, buffer, chunks):
+    from sisl._environ import sisl_environ
+
+    nk, ne, no = 5, 11, 7
+    rng = np.random.default_rng(1)
+    wk = rng.random(nk)
+    wk /= wk.sum()
+    DOS = rng.random([nk, ne, no])
+
+    f = sisl_tmp("value_avg.TBT.nc")
+    with netCDF4.Dataset(f, "w") as nc:
+        nc.createDimension("nkpt", nk)
+        nc.createDimension("ne", ne)
+        nc.createDimension("no_d", no)
+        nc.createVariable("wkpt", "f8", ("nkpt",))[:] = wk
+        nc.createVariable("E", "f8", ("ne",))[:] = np.linspace(-1, 1, ne)
+        if chunks is None:
+            v = nc.createVariable("DOS", "f8", ("nkpt", "ne", "no_d"))
+        else:
+            v = nc.createVariable(
+                "DOS", "f8", ("nkpt", "ne", "no_d"), chunksizes=chunks
+            )
+        v[:] = DOS
+
+    tbt = sisl.get_sile(f)
+    ref = np.tensordot(wk, DOS, axes=(0, 0))
+    E = [7, 1, 2, 9, 2]
+    index = [5, 0, 3]
+    with sisl_environ(SISL_IO_BUFFER_SIZE=buffer):
+        assert np.allclose(tbt._value_avg("DOS", kavg=True), ref)
+        assert np.allclose(tbt._value_avg("DOS", kavg=False), DOS)
+        assert np.allclose(tbt._value_avg("DOS", kavg=3), DOS[3])
+        assert np.allclose(tbt._value_avg("DOS", kavg=True, E=4), ref[4])
+        assert np.allclose(tbt._value_avg("DOS", kavg=True, E=E), ref[E])
+        assert np.allclose(
+            tbt._value_avg("DOS", kavg=True, E=slice(2, 9, 3)), ref[2:9:3]
+        )
+        assert np.allclose(
+            tbt._value_avg("DOS", kavg=False, E=E, index=index),
+            DOS[:, E][..., index],
+        )
+        assert np.allclose(
+            tbt._value_avg("DOS", kavg=1, E=E, index=index), DOS[1, E][:, index]
+        )
+        assert np.allclose(
+            tbt._value_E("DOS", kavg=True, E=3, index=index), ref[3, index]
+        )
+
+
+def _tbt_current_file(f, nk=2, ne=21):
+    """Minimal TBT.nc file with orbital currents for a 2-orbital system"""
+    rng = np.random.default_rng(3)
+    Bohr = sisl.unit.siesta.unit_convert("Bohr", "Ang")
+    Ry = sisl.unit.siesta.unit_convert("Ry", "eV")
+    g = sisl.geom.graphene(atoms=sisl.Atom(6, R=[1.5, 1.5])).tile(2, 0)
+
+    # all orbitals of neighbouring atoms are connected
+    rows, cols = [], []
+    for ia in range(g.na):
+        jo = np.concatenate([g.a2o(ja, all=True) for ja in g.close(ia, R=1.5)])
+        for io in g.a2o(ia, all=True):
+            rows.extend([io] * len(jo))
+            cols.extend(jo)
+    csr = csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(g.no, g.no_s))
+    csr.sort_indices()
+
+    with netCDF4.Dataset(f, "w") as nc:
+        for name, n in [
+            ("one", 1),
+            ("xyz", 3),
+            ("n_s", g.n_s),
+            ("na_u", g.na),
+            ("no_u", g.no),
+            ("na_d", g.na),
+            ("nkpt", nk),
+            ("ne", ne),
+            ("nnzs", csr.nnz),
+        ]:
+            nc.createDimension(name, n)
+        nc.createVariable("nsc", "i4", ("xyz",))[:] = g.nsc
+        nc.createVariable("isc_off", "i4", ("n_s", "xyz"))[:] = g.sc_off
+        nc.createVariable("cell", "f8", ("xyz", "xyz"))[:] = g.cell / Bohr
+        nc.createVariable("xa", "f8", ("na_u", "xyz"))[:] = g.xyz / Bohr
+        nc.createVariable("lasto", "i4", ("na_u",))[:] = g.lasto + 1
+        nc.createVariable("a_dev", "i4", ("na_d",))[:] = np.arange(g.na) + 1
+        nc.createVariable("kpt", "f8", ("nkpt", "xyz"))[:] = 0.0
+        nc.createVariable("wkpt", "f8", ("nkpt",))[:] = 1 / nk
+        nc.createVariable("E", "f8", ("ne",))[:] = np.linspace(-1, 1, ne) / Ry
+        nc.createVariable("n_col", "i4", ("no_u",))[:] = np.diff(csr.indptr)
+        nc.createVariable("list_col", "i4", ("nnzs",))[:] = csr.indices + 1
+        for elec, mu in (("Left", 0.2), ("Right", -0.2)):
+            grp = nc.createGroup(elec)
+            grp.createVariable("mu", "f8", ("one",))[:] = mu / Ry
+            grp.createVariable("kT", "f8", ("one",))[:] = 0.025 / Ry
+            grp.createVariable("J", "f8", ("nkpt", "ne", "nnzs"))[:] = (
+                rng.standard_normal((nk, ne, csr.nnz))
+            )
+    return g
+
+
+def test_tbt_current_stacked(sisl_tmp):
+    f = sisl_tmp("current.TBT.nc")
+    g = _tbt_current_file(f)
+    tbt = sisl.get_sile(f)
+
+    # orbital -> atom reduction
+    Jij = tbt.orbital_transmission(4, 0, what="+")
+    Jab = tbt.bond_transmission(4, 0, what="+")
+    assert np.allclose(tbt.sparse_orbital_to_atom(Jij).toarray(), Jab.toarray())
+
+    # energies read at once
+    E = [4, 7, 4]
+    Jab = tbt.bond_transmission(E, 0, what="+")
+    assert len(Jab) == 3
+    for J, e in zip(Jab, E):
+        assert np.allclose(J.toarray(), tbt.bond_transmission(e, 0, what="+").toarray())
+    V = tbt.vector_transmission(slice(2, 5), 0)
+    assert V.shape == (3, g.na, 3)
+    assert np.allclose(V[1], tbt.vector_transmission(3, 0))
+    A = tbt.atom_transmission(np.array([-0.5, 0.5]), 0)
+    assert A.shape == (2, g.na)
+    assert np.allclose(A[1], tbt.atom_transmission(0.5, 0))
+
+    # bias windows integrated at once
+    mu = np.array([0.2, 0.1, 0.0])
+    Jab = tbt.bond_current(0, 1, mu=mu, mu_other=-mu)
+    assert len(Jab) == 3
+    assert np.allclose(Jab[0].toarray(), tbt.bond_current(0, 1).toarray())
+    # no bias window
+    assert np.allclose(Jab[2].data, 0)
+    Jij = tbt.orbital_current(0, 1, what="-", mu=0.1, mu_other=-0.1)
+    assert np.allclose(
+        Jij.toarray(),
+        tbt.orbital_current(0, 1, what="-", mu=mu, mu_other=-mu)[1].toarray(),
+    )
+    assert np.allclose(
+        tbt.sparse_orbital_to_atom(Jij).toarray(),
+        tbt.bond_current(0, 1, what="-", mu=0.1, mu_other=-0.1).toarray(),
+    )
+    V = tbt.vector_current(0, 1, mu=mu, mu_other=-mu)
+    assert V.shape == (3, g.na, 3)
+    assert np.allclose(V[0], tbt.vector_current(0, 1))
+    A = tbt.atom_current(0, 1, kt=[0.025, 0.05])
+    assert A.shape == (2, g.na)
+    assert np.allclose(A[0], tbt.atom_current(0, 1))
+
+
+def test_tbt_cache(sisl_tmp):
+    f = sisl_tmp("cache.TBT.nc")
+    _tbt_current_file(f)
+    tbt = sisl.get_sile(f, cache_size=10)
+    J = tbt.bond_transmission([2, 5], 0)
+    info = tbt.cache_info()
+    assert info.entries > 0
+
+    # the same energies are cached, other energies are not
+    assert np.allclose(J[1].toarray(), tbt.bond_transmission([2, 5], 0)[1].toarray())
+    assert tbt.cache_info().misses == info.misses
+    assert tbt.cache_info().hits > info.hits
+    tbt.bond_transmission(3, 0)
+    assert tbt.cache_info().misses == info.misses + 1
+
+
+def test_tbt_cache_kavg_bool(sisl_tmp):
+    f = sisl_tmp("cache_kavg.TBT.nc")
+    _tbt_current_file(f, nk=3)
+    tbt = sisl.get_sile(f, cache_size=10)
+    nocache = sisl.get_sile(f, cache_size=0)
+
+    # True == 1 (and False == 0) must not share cached data
+    J_avg = tbt.bond_transmission(2, 0, kavg=True).toarray()
+    J_1 = tbt.bond_transmission(2, 0, kavg=1).toarray()
+    assert not np.allclose(J_avg, J_1)
+    assert np.allclose(J_1, nocache.bond_transmission(2, 0, kavg=1).toarray())
+
+    J_all = tbt._value_avg("J", "Left", kavg=False, E=2)
+    J_0 = tbt._value_avg("J", "Left", kavg=0, E=2)
+    assert J_all.shape != J_0.shape
+    assert np.allclose(J_0, nocache._value_avg("J", "Left", kavg=0, E=2))
+    assert np.allclose(J_all[0], J_0)
+
+
+@pytest.mark.parametrize("nthreads", [1, 3])
+def test_tbt_write_tbtav_threads(sisl_tmp, nthreads):
+    from sisl._environ import sisl_environ
+
+    f = sisl_tmp("tbtav.TBT.nc")
+    _tbt_current_file(f, nk=3, ne=11)
+    tbt = sisl.get_sile(f)
+    wk = tbt.wkpt
+
+    fav = sisl_tmp("tbtav.TBT.AV.nc")
+    # force multiple blocks of energies
+    with sisl_environ(SISL_IO_BUFFER_SIZE=1e-3):
+        tbt.write_tbtav(fav, nthreads=nthreads)
+    with netCDF4.Dataset(f) as nc, netCDF4.Dataset(fav) as av:
+        assert "nkpt" not in av.dimensions
+        for elec in ("Left", "Right"):
+            J = np.tensordot(wk, nc[elec]["J"][:], axes=(0, 0))
+            assert np.allclose(av[elec]["J"][:], J)
+        assert np.allclose(av["E"][:], nc["E"][:])
+
+    # only a subset of the k-dependent variables
+    tbt.write_tbtav(fav, variables="Right/*", nthreads=nthreads)
+    with netCDF4.Dataset(fav) as av:
+        assert "J" not in av["Left"].variables
+        assert "J" in av["Right"].variables
+        assert "E" in av.variables
+    tbtav = sisl.get_sile(fav)
+    assert np.allclose(
+        tbtav.orbital_current("Right").toarray(),
+        tbt.orbital_current("Right").toarray(),
+    )
+
+
+def test_tbt_write_tbtav_k_not_leading(sisl_tmp):
+    from sisl._environ import sisl_environ
+
+    f = sisl_tmp("tbtav_k.TBT.nc")
+    _tbt_current_file(f, nk=3, ne=11)
+    rng = np.random.default_rng(5)
+    with netCDF4.Dataset(f, "a") as nc:
+        nc["wkpt"][:] = [0.2, 0.3, 0.5]
+        var = nc.createVariable("Jk", "f8", ("ne", "nkpt", "nnzs"))
+        var[:] = rng.standard_normal(var.shape)
+
+    fav = sisl_tmp("tbtav_k.TBT.AV.nc")
+    # force multiple blocks
+    with sisl_environ(SISL_IO_BUFFER_SIZE=1e-3):
+        sisl.get_sile(f).write_tbtav(fav)
+    with netCDF4.Dataset(f) as nc, netCDF4.Dataset(fav) as av:
+        assert av["Jk"].dimensions == ("ne", "nnzs")
+        Jk = np.tensordot(nc["wkpt"][:], nc["Jk"][:], axes=(0, 1))
+        assert np.allclose(av["Jk"][:], Jk)
@@ -123,3 +123,75 @@ def test_imaginary_fail_geometry(sisl_tmp):
     grid2.write(fi, imag=True)
     with pytest.raises(SislError):
         grid.read(fr, imag=fi)
+
+
+def test_imaginary_files_gz(sisl_tmp):
+    fr = sisl_tmp("GRID_real.cube.gz", _dir)
+    fi = sisl_tmp("GRID_imag.cube.gz", _dir)
+    grid = Grid(0.2, lattice=2.0, dtype=np.complex128)
+    grid.grid = np.random.rand(*grid.shape) + 1j * np.random.rand(*grid.shape)
+    cubeSile(fr, "w").write_grid(grid, imag=fi)
+    read = grid.read(fr, imag=fi)
+    assert np.allclose(grid.grid, read.grid)
+
+
+@pytest.mark.parametrize("fmt", [".5e", ".8e", "15.8f", ".6g"])
+def test_fmt(sisl_tmp, fmt):
+    f = sisl_tmp("GRID.cube", _dir)
+    grid = Grid([6, 5, 13], lattice=2.0)
+    grid.grid = np.random.rand(*grid.shape) - 0.5
+    grid.grid[0, 0, :3] = [0.0, 1e-120, -1e120]
+    grid.write(f, fmt=fmt)
+    read = grid.read(f)
+    assert np.allclose(grid.grid, read.grid, rtol=1e-4, atol=1e-4)
+
+    # z-rows start on new lines with at most 6 values per line
+    with open(f) as fh:
+        lines = fh.readlines()[7:-1]
+    assert len(lines) == 6 * 5 * 3
+    assert [len(line.split()) for line in lines[:3]] == [6, 6, 1]
+
+
+@pytest.mark.parametrize("prec", [1, 5, 9])
+def test_fmt_str_format(prec):
+    from sisl.io.cube import _cube_lines
+
+    rng = np.random.default_rng(prec)
+    values = np.concatenate(
+        [
+            rng.standard_normal(5000) * 10.0 ** rng.integers(-30, 30, 5000),
+            # decimal values with ties and rounding to the next decade
+            rng.integers(-(10**7), 10**7, 5000) / 10.0 ** rng.integers(0, 8, 5000),
+            [99999.95, 1083515.0, 9.999995e5, 0.5, 2.5, -5e-5, 0.0, -0.0, 1e-99],
+        ]
+    )
+    fmt = f".{prec}e"
+    n = 7
+    values = values[: len(values) // n * n].reshape(-1, n)
+    expected = "".join(
+        " ".join(v[:6]) + "\n" + " ".join(v[6:]) + "\n"
+        for v in (
+            [("{:" + fmt + "}").format(x) for x in row] for row in values.tolist()
+        )
+    )
+    assert _cube_lines(values, fmt) == expected
+
+
+def test_read_blocks(sisl_tmp):
+    from sisl._environ import sisl_environ
+
+    f = sisl_tmp("GRID.cube", _dir)
+    grid = Grid(0.2, lattice=2.0)
+    grid.grid = np.random.rand(*grid.shape)
+    grid.write(f)
+    with sisl_environ(SISL_IO_BUFFER_SIZE=1e-6):
+        read = grid.read(f)
+    assert np.allclose(grid.grid, read.grid)
+
+    # missing values
+    with open(f) as fh:
+        lines = fh.readlines()
+    with open(f, "w") as fh:
+        fh.writelines(lines[:-2])
+    with pytest.raises(SislError):
+        grid.read(f)
@@ -1,6 +1,7 @@
 # This Source Code Form is subject to the terms of the Mozilla Public
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
+from itertools import islice
 from numbers import Integral
 
 import numpy as np
@@ -8,13 +9,15 @@ import numpy as np
 from sisl import Grid
 from sisl._internal import set_module
 
-from .._help import grid_reduce_indices
-from ..sile import add_sile, sile_fh_open
+from ..sile import SileError, add_sile, sile_fh_open
 from .car import carSileVASP
 from .sile import SileVASP
 
 __all__ = ["chgSileVASP"]
 
+# Number of lines parsed at once
+_LINES_BLOCK = 65536
+
 
 @set_module("sisl.io.vasp")
 class chgSileVASP(carSileVASP):
@@ -23,10 +26,43 @@ class chgSileVASP(carSileVASP):
     This file-object handles the charge-density from VASP
     """
 
+    def _r_grid_values(self, out, factor):
+        """Add `factor` times the next ``len(out)`` grid values in the file to `out`
+
+        The values are read in blocks of lines to limit the memory usage,
+        for ``factor == 0`` the values are skipped without parsing them.
+        """
+        n = len(out)
+        line = self.readline()
+        values = line.split()
+        per_line = len(values)
+        if per_line == 0:
+            raise SileError(f"{self!s}.read_grid could not find the grid values")
+        nlines = (n + per_line - 1) // per_line
+        if factor != 0:
+            out[:per_line] += np.array(values, dtype=np.float64) * factor
+
+        i = per_line
+        for i0 in range(1, nlines, _LINES_BLOCK):
+            lines = list(islice(self.fh, min(_LINES_BLOCK, nlines - i0)))
+            self._line += len(lines)
+            if factor == 0:
+                i += per_line * (len(lines) - 1) + len(lines[-1].split())
+                continue
+            values = np.array(" ".join(lines).split(), dtype=np.float64)
+            out[i : i + len(values)] += values * factor
+            i += len(values)
+        if i != n:
+            raise SileError(
+                f"{self!s}.read_grid found {i} grid values, expected {n} (the number of values per line should be constant)"
+            )
+
     @sile_fh_open(True)
     def read_grid(self, index=0, dtype=np.float64, **kwargs):
         """Reads the charge density from the file and returns with a grid (plus geometry)
 
+        The file is read in blocks, and only the requested grid components are parsed.
+
         Parameters
         ----------
         index : int or array_like, optional
@@ -53,44 +89,31 @@ class chgSileVASP(carSileVASP):
         # Now we are past the cell and geometry
         # We can now read the size of CHGCAR
         rl()
-        nx, ny, nz = list(map(int, rl().split()))
+        shape = rl().split()
+        nx, ny, nz = map(int, shape)
         n = nx * ny * nz
 
-        is_index = True
         if isinstance(index, Integral):
-            max_index = index + 1
-        else:
-            is_index = False
-            max_index = len(index)
-
-        vals = []
-        vext = vals.extend
-
-        i = 0
-        while i < n * max_index:
-            vext(rl().split())
-            i = len(vals)
-
-            if i % n == 0 and i < n * max_index:
-                # Each time a new spin-index is present, we need to read the coordinates
-                j = 0
-                while j < geom.na:
-                    j += len(rl().split())
-
-                # one line of nx, ny, nz
-                rl()
-
-        # Cut size before proceeding (otherwise it *may* fail)
-        vals = np.array(vals).astype(dtype, copy=False)
-        if is_index:
-            val = vals[n * index : n * (index + 1)].reshape(nz, ny, nx)
+            factors = [0] * index + [1]
         else:
-            vals = vals[: n * max_index].reshape(-1, nz, ny, nx)
-            val = grid_reduce_indices(vals, index, axis=0)
-        del vals
+            factors = index
+
+        val = np.zeros(n, dtype=dtype)
+        for i, factor in enumerate(factors):
+            if i > 0:
+                # Skip augmentation occupancies and magnetic moments
+                # until the grid size of the next component
+                line = rl()
+                while line.split() != shape:
+                    if line == "":
+                        raise SileError(
+                            f"{self!s}.read_grid could not find grid component {i}"
+                        )
+                    line = rl()
+            self._r_grid_values(val, factor)
 
         # Make it C-ordered with nx, ny, nz
-        val = np.swapaxes(val, 0, 2) / V
+        val = np.swapaxes(val.reshape(nz, ny, nx), 0, 2) / V
 
         # Create the grid with data
         # Since we populate the grid data afterwards there
@@ -6,6 +6,7 @@ import os.path as osp
 import numpy as np
 import pytest
 
+import sisl
 from sisl.io.vasp.chg import *
 
 pytestmark = [pytest.mark.io, pytest.mark.vasp]
@@ -40,3 +41,48 @@ def test_graphene_chgcar_index_float(sisl_files):
     gridh = chgSileVASP(f).read_grid(index=[0.5])
 
     assert grid.grid.sum() / 2 == pytest.approx(gridh.grid.sum())
+
+
+def _write_chgcar(f, geom, data, per_line=5):
+    """Write a CHGCAR-like file with the components of `data` (shape (ncomp, nx, ny, nz))"""
+    geom.write(f)
+    _, nx, ny, nz = data.shape
+    with open(f, "a") as fh:
+        fh.write("\n")
+        for i, comp in enumerate(data):
+            if i > 0:
+                # magnetic moments
+                fh.write(" ".join(["0.000"] * geom.na) + "\n")
+            fh.write(f"{nx:5d}{ny:5d}{nz:5d}\n")
+            values = (comp * geom.lattice.volume).ravel(order="F")
+            for i0 in range(0, len(values), per_line):
+                fh.write(
+                    " ".join(f"{v:17.11E}" for v in values[i0 : i0 + per_line]) + "\n"
+                )
+            # augmentation occupancies (CHGCAR)
+            for ia in range(geom.na):
+                fh.write(f"augmentation occupancies{ia + 1:4d}   2\n")
+                fh.write(" 0.1000000E+00 -0.2000000E+00\n")
+
+
+@pytest.mark.parametrize("per_line", [5, 10])
+def test_chgcar_components(sisl_tmp, per_line, monkeypatch):
+    import sisl.io.vasp.chg as chg
+    from sisl import Geometry
+
+    # parse the values in small blocks
+    monkeypatch.setattr(chg, "_LINES_BLOCK", 3)
+    geom = Geometry([[0, 0, 0], [1, 1, 1]], atoms="C", lattice=[2, 3, 4])
+    data = np.random.default_rng(4).random([2, 4, 3, 5])
+    f = sisl_tmp("CHGCAR")
+    _write_chgcar(f, geom, data, per_line)
+
+    sile = chgSileVASP(f)
+    grid = sile.read_grid()
+    assert grid.shape == (4, 3, 5)
+    assert np.allclose(grid.grid, data[0])
+    assert np.allclose(sile.read_grid(1).grid, data[1])
+    assert np.allclose(sile.read_grid(spin=[0.5, -1]).grid, data[0] / 2 - data[1])
+    assert sile.read_grid(dtype=np.float32).grid.dtype == np.float32
+    with pytest.raises(sisl.SileError):
+        sile.read_grid(2)
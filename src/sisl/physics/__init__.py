@@ -41,6 +41,13 @@ Physical quantites
    RecursiveSI
    RealSpaceSE
    RealSpaceSI
+   CachedSE
+
+
+Orbitals on grids
+=================
+
+   BasisGrid
 
 
 Bloch's theorem
@@ -96,6 +103,7 @@ from .state import *
 # isort: split
 
 # Patch BrillouinZone objects and import apply classes
+from .basis_grid import *
 from .bloch import *
 from .brillouinzone import *
 from .densitymatrix import *
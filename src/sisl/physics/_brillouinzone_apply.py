@@ -8,6 +8,7 @@ This module should not expose any methods!
 import operator as op
 from functools import reduce, wraps
 from itertools import zip_longest
+from pathlib import Path
 
 import numpy as np
 from numpy import cross, pi
@@ -26,6 +27,7 @@ from sisl._core.oplist import oplist
 from sisl._dispatcher import AbstractDispatch
 from sisl._environ import get_environ_variable
 from sisl._internal import set_module
+from sisl._pool import SharedPayload, chunk_ranges, get_pool
 from sisl.messages import SislError, progressbar
 from sisl.unit import units
 from sisl.utils.mathematics import cart2spher
@@ -54,30 +56,323 @@ def _correct_str(orig, insert):
 
 
 def _pool_procs(pool):
+    """Retrieve the (persistent) pool of workers for the `pool` argument
+
+    Pools are retained across calls, see `sisl._pool.get_pool`.
     """
-    This is still a bit mysterious to me.
+    return get_pool(pool)
+
 
-    One have to close/terminate + restart to get a functioning
-    pool. Also, the pool's are not existing in a local scope. `pathos`
-    have a global list of open pools to not pollute the pools.
-    This means that one may accidentially request a pool that the user
-    has openened elsewhere.
+class _KReduction:
+    """Base class for reductions of values over k-points, accumulated in-place
+
+    Only the accumulated values are stored, never the values of all k-points.
+    Reductions of separate chunks of k-points may be merged.
+    If `spill` is a file-name, the values of each k-point are additionally
+    written to a memory-mapped file (created with `spill_open`).
     """
-    if pool is False or pool is None:
-        return None
 
-    import pathos as pos
+    def __init__(self, spill=None):
+        self.spill = spill
+        self.W = 0.0
+
+    def empty(self):
+        """A new (empty) reduction with the same settings"""
+        new = self.__class__.__new__(self.__class__)
+        new.__dict__.update(self.__dict__)
+        new._reset()
+        new.W = 0.0
+        return new
+
+    def _reset(self):
+        pass
+
+    def spill_open(self, nk, v):
+        """Create the spill file(s) with space for `nk` values of `v`, returns the memmap(s)
+
+        Tuple values are stored element-wise in separate files, with the index of the
+        element appended to the file name (``eig_0.npy``, ``eig_1.npy``, ...), and
+        a tuple of memmaps is returned.
+        """
+        self.spill_tuple = isinstance(v, tuple)
+        if self.spill_tuple:
+            path = Path(self.spill)
+            self.spill_files = [
+                path.with_name(f"{path.stem}_{i}{path.suffix}") for i in range(len(v))
+            ]
+        else:
+            self.spill_files = [self.spill]
+            v = (v,)
+
+        out = []
+        for spill, vi in zip(self.spill_files, v):
+            try:
+                vi = np.asarray(vi)
+            except ValueError:
+                vi = None
+            if vi is None or vi.dtype == object:
+                raise ValueError(
+                    f"{self.__class__.__name__} can only spill arrays, or tuples of "
+                    "arrays, of a fixed shape to a file"
+                )
+            out.append(
+                np.lib.format.open_memmap(
+                    spill, mode="w+", dtype=vi.dtype, shape=(nk, *vi.shape)
+                )
+            )
+            out[-1][0] = vi
+            out[-1].flush()
+        return self._spill_pack(out)
+
+    def spill_load(self):
+        """Memory-map the spill file(s) created by `spill_open`"""
+        return self._spill_pack(
+            [np.load(spill, mmap_mode="r+") for spill in self.spill_files]
+        )
+
+    def _spill_pack(self, out):
+        if self.spill_tuple:
+            return tuple(out)
+        return out[0]
+
+    @staticmethod
+    def spill_set(out, i, v):
+        """Store value `v` of k-point `i` in the spill memmap(s) `out`"""
+        if isinstance(out, tuple):
+            for o, vi in zip(out, v):
+                o[i] = vi
+        else:
+            out[i] = v
+
+    @staticmethod
+    def spill_flush(out):
+        """Flush the spill memmap(s) `out`"""
+        if isinstance(out, tuple):
+            for o in out:
+                o.flush()
+        else:
+            out.flush()
+
+    def add(self, v, w):
+        """Add the value `v` with weight `w`"""
+        if self.W == 0.0:
+            self._first(v, w)
+        else:
+            self._add(v, w)
+        self.W += w
 
-    if pool is True:
-        nprocs = get_environ_variable("SISL_NUM_PROCS")
-        if nprocs <= 1:
-            return None
-        pool = pos.pools.ProcessPool(nodes=nprocs)
-    elif isinstance(pool, int):
-        pool = pos.pools.ProcessPool(nodes=pool)
-    pool.terminate()
-    pool.join()
-    return pool
+    def merge(self, other):
+        """Merge another reduction (of other k-points) into this one"""
+        if other.W == 0.0:
+            return
+        if self.W == 0.0:
+            self.__dict__.update(other.__dict__)
+            return
+        self._merge(other)
+        self.W += other.W
+
+
+class _SumReduction(_KReduction):
+    """Weighted sum of the values (or average if `mean`)"""
+
+    def __init__(self, mean=False, spill=None):
+        super().__init__(spill)
+        self.mean = mean
+        self.v = None
+
+    def _reset(self):
+        self.v = None
+
+    def _first(self, v, w):
+        self.v = _asoplist(v) * w
+
+    def _add(self, v, w):
+        self.v += _asoplist(v) * w
+
+    def _merge(self, other):
+        self.v += other.v
+
+    def result(self):
+        if self.mean:
+            return self.v / self.W
+        return self.v
+
+
+class _ExtremeReduction(_KReduction):
+    """Element-wise minimum or maximum of the values"""
+
+    def __init__(self, ufunc, spill=None):
+        super().__init__(spill)
+        self.ufunc = ufunc
+        self.v = None
+
+    def _reset(self):
+        self.v = None
+
+    def _first(self, v, w):
+        self.v = np.array(v)
+
+    def _add(self, v, w):
+        self.ufunc(self.v, v, out=self.v)
+
+    def _merge(self, other):
+        self.ufunc(self.v, other.v, out=self.v)
+
+    def result(self):
+        return self.v
+
+
+class _VarReduction(_KReduction):
+    """Weighted (population) variance of the values, using a running algorithm
+
+    The running mean and sum of squared deviations are updated for each
+    k-point (West's algorithm), and chunks are merged by Chan's algorithm.
+    """
+
+    def __init__(self, spill=None):
+        super().__init__(spill)
+        self._reset()
+
+    def _reset(self):
+        self.mean = None
+        self.M2 = None
+
+    def _first(self, v, w):
+        self.mean = np.array(v, dtype=np.result_type(v, np.float64))
+        # the variance of complex values is real, E[|v - mean|^2]
+        self.M2 = np.zeros(self.mean.shape, dtype=self.mean.real.dtype)
+
+    def _promote(self, v):
+        # the values may change data-type (e.g. complex at non-Gamma points)
+        dtype = np.result_type(self.mean, v)
+        if dtype != self.mean.dtype:
+            self.mean = self.mean.astype(dtype)
+
+    def _add(self, v, w):
+        self._promote(v)
+        W = self.W + w
+        delta = v - self.mean
+        self.mean += delta * (w / W)
+        self.M2 += w * (delta.conj() * (v - self.mean)).real
+
+    def _merge(self, other):
+        self._promote(other.mean)
+        W = self.W + other.W
+        delta = other.mean - self.mean
+        self.mean += delta * (other.W / W)
+        self.M2 += other.M2 + np.absolute(delta) ** 2 * (self.W * other.W / W)
+
+    def result(self):
+        return self.M2 / self.W
+
+
+class _HistogramReduction(_KReduction):
+    """Weighted histogram of the values in `bins`
+
+    The values may be a tuple ``(values, weights)`` in which case each value
+    is weighted with the corresponding `weights` (along the first dimension), e.g.
+    eigenvalues and their orbital contributions (for a projected DOS).
+    """
+
+    def __init__(self, bins, spill=None):
+        super().__init__(spill)
+        self.bins = np.asarray(bins)
+        self.v = None
+
+    def _reset(self):
+        self.v = None
+
+    def _hist(self, v, w):
+        if isinstance(v, tuple):
+            v, weights = v
+            weights = np.asarray(weights)
+        else:
+            weights = None
+        v = np.asarray(v).ravel()
+        bins = self.bins
+        idx = np.searchsorted(bins, v, side="right") - 1
+        # include the right-most edge in the last bin (as numpy.histogram)
+        idx[v == bins[-1]] = len(bins) - 2
+        valid = (0 <= idx) & (idx < len(bins) - 1)
+        if weights is None:
+            return np.bincount(idx[valid], minlength=len(bins) - 1) * w
+        shape = weights.shape[1:]
+        weights = weights.reshape(len(v), -1)[valid]
+        out = np.zeros([len(bins) - 1, weights.shape[1]], dtype=weights.dtype)
+        np.add.at(out, idx[valid], weights)
+        return out.reshape(len(bins) - 1, *shape) * w
+
+    def _first(self, v, w):
+        self.v = self._hist(v, w)
+
+    def _accumulate(self, v):
+        if np.can_cast(v.dtype, self.v.dtype, "same_kind"):
+            self.v += v
+        else:
+            # the weights may change data-type (e.g. complex at non-Gamma points)
+            self.v = self.v + v
+
+    def _add(self, v, w):
+        self._accumulate(self._hist(v, w))
+
+    def _merge(self, other):
+        self._accumulate(other.v)
+
+    def result(self):
+        return self.v
+
+
+def _apply_chunk(payload, start, stop, reduce=None):
+    """Worker function calculating the k-points ``range(start, stop)``
+
+    The parent object, k-points and weights are shipped once
+    through the `payload`.
+
+    Returns
+    -------
+    start, stop :
+        the range of k-points calculated
+    values :
+        list of values if `reduce` is None, the reduction (`_KReduction`) of the chunk,
+        otherwise the reduced (``"sum"`` or ``"average"``) value of the chunk
+    """
+    (parent, k, w), (method, args, kwargs, wrap) = payload.load()
+    if isinstance(method, str):
+        method = getattr(parent, method)
+    if wrap is None:
+
+        def wrap(v, parent=None, k=None, weight=None):
+            return v
+
+    else:
+        wrap = allow_kwargs("parent", "k", "weight")(wrap)
+
+    values = (
+        wrap(method(*args, k=k[i], **kwargs), parent=parent, k=k[i], weight=w[i])
+        for i in range(start, stop)
+    )
+    if reduce is None:
+        return start, stop, list(values)
+
+    if isinstance(reduce, _KReduction):
+        spill = None
+        if reduce.spill is not None:
+            spill = reduce.spill_load()
+        for i, v in zip(range(start, stop), values):
+            if spill is not None:
+                reduce.spill_set(spill, i, v)
+            reduce.add(v, w[i])
+        if spill is not None:
+            reduce.spill_flush(spill)
+            del spill
+        return start, stop, reduce
+
+    if reduce == "average":
+        values = (_asoplist(v) * w[i] for i, v in zip(range(start, stop), values))
+    v = _asoplist(next(values))
+    for vi in values:
+        v += vi
+    return start, stop, v
 
 
 @set_module("sisl.physics")
@@ -105,6 +400,57 @@ class BrillouinZoneParentApply(BrillouinZoneApply):
         eta = progressbar(len(bz), f"{bz.__class__.__name__}.{eta_key}", "k", eta)
         return bz, parent, wrap, eta
 
+    def _pool_chunks(
+        self,
+        pool,
+        method,
+        args,
+        kwargs,
+        wrap,
+        eta,
+        eta_key,
+        reduce=None,
+        ordered=True,
+        start=0,
+    ):
+        """Calculate chunks of k-points in `pool`, yields ``(start, stop, values)``
+
+        The parent is only shipped once (through a memory-mapped file) and each
+        task only consists of the range of k-points to calculate.
+        Only k-points from index `start` are calculated.
+        """
+        bz = self._obj
+        parent = bz.parent
+        nk = len(bz) - start
+        eta = progressbar(nk, f"{bz.__class__.__name__}.{eta_key}", "k", eta)
+
+        # Methods of the parent are looked up in the workers, this
+        # ensures the parent is only pickled once
+        name = getattr(method, "__name__", None)
+        if name is not None and getattr(parent, name, None) == method:
+            method = name
+
+        if nk <= 0:
+            eta.close()
+            return
+        ranges = [(i + start, j + start) for i, j in chunk_ranges(nk, pool.nprocs)]
+        starts, stops = zip(*ranges)
+        n = len(ranges)
+        with SharedPayload(
+            (parent, bz.k, bz.weight), (method, args, kwargs, wrap)
+        ) as payload:
+            for chunk in pool.imap(
+                _apply_chunk,
+                [payload] * n,
+                starts,
+                stops,
+                [reduce] * n,
+                ordered=ordered,
+            ):
+                eta.update(chunk[1] - chunk[0])
+                yield chunk
+        eta.close()
+
     def __getattr__(self, key):
         # We need to offload the dispatcher to retrieve
         # methods from the parent object
@@ -142,22 +488,10 @@ class IteratorApply(BrillouinZoneParentApply):
 
             @wraps(method)
             def func(*args, wrap=None, eta=None, **kwargs):
-                pool.restart()
-                bz, parent, wrap, _ = self._parse_kwargs(wrap)
-                k = bz.k
-                w = bz.weight
-
-                def func(k, w):
-                    return wrap(
-                        method(*args, k=k, **kwargs), parent=parent, k=k, weight=w
-                    )
-
-                yield from pool.imap(func, k, w)
-                # TODO notify users that this may be bad when used with zip
-                # unless this generator is the first argument of zip
-                # zip has left-to-right checks of length and stops querying
-                # elements as soon as the left-most one stops.
-                pool.terminate()
+                for _, _, values in self._pool_chunks(
+                    pool, method, args, kwargs, wrap, eta, eta_key
+                ):
+                    yield from values
 
         return func
 
@@ -169,6 +503,27 @@ class SumApply(IteratorApply):
 
     def dispatch(self, method):
         """Dispatch the method by summing"""
+        pool = _pool_procs(self._attrs.get("pool", None))
+        if pool is not None:
+
+            @wraps(method)
+            def func(*args, wrap=None, eta=None, **kwargs):
+                # sum each chunk in the workers
+                it = self._pool_chunks(
+                    pool,
+                    method,
+                    args,
+                    kwargs,
+                    wrap,
+                    eta,
+                    "sum",
+                    reduce="sum",
+                    ordered=False,
+                )
+                return reduce(op.add, (v for _, _, v in it))
+
+            return func
+
         iter_func = super().dispatch(method, eta_key="sum")
 
         @wraps(method)
@@ -304,33 +659,22 @@ class NDArrayApply(BrillouinZoneParentApply):
         else:
 
             @wraps(method)
-            def func(*args, wrap=None, **kwargs):
-                pool.restart()
-                bz, parent, wrap, _ = self._parse_kwargs(wrap)
-                k = bz.k
-                nk = len(k)
-                w = bz.weight
-
-                def func(k, w):
-                    return wrap(
-                        method(*args, k=k, **kwargs), parent=parent, k=k, weight=w
-                    )
-
-                it = pool.imap(func, k, w)
-                v = next(it)
-
-                if unzip:
-                    a = tuple(_create_v(nk, vi) for vi in v)
-                    for i, v in enumerate(it):
-                        i += 1
-                        for ai, vi in zip(a, v):
-                            ai[i] = vi
-                else:
-                    a = _create_v(nk, v)
-                    for i, v in enumerate(it):
-                        a[i + 1] = v
-                del v
-                pool.terminate()
+            def func(*args, wrap=None, eta=None, **kwargs):
+                nk = len(self._obj)
+                a = None
+                for start, stop, values in self._pool_chunks(
+                    pool, method, args, kwargs, wrap, eta, eta_key, ordered=False
+                ):
+                    if a is None:
+                        if unzip:
+                            a = tuple(_create_v(nk, vi) for vi in values[0])
+                        else:
+                            a = _create_v(nk, values[0])
+                    if unzip:
+                        for ai, vi in zip(a, zip(*values)):
+                            ai[start:stop] = vi
+                    else:
+                        a[start:stop] = values
                 return a
 
         return func
@@ -383,26 +727,215 @@ class AverageApply(BrillouinZoneParentApply):
         else:
 
             @wraps(method)
-            def func(*args, wrap=None, **kwargs):
-                pool.restart()
-                bz, parent, wrap, _ = self._parse_kwargs(wrap)
-                k = bz.k
-                w = bz.weight
+            def func(*args, wrap=None, eta=None, **kwargs):
+                # the weighted sum of each chunk is done in the workers
+                it = self._pool_chunks(
+                    pool,
+                    method,
+                    args,
+                    kwargs,
+                    wrap,
+                    eta,
+                    "average",
+                    reduce="average",
+                    ordered=False,
+                )
+                return reduce(op.add, (v for _, _, v in it))
 
-                def func(k, w):
-                    return (
-                        wrap(method(*args, k=k, **kwargs), parent=parent, k=k, weight=w)
-                        * w
+        return func
+
+
+@set_module("sisl.physics")
+class ReduceApply(BrillouinZoneParentApply):
+    """Streaming reduction of the values over all k-points
+
+    The values are accumulated in-place, one k-point at a time,
+    and the values of all k-points are never stored in memory.
+    For parallel calculations each worker reduces its chunks of k-points,
+    and the partial reductions are merged.
+
+    Notes
+    -----
+    All invocations of sub-methods are added these keyword-only arguments:
+
+    eta : bool, optional
+        if true a progress-bar is created, default false.
+    wrap : callable, optional
+        a function that accepts the output of the given routine and post-process
+        it. Defaults to ``lambda x: x``.
+    spill : str or Path, optional
+        additionally store the values of all k-points in this (``.npy``) file
+        through a memory-map. The returned value will then be a tuple of the reduced
+        value and the memory-mapped array (with shape ``(nk, ...)``).
+        Tuple values are stored element-wise in separate files (``<spill>_0.npy``, ...),
+        and a tuple of memory-mapped arrays is returned.
+    """
+
+    # additional keyword-only arguments required by the reduction
+    _reduction_kwargs = ()
+
+    def __str__(self, message="reduce"):
+        return super().__str__(message)
+
+    def _reduction(self, spill, **kwargs):
+        raise NotImplementedError
+
+    def dispatch(self, method, eta_key="reduce"):
+        """Dispatch the method by a streaming reduction"""
+        pool = _pool_procs(self._attrs.get("pool", None))
+
+        @wraps(method)
+        def func(*args, wrap=None, eta=None, spill=None, **kwargs):
+            red_kwargs = {}
+            for key in self._reduction_kwargs:
+                if key not in kwargs:
+                    raise ValueError(
+                        f"{self.__class__.__name__} requires the keyword argument {key}"
                     )
+                red_kwargs[key] = kwargs.pop(key)
+            red = self._reduction(spill=spill, **red_kwargs)
+            bz, parent, wrap_, eta_ = self._parse_kwargs(
+                wrap, eta if pool is None else False, eta_key=eta_key
+            )
+            k = bz.k
+            w = bz.weight
 
-                iter_func = pool.uimap(func, k, w)
-                avg = reduce(op.add, iter_func, _asoplist(next(iter_func)))
-                pool.terminate()
-                return avg
+            # Calculate the first k-point (to create the spill file)
+            v = wrap_(
+                method(*args, k=k[0], **kwargs), parent=parent, k=k[0], weight=w[0]
+            )
+            out = None
+            if spill is not None:
+                out = red.spill_open(len(k), v)
+            red.add(v, w[0])
+            del v
+            eta_.update()
+
+            if pool is None:
+                for i in range(1, len(k)):
+                    v = wrap_(
+                        method(*args, k=k[i], **kwargs),
+                        parent=parent,
+                        k=k[i],
+                        weight=w[i],
+                    )
+                    if out is not None:
+                        red.spill_set(out, i, v)
+                    red.add(v, w[i])
+                    eta_.update()
+                eta_.close()
+
+            else:
+                eta_.close()
+                for _, _, chunk in self._pool_chunks(
+                    pool,
+                    method,
+                    args,
+                    kwargs,
+                    wrap,
+                    eta,
+                    eta_key,
+                    reduce=red.empty(),
+                    ordered=False,
+                    start=1,
+                ):
+                    red.merge(chunk)
+
+            if out is None:
+                return red.result()
+            red.spill_flush(out)
+            return red.result(), out
 
         return func
 
 
+@set_module("sisl.physics")
+class MeanApply(ReduceApply):
+    """Weighted mean of the values, normalized by the sum of weights"""
+
+    def __str__(self, message="mean"):
+        return super().__str__(message)
+
+    def _reduction(self, spill):
+        return _SumReduction(mean=True, spill=spill)
+
+    def dispatch(self, method):
+        return super().dispatch(method, eta_key="mean")
+
+
+@set_module("sisl.physics")
+class MinApply(ReduceApply):
+    """Element-wise minimum of the values"""
+
+    def __str__(self, message="min"):
+        return super().__str__(message)
+
+    def _reduction(self, spill):
+        return _ExtremeReduction(np.minimum, spill=spill)
+
+    def dispatch(self, method):
+        return super().dispatch(method, eta_key="min")
+
+
+@set_module("sisl.physics")
+class MaxApply(ReduceApply):
+    """Element-wise maximum of the values"""
+
+    def __str__(self, message="max"):
+        return super().__str__(message)
+
+    def _reduction(self, spill):
+        return _ExtremeReduction(np.maximum, spill=spill)
+
+    def dispatch(self, method):
+        return super().dispatch(method, eta_key="max")
+
+
+@set_module("sisl.physics")
+class VarApply(ReduceApply):
+    """Element-wise weighted (population) variance of the values"""
+
+    def __str__(self, message="var"):
+        return super().__str__(message)
+
+    def _reduction(self, spill):
+        return _VarReduction(spill=spill)
+
+    def dispatch(self, method):
+        return super().dispatch(method, eta_key="var")
+
+
+@set_module("sisl.physics")
+class HistogramApply(ReduceApply):
+    """Weighted histogram of the values (e.g. eigenvalues) into `bins`
+
+    The methods requires the keyword-only argument ``bins`` (the bin edges).
+    The returned histogram has the k-point weights applied.
+
+    If the (wrapped) method returns a tuple ``(values, weights)`` each
+    value is weighted by the corresponding `weights`, e.g. the eigenvalues
+    and the orbital contributions of the eigenstates yields a (bin-averaged) PDOS.
+
+    Examples
+    --------
+    >>> E = np.linspace(-2, 2, 401)
+    >>> def wrap(es):
+    ...     return es.eig, es.norm2(sum=False)
+    >>> PDOS = mp.apply.histogram.eigenstate(wrap=wrap, bins=E) / np.diff(E).reshape(-1, 1)
+    """
+
+    _reduction_kwargs = ("bins",)
+
+    def __str__(self, message="histogram"):
+        return super().__str__(message)
+
+    def _reduction(self, spill, bins):
+        return _HistogramReduction(bins, spill=spill)
+
+    def dispatch(self, method):
+        return super().dispatch(method, eta_key="histogram")
+
+
 @set_module("sisl.physics")
 class XArrayApply(NDArrayApply):
     def __str__(self, message="xarray"):
@@ -502,6 +1035,11 @@ apply_dispatch.register("ndarray", NDArrayApply)
 apply_dispatch.register("none", NoneApply)
 apply_dispatch.register("list", ListApply)
 apply_dispatch.register("oplist", OpListApply)
+apply_dispatch.register("mean", MeanApply)
+apply_dispatch.register("min", MinApply)
+apply_dispatch.register("max", MaxApply)
+apply_dispatch.register("var", VarApply)
+apply_dispatch.register("histogram", HistogramApply)
 if _has_xarray:
     apply_dispatch.register("dataarray", XArrayApply)
     apply_dispatch.register("xarray", XArrayApply)
@@ -578,7 +1116,6 @@ class GridApply(MonkhorstPackParentApply):
 
     def dispatch(self, method, eta_key="grid"):
         """Dispatch the method by putting values on the grid"""
-        pool = _pool_procs(self._attrs.get("pool", None))
 
         @wraps(method)
         def func(*args, wrap=None, eta=None, **kwargs):
@@ -734,8 +1271,159 @@ class GridApply(MonkhorstPackParentApply):
         return func
 
 
+@set_module("sisl.physics")
+class AdaptiveApply(MonkhorstPackParentApply):
+    r"""Adaptive integration over the Brillouin zone by local refinements of the k-points
+
+    All k-points of the `MonkhorstPack` grid are calculated. Then the volume around each
+    k-point (the cell) is sampled by a finer grid (using ``subdivide`` points along the periodic
+    directions). The local error is estimated as the weighted difference between the cell's value
+    and the (weighted) average of the finer grid:
+
+    .. math::
+        \epsilon_k = w_k \max|\langle v\rangle_{\mathrm{fine}} - v_k|
+
+    All cells are replaced (`MonkhorstPack.replace`) by the finer grids, and only the finer
+    cells of those with :math:`\epsilon_k` larger than ``tol`` are recursively refined.
+    Hence, only regions with large variations are refined (e.g. near the Fermi surface).
+
+    The returned value is the integrated (averaged) quantity, together with the refined
+    `MonkhorstPack` object which may be re-used for other quantities.
+
+    Notes
+    -----
+    Symmetry reduced grids (``MonkhorstPack(..., symmetry=True)``) cannot be refined.
+
+    All invocations of sub-methods are added these keyword-only arguments:
+
+    eta : bool, optional
+        if true a progress-bar is created, default false.
+    wrap : callable, optional
+        a function that accepts the output of the given routine and post-process
+        it. Defaults to ``lambda x: x``. The (wrapped) method must return an array.
+    tol : float, optional
+        tolerance for the local error of a cell, default ``1e-4``.
+    subdivide : int, optional
+        number of sub-divisions of a cell along the periodic directions, default 3.
+        For odd values the central k-point is re-used.
+    max_depth : int, optional
+        maximum number of refinements of a cell, default 4.
+
+    Examples
+    --------
+    >>> E = np.linspace(-1, 1, 21)
+    >>> mp = MonkhorstPack(H, [10, 10, 1])
+    >>> DOS, mp_refined = mp.apply.adaptive.eigenvalue(wrap=lambda ev: ev.DOS(E), tol=1e-3)
+    """
+
+    def __str__(self, message="adaptive"):
+        return super().__str__(message)
+
+    def dispatch(self, method, eta_key="adaptive"):
+        """Dispatch the method by adaptive refinement"""
+
+        @wraps(method)
+        def func(*args, wrap=None, eta=None, **kwargs):
+            tol = kwargs.pop("tol", 1e-4)
+            subdivide = kwargs.pop("subdivide", 3)
+            max_depth = kwargs.pop("max_depth", 4)
+
+            mp, parent, wrap, _ = self._parse_kwargs(wrap, False, eta_key=eta_key)
+            if mp._unfold is not None:
+                # the cells of the k-points are not invariant under
+                # the operations (only under time-reversal)
+                raise SislError(
+                    f"{self.__class__.__name__} cannot refine symmetry reduced k-points, "
+                    "the cells of the reduced k-points does not represent their images"
+                )
+            mp = mp.copy()
+            eta = progressbar(None, f"{mp.__class__.__name__}.{eta_key}", "k", eta)
+
+            def calc(k, w):
+                v = np.empty((len(k), *shape), dtype=dtype)
+                for i in range(len(k)):
+                    v[i] = wrap(
+                        method(*args, k=k[i], **kwargs),
+                        parent=parent,
+                        k=k[i],
+                        weight=w[i],
+                    )
+                    eta.update()
+                return v
+
+            # the initial k-points
+            k = mp.k
+            w = mp.weight
+            v = np.asarray(
+                wrap(
+                    method(*args, k=k[0], **kwargs), parent=parent, k=k[0], weight=w[0]
+                )
+            )
+            eta.update()
+            shape, dtype = v.shape, v.dtype
+            values = np.concatenate((v.reshape(1, *shape), calc(k[1:], w[1:])))
+            refine = np.ones(len(k), dtype=bool)
+
+            # the finer grid of a cell (only along periodic directions)
+            nsub = np.where(mp._diag > 1, subdivide, 1)
+            size = mp._size / mp._diag
+            for _ in range(max_depth):
+                if not refine.any():
+                    break
+                sub = MonkhorstPack(parent, nsub, size=size, trs=False)
+                size = size / nsub
+                sub_w = sub.weight / sub.weight.sum()
+                # re-use the central k-point
+                center = np.all(np.abs(sub.k) < 1e-10, axis=1)
+
+                idx = refine.nonzero()[0]
+                wc = mp.weight[idx]
+                # values on the finer grids of each cell
+                vs = np.empty((len(idx), len(sub), *shape), dtype=dtype)
+                vs[:, center] = values[idx].reshape(len(idx), 1, *shape)
+                for i, (ki, wi) in enumerate(zip(mp.k[idx], wc)):
+                    ks = mp.in_primitive(sub.k[~center] + ki)
+                    vs[i, ~center] = calc(ks, wi * sub_w[~center])
+
+                # local error estimate
+                v_fine = np.einsum("k,nk...->n...", sub_w, vs)
+                err = wc * np.abs(v_fine - values[idx]).reshape(len(idx), -1).max(1)
+
+                # Replace all cells by their finer grid (they are already calculated)
+                # and only continue refinement of cells with too large errors.
+                # Cells with equal weights are replaced simultaneously, the
+                # replaced k-points are appended, so the indices of
+                # subsequent groups are shifted by the already removed k-points.
+                removed = idx[:0]
+                group_w, group = np.unique(wc, return_inverse=True)
+                for ig, gw in enumerate(group_w):
+                    gidx = (group == ig).nonzero()[0]
+                    cidx = idx[gidx] - np.searchsorted(removed, idx[gidx])
+                    sub_g = sub.copy()
+                    sub_g._w = sub_w * gw
+                    mp.replace(
+                        cidx, sub_g, displacement=True, as_index=True, check_vol=False
+                    )
+                    values = np.concatenate(
+                        (
+                            np.delete(values, cidx, axis=0),
+                            vs[gidx].reshape(-1, *shape),
+                        )
+                    )
+                    refine = np.concatenate(
+                        (np.delete(refine, cidx), np.repeat(err[gidx] > tol, len(sub)))
+                    )
+                    removed = np.sort(np.concatenate((removed, idx[gidx])))
+
+            eta.close()
+            return np.einsum("k,k...->...", mp.weight, values), mp
+
+        return func
+
+
 # Register dispatched functions
 apply_dispatch = MonkhorstPack.apply
 apply_dispatch.register("grid", GridApply)
+apply_dispatch.register("adaptive", AdaptiveApply)
 
 del apply_dispatch
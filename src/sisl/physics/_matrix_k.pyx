@@ -17,9 +17,16 @@ from ._matrix_sc_phase_nc_diag import *
 from ._matrix_sc_phase_so import *
 from ._phase import *
 
+from sisl._environ import get_environ_variable
+
 __all__ = ["matrix_k", "matrix_k_nc", "matrix_k_so", "matrix_k_nc_diag"]
 
 
+def _num_threads():
+    """Number of threads used in the phase kernels (``SISL_NUM_THREADS``)"""
+    return max(1, get_environ_variable("SISL_NUM_THREADS"))
+
+
 def matrix_k(gauge, M, const int idx, sc,
              np.ndarray[np.float64_t, ndim=1, mode='c'] k, dtype, format):
     dtype = phase_dtype(k, M.dtype, dtype)
@@ -49,36 +56,36 @@ def matrix_k(gauge, M, const int idx, sc,
         nc = M.geometry.no_s
         return _matrix_sc_k(M._csr, nc, idx, phases, dtype, format, p_opt)
 
-    return _matrix_k(M._csr, idx, phases, dtype, format, p_opt)
+    return _matrix_k(M._csr, idx, phases, dtype, format, p_opt, _num_threads())
 
 
 @cython.boundscheck(False)
 @cython.wraparound(False)
 @cython.initializedcheck(False)
-def _matrix_k(csr, const int idx, phases, dtype, format, p_opt):
+def _matrix_k(csr, const int idx, phases, dtype, format, p_opt, const int nthreads=1):
 
     if dtype == np.complex128:
 
         if format in ["array", "matrix", "dense"]:
-            return _phase_array_c128(csr.ptr, csr.ncol, csr.col, csr._D, idx, phases, p_opt)
+            return _phase_array_c128(csr.ptr, csr.ncol, csr.col, csr._D, idx, phases, p_opt, nthreads)
 
         # Default must be something else.
-        return _phase_csr_c128(csr.ptr, csr.ncol, csr.col, csr._D, idx, phases, p_opt).asformat(format)
+        return _phase_csr_c128(csr.ptr, csr.ncol, csr.col, csr._D, idx, phases, p_opt, nthreads).asformat(format)
 
     elif dtype == np.float64:
         if format in ["array", "matrix", "dense"]:
-            return _array_f64(csr.ptr, csr.ncol, csr.col, csr._D, idx)
-        return _csr_f64(csr.ptr, csr.ncol, csr.col, csr._D, idx).asformat(format)
+            return _array_f64(csr.ptr, csr.ncol, csr.col, csr._D, idx, nthreads)
+        return _csr_f64(csr.ptr, csr.ncol, csr.col, csr._D, idx, nthreads).asformat(format)
 
     elif dtype == np.complex64:
         if format in ["array", "matrix", "dense"]:
-            return _phase_array_c64(csr.ptr, csr.ncol, csr.col, csr._D, idx, phases, p_opt)
-        return _phase_csr_c64(csr.ptr, csr.ncol, csr.col, csr._D, idx, phases, p_opt).asformat(format)
+            return _phase_array_c64(csr.ptr, csr.ncol, csr.col, csr._D, idx, phases, p_opt, nthreads)
+        return _phase_csr_c64(csr.ptr, csr.ncol, csr.col, csr._D, idx, phases, p_opt, nthreads).asformat(format)
 
     elif dtype == np.float32:
         if format in ["array", "matrix", "dense"]:
-            return _array_f32(csr.ptr, csr.ncol, csr.col, csr._D, idx)
-        return _csr_f32(csr.ptr, csr.ncol, csr.col, csr._D, idx).asformat(format)
+            return _array_f32(csr.ptr, csr.ncol, csr.col, csr._D, idx, nthreads)
+        return _csr_f32(csr.ptr, csr.ncol, csr.col, csr._D, idx, nthreads).asformat(format)
 
     raise ValueError("matrix_k: currently only supports dtype in [float32, float64, complex64, complex128].")
 
@@ -125,25 +132,25 @@ def matrix_k_nc(gauge, M, sc,
             format = format[3:]
         nc = M.geometry.no_s
         return _matrix_sc_k_nc(M._csr, nc, phases, dtype, format, p_opt)
-    return _matrix_k_nc(M._csr, phases, dtype, format, p_opt)
+    return _matrix_k_nc(M._csr, phases, dtype, format, p_opt, _num_threads())
 
 
 @cython.boundscheck(False)
 @cython.wraparound(False)
 @cython.initializedcheck(False)
-def _matrix_k_nc(csr, phases, dtype, format, p_opt):
+def _matrix_k_nc(csr, phases, dtype, format, p_opt, const int nthreads=1):
 
     if csr.shape[2] < 4:
         raise ValueError("matrix_k_nc requires input matrix to have 4 components")
 
     if dtype == np.complex128:
         if format in ["array", "matrix", "dense"]:
-            return _phase_nc_array_c128(csr.ptr, csr.ncol, csr.col, csr._D, phases, p_opt)
-        return _phase_nc_csr_c128(csr.ptr, csr.ncol, csr.col, csr._D, phases, p_opt).asformat(format)
+            return _phase_nc_array_c128(csr.ptr, csr.ncol, csr.col, csr._D, phases, p_opt, nthreads)
+        return _phase_nc_csr_c128(csr.ptr, csr.ncol, csr.col, csr._D, phases, p_opt, nthreads).asformat(format)
     elif dtype == np.complex64:
         if format in ["array", "matrix", "dense"]:
-            return _phase_nc_array_c64(csr.ptr, csr.ncol, csr.col, csr._D, phases, p_opt)
-        return _phase_nc_csr_c64(csr.ptr, csr.ncol, csr.col, csr._D, phases, p_opt).asformat(format)
+            return _phase_nc_array_c64(csr.ptr, csr.ncol, csr.col, csr._D, phases, p_opt, nthreads)
+        return _phase_nc_csr_c64(csr.ptr, csr.ncol, csr.col, csr._D, phases, p_opt, nthreads).asformat(format)
 
     raise ValueError("matrix_k_nc: only supports dtype in [complex64, complex128].")
 
@@ -187,25 +194,25 @@ def matrix_k_so(gauge, M, sc,
             format = format[3:]
         nc = M.geometry.no_s
         return _matrix_sc_k_so(M._csr, nc, phases, dtype, format, p_opt)
-    return _matrix_k_so(M._csr, phases, dtype, format, p_opt)
+    return _matrix_k_so(M._csr, phases, dtype, format, p_opt, _num_threads())
 
 
 @cython.boundscheck(False)
 @cython.wraparound(False)
 @cython.initializedcheck(False)
-def _matrix_k_so(csr, phases, dtype, format, p_opt):
+def _matrix_k_so(csr, phases, dtype, format, p_opt, const int nthreads=1):
 
     if csr.shape[2] < 8:
         raise ValueError("matrix_k_so requires input matrix to have 8 components")
 
     if dtype == np.complex128:
         if format in ["array", "matrix", "dense"]:
-            return _phase_so_array_c128(csr.ptr, csr.ncol, csr.col, csr._D, phases, p_opt)
-        return _phase_so_csr_c128(csr.ptr, csr.ncol, csr.col, csr._D, phases, p_opt).asformat(format)
+            return _phase_so_array_c128(csr.ptr, csr.ncol, csr.col, csr._D, phases, p_opt, nthreads)
+        return _phase_so_csr_c128(csr.ptr, csr.ncol, csr.col, csr._D, phases, p_opt, nthreads).asformat(format)
     elif dtype == np.complex64:
         if format in ["array", "matrix", "dense"]:
-            return _phase_so_array_c64(csr.ptr, csr.ncol, csr.col, csr._D, phases, p_opt)
-        return _phase_so_csr_c64(csr.ptr, csr.ncol, csr.col, csr._D, phases, p_opt).asformat(format)
+            return _phase_so_array_c64(csr.ptr, csr.ncol, csr.col, csr._D, phases, p_opt, nthreads)
+        return _phase_so_csr_c64(csr.ptr, csr.ncol, csr.col, csr._D, phases, p_opt, nthreads).asformat(format)
 
     raise ValueError("matrix_k_so: only supports dtype in [complex64, complex128].")
 
@@ -249,22 +256,22 @@ def matrix_k_nc_diag(gauge, M, const int idx, sc,
             format = format[3:]
         nc = M.geometry.no_s
         return _matrix_sc_k_nc_diag(M._csr, nc, idx, phases, dtype, format, p_opt)
-    return _matrix_k_nc_diag(M._csr, idx, phases, dtype, format, p_opt)
+    return _matrix_k_nc_diag(M._csr, idx, phases, dtype, format, p_opt, _num_threads())
 
 
 @cython.boundscheck(False)
 @cython.wraparound(False)
 @cython.initializedcheck(False)
-def _matrix_k_nc_diag(csr, const int idx, phases, dtype, format, p_opt):
+def _matrix_k_nc_diag(csr, const int idx, phases, dtype, format, p_opt, const int nthreads=1):
 
     if dtype == np.complex128:
         if format in ["array", "matrix", "dense"]:
-            return _phase_nc_diag_array_c128(csr.ptr, csr.ncol, csr.col, csr._D, idx, phases, p_opt)
-        return _phase_nc_diag_csr_c128(csr.ptr, csr.ncol, csr.col, csr._D, idx, phases, p_opt).asformat(format)
+            return _phase_nc_diag_array_c128(csr.ptr, csr.ncol, csr.col, csr._D, idx, phases, p_opt, nthreads)
+        return _phase_nc_diag_csr_c128(csr.ptr, csr.ncol, csr.col, csr._D, idx, phases, p_opt, nthreads).asformat(format)
     elif dtype == np.complex64:
         if format in ["array", "matrix", "dense"]:
-            return _phase_nc_diag_array_c64(csr.ptr, csr.ncol, csr.col, csr._D, idx, phases, p_opt)
-        return _phase_nc_diag_csr_c64(csr.ptr, csr.ncol, csr.col, csr._D, idx, phases, p_opt).asformat(format)
+            return _phase_nc_diag_array_c64(csr.ptr, csr.ncol, csr.col, csr._D, idx, phases, p_opt, nthreads)
+        return _phase_nc_diag_csr_c64(csr.ptr, csr.ncol, csr.col, csr._D, idx, phases, p_opt, nthreads).asformat(format)
 
     raise ValueError("matrix_k_nc_diag: only supports dtype in [complex64, complex128].")
 
@@ -0,0 +1,136 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+r""" Vectorized construction of matrices for a batch of k-points
+
+Instead of building one matrix per k-point, the matrix elements are
+folded into a sparse *coefficient* matrix :math:`\mathbf C` with one row
+per phase-factor and one column per dense matrix element.
+For a batch of k-points with phase factors :math:`\mathbf P` (one row per k-point),
+all dense matrices are then calculated as a single product :math:`\mathbf P\mathbf C`.
+"""
+import numpy as np
+from numpy import dot, exp, pi
+from scipy.sparse import csr_matrix
+
+import sisl._array as _a
+
+from ._phase import phase_dtype
+
+__all__ = ["matrix_k_batch", "spin_blocks", "spin_blocks_diag"]
+
+
+def spin_blocks(D, kind):
+    r"""Convert the matrix components `D` into the 2x2 spin-box values
+
+    Parameters
+    ----------
+    D : numpy.ndarray
+       the sparse matrix data, with shape ``(nnz, dim)``
+    kind : {"nc", "so"}
+       whether the components are non-collinear or spin-orbit
+
+    Returns
+    -------
+    numpy.ndarray
+        the spin-box values with shape ``(nnz, 2, 2)``
+    """
+    V = np.empty([D.shape[0], 2, 2], dtype=np.complex128)
+    if kind == "nc":
+        V[:, 0, 0] = D[:, 0]
+        V[:, 0, 1] = D[:, 2] + 1j * D[:, 3]
+        V[:, 1, 0] = D[:, 2] - 1j * D[:, 3]
+        V[:, 1, 1] = D[:, 1]
+    elif kind == "so":
+        V[:, 0, 0] = D[:, 0] + 1j * D[:, 4]
+        V[:, 0, 1] = D[:, 2] + 1j * D[:, 3]
+        V[:, 1, 0] = D[:, 6] + 1j * D[:, 7]
+        V[:, 1, 1] = D[:, 1] + 1j * D[:, 5]
+    else:
+        raise ValueError(f"spin_blocks: unknown kind {kind}, must be in [nc, so]")
+    return V
+
+
+def spin_blocks_diag(D):
+    r"""Convert a single component `D` into spin-diagonal 2x2 spin-box values"""
+    V = np.zeros([D.shape[0], 2, 2], dtype=D.dtype)
+    V[:, 0, 0] = D
+    V[:, 1, 1] = D
+    return V
+
+
+def _batch_dtype(k, M_dtype, dtype, force_complex):
+    """Determine the returned data-type based on *all* k-points"""
+    gamma = np.all(np.abs(k) <= 0.0000001, axis=1)
+    # find a representative k-point, a non-Gamma point if there are any
+    ik = np.argmin(gamma) if not gamma.all() else 0
+    return phase_dtype(np.ascontiguousarray(k[ik]), M_dtype, dtype, force_complex)
+
+
+def matrix_k_batch(gauge, M, V, lattice, k, dtype, force_complex=False):
+    r"""Dense matrices for a batch of k-points, shape ``(nk, no * ns, no * ns)``
+
+    Parameters
+    ----------
+    gauge : {"R", "r"}
+       the chosen gauge
+    M : SparseOrbital
+       the sparse matrix (its sparsity pattern is used)
+    V : numpy.ndarray
+       the matrix values for *all* elements in the sparse data,
+       either with shape ``(nnz,)`` or ``(nnz, ns, ns)`` for spin-boxes.
+       The first dimension should correspond to ``M._csr._D``.
+    lattice : Lattice
+       lattice used to calculate the phases
+    k : numpy.ndarray
+       the k-points, shape ``(nk, 3)``
+    dtype : numpy.dtype
+       the requested data-type
+    force_complex : bool, optional
+       whether the returned matrices must be complex (also at the Gamma-point)
+    """
+    if V.ndim == 1:
+        V = V.reshape(-1, 1, 1)
+    ns = V.shape[1]
+    dtype = _batch_dtype(k, V.dtype, dtype, force_complex)
+
+    csr = M._csr
+    no = csr.shape[0]
+    N = no * ns
+
+    # Retrieve the actual elements (disregarding non-used elements)
+    idx = _a.array_arange(csr.ptr[:-1], n=csr.ncol)
+    rows = np.repeat(_a.arangel(no), csr.ncol)
+    isc, cols = np.divmod(csr.col[idx].astype(np.int64), no)
+    V = V[idx]
+
+    if gauge == "R":
+        # one phase per supercell offset
+        X = isc
+        nX = lattice.n_s
+        phase_exp = (2j * pi) * dot(k, lattice.sc_off.T)
+    elif gauge == "r":
+        # one phase per matrix element
+        X = _a.arangei(len(idx))
+        nX = len(idx)
+        rij = M.Rij()._csr._D[idx]
+        phase_exp = 1j * dot(dot(k, lattice.rcell), rij.T)
+    else:
+        raise ValueError("matrix_k_batch: gauge must be in [r, R]")
+
+    # Linear index of all elements in the dense (spin-box) matrix
+    s = _a.arangei(ns)
+    lin = (rows.reshape(-1, 1, 1) * ns + s.reshape(1, -1, 1)) * N + (
+        cols.reshape(-1, 1, 1) * ns + s.reshape(1, 1, -1)
+    )
+    X = np.broadcast_to(X.reshape(-1, 1, 1), lin.shape)
+
+    # duplicate entries (folded columns) are summed
+    C = csr_matrix((V.ravel(), (X.ravel(), lin.ravel())), shape=(nX, N * N))
+    if np.iscomplexobj(np.empty(0, dtype=dtype)):
+        P = exp(phase_exp)
+    else:
+        P = np.ones(phase_exp.shape, dtype=dtype)
+        C = C.real
+    out = np.asarray(P @ C, dtype=dtype)
+    return out.reshape(len(k), N, N)
@@ -0,0 +1,239 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+r""" Cached assembly plans for matrices at k-points
+
+When the sparsity pattern of a matrix is fixed, the folding of the supercell
+columns into the unit-cell (and the merging of duplicate elements) is the same
+for all k-points.
+A `KPlan` pre-computes this once, after which a matrix at any k-point is
+a gather of the phases, followed by a single (sparse) weighted sum.
+"""
+import numpy as np
+from scipy.sparse import csr_matrix
+
+import sisl._array as _a
+
+from ._phase import phase_dtype, phase_rij, phase_rsc
+
+__all__ = ["KPlan", "matrix_k_plan"]
+
+
+class KPlan:
+    r"""Pre-computed folding of a sparse matrix into its k-point matrices
+
+    Parameters
+    ----------
+    csr : SparseCSR
+       the sparse matrix (only the sparsity pattern is used)
+    ns : {1, 2}
+       size of the spin-boxes, 2 for non-collinear and spin-orbit matrices
+    diag : bool, optional
+       only the diagonal of the spin-boxes are used (e.g. overlap matrices for
+       non-collinear spin)
+    """
+
+    __slots__ = (
+        "ns",
+        "diag",
+        "shape",
+        "idx",
+        "isc",
+        "_spin",
+        "indptr",
+        "indices",
+        "rows",
+        "_sum",
+        "_sum_c",
+        "_ptr",
+        "_ncol",
+        "_col",
+    )
+
+    def __init__(self, csr, ns: int = 1, diag: bool = False):
+        no = csr.shape[0]
+        N = no * ns
+        self.ns = ns
+        self.diag = diag
+        self.shape = (N, N)
+
+        # Retrieve the actual elements (disregarding non-used elements)
+        idx = _a.array_arange(csr.ptr[:-1], n=csr.ncol)
+        rows = np.repeat(_a.arangel(no), csr.ncol)
+        isc, cols = np.divmod(csr.col[idx].astype(np.int64), no)
+        self.idx = idx
+        self.isc = isc
+
+        # The used spin-box elements
+        if diag:
+            s1 = s2 = _a.arangel(ns)
+        else:
+            s1, s2 = np.divmod(_a.arangel(ns * ns), ns)
+        self._spin = (s1, s2)
+
+        # Linear index of all (spin-box) elements in the folded matrix
+        lin = (rows.reshape(-1, 1) * ns + s1) * N + (cols.reshape(-1, 1) * ns + s2)
+        # the folded elements, and the map from each element to its folded element
+        lin, inv = np.unique(lin.ravel(), return_inverse=True)
+        rows, cols = np.divmod(lin, N)
+        self.rows = rows
+        self.indices = cols.astype(np.int32)
+        self.indptr = np.insert(np.cumsum(np.bincount(rows, minlength=N)), 0, 0).astype(
+            np.int32
+        )
+
+        # Summation of the duplicate elements (folded columns)
+        self._sum = csr_matrix(
+            (
+                np.ones(len(inv), dtype=np.float64),
+                (inv.ravel(), _a.arangel(len(inv))),
+            ),
+            shape=(len(lin), len(inv)),
+        )
+        # complex version (created when needed), avoids up-casting at each call
+        self._sum_c = None
+
+        # to check whether the sparsity pattern has changed
+        self._ptr = csr.ptr.copy()
+        self._ncol = csr.ncol.copy()
+        self._col = csr.col[idx].copy()
+
+    def __repr__(self):
+        return f"<{self.__module__}.{self.__class__.__name__} shape={self.shape}, nnz={len(self.indices)}>"
+
+    def is_valid(self, csr) -> bool:
+        """Whether this plan is still valid for the sparsity pattern of `csr`"""
+        if csr.shape[0] * self.ns != self.shape[0] or len(csr.ptr) != len(self._ptr):
+            return False
+        if not np.array_equal(csr.ptr, self._ptr):
+            return False
+        if not np.array_equal(csr.ncol, self._ncol):
+            return False
+        return np.array_equal(csr.col[self.idx], self._col)
+
+    def __call__(self, V, phases, p_opt: int, dtype, format: str = "csr", out=None):
+        r"""Assemble the matrix from the sparse values and phases
+
+        Parameters
+        ----------
+        V : numpy.ndarray
+           the sparse matrix values, shape ``(nnz,)`` or ``(nnz, ns, ns)``
+           (the first dimension corresponds to the sparse data)
+        phases : numpy.ndarray
+           phases for each supercell offset (``p_opt == 1``), or for each
+           element (``p_opt == 0``)
+        p_opt : {0, 1}
+           how to index `phases`
+        dtype : numpy.dtype
+           the data-type of the returned matrix
+        format : {"csr", "array", "dense", "matrix", ...}
+           the returned format
+        out : numpy.ndarray or scipy.sparse.csr_matrix, optional
+           output matrix, for ``format='csr'`` it must have the same sparsity
+           pattern as the matrices returned by this plan (e.g. a matrix from a previous
+           call). Dense output must have the correct shape.
+        """
+        if p_opt == 1:
+            ph = phases[self.isc]
+        else:
+            ph = phases[self.idx]
+        V = V[self.idx]
+        if V.ndim == 1:
+            V = V * ph
+        else:
+            V = V[:, self._spin[0], self._spin[1]] * ph.reshape(-1, 1)
+        if np.iscomplexobj(V):
+            if self._sum_c is None:
+                self._sum_c = self._sum.astype(np.complex128)
+            data = self._sum_c @ V.ravel()
+        else:
+            data = self._sum @ V.ravel()
+        if not np.iscomplexobj(np.empty(0, dtype=dtype)):
+            data = data.real
+
+        if format in ("array", "matrix", "dense"):
+            if out is None:
+                out = np.zeros(self.shape, dtype=dtype)
+            else:
+                if out.shape != self.shape:
+                    raise ValueError(
+                        f"{self.__class__.__name__} out argument has wrong shape {out.shape} != {self.shape}"
+                    )
+                out.fill(0)
+            out[self.rows, self.indices] = data
+            return out
+
+        if out is None:
+            out = csr_matrix(
+                (
+                    data.astype(dtype, copy=False),
+                    self.indices.copy(),
+                    self.indptr.copy(),
+                ),
+                shape=self.shape,
+            )
+        else:
+            if not (
+                out.shape == self.shape
+                and np.array_equal(out.indptr, self.indptr)
+                and np.array_equal(out.indices, self.indices)
+            ):
+                raise ValueError(
+                    f"{self.__class__.__name__} out argument does not have the same sparsity pattern"
+                )
+            out.data[:] = data
+        if format == "csr":
+            return out
+        return out.asformat(format)
+
+
+def matrix_k_plan(
+    gauge, M, V, lattice, k, dtype, format, out, force_complex=False, diag=False
+):
+    r"""Matrix at `k` using the cached assembly plan of `M`
+
+    Parameters
+    ----------
+    gauge : {"R", "r"}
+       the chosen gauge
+    M : SparseOrbitalBZ
+       the sparse matrix (its sparsity pattern is used)
+    V : numpy.ndarray
+       the matrix values for *all* elements in the sparse data,
+       either with shape ``(nnz,)`` or ``(nnz, 2, 2)`` for spin-boxes.
+       For ``gauge='r'`` `M` must be finalized *before* extracting `V`.
+    lattice : Lattice
+       lattice used to calculate the phases
+    k : numpy.ndarray
+       the k-point
+    dtype : numpy.dtype
+       the requested data-type, if None, the data-type of `out` will be used
+    format : str
+       the returned format, the supercell formats are not allowed
+    out : numpy.ndarray or scipy.sparse.csr_matrix
+       the output matrix
+    force_complex : bool, optional
+       whether the returned matrix must be complex (also at the Gamma-point)
+    diag : bool, optional
+       only use the diagonal spin-box elements of `V`
+    """
+    if format.startswith("sc:") or format == "sc":
+        raise ValueError(
+            f"{M.__class__.__name__}: the out argument cannot be used with the supercell formats"
+        )
+    if dtype is None and out is not None:
+        dtype = out.dtype
+    dtype = phase_dtype(k, V.dtype, dtype, force_complex)
+
+    if gauge == "R":
+        phases = phase_rsc(lattice, k, dtype)
+        p_opt = 1
+    elif gauge == "r":
+        # M must already be finalized (V should be extracted afterwards)
+        phases = phase_rij(M.Rij()._csr._D, lattice, k, dtype)
+        p_opt = 0
+    else:
+        raise ValueError("matrix_k_plan: gauge must be in [r, R]")
+
+    ns = 1 if V.ndim == 1 else V.shape[1]
+    return M.k_plan(ns, diag)(V, phases, p_opt, dtype, format, out)
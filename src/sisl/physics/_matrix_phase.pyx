@@ -3,6 +3,7 @@
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 # cython: boundscheck=False, wraparound=False, initializedcheck=False, cdivision=True
 cimport cython
+from cython.parallel cimport prange
 
 import numpy as np
 cimport numpy as np
@@ -29,7 +30,8 @@ ctypedef fused numeric_complex:
 def _csr_f32(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
              np.ndarray[np.int32_t, ndim=1, mode='c'] NCOL,
              np.ndarray[np.int32_t, ndim=1, mode='c'] COL,
-             numeric_real[:, ::1] D, const int idx):
+             numeric_real[:, ::1] D, const int idx,
+             const int nthreads=1):
 
     # Convert to memory views
     cdef int[::1] ptr = PTR
@@ -48,7 +50,7 @@ def _csr_f32(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
     cdef Py_ssize_t r, ind, s_idx
     cdef int c
 
-    for r in range(nr):
+    for r in prange(nr, nogil=True, num_threads=nthreads):
         for ind in range(ptr[r], ptr[r] + ncol[r]):
             c = col[ind] % nr
             s_idx = _index_sorted(v_col[v_ptr[r]:v_ptr[r] + v_ncol[r]], c)
@@ -60,7 +62,8 @@ def _csr_f32(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
 def _csr_f64(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
              np.ndarray[np.int32_t, ndim=1, mode='c'] NCOL,
              np.ndarray[np.int32_t, ndim=1, mode='c'] COL,
-             numeric_real[:, ::1] D, const int idx):
+             numeric_real[:, ::1] D, const int idx,
+             const int nthreads=1):
 
     # Convert to memory views
     cdef int[::1] ptr = PTR
@@ -79,7 +82,7 @@ def _csr_f64(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
     cdef Py_ssize_t r, ind, s_idx
     cdef int c
 
-    for r in range(nr):
+    for r in prange(nr, nogil=True, num_threads=nthreads):
         for ind in range(ptr[r], ptr[r] + ncol[r]):
             c = col[ind] % nr
             s_idx = _index_sorted(v_col[v_ptr[r]:v_ptr[r] + v_ncol[r]], c)
@@ -92,7 +95,8 @@ def _phase_csr_c64(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
                    np.ndarray[np.int32_t, ndim=1, mode='c'] NCOL,
                    np.ndarray[np.int32_t, ndim=1, mode='c'] COL,
                    numeric_complex[:, ::1] D, const int idx,
-                   np.ndarray[np.complex64_t, ndim=1, mode='c'] PHASES, const int p_opt):
+                   np.ndarray[np.complex64_t, ndim=1, mode='c'] PHASES, const int p_opt,
+                   const int nthreads=1):
 
     # Convert to memory views
     cdef int[::1] ptr = PTR
@@ -113,13 +117,13 @@ def _phase_csr_c64(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
     cdef int c
 
     if p_opt == 0:
-        for r in range(nr):
+        for r in prange(nr, nogil=True, num_threads=nthreads):
             for ind in range(ptr[r], ptr[r] + ncol[r]):
                 c = col[ind] % nr
                 s_idx = _index_sorted(v_col[v_ptr[r]:v_ptr[r] + v_ncol[r]], c)
                 v[v_ptr[r] + s_idx] += D[ind, idx] * phases[ind]
     else:
-        for r in range(nr):
+        for r in prange(nr, nogil=True, num_threads=nthreads):
             for ind in range(ptr[r], ptr[r] + ncol[r]):
                 c = col[ind] % nr
                 s_idx = _index_sorted(v_col[v_ptr[r]:v_ptr[r] + v_ncol[r]], c)
@@ -132,7 +136,8 @@ def _phase_csr_c128(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
                     np.ndarray[np.int32_t, ndim=1, mode='c'] NCOL,
                     np.ndarray[np.int32_t, ndim=1, mode='c'] COL,
                     numeric_complex[:, ::1] D, const int idx,
-                    np.ndarray[np.complex128_t, ndim=1, mode='c'] PHASES, const int p_opt):
+                    np.ndarray[np.complex128_t, ndim=1, mode='c'] PHASES, const int p_opt,
+                    const int nthreads=1):
 
     # Convert to memory views
     cdef int[::1] ptr = PTR
@@ -153,13 +158,13 @@ def _phase_csr_c128(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
     cdef int c
 
     if p_opt == 0:
-        for r in range(nr):
+        for r in prange(nr, nogil=True, num_threads=nthreads):
             for ind in range(ptr[r], ptr[r] + ncol[r]):
                 c = col[ind] % nr
                 s_idx = _index_sorted(v_col[v_ptr[r]:v_ptr[r] + v_ncol[r]], c)
                 v[v_ptr[r] + s_idx] += D[ind, idx] * phases[ind]
     else:
-        for r in range(nr):
+        for r in prange(nr, nogil=True, num_threads=nthreads):
             for ind in range(ptr[r], ptr[r] + ncol[r]):
                 c = col[ind] % nr
                 s_idx = _index_sorted(v_col[v_ptr[r]:v_ptr[r] + v_ncol[r]], c)
@@ -171,7 +176,8 @@ def _phase_csr_c128(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
 def _array_f32(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
                np.ndarray[np.int32_t, ndim=1, mode='c'] NCOL,
                np.ndarray[np.int32_t, ndim=1, mode='c'] COL,
-               numeric_real[:, ::1] D, const int idx):
+               numeric_real[:, ::1] D, const int idx,
+               const int nthreads=1):
 
     # Convert to memory views
     cdef int[::1] ptr = PTR
@@ -183,7 +189,7 @@ def _array_f32(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
     cdef float[:, ::1] v = V
     cdef Py_ssize_t r, ind
 
-    for r in range(nr):
+    for r in prange(nr, nogil=True, num_threads=nthreads):
         for ind in range(ptr[r], ptr[r] + ncol[r]):
             v[r, col[ind] % nr] += D[ind, idx]
 
@@ -193,7 +199,8 @@ def _array_f32(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
 def _array_f64(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
                np.ndarray[np.int32_t, ndim=1, mode='c'] NCOL,
                np.ndarray[np.int32_t, ndim=1, mode='c'] COL,
-               numeric_real[:, ::1] D, const int idx):
+               numeric_real[:, ::1] D, const int idx,
+               const int nthreads=1):
 
     # Convert to memory views
     cdef int[::1] ptr = PTR
@@ -205,7 +212,7 @@ def _array_f64(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
     cdef double[:, ::1] v = V
     cdef Py_ssize_t r, ind
 
-    for r in range(nr):
+    for r in prange(nr, nogil=True, num_threads=nthreads):
         for ind in range(ptr[r], ptr[r] + ncol[r]):
             v[r, col[ind] % nr] += D[ind, idx]
 
@@ -216,7 +223,8 @@ def _phase_array_c64(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
                      np.ndarray[np.int32_t, ndim=1, mode='c'] NCOL,
                      np.ndarray[np.int32_t, ndim=1, mode='c'] COL,
                      numeric_complex[:, ::1] D, const int idx,
-                     np.ndarray[np.complex64_t, ndim=1, mode='c'] PHASES, const int p_opt):
+                     np.ndarray[np.complex64_t, ndim=1, mode='c'] PHASES, const int p_opt,
+                     const int nthreads=1):
 
     # Convert to memory views
     cdef int[::1] ptr = PTR
@@ -230,13 +238,13 @@ def _phase_array_c64(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
     cdef Py_ssize_t r, ind, c
 
     if p_opt == 0:
-        for r in range(nr):
+        for r in prange(nr, nogil=True, num_threads=nthreads):
             for ind in range(ptr[r], ptr[r] + ncol[r]):
                 c = col[ind] % nr
                 v[r, c] += D[ind, idx] * phases[ind]
 
     else:
-        for r in range(nr):
+        for r in prange(nr, nogil=True, num_threads=nthreads):
             for ind in range(ptr[r], ptr[r] + ncol[r]):
                 c = col[ind] % nr
                 v[r, c] += D[ind, idx] * phases[col[ind] / nr]
@@ -248,7 +256,8 @@ def _phase_array_c128(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
                       np.ndarray[np.int32_t, ndim=1, mode='c'] NCOL,
                       np.ndarray[np.int32_t, ndim=1, mode='c'] COL,
                       numeric_complex[:, ::1] D, const int idx,
-                      np.ndarray[np.complex128_t, ndim=1, mode='c'] PHASES, const int p_opt):
+                      np.ndarray[np.complex128_t, ndim=1, mode='c'] PHASES, const int p_opt,
+                      const int nthreads=1):
 
     # Convert to memory views
     cdef int[::1] ptr = PTR
@@ -262,13 +271,13 @@ def _phase_array_c128(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
     cdef Py_ssize_t r, ind, c
 
     if p_opt == 0:
-        for r in range(nr):
+        for r in prange(nr, nogil=True, num_threads=nthreads):
             for ind in range(ptr[r], ptr[r] + ncol[r]):
                 c = col[ind] % nr
                 v[r, c] += D[ind, idx] * phases[ind]
 
     else:
-        for r in range(nr):
+        for r in prange(nr, nogil=True, num_threads=nthreads):
             for ind in range(ptr[r], ptr[r] + ncol[r]):
                 c = col[ind] % nr
                 v[r, c] += D[ind, idx] * phases[col[ind] / nr]
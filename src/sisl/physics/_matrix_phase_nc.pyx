@@ -3,6 +3,7 @@
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 # cython: boundscheck=False, wraparound=False, initializedcheck=False, cdivision=True
 cimport cython
+from cython.parallel cimport prange
 
 import numpy as np
 cimport numpy as np
@@ -26,7 +27,8 @@ def _phase_nc_csr_c64(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
                       np.ndarray[np.int32_t, ndim=1, mode='c'] NCOL,
                       np.ndarray[np.int32_t, ndim=1, mode='c'] COL,
                       numeric_complex[:, ::1] D,
-                      np.ndarray[np.complex64_t, ndim=1, mode='c'] PHASES, const int p_opt):
+                      np.ndarray[np.complex64_t, ndim=1, mode='c'] PHASES, const int p_opt,
+                      const int nthreads=1):
 
     # Convert to memory views
     cdef int[::1] ptr = PTR
@@ -48,7 +50,7 @@ def _phase_nc_csr_c64(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
     cdef int c
 
     if p_opt == 0:
-        for r in range(nr):
+        for r in prange(nr, nogil=True, num_threads=nthreads):
             rr = r * 2
             for ind in range(ptr[r], ptr[r] + ncol[r]):
                 c = (col[ind] % nr) * 2
@@ -62,7 +64,7 @@ def _phase_nc_csr_c64(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
                 v[v_ptr[rr+1] + s_idx+1] += D[ind, 1] * ph
 
     else:
-        for r in range(nr):
+        for r in prange(nr, nogil=True, num_threads=nthreads):
             rr = r * 2
             for ind in range(ptr[r], ptr[r] + ncol[r]):
                 c = (col[ind] % nr) * 2
@@ -82,7 +84,8 @@ def _phase_nc_csr_c128(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
                        np.ndarray[np.int32_t, ndim=1, mode='c'] NCOL,
                        np.ndarray[np.int32_t, ndim=1, mode='c'] COL,
                        numeric_complex[:, ::1] D,
-                       np.ndarray[np.complex128_t, ndim=1, mode='c'] PHASES, const int p_opt):
+                       np.ndarray[np.complex128_t, ndim=1, mode='c'] PHASES, const int p_opt,
+                       const int nthreads=1):
 
     # Convert to memory views
     cdef int[::1] ptr = PTR
@@ -104,7 +107,7 @@ def _phase_nc_csr_c128(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
     cdef int c
 
     if p_opt == 0:
-        for r in range(nr):
+        for r in prange(nr, nogil=True, num_threads=nthreads):
             rr = r * 2
             for ind in range(ptr[r], ptr[r] + ncol[r]):
                 c = (col[ind] % nr) * 2
@@ -118,7 +121,7 @@ def _phase_nc_csr_c128(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
                 v[v_ptr[rr+1] + s_idx+1] += D[ind, 1] * ph
 
     else:
-        for r in range(nr):
+        for r in prange(nr, nogil=True, num_threads=nthreads):
             rr = r * 2
             for ind in range(ptr[r], ptr[r] + ncol[r]):
                 c = (col[ind] % nr) * 2
@@ -138,7 +141,8 @@ def _phase_nc_array_c64(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
                         np.ndarray[np.int32_t, ndim=1, mode='c'] NCOL,
                         np.ndarray[np.int32_t, ndim=1, mode='c'] COL,
                         numeric_complex[:, ::1] D,
-                        np.ndarray[np.complex64_t, ndim=1, mode='c'] PHASES, const int p_opt):
+                        np.ndarray[np.complex64_t, ndim=1, mode='c'] PHASES, const int p_opt,
+                        const int nthreads=1):
 
     # Convert to memory views
     cdef int[::1] ptr = PTR
@@ -153,7 +157,7 @@ def _phase_nc_array_c64(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
     cdef Py_ssize_t r, rr, ind, c
 
     if p_opt == 0:
-        for r in range(nr):
+        for r in prange(nr, nogil=True, num_threads=nthreads):
             rr = r * 2
             for ind in range(ptr[r], ptr[r] + ncol[r]):
                 c = (col[ind] % nr) * 2
@@ -165,7 +169,7 @@ def _phase_nc_array_c64(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
                 v[rr+1, c+1] += D[ind, 1] * ph
 
     else:
-        for r in range(nr):
+        for r in prange(nr, nogil=True, num_threads=nthreads):
             rr = r * 2
             for ind in range(ptr[r], ptr[r] + ncol[r]):
                 c = (col[ind] % nr) * 2
@@ -183,7 +187,8 @@ def _phase_nc_array_c128(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
                          np.ndarray[np.int32_t, ndim=1, mode='c'] NCOL,
                          np.ndarray[np.int32_t, ndim=1, mode='c'] COL,
                          numeric_complex[:, ::1] D,
-                         np.ndarray[np.complex128_t, ndim=1, mode='c'] PHASES, const int p_opt):
+                         np.ndarray[np.complex128_t, ndim=1, mode='c'] PHASES, const int p_opt,
+                         const int nthreads=1):
 
     # Convert to memory views
     cdef int[::1] ptr = PTR
@@ -198,7 +203,7 @@ def _phase_nc_array_c128(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
     cdef Py_ssize_t r, rr, ind, c
 
     if p_opt == 0:
-        for r in range(nr):
+        for r in prange(nr, nogil=True, num_threads=nthreads):
             rr = r * 2
             for ind in range(ptr[r], ptr[r] + ncol[r]):
                 c = (col[ind] % nr) * 2
@@ -210,7 +215,7 @@ def _phase_nc_array_c128(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
                 v[rr+1, c+1] += D[ind, 1] * ph
 
     else:
-        for r in range(nr):
+        for r in prange(nr, nogil=True, num_threads=nthreads):
             rr = r * 2
             for ind in range(ptr[r], ptr[r] + ncol[r]):
                 c = (col[ind] % nr) * 2
@@ -3,6 +3,7 @@
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 # cython: boundscheck=False, wraparound=False, initializedcheck=False, cdivision=True
 cimport cython
+from cython.parallel cimport prange
 
 import numpy as np
 cimport numpy as np
@@ -26,7 +27,8 @@ def _phase_nc_diag_csr_c64(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
                            np.ndarray[np.int32_t, ndim=1, mode='c'] NCOL,
                            np.ndarray[np.int32_t, ndim=1, mode='c'] COL,
                            numeric_complex[:, ::1] D, const int idx,
-                           np.ndarray[np.complex64_t, ndim=1, mode='c'] PHASES, const int p_opt):
+                           np.ndarray[np.complex64_t, ndim=1, mode='c'] PHASES, const int p_opt,
+                           const int nthreads=1):
 
     # Convert to memory views
     cdef int[::1] ptr = PTR
@@ -48,7 +50,7 @@ def _phase_nc_diag_csr_c64(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
     cdef int c
 
     if p_opt == 0:
-        for r in range(nr):
+        for r in prange(nr, nogil=True, num_threads=nthreads):
             rr = r * 2
             for ind in range(ptr[r], ptr[r] + ncol[r]):
                 c = (col[ind] % nr) * 2
@@ -58,7 +60,7 @@ def _phase_nc_diag_csr_c64(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
                 v[v_ptr[rr+1] + s_idx] = v[v_ptr[rr+1] + s_idx] + vv
 
     else:
-        for r in range(nr):
+        for r in prange(nr, nogil=True, num_threads=nthreads):
             rr = r * 2
             for ind in range(ptr[r], ptr[r] + ncol[r]):
                 c = (col[ind] % nr) * 2
@@ -75,7 +77,8 @@ def _phase_nc_diag_csr_c128(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
                             np.ndarray[np.int32_t, ndim=1, mode='c'] NCOL,
                             np.ndarray[np.int32_t, ndim=1, mode='c'] COL,
                             numeric_complex[:, ::1] D, const int idx,
-                            np.ndarray[np.complex128_t, ndim=1, mode='c'] PHASES, const int p_opt):
+                            np.ndarray[np.complex128_t, ndim=1, mode='c'] PHASES, const int p_opt,
+                            const int nthreads=1):
 
     # Convert to memory views
     cdef int[::1] ptr = PTR
@@ -97,7 +100,7 @@ def _phase_nc_diag_csr_c128(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
     cdef int c
 
     if p_opt == 0:
-        for r in range(nr):
+        for r in prange(nr, nogil=True, num_threads=nthreads):
             rr = r * 2
             for ind in range(ptr[r], ptr[r] + ncol[r]):
                 c = (col[ind] % nr) * 2
@@ -107,7 +110,7 @@ def _phase_nc_diag_csr_c128(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
                 v[v_ptr[rr+1] + s_idx] = v[v_ptr[rr+1] + s_idx] + vv
 
     else:
-        for r in range(nr):
+        for r in prange(nr, nogil=True, num_threads=nthreads):
             rr = r * 2
             for ind in range(ptr[r], ptr[r] + ncol[r]):
                 c = (col[ind] % nr) * 2
@@ -124,7 +127,8 @@ def _phase_nc_diag_array_c64(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
                              np.ndarray[np.int32_t, ndim=1, mode='c'] NCOL,
                              np.ndarray[np.int32_t, ndim=1, mode='c'] COL,
                              numeric_complex[:, ::1] D, const int idx,
-                             np.ndarray[np.complex64_t, ndim=1, mode='c'] PHASES, const int p_opt):
+                             np.ndarray[np.complex64_t, ndim=1, mode='c'] PHASES, const int p_opt,
+                             const int nthreads=1):
 
     # Convert to memory views
     cdef int[::1] ptr = PTR
@@ -139,7 +143,7 @@ def _phase_nc_diag_array_c64(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
     cdef Py_ssize_t r, rr, ind, c
 
     if p_opt == 0:
-        for r in range(nr):
+        for r in prange(nr, nogil=True, num_threads=nthreads):
             rr = r * 2
             for ind in range(ptr[r], ptr[r] + ncol[r]):
                 c = (col[ind] % nr) * 2
@@ -148,7 +152,7 @@ def _phase_nc_diag_array_c64(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
                 v[rr+1, c+1] = v[rr+1, c+1] + vv
 
     else:
-        for r in range(nr):
+        for r in prange(nr, nogil=True, num_threads=nthreads):
             rr = r * 2
             for ind in range(ptr[r], ptr[r] + ncol[r]):
                 c = (col[ind] % nr) * 2
@@ -163,7 +167,8 @@ def _phase_nc_diag_array_c128(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
                               np.ndarray[np.int32_t, ndim=1, mode='c'] NCOL,
                               np.ndarray[np.int32_t, ndim=1, mode='c'] COL,
                               numeric_complex[:, ::1] D, const int idx,
-                              np.ndarray[np.complex128_t, ndim=1, mode='c'] PHASES, const int p_opt):
+                              np.ndarray[np.complex128_t, ndim=1, mode='c'] PHASES, const int p_opt,
+                              const int nthreads=1):
 
     # Convert to memory views
     cdef int[::1] ptr = PTR
@@ -178,7 +183,7 @@ def _phase_nc_diag_array_c128(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
     cdef Py_ssize_t r, rr, ind, c
 
     if p_opt == 0:
-        for r in range(nr):
+        for r in prange(nr, nogil=True, num_threads=nthreads):
             rr = r * 2
             for ind in range(ptr[r], ptr[r] + ncol[r]):
                 c = (col[ind] % nr) * 2
@@ -187,7 +192,7 @@ def _phase_nc_diag_array_c128(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
                 v[rr+1, c+1] = v[rr+1, c+1] + vv
 
     else:
-        for r in range(nr):
+        for r in prange(nr, nogil=True, num_threads=nthreads):
             rr = r * 2
             for ind in range(ptr[r], ptr[r] + ncol[r]):
                 c = (col[ind] % nr) * 2
@@ -3,6 +3,7 @@
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 # cython: boundscheck=False, wraparound=False, initializedcheck=False, cdivision=True
 cimport cython
+from cython.parallel cimport prange
 
 import numpy as np
 cimport numpy as np
@@ -26,7 +27,8 @@ def _phase_so_csr_c64(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
                       np.ndarray[np.int32_t, ndim=1, mode='c'] NCOL,
                       np.ndarray[np.int32_t, ndim=1, mode='c'] COL,
                       numeric_complex[:, ::1] D,
-                      np.ndarray[np.complex64_t, ndim=1, mode='c'] PHASES, const int p_opt):
+                      np.ndarray[np.complex64_t, ndim=1, mode='c'] PHASES, const int p_opt,
+                      const int nthreads=1):
 
     # Convert to memory views
     cdef int[::1] ptr = PTR
@@ -48,7 +50,7 @@ def _phase_so_csr_c64(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
     cdef int c
 
     if p_opt == 0:
-        for r in range(nr):
+        for r in prange(nr, nogil=True, num_threads=nthreads):
             rr = r * 2
             for ind in range(ptr[r], ptr[r] + ncol[r]):
                 c = (col[ind] % nr) * 2
@@ -65,7 +67,7 @@ def _phase_so_csr_c64(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
                 v[v_ptr[rr+1] + s_idx+1] = v[v_ptr[rr+1] + s_idx+1] + ph * vv
 
     else:
-        for r in range(nr):
+        for r in prange(nr, nogil=True, num_threads=nthreads):
             rr = r * 2
             for ind in range(ptr[r], ptr[r] + ncol[r]):
                 c = (col[ind] % nr) * 2
@@ -88,7 +90,8 @@ def _phase_so_csr_c128(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
                        np.ndarray[np.int32_t, ndim=1, mode='c'] NCOL,
                        np.ndarray[np.int32_t, ndim=1, mode='c'] COL,
                        numeric_complex[:, ::1] D,
-                       np.ndarray[np.complex128_t, ndim=1, mode='c'] PHASES, const int p_opt):
+                       np.ndarray[np.complex128_t, ndim=1, mode='c'] PHASES, const int p_opt,
+                       const int nthreads=1):
 
     # Convert to memory views
     cdef int[::1] ptr = PTR
@@ -110,7 +113,7 @@ def _phase_so_csr_c128(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
     cdef int c
 
     if p_opt == 0:
-        for r in range(nr):
+        for r in prange(nr, nogil=True, num_threads=nthreads):
             rr = r * 2
             for ind in range(ptr[r], ptr[r] + ncol[r]):
                 c = (col[ind] % nr) * 2
@@ -127,7 +130,7 @@ def _phase_so_csr_c128(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
                 v[v_ptr[rr+1] + s_idx+1] = v[v_ptr[rr+1] + s_idx+1] + ph * vv
 
     else:
-        for r in range(nr):
+        for r in prange(nr, nogil=True, num_threads=nthreads):
             rr = r * 2
             for ind in range(ptr[r], ptr[r] + ncol[r]):
                 c = (col[ind] % nr) * 2
@@ -150,7 +153,8 @@ def _phase_so_array_c64(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
                         np.ndarray[np.int32_t, ndim=1, mode='c'] NCOL,
                         np.ndarray[np.int32_t, ndim=1, mode='c'] COL,
                         numeric_complex[:, ::1] D,
-                        np.ndarray[np.complex64_t, ndim=1, mode='c'] PHASES, const int p_opt):
+                        np.ndarray[np.complex64_t, ndim=1, mode='c'] PHASES, const int p_opt,
+                        const int nthreads=1):
 
     # Convert to memory views
     cdef int[::1] ptr = PTR
@@ -165,7 +169,7 @@ def _phase_so_array_c64(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
     cdef Py_ssize_t r, rr, ind, c
 
     if p_opt == 0:
-        for r in range(nr):
+        for r in prange(nr, nogil=True, num_threads=nthreads):
             rr = r * 2
             for ind in range(ptr[r], ptr[r] + ncol[r]):
                 c = (col[ind] % nr) * 2
@@ -180,7 +184,7 @@ def _phase_so_array_c64(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
                 v[rr+1, c+1] = v[rr+1, c+1] + ph * vv
 
     else:
-        for r in range(nr):
+        for r in prange(nr, nogil=True, num_threads=nthreads):
             rr = r * 2
             for ind in range(ptr[r], ptr[r] + ncol[r]):
                 c = (col[ind] % nr) * 2
@@ -201,7 +205,8 @@ def _phase_so_array_c128(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
                          np.ndarray[np.int32_t, ndim=1, mode='c'] NCOL,
                          np.ndarray[np.int32_t, ndim=1, mode='c'] COL,
                          numeric_complex[:, ::1] D,
-                         np.ndarray[np.complex128_t, ndim=1, mode='c'] PHASES, const int p_opt):
+                         np.ndarray[np.complex128_t, ndim=1, mode='c'] PHASES, const int p_opt,
+                         const int nthreads=1):
 
     # Convert to memory views
     cdef int[::1] ptr = PTR
@@ -216,7 +221,7 @@ def _phase_so_array_c128(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
     cdef Py_ssize_t r, rr, ind, c
 
     if p_opt == 0:
-        for r in range(nr):
+        for r in prange(nr, nogil=True, num_threads=nthreads):
             rr = r * 2
             for ind in range(ptr[r], ptr[r] + ncol[r]):
                 c = (col[ind] % nr) * 2
@@ -231,7 +236,7 @@ def _phase_so_array_c128(np.ndarray[np.int32_t, ndim=1, mode='c'] PTR,
                 v[rr+1, c+1] = v[rr+1, c+1] + ph * vv
 
     else:
-        for r in range(nr):
+        for r in prange(nr, nogil=True, num_threads=nthreads):
             rr = r * 2
             for ind in range(ptr[r], ptr[r] + ncol[r]):
                 c = (col[ind] % nr) * 2
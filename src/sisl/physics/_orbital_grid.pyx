@@ -0,0 +1,416 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+# cython: boundscheck=False, wraparound=False, initializedcheck=False, cdivision=True
+""" Compiled kernels for orbitals on grids
+
+The orbitals are evaluated from tabulated radial functions (4-point Lagrange
+interpolation on an equidistant table) and the real spherical harmonics
+(same conventions as `sisl.AtomicOrbital`).
+"""
+cimport cython
+from cython.parallel cimport parallel, prange
+from libc.math cimport atan2, cos, sin, sqrt
+from libc.stdlib cimport calloc, free, malloc
+
+import numpy as np
+
+cimport numpy as np
+
+from math import factorial
+
+from sisl._core.orbital import _rspher_harm_fact
+
+__all__ = ["orbital_tables", "orbital_values", "density_grid", "matrix_rows"]
+
+ctypedef fused real_t:
+    float
+    double
+
+# Number of intervals in the radial tables
+_NTABLE = 4096
+
+
+def _radial_range(orb, r, f):
+    """Largest radius where the radial function of `orb` is non-zero (tabulated as `f` at `r`)
+
+    Radial functions defined by interpolation may be discontinuous at the end of
+    the interpolation range (which may be smaller than the orbital range).
+    The tables only span the non-zero range to retain the accuracy of the interpolation.
+    """
+    nz = f.nonzero()[0]
+    if len(nz) == 0:
+        return -1.0
+    i = nz[len(nz) - 1]
+    if i == len(r) - 1:
+        return r[i]
+    # bisection for the end of the non-zero range
+    lo, hi = r[i], r[i + 1]
+    for _ in range(64):
+        mid = 0.5 * (lo + hi)
+        if mid <= lo or hi <= mid:
+            break
+        if orb.radial(np.array([mid]))[0] != 0.0:
+            lo = mid
+        else:
+            hi = mid
+    return lo
+
+
+def orbital_tables(geometry):
+    r""" Tabulate the orbitals of all atoms in `geometry`
+
+    Parameters
+    ----------
+    geometry : Geometry
+       the orbitals of all atoms in this geometry are tabulated
+
+    Returns
+    -------
+    o_l, o_m, o_c, o_R, o_tab : numpy.ndarray
+       for each orbital (in the unit-cell), the degree, order, normalization
+       of the real spherical harmonics, the radius and the row in `tab`.
+       Orbitals without a radial part have a negative radius.
+    tab : numpy.ndarray
+       the tabulated radial functions, the i'th row is tabulated on
+       ``np.linspace(0, R, tab.shape[1])``
+    tab_dr : numpy.ndarray
+       the spacing of the tables
+
+
+    If an orbital has no radial function (or degree) the orbitals cannot be
+    tabulated and None is returned.
+    """
+    o_l, o_m, o_c, o_R, o_tab = [], [], [], [], []
+    tab, tab_dr = [], []
+    for atom in geometry.atoms.atom:
+        rows = []
+        for orb in atom.orbitals:
+            try:
+                l = orb.l
+            except AttributeError:
+                return None
+            m = getattr(orb, "m", 0)
+            am = abs(m)
+            c = _rspher_harm_fact[l][m]
+            if m < 0:
+                # lpmv(m, l, x) = (-1)^|m| (l-|m|)!/(l+|m|)! lpmv(|m|, l, x)
+                # and sin(m theta) = -sin(|m| theta)
+                c = -c * (-1) ** am * factorial(l - am) / factorial(l + am)
+            R = orb.R
+            if R > 0:
+                r = np.linspace(0, R, _NTABLE + 1)
+                try:
+                    f = orb.radial(r)
+                except AttributeError:
+                    return None
+                R = _radial_range(orb, r, f)
+            if R > 0:
+                if R < r[_NTABLE]:
+                    r = np.linspace(0, R, _NTABLE + 1)
+                    f = orb.radial(r)
+                rows.append(len(tab))
+                tab.append(f)
+                tab_dr.append(r[1])
+            else:
+                R = -1.0
+                rows.append(0)
+            o_l.append(l)
+            o_m.append(m)
+            o_c.append(c)
+            o_R.append(R)
+        o_tab.append(rows)
+
+    if len(tab) == 0:
+        tab = np.zeros([1, _NTABLE + 1])
+        tab_dr = [1.0]
+
+    # expand to all atoms (note wraparound is disabled)
+    firsto = np.cumsum([0] + [atom.no for atom in geometry.atoms.atom])
+    idx = np.concatenate(
+        [np.arange(firsto[s], firsto[s + 1]) for s in geometry.atoms.specie]
+    ).astype(np.int64)
+
+    o_tab = np.concatenate(o_tab).astype(np.int32)[idx]
+    return (
+        np.asarray(o_l, dtype=np.int32)[idx],
+        np.asarray(o_m, dtype=np.int32)[idx],
+        np.asarray(o_c, dtype=np.float64)[idx],
+        np.asarray(o_R, dtype=np.float64)[idx],
+        o_tab,
+        np.ascontiguousarray(tab, dtype=np.float64),
+        np.asarray(tab_dr, dtype=np.float64),
+    )
+
+
+cdef inline double _legendre(const int l, const int m, const double x) noexcept nogil:
+    """Associated Legendre polynomial :math:`P_l^m(x)` for ``m >= 0``, including the Condon-Shortley phase"""
+    cdef double pmm = 1.
+    cdef double somx2, fact, pmmp1, pll
+    cdef int i, ll
+    if m > 0:
+        somx2 = sqrt((1. - x) * (1. + x))
+        fact = 1.
+        for i in range(m):
+            pmm = -pmm * fact * somx2
+            fact = fact + 2.
+    if l == m:
+        return pmm
+    pmmp1 = x * (2 * m + 1) * pmm
+    if l == m + 1:
+        return pmmp1
+    pll = 0.
+    for ll in range(m + 2, l + 1):
+        pll = (x * (2 * ll - 1) * pmmp1 - (ll + m - 1) * pmm) / (ll - m)
+        pmm = pmmp1
+        pmmp1 = pll
+    return pll
+
+
+cdef inline double _psi(const int l, const int m, const double c, const double R,
+                        const double *f, const Py_ssize_t n, const double dr,
+                        const double r, const double theta, const double cos_phi) noexcept nogil:
+    """Orbital value from the tabulated radial function `f` (`n` intervals) and the spherical harmonics"""
+    cdef Py_ssize_t k
+    cdef double t, u0, u1, u2, u3, radial
+
+    if r > R:
+        return 0.
+
+    # 4-point Lagrange interpolation
+    t = r / dr
+    k = <Py_ssize_t> t - 1
+    if k < 0:
+        k = 0
+    elif k > n - 3:
+        k = n - 3
+    u0 = t - k
+    u1 = u0 - 1.
+    u2 = u0 - 2.
+    u3 = u0 - 3.
+    radial = (- f[k] * u1 * u2 * u3 + f[k + 3] * u0 * u1 * u2) / 6. \
+        + (f[k + 1] * u0 * u2 * u3 - f[k + 2] * u0 * u1 * u3) / 2.
+
+    if m == 0:
+        return radial * c * _legendre(l, 0, cos_phi)
+    elif m < 0:
+        return radial * c * _legendre(l, -m, cos_phi) * sin(-m * theta)
+    return radial * c * _legendre(l, m, cos_phi) * cos(m * theta)
+
+
+cdef inline void _psi_atom(const int no, const int o0, const double x, const double y, const double z,
+                           const int[::1] o_l, const int[::1] o_m,
+                           const double[::1] o_c, const double[::1] o_R,
+                           const int[::1] o_tab, const double[:, ::1] tab, const double[::1] tab_dr,
+                           double *psi) noexcept nogil:
+    """Values of the `no` orbitals (starting at `o0`) of an atom at ``(x, y, z)`` relative to the atom"""
+    cdef double r = sqrt(x * x + y * y + z * z)
+    cdef double theta = 0.
+    cdef double cos_phi = 0.
+    cdef Py_ssize_t n = tab.shape[1] - 1
+    cdef int io, o, t
+    if r > 0.:
+        # at the origin the angles are 0 (regardless of the sign of the zeros)
+        theta = atan2(y, x)
+        cos_phi = z / r
+    for io in range(no):
+        o = o0 + io
+        t = o_tab[o]
+        psi[io] = _psi(o_l[o], o_m[o], o_c[o], o_R[o], &tab[t, 0], n, tab_dr[t],
+                       r, theta, cos_phi)
+
+
+def orbital_values(const double[:, ::1] dxyz, const int o0, const int no,
+                   const int[::1] o_l, const int[::1] o_m,
+                   const double[::1] o_c, const double[::1] o_R,
+                   const int[::1] o_tab, const double[:, ::1] tab, const double[::1] tab_dr,
+                   const int nthreads=1):
+    r""" Values of the `no` orbitals (starting at `o0`) of an atom at the points `dxyz`
+
+    Parameters
+    ----------
+    dxyz :
+       the points relative to the atom
+    o0, no :
+       the first orbital (in the unit-cell) and the number of orbitals of the atom
+    o_l, o_m, o_c, o_R, o_tab, tab, tab_dr :
+       the orbitals, see `orbital_tables`
+    nthreads :
+       number of threads used
+
+    Returns
+    -------
+    numpy.ndarray
+       the orbital values, shape ``(len(dxyz), no)``
+    """
+    cdef Py_ssize_t n = dxyz.shape[0]
+    cdef Py_ssize_t i
+    out = np.zeros([n, no], dtype=np.float64)
+    cdef double[:, ::1] psi = out
+    if n == 0 or no == 0:
+        return out
+    for i in prange(n, nogil=True, schedule="static", num_threads=nthreads):
+        _psi_atom(no, o0, dxyz[i, 0], dxyz[i, 1], dxyz[i, 2],
+                  o_l, o_m, o_c, o_R, o_tab, tab, tab_dr, &psi[i, 0])
+    return out
+
+
+cdef void _density_plane(double[:, :, ::1] grid, const double[:, ::1] dcell,
+                         const Py_ssize_t ix, const int im,
+                         const double[:, ::1] img_xyz, const int[::1] img_atom, const int[:, ::1] img_box,
+                         const int[::1] a_ptr, const double[:, ::1] b_dxyz,
+                         const int[::1] b_atom, const long long[::1] b_ptr, const double[::1] D,
+                         const int[::1] atom_no, const int[::1] atom_o, const double[::1] atom_R,
+                         const int[::1] o_l, const int[::1] o_m,
+                         const double[::1] o_c, const double[::1] o_R,
+                         const int[::1] o_tab, const double[:, ::1] tab, const double[::1] tab_dr,
+                         double *psi_i, double *psi_j, double *DM_psi) noexcept nogil:
+    """Add the density of a single atom (image `im`) to the `ix` plane of the grid"""
+    cdef int ia = img_atom[im]
+    cdef int no_i = atom_no[ia]
+    cdef double R2 = atom_R[ia] * atom_R[ia]
+    cdef Py_ssize_t iy, iz
+    cdef long long d
+    cdef int b, ja, no_j, io, jo
+    cdef double px, py, pz, x, y, z, s, rho
+
+    for iy in range(img_box[im, 2], img_box[im, 3]):
+        for iz in range(img_box[im, 4], img_box[im, 5]):
+            # vector from the atom to the grid point
+            px = ix * dcell[0, 0] + iy * dcell[1, 0] + iz * dcell[2, 0] - img_xyz[im, 0]
+            py = ix * dcell[0, 1] + iy * dcell[1, 1] + iz * dcell[2, 1] - img_xyz[im, 1]
+            pz = ix * dcell[0, 2] + iy * dcell[1, 2] + iz * dcell[2, 2] - img_xyz[im, 2]
+            if px * px + py * py + pz * pz > R2:
+                continue
+
+            _psi_atom(no_i, atom_o[ia], px, py, pz,
+                      o_l, o_m, o_c, o_R, o_tab, tab, tab_dr, psi_i)
+            for io in range(no_i):
+                DM_psi[io] = 0.
+
+            # Loop connecting atoms (including the atom it-self)
+            for b in range(a_ptr[ia], a_ptr[ia + 1]):
+                ja = b_atom[b]
+                x = px - b_dxyz[b, 0]
+                y = py - b_dxyz[b, 1]
+                z = pz - b_dxyz[b, 2]
+                if x * x + y * y + z * z > atom_R[ja] * atom_R[ja]:
+                    continue
+                no_j = atom_no[ja]
+                _psi_atom(no_j, atom_o[ja], x, y, z,
+                          o_l, o_m, o_c, o_R, o_tab, tab, tab_dr, psi_j)
+                d = b_ptr[b]
+                for io in range(no_i):
+                    s = 0.
+                    for jo in range(no_j):
+                        s = s + D[d + jo] * psi_j[jo]
+                    DM_psi[io] = DM_psi[io] + s
+                    d = d + no_j
+
+            rho = 0.
+            for io in range(no_i):
+                rho = rho + psi_i[io] * DM_psi[io]
+            grid[ix, iy, iz] += rho
+
+
+def density_grid(double[:, :, ::1] grid, const double[:, ::1] dcell,
+                 const int[::1] plane_ptr, const int[::1] plane_img,
+                 const double[:, ::1] img_xyz, const int[::1] img_atom, const int[:, ::1] img_box,
+                 const int[::1] a_ptr, const double[:, ::1] b_dxyz,
+                 const int[::1] b_atom, const long long[::1] b_ptr, const double[::1] D,
+                 const int[::1] atom_no, const int[::1] atom_o, const double[::1] atom_R,
+                 const int[::1] o_l, const int[::1] o_m,
+                 const double[::1] o_c, const double[::1] o_R,
+                 const int[::1] o_tab, const double[:, ::1] tab, const double[::1] tab_dr,
+                 const int nthreads=1):
+    r""" Add the density :math:`\sum_{\nu\mu}\phi_\nu(\mathbf r)\phi_\mu(\mathbf r) D_{\nu\mu}` to `grid`
+
+    The first dimension of the grid is distributed among the threads, each
+    thread owns a plane of the grid at a time.
+
+    Parameters
+    ----------
+    grid :
+       the grid values (added to)
+    dcell :
+       the grid voxel vectors
+    plane_ptr, plane_img :
+       the atoms (images) with orbitals in each plane of the grid (CSR format)
+    img_xyz, img_atom, img_box :
+       the coordinates (relative to the grid origin), the unit-cell atom and the
+       index bounds (``[i0, i1, j0, j1, k0, k1]``) of the grid points in the orbital range of the atom
+    a_ptr, b_dxyz, b_atom, b_ptr, D :
+       the density matrix in dense atomic blocks (CSR format over atoms, ``a_ptr``),
+       each block has the coordinate of the connecting atom relative to the row atom,
+       the unit-cell index of the connecting atom and the offset of the (row-major) block in `D`
+    atom_no, atom_o, atom_R :
+       number of orbitals, first orbital and range of each atom in the unit-cell
+    o_l, o_m, o_c, o_R, o_tab, tab, tab_dr :
+       the orbitals, see `orbital_tables`
+    nthreads :
+       number of threads used
+    """
+    cdef Py_ssize_t nx = grid.shape[0]
+    cdef int max_no = 1
+    cdef Py_ssize_t ix
+    cdef int ii
+    cdef double *buf
+
+    if atom_no.shape[0] > 0:
+        max_no = max(1, np.max(atom_no))
+
+    for ix in prange(nx, nogil=True, schedule="dynamic", num_threads=nthreads):
+        if plane_ptr[ix] == plane_ptr[ix + 1]:
+            continue
+        buf = <double *> malloc(3 * max_no * sizeof(double))
+        for ii in range(plane_ptr[ix], plane_ptr[ix + 1]):
+            _density_plane(grid, dcell, ix, plane_img[ii],
+                           img_xyz, img_atom, img_box,
+                           a_ptr, b_dxyz, b_atom, b_ptr, D,
+                           atom_no, atom_o, atom_R,
+                           o_l, o_m, o_c, o_R, o_tab, tab, tab_dr,
+                           buf, buf + max_no, buf + 2 * max_no)
+        free(buf)
+
+
+def matrix_rows(const long long[::1] ptr, const int[::1] col, const real_t[::1] val,
+                const long long[::1] m_ptr, const int[::1] m_col, const double[::1] m_val,
+                double[::1] out, const int nthreads=1):
+    r""" Add :math:`\sum_{ij}\phi_{ri}M_{ij}\phi_{rj}` to `out` for each row :math:`r` of the sparse matrix :math:`\phi`
+
+    Parameters
+    ----------
+    ptr, col, val :
+       the sparse matrix :math:`\phi` (CSR format)
+    m_ptr, m_col, m_val :
+       the sparse matrix :math:`M` (CSR format), square with the number of columns of :math:`\phi`
+    out :
+       the values added to, one per row of :math:`\phi`
+    nthreads :
+       number of threads used
+    """
+    cdef Py_ssize_t n = ptr.shape[0] - 1
+    cdef Py_ssize_t ncol = m_ptr.shape[0] - 1
+    cdef Py_ssize_t r
+    cdef long long p, e
+    cdef double s, t
+    cdef double *w
+
+    with nogil, parallel(num_threads=nthreads):
+        # dense row of phi (zero except for the current row)
+        w = <double *> calloc(ncol + 1, sizeof(double))
+        for r in prange(n, schedule="static"):
+            if ptr[r] == ptr[r + 1]:
+                continue
+            for p in range(ptr[r], ptr[r + 1]):
+                w[col[p]] = val[p]
+            s = 0.
+            for p in range(ptr[r], ptr[r + 1]):
+                t = 0.
+                for e in range(m_ptr[col[p]], m_ptr[col[p] + 1]):
+                    t = t + m_val[e] * w[m_col[e]]
+                s = s + val[p] * t
+            for p in range(ptr[r], ptr[r + 1]):
+                w[col[p]] = 0.
+            out[r] += s
+        free(w)
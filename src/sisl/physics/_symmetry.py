@@ -0,0 +1,145 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+r""" Point-group operations of lattices and geometries
+
+All operations are integer matrices :math:`\mathbf W` acting on fractional
+coordinates (as row-vectors), :math:`\mathbf f' = \mathbf f \mathbf W^T + \mathbf t`.
+"""
+import itertools
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+__all__ = ["lattice_point_group", "geometry_point_group", "reduce_grid"]
+
+
+def lattice_point_group(cell, tol: float = 1e-5):
+    r"""Point-group operations that leave the lattice invariant
+
+    Parameters
+    ----------
+    cell : numpy.ndarray
+       lattice vectors (row-wise)
+    tol : float, optional
+       relative tolerance of the metric tensor
+
+    Returns
+    -------
+    numpy.ndarray
+        the integer operations in fractional coordinates, shape ``(nops, 3, 3)``
+    """
+    # the metric tensor, an operation W is a symmetry if: W^T G W == G
+    G = cell @ cell.T
+    W = np.array(list(itertools.product((-1, 0, 1), repeat=9)), dtype=np.int32)
+    W = W.reshape(-1, 3, 3)
+    W = W[np.abs(np.rint(np.linalg.det(W))) == 1]
+    GW = np.einsum("nji,jk,nkl->nil", W, G, W)
+    ok = np.all(np.abs(GW - G) <= tol * np.abs(G).max(), axis=(1, 2))
+    return W[ok]
+
+
+def _in_unit(f):
+    """Fractional coordinates in ``[0, 1)``"""
+    f = f - np.floor(f)
+    f[f >= 1.0] = 0.0
+    return f
+
+
+def geometry_point_group(geometry, ops=None, tol: float = 1e-5):
+    r"""Point-group operations (of the lattice) that leave the geometry invariant
+
+    An operation is retained if a translation exists that maps all atoms
+    onto atoms of the same specie (fractional translations are allowed).
+
+    Parameters
+    ----------
+    geometry : Geometry
+       the geometry to check
+    ops : numpy.ndarray, optional
+       the operations to check, defaults to all lattice operations
+    tol : float, optional
+       tolerance of the atomic positions (in fractional coordinates)
+
+    Returns
+    -------
+    numpy.ndarray
+        the integer operations in fractional coordinates, shape ``(nops, 3, 3)``
+    """
+    if ops is None:
+        ops = lattice_point_group(geometry.cell)
+    f = _in_unit(geometry.fxyz)
+    specie = geometry.atoms.specie
+    tree = cKDTree(f, boxsize=1.0)
+
+    # we only need to check translations mapping an atom of the
+    # smallest specie onto the same specie
+    counts = np.bincount(specie)
+    s = np.argmin(np.where(counts > 0, counts, len(specie) + 1))
+    atoms = (specie == s).nonzero()[0]
+    a0 = atoms[0]
+
+    def is_symmetry(W):
+        fW = f @ W.T
+        for b in atoms:
+            fT = _in_unit(fW + (f[b] - fW[a0]))
+            dist, idx = tree.query(fT, distance_upper_bound=tol)
+            if np.all(np.isfinite(dist)) and np.all(specie[idx] == specie):
+                return True
+        return False
+
+    return np.array([W for W in ops if is_symmetry(W)], dtype=np.int32).reshape(
+        -1, 3, 3
+    )
+
+
+def reduce_grid(k, n, ops, trs: bool = True, tol: float = 1e-6):
+    r"""Reduce a full grid of k-points to the irreducible points
+
+    Parameters
+    ----------
+    k : numpy.ndarray
+       the full grid of k-points (in reduced coordinates), in C-order of
+       the grid with `n` points along each direction
+    n : array_like of int
+       number of grid points along each direction
+    ops : numpy.ndarray
+       the (real space) operations in fractional coordinates
+    trs : bool, optional
+       whether time-reversal symmetry is applied
+    tol : float, optional
+       tolerance of the grid positions (in units of the grid spacing)
+
+    Returns
+    -------
+    irr : numpy.ndarray
+       indices of the irreducible k-points in the full grid
+    unfold : numpy.ndarray
+       for each k-point in the full grid, the index of its irreducible k-point
+    ops : numpy.ndarray
+       the operations (including time-reversal) that leave the grid invariant
+    """
+    n = np.asarray(n)
+    # the first point along each direction
+    k0 = np.array([k[:, i].min() for i in range(3)])
+
+    # The operation acting on reduced k-points is (W^-1)^T
+    # since the group contains all inverses, we simply transform by W
+    if trs:
+        ops = np.concatenate((ops, -ops))
+        ops = np.unique(ops, axis=0)
+
+    rep = np.arange(len(k))
+    kept = []
+    for W in ops:
+        x = (k @ W - k0) * n
+        j = np.rint(x)
+        if np.any(np.abs(x - j) > tol):
+            # the grid is not invariant under this operation
+            continue
+        kept.append(W)
+        j = j.astype(np.int64) % n
+        np.minimum(rep, np.ravel_multi_index(tuple(j.T), n), out=rep)
+
+    irr, unfold = np.unique(rep, return_inverse=True)
+    return irr, unfold, np.array(kept, dtype=np.int32).reshape(-1, 3, 3)
@@ -0,0 +1,284 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+r""" Linear tetrahedron integration on Monkhorst-Pack grids
+
+Each cell of the (full) Monkhorst-Pack grid is split into 6 tetrahedra sharing
+the shortest main diagonal of the cell :cite:`Blochl1994`.
+Within each tetrahedron the eigenvalues are linearly interpolated between the corners.
+The DOS and the corner weights (for projected quantities) are the energy derivatives
+of the integration weights in :cite:`Blochl1994`, optionally including the Blöchl corrections.
+
+All routines are vectorized over tetrahedra (and bands), looping energies.
+"""
+import itertools
+
+import numpy as np
+
+import sisl._array as _a
+from sisl.messages import SislError
+
+from .brillouinzone import MonkhorstPack
+
+__all__ = ["grid_index", "tetrahedra", "dos_tetrahedra", "weights_tetrahedra"]
+
+
+def grid_index(mp):
+    r"""Index of the k-point in `mp` corresponding to each point of the full grid
+
+    The full grid is ordered as the k-points of a `MonkhorstPack` with ``trs=False``,
+    i.e. in C-order of the sorted points from `MonkhorstPack.grid` along each direction.
+    k-points that have been removed by time-reversal symmetry are mapped to their
+    :math:`-\mathbf k` partner, and for symmetry reduced grids the `MonkhorstPack.unfold`
+    mapping is used.
+
+    Parameters
+    ----------
+    mp : MonkhorstPack
+       the k-points, must sample the full Brillouin zone (``size=1``)
+
+    Returns
+    -------
+    numpy.ndarray
+        the index of the k-points, shape ``mp._diag``
+
+    Raises
+    ------
+    SislError
+        if `mp` is not a complete (unmodified) Monkhorst-Pack grid
+    """
+    if not isinstance(mp, MonkhorstPack):
+        raise SislError(
+            f"tetrahedron integration requires a MonkhorstPack grid, got {type(mp).__name__}"
+        )
+    n = mp._diag
+    if np.any(mp._size != 1.0):
+        raise SislError(
+            f"{mp.__class__.__name__} tetrahedron integration requires the full Brillouin zone (size=1)"
+        )
+    if mp._unfold is not None:
+        return mp._unfold.reshape(n)
+
+    def index(k):
+        idx = _a.emptyi(k.shape)
+        ok = np.ones(len(k), dtype=bool)
+        for i in range(3):
+            kg = mp.grid(n[i], mp._displ[i], 1.0, mp._centered, False)[0]
+            d = k[:, i].reshape(-1, 1) - kg.reshape(1, -1)
+            d -= np.rint(d)
+            idx[:, i] = np.argmin(np.fabs(d), axis=1)
+            ok &= np.fabs(d[_a.arangei(len(k)), idx[:, i]]) * n[i] < 1e-6
+        return np.ravel_multi_index(tuple(idx.T), n), ok
+
+    full = _a.fulli(np.prod(n), -1)
+    ik = _a.arangei(len(mp))
+    # first the time-reversed points, then overwrite with the actual points
+    idx, ok = index(-mp.k)
+    full[idx[ok]] = ik[ok]
+    idx, ok = index(mp.k)
+    full[idx[ok]] = ik[ok]
+    if np.any(full < 0):
+        raise SislError(
+            f"{mp.__class__.__name__} tetrahedron integration requires a complete grid "
+            "(the k-points may not have been replaced)"
+        )
+    return full.reshape(n)
+
+
+def tetrahedra(mp):
+    r"""The tetrahedra of the grid, as indices of the k-points in `mp`
+
+    Each cell of the full grid is divided into 6 tetrahedra sharing the
+    shortest of the 4 main diagonals of the cell.
+
+    Parameters
+    ----------
+    mp : MonkhorstPack
+       the k-points, see `grid_index` for restrictions
+
+    Returns
+    -------
+    numpy.ndarray
+        indices of the 4 corners of all tetrahedra, shape ``(6 * prod(mp._diag), 4)``
+    """
+    idx = grid_index(mp)
+    n = mp._diag
+
+    # Find the shortest main diagonal (in Cartesian coordinates)
+    rcell = mp.rcell / n.reshape(-1, 1)
+    starts = _a.arrayi([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1]])
+    length = [np.linalg.norm((1 - 2 * s) @ rcell) for s in starts]
+    start = starts[np.argmin(length)]
+
+    # The 6 tetrahedra are the paths along the cell edges from
+    # the start to the end of the diagonal
+    tet = _a.emptyi([6, np.prod(n), 4])
+    for it, perm in enumerate(itertools.permutations(range(3))):
+        corner = start.copy()
+        tet[it, :, 0] = np.roll(idx, -corner, axis=(0, 1, 2)).ravel()
+        for ic, i in enumerate(perm, 1):
+            corner[i] = 1 - corner[i]
+            tet[it, :, ic] = np.roll(idx, -corner, axis=(0, 1, 2)).ravel()
+    return tet.reshape(-1, 4)
+
+
+def _sorted_eig(eig, tet):
+    """Eigenvalues at the corners of all tetrahedra, sorted per tetrahedron and band
+
+    Returns the sorted energies with shape ``(ntet * nb, 4)``, and the
+    corner indices (of `eig`) in the same order.
+    """
+    nb = eig.shape[1]
+    # shape (ntet, nb, 4)
+    e = eig[tet].transpose(0, 2, 1)
+    order = np.argsort(e, axis=-1)
+    e = np.take_along_axis(e, order, axis=-1).reshape(-1, 4)
+    # Remove numerically degenerate energies, the derivative of the
+    # tetrahedron DOS (Blöchl corrections) diverges in vanishing intervals
+    tol = 1e-10 * max(1.0, np.fabs(eig).max())
+    for i in (1, 2, 3):
+        degenerate = e[:, i] - e[:, i - 1] < tol
+        e[degenerate, i] = e[degenerate, i - 1]
+    corner = np.take_along_axis(
+        np.broadcast_to(tet.reshape(-1, 1, 4), order.shape), order, axis=-1
+    )
+    # index in the raveled (nk, nb) array
+    corner = (corner * nb + _a.arangei(nb).reshape(1, -1, 1)).reshape(-1, 4)
+    return e, corner
+
+
+def _dos(E, e):
+    """DOS of each tetrahedron (with sorted energies `e`) at `E`, without volume factor"""
+    e1, e2, e3, e4 = e.T
+    dos = np.zeros(len(e))
+
+    idx = ((e1 < E) & (E < e2)).nonzero()[0]
+    x = E - e1[idx]
+    dos[idx] = 3 * x**2 / ((e2 - e1) * (e3 - e1) * (e4 - e1))[idx]
+
+    idx = ((e2 <= E) & (E < e3)).nonzero()[0]
+    e1_, e2_, e3_, e4_ = e1[idx], e2[idx], e3[idx], e4[idx]
+    x = E - e2_
+    e31, e41, e32, e42 = e3_ - e1_, e4_ - e1_, e3_ - e2_, e4_ - e2_
+    dos[idx] = 3 / (e31 * e41) * (e2_ - e1_ + 2 * x - (e31 + e42) * x**2 / (e32 * e42))
+
+    idx = ((e3 <= E) & (E < e4)).nonzero()[0]
+    x = e4[idx] - E
+    dos[idx] = 3 * x**2 / ((e4 - e1) * (e4 - e2) * (e4 - e3))[idx]
+    return dos
+
+
+def dos_tetrahedra(E, eig, tet):
+    r"""Total DOS at `E` from the eigenvalues at the k-points
+
+    Parameters
+    ----------
+    E : array_like
+       energies to calculate the DOS at
+    eig : numpy.ndarray
+       eigenvalues, shape ``(nk, nb)``
+    tet : numpy.ndarray
+       the tetrahedra, see `tetrahedra`
+
+    Returns
+    -------
+    numpy.ndarray
+        the DOS, normalized to 1 per band
+    """
+    e, _ = _sorted_eig(eig, tet)
+    C = 1 / len(tet)
+    return _a.arrayd([_dos(E_, e).sum() for E_ in E]) * C
+
+
+def _weights(E, e, blochl):
+    """Corner weights (derivative of the integration weights) for the sorted energies `e`
+
+    Only tetrahedra with weights are returned, i.e. the returned weights (shape ``(n, 4)``)
+    correspond to ``e[idx]``.
+    """
+    e1, e2, e3, e4 = e.T
+    # same boundaries as in _dos (e.g. e1 == e2 == e3 == E is in the last case)
+    idx = ((e1 <= E) & (E < e4)).nonzero()[0]
+    e = e[idx]
+    e1, e2, e3, e4 = e.T
+    w = np.zeros(e.shape)
+    # derivative of the tetrahedron DOS (for the Blöchl corrections)
+    ddos = np.zeros(len(e))
+
+    i = ((e1 < E) & (E < e2)).nonzero()[0]
+    x = E - e1[i]
+    e21, e31, e41 = (e2 - e1)[i], (e3 - e1)[i], (e4 - e1)[i]
+    D = e21 * e31 * e41
+    x3D = x**3 / D
+    w[i, 0] = 3 * x**2 / D - x3D * (1 / e21 + 1 / e31 + 1 / e41)
+    w[i, 1] = x3D / e21
+    w[i, 2] = x3D / e31
+    w[i, 3] = x3D / e41
+    ddos[i] = 6 * x / D
+
+    i = ((e2 <= E) & (E < e3)).nonzero()[0]
+    a, b = E - e1[i], E - e2[i]
+    c, d = e3[i] - E, e4[i] - E
+    e31, e41 = (e3 - e1)[i], (e4 - e1)[i]
+    e32, e42 = (e3 - e2)[i], (e4 - e2)[i]
+    C1 = a**2 / (e41 * e31) / 4
+    C2 = a * b * c / (e41 * e32 * e31) / 4
+    C3 = b**2 * d / (e42 * e32 * e41) / 4
+    dC1 = a / (e41 * e31) / 2
+    dC2 = (b * c + a * c - a * b) / (e41 * e32 * e31) / 4
+    dC3 = (2 * b * d - b**2) / (e42 * e32 * e41) / 4
+    C12, dC12 = C1 + C2, dC1 + dC2
+    C23, dC23 = C2 + C3, dC2 + dC3
+    C123, dC123 = C12 + C3, dC12 + dC3
+    w[i, 0] = dC1 + (dC12 * c - C12) / e31 + (dC123 * d - C123) / e41
+    w[i, 1] = dC123 + (dC23 * c - C23) / e32 + (dC3 * d - C3) / e42
+    w[i, 2] = (dC12 * a + C12) / e31 + (dC23 * b + C23) / e32
+    w[i, 3] = (dC123 * a + C123) / e41 + (dC3 * b + C3) / e42
+    ddos[i] = 6 / (e31 * e41) * (1 - (e31 + e42) * b / (e32 * e42))
+
+    i = ((e3 <= E) & (E < e4)).nonzero()[0]
+    x = e4[i] - E
+    e41, e42, e43 = (e4 - e1)[i], (e4 - e2)[i], (e4 - e3)[i]
+    D = e41 * e42 * e43
+    x3D = x**3 / D
+    w[i, 0] = x3D / e41
+    w[i, 1] = x3D / e42
+    w[i, 2] = x3D / e43
+    w[i, 3] = 3 * x**2 / D - x3D * (1 / e41 + 1 / e42 + 1 / e43)
+    ddos[i] = -6 * x / D
+
+    if blochl:
+        # d/dE [ D_T(E) \sum_j (e_j - e_i) / 40 ]
+        w += ddos.reshape(-1, 1) * (e.sum(1).reshape(-1, 1) - 4 * e) / 40
+    return idx, w
+
+
+def weights_tetrahedra(E, eig, tet, blochl: bool = True):
+    r"""Weights of each eigenvalue contributing to the DOS at the energies `E`
+
+    The DOS is :math:`\mathrm{DOS}(E) = \sum_{k,b} w_{kb}(E)`, and projected
+    quantities are :math:`\sum_{k,b} w_{kb}(E) p_{kb}`.
+
+    Parameters
+    ----------
+    E : array_like
+       energies to calculate the weights at
+    eig : numpy.ndarray
+       eigenvalues, shape ``(nk, nb)``
+    tet : numpy.ndarray
+       the tetrahedra, see `tetrahedra`
+    blochl : bool, optional
+       whether the Blöchl corrections are added
+
+    Yields
+    ------
+    numpy.ndarray
+        the weights for each energy, shape ``(nk, nb)``
+    """
+    e, corner = _sorted_eig(eig, tet)
+    C = 1 / len(tet)
+    size = eig.size
+    for E_ in E:
+        idx, w = _weights(E_, e, blochl)
+        w = np.bincount(corner[idx].ravel(), weights=w.ravel(), minlength=size)
+        yield (w * C).reshape(eig.shape)
@@ -46,6 +46,8 @@ def copy(mp: MonkhorstPack, parent=None) -> MonkhorstPack:
     # this is required due to replace calls
     out._k = mp._k.copy()
     out._w = mp._w.copy()
+    if mp._unfold is not None:
+        out._unfold = mp._unfold.copy()
     return out
 
 
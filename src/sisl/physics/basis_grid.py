@@ -0,0 +1,392 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+r""" Orbitals evaluated on a real-space grid
+
+The values of all orbitals (of all atoms in and around a grid) are calculated once,
+and stored as a sparse matrix :math:`\phi_{\mathbf r i}` (grid points times orbitals).
+Subsequent projections of coefficients (wavefunctions) and matrices (densities)
+onto the same grid are then sparse matrix products.
+"""
+import numpy as np
+from scipy.sparse import coo_matrix, csr_matrix
+
+import sisl._array as _a
+from sisl import BoundaryCondition as BC
+from sisl import Lattice
+from sisl._core.sparse import _ncol_to_indptr
+from sisl._core.sparse_geometry import SparseOrbital
+from sisl._environ import get_environ_variable
+from sisl._internal import set_module
+from sisl.messages import progressbar, warn
+
+from ._orbital_grid import matrix_rows, orbital_tables, orbital_values
+
+__all__ = ["BasisGrid"]
+
+
+@set_module("sisl.physics")
+class BasisGrid:
+    r"""Orbital values on a grid, for repeated projections onto the same grid
+
+    The orbital values of all atoms (and their periodic images) with orbitals
+    overlapping the grid are calculated once. For each atom the grid points within
+    range of the orbitals and the orbital values at these points are stored in
+    a sparse matrix (`phi`, grid points times orbitals).
+
+    Projecting coefficients, :math:`\psi(\mathbf r) = \sum_i\phi_i(\mathbf r)c_i`,
+    (`project_vector`) or matrices,
+    :math:`\rho(\mathbf r) = \sum_{ij}\phi_i(\mathbf r)M_{ij}\phi_j(\mathbf r)`,
+    (`project_matrix`) onto the grid are then sparse matrix products.
+    This is much faster than `DensityMatrix.density` and `~sisl.physics.electron.wavefunction`
+    when many quantities are projected onto the same grid (e.g. many eigenstates,
+    or density matrices of a fixed geometry), at the cost of memory.
+
+    Parameters
+    ----------
+    geometry : Geometry
+       geometry with the orbitals
+    grid : Grid
+       the grid on which the orbitals are evaluated, only the shape and the lattice (including the
+       boundary conditions) are used. Projections are only allowed on grids with the same shape and lattice.
+    dtype : numpy.dtype, optional
+       data-type of the stored orbital values, `numpy.float32` halves the memory
+    eta : bool, optional
+       show a progressbar on stdout
+
+    Examples
+    --------
+    >>> basis = BasisGrid(DM.geometry, grid)
+    >>> DM.density(grid, basis=basis)
+    >>> for state in H.eigenstate():
+    ...     wf = Grid(grid.shape, lattice=grid.lattice, dtype=np.complex128)
+    ...     state.wavefunction(wf, basis=basis)
+    """
+
+    def __init__(self, geometry, grid, dtype=np.float64, eta=None):
+        self.geometry = geometry
+        self.shape = tuple(grid.shape)
+        self.lattice = grid.lattice.copy()
+
+        na = geometry.na
+        firsto = geometry.firsto
+        atom_R = _a.arrayd([atom.maxR() for atom in geometry.atoms.atom])[
+            geometry.atoms.specie
+        ]
+
+        # Find the periodic directions
+        pbc = [
+            bc == BC.PERIODIC or geometry.nsc[i] > 1
+            for i, bc in enumerate(self.lattice.boundary_condition[:, 0])
+        ]
+
+        # All atoms within range of the grid
+        add_R = _a.fulld(3, geometry.maxR()) + 1.0e-6
+        o = self.lattice.to.Cuboid(orthogonal=True)
+        lattice = Lattice(o._v + np.diag(2 * add_R), origin=o.origin - add_R)
+        IA, XYZ, _ = geometry.within_inf(lattice, periodic=pbc)
+        # lattice translation of each atom (relative to the atom in the unit-cell)
+        T = np.rint((XYZ - geometry.xyz[IA]) @ geometry.icell.T).astype(np.int32)
+        XYZ -= self.lattice.origin.reshape(1, 3)
+
+        # Bounds of the grid indices within range of each atom
+        shape = _a.arrayi(self.shape)
+        dcell = _a.arrayd(grid.dcell)
+        idcell = np.linalg.inv(dcell)
+        R = atom_R[IA]
+        for ia in np.unique(IA[R <= 0.0]):
+            warn(
+                f"{self.__class__.__name__} atom '{geometry.atoms[ia]}' does not have a wave-function, skipping atom."
+            )
+        u = XYZ @ idcell
+        ext = R.reshape(-1, 1) * np.sqrt((idcell**2).sum(0)).reshape(1, 3)
+        i0 = np.clip(np.ceil(u - ext), 0, shape).astype(np.int32)
+        i1 = np.clip(np.floor(u + ext) + 1, 0, shape).astype(np.int32)
+
+        orbitals = orbital_tables(geometry)
+        nthreads = max(1, get_environ_variable("SISL_NUM_THREADS"))
+
+        def values(ia, dxyz):
+            if orbitals is None:
+                return np.column_stack(
+                    [
+                        orb.psi(dxyz) if orb.R > 0 else _a.zerosd(len(dxyz))
+                        for orb in geometry.atoms[ia].orbitals
+                    ]
+                )
+            return orbital_values(
+                dxyz, firsto[ia], firsto[ia + 1] - firsto[ia], *orbitals, nthreads
+            )
+
+        eta = progressbar(len(IA), f"{self.__class__.__name__}", "atom", eta)
+
+        # Loop the atoms and store the grid indices and the orbital values
+        img, rows, cols, data = [], [], [], []
+        ncol = 0
+        for im, ia in enumerate(IA):
+            eta.update()
+            if R[im] <= 0.0 or np.any(i1[im] <= i0[im]):
+                continue
+            idx = np.stack(
+                np.meshgrid(
+                    *[np.arange(a, b) for a, b in zip(i0[im], i1[im])], indexing="ij"
+                ),
+                axis=-1,
+            ).reshape(-1, 3)
+            dxyz = idx @ dcell - XYZ[im]
+            idx = idx[(dxyz**2).sum(1) <= R[im] ** 2]
+            if len(idx) == 0:
+                continue
+            psi = values(ia, idx @ dcell - XYZ[im])
+            row, col = psi.nonzero()
+            img.append(im)
+            rows.append(np.ravel_multi_index(idx[row].T, self.shape))
+            cols.append(col + ncol)
+            data.append(psi[row, col])
+            ncol += psi.shape[1]
+        eta.close()
+
+        img = _a.arrayi(img)
+        #: unit-cell atom of each (periodic image of an) atom with orbitals on the grid
+        self.atom = _a.arrayi(IA[img])
+        #: lattice translation of each atom (relative to the atom in the unit-cell)
+        self.isc = T[img]
+        #: first column (in `phi`) of each atom
+        self.o_ptr = _a.arrayi(_ncol_to_indptr(geometry.orbitals[self.atom]))
+
+        # unit-cell orbital and atom (in `atom`) of each column
+        n = np.diff(self.o_ptr)
+        self._col_atom = _a.arrayi(np.repeat(_a.arangei(len(img)), n))
+        self._col_orbital = _a.arrayi(
+            firsto[self.atom][self._col_atom]
+            + _a.arangei(ncol)
+            - self.o_ptr[self._col_atom]
+        )
+
+        if len(rows) == 0:
+            rows = cols = _a.arrayi([])
+            data = np.array([], dtype=dtype)
+        else:
+            rows = np.concatenate(rows)
+            cols = np.concatenate(cols)
+            data = np.concatenate(data).astype(dtype, copy=False)
+        #: the orbital values, shape ``(prod(shape), no)`` (`no` orbitals of all atoms)
+        self.phi = csr_matrix(
+            coo_matrix((data, (rows, cols)), shape=(np.prod(self.shape), ncol))
+        )
+
+    @property
+    def nnz(self):
+        """Number of stored orbital values"""
+        return self.phi.nnz
+
+    def _check_grid(self, grid):
+        """Ensure that `grid` has the same shape and lattice as the basis grid"""
+        if (
+            tuple(grid.shape) != self.shape
+            or not np.allclose(grid.cell, self.lattice.cell)
+            or not np.allclose(grid.lattice.origin, self.lattice.origin)
+        ):
+            raise ValueError(
+                f"{self.__class__.__name__} grid has a different shape or lattice than the basis"
+            )
+
+    def project_vector(self, v, grid, k=(0, 0, 0)):
+        r"""Add the orbital expansion of the coefficients `v` to `grid`
+
+        .. math::
+           \psi(\mathbf r) = \sum_i\phi_i(\mathbf r) v_i \exp(i\mathbf k \mathbf R)
+
+        This is an *in-place* operation that *adds* to the current values in the grid.
+
+        Parameters
+        ----------
+        v : array_like
+           coefficients for each orbital in the geometry (in the ``R`` gauge).
+           If `v` is complex (or `k` is not :math:`\Gamma`), `grid` must be complex.
+        grid : Grid
+           the grid to add to, must have the same shape and lattice as the basis
+        k : array_like, optional
+           k-point (in reduced coordinates) of the coefficients
+
+        See Also
+        --------
+        sisl.physics.electron.wavefunction : same projection without cached orbital values
+        """
+        self._check_grid(grid)
+        v = np.asarray(v)
+        if v.shape != (self.geometry.no,):
+            raise ValueError(
+                f"{self.__class__.__name__}.project_vector requires one coefficient per orbital "
+                f"(got shape {v.shape}, expected ({self.geometry.no},))"
+            )
+        c = self._coefficients(v, k)
+        grid.grid += (self.phi @ c).reshape(self.shape)
+
+    def project_vectors(self, v, out, k=(0, 0, 0), density=False, chunk=None, eta=None):
+        r"""Add the orbital expansion of each of the coefficients `v` to `out`
+
+        Equivalent to calling `project_vector` for each vector, but the vectors are
+        projected in blocks (sparse times dense matrix products).
+
+        This is an *in-place* operation that *adds* to the current values in `out`.
+
+        Parameters
+        ----------
+        v : array_like
+           coefficients, shape ``(N, no)`` (in the ``R`` gauge)
+        out : numpy.ndarray
+           the values added to, shape ``(N, *shape)``, may be a `numpy.memmap`
+        k : array_like, optional
+           k-point (in reduced coordinates) of the coefficients
+        density : bool, optional
+           add the densities :math:`|\psi(\mathbf r)|^2` instead of :math:`\psi(\mathbf r)`
+        chunk : int, optional
+           number of vectors projected at once, defaults to blocks of at most
+           ``SISL_BATCH_SIZE`` MB
+        eta : bool, optional
+           show a progressbar on stdout
+        """
+        v = np.asarray(v)
+        N = len(v)
+        if v.ndim != 2 or v.shape[1] != self.geometry.no:
+            raise ValueError(
+                f"{self.__class__.__name__}.project_vectors requires one coefficient per orbital "
+                f"(got shape {v.shape}, expected (N, {self.geometry.no}))"
+            )
+        if out.shape != (N,) + self.shape:
+            raise ValueError(
+                f"{self.__class__.__name__}.project_vectors requires out with shape "
+                f"{(N,) + self.shape} (got {out.shape})"
+            )
+        npts = self.phi.shape[0]
+        if chunk is None:
+            size = get_environ_variable("SISL_BATCH_SIZE") * 1024**2
+            chunk = int(size // (npts * 16))
+        chunk = max(1, chunk)
+
+        eta = progressbar(N, f"{self.__class__.__name__}.project_vectors", "state", eta)
+        for i0 in range(0, N, chunk):
+            c = self._coefficients(v[i0 : i0 + chunk], k)
+            psi = (self.phi @ c.T).T
+            if density:
+                if np.iscomplexobj(psi):
+                    psi = psi.real**2 + psi.imag**2
+                else:
+                    psi = psi**2
+            out[i0 : i0 + len(c)] += psi.reshape((-1,) + self.shape)
+            eta.update(len(c))
+        eta.close()
+
+    def _coefficients(self, v, k):
+        """Coefficients of the columns in `phi` from the orbital coefficients `v` (last dimension)"""
+        c = v[..., self._col_orbital]
+        k = _a.asarrayd(k)
+        if np.any(np.fabs(k) > 1e-12):
+            phase = np.exp(2j * np.pi * (self.isc @ k))
+            c = c * phase[self._col_atom]
+        return c
+
+    def _atom_matrix(self, M):
+        """The matrix `M` (unit-cell orbitals times supercell orbitals) between the columns of `phi`"""
+        geometry = self.geometry
+        no = geometry.no
+        na = geometry.na
+        if isinstance(M, SparseOrbital):
+            if not np.array_equal(M.geometry.lasto, geometry.lasto):
+                raise ValueError(
+                    f"{self.__class__.__name__}.project_matrix requires the matrix geometry "
+                    f"to have the same atoms and orbitals as the basis (got na={M.na}, no={M.no}, "
+                    f"expected na={na}, no={no})"
+                )
+            M = M.tocsr(0)
+        M = M.tocoo()
+        if M.shape != (no, geometry.no_s):
+            raise ValueError(
+                f"{self.__class__.__name__}.project_matrix requires a matrix of shape "
+                f"{(no, geometry.no_s)} (got {M.shape})"
+            )
+        ncol = self.phi.shape[1]
+        if M.nnz == 0 or len(self.atom) == 0:
+            return csr_matrix((ncol, ncol))
+
+        # group the matrix elements by the row atom
+        m_ia = geometry.o2a(M.row)
+        order = np.argsort(m_ia, kind="stable")
+        m_io, m_jc, m_data = M.row[order], M.col[order], M.data[order]
+        m_n = np.bincount(m_ia, minlength=na)
+        m_ptr = _ncol_to_indptr(m_n)
+
+        # all matrix elements for all atoms (incl. periodic images)
+        n = m_n[self.atom]
+        a = np.repeat(_a.arangei(len(self.atom)), n)
+        e = _a.array_arange(m_ptr[self.atom], n=n)
+        io, jc = m_io[e], m_jc[e]
+        jo = jc % no
+        ja = geometry.o2a(jo)
+        Tb = self.isc[a] + geometry.lattice.sc_off[jc // no]
+
+        # find the connecting atom (with its lattice translation)
+        T0 = self.isc.min(0)
+        dims = self.isc.max(0) - T0 + 1
+        key = np.ravel_multi_index((self.isc - T0).T, dims) * na + self.atom
+        sort = np.argsort(key)
+        key = key[sort]
+        valid = np.all((T0 <= Tb) & (Tb < T0 + dims), axis=1).nonzero()[0]
+        bkey = np.ravel_multi_index((Tb[valid] - T0).T, dims) * na + ja[valid]
+        i = np.clip(np.searchsorted(key, bkey), 0, len(key) - 1)
+        found = key[i] == bkey
+        valid = valid[found]
+        b = sort[i[found]]
+        a, io, jo, ja = a[valid], io[valid], jo[valid], ja[valid]
+
+        firsto = geometry.firsto
+        row = self.o_ptr[a] + io - firsto[self.atom[a]]
+        col = self.o_ptr[b] + jo - firsto[ja]
+        return csr_matrix(
+            coo_matrix((m_data[e[valid]], (row, col)), shape=(ncol, ncol))
+        )
+
+    def project_matrix(self, M, grid):
+        r"""Add the orbital expansion of the matrix `M` to `grid`
+
+        .. math::
+           \rho(\mathbf r) = \sum_{ij}\phi_i(\mathbf r) M_{ij}\phi_j(\mathbf r)
+
+        This is an *in-place* operation that *adds* to the current values in the grid.
+
+        Parameters
+        ----------
+        M : scipy.sparse.spmatrix or SparseOrbital
+           matrix between the orbitals in the unit-cell and the orbitals in the supercell
+           (shape ``(no, no_s)``), e.g. a density matrix. For a `SparseOrbital` the first
+           dimension is projected.
+        grid : Grid
+           the grid to add to, must have the same shape and lattice as the basis.
+           For a complex `M` only the real part is added to a real grid (for a
+           Hermitian `M` the projection is real).
+
+        See Also
+        --------
+        DensityMatrix.density : uses this method when passing a `BasisGrid`
+        """
+        self._check_grid(grid)
+        M = self._atom_matrix(M)
+        phi = self.phi
+        if np.iscomplexobj(M.data):
+            rho = np.asarray(phi.multiply(phi @ M.T).sum(1)).ravel()
+            if not np.iscomplexobj(grid.grid):
+                rho = rho.real
+        else:
+            rho = _a.zerosd(phi.shape[0])
+            matrix_rows(
+                phi.indptr.astype(np.int64, copy=False),
+                phi.indices.astype(np.int32, copy=False),
+                phi.data,
+                M.indptr.astype(np.int64, copy=False),
+                M.indices.astype(np.int32, copy=False),
+                M.data.astype(np.float64, copy=False),
+                rho,
+                max(1, get_environ_variable("SISL_NUM_THREADS")),
+            )
+        grid.grid += rho.reshape(self.shape)
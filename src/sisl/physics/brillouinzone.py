@@ -93,7 +93,6 @@ To run parallel do:
 >>> with mp.apply.renew(pool=True) as par:
 ...     par.eigh()
 
-This requires you also have the package ``pathos`` available.
 The above will run in parallel using a default number of processors
 in priority:
 
@@ -115,19 +114,30 @@ Alternatively one can control the number of processors locally by doing:
 ...     par.eigh()
 
 which will request 2 processors (regardless of core-count).
-As a last resort you can pass your own ``Pool`` of workers that
+As a last resort you can pass your own pool of workers that
 will be used for the parallel processing.
 
->>> from multiprocessing import Pool
->>> pool = Pool(4)
+>>> from concurrent.futures import ProcessPoolExecutor
+>>> pool = ProcessPoolExecutor(4)
 >>> H = Hamiltonian(...)
 >>> mp = MonkhorstPack(H, [10, 10, 10])
 >>> with mp.apply.renew(pool=pool) as par:
 ...     par.eigh()
 
-The ``Pool`` should implement some standard methods that are
-existing in the ``pathos`` enviroment such as ``Pool.restart`` and ``Pool.terminate``
-and ``imap`` and ``uimap`` methods. See the ``pathos`` documentation for detalis.
+The pool should either be a `concurrent.futures.Executor` or implement
+the ``imap`` and ``uimap`` methods existing in the ``pathos`` environment.
+User supplied pools are never closed by sisl.
+
+The pool of workers is created once and retained across calls, so subsequent
+parallel ``apply`` calls do not spawn new processes.
+The parent object is only shipped once per call to the workers (through a
+memory-mapped file), and each task only contains a chunk of k-point indices.
+
+The pool backend is determined by the environment variable ``SISL_POOL_BACKEND``:
+
+- ``pathos``: use the ``pathos`` package
+- ``multiprocessing``: use the standard library `concurrent.futures`
+- ``auto`` (default): ``pathos`` if available, otherwise ``multiprocessing``
 
 
    BrillouinZone
@@ -146,6 +156,7 @@ import numpy as np
 from numpy import argsort, dot, pi, sum
 
 import sisl._array as _a
+from sisl._core.geometry import Geometry
 from sisl._core.grid import Grid
 from sisl._core.lattice import Lattice
 from sisl._core.oplist import oplist
@@ -157,6 +168,8 @@ from sisl.unit import units
 from sisl.utils import batched_indices
 from sisl.utils.mathematics import cart2spher, fnorm
 
+from ._symmetry import geometry_point_group, lattice_point_group, reduce_grid
+
 __all__ = ["BrillouinZone", "MonkhorstPack", "BandStructure", "linspace_bz"]
 
 
@@ -186,6 +199,12 @@ class BrillouinZoneDispatcher(ClassDispatcher):
     - `apply.list` same as `apply.array` but using Python list as return value
     - `apply.oplist` using `sisl.oplist` allows greater flexibility for mathematical operations element wise
     - `apply.datarray` if `xarray` is available one can retrieve an `xarray.DataArray` instance
+    - `apply.mean`, `apply.min`, `apply.max`, `apply.var` streaming reductions (weighted mean,
+      element-wise extremes and weighted variance) which never store the values of all k-points
+    - `apply.histogram` weighted histogram of the values (e.g. eigenvalues) into ``bins``
+
+    The streaming reductions also accept a ``spill`` file-name where the values of all k-points
+    are stored in a memory-mapped array (which is returned together with the reduced value).
 
     Please see :ref:`physics.brillouinzone` for further examples.
     """
@@ -705,6 +724,17 @@ class MonkhorstPack(BrillouinZone):
        whether the k-points are :math:`\Gamma`-centered (for zero displacement)
     trs : bool, optional
        whether time-reversal symmetry exists in the Brillouin zone.
+    symmetry : bool or array_like, optional
+       reduce the k-points to the irreducible wedge of the Brillouin zone using
+       the point-group operations of the parent.
+       If true, the operations are those of the lattice that also leave the atoms
+       of the parent's geometry invariant (only the lattice if the parent has
+       no geometry). Alternatively the operations may be given explicitly as integer matrices
+       acting on fractional coordinates, shape ``(nops, 3, 3)``.
+       Only operations that leave the k-point grid invariant are used.
+       The parent must obey the symmetries of its geometry (e.g. no symmetry
+       breaking magnetic ordering, or spin-orbit coupling).
+       See `unfold` for expanding values to the full grid.
 
     Examples
     --------
@@ -712,6 +742,7 @@ class MonkhorstPack(BrillouinZone):
     >>> MonkhorstPack(lattice, 10) # 10 x 10 x 10 (with TRS)
     >>> MonkhorstPack(lattice, [10, 5, 5]) # 10 x 5 x 5 (with TRS)
     >>> MonkhorstPack(lattice, [10, 5, 5], trs=False) # 10 x 5 x 5 (without TRS)
+    >>> MonkhorstPack(H, [10, 10, 10], symmetry=True) # irreducible wedge
     """
 
     def __init__(
@@ -722,6 +753,7 @@ class MonkhorstPack(BrillouinZone):
         size=None,
         centered: bool = True,
         trs: bool = True,
+        symmetry=False,
     ):
         super().__init__(parent)
 
@@ -760,6 +792,17 @@ class MonkhorstPack(BrillouinZone):
                 "diagonal elements different from 0."
             )
 
+        # in case of symmetry reduction we create the full grid and
+        # reduce it afterwards (TRS is handled by the reduction)
+        sym_trs = False
+        if not (isinstance(symmetry, bool) and not symmetry):
+            if np.any(size != 1.0):
+                raise ValueError(
+                    f"{self.__class__.__name__} symmetry reduction requires the full Brillouin zone (size=1)"
+                )
+            sym_trs = trs
+            trs = False
+
         i_trs = -1
         if trs:
             # Figure out which direction to TRS
@@ -858,6 +901,64 @@ class MonkhorstPack(BrillouinZone):
         self._size = size  # vector
         self._centered = centered
         self._trs = i_trs
+        self._unfold = None
+        if not (isinstance(symmetry, bool) and not symmetry):
+            self._reduce_symmetry(symmetry, sym_trs)
+
+    def _reduce_symmetry(self, symmetry, trs):
+        """Reduce the (full) grid of k-points to the irreducible points"""
+        if isinstance(symmetry, bool):
+            parent = self.parent
+            if isinstance(parent, Geometry):
+                geometry = parent
+            else:
+                geometry = getattr(parent, "geometry", None)
+            if geometry is None:
+                ops = lattice_point_group(self._parent_lattice().cell)
+            else:
+                ops = geometry_point_group(geometry)
+        else:
+            ops = np.asarray(symmetry, dtype=np.int32).reshape(-1, 3, 3)
+
+        irr, unfold, _ = reduce_grid(self._k, self._diag, ops, trs)
+        self._w = np.bincount(unfold, weights=self._w)
+        self._k = self._k[irr]
+        self._unfold = unfold
+
+    def unfold(self, values, axis: int = 0):
+        r"""Expand values calculated at the irreducible k-points to the full grid of k-points
+
+        The full grid of k-points is ordered as the k-points of a `MonkhorstPack`
+        with the same arguments, but ``trs=False`` (and no symmetry).
+
+        Note that only quantities invariant under the symmetry operations
+        may be unfolded, e.g. eigenvalues and the DOS. Quantities that transform with
+        the operations (e.g. eigenstates, velocities, or orbital projections) are *not*
+        rotated.
+
+        Parameters
+        ----------
+        values : array_like
+           the values for each irreducible k-point (along `axis`)
+        axis : int, optional
+           the axis of the k-points in `values`
+
+        Examples
+        --------
+        >>> mp = MonkhorstPack(H, [10, 10, 1], symmetry=True)
+        >>> eig = mp.unfold(mp.apply.array.eigh())
+
+        Raises
+        ------
+        SislError
+            if this object is not reduced by symmetry (or has been modified since the reduction)
+        """
+        if self._unfold is None:
+            raise SislError(
+                f"{self.__class__.__name__}.unfold requires the k-points to be "
+                "reduced by symmetry (and not subsequently replaced)"
+            )
+        return np.take(values, self._unfold, axis=axis)
 
     @property
     def displacement(self):
@@ -889,6 +990,7 @@ class MonkhorstPack(BrillouinZone):
         state["size"] = self._size
         state["centered"] = self._centered
         state["trs"] = self._trs
+        state["unfold"] = self._unfold
         return state
 
     def __setstate__(self, state):
@@ -899,6 +1001,7 @@ class MonkhorstPack(BrillouinZone):
         self._size = state["size"]
         self._centered = state["centered"]
         self._trs = state["trs"]
+        self._unfold = state.get("unfold")
 
     @classmethod
     def grid(
@@ -1182,6 +1285,8 @@ class MonkhorstPack(BrillouinZone):
         self._w = np.concatenate(
             (np.delete(self._w, idx), np.tile(mp._w * weight_factor, displ_nk))
         )
+        # the k-points no longer corresponds to the reduced grid
+        self._unfold = None
 
 
 @set_module("sisl.physics")
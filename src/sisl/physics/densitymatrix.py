@@ -16,12 +16,14 @@ from sisl import BoundaryCondition as BC
 from sisl import Geometry, Lattice
 from sisl._core.sparse import SparseCSR, _ncol_to_indptr, _to_coo
 from sisl._core.sparse_geometry import SparseAtom, SparseOrbital
+from sisl._environ import get_environ_variable
 from sisl._indices import indices_fabs_le, indices_le
 from sisl._internal import set_module
 from sisl._math_small import xyz_to_spherical_cos_phi
 from sisl.messages import progressbar, warn
 from sisl.typing import AtomsArgument, SeqFloat
 
+from ._orbital_grid import density_grid, orbital_tables
 from .sparse import SparseOrbitalBZSpin
 from .spin import Spin
 
@@ -681,7 +683,7 @@ class _densitymatrix(SparseOrbitalBZSpin):
 
         return out_cls.fromsp(geom, BO)
 
-    def density(self, grid, spinor=None, tol: float = 1e-7, eta=None):
+    def density(self, grid, spinor=None, tol: float = 1e-7, eta=None, basis=None):
         r"""Expand the density matrix to the charge density on a grid
 
         This routine calculates the real-space density components on a specified grid.
@@ -720,8 +722,29 @@ class _densitymatrix(SparseOrbitalBZSpin):
            the tolerance, they will be treated as strictly zeros.
         eta : bool, optional
            show a progressbar on stdout
+        basis : BasisGrid, optional
+           orbital values on the grid, when calculating densities of many density matrices
+           on the same grid the orbital values need only be calculated once
+
+        Notes
+        -----
+        The orbitals are evaluated from tabulated radial functions in a compiled kernel
+        which is threaded over the grid planes (``SISL_NUM_THREADS``).
+        Only if some orbitals have no radial functions, the (much slower) Python
+        implementation is used.
+
+        See Also
+        --------
+        BasisGrid.project_matrix : the projection used with `basis`
         """
         geometry = self.geometry
+        if basis is not None and not np.array_equal(
+            basis.geometry.lasto, geometry.lasto
+        ):
+            raise ValueError(
+                f"{self.__class__.__name__}.density requires the basis to be created "
+                "for a geometry with the same atoms and orbitals as the density matrix."
+            )
         # Check that the atomic coordinates, really are all within the intrinsic supercell.
         # If not, it may mean that the DM does not conform to the primary unit-cell paradigm
         # of matrix elements. It complicates things.
@@ -853,6 +876,12 @@ class _densitymatrix(SparseOrbitalBZSpin):
             if len(ia) > 0:
                 grid.set_geometry(Geometry(xyz, geometry.atoms[ia], lattice=lattice))
 
+        if basis is not None:
+            # The orbital values are already calculated
+            basis.project_matrix(csrDM, grid)
+            np.seterr(**old_err)
+            return
+
         # Instead of looping all atoms in the supercell we find the exact atoms
         # and their supercell indices.
         add_R = _a.fulld(3, geometry.maxR())
@@ -865,246 +894,372 @@ class _densitymatrix(SparseOrbitalBZSpin):
 
         # Retrieve all atoms within the grid supercell
         # (and the neighbors that connect into the cell)
-        IA, XYZ, ISC = geometry.within_inf(lattice, periodic=pbc)
+        IA, XYZ, _ = geometry.within_inf(lattice, periodic=pbc)
         XYZ -= grid.lattice.origin.reshape(1, 3)
 
         # Retrieve progressbar
         eta = progressbar(len(IA), f"{self.__class__.__name__}.density", "atom", eta)
 
-        cell = geometry.cell
-        atoms = geometry.atoms
-        axyz = geometry.axyz
-        a2o = geometry.a2o
-
-        def xyz2spherical(xyz, offset):
-            """Calculate the spherical coordinates from indices"""
-            rx = xyz[:, 0] - offset[0]
-            ry = xyz[:, 1] - offset[1]
-            rz = xyz[:, 2] - offset[2]
-
-            # Calculate radius ** 2
-            xyz_to_spherical_cos_phi(rx, ry, rz)
-            return rx, ry, rz
-
-        def xyz2sphericalR(xyz, offset, R):
-            """Calculate the spherical coordinates from indices"""
-            rx = xyz[:, 0] - offset[0]
-            idx = indices_fabs_le(rx, R)
-            ry = xyz[idx, 1] - offset[1]
-            ix = indices_fabs_le(ry, R)
-            ry = ry[ix]
-            idx = idx[ix]
-            rz = xyz[idx, 2] - offset[2]
-            ix = indices_fabs_le(rz, R)
-            ry = ry[ix]
-            rz = rz[ix]
-            idx = idx[ix]
-            if len(idx) == 0:
-                return [], [], [], []
-            rx = rx[idx]
-
-            # Calculate radius ** 2
-            ix = indices_le(rx**2 + ry**2 + rz**2, R**2)
-            idx = idx[ix]
-            if len(idx) == 0:
-                return [], [], [], []
-            rx = rx[ix]
-            ry = ry[ix]
-            rz = rz[ix]
-            xyz_to_spherical_cos_phi(rx, ry, rz)
-            return idx, rx, ry, rz
-
-        # Looping atoms in the sparse pattern is better since we can pre-calculate
-        # the radial parts and then add them.
-        # First create a SparseOrbital matrix, then convert to SparseAtom
-        spO = SparseOrbital(geometry, dtype=np.int16)
-        spO._csr = SparseCSR(csrDM)
-        spA = spO.toSparseAtom(dtype=np.int16)
-        del spO
-        na = geometry.na
-        # Remove the diagonal part of the sparse atom matrix
-        off = na * primary_i_s
-        for ia in range(na):
-            del spA[ia, off + ia]
-
-        # Get pointers and delete the atomic sparse pattern
-        # The below complexity is because we are not finalizing spA
-        csr = spA._csr
-        a_ptr = _ncol_to_indptr(csr.ncol)
-        a_col = csr.col[_a.array_arange(csr.ptr, n=csr.ncol)]
-        del spA, csr
-
-        # Get offset in supercell in orbitals
-        off = geometry.no * primary_i_s
-        origin = grid.origin
-        # TODO sum the non-origin atoms to the csrDM matrix
-        #      this would further decrease the loops required.
-
-        # Loop over all atoms in the grid-cell
-        for ia, ia_xyz, isc in zip(IA, XYZ, ISC):
-            # Get current atom
-            ia_atom = atoms[ia]
-            IO = a2o(ia)
-            IO_range = range(ia_atom.no)
-            cell_offset = (cell * isc.reshape(3, 1)).sum(0) - origin
-
-            # Extract maximum R
-            R = ia_atom.maxR()
-            if R <= 0.0:
-                warn(f"Atom '{ia_atom}' does not have a wave-function, skipping atom.")
-                eta.update()
-                continue
+        orbitals = orbital_tables(geometry)
+        if orbitals is None:
+            # Not all orbitals have a radial part, fall back to the Python implementation
+            _density_python(geometry, csrDM, grid, IA, XYZ, eta)
+        else:
+            _density_compiled(geometry, csrDM, grid, IA, XYZ, orbitals, eta)
+        eta.close()
 
-            # Retrieve indices of the grid for the atomic shape
-            idx = grid.index(ia_atom.to.Sphere(center=ia_xyz))
-
-            # Now we have the indices for the largest orbital on the atom
-
-            # Subsequently we have to loop the orbitals and the
-            # connecting orbitals
-            # Then we find the indices that overlap with these indices
-            # First reduce indices to inside the grid-cell
-            idx[idx[:, 0] < 0, 0] = 0
-            idx[shape[0] <= idx[:, 0], 0] = shape[0] - 1
-            idx[idx[:, 1] < 0, 1] = 0
-            idx[shape[1] <= idx[:, 1], 1] = shape[1] - 1
-            idx[idx[:, 2] < 0, 2] = 0
-            idx[shape[2] <= idx[:, 2], 2] = shape[2] - 1
-
-            idx = unique(idx, axis=0)
-            if len(idx) == 0:
-                eta.update()
+        # Reset the error code for division
+        np.seterr(**old_err)
+
+
+def _density_python(geometry, csrDM, grid, IA, XYZ, eta):
+    """Add the density to `grid` by looping atoms in Python
+
+    This is only used when some orbitals cannot be tabulated, see `_density_compiled`.
+    `csrDM` is the (upper triangular) density matrix and `IA`, `XYZ` are the atoms
+    in (and around) the grid, see `DensityMatrix.density`.
+    """
+    shape = _a.asarrayi(grid.shape)
+    dcell = grid.dcell
+    primary_i_s = geometry.sc_index([0, 0, 0])
+
+    atoms = geometry.atoms
+    axyz = geometry.axyz
+    a2o = geometry.a2o
+
+    def xyz2spherical(xyz, offset):
+        """Calculate the spherical coordinates from indices"""
+        rx = xyz[:, 0] - offset[0]
+        ry = xyz[:, 1] - offset[1]
+        rz = xyz[:, 2] - offset[2]
+
+        # Calculate radius ** 2
+        xyz_to_spherical_cos_phi(rx, ry, rz)
+        return rx, ry, rz
+
+    def xyz2sphericalR(xyz, offset, R):
+        """Calculate the spherical coordinates from indices"""
+        rx = xyz[:, 0] - offset[0]
+        idx = indices_fabs_le(rx, R)
+        ry = xyz[idx, 1] - offset[1]
+        ix = indices_fabs_le(ry, R)
+        ry = ry[ix]
+        idx = idx[ix]
+        rz = xyz[idx, 2] - offset[2]
+        ix = indices_fabs_le(rz, R)
+        ry = ry[ix]
+        rz = rz[ix]
+        idx = idx[ix]
+        if len(idx) == 0:
+            return [], [], [], []
+        rx = rx[idx]
+
+        # Calculate radius ** 2
+        ix = indices_le(rx**2 + ry**2 + rz**2, R**2)
+        idx = idx[ix]
+        if len(idx) == 0:
+            return [], [], [], []
+        rx = rx[ix]
+        ry = ry[ix]
+        rz = rz[ix]
+        xyz_to_spherical_cos_phi(rx, ry, rz)
+        return idx, rx, ry, rz
+
+    # Looping atoms in the sparse pattern is better since we can pre-calculate
+    # the radial parts and then add them.
+    # First create a SparseOrbital matrix, then convert to SparseAtom
+    spO = SparseOrbital(geometry, dtype=np.int16)
+    spO._csr = SparseCSR(csrDM)
+    spA = spO.toSparseAtom(dtype=np.int16)
+    del spO
+    na = geometry.na
+    # Remove the diagonal part of the sparse atom matrix
+    off = na * primary_i_s
+    for ia in range(na):
+        del spA[ia, off + ia]
+
+    # Get pointers and delete the atomic sparse pattern
+    # The below complexity is because we are not finalizing spA
+    csr = spA._csr
+    a_ptr = _ncol_to_indptr(csr.ncol)
+    a_col = csr.col[_a.array_arange(csr.ptr, n=csr.ncol)]
+    del spA, csr
+
+    # Get offset in supercell in orbitals
+    off = geometry.no * primary_i_s
+    # TODO sum the non-origin atoms to the csrDM matrix
+    #      this would further decrease the loops required.
+
+    # Loop over all atoms in the grid-cell
+    for ia, ia_xyz in zip(IA, XYZ):
+        # Get current atom
+        ia_atom = atoms[ia]
+        IO = a2o(ia)
+        IO_range = range(ia_atom.no)
+        # the offset of the connecting atoms (XYZ are relative to the grid origin)
+        cell_offset = ia_xyz - axyz(ia)
+
+        # Extract maximum R
+        R = ia_atom.maxR()
+        if R <= 0.0:
+            warn(f"Atom '{ia_atom}' does not have a wave-function, skipping atom.")
+            eta.update()
+            continue
+
+        # Retrieve indices of the grid for the atomic shape
+        idx = grid.index(ia_atom.to.Sphere(center=ia_xyz))
+
+        # Now we have the indices for the largest orbital on the atom
+
+        # Subsequently we have to loop the orbitals and the
+        # connecting orbitals
+        # Then we find the indices that overlap with these indices
+        # First reduce indices to inside the grid-cell
+        idx[idx[:, 0] < 0, 0] = 0
+        idx[shape[0] <= idx[:, 0], 0] = shape[0] - 1
+        idx[idx[:, 1] < 0, 1] = 0
+        idx[shape[1] <= idx[:, 1], 1] = shape[1] - 1
+        idx[idx[:, 2] < 0, 2] = 0
+        idx[shape[2] <= idx[:, 2], 2] = shape[2] - 1
+
+        idx = unique(idx, axis=0)
+        if len(idx) == 0:
+            eta.update()
+            continue
+
+        # Get real-space coordinates for the current atom
+        # as well as the radial parts
+        grid_xyz = dot(idx, dcell)
+
+        # Perform loop on connection atoms
+        # Allocate the DM_pj arrays
+        # This will have a size equal to number of elements times number of
+        # orbitals on this atom
+        # In this way we do not have to calculate the psi_j multiple times
+        DM_io = csrDM[IO : IO + ia_atom.no, :].tolil()
+        DM_pj = _a.zerosd([ia_atom.no, grid_xyz.shape[0]])
+
+        # Now we perform the loop on the connections for this atom
+        # Remark that we have removed the diagonal atom (it-self)
+        # As that will be calculated in the end
+        for ja in a_col[a_ptr[ia] : a_ptr[ia + 1]]:
+            # Retrieve atom (which contains the orbitals)
+            ja_atom = atoms[ja % na]
+            JO = a2o(ja)
+            jR = ja_atom.maxR()
+            # Get actual coordinate of the atom
+            ja_xyz = axyz(ja) + cell_offset
+
+            # Reduce the ia'th grid points to those that connects to the ja'th atom
+            ja_idx, ja_r, ja_theta, ja_cos_phi = xyz2sphericalR(grid_xyz, ja_xyz, jR)
+
+            if len(ja_idx) == 0:
+                # Quick step
                 continue
 
-            # Get real-space coordinates for the current atom
-            # as well as the radial parts
-            grid_xyz = dot(idx, dcell)
-
-            # Perform loop on connection atoms
-            # Allocate the DM_pj arrays
-            # This will have a size equal to number of elements times number of
-            # orbitals on this atom
-            # In this way we do not have to calculate the psi_j multiple times
-            DM_io = csrDM[IO : IO + ia_atom.no, :].tolil()
-            DM_pj = _a.zerosd([ia_atom.no, grid_xyz.shape[0]])
-
-            # Now we perform the loop on the connections for this atom
-            # Remark that we have removed the diagonal atom (it-self)
-            # As that will be calculated in the end
-            for ja in a_col[a_ptr[ia] : a_ptr[ia + 1]]:
-                # Retrieve atom (which contains the orbitals)
-                ja_atom = atoms[ja % na]
-                JO = a2o(ja)
-                jR = ja_atom.maxR()
-                # Get actual coordinate of the atom
-                ja_xyz = axyz(ja) + cell_offset
-
-                # Reduce the ia'th grid points to those that connects to the ja'th atom
-                ja_idx, ja_r, ja_theta, ja_cos_phi = xyz2sphericalR(
-                    grid_xyz, ja_xyz, jR
-                )
+            # Loop on orbitals on this atom
+            for jo in range(ja_atom.no):
+                o = ja_atom.orbitals[jo]
+                oR = o.R
+
+                # Downsize to the correct indices
+                if jR - oR < 1e-6:
+                    ja_idx1 = ja_idx
+                    ja_r1 = ja_r
+                    ja_theta1 = ja_theta
+                    ja_cos_phi1 = ja_cos_phi
+                else:
+                    ja_idx1 = indices_le(ja_r, oR)
+                    if len(ja_idx1) == 0:
+                        # Quick step
+                        continue
 
-                if len(ja_idx) == 0:
-                    # Quick step
-                    continue
-
-                # Loop on orbitals on this atom
-                for jo in range(ja_atom.no):
-                    o = ja_atom.orbitals[jo]
-                    oR = o.R
-
-                    # Downsize to the correct indices
-                    if jR - oR < 1e-6:
-                        ja_idx1 = ja_idx
-                        ja_r1 = ja_r
-                        ja_theta1 = ja_theta
-                        ja_cos_phi1 = ja_cos_phi
-                    else:
-                        ja_idx1 = indices_le(ja_r, oR)
-                        if len(ja_idx1) == 0:
-                            # Quick step
-                            continue
-
-                        # Reduce arrays
-                        ja_r1 = ja_r[ja_idx1]
-                        ja_theta1 = ja_theta[ja_idx1]
-                        ja_cos_phi1 = ja_cos_phi[ja_idx1]
-                        ja_idx1 = ja_idx[ja_idx1]
-
-                    # Calculate the psi_j component
-                    psi = o.psi_spher(ja_r1, ja_theta1, ja_cos_phi1, cos_phi=True)
-
-                    # Now add this orbital to all components
-                    for io in IO_range:
-                        DM_pj[io, ja_idx1] += DM_io[io, JO + jo] * psi
-
-                # Temporary clean up
-                del ja_idx, ja_r, ja_theta, ja_cos_phi
-                del ja_idx1, ja_r1, ja_theta1, ja_cos_phi1, psi
-
-            # Now we have all components for all orbitals connection to all orbitals on atom
-            # ia. We simply need to add the diagonal components
-
-            # Loop on the orbitals on this atom
-            ia_r, ia_theta, ia_cos_phi = xyz2spherical(grid_xyz, ia_xyz)
-            del grid_xyz
-            for io in IO_range:
-                # Only loop halve the range.
-                # This is because: triu + tril(-1).transpose()
-                # removes the lower half of the on-site matrix.
-                for jo in range(io + 1, ia_atom.no):
-                    DM = DM_io[io, off + IO + jo]
-
-                    oj = ia_atom.orbitals[jo]
-                    ojR = oj.R
-
-                    # Downsize to the correct indices
-                    if R - ojR < 1e-6:
-                        ja_idx1 = slice(None)
-                        ja_r1 = ia_r
-                        ja_theta1 = ia_theta
-                        ja_cos_phi1 = ia_cos_phi
-                    else:
-                        ja_idx1 = indices_le(ia_r, ojR)
-                        if len(ja_idx1) == 0:
-                            # Quick step
-                            continue
-
-                        # Reduce arrays
-                        ja_r1 = ia_r[ja_idx1]
-                        ja_theta1 = ia_theta[ja_idx1]
-                        ja_cos_phi1 = ia_cos_phi[ja_idx1]
-
-                    # Calculate the psi_j component
-                    DM_pj[io, ja_idx1] += DM * oj.psi_spher(
-                        ja_r1, ja_theta1, ja_cos_phi1, cos_phi=True
-                    )
-
-                # Calculate the psi_i component
-                # Note that this one *also* zeroes points outside the shell
-                # I.e. this step is important because it "nullifies" all but points where
-                # orbital io is defined.
-                psi = ia_atom.orbitals[io].psi_spher(
-                    ia_r, ia_theta, ia_cos_phi, cos_phi=True
-                )
-                DM_pj[io, :] += DM_io[io, off + IO + io] * psi
-                DM_pj[io, :] *= psi
+                    # Reduce arrays
+                    ja_r1 = ja_r[ja_idx1]
+                    ja_theta1 = ja_theta[ja_idx1]
+                    ja_cos_phi1 = ja_cos_phi[ja_idx1]
+                    ja_idx1 = ja_idx[ja_idx1]
+
+                # Calculate the psi_j component
+                psi = o.psi_spher(ja_r1, ja_theta1, ja_cos_phi1, cos_phi=True)
+
+                # Now add this orbital to all components
+                for io in IO_range:
+                    DM_pj[io, ja_idx1] += DM_io[io, JO + jo] * psi
 
             # Temporary clean up
-            ja_idx1 = ja_r1 = ja_theta1 = ja_cos_phi1 = None
-            del ia_r, ia_theta, ia_cos_phi, psi, DM_io
+            del ja_idx, ja_r, ja_theta, ja_cos_phi
+            del ja_idx1, ja_r1, ja_theta1, ja_cos_phi1, psi
+
+        # Now we have all components for all orbitals connection to all orbitals on atom
+        # ia. We simply need to add the diagonal components
+
+        # Loop on the orbitals on this atom
+        ia_r, ia_theta, ia_cos_phi = xyz2spherical(grid_xyz, ia_xyz)
+        del grid_xyz
+        for io in IO_range:
+            # Only loop halve the range.
+            # This is because: triu + tril(-1).transpose()
+            # removes the lower half of the on-site matrix.
+            for jo in range(io + 1, ia_atom.no):
+                DM = DM_io[io, off + IO + jo]
+
+                oj = ia_atom.orbitals[jo]
+                ojR = oj.R
+
+                # Downsize to the correct indices
+                if R - ojR < 1e-6:
+                    ja_idx1 = slice(None)
+                    ja_r1 = ia_r
+                    ja_theta1 = ia_theta
+                    ja_cos_phi1 = ia_cos_phi
+                else:
+                    ja_idx1 = indices_le(ia_r, ojR)
+                    if len(ja_idx1) == 0:
+                        # Quick step
+                        continue
 
-            # Now add the density
-            grid.grid[idx[:, 0], idx[:, 1], idx[:, 2]] += DM_pj.sum(0)
+                    # Reduce arrays
+                    ja_r1 = ia_r[ja_idx1]
+                    ja_theta1 = ia_theta[ja_idx1]
+                    ja_cos_phi1 = ia_cos_phi[ja_idx1]
 
-            # Clean-up
-            del DM_pj, idx
+                # Calculate the psi_j component
+                DM_pj[io, ja_idx1] += DM * oj.psi_spher(
+                    ja_r1, ja_theta1, ja_cos_phi1, cos_phi=True
+                )
 
-            eta.update()
-        eta.close()
+            # Calculate the psi_i component
+            # Note that this one *also* zeroes points outside the shell
+            # I.e. this step is important because it "nullifies" all but points where
+            # orbital io is defined.
+            psi = ia_atom.orbitals[io].psi_spher(
+                ia_r, ia_theta, ia_cos_phi, cos_phi=True
+            )
+            DM_pj[io, :] += DM_io[io, off + IO + io] * psi
+            DM_pj[io, :] *= psi
 
-        # Reset the error code for division
-        np.seterr(**old_err)
+        # Temporary clean up
+        ja_idx1 = ja_r1 = ja_theta1 = ja_cos_phi1 = None
+        del ia_r, ia_theta, ia_cos_phi, psi, DM_io
+
+        # Now add the density
+        grid.grid[idx[:, 0], idx[:, 1], idx[:, 2]] += DM_pj.sum(0)
+
+        # Clean-up
+        del DM_pj, idx
+
+        eta.update()
+
+
+def _density_compiled(geometry, csrDM, grid, IA, XYZ, orbitals, eta):
+    """Add the density to `grid` using the compiled (threaded) kernel
+
+    The density matrix is re-arranged in dense blocks between atoms, and the
+    orbitals are evaluated from tabulated radial functions, see `orbital_tables`.
+    The grid is distributed among ``SISL_NUM_THREADS`` threads, by planes
+    along the first lattice vector.
+    """
+    o_l, o_m, o_c, o_R, o_tab, tab, tab_dr = orbitals
+    na = geometry.na
+    na_s = geometry.na_s
+    no = geometry.no
+    firsto = geometry.firsto
+    atom_no = _a.arrayi(geometry.orbitals)
+    atom_o = _a.arrayi(firsto[:-1])
+    atom_R = _a.arrayd([atom.maxR() for atom in geometry.atoms.atom])[
+        geometry.atoms.specie
+    ]
+
+    # The density matrix in dense atomic blocks
+    DM = csrDM.tocoo()
+    io, jo = DM.row, DM.col
+    ia, ja = geometry.o2a(io), geometry.o2a(jo)
+    key = ia.astype(np.int64) * na_s + ja
+    ukey, inv = unique(key, return_inverse=True)
+    b_ia = ukey // na_s
+    b_ja = ukey % na_s
+    a_ptr = _a.arrayi(_ncol_to_indptr(np.bincount(b_ia, minlength=na)))
+    b_no = atom_no[b_ja % na]
+    b_ptr = np.zeros(len(ukey) + 1, dtype=np.int64)
+    np.cumsum(atom_no[b_ia] * b_no, out=b_ptr[1:])
+    D = _a.zerosd(b_ptr[-1])
+    D[b_ptr[inv] + (io - firsto[ia]) * b_no[inv] + jo % no - firsto[ja % na]] = DM.data
+    b_dxyz = geometry.axyz(b_ja) - geometry.xyz[b_ia]
+    b_ja = _a.arrayi(b_ja % na)
+    del DM, io, jo, ia, ja, key, ukey, inv, b_ia, b_no
+
+    # Bounds of the grid indices within range of each atom
+    shape = _a.arrayi(grid.shape)
+    dcell = _a.arrayd(grid.dcell)
+    idcell = np.linalg.inv(dcell)
+    R = atom_R[IA]
+    for ia in np.unique(IA[R <= 0.0]):
+        warn(
+            f"Atom '{geometry.atoms[ia]}' does not have a wave-function, skipping atom."
+        )
+    u = XYZ @ idcell
+    ext = R.reshape(-1, 1) * np.sqrt((idcell**2).sum(0)).reshape(1, 3)
+    i0 = np.clip(np.ceil(u - ext), 0, shape).astype(np.int32)
+    i1 = np.clip(np.floor(u + ext) + 1, 0, shape).astype(np.int32)
+    box = np.stack([i0[:, 0], i1[:, 0], i0[:, 1], i1[:, 1], i0[:, 2], i1[:, 2]], axis=1)
+    box = _a.arrayi(box)
+    img_xyz = _a.arrayd(XYZ)
+    img_atom = _a.arrayi(IA)
+
+    if grid.grid.dtype == np.float64 and grid.grid.flags.c_contiguous:
+        rho = grid.grid
+    else:
+        rho = _a.zerosd(grid.shape)
+
+    nthreads = max(1, get_environ_variable("SISL_NUM_THREADS"))
+
+    # Process the atoms in batches to show the progress
+    batch = 512
+    for b0 in range(0, len(IA), batch):
+        img = _a.arangei(b0, min(b0 + batch, len(IA)))
+        img = img[(R[img] > 0) & np.all(i1[img] > i0[img], axis=1)]
+        if len(img) == 0:
+            eta.update(min(batch, len(IA) - b0))
+            continue
+        # the atoms of each plane (first dimension of the grid)
+        n = i1[img, 0] - i0[img, 0]
+        plane_img = np.repeat(img, n)
+        plane = np.repeat(i0[img, 0], n) + _a.array_arange(np.zeros_like(n), n=n)
+        order = np.argsort(plane, kind="stable")
+        plane_img = _a.arrayi(plane_img[order])
+        plane_ptr = _a.arrayi(
+            _ncol_to_indptr(np.bincount(plane, minlength=shape[0])[: shape[0]])
+        )
+        density_grid(
+            rho,
+            dcell,
+            plane_ptr,
+            plane_img,
+            img_xyz,
+            img_atom,
+            box,
+            a_ptr,
+            b_dxyz,
+            b_ja,
+            b_ptr,
+            D,
+            atom_no,
+            atom_o,
+            atom_R,
+            o_l,
+            o_m,
+            o_c,
+            o_R,
+            o_tab,
+            tab,
+            tab_dr,
+            nthreads,
+        )
+        eta.update(min(batch, len(IA) - b0))
+
+    if rho is not grid.grid:
+        grid.grid += rho
 
 
 @set_module("sisl.physics")
@@ -14,11 +14,14 @@ One may also plot real-space wavefunctions.
 
    DOS
    PDOS
+   DOS_tetrahedron
+   PDOS_tetrahedron
    COP
    berry_phase
    berry_curvature
    conductivity
    wavefunction
+   wavefunctions
    spin_moment
    spin_contamination
 
@@ -44,6 +47,7 @@ automatically passes the correct ``S`` because it knows the states :math:`k`-poi
 """
 
 from functools import reduce
+from pathlib import Path
 
 import numpy as np
 from numpy import (
@@ -80,16 +84,19 @@ from sisl.linalg import eigvals as la_eigvals
 from sisl.linalg import sqrth, svd_destroy
 from sisl.messages import SislError, info, progressbar, warn
 
+from ._tetrahedron import dos_tetrahedra, tetrahedra, weights_tetrahedra
+from .basis_grid import BasisGrid
 from .distribution import get_distribution
 from .sparse import SparseOrbitalBZSpin
 from .spin import Spin
 from .state import Coefficient, State, StateC, _FakeMatrix, degenerate_decouple
 
 __all__ = ["DOS", "PDOS", "COP"]
+__all__ += ["DOS_tetrahedron", "PDOS_tetrahedron"]
 __all__ += ["spin_moment", "spin_contamination"]
 __all__ += ["berry_phase", "berry_curvature"]
 __all__ += ["conductivity"]
-__all__ += ["wavefunction"]
+__all__ += ["wavefunction", "wavefunctions"]
 __all__ += ["CoefficientElectron", "StateElectron", "StateCElectron"]
 __all__ += ["EigenvalueElectron", "EigenvectorElectron", "EigenstateElectron"]
 
@@ -286,6 +293,112 @@ def PDOS(E, eig, state, S=None, distribution="gaussian", spin=None):
     return PDOS
 
 
+@set_module("sisl.physics.electron")
+def DOS_tetrahedron(E, eig, bz):
+    r"""Calculate the density of states (DOS) using the linear tetrahedron method
+
+    Each cell of the Monkhorst-Pack grid is divided into 6 tetrahedra in which the
+    eigenvalues are linearly interpolated :cite:`Blochl1994`. Contrary to `DOS` no broadening
+    is used, and the DOS converges with far fewer :math:`k`-points.
+
+    The eigenvalues are sorted per :math:`k`-point, and bands are interpolated
+    in this order (band crossings are not resolved).
+    Tetrahedra where all corners have the same energy contribute a delta-function
+    which is not captured by `E`.
+
+    Parameters
+    ----------
+    E : array_like
+       energies to calculate the DOS at
+    eig : array_like
+       electronic eigenvalues at all k-points of `bz`, shape ``(len(bz), nb)``
+    bz : MonkhorstPack
+       the k-points of the eigenvalues. It must sample the full Brillouin zone
+       (``size=1``), and may be reduced by time-reversal symmetry or by
+       ``symmetry=True``. Replaced k-points are not allowed.
+
+    Examples
+    --------
+    >>> mp = MonkhorstPack(H, [10, 10, 1])
+    >>> eig = mp.apply.array.eigh()
+    >>> DOS = DOS_tetrahedron(np.linspace(-2, 2, 401), eig, mp)
+
+    See Also
+    --------
+    DOS : DOS calculated using a distribution function
+    PDOS_tetrahedron : projected DOS using the linear tetrahedron method
+
+    Returns
+    -------
+    numpy.ndarray
+        DOS calculated at energies, has same length as `E`. It is normalized to 1 per band
+    """
+    eig = np.sort(np.asarray(eig), axis=1)
+    return dos_tetrahedra(np.asarray(E).ravel(), eig, tetrahedra(bz))
+
+
+@set_module("sisl.physics.electron")
+def PDOS_tetrahedron(E, eig, weight, bz, blochl: bool = True):
+    r"""Calculate projected density of states (PDOS) using the linear tetrahedron method
+
+    The PDOS is calculated as
+
+    .. math::
+       \mathrm{PDOS}(E) = \sum_{\mathbf k, i} w_{\mathbf k i}(E) p_{\mathbf k i}
+
+    where :math:`w_{\mathbf k i}(E)` are the integration weights of the linear tetrahedron
+    method :cite:`Blochl1994` and :math:`p_{\mathbf k i}` the projections (`weight`) of the
+    eigenstates. The Blöchl corrections do not change the total DOS, but
+    improve projected quantities.
+
+    Note that for symmetry reduced grids (``MonkhorstPack(..., symmetry=True)``) the projections
+    are not rotated, see `MonkhorstPack.unfold`.
+
+    Parameters
+    ----------
+    E : array_like
+       energies to calculate the projected-DOS from
+    eig : array_like
+       electronic eigenvalues at all k-points of `bz`, shape ``(len(bz), nb)``
+    weight : array_like
+       projections of each eigenstate, shape ``(len(bz), nb, ...)``
+    bz : MonkhorstPack
+       the k-points of the eigenvalues, see `DOS_tetrahedron` for restrictions
+    blochl : bool, optional
+       whether the Blöchl corrections are added
+
+    Examples
+    --------
+    >>> mp = MonkhorstPack(H, [10, 10, 1])
+    >>> eig, weight = mp.apply.renew(zip=True).array.eigenstate(
+    ...     wrap=lambda es: (es.eig, es.norm2(sum=False).real))
+    >>> PDOS = PDOS_tetrahedron(np.linspace(-2, 2, 401), eig, weight, mp)
+
+    See Also
+    --------
+    PDOS : PDOS calculated using a distribution function
+    DOS_tetrahedron : total DOS using the linear tetrahedron method
+
+    Returns
+    -------
+    numpy.ndarray
+        projected DOS calculated at energies, has dimension ``(*weight.shape[2:], len(E))``
+    """
+    eig = np.asarray(eig)
+    weight = np.asarray(weight)
+    # the bands are interpolated in increasing order
+    order = np.argsort(eig, axis=1)
+    eig = np.take_along_axis(eig, order, axis=1)
+    weight = np.take_along_axis(
+        weight, order.reshape(*order.shape, *([1] * (weight.ndim - 2))), axis=1
+    )
+    E = np.asarray(E).ravel()
+    PDOS = empty([len(E), *weight.shape[2:]], dtype=weight.dtype)
+    for i, w in enumerate(weights_tetrahedra(E, eig, tetrahedra(bz), blochl)):
+        PDOS[i] = einsum("kb,kb...->...", w, weight)
+    return np.moveaxis(PDOS, 0, -1)
+
+
 @set_module("sisl.physics.electron")
 def COP(E, eig, state, M, distribution="gaussian", tol=1e-10):
     r"""Calculate the Crystal Orbital Population for a set of energies, `E`, with a distribution function
@@ -1091,7 +1204,9 @@ def berry_phase(
 
 
 @set_module("sisl.physics.electron")
-def wavefunction(v, grid, geometry=None, k=None, spinor=0, spin=None, eta=None):
+def wavefunction(
+    v, grid, geometry=None, k=None, spinor=0, spin=None, eta=None, basis=None
+):
     r"""Add the wave-function (`Orbital.psi`) component of each orbital to the grid
 
     This routine calculates the real-space wave-function components in the
@@ -1160,6 +1275,13 @@ def wavefunction(v, grid, geometry=None, k=None, spinor=0, spin=None, eta=None):
        influence for non-colinear wavefunctions where `spinor` choice is important.
     eta : bool, optional
        Display a console progressbar.
+    basis : BasisGrid, optional
+       orbital values on the grid, when calculating many wavefunctions on the same grid
+       the orbital values need only be calculated once (`eta` is then not used)
+
+    See Also
+    --------
+    BasisGrid.project_vector : the projection used with `basis`
     """
     # Decipher v from State type
     if isinstance(v, State):
@@ -1234,6 +1356,14 @@ def wavefunction(v, grid, geometry=None, k=None, spinor=0, spin=None, eta=None):
             "wavefunction: input coefficients are complex, while grid only contains real."
         )
 
+    if basis is not None:
+        # The orbital values are already calculated
+        if has_k:
+            basis.project_vector(v, grid, k=k)
+        else:
+            basis.project_vector(v, grid)
+        return
+
     if is_complex:
         psi_init = _a.zerosz
     else:
@@ -1365,6 +1495,9 @@ def wavefunction(v, grid, geometry=None, k=None, spinor=0, spin=None, eta=None):
     # (and the neighbors that connect into the cell)
     # Note that we cannot pass the "moved" origin because then ISC would be wrong
     IA, XYZ, ISC = geometry.within_inf(lattice, periodic=pbc)
+    # The supercell indices are relative to the atoms translated into the unit-cell,
+    # here we need the translations relative to the atomic coordinates
+    ISC = np.rint((XYZ - geometry.xyz[IA]) @ geometry.icell.T).astype(int32)
     # We need to revert the grid supercell origin as that is not subtracted in the `within_inf` returned
     # coordinates (and the below loop expects positions with respect to the origin of the plotting
     # grid).
@@ -1495,6 +1628,129 @@ def wavefunction(v, grid, geometry=None, k=None, spinor=0, spin=None, eta=None):
     np.seterr(**old_err)
 
 
+@set_module("sisl.physics.electron")
+def wavefunctions(
+    v,
+    grid,
+    geometry=None,
+    k=None,
+    spinor=0,
+    spin=None,
+    density=False,
+    out=None,
+    basis=None,
+    chunk=None,
+    eta=None,
+):
+    r"""Calculate the wave-functions (`Orbital.psi`) of many states on a grid, one grid per state
+
+    Contrary to `wavefunction` the states are not summed, and the orbitals are only
+    evaluated once on the grid (see `BasisGrid`). Each state is then a sparse product
+    with the orbital values, which is much faster than calling `wavefunction` for
+    each state.
+
+    Parameters
+    ----------
+    v : array_like
+       coefficients for the orbital expansion on the real-space grid, shape ``(N, no)``
+       (or ``(N, 2 * no)`` for non-colinear states), must be using the ``R`` gauge.
+    grid : Grid
+       the grid on which the wavefunctions are calculated, only the shape and the lattice are used
+    geometry : Geometry, optional
+       geometry where the orbitals are defined.
+       If this is ``None`` the geometry associated with `grid` will be used instead.
+    k : array_like, optional
+       k-point associated with the states, see `wavefunction`
+    spinor : int, optional
+       the spinor for non-colinear/spin-orbit states, see `wavefunction`
+    spin : Spin, optional
+       specification of the spin configuration of the orbital coefficients, see `wavefunction`
+    density : bool, optional
+       calculate the densities :math:`|\psi(\mathbf r)|^2` instead of the wavefunctions
+    out : numpy.ndarray or str or pathlib.Path, optional
+       the array the wavefunctions are *added* to, shape ``(N, *grid.shape)``.
+       If a file name, the wavefunctions are stored in a memory-mapped numpy file
+       (`numpy.lib.format.open_memmap`) which can hold more states than the memory.
+    basis : BasisGrid, optional
+       orbital values on the grid, will be calculated if not passed
+    chunk : int, optional
+       number of states projected at once, see `BasisGrid.project_vectors`
+    eta : bool, optional
+       Display a console progressbar.
+
+    Returns
+    -------
+    numpy.ndarray
+        the wavefunctions (or densities) of each state, shape ``(N, *grid.shape)``.
+        The data-type is complex for complex coefficients or :math:`\mathbf k\neq\Gamma`
+        (unless `density` is true).
+
+    Examples
+    --------
+    Store the densities of 200 states in a file:
+
+    >>> es = H.eigenstate().sub(range(200))
+    >>> rho = wavefunctions(es, grid, density=True, out="rho.npy")
+    """
+    if isinstance(v, State):
+        if geometry is None:
+            geometry = v._geometry()
+        if k is None:
+            k = v.info.get("k", k)
+        elif not np.allclose(k, v.info.get("k", k)):
+            raise ValueError(
+                f"wavefunctions: k passed and k in info does not match: {k} and {v.info.get('k')}"
+            )
+        v = v.state
+    if geometry is None:
+        geometry = grid.geometry
+    if geometry is None:
+        raise SislError(
+            "wavefunctions: did not find a usable Geometry through keywords or the Grid!"
+        )
+
+    v = np.atleast_2d(v)
+    if spin is None:
+        if v.shape[1] // 2 == geometry.no:
+            v = v.reshape(len(v), -1, 2)[:, :, spinor]
+            info(
+                "wavefunctions: assumes the input wavefunction coefficients to originate from a non-colinear calculation!"
+            )
+    elif spin.kind > Spin.POLARIZED:
+        v = v.reshape(len(v), -1, 2)[:, :, spinor]
+
+    if v.shape[1] != geometry.no:
+        raise ValueError(
+            "wavefunctions: require wavefunction coefficients corresponding to number of orbitals in the geometry."
+        )
+
+    if k is None:
+        k = _a.zerosd(3)
+    k = _a.asarrayd(k)
+    if density:
+        dtype = np.float64
+    elif np.iscomplexobj(v) or np.any(np.fabs(k) > 1e-6):
+        dtype = np.complex128
+    else:
+        dtype = np.float64
+
+    if basis is None:
+        basis = BasisGrid(geometry, grid, eta=eta)
+    else:
+        basis._check_grid(grid)
+
+    shape = (len(v),) + tuple(grid.shape)
+    if out is None:
+        out = np.zeros(shape, dtype=dtype)
+    elif isinstance(out, (str, Path)):
+        out = np.lib.format.open_memmap(out, mode="w+", dtype=dtype, shape=shape)
+
+    basis.project_vectors(v, out, k=k, density=density, chunk=chunk, eta=eta)
+    if isinstance(out, np.memmap):
+        out.flush()
+    return out
+
+
 class _electron_State:
     # pylint: disable=E1101
     __slots__ = []
@@ -1588,7 +1844,7 @@ class _electron_State:
         """
         return spin_moment(self.state, self.Sk(), project=project)
 
-    def wavefunction(self, grid, spinor=0, eta=None):
+    def wavefunction(self, grid, spinor=0, eta=None, basis=None):
         r"""Expand the coefficients as the wavefunction on `grid` *as-is*
 
         See `~sisl.physics.electron.wavefunction` for argument details, the arguments not present
@@ -1613,7 +1869,57 @@ class _electron_State:
         k = self.info.get("k", _a.zerosd(3))
 
         wavefunction(
-            self.state, grid, geometry=geometry, k=k, spinor=spinor, spin=spin, eta=eta
+            self.state,
+            grid,
+            geometry=geometry,
+            k=k,
+            spinor=spinor,
+            spin=spin,
+            eta=eta,
+            basis=basis,
+        )
+
+    def wavefunctions(
+        self, grid, spinor=0, density=False, out=None, basis=None, chunk=None, eta=None
+    ):
+        r"""Expand each of the coefficients as a wavefunction on `grid` *as-is*
+
+        See `~sisl.physics.electron.wavefunctions` for argument details, the arguments not present
+        in this method are automatically passed from this object.
+
+        Returns
+        -------
+        numpy.ndarray
+            the wavefunctions (or densities) of each state, shape ``(len(self), *grid.shape)``
+        """
+        spin = getattr(self.parent, "spin", None)
+
+        if isinstance(self.parent, Geometry):
+            geometry = self.parent
+        else:
+            geometry = getattr(self.parent, "geometry", None)
+
+        if not isinstance(grid, Grid):
+            grid = Grid(grid, geometry=geometry, dtype=self.dtype)
+
+        # Ensure we are dealing with the R gauge
+        self.change_gauge("R")
+
+        # Retrieve k
+        k = self.info.get("k", _a.zerosd(3))
+
+        return wavefunctions(
+            self.state,
+            grid,
+            geometry=geometry,
+            k=k,
+            spinor=spinor,
+            spin=spin,
+            density=density,
+            out=out,
+            basis=basis,
+            chunk=chunk,
+            eta=eta,
         )
 
 
@@ -93,6 +93,7 @@ class Hamiltonian(SparseOrbitalBZSpin):
         self.Hk = self.Pk
         self.dHk = self.dPk
         self.ddHk = self.ddPk
+        self.Hk_batch = self.Pk_batch
 
     @property
     def H(self):
@@ -144,6 +145,11 @@ class Hamiltonian(SparseOrbitalBZSpin):
            if the Hamiltonian is a spin polarized one can extract the specific spin direction
            matrix by passing an integer (0 or 1). If the Hamiltonian is not `Spin.POLARIZED`
            this keyword is ignored.
+        out : numpy.ndarray or scipy.sparse.csr_matrix, optional
+           store the Hamiltonian in this matrix (and return it), must be a dense
+           matrix of the correct shape, or a ``csr_matrix`` from a previous call.
+           The construction uses a cached assembly plan, see `k_plan`, which
+           is much faster for repeated calls at the same sparsity pattern.
 
         See Also
         --------
@@ -1,6 +1,15 @@
 # This Source Code Form is subject to the terms of the Mozilla Public
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import hashlib
+import inspect
+import os
+import pickle
+import time
+from collections import OrderedDict
+from numbers import Complex, Integral, Real
+from pathlib import Path
+
 import numpy as np
 from numpy import abs as _abs
 from numpy import (
@@ -17,20 +26,26 @@ from numpy import (
 )
 
 import sisl._array as _a
+from sisl._core.geometry import Geometry
+from sisl._core.lattice import Lattice
+from sisl._core.sparse import SparseCSR
 from sisl._core.sparse_geometry import _SparseGeometry
+from sisl._environ import get_environ_variable
 from sisl._help import array_replace
 from sisl._internal import set_module
+from sisl._pool import SharedPayload, chunk_ranges, get_pool
 from sisl.linalg import inv, linalg_info, solve
 from sisl.linalg.base import _compute_lwork
 from sisl.messages import deprecation, info, warn
 from sisl.physics.bloch import Bloch
-from sisl.physics.brillouinzone import MonkhorstPack
+from sisl.physics.brillouinzone import BrillouinZone, MonkhorstPack
 from sisl.utils.mathematics import fnorm
 
 __all__ = ["SelfEnergy"]
 __all__ += ["WideBandSE"]
 __all__ += ["SemiInfinite", "RecursiveSI"]
 __all__ += ["RealSpaceSE", "RealSpaceSI"]
+__all__ += ["CachedSE"]
 
 
 @set_module("sisl.physics")
@@ -61,8 +76,11 @@ class SelfEnergy:
         Parameters
         ----------
         SE : matrix
-            self-energy matrix
+            self-energy matrix, or stacked self-energy matrices (the last
+            two dimensions are the matrix dimensions)
         """
+        if SE.ndim > 2:
+            return 1j * (SE - conjugate(SE.swapaxes(-1, -2)))
         return 1j * (SE - conjugate(SE.T))
 
     def _setup(self, *args, **kwargs):
@@ -113,7 +131,9 @@ class SelfEnergy:
 
     def __getattr__(self, attr):
         r"""Overload attributes from the hosting object"""
-        pass
+        if attr.startswith("__"):
+            # ensures objects can be (un-)pickled
+            raise AttributeError(attr)
 
 
 @set_module("sisl.physics")
@@ -227,6 +247,9 @@ class RecursiveSI(SemiInfinite):
 
     def __getattr__(self, attr):
         """Overload attributes from the hosting object"""
+        if attr.startswith("__") or attr == "spgeom0":
+            # ensures objects can be (un-)pickled
+            raise AttributeError(attr)
         return getattr(self.spgeom0, attr)
 
     def __str__(self):
@@ -295,123 +318,115 @@ class RecursiveSI(SemiInfinite):
         r"""Dimension of the self-energy"""
         return len(self.spgeom0)
 
-    def green(self, E, k=(0, 0, 0), dtype=None, eps=1e-14, **kwargs):
+    def _batched(self, name, E, k, dtype, eps, green, bulk, pool, chunk, kwargs):
+        """Calculate the Lopez-Sancho recursion for all energies (at all k-points)"""
+        E = np.asarray(E)
+        E_scalar = E.ndim == 0
+        E = E.ravel().astype(complex128)
+        E = np.where(E.imag == 0.0, E.real + 1j * self.eta, E)
+
+        k = _a.asarrayd(k)
+        k_single = k.ndim == 1
+        k = k.reshape(-1, 3)
+
+        if dtype is None:
+            dtype = complex128
+        E = E.astype(dtype, copy=False)
+
+        args = (E, dtype, eps, green, bulk, name, chunk)
+        pool = get_pool(pool)
+        if pool is None or len(k) == 1:
+            out = np.stack(
+                [
+                    _recursive_si(self.spgeom0, self.spgeom1, k_, *args, kwargs)
+                    for k_ in k
+                ]
+            )
+        else:
+            # only the sparse matrices are sent to the workers
+            ranges = chunk_ranges(len(k), pool.nprocs, 1)
+            with SharedPayload((self.spgeom0, self.spgeom1, k), (args, kwargs)) as pl:
+                out = np.concatenate(
+                    list(
+                        pool.imap(
+                            _recursive_si_chunk, [pl] * len(ranges), *zip(*ranges)
+                        )
+                    )
+                )
+
+        if E_scalar:
+            out = out[:, 0]
+        if k_single:
+            out = out[0]
+        return out
+
+    def green(
+        self, E, k=(0, 0, 0), dtype=None, eps=1e-14, pool=None, chunk=None, **kwargs
+    ):
         r"""Return a dense matrix with the bulk Green function at energy `E` and k-point `k` (default Gamma).
 
+        Multiple energies and k-points may be calculated in one call. The k-dependent
+        matrices are then constructed once per k-point and re-used for all energies,
+        and the recursion is performed simultaneously for all energies (each energy
+        is converged individually).
+
         Parameters
         ----------
-        E : float/complex
+        E : float/complex or array_like
           energy at which the calculation will take place
         k : array_like, optional
           k-point at which the Green function should be evaluated.
           the k-point should be in units of the reciprocal lattice vectors.
+          May be a list of k-points with shape ``(nk, 3)``.
         dtype : numpy.dtype
           the resulting data type
         eps : float, optional
           convergence criteria for the recursion
+        pool : bool or int or pool, optional
+          distribute the k-points on a pool of workers, see
+          `BrillouinZone.apply` for details.
+        chunk : int, optional
+          number of energies in the recursion at once, defaults to blocks of at most
+          ``SISL_BATCH_SIZE`` MB
         **kwargs : dict, optional
            arguments passed directly to the ``self.parent.Pk`` method (not ``self.parent.Sk``), for instance ``spin``
 
         Returns
         -------
         numpy.ndarray
-            the self-energy corresponding to the semi-infinite direction
+            the bulk Green function, with shape ``(nk, nE, n, n)``, where the k-point (energy)
+            dimension is removed when a single k-point (energy) is passed
         """
-        if E.imag == 0.0:
-            E = E.real + 1j * self.eta
-
-        # Get k-point
-        k = _a.asarrayd(k)
-
-        if dtype is None:
-            dtype = complex128
-
-        sp0 = self.spgeom0
-        sp1 = self.spgeom1
-
-        # As the SparseGeometry inherently works for
-        # orthogonal and non-orthogonal basis, there is no
-        # need to have two algorithms.
-        GB = sp0.Sk(k, dtype=dtype, format="array") * E - sp0.Pk(
-            k, dtype=dtype, format="array", **kwargs
-        )
-        n = GB.shape[0]
-
-        ab = empty([n, 2, n], dtype=dtype)
-        shape = ab.shape
-
-        # Get direct arrays
-        alpha = ab[:, 0, :].view()
-        beta = ab[:, 1, :].view()
-
-        # Get solve step arary
-        ab2 = ab.view()
-        ab2.shape = (n, 2 * n)
-
-        if sp1.orthogonal:
-            alpha[:, :] = sp1.Pk(k, dtype=dtype, format="array", **kwargs)
-            beta[:, :] = conjugate(alpha.T)
-        else:
-            P = sp1.Pk(k, dtype=dtype, format="array", **kwargs)
-            S = sp1.Sk(k, dtype=dtype, format="array")
-            alpha[:, :] = P - S * E
-            beta[:, :] = conjugate(P.T) - conjugate(S.T) * E
-            del P, S
-
-        # Get faster methods since we don't want overhead of solve
-        gesv = linalg_info("gesv", dtype)
-
-        getrf = linalg_info("getrf", dtype)
-        getri = linalg_info("getri", dtype)
-        getri_lwork = linalg_info("getri_lwork", dtype)
-        lwork = int(1.01 * _compute_lwork(getri_lwork, n))
-
-        def inv(A):
-            lu, piv, info = getrf(A, overwrite_a=True)
-            if info == 0:
-                x, info = getri(lu, piv, lwork=lwork, overwrite_lu=True)
-            if info != 0:
-                raise ValueError(
-                    f"{self.__class__.__name__}.green could not compute the inverse."
-                )
-            return x
-
-        while True:
-            _, _, tab, info = gesv(GB, ab2, overwrite_a=False, overwrite_b=False)
-            tab.shape = shape
-            if info != 0:
-                raise ValueError(
-                    f"{self.__class__.__name__}.green could not solve G x = B system!"
-                )
-
-            # Update bulk Green function
-            subtract(GB, matmul(alpha, tab[:, 1, :]), out=GB)
-            subtract(GB, matmul(beta, tab[:, 0, :]), out=GB)
-
-            # Update forward/backward
-            alpha[:, :] = matmul(alpha, tab[:, 0, :])
-            beta[:, :] = matmul(beta, tab[:, 1, :])
-
-            # Convergence criteria, it could be stricter
-            if _abs(alpha).max() < eps:
-                # Return the pristine Green function
-                del ab, alpha, beta, ab2, tab
-                return inv(GB)
-
-        raise ValueError(
-            f"{self.__class__.__name__}.green could not converge Green function calculation"
+        return self._batched(
+            "green", E, k, dtype, eps, True, False, pool, chunk, kwargs
         )
 
-    def self_energy(self, E, k=(0, 0, 0), dtype=None, eps=1e-14, bulk=False, **kwargs):
+    def self_energy(
+        self,
+        E,
+        k=(0, 0, 0),
+        dtype=None,
+        eps=1e-14,
+        bulk=False,
+        pool=None,
+        chunk=None,
+        **kwargs,
+    ):
         r"""Return a dense matrix with the self-energy at energy `E` and k-point `k` (default Gamma).
 
+        Multiple energies and k-points may be calculated in one call. The k-dependent
+        matrices are then constructed once per k-point and re-used for all energies,
+        and the recursion is performed simultaneously for all energies (each energy
+        is converged individually).
+
         Parameters
         ----------
-        E : float/complex
+        E : float/complex or array_like
           energy at which the calculation will take place
         k : array_like, optional
           k-point at which the self-energy should be evaluated.
           the k-point should be in units of the reciprocal lattice vectors.
+          May be a list of k-points with shape ``(nk, 3)``.
         dtype : numpy.dtype
           the resulting data type
         eps : float, optional
@@ -419,95 +434,32 @@ class RecursiveSI(SemiInfinite):
         bulk : bool, optional
           if true, :math:`E\cdot \mathbf S - \mathbf H -\boldsymbol\Sigma` is returned, else
           :math:`\boldsymbol\Sigma` is returned (default).
+        pool : bool or int or pool, optional
+          distribute the k-points on a pool of workers, see
+          `BrillouinZone.apply` for details.
+        chunk : int, optional
+          number of energies in the recursion at once, defaults to blocks of at most
+          ``SISL_BATCH_SIZE`` MB
         **kwargs : dict, optional
            arguments passed directly to the ``self.parent.Pk`` method (not ``self.parent.Sk``), for instance ``spin``
 
+        Examples
+        --------
+        >>> SE = RecursiveSI(H, "-A")
+        >>> E = np.linspace(-1, 1, 200)
+        >>> k = MonkhorstPack(H, [1, 10, 1]).k
+        >>> SE.self_energy(E, k).shape
+        (10, 200, len(SE), len(SE))
+
         Returns
         -------
         numpy.ndarray
-            the self-energy corresponding to the semi-infinite direction
+            the self-energy corresponding to the semi-infinite direction, with shape
+            ``(nk, nE, n, n)``, where the k-point (energy) dimension is removed when a
+            single k-point (energy) is passed
         """
-        if E.imag == 0.0:
-            E = E.real + 1j * self.eta
-
-        # Get k-point
-        k = _a.asarrayd(k)
-
-        if dtype is None:
-            dtype = complex128
-
-        sp0 = self.spgeom0
-        sp1 = self.spgeom1
-
-        # As the SparseGeometry inherently works for
-        # orthogonal and non-orthogonal basis, there is no
-        # need to have two algorithms.
-        GB = sp0.Sk(k, dtype=dtype, format="array") * E - sp0.Pk(
-            k, dtype=dtype, format="array", **kwargs
-        )
-        n = GB.shape[0]
-
-        ab = empty([n, 2, n], dtype=dtype)
-        shape = ab.shape
-
-        # Get direct arrays
-        alpha = ab[:, 0, :].view()
-        beta = ab[:, 1, :].view()
-
-        # Get solve step arary
-        ab2 = ab.view()
-        ab2.shape = (n, 2 * n)
-
-        if sp1.orthogonal:
-            alpha[:, :] = sp1.Pk(k, dtype=dtype, format="array", **kwargs)
-            beta[:, :] = conjugate(alpha.T)
-        else:
-            P = sp1.Pk(k, dtype=dtype, format="array", **kwargs)
-            S = sp1.Sk(k, dtype=dtype, format="array")
-            alpha[:, :] = P - S * E
-            beta[:, :] = conjugate(P.T) - conjugate(S.T) * E
-            del P, S
-
-        # Surface Green function (self-energy)
-        if bulk:
-            GS = GB.copy()
-        else:
-            GS = zeros_like(GB)
-
-        # Get faster methods since we don't want overhead of solve
-        gesv = linalg_info("gesv", dtype)
-
-        # Specifying dot with "out" argument should be faster
-        tmp = empty_like(GS, order="C")
-        while True:
-            _, _, tab, info = gesv(GB, ab2, overwrite_a=False, overwrite_b=False)
-            tab.shape = shape
-            if info != 0:
-                raise ValueError(
-                    f"{self.__class__.__name__}.self_energy could not solve G x = B system!"
-                )
-
-            matmul(alpha, tab[:, 1, :], out=tmp)
-            # Update bulk Green function
-            subtract(GB, tmp, out=GB)
-            subtract(GB, matmul(beta, tab[:, 0, :]), out=GB)
-            # Update surface self-energy
-            subtract(GS, tmp, out=GS)
-
-            # Update forward/backward
-            alpha[:, :] = matmul(alpha, tab[:, 0, :])
-            beta[:, :] = matmul(beta, tab[:, 1, :])
-
-            # Convergence criteria, it could be stricter
-            if _abs(alpha).max() < eps:
-                # Return the pristine Green function
-                del ab, alpha, beta, ab2, tab, GB
-                if bulk:
-                    return GS
-                return -GS
-
-        raise ValueError(
-            f"{self.__class__.__name__}: could not converge self-energy calculation"
+        return self._batched(
+            "self_energy", E, k, dtype, eps, False, bulk, pool, chunk, kwargs
         )
 
     def self_energy_lr(
@@ -633,6 +585,137 @@ class RecursiveSI(SemiInfinite):
         )
 
 
+# maximum number of iterations of the Lopez-Sancho recursion, each iteration
+# doubles the number of layers taken into account
+_RECURSIVE_SI_MAXITER = 200
+
+
+def _recursive_si(sp0, sp1, k, E, dtype, eps, green, bulk, name, chunk, kwargs):
+    r"""Lopez-Sancho recursion at a single k-point for all energies `E`
+
+    The k-dependent matrices are constructed once, and the recursion is performed
+    for blocks of `chunk` energies at a time (see `_recursive_si_block`).
+    Returns the Green functions (if `green`), otherwise the self-energies.
+    """
+    # As the SparseGeometry inherently works for
+    # orthogonal and non-orthogonal basis, there is no
+    # need to have two algorithms.
+    S0 = sp0.Sk(k, dtype=dtype, format="array")
+    P0 = sp0.Pk(k, dtype=dtype, format="array", **kwargs)
+    P1 = sp1.Pk(k, dtype=dtype, format="array", **kwargs)
+    if sp1.orthogonal:
+        S1 = None
+    else:
+        S1 = sp1.Sk(k, dtype=dtype, format="array")
+    n = P0.shape[0]
+
+    if chunk is None:
+        # the recursion requires ~10 (n, n) matrices per energy
+        size = get_environ_variable("SISL_BATCH_SIZE") * 1024**2
+        chunk = int(size // (10 * n**2 * np.dtype(dtype).itemsize))
+    chunk = max(1, chunk)
+
+    out = empty([len(E), n, n], dtype=dtype)
+    for i0 in range(0, len(E), chunk):
+        out[i0 : i0 + chunk] = _recursive_si_block(
+            S0, P0, S1, P1, E[i0 : i0 + chunk], dtype, eps, green, bulk, name
+        )
+    return out
+
+
+def _recursive_si_block(S0, P0, S1, P1, E, dtype, eps, green, bulk, name):
+    r"""Lopez-Sancho recursion for the energies `E` (with the k-dependent matrices)
+
+    The matrices are stacked along the energies, and energies are removed from the
+    iterations once converged.
+    """
+    n = P0.shape[0]
+    E = E.reshape(-1, 1, 1)
+    GB = S0 * E - P0
+
+    # alpha and beta are stored consecutively, they are solved together
+    ab = empty([len(E), n, 2 * n], dtype=dtype)
+    alpha = ab[..., :n]
+    beta = ab[..., n:]
+    if S1 is None:
+        alpha[...] = P1
+        beta[...] = conjugate(P1.T)
+    else:
+        alpha[...] = P1 - S1 * E
+        beta[...] = conjugate(P1.T) - conjugate(S1.T) * E
+
+    if green:
+        GS = None
+    elif bulk:
+        GS = GB.copy()
+    else:
+        GS = zeros_like(GB)
+
+    # the indices of the energies that are not converged
+    idx = _a.arangei(len(E))
+    # we work on compact arrays of the non-converged energies
+    gb, ab_ = GB, ab
+    gs = GS
+    for _ in range(_RECURSIVE_SI_MAXITER):
+        try:
+            tab = np.linalg.solve(gb, ab_)
+        except np.linalg.LinAlgError:
+            raise ValueError(f"RecursiveSI.{name} could not solve G x = B system!")
+
+        a, b = ab_[..., :n], ab_[..., n:]
+        tmp = matmul(a, tab[..., n:])
+        # Update bulk Green function
+        gb -= tmp
+        gb -= matmul(b, tab[..., :n])
+        if gs is not None:
+            # Update surface self-energy
+            gs -= tmp
+        del tmp
+
+        # Update forward/backward
+        ab_ = np.concatenate((matmul(a, tab[..., :n]), matmul(b, tab[..., n:])), -1)
+        del tab
+
+        # Convergence criteria, it could be stricter
+        conv = _abs(ab_[..., :n]).max(axis=(1, 2)) < eps
+        if conv.any():
+            # store the converged values, and continue with the rest
+            GB[idx] = gb
+            if gs is not None:
+                GS[idx] = gs
+            keep = ~conv
+            idx = idx[keep]
+            if len(idx) == 0:
+                break
+            gb, ab_ = gb[keep], ab_[keep]
+            if gs is not None:
+                gs = gs[keep]
+    else:
+        # store the non-converged values
+        GB[idx] = gb
+        if gs is not None:
+            GS[idx] = gs
+        warn(
+            f"RecursiveSI.{name} did not converge in {_RECURSIVE_SI_MAXITER} iterations "
+            f"for {len(idx)} energies (E={E.ravel()[idx]}), the returned values for these "
+            "energies are not converged."
+        )
+
+    if green:
+        return np.linalg.inv(GB)
+    if bulk:
+        return GS
+    return -GS
+
+
+def _recursive_si_chunk(payload, start, stop):
+    """Calculate the recursion for the k-points ``[start:stop]`` (in a worker)"""
+    (sp0, sp1, k), (args, kwargs) = payload.load()
+    return np.stack(
+        [_recursive_si(sp0, sp1, k[i], *args, kwargs) for i in range(start, stop)]
+    )
+
+
 @set_module("sisl.physics")
 class RealSpaceSE(SelfEnergy):
     r"""Bulk real-space self-energy (or Green function) for a given physical object with periodicity
@@ -1888,3 +1971,342 @@ class RealSpaceSI(SelfEnergy):
     def clear(self):
         """Clears the internal arrays created in `setup`"""
         del self._calc
+
+
+def _fingerprint(h, obj):
+    """Update the hash `h` with a (deterministic) fingerprint of `obj`"""
+    if obj is None or isinstance(obj, (bool, str, bytes)):
+        h.update(repr(obj).encode())
+    elif isinstance(obj, (Integral, Real, Complex, np.generic, np.ndarray)):
+        obj = np.asarray(obj)
+        if obj.dtype.kind in "biuf":
+            obj = obj.astype(np.float64)
+        elif obj.dtype.kind == "c":
+            obj = obj.astype(np.complex128)
+        h.update(f"{obj.dtype.str}{obj.shape}".encode())
+        h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, (tuple, list)):
+        h.update(b"(")
+        for v in obj:
+            _fingerprint(h, v)
+        h.update(b")")
+    elif isinstance(obj, dict):
+        h.update(b"{")
+        for key in sorted(obj):
+            _fingerprint(h, key)
+            _fingerprint(h, obj[key])
+        h.update(b"}")
+    elif isinstance(obj, np.dtype) or (
+        isinstance(obj, type) and issubclass(obj, np.generic)
+    ):
+        h.update(str(np.dtype(obj)).encode())
+    elif isinstance(obj, type):
+        h.update(f"{obj.__module__}.{obj.__qualname__}".encode())
+    elif isinstance(obj, SparseCSR):
+        # only the used elements
+        idx = _a.array_arange(obj.ptr[:-1], n=obj.ncol)
+        _fingerprint(h, (obj.shape, obj.ncol, obj.col[idx], obj._D[idx]))
+    elif isinstance(obj, _SparseGeometry):
+        _fingerprint(
+            h,
+            (
+                obj.__class__.__name__,
+                obj.geometry,
+                obj._csr,
+                str(getattr(obj, "spin", "")),
+                getattr(obj, "orthogonal", True),
+            ),
+        )
+    elif isinstance(obj, Geometry):
+        _fingerprint(
+            h,
+            (
+                obj.lattice,
+                obj.xyz,
+                obj.atoms.specie,
+                [str(atom) for atom in obj.atoms.atom],
+            ),
+        )
+    elif isinstance(obj, Lattice):
+        _fingerprint(h, (obj.cell, obj.nsc))
+    elif isinstance(obj, BrillouinZone):
+        _fingerprint(h, (obj.__class__.__name__, obj.k, obj.weight))
+    elif isinstance(obj, SelfEnergy):
+        h.update(obj.__class__.__name__.encode())
+        # skip the internal (derived) calculation objects
+        _fingerprint(h, {k: v for k, v in vars(obj).items() if k != "_calc"})
+    else:
+        try:
+            h.update(pickle.dumps(obj, protocol=4))
+        except Exception:
+            raise TypeError(
+                f"CachedSE cannot create a fingerprint of {obj.__class__.__name__}"
+            )
+
+
+@set_module("sisl.physics")
+class CachedSE(SelfEnergy):
+    r"""On-disk cache of the self-energies (and Green functions) calculated by a `SelfEnergy` object
+
+    The results of `self_energy` and `green` are stored in a directory of ``.npy``
+    files (one per energy and k-point), keyed by a fingerprint of the self-energy
+    object (e.g. the electrode Hamiltonian, semi-infinite direction and :math:`\eta`),
+    the energy and k-point, and all other arguments of the call (data-type etc.).
+    Calls with many energies (and k-points) only calculate the points not already
+    in the cache, in a single call of the wrapped object.
+    Hence, re-running a script, or sweeps with overlapping energies, will re-use the
+    previously calculated values.
+    The number of points read from the cache, and calculated, are counted
+    in ``hits`` and ``misses``, respectively.
+
+    The least recently used entries are removed when the total size of the
+    cache exceeds `max_size`.
+    The sizes and usage order of the files are tracked in memory, the directory
+    is only scanned when the object is created (and in `clear`).
+    The cache directory may be shared by several self-energy objects.
+
+    Note that the self-energy object is fingerprinted when created, any changes
+    to the wrapped object afterwards are not detected (use `refresh`).
+
+    Parameters
+    ----------
+    se : SelfEnergy
+       the self-energy object that calculates the values
+    path : str or Path, optional
+       directory of the cache, defaults to ``$SISL_TMP/self_energy``
+    max_size : int, optional
+       maximum size (in bytes) of the files in the cache
+    mmap : bool, optional
+       whether cached values are returned as (read-only) memory-mapped arrays, only
+       for calls with a single energy and k-point
+
+    Examples
+    --------
+    >>> SE = CachedSE(RecursiveSI(H, "-A"), "se_cache")
+    >>> SE.self_energy(0.1, [0, 0.2, 0]) # calculated
+    >>> SE.self_energy(0.1, [0, 0.2, 0]) # read from the cache
+    >>> SE.self_energy([0.1, 0.2], [0, 0.2, 0]) # only 0.2 is calculated
+    >>> SE.hits, SE.misses
+    (2, 2)
+    """
+
+    def __init__(self, se, path=None, max_size: int = 2**30, mmap: bool = False):
+        self._se = se
+        if path is None:
+            path = get_environ_variable("SISL_TMP") / "self_energy"
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self.mmap = mmap
+        self.hits = 0
+        self.misses = 0
+        self._scan()
+        self.refresh()
+
+    def _scan(self):
+        """Index the files in the cache directory, least recently used first"""
+        files = []
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(".npy"):
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((st.st_mtime_ns, entry.name, st.st_size))
+        files.sort()
+        self._index = OrderedDict((name, size) for _, name, size in files)
+        self._size = sum(self._index.values())
+
+    def _indexed(self, f, size=None):
+        """Mark `f` as the most recently used file in the index"""
+        old = self._index.pop(f.name, None)
+        if size is None:
+            if old is None:
+                # a file stored by another process
+                try:
+                    old = f.stat().st_size
+                except FileNotFoundError:
+                    return
+            size = old
+        self._size += size - (old or 0)
+        self._index[f.name] = size
+
+    def refresh(self):
+        """Recalculate the fingerprint of the self-energy object (after it has been changed)"""
+        h = hashlib.sha1()
+        _fingerprint(h, self._se)
+        self._fingerprint = h.hexdigest()
+
+    def __len__(self):
+        r"""Dimension of the self-energy"""
+        return len(self._se)
+
+    def __str__(self):
+        """String representation of the cached self-energy"""
+        se = str(self._se).replace("\n", "\n ")
+        return f"{self.__class__.__name__}{{path: {self.path}, hits: {self.hits}, misses: {self.misses},\n {se}\n}}"
+
+    def __getattr__(self, attr):
+        """Overload attributes from the self-energy object"""
+        if attr.startswith("__") or attr == "_se":
+            raise AttributeError(attr)
+        return getattr(self._se, attr)
+
+    @staticmethod
+    def _arguments(method, args, kwargs):
+        """All arguments of a call to `method` (including defaults)"""
+        bound = inspect.signature(method).bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = dict(bound.arguments)
+        # the catch-all keyword arguments are merged
+        for param in inspect.signature(method).parameters.values():
+            if param.kind == param.VAR_KEYWORD:
+                arguments.update(arguments.pop(param.name, {}))
+            elif param.kind == param.VAR_POSITIONAL and not arguments[param.name]:
+                del arguments[param.name]
+        return arguments
+
+    def _file(self, name, arguments):
+        """The file of the cache entry of a call with `arguments`"""
+        arguments = dict(arguments)
+        # pools do not change the result
+        arguments.pop("pool", None)
+        h = hashlib.sha1(self._fingerprint.encode())
+        _fingerprint(h, (name, arguments))
+        return self.path / f"{h.hexdigest()}.npy"
+
+    def _load(self, f):
+        """Load the cache entry `f`, None if it does not exist"""
+        try:
+            out = np.load(f, mmap_mode="r" if self.mmap else None)
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+        # update access time (for the LRU eviction)
+        self._touch(f)
+        self._indexed(f)
+        return out
+
+    def _cached(self, name, args, kwargs):
+        method = getattr(self._se, name)
+        arguments = self._arguments(method, args, kwargs)
+
+        split = "E" in arguments and "k" in arguments
+        if split:
+            # the arguments must all be passable by keyword
+            params = inspect.signature(method).parameters
+            split = all(
+                params[name].kind != params[name].VAR_POSITIONAL
+                for name in arguments
+                if name in params
+            )
+        if not split:
+            # the entire call is the cache entry
+            f = self._file(name, arguments)
+            out = self._load(f)
+            if out is not None:
+                self.hits += 1
+                return out
+            self.misses += 1
+            out = method(*args, **kwargs)
+            self._store(f, np.asarray(out))
+            self._evict()
+            return out
+
+        # every (E, k) point is a cache entry
+        E = np.asarray(arguments["E"])
+        k = np.asarray(arguments["k"], dtype=np.float64)
+        Es = E.reshape(-1)
+        ks = k.reshape(-1, k.shape[-1])
+        files = []
+        values = {}
+        for ik, kk in enumerate(ks):
+            arguments["k"] = kk
+            for iE, e in enumerate(Es):
+                arguments["E"] = e
+                f = self._file(name, arguments)
+                files.append(f)
+                out = self._load(f)
+                if out is not None:
+                    values[ik, iE] = out
+        files = np.array(files, dtype=object).reshape(len(ks), len(Es))
+        self.hits += len(values)
+
+        missing = np.ones(files.shape, dtype=bool)
+        for idx in values:
+            missing[idx] = False
+        if missing.any():
+            # calculate the missing points in one call, so the wrapped
+            # method may batch energies and k-points
+            ik_m = missing.any(1).nonzero()[0]
+            iE_m = missing.any(0).nonzero()[0]
+            arguments["E"] = Es[iE_m] if E.ndim > 0 else E
+            arguments["k"] = ks[ik_m] if k.ndim > 1 else k
+            out = np.asarray(method(**arguments))
+            out = out.reshape(len(ik_m), len(iE_m), *out.shape[out.ndim - 2 :])
+            for i, ik in enumerate(ik_m):
+                for j, iE in enumerate(iE_m):
+                    if missing[ik, iE]:
+                        values[ik, iE] = out[i, j]
+                        self._store(files[ik, iE], out[i, j])
+            self.misses += int(missing.sum())
+            self._evict()
+
+        if E.ndim == 0 and k.ndim == 1:
+            return values[0, 0]
+        out = np.stack([values[idx] for idx in np.ndindex(files.shape)])
+        return out.reshape(k.shape[:-1] + E.shape + out.shape[1:])
+
+    @staticmethod
+    def _touch(f):
+        # file-system time-stamps may be coarse, use a high resolution clock
+        t = time.time_ns()
+        os.utime(f, ns=(t, t))
+
+    def _store(self, f, out):
+        """Store `out` in `f`"""
+        if out.nbytes > self.max_size:
+            return
+        # write atomically, concurrent processes may share the cache
+        tmp = f.with_name(f"{f.stem}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as fh:
+            np.save(fh, out)
+        os.replace(tmp, f)
+        self._touch(f)
+        self._indexed(f, f.stat().st_size)
+
+    def _evict(self):
+        """Remove the least recently used files until the cache fits in `max_size`
+
+        The files are tracked in memory (the directory is only scanned when created),
+        files stored by other processes sharing the directory are tracked once accessed.
+        """
+        while self._size > self.max_size and self._index:
+            name, size = self._index.popitem(last=False)
+            self._size -= size
+            try:
+                os.unlink(self.path / name)
+            except FileNotFoundError:
+                pass
+
+    def self_energy(self, *args, **kwargs):
+        r"""Self-energy, retrieved from the cache if available
+
+        All arguments are passed to the ``self_energy`` method of the wrapped self-energy object.
+        """
+        return self._cached("self_energy", args, kwargs)
+
+    def green(self, *args, **kwargs):
+        r"""Green function, retrieved from the cache if available
+
+        All arguments are passed to the ``green`` method of the wrapped self-energy object.
+        """
+        return self._cached("green", args, kwargs)
+
+    def clear(self):
+        """Remove all entries in the cache directory (also those of other self-energy objects)"""
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(".npy"):
+                os.unlink(entry.path)
+        self._scan()
+        self.hits = 0
+        self.misses = 0
@@ -12,7 +12,11 @@ import sisl._array as _a
 import sisl.linalg as lin
 from sisl import Geometry
 from sisl._core.sparse import issparse
-from sisl._core.sparse_geometry import SparseOrbital
+from sisl._core.sparse_geometry import (
+    SparseOrbital,
+    _construct_pairs,
+    _construct_params,
+)
 from sisl._internal import set_module
 from sisl.messages import warn
 from sisl.typing import AtomsArgument, KPoint
@@ -20,6 +24,8 @@ from sisl.typing import AtomsArgument, KPoint
 from ._matrix_ddk import matrix_ddk, matrix_ddk_nc, matrix_ddk_nc_diag, matrix_ddk_so
 from ._matrix_dk import matrix_dk, matrix_dk_nc, matrix_dk_nc_diag, matrix_dk_so
 from ._matrix_k import matrix_k, matrix_k_nc, matrix_k_nc_diag, matrix_k_so
+from ._matrix_k_batch import matrix_k_batch, spin_blocks, spin_blocks_diag
+from ._matrix_k_plan import KPlan, matrix_k_plan
 from .spin import Spin
 
 __all__ = ["SparseOrbitalBZ", "SparseOrbitalBZSpin"]
@@ -221,6 +227,7 @@ class SparseOrbitalBZ(SparseOrbital):
         gauge: str = "R",
         format: str = "csr",
         _dim=0,
+        out=None,
     ):
         r"""Sparse matrix (``scipy.sparse.csr_matrix``) at `k` for a polarized system
 
@@ -232,9 +239,49 @@ class SparseOrbitalBZ(SparseOrbital):
            default to `numpy.complex128`
         gauge : {"R", "r"}
            chosen gauge
+        out : numpy.ndarray or scipy.sparse.csr_matrix, optional
+           store the matrix in this (pre-allocated) matrix, see `k_plan`
         """
         k = _a.asarrayd(k).ravel()
-        return matrix_k(gauge, self, _dim, self.lattice, k, dtype, format)
+        if out is None:
+            return matrix_k(gauge, self, _dim, self.lattice, k, dtype, format)
+        if gauge == "r":
+            self.finalize()
+        return matrix_k_plan(
+            gauge, self, self._csr._D[:, _dim], self.lattice, k, dtype, format, out
+        )
+
+    def k_plan(self, ns: int = 1, diag: bool = False) -> KPlan:
+        r"""Assembly plan for the matrices at k-points (cached)
+
+        The plan contains the folding of the supercell elements into the
+        unit-cell matrix, i.e. everything in the construction of a matrix at a
+        k-point which only depends on the sparsity pattern.
+        It is created on the first call and re-created whenever the
+        sparsity pattern changes.
+
+        Repeated calls to `Pk` (or `Hk`, `Sk`, etc.) with the ``out`` argument
+        use this plan and store the matrix in the pre-allocated ``out`` argument.
+
+        Parameters
+        ----------
+        ns : {1, 2}
+           size of the spin-boxes, 2 for matrices with non-collinear spin (and spin-orbit)
+        diag : bool, optional
+           only the diagonal spin-box elements are used (e.g. for the overlap matrix)
+
+        Examples
+        --------
+        >>> Hk = H.Hk(format="array")
+        >>> for k in bz.k:
+        ...     H.Hk(k, format="array", out=Hk)
+        """
+        plans = self.__dict__.setdefault("_k_plans", {})
+        plan = plans.get((ns, diag))
+        if plan is None or not plan.is_valid(self._csr):
+            plan = KPlan(self._csr, ns, diag)
+            plans[(ns, diag)] = plan
+        return plan
 
     def _dPk(
         self,
@@ -328,6 +375,8 @@ class SparseOrbitalBZ(SparseOrbital):
            Prefixing with "sc:", or simply "sc" returns the matrix in supercell format
            with phases. This is useful for e.g. bond-current calculations where individual
            hopping + phases are required.
+        out : numpy.ndarray or scipy.sparse.csr_matrix, optional
+           store the overlap matrix in this matrix (and return it), see `Hamiltonian.Hk`.
 
         See Also
         --------
@@ -366,7 +415,11 @@ class SparseOrbitalBZ(SparseOrbital):
         # to not return anything
         # TODO
         if format in ("array", "matrix", "dense"):
-            S = np.zeros([nr, nc], dtype=dtype)
+            S = kwargs.get("out")
+            if S is None:
+                S = np.zeros([nr, nc], dtype=dtype)
+            else:
+                S.fill(0)
             np.fill_diagonal(S, 1.0)
             return S
         S = csr_matrix((nr, nc), dtype=dtype)
@@ -374,7 +427,12 @@ class SparseOrbitalBZ(SparseOrbital):
         return S.asformat(format)
 
     def _Sk(
-        self, k: KPoint = (0, 0, 0), dtype=None, gauge: str = "R", format: str = "csr"
+        self,
+        k: KPoint = (0, 0, 0),
+        dtype=None,
+        gauge: str = "R",
+        format: str = "csr",
+        out=None,
     ):
         r"""Overlap matrix in a ``scipy.sparse.csr_matrix`` at `k`.
 
@@ -386,8 +444,12 @@ class SparseOrbitalBZ(SparseOrbital):
            default to `numpy.complex128`
         gauge : {"R", "r"}
            chosen gauge
+        out : numpy.ndarray or scipy.sparse.csr_matrix, optional
+           store the matrix in this (pre-allocated) matrix
         """
-        return self._Pk(k, dtype=dtype, gauge=gauge, format=format, _dim=self.S_idx)
+        return self._Pk(
+            k, dtype=dtype, gauge=gauge, format=format, _dim=self.S_idx, out=out
+        )
 
     def dSk(
         self,
@@ -625,6 +687,130 @@ class SparseOrbitalBZ(SparseOrbital):
         S = self.Sk(k=k, dtype=dtype, gauge=gauge, format="array")
         return lin.eigh_destroy(P, S, eigvals_only=eigvals_only, **kwargs)
 
+    def Pk_batch(self, k, dtype=None, gauge: str = "R", _dim=0):
+        r"""Dense matrices for a batch of k-points
+
+        All matrices are calculated in one vectorized operation (no
+        Python loops over k-points).
+        This is mainly useful for small systems where the overhead of
+        creating matrices at each k-point is dominating.
+
+        Parameters
+        ----------
+        k : array_like
+           k-points, shape ``(nk, 3)``
+        dtype : numpy.dtype, optional
+           default to `numpy.complex128`
+        gauge : {"R", "r"}
+           chosen gauge
+
+        Returns
+        -------
+        numpy.ndarray
+            matrices stacked along the first dimension, shape ``(nk, no, no)``
+        """
+        k = _a.asarrayd(k).reshape(-1, 3)
+        if gauge == "r":
+            self.finalize()
+        return matrix_k_batch(
+            gauge, self, self._csr._D[:, _dim], self.lattice, k, dtype
+        )
+
+    def Sk_batch(self, k, dtype=None, gauge: str = "R"):
+        r"""Dense overlap matrices for a batch of k-points, see `Pk_batch` for details
+
+        Parameters
+        ----------
+        k : array_like
+           k-points, shape ``(nk, 3)``
+        dtype : numpy.dtype, optional
+           default to `numpy.complex128`
+        gauge : {"R", "r"}
+           chosen gauge
+        """
+        if self.orthogonal:
+            k = _a.asarrayd(k).reshape(-1, 3)
+            if dtype is None:
+                dtype = np.float64
+            S = np.zeros([len(k), len(self), len(self)], dtype=dtype)
+            S[:, np.arange(len(self)), np.arange(len(self))] = 1.0
+            return S
+        return self._Sk_batch(k, dtype=dtype, gauge=gauge)
+
+    def _Sk_batch(self, k, dtype=None, gauge: str = "R"):
+        return SparseOrbitalBZ.Pk_batch(
+            self, k, dtype=dtype, gauge=gauge, _dim=self.S_idx
+        )
+
+    def eigh_batch(
+        self,
+        k,
+        gauge: str = "R",
+        eigvals_only: bool = True,
+        chunk: Optional[int] = None,
+        **kwargs,
+    ):
+        r"""Eigenvalues (and eigenvectors) for a batch of k-points
+
+        The matrices are set up for chunks of k-points at a time (see `Pk_batch`)
+        and diagonalized using the stacked `numpy.linalg.eigh`.
+        For non-orthogonal bases the generalized eigenvalue problem
+        is reduced to a standard eigenvalue problem using the Cholesky
+        decomposition of the overlap matrices.
+
+        Parameters
+        ----------
+        k : array_like
+           k-points, shape ``(nk, 3)``
+        gauge : {"R", "r"}
+           chosen gauge
+        eigvals_only : bool, optional
+           whether only the eigenvalues are returned
+        chunk : int, optional
+           number of k-points to diagonalize at a time, defaults to
+           a chunk that restricts the stacked matrices to 2**24 elements.
+        **kwargs :
+           passed directly to `Pk_batch` (e.g. ``dtype`` or ``spin``)
+
+        Returns
+        -------
+        eig : numpy.ndarray
+            eigenvalues, shape ``(nk, no)``
+        vectors : numpy.ndarray
+            eigenvectors (as columns), shape ``(nk, no, no)``, only returned if
+            `eigvals_only` is false.
+        """
+        k = _a.asarrayd(k).reshape(-1, 3)
+        nk = len(k)
+        no = len(self)
+        if chunk is None:
+            chunk = max(1, 2**24 // no**2)
+        dtype = kwargs.pop("dtype", None)
+
+        eigs = []
+        vecs = []
+        for ik in range(0, nk, chunk):
+            kc = k[ik : ik + chunk]
+            P = self.Pk_batch(kc, dtype=dtype, gauge=gauge, **kwargs)
+            if not self.orthogonal:
+                S = self.Sk_batch(kc, dtype=P.dtype, gauge=gauge)
+                # S = L L^H -> L^-1 P L^-H
+                Linv = np.linalg.inv(np.linalg.cholesky(S))
+                LinvH = Linv.conj().swapaxes(-1, -2)
+                P = Linv @ P @ LinvH
+            if eigvals_only:
+                eigs.append(np.linalg.eigvalsh(P))
+            else:
+                eig, vec = np.linalg.eigh(P)
+                if not self.orthogonal:
+                    vec = LinvH @ vec
+                eigs.append(eig)
+                vecs.append(vec)
+
+        if eigvals_only:
+            return np.concatenate(eigs)
+        return np.concatenate(eigs), np.concatenate(vecs)
+
     def eigsh(
         self,
         k: KPoint = (0, 0, 0),
@@ -802,7 +988,7 @@ class SparseOrbitalBZSpin(SparseOrbitalBZ):
         r"""Associated spin class"""
         return self._spin
 
-    def create_construct(self, R, param):
+    def create_construct(self, R, param, vectorized: bool = False):
         r"""Create a simple function for passing to the `construct` function.
 
         This is to relieve the creation of simplistic
@@ -839,6 +1025,9 @@ class SparseOrbitalBZSpin(SparseOrbitalBZ):
            coupling constants corresponding to the `R`
            ranges. ``param[0,:]`` are the elements
            for the all atoms within ``R[0]`` of each atom.
+        vectorized : bool, optional
+           return a vectorized function which handles all atoms in a block
+           at once (see `construct`).
 
         See Also
         --------
@@ -915,17 +1104,38 @@ class SparseOrbitalBZSpin(SparseOrbitalBZ):
 
             na = self.geometry.na
 
-            # Now create the function that returns the assignment function
-            def func(self, ia, atoms, atoms_xyz=None):
-                idx = self.geometry.close(ia, R=R, atoms=atoms, atoms_xyz=atoms_xyz)
-                for ix, p, pc in zip(idx, param, paramH):
-                    ix_ge = (ix % na) >= ia
-                    self[ia, ix[ix_ge]] = p
-                    self[ia, ix[~ix_ge]] = pc
+            P = _construct_params(param)
+            PH = _construct_params(paramH)
+
+            def values(self, rows, cols, shell):
+                ix_ge = ((cols % na) >= rows).reshape(-1, 1)
+                return np.where(ix_ge, P[shell], PH[shell])
 
+            if vectorized:
+
+                def func(self, ias, atoms, atoms_xyz=None):
+                    rows, cols, shell = _construct_pairs(
+                        self.geometry, ias, atoms, atoms_xyz, R
+                    )
+                    return rows, cols, values(self, rows, cols, shell)
+
+                func.vectorized = True
+
+            else:
+                # Now create the function that returns the assignment function
+                def func(self, ia, atoms, atoms_xyz=None):
+                    idx = self.geometry.close(ia, R=R, atoms=atoms, atoms_xyz=atoms_xyz)
+                    for ix, p, pc in zip(idx, param, paramH):
+                        ix_ge = (ix % na) >= ia
+                        self[ia, ix[ix_ge]] = p
+                        self[ia, ix[~ix_ge]] = pc
+
+            func.R = R
+            func.params = param
+            func.values = values
             return func
 
-        return super().create_construct(R, param)
+        return super().create_construct(R, param, vectorized=vectorized)
 
     def __len__(self):
         r"""Returns number of rows in the basis (if non-collinear or spin-orbit, twice the number of orbitals)"""
@@ -954,7 +1164,12 @@ class SparseOrbitalBZSpin(SparseOrbitalBZ):
         return f"<{self.__module__}.{self.__class__.__name__} na={g.na}, no={g.no}, nsc={g.nsc}, dim={self.dim}, nnz={self.nnz}, spin={spin}>"
 
     def _Pk_unpolarized(
-        self, k: KPoint = (0, 0, 0), dtype=None, gauge: str = "R", format: str = "csr"
+        self,
+        k: KPoint = (0, 0, 0),
+        dtype=None,
+        gauge: str = "R",
+        format: str = "csr",
+        out=None,
     ):
         r"""Sparse matrix (``scipy.sparse.csr_matrix``) at `k`
 
@@ -966,8 +1181,10 @@ class SparseOrbitalBZSpin(SparseOrbitalBZ):
            default to `numpy.complex128`
         gauge : {"R", "r"}
            chosen gauge
+        out : numpy.ndarray or scipy.sparse.csr_matrix, optional
+           store the matrix in this (pre-allocated) matrix
         """
-        return self._Pk(k, dtype=dtype, gauge=gauge, format=format)
+        return self._Pk(k, dtype=dtype, gauge=gauge, format=format, out=out)
 
     def _Pk_polarized(
         self,
@@ -976,6 +1193,7 @@ class SparseOrbitalBZSpin(SparseOrbitalBZ):
         dtype=None,
         gauge: str = "R",
         format: str = "csr",
+        out=None,
     ):
         r"""Sparse matrix (``scipy.sparse.csr_matrix``) at `k` for a polarized system
 
@@ -989,11 +1207,18 @@ class SparseOrbitalBZSpin(SparseOrbitalBZ):
            default to `numpy.complex128`
         gauge : {"R", "r"}
            chosen gauge
+        out : numpy.ndarray or scipy.sparse.csr_matrix, optional
+           store the matrix in this (pre-allocated) matrix
         """
-        return self._Pk(k, dtype=dtype, gauge=gauge, format=format, _dim=spin)
+        return self._Pk(k, dtype=dtype, gauge=gauge, format=format, _dim=spin, out=out)
 
     def _Pk_non_colinear(
-        self, k: KPoint = (0, 0, 0), dtype=None, gauge: str = "R", format: str = "csr"
+        self,
+        k: KPoint = (0, 0, 0),
+        dtype=None,
+        gauge: str = "R",
+        format: str = "csr",
+        out=None,
     ):
         r"""Sparse matrix (``scipy.sparse.csr_matrix``) at `k` for a non-collinear system
 
@@ -1005,12 +1230,24 @@ class SparseOrbitalBZSpin(SparseOrbitalBZ):
            default to `numpy.complex128`
         gauge : {"R", "r"}
            chosen gauge
+        out : numpy.ndarray or scipy.sparse.csr_matrix, optional
+           store the matrix in this (pre-allocated) matrix
         """
         k = _a.asarrayd(k).ravel()
-        return matrix_k_nc(gauge, self, self.lattice, k, dtype, format)
+        if out is None:
+            return matrix_k_nc(gauge, self, self.lattice, k, dtype, format)
+        if gauge == "r":
+            self.finalize()
+        V = spin_blocks(self._csr._D, "nc")
+        return matrix_k_plan(gauge, self, V, self.lattice, k, dtype, format, out, True)
 
     def _Pk_spin_orbit(
-        self, k: KPoint = (0, 0, 0), dtype=None, gauge: str = "R", format: str = "csr"
+        self,
+        k: KPoint = (0, 0, 0),
+        dtype=None,
+        gauge: str = "R",
+        format: str = "csr",
+        out=None,
     ):
         r"""Sparse matrix (``scipy.sparse.csr_matrix``) at `k` for a spin-orbit system
 
@@ -1022,9 +1259,16 @@ class SparseOrbitalBZSpin(SparseOrbitalBZ):
            default to `numpy.complex128`
         gauge : {"R", "r"}
            chosen gauge
+        out : numpy.ndarray or scipy.sparse.csr_matrix, optional
+           store the matrix in this (pre-allocated) matrix
         """
         k = _a.asarrayd(k).ravel()
-        return matrix_k_so(gauge, self, self.lattice, k, dtype, format)
+        if out is None:
+            return matrix_k_so(gauge, self, self.lattice, k, dtype, format)
+        if gauge == "r":
+            self.finalize()
+        V = spin_blocks(self._csr._D, "so")
+        return matrix_k_plan(gauge, self, V, self.lattice, k, dtype, format, out, True)
 
     def _dPk_unpolarized(
         self, k: KPoint = (0, 0, 0), dtype=None, gauge: str = "R", format: str = "csr"
@@ -1134,7 +1378,12 @@ class SparseOrbitalBZSpin(SparseOrbitalBZ):
         return matrix_ddk_so(gauge, self, self.lattice, k, dtype, format)
 
     def _Sk(
-        self, k: KPoint = (0, 0, 0), dtype=None, gauge: str = "R", format: str = "csr"
+        self,
+        k: KPoint = (0, 0, 0),
+        dtype=None,
+        gauge: str = "R",
+        format: str = "csr",
+        out=None,
     ):
         r"""Overlap matrix in a ``scipy.sparse.csr_matrix`` at `k`.
 
@@ -1146,11 +1395,20 @@ class SparseOrbitalBZSpin(SparseOrbitalBZ):
            default to `numpy.complex128`
         gauge : {"R", "r"}
            chosen gauge
+        out : numpy.ndarray or scipy.sparse.csr_matrix, optional
+           store the matrix in this (pre-allocated) matrix
         """
-        return self._Pk(k, dtype=dtype, gauge=gauge, format=format, _dim=self.S_idx)
+        return self._Pk(
+            k, dtype=dtype, gauge=gauge, format=format, _dim=self.S_idx, out=out
+        )
 
     def _Sk_non_colinear(
-        self, k: KPoint = (0, 0, 0), dtype=None, gauge: str = "R", format: str = "csr"
+        self,
+        k: KPoint = (0, 0, 0),
+        dtype=None,
+        gauge: str = "R",
+        format: str = "csr",
+        out=None,
     ):
         r"""Overlap matrix (``scipy.sparse.csr_matrix``) at `k` for a non-collinear system
 
@@ -1162,9 +1420,20 @@ class SparseOrbitalBZSpin(SparseOrbitalBZ):
            default to `numpy.complex128`
         gauge : {"R", "r"}
            chosen gauge
+        out : numpy.ndarray or scipy.sparse.csr_matrix, optional
+           store the matrix in this (pre-allocated) matrix
         """
         k = _a.asarrayd(k).ravel()
-        return matrix_k_nc_diag(gauge, self, self.S_idx, self.lattice, k, dtype, format)
+        if out is None:
+            return matrix_k_nc_diag(
+                gauge, self, self.S_idx, self.lattice, k, dtype, format
+            )
+        if gauge == "r":
+            self.finalize()
+        V = spin_blocks_diag(self._csr._D[:, self.S_idx])
+        return matrix_k_plan(
+            gauge, self, V, self.lattice, k, dtype, format, out, True, True
+        )
 
     def _dSk_non_colinear(
         self, k: KPoint = (0, 0, 0), dtype=None, gauge: str = "R", format: str = "csr"
@@ -1257,6 +1526,52 @@ class SparseOrbitalBZSpin(SparseOrbitalBZ):
         S = self.Sk(k=k, dtype=dtype, gauge=gauge, format="array")
         return lin.eigh_destroy(P, S, eigvals_only=eigvals_only, **kwargs)
 
+    def Pk_batch(self, k, spin=0, dtype=None, gauge: str = "R"):
+        r"""Dense matrices for a batch of k-points
+
+        All matrices are calculated in one vectorized operation (no
+        Python loops over k-points).
+        This is mainly useful for small systems where the overhead of
+        creating matrices at each k-point is dominating.
+
+        Parameters
+        ----------
+        k : array_like
+           k-points, shape ``(nk, 3)``
+        spin : int, optional
+           the spin-index of the quantity, only used for `Spin.POLARIZED` matrices
+        dtype : numpy.dtype, optional
+           default to `numpy.complex128`
+        gauge : {"R", "r"}
+           chosen gauge
+
+        Returns
+        -------
+        numpy.ndarray
+            matrices stacked along the first dimension, shape ``(nk, len(self), len(self))``
+        """
+        if self.spin.is_unpolarized:
+            return super().Pk_batch(k, dtype=dtype, gauge=gauge)
+        elif self.spin.is_polarized:
+            return super().Pk_batch(k, dtype=dtype, gauge=gauge, _dim=spin)
+
+        k = _a.asarrayd(k).reshape(-1, 3)
+        if gauge == "r":
+            self.finalize()
+        kind = "nc" if self.spin.is_noncolinear else "so"
+        V = spin_blocks(self._csr._D, kind)
+        return matrix_k_batch(gauge, self, V, self.lattice, k, dtype, True)
+
+    def _Sk_batch(self, k, dtype=None, gauge: str = "R"):
+        if self.spin.is_unpolarized or self.spin.is_polarized:
+            return super()._Sk_batch(k, dtype=dtype, gauge=gauge)
+
+        k = _a.asarrayd(k).reshape(-1, 3)
+        if gauge == "r":
+            self.finalize()
+        V = spin_blocks_diag(self._csr._D[:, self.S_idx])
+        return matrix_k_batch(gauge, self, V, self.lattice, k, dtype, True)
+
     def eigsh(
         self,
         k: KPoint = (0, 0, 0),
@@ -0,0 +1,184 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import numpy as np
+import pytest
+
+from sisl import (
+    Atom,
+    AtomicOrbital,
+    BasisGrid,
+    DensityMatrix,
+    Geometry,
+    Grid,
+    Lattice,
+    SphericalOrbital,
+)
+from sisl._environ import sisl_environ
+from sisl.physics.electron import wavefunction, wavefunctions
+
+pytestmark = [pytest.mark.physics]
+
+
+@pytest.fixture
+def setup():
+    class t:
+        def __init__(self):
+            r = np.linspace(0, 2.2, 100)
+            f = np.exp(-(r**2))
+            orbs = [
+                AtomicOrbital(
+                    n=2, l=l, m=m, spherical=SphericalOrbital(l, (r, f * (1 + r)))
+                )
+                for l in range(3)
+                for m in range(-l, l + 1)
+            ]
+            self.bond = bond = 1.42
+            sq3h = 3.0**0.5 * 0.5
+            self.lattice = Lattice(
+                np.array([[1.5, sq3h, 0.0], [1.5, -sq3h, 0.0], [0.0, 0.0, 4.0]]) * bond,
+                nsc=[3, 3, 1],
+            )
+            # atoms outside the unit-cell, and grid-points not on top of atoms
+            self.g = Geometry(
+                np.array([[0.0, 0.0, 0.0], [1.0, 0.0, 0.0]]) * bond
+                - [0.031, 0.012, 0.017],
+                atoms=Atom(6, orbs),
+                lattice=self.lattice,
+            )
+
+        def DM(self, spin="unpolarized"):
+            g = self.g
+            D = DensityMatrix(g, spin=spin)
+            rng = np.random.default_rng(42)
+            for ia in g:
+                for ja in g.close(ia, R=self.bond + 0.01):
+                    for io in g.a2o(ia, True):
+                        for jo in g.a2o(ja, True):
+                            D[io, jo] = rng.random(len(D.spin))
+            return (D + D.transpose()) / 2
+
+    return t()
+
+
+@pytest.mark.filterwarnings("ignore", message="*is NOT Hermitian for on-site")
+@pytest.mark.parametrize("spin", ["unpolarized", "polarized", "so"])
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_basis_grid_density(setup, spin, dtype):
+    D = setup.DM(spin)
+    for lattice in [setup.lattice, setup.lattice.cell / 2, setup.lattice.tile(2, 0)]:
+        grid = Grid(0.2, lattice=lattice)
+        D.density(grid)
+        basis = BasisGrid(setup.g, grid, dtype=dtype)
+        assert basis.phi.dtype == dtype
+        assert basis.nnz > 0
+        grid_basis = Grid(0.2, lattice=lattice)
+        D.density(grid_basis, basis=basis)
+        rtol = 1e-5 if dtype == np.float32 else 1e-10
+        assert np.allclose(grid.grid, grid_basis.grid, rtol=rtol, atol=rtol)
+        # re-using the basis
+        D.density(grid_basis, basis=basis)
+        assert np.allclose(grid.grid * 2, grid_basis.grid, rtol=rtol, atol=rtol)
+
+
+def test_basis_grid_project_matrix(setup):
+    D = setup.DM()
+    grid = Grid(0.2, lattice=setup.lattice)
+    basis = BasisGrid(setup.g, grid)
+    basis.project_matrix(D, grid)
+    # complex matrices
+    grid_z = Grid(0.2, lattice=setup.lattice, dtype=np.complex128)
+    basis.project_matrix(D.tocsr(0) * 1j, grid_z)
+    assert np.allclose(grid.grid * 1j, grid_z.grid)
+
+    # complex matrices on a real grid adds the real part
+    grid_r = Grid(0.2, lattice=setup.lattice)
+    basis.project_matrix(D.tocsr(0) * (1 + 1j), grid_r)
+    assert np.allclose(grid.grid, grid_r.grid)
+
+    with pytest.raises(ValueError):
+        basis.project_matrix(D.tocsr(0)[:, : setup.g.no], grid)
+    # matrix of another geometry with the same number of orbitals
+    atom = setup.g.atoms[0]
+    assert atom.no == 9
+    other = Geometry(
+        np.random.rand(3, 3),
+        atoms=Atom(6, atom.orbitals[:6]),
+        lattice=setup.lattice,
+    )
+    D = DensityMatrix(other)
+    assert D.shape[:2] == (setup.g.no, setup.g.no_s)
+    with pytest.raises(ValueError):
+        basis.project_matrix(D, grid)
+    with pytest.raises(ValueError):
+        D.density(grid, basis=basis)
+
+
+@pytest.mark.parametrize("k", [(0, 0, 0), (0.1, 0.2, 0)])
+def test_basis_grid_wavefunction(setup, k):
+    g = setup.g
+    rng = np.random.default_rng(2)
+    v = rng.random(g.no) + 1j * rng.random(g.no)
+    for lattice in [setup.lattice, setup.lattice.tile(2, 0)]:
+        grid = Grid(0.2, lattice=lattice, dtype=np.complex128)
+        wavefunction(v, grid, geometry=g, k=k)
+        assert np.absolute(grid.grid).max() > 0.1
+        basis = BasisGrid(g, grid)
+        grid_basis = Grid(0.2, lattice=lattice, dtype=np.complex128)
+        wavefunction(v, grid_basis, geometry=g, k=k, basis=basis)
+        assert np.allclose(grid.grid, grid_basis.grid)
+
+
+def test_basis_grid_wrong_grid(setup):
+    grid = Grid(0.2, lattice=setup.lattice)
+    basis = BasisGrid(setup.g, grid)
+    with pytest.raises(ValueError):
+        basis.project_vector(np.ones(setup.g.no), Grid(0.1, lattice=setup.lattice))
+    with pytest.raises(ValueError):
+        basis.project_vector(np.ones(setup.g.no - 1), grid)
+    with pytest.raises(ValueError):
+        setup.DM().density(Grid(0.2, lattice=setup.lattice.tile(2, 0)), basis=basis)
+
+
+@pytest.mark.parametrize("k", [(0, 0, 0), (0.1, 0.2, 0)])
+@pytest.mark.parametrize("chunk", [None, 2])
+def test_wavefunctions(setup, k, chunk):
+    g = setup.g
+    rng = np.random.default_rng(3)
+    v = rng.random([5, g.no]) + 1j * rng.random([5, g.no])
+    lattice = setup.lattice.tile(2, 0)
+    grid = Grid(0.2, lattice=lattice, dtype=np.complex128)
+    psi = wavefunctions(v, grid, geometry=g, k=k, chunk=chunk)
+    rho = wavefunctions(v, grid, geometry=g, k=k, chunk=chunk, density=True)
+    assert psi.shape == (5,) + grid.shape
+    assert psi.dtype == np.complex128
+    assert rho.dtype == np.float64
+    for i in range(5):
+        grid.fill(0)
+        wavefunction(v[i], grid, geometry=g, k=k)
+        assert np.allclose(psi[i], grid.grid)
+        assert np.allclose(rho[i], np.absolute(grid.grid) ** 2)
+    # blocks of a single state from the memory budget
+    with sisl_environ(SISL_BATCH_SIZE=1e-6):
+        assert np.allclose(wavefunctions(v, grid, geometry=g, k=k), psi)
+
+
+def test_wavefunctions_memmap(setup, tmp_path):
+    g = setup.g
+    rng = np.random.default_rng(3)
+    v = rng.random([3, g.no])
+    grid = Grid(0.2, lattice=setup.lattice)
+    basis = BasisGrid(g, grid, dtype=np.float32)
+    f = tmp_path / "psi.npy"
+    psi = wavefunctions(v, grid, geometry=g, basis=basis, out=f)
+    assert isinstance(psi, np.memmap)
+    assert psi.dtype == np.float64
+    assert np.allclose(np.load(f), wavefunctions(v, grid, geometry=g), atol=1e-5)
+
+    # adding to an existing array
+    out = np.ones((3,) + grid.shape)
+    wavefunctions(v, grid, geometry=g, basis=basis, out=out, density=True)
+    assert np.allclose(out, 1 + np.load(f) ** 2, atol=1e-5)
+
+    with pytest.raises(ValueError):
+        wavefunctions(v, grid, geometry=g, basis=basis, out=out[:2])
@@ -425,6 +425,67 @@ class TestMonkhorstPack:
         assert np.allclose((asarray / len(bz)).sum(0), asaverage)
         apply.none.eigh()
 
+    def test_as_reduce(self, tmp_path):
+        from sisl import Hamiltonian, geom
+
+        g = geom.graphene()
+        H = Hamiltonian(g)
+        H.construct([[0.1, 1.44], [0, -2.7]])
+
+        bz = MonkhorstPack(H, [4, 4, 1])
+        w = bz.weight.reshape(-1, 1)
+        apply = bz.apply
+        eig = apply.array.eigh()
+
+        mean = (eig * w).sum(0) / w.sum()
+        assert np.allclose(apply.mean.eigh(), mean)
+        assert np.allclose(apply.min.eigh(), eig.min(0))
+        assert np.allclose(apply.max.eigh(), eig.max(0))
+        assert np.allclose(apply.var.eigh(), ((eig - mean) ** 2 * w).sum(0) / w.sum())
+
+        # complex values (real at the Gamma-point)
+        def wrap_z(es):
+            return es.state[:, 0]
+
+        psi = np.array(apply.list.eigenstate(wrap=wrap_z))
+        assert np.iscomplexobj(psi)
+        mean_z = (psi * w).sum(0) / w.sum()
+        var_z = apply.var.eigenstate(wrap=wrap_z)
+        assert var_z.dtype == np.float64
+        assert np.allclose(var_z, (np.absolute(psi - mean_z) ** 2 * w).sum(0) / w.sum())
+
+        E = np.linspace(-10, 10, 21)
+        hist = sum(np.histogram(e, E)[0] * wi for e, wi in zip(eig, w.ravel()))
+        assert np.allclose(apply.histogram.eigh(bins=E), hist)
+        with pytest.raises(ValueError):
+            apply.histogram.eigh()
+
+        def wrap(es):
+            return es.eig, es.norm2(sum=False).real
+
+        PDOS = apply.histogram.eigenstate(wrap=wrap, bins=E)
+        assert PDOS.shape == (len(E) - 1, len(H))
+        assert np.allclose(PDOS.sum(1), hist)
+
+        # spill all values
+        var, spill = apply.var.eigh(spill=tmp_path / "eig.npy")
+        assert np.allclose(spill, eig)
+        assert np.allclose(np.load(tmp_path / "eig.npy"), eig)
+
+        # tuples are spilled element-wise
+        (eig_m, _), (eig_s, norm_s) = apply.mean.eigenstate(
+            wrap=lambda es: (es.eig, es.norm2().real), spill=tmp_path / "es.npy"
+        )
+        assert np.allclose(eig_m, mean)
+        assert np.allclose(eig_s, eig)
+        assert np.allclose(norm_s, 1)
+        assert np.allclose(np.load(tmp_path / "es_0.npy"), eig)
+        assert np.allclose(np.load(tmp_path / "es_1.npy"), 1)
+        with pytest.raises(ValueError):
+            apply.mean.eigh(
+                wrap=lambda eig: [eig, eig[:1]], spill=tmp_path / "ragged.npy"
+            )
+
     def test_as_dataarray_zip(self):
         pytest.importorskip("xarray", reason="xarray not available")
 
@@ -522,6 +583,52 @@ class TestMonkhorstPack:
             for v1, v2 in zip(papply[method](), apply[method]()):
                 assert np.allclose(v1, v2)
 
+    @pytest.mark.parametrize("backend", ["multiprocessing", "pathos"])
+    def test_pool_persistent(self, backend, tmp_path):
+        if backend == "pathos":
+            pytest.importorskip("pathos", reason="pathos not available")
+        from sisl import Hamiltonian, geom
+        from sisl._environ import sisl_environ
+        from sisl._pool import _POOLS
+
+        g = geom.graphene()
+        H = Hamiltonian(g)
+        H.construct([[0.1, 1.44], [0, -2.7]])
+
+        bz = MonkhorstPack(H, [3, 3, 1], trs=False)
+        E = np.linspace(-2, 2, 11)
+
+        def wrap(es):
+            return es.eig, es.DOS(E)
+
+        with sisl_environ(SISL_POOL_BACKEND=backend):
+            papply = bz.apply.renew(pool=2)
+            for method in ["iter", "average", "sum", "array", "list", "oplist"]:
+                for v1, v2 in zip(papply[method].eigh(), bz.apply[method].eigh()):
+                    assert np.allclose(v1, v2)
+            for method in ["mean", "min", "max", "var"]:
+                assert np.allclose(papply[method].eigh(), bz.apply[method].eigh())
+            assert np.allclose(
+                papply.histogram.eigh(bins=E), bz.apply.histogram.eigh(bins=E)
+            )
+            # workers writes directly to the spill file
+            _, spill = papply.max.eigh(spill=tmp_path / "eig.npy")
+            assert np.allclose(spill, bz.apply.array.eigh())
+            _, (spill, _) = papply.mean.eigh(
+                wrap=lambda eig: (eig, eig.min()), spill=tmp_path / "eig.npy"
+            )
+            assert np.allclose(spill, bz.apply.array.eigh())
+            assert np.allclose(np.load(tmp_path / "eig_1.npy"), spill.min(1))
+
+            # the pool is retained across calls
+            assert (backend, 2) in _POOLS
+            pool = _POOLS[backend, 2]
+            eig, DOS = papply.renew(zip=True).array.eigenstate(wrap=wrap)
+            assert _POOLS[backend, 2] is pool
+            eig_s, DOS_s = bz.apply.renew(zip=True).array.eigenstate(wrap=wrap)
+            assert np.allclose(eig, eig_s)
+            assert np.allclose(DOS, DOS_s)
+
     def test_as_single(self):
         from sisl import Hamiltonian, geom
 
@@ -679,6 +786,96 @@ class TestMonkhorstPack:
         assert np.allclose(asyield2, asaverage)
         assert np.allclose(assum, asaverage)
 
+    def test_symmetry_lattice(self):
+        from sisl.physics._symmetry import lattice_point_group
+
+        assert len(lattice_point_group(Lattice(2.0).cell)) == 48
+        assert len(lattice_point_group(geom.graphene().cell)) == 24
+
+    @pytest.mark.parametrize("n", [[5, 5, 1], [6, 6, 1], [4, 4, 3]])
+    @pytest.mark.parametrize("trs", [True, False])
+    def test_symmetry_unfold(self, n, trs):
+        from sisl import Hamiltonian
+
+        g = geom.graphene(atoms=[Atom(5, R=1.44), Atom(7, R=1.44)])
+        H = Hamiltonian(g)
+        H.construct([[0.1, 1.44], [0, -2.7]])
+        H[0, 0] = 1.0
+        H[1, 1] = -1.0
+
+        full = MonkhorstPack(H, n, trs=False)
+        mp = MonkhorstPack(H, n, trs=trs, symmetry=True)
+        assert len(mp) < len(MonkhorstPack(H, n, trs=trs))
+        assert mp.weight.sum() == pytest.approx(1)
+        assert np.allclose(mp.apply.average.eigh(), full.apply.average.eigh())
+        eig = mp.unfold(mp.apply.array.eigh())
+        assert np.allclose(eig, full.apply.array.eigh())
+
+    def test_symmetry_geometry(self):
+        from sisl import Hamiltonian
+
+        # displacing an atom breaks symmetries
+        g = geom.sc(2.0, Atom(1, R=2.01)).tile(2, 0)
+        g = g.move([0.1, 0.1, 0], atoms=0)
+        mp = MonkhorstPack(g.lattice, [3, 6, 6], symmetry=True)
+        mpd = MonkhorstPack(g, [3, 6, 6], symmetry=True)
+        assert len(mp) < len(mpd)
+
+        H = Hamiltonian(g)
+        H.construct([[0.1, 2.01], [0, -1]])
+        mp = MonkhorstPack(H, [3, 6, 6], symmetry=True)
+        full = MonkhorstPack(H, [3, 6, 6], trs=False)
+        assert np.allclose(mp.unfold(mp.apply.array.eigh()), full.apply.array.eigh())
+
+    def test_symmetry_explicit(self, setup):
+        # only the identity
+        mp = MonkhorstPack(setup.s1, [4, 4, 1], trs=False, symmetry=[np.eye(3)])
+        full = MonkhorstPack(setup.s1, [4, 4, 1], trs=False)
+        assert np.allclose(mp.k, full.k)
+        assert np.allclose(mp.unfold(np.arange(len(mp))), np.arange(len(full)))
+
+    def test_symmetry_fail(self, setup):
+        with pytest.raises(ValueError):
+            MonkhorstPack(setup.s1, [4, 4, 1], size=0.5, symmetry=True)
+        mp = MonkhorstPack(setup.s1, [4, 4, 1])
+        with pytest.raises(SislError):
+            mp.unfold(mp.k)
+
+        # replacements removes the unfolding
+        mp = MonkhorstPack(setup.s1, [3, 3, 1], symmetry=True)
+        mp.unfold(mp.k)
+        mp.replace(
+            [0, 0, 0], MonkhorstPack(setup.s1, [3, 3, 1], size=[1 / 3, 1 / 3, 1])
+        )
+        with pytest.raises(SislError):
+            mp.unfold(mp.k)
+
+    def test_adaptive(self):
+        from sisl import Hamiltonian
+
+        g = geom.graphene()
+        H = Hamiltonian(g)
+        H.construct([(0.1, 1.44), (0, -2.7)])
+        E = np.linspace(-1, 1, 11)
+
+        def wrap(es):
+            return es.DOS(E, distribution="gaussian")
+
+        ref = MonkhorstPack(H, [81, 81, 1]).apply.average.eigenstate(wrap=wrap)
+        mp = MonkhorstPack(H, [9, 9, 1])
+        coarse = mp.apply.average.eigenstate(wrap=wrap)
+        DOS, mpr = mp.apply.adaptive.eigenstate(wrap=wrap, tol=1e-3, max_depth=2)
+        # the original object is not changed
+        assert len(mp) == 41
+        assert len(mp) < len(mpr) < 81**2
+        assert mpr.weight.sum() == pytest.approx(1.0)
+        assert np.abs(DOS - ref).max() < np.abs(coarse - ref).max()
+        assert np.allclose(DOS, mpr.apply.average.eigenstate(wrap=wrap))
+
+        mp = MonkhorstPack(H, [9, 9, 1], symmetry=True)
+        with pytest.raises(SislError):
+            mp.apply.adaptive.eigenstate(wrap=wrap)
+
     def test_replace_gamma(self):
         g = geom.graphene()
         bz = MonkhorstPack(g, 2, trs=False)
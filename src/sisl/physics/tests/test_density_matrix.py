@@ -601,3 +601,50 @@ class TestDensityMatrix:
         assert np.abs(D.tocsr(0) - Dt.tocsr(0)).sum() == 0
         assert np.abs(D.tocsr(1) - Dt.tocsr(1)).sum() == 0
         assert np.abs(Dt.tocsr(-1)).sum() == 0
+
+
+@pytest.mark.filterwarnings("ignore", message="*is NOT Hermitian for on-site")
+@pytest.mark.parametrize("spin", ["unpolarized", "polarized", "non-colinear", "so"])
+def test_rho_compiled_vs_python(spin, monkeypatch):
+    import sisl.physics.densitymatrix as dm
+
+    r = np.linspace(0, 2.2, 100)
+    f = np.exp(-(r**2))
+    orbs = [
+        AtomicOrbital(n=2, l=l, m=m, spherical=SphericalOrbital(l, (r, f * (1 + r))))
+        for l in range(3)
+        for m in range(-l, l + 1)
+    ]
+    bond = 1.42
+    sq3h = 3.0**0.5 * 0.5
+    lattice = Lattice(
+        np.array([[1.5, sq3h, 0.0], [1.5, -sq3h, 0.0], [0.0, 0.0, 4.0]]) * bond,
+        nsc=[3, 3, 1],
+    )
+    # atoms outside the unit-cell, and grid-points not on top of atoms
+    g = Geometry(
+        np.array([[0.0, 0.0, 0.0], [1.0, 0.0, 0.0]]) * bond - [0.031, 0.012, 0.017],
+        atoms=Atom(6, orbs),
+        lattice=lattice,
+    )
+    D = DensityMatrix(g, spin=spin)
+    rng = np.random.default_rng(42)
+    for ia in g:
+        for ja in g.close(ia, R=bond + 0.01):
+            for io in g.a2o(ia, True):
+                for jo in g.a2o(ja, True):
+                    D[io, jo] = rng.random(len(D.spin))
+    D = (D + D.transpose()) / 2
+
+    def density(D, lattice):
+        grid = Grid(0.25, lattice=lattice)
+        D.density(grid)
+        return grid.grid
+
+    for lat in [lattice, lattice.cell / 2]:
+        rho = density(D, lat)
+        with monkeypatch.context() as m:
+            m.setattr(dm, "orbital_tables", lambda geometry: None)
+            rho_py = density(D, lat)
+        assert np.fabs(rho).max() > 0.1
+        assert np.allclose(rho, rho_py)
@@ -24,7 +24,13 @@ from sisl import (
     get_distribution,
     oplist,
 )
-from sisl.physics.electron import berry_phase, conductivity, spin_contamination
+from sisl.physics.electron import (
+    DOS_tetrahedron,
+    PDOS_tetrahedron,
+    berry_phase,
+    conductivity,
+    spin_contamination,
+)
 
 pytestmark = [
     pytest.mark.physics,
@@ -289,6 +295,159 @@ class TestHamiltonian:
                     csr -= sc_csr1[:, isc * no : (isc + 1) * no]
                 assert allclose(csr.toarray(), 0.0)
 
+    @pytest.mark.parametrize("orthogonal", [True, False])
+    @pytest.mark.parametrize("gauge", ["R", "r"])
+    @pytest.mark.parametrize(
+        "spin", ["unpolarized", "polarized", "non-collinear", "spin-orbit"]
+    )
+    def test_Hk_batch(self, orthogonal, gauge, spin):
+        g = Geometry(
+            [[i, 0, 0] for i in range(4)],
+            Atom(6, R=1.01),
+            lattice=Lattice([4, 1, 5.0], nsc=[3, 3, 1]),
+        )
+        H = Hamiltonian(g, dtype=np.float64, orthogonal=orthogonal, spin=Spin(spin))
+        nd = H._csr._D.shape[-1]
+        for ia in g:
+            idx = g.close(ia, R=(0.1, 1.01))[1]
+            H[ia, ia] = 1.0
+            H[ia, idx] = np.random.rand(nd) * 0.1
+        H = (H + H.transpose(hermitian=True)) / 2
+
+        k = np.random.rand(5, 3)
+        Hb = H.Hk_batch(k, gauge=gauge)
+        Sb = H.Sk_batch(k, gauge=gauge)
+        assert Hb.shape == (5, len(H), len(H))
+        for i in range(len(k)):
+            assert np.allclose(Hb[i], H.Hk(k[i], gauge=gauge, format="array"))
+            assert np.allclose(Sb[i], H.Sk(k[i], gauge=gauge, format="array"))
+
+        eig = H.eigh_batch(k, gauge=gauge, chunk=2)
+        eig_k = np.array([H.eigh(kk, gauge=gauge) for kk in k])
+        assert np.allclose(eig, eig_k)
+
+        eig, vec = H.eigh_batch(k, gauge=gauge, eigvals_only=False)
+        # H v = S v e
+        assert np.allclose(Hb @ vec, Sb @ vec * eig[:, None, :])
+
+    @pytest.mark.parametrize("orthogonal", [True, False])
+    @pytest.mark.parametrize(
+        "spin", ["unpolarized", "polarized", "non-collinear", "spin-orbit"]
+    )
+    def test_construct_vectorized(self, setup, orthogonal, spin):
+        g = setup.g.tile(3, 0).tile(2, 1)
+        H1 = Hamiltonian(g, orthogonal=orthogonal, spin=Spin(spin))
+        H2 = H1.copy()
+        nd = H1._csr._D.shape[-1]
+        param = np.random.rand(2, nd)
+        R = (0.1, 1.5)
+        H1.construct(H1.create_construct(R, param.copy()))
+        H2.construct(H2.create_construct(R, param.copy(), vectorized=True))
+        assert H1.spsame(H2)
+        assert np.allclose((H1 - H2)._csr._D, 0)
+
+    @pytest.mark.parametrize("orthogonal", [True, False])
+    @pytest.mark.parametrize("spin", ["unpolarized", "non-collinear"])
+    @pytest.mark.parametrize(
+        "move", ["none", "outside", "straddle", "jitter", "outside-z"]
+    )
+    def test_construct_neighbors(self, setup, orthogonal, spin, move):
+        g = setup.g.tile(6, 0).tile(5, 1)
+        if move == "outside":
+            # all atoms outside the unit cell
+            g = g.move([-3.0, 7.0, 0.0])
+        elif move == "straddle":
+            # atoms on both sides of the cell boundaries
+            g = g.move(-g.cell[0] * 0.5 - g.cell[1] * 0.3)
+        elif move == "jitter":
+            rng = np.random.default_rng(1)
+            g = g.move(rng.uniform(-0.05, 0.05, g.xyz.shape))
+        elif move == "outside-z":
+            # no supercells along z (uses the fall-back)
+            g = g.move([0.0, 0.0, -1.0])
+        H1 = Hamiltonian(g, orthogonal=orthogonal, spin=Spin(spin))
+        H2 = H1.copy()
+        nd = H1._csr._D.shape[-1]
+        param = np.random.rand(3, nd)
+        R = (0.1, 1.5, 2.5)
+        H1.construct(H1.create_construct(R, param.copy()), method="rand")
+        H2.construct(H2.create_construct(R, param.copy()), method="neighbors")
+        assert H1.nnz > 0
+        assert H1.spsame(H2)
+        assert np.allclose((H1 - H2)._csr._D, 0)
+
+    def test_construct_neighbors_fail(self, setup):
+        def func(self, ia, atoms, atoms_xyz=None):
+            pass
+
+        with pytest.raises(ValueError):
+            setup.H.copy().construct(func, method="neighbors")
+
+    @pytest.mark.parametrize("format", ["csr", "array"])
+    @pytest.mark.parametrize(
+        "spin", ["unpolarized", "polarized", "non-collinear", "spin-orbit"]
+    )
+    def test_Hk_threads(self, setup, format, spin):
+        from sisl._environ import sisl_environ
+
+        g = setup.g.tile(5, 0).tile(4, 1)
+        H = Hamiltonian(g, spin=Spin(spin), orthogonal=False)
+        nd = H._csr._D.shape[-1]
+        H.construct([(0.1, 1.5), (np.random.rand(nd), np.random.rand(nd))])
+        k = [0.1, 0.2, 0.3]
+
+        def dense(M):
+            return M.toarray() if issparse(M) else M
+
+        for gauge in ["R", "r"]:
+            Hk = dense(H.Hk(k, gauge=gauge, format=format))
+            Sk = dense(H.Sk(k, gauge=gauge, format=format))
+            with sisl_environ(SISL_NUM_THREADS=3):
+                assert np.allclose(Hk, dense(H.Hk(k, gauge=gauge, format=format)))
+                assert np.allclose(Sk, dense(H.Sk(k, gauge=gauge, format=format)))
+
+    @pytest.mark.parametrize("format", ["csr", "array"])
+    @pytest.mark.parametrize(
+        "spin", ["unpolarized", "polarized", "non-collinear", "spin-orbit"]
+    )
+    def test_Hk_out(self, setup, format, spin):
+        g = setup.g.tile(3, 0)
+        H = Hamiltonian(g, spin=Spin(spin), orthogonal=False)
+        nd = H._csr._D.shape[-1]
+        H.construct([(0.1, 1.5), (np.random.rand(nd), np.random.rand(nd))])
+
+        def dense(M):
+            return M.toarray() if issparse(M) else M
+
+        for gauge in ["R", "r"]:
+            out = H.Hk([0.2, 0, 0], gauge=gauge, format=format)
+            Sout = H.Sk([0.2, 0, 0], gauge=gauge, format=format)
+            for k in [[0, 0, 0], [0.1, 0.2, 0.3]]:
+                Hk = H.Hk(k, gauge=gauge, format=format, out=out)
+                assert Hk is out
+                assert np.allclose(
+                    dense(H.Hk(k, gauge=gauge, format=format)), dense(Hk)
+                )
+                Sk = H.Sk(k, gauge=gauge, format=format, out=Sout)
+                assert Sk is Sout
+                assert np.allclose(
+                    dense(H.Sk(k, gauge=gauge, format=format)), dense(Sk)
+                )
+
+        # a changed sparsity pattern creates a new plan
+        ns = 2 if H.spin.is_noncolinear or H.spin.is_spinorbit else 1
+        plan = H.k_plan(ns)
+        assert plan is H.k_plan(ns)
+        H[0, 3] = 1.0
+        assert plan is not H.k_plan(ns)
+        k = [0.1, 0.2, 0.3]
+        Hk = H.Hk(k, format="array")
+        assert np.allclose(Hk, H.Hk(k, format="array", out=np.empty_like(Hk)))
+        if format == "csr":
+            # the sparsity pattern of out is different
+            with pytest.raises(ValueError):
+                H.Hk(k, out=out)
+
     def test_construct_raise_default(self, setup):
         # Test that construct fails with more than one
         # orbital
@@ -1156,6 +1315,59 @@ class TestHamiltonian:
         assert PDOS.dtype.kind == "f"
         assert np.allclose(PDOS.sum(1), DOS)
 
+    def test_dos_tetrahedron_chain(self):
+        g = Geometry(
+            [0] * 3, Atom(1, R=1.1), lattice=Lattice([1, 10, 10], nsc=[3, 1, 1])
+        )
+        H = Hamiltonian(g)
+        H.construct([(0.1, 1.05), (0, -1)])
+        mp = MonkhorstPack(H, [100, 1, 1])
+        # analytic DOS of a chain
+        E = np.linspace(-1.5, 1.5, 19)
+        DOS = DOS_tetrahedron(E, mp.apply.array.eigh(), mp)
+        assert np.allclose(DOS, 1 / (np.pi * (4 - E**2) ** 0.5), atol=5e-3)
+        # no states outside the band
+        assert np.allclose(DOS_tetrahedron([-2.1, 2.1], mp.apply.array.eigh(), mp), 0)
+        # normalized to the number of bands
+        E = np.linspace(-2.1, 2.1, 4201)
+        DOS = DOS_tetrahedron(E, mp.apply.array.eigh(), mp)
+        assert np.trapz(DOS, E) == pytest.approx(1, abs=1e-2)
+
+    @pytest.mark.parametrize("kwargs", [{}, {"trs": False}, {"symmetry": True}])
+    def test_pdos_tetrahedron(self, setup, kwargs):
+        H = setup.H.copy()
+        H.construct([(0.1, 1.5), (0.0, -2.7)])
+        E = np.linspace(-9, 9, 181)
+        mp = MonkhorstPack(H, [12, 12, 1], **kwargs)
+
+        def wrap(es):
+            return es.eig, es.norm2(sum=False).real
+
+        eig, weight = mp.apply.renew(zip=True).array.eigenstate(wrap=wrap)
+        DOS = DOS_tetrahedron(E, eig, mp)
+        for blochl in (True, False):
+            PDOS = PDOS_tetrahedron(E, eig, weight, mp, blochl=blochl)
+            assert PDOS.shape == (2, len(E))
+            assert np.allclose(PDOS.sum(0), DOS)
+            # the two carbon atoms are equivalent
+            assert np.allclose(PDOS[0], PDOS[1])
+
+        # compare to the full grid
+        mp_full = MonkhorstPack(H, [12, 12, 1], trs=False)
+        assert np.allclose(DOS, DOS_tetrahedron(E, mp_full.apply.array.eigh(), mp_full))
+
+    def test_dos_tetrahedron_fail(self, setup):
+        H = setup.H.copy()
+        H.construct([(0.1, 1.5), (0.0, -2.7)])
+        E = np.linspace(-1, 1, 11)
+        mp = MonkhorstPack(H, [4, 4, 1], size=[0.5, 0.5, 1])
+        with pytest.raises(SislError):
+            DOS_tetrahedron(E, mp.apply.array.eigh(), mp)
+        mp = MonkhorstPack(H, [4, 4, 1])
+        mp.replace([0] * 3, MonkhorstPack(H, [2, 2, 1], size=[0.25, 0.25, 1]))
+        with pytest.raises(SislError):
+            DOS_tetrahedron(E, mp.apply.array.eigh(), mp)
+
     def test_pdos_nc(self):
         geom = Geometry([0] * 3)
         H = Hamiltonian(geom, spin="nc")
@@ -2123,3 +2335,21 @@ def test_wavefunction_eta():
     grid = Grid(0.1, dtype=np.complex128, lattice=Lattice([2, 2, 2], origin=[-1] * 3))
     grid.fill(0.0)
     ES.sub(0).wavefunction(grid, eta=True)
+
+
+def test_wavefunctions_nc():
+    N = 50
+    o1 = SphericalOrbital(0, (np.linspace(0, 2, N), np.exp(-np.linspace(0, 100, N))))
+    G = Geometry([[1] * 3, [2] * 3], Atom(6, o1), lattice=[4, 4, 4])
+    H = Hamiltonian(G, spin=Spin("nc"))
+    R, param = [0.1, 1.5], [[0.0, 0.0, 0.1, -0.1], [1.0, 1.0, 0.1, -0.1]]
+    H.construct([R, param])
+    ES = H.eigenstate()
+    grid = Grid(0.1, dtype=np.complex128, lattice=Lattice([2, 2, 2], origin=[-1] * 3))
+    for spinor in (0, 1):
+        psi = ES.wavefunctions(grid, spinor=spinor)
+        assert psi.shape == (len(ES),) + grid.shape
+        for i in range(len(ES)):
+            grid.fill(0.0)
+            ES.sub(i).wavefunction(grid, spinor=spinor)
+            assert np.allclose(psi[i], grid.grid)
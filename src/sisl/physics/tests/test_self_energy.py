@@ -2,6 +2,7 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 import math as m
+import os
 import warnings
 
 import numpy as np
@@ -13,6 +14,7 @@ from sisl import (
     Atom,
     Bloch,
     BrillouinZone,
+    CachedSE,
     Geometry,
     Hamiltonian,
     Lattice,
@@ -137,6 +139,190 @@ def test_sancho_non_orthogonal_dtype(setup):
     assert np.allclose(s64, s128)
 
 
+@pytest.mark.parametrize("orthogonal", [True, False])
+def test_sancho_batched(setup, orthogonal):
+    H = setup.H if orthogonal else setup.HS
+    SE = RecursiveSI(H, "-A")
+    E = np.linspace(-3, 3, 11)
+    k = [[0, 0, 0], [0, 0.13, 0], [0, 0.4, 0]]
+
+    se = SE.self_energy(E, k)
+    assert se.shape == (3, 11, len(SE), len(SE))
+    for ik in range(len(k)):
+        assert np.allclose(se[ik], SE.self_energy(E, k[ik]))
+        for iE in range(len(E)):
+            assert np.allclose(se[ik, iE], SE.self_energy(E[iE], k[ik]))
+
+    # a single energy
+    assert np.allclose(SE.self_energy(E[1], k), se[:, 1])
+    assert np.allclose(
+        SE.self_energy(E, k, bulk=True)[1, 2], SE.self_energy(E[2], k[1], bulk=True)
+    )
+    assert np.allclose(SE.green(E, k)[2, 3], SE.green(E[3], k[2]))
+    assert np.allclose(
+        SE.broadening_matrix(E, k)[1, 5], SE.broadening_matrix(E[5], k[1])
+    )
+
+
+def test_sancho_batched_chunk(setup, monkeypatch):
+    from sisl._environ import sisl_environ
+    from sisl.physics import self_energy
+
+    SE = RecursiveSI(setup.HS, "-A")
+    E = np.linspace(-3, 3, 7)
+    k = [[0, 0, 0], [0, 0.13, 0]]
+    se = SE.self_energy(E, k)
+    assert np.allclose(SE.self_energy(E, k, chunk=2), se)
+    assert np.allclose(SE.green(E, k, chunk=3), SE.green(E, k))
+    # blocks of a single energy from the memory budget
+    with sisl_environ(SISL_BATCH_SIZE=1e-6):
+        assert np.allclose(SE.self_energy(E, k), se)
+
+    # the recursion is stopped (with a warning) when not converging
+    monkeypatch.setattr(self_energy, "_RECURSIVE_SI_MAXITER", 2)
+    with pytest.warns(sisl.SislWarning, match="did not converge"):
+        SE.self_energy(E, k[0])
+
+
+def test_sancho_batched_pool(setup):
+    SE = RecursiveSI(setup.HS, "+A")
+    E = np.linspace(-3, 3, 5)
+    k = [[0, 0, 0], [0, 0.13, 0], [0, 0.4, 0]]
+    assert np.allclose(SE.self_energy(E, k, pool=2), SE.self_energy(E, k))
+    assert np.allclose(SE.green(E, k, pool=2), SE.green(E, k))
+
+
+def test_sancho_pickle(setup):
+    import pickle
+
+    SE = RecursiveSI(setup.HS, "+A")
+    SE2 = pickle.loads(pickle.dumps(SE))
+    assert SE2.no == SE.no
+    assert np.allclose(SE2.self_energy(0.1), SE.self_energy(0.1))
+
+
+def test_cached_se(setup, tmp_path):
+    SE = RecursiveSI(setup.HS, "-A")
+    C = CachedSE(SE, tmp_path, mmap=True)
+    E = np.linspace(-1, 1, 3)
+    k = [0, 0.13, 0]
+
+    se = C.self_energy(E, k)
+    assert (C.hits, C.misses) == (0, 3)
+    # one entry per energy
+    assert len(list(tmp_path.glob("*.npy"))) == 3
+    assert np.allclose(C.self_energy(E, k), se)
+    assert (C.hits, C.misses) == (3, 3)
+    assert np.allclose(C.self_energy(E, k), SE.self_energy(E, k))
+    # single points share the entries
+    assert np.allclose(C.self_energy(E[1], k), se[1])
+    assert (C.hits, C.misses) == (7, 3)
+    # other arguments are not cached
+    C.self_energy(E, k, bulk=True)
+    C.green(E, k)
+    assert (C.hits, C.misses) == (7, 9)
+    # defaults are equivalent
+    C.self_energy(0.1)
+    C.self_energy(0.1, k=[0, 0, 0])
+    assert (C.hits, C.misses) == (8, 10)
+    assert np.allclose(C.broadening_matrix(E, k), SE.broadening_matrix(E, k))
+    assert (C.hits, C.misses) == (11, 10)
+    assert len(C) == len(SE)
+
+    # a new object (shares the cache)
+    C2 = CachedSE(RecursiveSI(setup.HS, "-A"), tmp_path)
+    assert np.allclose(C2.self_energy(E, k), se)
+    assert (C2.hits, C2.misses) == (3, 0)
+    # different eta and direction
+    C2 = CachedSE(RecursiveSI(setup.HS, "-A", eta=1e-3), tmp_path)
+    C2.self_energy(E, k)
+    C2 = CachedSE(RecursiveSI(setup.HS, "+A"), tmp_path)
+    C2.self_energy(E, k)
+    assert (C2.hits, C2.misses) == (0, 3)
+    assert len(list(tmp_path.glob("*.npy"))) == 16
+
+    C.clear()
+    assert len(list(tmp_path.glob("*.npy"))) == 0
+
+
+def test_cached_se_overlap(setup, tmp_path):
+    SE = RecursiveSI(setup.HS, "-A")
+    C = CachedSE(SE, tmp_path)
+    E = np.linspace(-1, 1, 5)
+    k = [[0, 0, 0], [0, 0.13, 0]]
+
+    calls = []
+    self_energy = SE.self_energy
+
+    def count(E, k=(0, 0, 0), **kwargs):
+        calls.append((np.asarray(E).shape, np.asarray(k).shape))
+        return self_energy(E, k, **kwargs)
+
+    SE.self_energy = count
+    se = C.self_energy(E[:3], k)
+    assert se.shape == (2, 3, len(SE), len(SE))
+    assert calls == [((3,), (2, 3))]
+    # only the new energies are calculated (in one call)
+    se = C.self_energy(E, k)
+    assert calls[1] == ((2,), (2, 3))
+    assert (C.hits, C.misses) == (6, 10)
+    assert np.allclose(se, self_energy(E, k))
+    # and single k-points are retrieved
+    assert np.allclose(C.self_energy(E[::-1], k[1]), se[1, ::-1])
+    assert len(calls) == 2
+
+
+def test_cached_se_refresh(setup, tmp_path):
+    H = setup.H.copy()
+    C = CachedSE(RecursiveSI(H, "-A"), tmp_path)
+    C.self_energy(0.1)
+    C.spgeom0[0, 0] = 1.0
+    C.self_energy(0.1)
+    assert C.misses == 1
+    C.refresh()
+    C.self_energy(0.1)
+    assert C.misses == 2
+
+
+def test_cached_se_lru(setup, tmp_path):
+    SE = RecursiveSI(setup.H, "-A")
+    nbytes = SE.self_energy(0.1).nbytes
+    C = CachedSE(SE, tmp_path, max_size=3 * (nbytes + 128))
+    for E in [0.1, 0.2, 0.3]:
+        C.self_energy(E)
+    # access the first (it should be retained)
+    C.self_energy(0.1)
+    C.self_energy(0.4)
+    assert len(list(tmp_path.glob("*.npy"))) == 3
+    C.self_energy(0.1)
+    assert C.hits == 2
+    C.self_energy(0.2)
+    assert C.misses == 5
+
+
+def test_cached_se_lru_no_scan(setup, tmp_path, monkeypatch):
+    SE = RecursiveSI(setup.H, "-A")
+    nbytes = SE.self_energy(0.1).nbytes
+    C = CachedSE(SE, tmp_path, max_size=3 * (nbytes + 128))
+
+    # the directory is only scanned when created
+    scans = []
+    scandir = os.scandir
+
+    def count(path):
+        scans.append(path)
+        return scandir(path)
+
+    monkeypatch.setattr(os, "scandir", count)
+    C.self_energy(np.linspace(0, 1, 5))
+    C.self_energy(0.75)
+    assert (C.hits, C.misses) == (1, 5)
+    C.self_energy(0.0)
+    assert C.misses == 6
+    assert len(scans) == 0
+    assert len(list(tmp_path.glob("*.npy"))) == 3
+
+
 def test_sancho_lr(setup):
     SL = RecursiveSI(setup.HS, "-A")
     SR = RecursiveSI(setup.HS, "+A")
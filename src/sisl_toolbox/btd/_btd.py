@@ -22,7 +22,7 @@ It requires two inputs and has several optional flags.
     Note that since you'll always do a 0 V calculation this isn't making
     any implications for the requirement of the TBT.nc file.
 """
-from numbers import Integral
+from numbers import Integral, Real
 from pathlib import Path
 
 import numpy as np
@@ -31,6 +31,7 @@ from scipy.sparse.linalg import svds
 
 import sisl as si
 from sisl import _array as _a
+from sisl._pool import SharedPayload, chunk_ranges, get_pool
 from sisl.linalg import (
     cholesky,
     eigh,
@@ -48,7 +49,13 @@ indices_only = si._indices.indices_only
 indices = si._indices.indices
 conj = np.conj
 
-__all__ = ["PivotSelfEnergy", "DownfoldSelfEnergy", "DeviceGreen"]
+__all__ = [
+    "PivotSelfEnergy",
+    "DownfoldSelfEnergy",
+    "DevicePivot",
+    "DeviceGreen",
+    "btd_cost",
+]
 
 
 def dagger(M):
@@ -135,22 +142,8 @@ class PivotSelfEnergy(si.physics.SelfEnergy):
         #  tbtgfSileTBtrans
         #  SelfEnergy object (for direct calculation)
         self._se = se
-
-        if isinstance(se, si.io.tbtrans.tbtsencSileTBtrans):
-
-            def se_func(*args, **kwargs):
-                return self._se.self_energy(self.name, *args, **kwargs)
-
-            def broad_func(*args, **kwargs):
-                return self._se.broadening_matrix(self.name, *args, **kwargs)
-
-        else:
-
-            def se_func(*args, **kwargs):
-                return self._se.self_energy(*args, **kwargs)
-
-            def broad_func(*args, **kwargs):
-                return self._se.broadening_matrix(*args, **kwargs)
+        # a TBtrans file holds all electrodes, so the name is required
+        self._se_named = isinstance(se, si.io.tbtrans.tbtsencSileTBtrans)
 
         # Store the pivoting for faster indexing
         if pivot is None:
@@ -187,9 +180,6 @@ class PivotSelfEnergy(si.physics.SelfEnergy):
         # self.pvt_btd = np.concatenate(pvt_btd).reshape(-1, 1)
         # self.pvt_btd_sort = arangei(o)
 
-        self._se_func = se_func
-        self._broad_func = broad_func
-
     def __str__(self):
         return f"{self.__class__.__name__}{{no: {len(self)}}}"
 
@@ -197,10 +187,14 @@ class PivotSelfEnergy(si.physics.SelfEnergy):
         return len(self.pvt_dev)
 
     def self_energy(self, *args, **kwargs):
-        return self._se_func(*args, **kwargs)
+        if self._se_named:
+            return self._se.self_energy(self.name, *args, **kwargs)
+        return self._se.self_energy(*args, **kwargs)
 
     def broadening_matrix(self, *args, **kwargs):
-        return self._broad_func(*args, **kwargs)
+        if self._se_named:
+            return self._se.broadening_matrix(self.name, *args, **kwargs)
+        return self._se.broadening_matrix(*args, **kwargs)
 
 
 class DownfoldSelfEnergy(PivotSelfEnergy):
@@ -464,6 +458,322 @@ class BlockMatrix:
         return BlockMatrixIndexer(self)
 
 
+def btd_cost(btd):
+    r"""Estimated cost of the block-tri-diagonal inversion for the block sizes `btd`
+
+    The number of floating point operations counts the (complex) operations needed
+    for the BTD algorithm used in `DeviceGreen` (the :math:`\tilde X` and :math:`\tilde Y`
+    matrices, plus the diagonal blocks of the Green function).
+    The memory is the size of the block matrices and the :math:`\tilde X`/:math:`\tilde Y`
+    matrices (in ``complex128``).
+
+    This may be used to compare different partitions, e.g. ``btd_cost(tbt.btd())`` for
+    the partitioning used in TBtrans.
+
+    Parameters
+    ----------
+    btd : array_like
+       the block sizes
+
+    Returns
+    -------
+    PropertyDict
+        with the entries ``flops`` (number of operations), ``memory`` (in bytes),
+        ``blocks`` (number of blocks) and ``max`` (largest block)
+    """
+    n = np.asarray(btd, dtype=np.float64)
+    # neighbouring block sizes (0 at the edges)
+    nm = np.append(0, n[:-1])
+    np_ = np.append(n[1:], 0)
+
+    # tilde X and Y: LU of the (updated) diagonal block, solve the
+    # off-diagonal block and the matrix product for the update
+    flops = ((2 / 3 * n**3 + 2 * n**2 * np_ + 2 * n * np_**2) * (np_ > 0)).sum()
+    flops += ((2 / 3 * n**3 + 2 * n**2 * nm + 2 * n * nm**2) * (nm > 0)).sum()
+    # diagonal blocks of the Green function: updates and inversion
+    flops += (2 * n**2 * (nm + np_) + 2 * n**3).sum()
+
+    # A, B, C and tilde X, Y
+    elements = (n**2).sum() + 4 * (n[:-1] * n[1:]).sum()
+
+    return PropertyDict(
+        flops=flops, memory=elements * 16, blocks=len(n), max=int(n.max())
+    )
+
+
+class DevicePivot:
+    r"""Pivoting and block-tri-diagonal partitioning of a device region
+
+    This computes a pivoting table (bandwidth reducing) of the device orbitals
+    and the block sizes of the BTD matrix, with an interface equivalent to the
+    TBtrans output files. I.e. it may be used in place of a `tbtncSileTBtrans`
+    for `DeviceGreen` and `PivotSelfEnergy`.
+
+    The block sizes are chosen to minimize the inversion cost (:math:`\sum_b n_b^3`)
+    for the pivoting table, and the orbitals of each electrode are kept in a single block.
+
+    Parameters
+    ----------
+    spgeom : SparseOrbital
+       the sparse matrix (typically the Hamiltonian) whose sparsity pattern
+       defines the couplings
+    elecs : dict
+       electrode names and the orbitals (in `spgeom`) where the self-energies are
+       inserted. The order of the orbitals should be the same as in the self-energies.
+    device : array_like, optional
+       the device orbitals, defaults to all orbitals
+    method : {"bfs", "rcm"}
+       the pivoting method:
+
+       - bfs: breadth-first search from the first electrode
+       - rcm: reverse Cuthill-McKee
+
+    Examples
+    --------
+    >>> H = ... # sisl Hamiltonian of the device + electrode orbitals
+    >>> pivot = DevicePivot(H, {"Left": left_orbs, "Right": right_orbs})
+    >>> left = PivotSelfEnergy("Left", sisl.RecursiveSI(H_left, "-A"), pivot)
+    >>> right = PivotSelfEnergy("Right", sisl.RecursiveSI(H_right, "+A"), pivot)
+    >>> G = DeviceGreen(H, [left, right], pivot)
+    >>> print(pivot.report())
+    """
+
+    def __init__(self, spgeom, elecs, device=None, method: str = "bfs"):
+        self.geometry = spgeom.geometry
+        no = spgeom.no
+        if device is None:
+            device = arangei(no)
+        device = np.unique(_a.asarrayi(device))
+        self.elecs = list(elecs.keys())
+        self._elecs = {name: _a.asarrayi(o).ravel() for name, o in elecs.items()}
+
+        # the graph of the device region, with each electrode contracted to a single node
+        ndev = len(device)
+        idev = _a.fulli(no, -1)
+        idev[device] = arangei(ndev)
+        node = idev.copy()
+        for ie, o in enumerate(self._elecs.values()):
+            if np.any(idev[o] < 0):
+                raise ValueError(
+                    f"{self.__class__.__name__} electrode orbitals must be in the device region"
+                )
+            node[o] = ndev + ie
+        nodes = np.unique(node[device])
+        inode = _a.fulli(ndev + len(self._elecs), -1)
+        inode[nodes] = arangei(len(nodes))
+
+        csr = spgeom.tocsr(0).tocoo()
+        row, col = node[csr.row], node[csr.col % no]
+        idx = np.logical_and(row >= 0, col >= 0).nonzero()[0]
+        row, col = inode[row[idx]], inode[col[idx]]
+        graph = ssp.csr_matrix(
+            (np.ones(len(row), dtype=np.int8), (row, col)),
+            shape=(len(nodes), len(nodes)),
+        )
+        graph = (graph + graph.T).tocsr()
+
+        method = method.lower()
+        if method == "bfs":
+            order = self._bfs(graph, inode[ndev] if self._elecs else 0)
+        elif method == "rcm":
+            from scipy.sparse.csgraph import reverse_cuthill_mckee
+
+            order = reverse_cuthill_mckee(graph, symmetric_mode=True)
+        else:
+            raise ValueError(
+                f"{self.__class__.__name__} unknown pivoting method {method}, [bfs, rcm]"
+            )
+
+        # expand the nodes to orbitals, electrodes are expanded in their given order
+        pvt = []
+        for n in nodes[order]:
+            if n < ndev:
+                pvt.append(device[n : n + 1])
+            else:
+                pvt.append(self._elecs[self.elecs[n - ndev]])
+        self._pvt = np.concatenate(pvt).astype(np.int32, copy=False)
+        self._btd = self._partition(spgeom, order, nodes, ndev)
+
+    @staticmethod
+    def _bfs(graph, start):
+        """Breadth-first ordering of all nodes (disconnected parts are appended)"""
+        from scipy.sparse.csgraph import breadth_first_order
+
+        n = graph.shape[0]
+        visited = np.zeros(n, dtype=bool)
+        order = []
+        for s in [start] + list(range(n)):
+            if visited[s]:
+                continue
+            o = breadth_first_order(graph, s, directed=False, return_predecessors=False)
+            visited[o] = True
+            order.append(o)
+        return np.concatenate(order)
+
+    def _partition(self, spgeom, order, nodes, ndev):
+        """Block sizes minimizing the inversion cost for the pivoting table"""
+        no = spgeom.no
+        pvt = self._pvt
+        n = len(pvt)
+        ipvt = _a.fulli(no, -1)
+        ipvt[pvt] = arangei(n)
+
+        # the largest (pivoted) coupling index of each orbital
+        csr = spgeom.tocsr(0).tocoo()
+        row, col = ipvt[csr.row], ipvt[csr.col % no]
+        idx = np.logical_and(row >= 0, col >= 0).nonzero()[0]
+        row, col = row[idx], col[idx]
+        reach = arangei(n)
+        np.maximum.at(reach, row, col)
+        np.maximum.at(reach, col, row)
+        reach = np.maximum.accumulate(reach)
+
+        # block boundaries may not be placed inside an electrode
+        allowed = np.ones(n + 1, dtype=bool)
+        start = 0
+        for nd in nodes[order]:
+            if nd < ndev:
+                start += 1
+            else:
+                end = start + len(self._elecs[self.elecs[nd - ndev]])
+                allowed[start + 1 : end] = False
+                start = end
+
+        # cost[e] is the minimal cost of partitioning [0, e) with a boundary at e
+        # A block [s, e) requires all couplings of [0, s) to be within e
+        cost = np.full(n + 1, np.inf)
+        cost[0] = 0.0
+        prev = _a.zerosi(n + 1)
+        s = np.arange(n + 1)
+        valid_s = np.append(-1, reach)
+        for e in range(1, n + 1):
+            if not allowed[e]:
+                continue
+            ss = s[:e]
+            ok = np.logical_and(valid_s[ss] < e, np.isfinite(cost[ss]))
+            ok[0] = True
+            ss = ss[ok]
+            c = cost[ss] + (e - ss).astype(np.float64) ** 3
+            i = np.argmin(c)
+            cost[e] = c[i]
+            prev[e] = ss[i]
+
+        btd = []
+        e = n
+        while e > 0:
+            btd.append(e - prev[e])
+            e = prev[e]
+        return _a.arrayi(btd[::-1])
+
+    def __len__(self):
+        return len(self._pvt)
+
+    def __str__(self):
+        cost = self.cost()
+        return f"{self.__class__.__name__}{{no: {len(self)}, blocks: {cost.blocks}, max: {cost.max}, elecs: {self.elecs}}}"
+
+    def _elec(self, elec):
+        """Converts an electrode index to its name"""
+        if isinstance(elec, Integral):
+            return self.elecs[elec]
+        return elec
+
+    def btd(self, elec=None):
+        """Block-sizes for the BTD method in the device region
+
+        Parameters
+        ----------
+        elec : str or int, optional
+           the BTD block sizes for the device (if none), otherwise the size of the
+           electrode region (there is no down-folding region)
+        """
+        if elec is None:
+            return self._btd
+        return _a.arrayi([len(self._elecs[self._elec(elec)])])
+
+    def pivot(self, elec=None, in_device=False, sort=False):
+        """Return the pivoting indices for a specific electrode (in the device region) or the device
+
+        Parameters
+        ----------
+        elec : str or int
+           the corresponding electrode to return the pivoting indices from
+        in_device : bool, optional
+           If ``True`` the pivoting table will be translated to the device region orbitals.
+        sort : bool, optional
+           Whether the returned indices are sorted.
+
+        See Also
+        --------
+        sisl.io.tbtrans.tbtncSileTBtrans.pivot : the equivalent method for TBtrans output
+        """
+        pvt = self._pvt
+        if elec is None:
+            if in_device:
+                if sort:
+                    return arangei(len(pvt))
+                return indices(np.sort(pvt), pvt, 0)
+            if sort:
+                return np.sort(pvt)
+            return pvt
+
+        se_pvt = self._elecs[self._elec(elec)]
+        if sort:
+            se_pvt = np.sort(se_pvt)
+            pvt = np.sort(pvt)
+        if in_device:
+            return indices(pvt, se_pvt, 0)
+        return se_pvt
+
+    def pivot_down(self, elec):
+        """Pivoting orbitals for the electrode (there is no down-folding region)"""
+        return self._elecs[self._elec(elec)]
+
+    def a_elec(self, elec):
+        """Electrode atomic indices (sorted)"""
+        return self.geometry.o2a(self._elecs[self._elec(elec)], unique=True)
+
+    def cost(self):
+        """Estimated cost of the BTD inversion, see `btd_cost`"""
+        return btd_cost(self._btd)
+
+    def report(self, other=None):
+        """A summary of the partitioning (and the estimated flops and memory)
+
+        Parameters
+        ----------
+        other : array_like or object with a ``btd`` method, optional
+           another partitioning to compare against, e.g. a `tbtncSileTBtrans`
+        """
+        partitions = [(self.__class__.__name__, self._btd)]
+        if other is not None:
+            if hasattr(other, "btd"):
+                partitions.append((other.__class__.__name__, other.btd()))
+            else:
+                partitions.append(("other", other))
+
+        lines = []
+        for name, btd in partitions:
+            c = btd_cost(btd)
+            lines.append(
+                f"{name}: no={np.sum(btd)}, blocks={c.blocks}, max={c.max}, "
+                f"flops={c.flops:.4e}, memory={c.memory / 1024**2:.3f} MB"
+            )
+        return "\n".join(lines)
+
+
+def _sweep_chunk(payload, start, stop):
+    """Worker function for `DeviceGreen.sweep`"""
+    data, green = payload.load()
+    return green._sweep_range(*data, start, stop)
+
+
+def _density_matrix_chunk(payload, start, stop):
+    """Worker function for `DeviceGreen.density_matrix`"""
+    data, green = payload.load()
+    return green._density_matrix_range(*data, start, stop)
+
+
 class DeviceGreen:
     r"""Block-tri-diagonal Green function calculator
 
@@ -924,7 +1234,7 @@ class DeviceGreen:
             SE = elec.self_energy(E, k)
             inv_G[elec.pvt_dev, elec.pvt_dev.T] -= SE
             gamma.append(elec.se2broadening(SE))
-        del SE
+            del SE
         data.gamma = gamma
 
         nb = len(self.btd)
@@ -1811,6 +2121,492 @@ class DeviceGreen:
 
         return BM
 
+    def _density_matrix_pattern(self, DM):
+        """Sparse elements of `DM` in the device region, grouped by the BTD blocks
+
+        Returns the indices of the elements in the sparse matrix data, their supercell
+        indices and, for each block, the element indices in the pivoted block matrix.
+        """
+        csr = DM._csr
+        no = DM.no
+        cum0 = self.btd_cum0
+
+        index = _a.array_arange(csr.ptr[:-1], n=csr.ncol)
+        row = np.repeat(arangei(no), csr.ncol)
+        col = csr.col[index]
+
+        # device (pivoted) indices of the rows and columns
+        ipvt = _a.fulli(no, -1)
+        ipvt[self.pvt] = arangei(len(self.pvt))
+        r = ipvt[row]
+        c = ipvt[col % no]
+        idx = np.logical_and(r >= 0, c >= 0).nonzero()[0]
+        index, r, c, isc = index[idx], r[idx], c[idx], col[idx] // no
+
+        br = np.searchsorted(cum0, r, side="right") - 1
+        bc = np.searchsorted(cum0, c, side="right") - 1
+        idx = np.fabs(br - bc) > 1
+        if idx.any():
+            warn(
+                f"{self.__class__.__name__}.density_matrix has {idx.sum()} sparse elements "
+                "outside the BTD matrix, these are not calculated."
+            )
+            idx = np.logical_not(idx).nonzero()[0]
+            index, r, c, isc, br, bc = (
+                index[idx],
+                r[idx],
+                c[idx],
+                isc[idx],
+                br[idx],
+                bc[idx],
+            )
+
+        blocks = {}
+        nb = len(self.btd)
+        for jb in range(nb):
+            for ib in range(max(0, jb - 1), min(jb + 2, nb)):
+                idx = np.logical_and(br == ib, bc == jb).nonzero()[0]
+                if len(idx) > 0:
+                    blocks[ib, jb] = (idx, r[idx] - cum0[ib], c[idx] - cum0[jb])
+
+        return index, isc, blocks
+
+    def _density_matrix_range(
+        self, index, isc, blocks, sc_off, k, wk, E, w, elec, start, stop
+    ):
+        """Density matrix elements of the ``(k, E)`` points in ``range(start, stop)``
+
+        The points are ordered with the energies running fastest.
+        """
+        D = np.zeros(len(index))
+        nE = len(E)
+
+        def add(M, weight, phase):
+            BI = M.block_indexer
+            for key, (idx, i, j) in blocks.items():
+                D[idx] += (BI[key][i, j] * weight * phase[idx]).real
+
+        def add_green(M, weight, phase):
+            # i [w G - (w G)^dagger]
+            BI = M.block_indexer
+            for (ib, jb), (idx, i, j) in blocks.items():
+                wG = weight * BI[ib, jb][i, j] - conj(weight * BI[jb, ib][j, i])
+                D[idx] -= (wG * phase[idx]).imag
+
+        for i in range(start, stop):
+            ik, iE = divmod(i, nE)
+            if elec is None:
+                if w[iE] == 0:
+                    continue
+            elif np.all(w[:, iE] == 0):
+                continue
+
+            self._prepare(E[iE], k[ik])
+            phase = np.exp(-2j * np.pi * (sc_off @ k[ik]))[isc]
+            if elec is None:
+                add_green(self._green_btd(), w[iE] * wk[ik] / (2 * np.pi), phase)
+            else:
+                for ie, el in enumerate(elec):
+                    if w[ie, iE] == 0:
+                        continue
+                    add(
+                        self._spectral_propagate_btd(el, True),
+                        w[ie, iE] * wk[ik] / (2 * np.pi),
+                        phase,
+                    )
+
+        return D
+
+    def density_matrix(
+        self, contour, bz=None, elec=None, DM=None, pool=None, chunks_per_proc=4
+    ):
+        r"""Integrate the density matrix in the device region along an energy contour
+
+        Without electrodes (`elec`) the equilibrium density matrix is integrated
+        from the Green function (typically along a contour in the complex plane):
+
+        .. math::
+            \mathbf D(\mathbf R) = \frac i{2\pi}\sum_{\mathbf k}w_{\mathbf k}\sum_i \big[w_i
+                  \mathbf G(E_i,\mathbf k) - w_i^*\mathbf G^\dagger(E_i,\mathbf k)\big] e^{-i\mathbf k\cdot\mathbf R}
+
+        With electrodes the non-equilibrium terms (bias window) are integrated from
+        the spectral functions of the electrodes (on the real axis):
+
+        .. math::
+            \mathbf D(\mathbf R) = \frac1{2\pi}\Re\sum_{\mathbf k}w_{\mathbf k}\sum_{\mathfrak e}\sum_i w_{\mathfrak e,i}
+                  \mathbf A_{\mathfrak e}(E_i,\mathbf k) e^{-i\mathbf k\cdot\mathbf R}
+
+        Only the elements in the sparse pattern of the Hamiltonian (or `DM`) are calculated,
+        and only the BTD blocks of the Green function (and spectral functions) are
+        computed. The elements coupling the device and the electrodes (or buffer atoms) are not
+        calculated.
+
+        The weights should contain the occupations (or difference of occupations for
+        the bias window), and the density matrix corresponds to a single spin channel.
+
+        Parameters
+        ----------
+        contour : tuple of array_like
+           the energy points and the integration weights, ``(E, w)``. For `elec` the weights
+           may be specified per electrode, with shape ``(len(elec), len(E))``
+        bz : BrillouinZone, optional
+           the k-points and weights, defaults to the :math:`\Gamma` point
+        elec : str or int or list of str or int, optional
+           the electrodes whose spectral functions are integrated, if not specified
+           the Green function is integrated
+        DM : DensityMatrix, optional
+           accumulate the density matrix elements into this density matrix (in-place), e.g.
+           for adding the non-equilibrium parts to an equilibrium density matrix.
+           Its geometry should match the Hamiltonian.
+        pool : bool or int or pool, optional
+           distribute the contour and k-points on a pool of workers,
+           see `sisl._pool.get_pool`. The electrodes must be picklable.
+        chunks_per_proc : int, optional
+           the points are split in this number of chunks per worker, each chunk
+           only returns the accumulated elements which bounds the used memory
+
+        Returns
+        -------
+        DensityMatrix
+            the integrated density matrix (`DM` if passed)
+        """
+        E, w = contour
+        E = np.asarray(E).ravel()
+        if elec is None:
+            w = np.broadcast_to(w, E.shape)
+        else:
+            if isinstance(elec, (str, Integral, PivotSelfEnergy)):
+                elec = [elec]
+            elec = [self._elec(el) for el in elec]
+            w = np.broadcast_to(w, (len(elec), len(E)))
+
+        if bz is None:
+            k = np.zeros([1, 3])
+            wk = _a.onesd(1)
+        else:
+            k = bz.k.reshape(-1, 3)
+            wk = bz.weight.reshape(-1)
+
+        H = self.H
+        if DM is None:
+            DM = si.DensityMatrix(H.geometry, dtype=np.float64, orthogonal=H.orthogonal)
+            dims = [0] if H.orthogonal else [0, H.S_idx]
+            DM._csr = H._csr.copy(dims=dims, dtype=np.float64)
+            DM._csr._D[:, 0] = 0.0
+        elif DM.no != H.no or DM.n_s != H.n_s:
+            raise ValueError(
+                f"{self.__class__.__name__}.density_matrix requires the density matrix "
+                "to have the same number of orbitals and supercells as the Hamiltonian."
+            )
+
+        index, isc, blocks = self._density_matrix_pattern(DM)
+        data = (index, isc, blocks, H.lattice.sc_off, k, wk, E, w, elec)
+
+        n = len(k) * len(E)
+        pool = get_pool(pool)
+        if pool is None or n == 1:
+            D = self._density_matrix_range(*data, 0, n)
+        else:
+            ranges = chunk_ranges(n, pool.nprocs, chunks_per_proc)
+            # no need to ship the stored calculation
+            self.reset()
+            D = 0.0
+            with SharedPayload(data, self) as pl:
+                for D_chunk in pool.imap(
+                    _density_matrix_chunk, [pl] * len(ranges), *zip(*ranges)
+                ):
+                    D += D_chunk
+
+        DM._csr._D[index, 0] += D
+        return DM
+
+    def _diagonal_S(self, M, S):
+        """Diagonal of ``M @ S`` for BTD block matrices (`S` may be None for orthogonal basis)"""
+        BI = M.block_indexer
+        nb = len(self.btd)
+        if S is None:
+            return np.concatenate([BI[b, b].diagonal() for b in range(nb)])
+        SI = S.block_indexer
+        D = []
+        for b in range(nb):
+            d = 0
+            for jb in range(max(0, b - 1), min(b + 2, nb)):
+                d = d + (BI[b, jb] * SI[jb, b].T).sum(1)
+            D.append(d)
+        return np.concatenate(D)
+
+    def _sweep_range(self, points, E, k, quantities, start, stop):
+        """Calculate the sweep `quantities` for ``points[start:stop]`` (``(ik, iE)`` pairs)"""
+        Ry2eV = si.unit.siesta.unit_convert("Ry", "eV")
+        out = []
+        for ik, iE in points[start:stop]:
+            self._prepare(E[iE], k[ik])
+            S = None
+            if not self.H.orthogonal and ("DOS" in quantities or "ADOS" in quantities):
+                S = self.Sk(k[ik], dtype=np.complex128, format="btd")
+
+            data = {}
+            if "DOS" in quantities:
+                data["DOS"] = (
+                    -self._diagonal_S(self._green_btd(), S).imag / np.pi * Ry2eV
+                )
+
+            for ie, elec in enumerate(self.elecs):
+                if "ADOS" in quantities:
+                    A = self._spectral_propagate_btd(ie, True)
+                    data[f"{elec.name}/ADOS"] = (
+                        self._diagonal_S(A, S).real / (2 * np.pi) * Ry2eV
+                    )
+
+                if "T" in quantities:
+                    G = self._green_column(self.elecs_pvt_dev[ie].ravel())
+                    for je, to in enumerate(self.elecs):
+                        if ie == je:
+                            continue
+                        Gt = G[self.elecs_pvt_dev[je].ravel()]
+                        T = (Gt @ self._data.gamma[ie] @ dagger(Gt)) * self._data.gamma[
+                            je
+                        ].T
+                        data[f"{elec.name}/{to.name}.T"] = T.sum().real
+
+            out.append((ik, iE, data))
+        return out
+
+    def _sweep_create(self, nc, E, k, wk, quantities, mu, kT):
+        """Create the TBtrans layout of the sweep output file"""
+        eV2Ry = si.unit.siesta.unit_convert("eV", "Ry")
+        Ang2Bohr = si.unit.siesta.unit_convert("Ang", "Bohr")
+        geom = self.H.geometry
+        crt_dim = si.io.SileCDF._crt_dim
+        crt_var = si.io.SileCDF._crt_var
+        crt_grp = si.io.SileCDF._crt_grp
+
+        def get(value, name):
+            if isinstance(value, dict):
+                return value[name]
+            return value
+
+        a_dev = geom.o2a(self.pvt, unique=True)
+        crt_dim(nc, "one", 1)
+        crt_dim(nc, "xyz", 3)
+        crt_dim(nc, "n_s", geom.n_s)
+        crt_dim(nc, "na_u", geom.na)
+        crt_dim(nc, "no_u", geom.no)
+        crt_dim(nc, "na_d", len(a_dev))
+        crt_dim(nc, "no_d", len(self))
+        crt_dim(nc, "n_btd", len(self.btd))
+        crt_dim(nc, "nkpt", len(k))
+        crt_dim(nc, "ne", len(E))
+
+        crt_var(nc, "nsc", "i4", ("xyz",))[:] = geom.nsc
+        crt_var(nc, "isc_off", "i4", ("n_s", "xyz"))[:] = geom.lattice.sc_off
+        crt_var(nc, "cell", "f8", ("xyz", "xyz"), attrs={"unit": "Bohr"})[:] = (
+            geom.cell * Ang2Bohr
+        )
+        crt_var(nc, "xa", "f8", ("na_u", "xyz"), attrs={"unit": "Bohr"})[:] = (
+            geom.xyz * Ang2Bohr
+        )
+        crt_var(nc, "lasto", "i4", ("na_u",))[:] = geom.lasto + 1
+        crt_var(nc, "a_dev", "i4", ("na_d",))[:] = a_dev + 1
+        crt_var(nc, "pivot", "i4", ("no_d",))[:] = self.pvt + 1
+        crt_var(nc, "btd", "i4", ("n_btd",))[:] = self.btd
+        crt_var(nc, "E", "f8", ("ne",), attrs={"unit": "Ry"})[:] = E.real * eV2Ry
+        crt_var(nc, "kpt", "f8", ("nkpt", "xyz"))[:] = k
+        crt_var(nc, "wkpt", "f8", ("nkpt",))[:] = wk
+        v = crt_var(
+            nc,
+            "done",
+            "i1",
+            ("nkpt", "ne"),
+            attrs={"info": "Whether the (k, E) point has been calculated"},
+        )
+        v[:] = 0
+        if "DOS" in quantities:
+            crt_var(
+                nc,
+                "DOS",
+                "f8",
+                ("nkpt", "ne", "no_d"),
+                attrs={"info": "Density of states", "unit": "1/Ry"},
+            )
+
+        for elec in self.elecs:
+            grp = crt_grp(nc, elec.name)
+            a = geom.o2a(elec.pvt.ravel(), unique=True)
+            if hasattr(elec, "pvt_down"):
+                a_down = geom.o2a(elec.pvt_down.ravel(), unique=True)
+            else:
+                a_down = a
+            crt_dim(grp, "na", len(a))
+            crt_dim(grp, "na_down", len(a_down))
+            crt_dim(grp, "no_e", len(elec.pvt))
+            crt_dim(grp, "n_btd", len(elec.btd))
+            crt_var(grp, "a", "i4", ("na",))[:] = a + 1
+            crt_var(grp, "a_down", "i4", ("na_down",))[:] = a_down + 1
+            crt_var(grp, "pivot", "i4", ("no_e",))[:] = elec.pvt.ravel() + 1
+            crt_var(grp, "btd", "i4", ("n_btd",))[:] = elec.btd
+            crt_var(grp, "mu", "f8", ("one",), attrs={"unit": "Ry"})[:] = (
+                get(mu, elec.name) * eV2Ry
+            )
+            crt_var(grp, "kT", "f8", ("one",), attrs={"unit": "Ry"})[:] = (
+                get(kT, elec.name) * eV2Ry
+            )
+            eta = getattr(elec._se, "eta", None)
+            if isinstance(eta, Real):
+                crt_var(grp, "eta", "f8", ("one",), attrs={"unit": "Ry"})[:] = (
+                    eta * eV2Ry
+                )
+            if "ADOS" in quantities:
+                crt_var(
+                    grp,
+                    "ADOS",
+                    "f8",
+                    ("nkpt", "ne", "no_d"),
+                    attrs={
+                        "info": "Spectral function density of states",
+                        "unit": "1/Ry",
+                    },
+                )
+            if "T" in quantities:
+                for to in self.elecs:
+                    if to is elec:
+                        continue
+                    crt_var(
+                        grp,
+                        f"{to.name}.T",
+                        "f8",
+                        ("nkpt", "ne"),
+                        attrs={"info": "Transmission"},
+                    )
+        nc.setncattr("method", "sisl")
+        nc.setncattr("quantities", " ".join(quantities))
+
+    def sweep(
+        self,
+        file,
+        E,
+        bz=None,
+        quantities=("T", "DOS", "ADOS"),
+        mu=0.0,
+        kT=0.025,
+        resume: bool = True,
+        pool=None,
+        chunks_per_proc: int = 4,
+    ):
+        r"""Calculate transmissions and spectral quantities for all energies and k-points and store them in a file
+
+        The output file has the same layout as the TBtrans output file, and can be read
+        with `~sisl.io.tbtrans.tbtncSileTBtrans` (e.g. via ``sisl.get_sile("sweep.TBT.nc")``).
+        All DOS quantities are stored in the pivoted device orbitals.
+
+        Results are written as they are calculated, and each calculated ``(k, E)`` point is
+        marked in the file (variable ``done``). Hence an interrupted sweep can be resumed by
+        calling this method again with the same arguments.
+
+        Parameters
+        ----------
+        file : str or pathlib.Path
+           the output file, preferably with the suffix ``.TBT.nc``
+        E : array_like
+           the energies to calculate at
+        bz : BrillouinZone, optional
+           the k-points and weights, defaults to the :math:`\Gamma` point
+        quantities : list of {"T", "DOS", "ADOS"}
+           which quantities to calculate
+
+           - T: transmissions between all electrodes
+           - DOS: the Green function density of states
+           - ADOS: the spectral function density of states of all electrodes
+        mu : float or dict, optional
+           chemical potential (eV) of the electrodes (a dict with electrode names as keys),
+           only stored in the file
+        kT : float or dict, optional
+           electronic temperature (eV) of the electrodes, only stored in the file
+        resume : bool, optional
+           continue a sweep in `file` (if it exists), the energies, k-points and quantities
+           must be the same. Otherwise the file is overwritten.
+        pool : bool or int or pool, optional
+           distribute the energies and k-points on a pool of workers,
+           see `sisl._pool.get_pool`. The electrodes must be picklable.
+        chunks_per_proc : int, optional
+           the (remaining) points are split in this number of chunks per worker, results
+           are written as each chunk finishes
+
+        Returns
+        -------
+        ~sisl.io.tbtrans.tbtncSileTBtrans
+            the output file (opened in read-mode)
+        """
+        quantities = [q for q in ("T", "DOS", "ADOS") if q in quantities]
+        E = np.asarray(E).ravel()
+        if bz is None:
+            k = np.zeros([1, 3])
+            wk = _a.onesd(1)
+        else:
+            k = bz.k.reshape(-1, 3)
+            wk = bz.weight.reshape(-1)
+
+        # workers must be spawned before the file is opened (forked processes
+        # would otherwise retain the file handle)
+        pool = get_pool(pool)
+
+        file = Path(file)
+        if resume and file.is_file():
+            nc = si.io.tbtrans.tbtncSileTBtrans(file, mode="a", access=0)
+            Ry2eV = si.unit.siesta.unit_convert("Ry", "eV")
+            same = (
+                len(nc.dimensions["ne"]) == len(E)
+                and len(nc.dimensions["nkpt"]) == len(k)
+                and nc.getncattr("quantities").split() == quantities
+            )
+            if (
+                not same
+                or not np.allclose(nc.variables["E"][:] * Ry2eV, E.real)
+                or not np.allclose(nc.variables["kpt"][:], k)
+            ):
+                nc.close()
+                raise ValueError(
+                    f"{self.__class__.__name__}.sweep cannot resume {file}, "
+                    "the energies, k-points or quantities are not the same."
+                )
+        else:
+            nc = si.io.tbtrans.tbtncSileTBtrans(file, mode="w", access=0)
+            self._sweep_create(nc, E, k, wk, quantities, mu, kT)
+            nc.sync()
+
+        def write(results):
+            for ik, iE, data in results:
+                for name, value in data.items():
+                    if "/" in name:
+                        grp, name = name.split("/")
+                        nc.groups[grp].variables[name][ik, iE] = value
+                    else:
+                        nc.variables[name][ik, iE] = value
+                nc.variables["done"][ik, iE] = 1
+            nc.sync()
+
+        try:
+            ik, iE = (nc.variables["done"][:] == 0).nonzero()
+            points = np.stack((ik, iE), axis=1)
+            data = (points, E, k, quantities)
+
+            if pool is None or len(points) <= 1:
+                for i in range(len(points)):
+                    write(self._sweep_range(*data, i, i + 1))
+            else:
+                ranges = chunk_ranges(len(points), pool.nprocs, chunks_per_proc)
+                # no need to ship the stored calculation
+                self.reset()
+                with SharedPayload(data, self) as pl:
+                    for results in pool.imap(
+                        _sweep_chunk, [pl] * len(ranges), *zip(*ranges), ordered=False
+                    ):
+                        write(results)
+        finally:
+            nc.close()
+
+        return si.io.tbtrans.tbtncSileTBtrans(file)
+
     def _scattering_state_reduce(self, elec, DOS, U, cutoff):
         """U on input is a fortran-index as returned from eigh or svd"""
         # Select only the first N components where N is the
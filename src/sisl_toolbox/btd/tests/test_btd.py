@@ -0,0 +1,224 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import numpy as np
+import pytest
+
+import sisl
+from sisl_toolbox.btd import DeviceGreen, DevicePivot, PivotSelfEnergy, btd_cost
+
+
+@pytest.fixture
+def setup():
+    class t:
+        def __init__(self):
+            # a ribbon (2 atoms wide) of a square lattice along the first lattice vector
+            g = sisl.Geometry(
+                [[0, 0, 0], [0, 1, 0]],
+                sisl.Atom(1, R=1.01),
+                lattice=sisl.Lattice([1, 10, 10], nsc=[3, 1, 1]),
+            )
+            self.H_elec = H_elec = sisl.Hamiltonian(g)
+            H_elec.construct([[0.1, 1.01], [0.0, -1.0]])
+
+            H = H_elec.tile(8, 0)
+            H.set_nsc(a=1)
+            # shuffle the orbitals so the pivoting is not trivial
+            rng = np.random.default_rng(4)
+            perm = rng.permutation(H.no)
+            self.H = H = H.sub(perm)
+            iperm = np.argsort(perm)
+            # the orbitals of the electrodes (in the self-energy order)
+            self.elecs = {
+                "Left": iperm[[0, 1]],
+                "Right": iperm[[H.no - 2, H.no - 1]],
+            }
+            self.semi_inf = {"Left": "-A", "Right": "+A"}
+
+        def green(self, method="bfs"):
+            pivot = DevicePivot(self.H, self.elecs, method=method)
+            elecs = [
+                PivotSelfEnergy(
+                    name,
+                    sisl.RecursiveSI(self.H_elec, self.semi_inf[name], eta=1e-4),
+                    pivot,
+                )
+                for name in self.elecs
+            ]
+            return DeviceGreen(self.H, elecs, pivot, eta=1e-4), pivot
+
+        def dense(self, G, E):
+            """Dense Green function and broadening matrices (in the original orbital order)"""
+            H = self.H.Hk(format="array", dtype=np.complex128)
+            # the device has its own eta, the self-energies use theirs
+            Ec = E + 1j * G.eta if np.isrealobj(E) else E
+            iG = Ec * np.eye(len(H)) - H
+            gamma = {}
+            for el in G.elecs:
+                o = self.elecs[el.name]
+                SE = el.self_energy(E)
+                iG[np.ix_(o, o)] -= SE
+                gamma[el.name] = el.se2broadening(SE)
+            return np.linalg.inv(iG), gamma
+
+    return t()
+
+
+def _valid_btd(pivot, H):
+    """Check that the pivoted matrix is block-tri-diagonal with the block sizes"""
+    btd = pivot.btd()
+    pvt = pivot.pivot()
+    assert btd.sum() == len(pvt)
+    assert np.array_equal(np.sort(pvt), np.arange(H.no))
+    ipvt = np.empty_like(pvt)
+    ipvt[pvt] = np.arange(len(pvt))
+    block = np.repeat(np.arange(len(btd)), btd)
+    csr = H.tocsr(0).tocoo()
+    b_row, b_col = block[ipvt[csr.row]], block[ipvt[csr.col % H.no]]
+    assert np.abs(b_row - b_col).max() <= 1
+    return block[ipvt]
+
+
+@pytest.mark.parametrize("method", ["bfs", "rcm"])
+def test_pivot_btd(setup, method):
+    pivot = DevicePivot(setup.H, setup.elecs, method=method)
+    block = _valid_btd(pivot, setup.H)
+    assert len(pivot.btd()) > 2
+    for name, o in setup.elecs.items():
+        # electrodes are not split by a block boundary
+        assert len(np.unique(block[o])) == 1
+        assert np.array_equal(pivot.pivot(name), o)
+        assert np.array_equal(pivot.pivot()[pivot.pivot(name, in_device=True)], o)
+    # the partition is cheaper than a single block
+    assert pivot.cost().flops < btd_cost([setup.H.no]).flops
+    assert "DevicePivot" in pivot.report([setup.H.no])
+
+
+def test_pivot_fail(setup):
+    with pytest.raises(ValueError):
+        # electrodes outside the device region
+        DevicePivot(setup.H, setup.elecs, device=setup.elecs["Left"])
+    with pytest.raises(ValueError):
+        DevicePivot(setup.H, setup.elecs, method="unknown")
+
+
+def test_green_dense(setup):
+    G, pivot = setup.green()
+    pvt = pivot.pivot()
+    E = 0.3
+    G_dense, _ = setup.dense(G, E)
+    assert np.allclose(G.green(E), G_dense[np.ix_(pvt, pvt)])
+
+
+@pytest.mark.parametrize("pool", [None, 2])
+def test_density_matrix_eq(setup, pool):
+    G, pivot = setup.green()
+    # a few points in the complex plane with complex weights
+    E = np.array([-1.5 + 0.5j, -0.5 + 1.0j, 0.5 + 0.3j])
+    w = np.array([0.3 + 0.1j, 0.2 - 0.4j, 0.1 + 0.2j])
+    DM = G.density_matrix((E, w), pool=pool)
+
+    D = 0.0
+    for e, we in zip(E, w):
+        G_dense, _ = setup.dense(G, e)
+        D = D + we * G_dense - np.conj(we) * G_dense.T.conj()
+    D = (1j * D / (2 * np.pi)).real
+    assert np.abs(D).max() > 1e-3
+
+    csr = DM.tocsr(0)
+    rows, cols = setup.H.tocsr(0).nonzero()
+    assert np.allclose(csr[rows, cols], D[rows, cols], atol=1e-12)
+    # only the Hamiltonian sparsity pattern is calculated
+    assert csr.nnz <= setup.H.nnz
+
+
+@pytest.mark.parametrize("pool", [None, 2])
+def test_density_matrix_neq(setup, pool):
+    G, pivot = setup.green()
+    E = np.linspace(-0.5, 0.5, 4)
+    w = np.array([[0.1, 0.2, 0.3, 0.4], [0.0, 0.2, 0.0, 0.1]])
+    DM = G.density_matrix((E, w), elec=["Left", "Right"], pool=pool)
+
+    D = 0.0
+    for iE, e in enumerate(E):
+        G_dense, gamma = setup.dense(G, e)
+        for ie, name in enumerate(["Left", "Right"]):
+            o = setup.elecs[name]
+            A = G_dense[:, o] @ gamma[name] @ G_dense[:, o].T.conj()
+            D = D + w[ie, iE] * A
+    D = D.real / (2 * np.pi)
+    assert np.abs(D).max() > 1e-3
+
+    csr = DM.tocsr(0)
+    rows, cols = setup.H.tocsr(0).nonzero()
+    assert np.allclose(csr[rows, cols], D[rows, cols], atol=1e-12)
+
+    # accumulating into an existing density matrix
+    DM2 = G.density_matrix((E, w), elec=["Left", "Right"], DM=DM.copy())
+    assert np.allclose(DM2.tocsr(0).toarray(), 2 * csr.toarray())
+    with pytest.raises(ValueError):
+        G.density_matrix(
+            (E, w), elec="Left", DM=sisl.DensityMatrix(setup.H_elec.geometry)
+        )
+
+
+class _Interrupt(Exception):
+    pass
+
+
+def test_sweep_resume(setup, tmp_path, monkeypatch):
+    pytest.importorskip("netCDF4")
+    G, pivot = setup.green()
+    E = np.linspace(-0.5, 0.5, 5)
+    f = tmp_path / "sweep.TBT.nc"
+
+    # interrupt the sweep after 2 points
+    sweep_range = DeviceGreen._sweep_range
+    calls = []
+    limit = [2]
+
+    def interrupt(self, points, *args):
+        start, stop = args[-2:]
+        if len(calls) + stop - start > limit[0]:
+            raise _Interrupt
+        calls.extend(map(tuple, points[start:stop]))
+        return sweep_range(self, points, *args)
+
+    monkeypatch.setattr(DeviceGreen, "_sweep_range", interrupt)
+    with pytest.raises(_Interrupt):
+        G.sweep(f, E)
+    with sisl.io.tbtrans.tbtncSileTBtrans(f) as nc:
+        assert nc.variables["done"][:].sum() == 2
+
+    # resuming with other energies is not allowed
+    with pytest.raises(ValueError):
+        G.sweep(f, E[1:])
+
+    # resuming only calculates the remaining points
+    done = list(calls)
+    calls.clear()
+    limit[0] = len(E)
+    tbt = G.sweep(f, E)
+    assert len(calls) == len(E) - 2
+    assert not set(calls) & set(done)
+    with sisl.io.tbtrans.tbtncSileTBtrans(f) as nc:
+        assert nc.variables["done"][:].all()
+
+    # a full sweep in one go gives the same
+    monkeypatch.setattr(DeviceGreen, "_sweep_range", sweep_range)
+    full = G.sweep(tmp_path / "full.TBT.nc", E)
+    assert np.allclose(
+        tbt.transmission("Left", "Right"), full.transmission("Left", "Right")
+    )
+    assert np.allclose(tbt.DOS(), full.DOS())
+
+    # compare against the dense Green function
+    T = []
+    DOS = []
+    for e in E:
+        G_dense, gamma = setup.dense(G, e)
+        GLR = G_dense[np.ix_(setup.elecs["Right"], setup.elecs["Left"])]
+        T.append(np.trace(gamma["Right"] @ GLR @ gamma["Left"] @ GLR.T.conj()).real)
+        DOS.append(-np.trace(G_dense).imag / np.pi)
+    assert np.allclose(tbt.transmission("Left", "Right"), T)
+    assert np.allclose(tbt.DOS(sum=True), DOS)